@@ -0,0 +1,26 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- 报工记录幂等键（终端/PLC网关批量报工重试去重）
+        ALTER TABLE "apps_kuaizhizao_reporting_records"
+            ADD COLUMN IF NOT EXISTS "idempotency_key" VARCHAR(64);
+
+        CREATE UNIQUE INDEX IF NOT EXISTS "uid_apps_kuaizh_reporting_records_tenant_idem_key"
+            ON "apps_kuaizhizao_reporting_records" ("tenant_id", "idempotency_key")
+            WHERE "idempotency_key" IS NOT NULL;
+
+        COMMENT ON COLUMN "apps_kuaizhizao_reporting_records"."idempotency_key" IS '幂等键（同一组织内唯一，用于批量报工重试去重）';
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "uid_apps_kuaizh_reporting_records_tenant_idem_key";
+
+        ALTER TABLE "apps_kuaizhizao_reporting_records"
+            DROP COLUMN IF EXISTS "idempotency_key";
+    """
@@ -0,0 +1,46 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 报工日汇总表（报工统计预聚合）
+        -- ============================================
+        CREATE TABLE IF NOT EXISTS "apps_kuaizhizao_reporting_daily_stats" (
+            "uuid" VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+            "tenant_id" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "stat_date" DATE NOT NULL,
+            "dimension" VARCHAR(20) NOT NULL,
+            "dimension_key" VARCHAR(200) NOT NULL DEFAULT '',
+            "record_count" INT NOT NULL DEFAULT 0,
+            "pending_count" INT NOT NULL DEFAULT 0,
+            "approved_count" INT NOT NULL DEFAULT 0,
+            "rejected_count" INT NOT NULL DEFAULT 0,
+            "reported_quantity" DECIMAL(18,2) NOT NULL DEFAULT 0,
+            "qualified_quantity" DECIMAL(18,2) NOT NULL DEFAULT 0,
+            "unqualified_quantity" DECIMAL(18,2) NOT NULL DEFAULT 0,
+            "work_hours" DECIMAL(16,2) NOT NULL DEFAULT 0,
+            CONSTRAINT "uid_apps_kuaizh_reporting_daily_stats_key" UNIQUE ("tenant_id", "stat_date", "dimension", "dimension_key")
+        );
+
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_reporting_daily_stats_tenant_dim_date"
+            ON "apps_kuaizhizao_reporting_daily_stats" ("tenant_id", "dimension", "stat_date");
+
+        COMMENT ON TABLE "apps_kuaizhizao_reporting_daily_stats" IS '快格轻制造 - 报工日汇总';
+
+        -- 报工统计按组织+报工时间范围扫描
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_reporting_records_tenant_reported_at"
+            ON "apps_kuaizhizao_reporting_records" ("tenant_id", "reported_at");
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_apps_kuaizh_reporting_records_tenant_reported_at";
+        DROP TABLE IF EXISTS "apps_kuaizhizao_reporting_daily_stats" CASCADE;
+    """
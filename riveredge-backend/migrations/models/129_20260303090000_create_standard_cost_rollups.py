@@ -0,0 +1,45 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 标准成本卷积表
+        -- ============================================
+        CREATE TABLE IF NOT EXISTS "apps_kuaizhizao_standard_cost_rollups" (
+            "uuid" VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+            "tenant_id" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "cost_version" VARCHAR(50) NOT NULL DEFAULT 'STD',
+            "material_id" INT NOT NULL,
+            "material_code" VARCHAR(50) NOT NULL,
+            "material_name" VARCHAR(200) NOT NULL,
+            "source_type" VARCHAR(20) NOT NULL,
+            "low_level_code" INT NOT NULL DEFAULT 0,
+            "material_cost" DECIMAL(18,6) NOT NULL DEFAULT 0,
+            "labor_cost" DECIMAL(18,6) NOT NULL DEFAULT 0,
+            "manufacturing_cost" DECIMAL(18,6) NOT NULL DEFAULT 0,
+            "total_cost" DECIMAL(18,6) NOT NULL DEFAULT 0,
+            "cost_details" JSONB,
+            "is_stale" BOOL NOT NULL DEFAULT FALSE,
+            "calculated_at" TIMESTAMPTZ,
+            CONSTRAINT "uid_apps_kuaizh_standard_cost_rollups_key" UNIQUE ("tenant_id", "cost_version", "material_id")
+        );
+
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_standard_cost_rollups_stale"
+            ON "apps_kuaizhizao_standard_cost_rollups" ("tenant_id", "cost_version", "is_stale");
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_standard_cost_rollups_material_id"
+            ON "apps_kuaizhizao_standard_cost_rollups" ("material_id");
+
+        COMMENT ON TABLE "apps_kuaizhizao_standard_cost_rollups" IS '快格轻制造 - 标准成本卷积';
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "apps_kuaizhizao_standard_cost_rollups" CASCADE;
+    """
@@ -0,0 +1,47 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- BOM导入任务表（分块导入进度与断点）
+        -- ============================================
+        CREATE TABLE IF NOT EXISTS "apps_master_data_bom_import_jobs" (
+            "uuid" VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+            "tenant_id" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "file_uuid" VARCHAR(36) NOT NULL,
+            "file_name" VARCHAR(255),
+            "version" VARCHAR(50) NOT NULL DEFAULT '1.0',
+            "bom_code" VARCHAR(100),
+            "effective_date" TIMESTAMPTZ,
+            "description" TEXT,
+            "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+            "phase" VARCHAR(20) NOT NULL DEFAULT 'validate',
+            "total_rows" INT NOT NULL DEFAULT 0,
+            "processed_rows" INT NOT NULL DEFAULT 0,
+            "checkpoint" JSONB,
+            "errors" JSONB,
+            "error_message" TEXT,
+            "started_at" TIMESTAMPTZ,
+            "finished_at" TIMESTAMPTZ,
+            "created_by" INT
+        );
+
+        CREATE INDEX IF NOT EXISTS "idx_apps_master_bom_import_jobs_tenant_status"
+            ON "apps_master_data_bom_import_jobs" ("tenant_id", "status");
+        CREATE INDEX IF NOT EXISTS "idx_apps_master_bom_import_jobs_created_at"
+            ON "apps_master_data_bom_import_jobs" ("created_at");
+
+        COMMENT ON TABLE "apps_master_data_bom_import_jobs" IS '基础数据管理 - BOM导入任务';
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "apps_master_data_bom_import_jobs" CASCADE;
+    """
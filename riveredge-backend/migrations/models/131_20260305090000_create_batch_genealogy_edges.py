@@ -0,0 +1,74 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 批次谱系边表（物料绑定物化，用于批次追溯）
+        -- ============================================
+        CREATE TABLE IF NOT EXISTS "apps_kuaizhizao_batch_genealogy_edges" (
+            "uuid" VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+            "tenant_id" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "work_order_id" INT NOT NULL,
+            "work_order_code" VARCHAR(50) NOT NULL,
+            "operation_name" VARCHAR(200),
+            "input_batch_no" VARCHAR(100),
+            "input_material_id" INT,
+            "input_material_code" VARCHAR(50),
+            "input_material_name" VARCHAR(200),
+            "output_batch_no" VARCHAR(100),
+            "output_material_id" INT,
+            "output_material_code" VARCHAR(50),
+            "output_material_name" VARCHAR(200)
+        );
+
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_genealogy_tenant_input"
+            ON "apps_kuaizhizao_batch_genealogy_edges" ("tenant_id", "input_batch_no");
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_genealogy_tenant_output"
+            ON "apps_kuaizhizao_batch_genealogy_edges" ("tenant_id", "output_batch_no");
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_genealogy_tenant_wo"
+            ON "apps_kuaizhizao_batch_genealogy_edges" ("tenant_id", "work_order_id");
+
+        COMMENT ON TABLE "apps_kuaizhizao_batch_genealogy_edges" IS '快格轻制造 - 批次谱系边';
+
+        -- 物料绑定按批次查询索引（未启用谱系边表时逐层追溯使用）
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_material_bindings_tenant_type_batch"
+            ON "apps_kuaizhizao_material_bindings" ("tenant_id", "binding_type", "batch_no");
+
+        -- 由现有物料绑定回填谱系边（每个工单的每个投料批次、产出批次各一行，取最早的绑定）
+        INSERT INTO "apps_kuaizhizao_batch_genealogy_edges" (
+            "tenant_id", "work_order_id", "work_order_code", "operation_name",
+            "input_batch_no", "input_material_id", "input_material_code", "input_material_name"
+        )
+        SELECT DISTINCT ON (tenant_id, work_order_id, batch_no)
+            tenant_id, work_order_id, work_order_code, operation_name,
+            batch_no, material_id, material_code, material_name
+        FROM "apps_kuaizhizao_material_bindings"
+        WHERE binding_type = 'feeding' AND deleted_at IS NULL
+          AND batch_no IS NOT NULL AND batch_no <> ''
+        ORDER BY tenant_id, work_order_id, batch_no, id;
+
+        INSERT INTO "apps_kuaizhizao_batch_genealogy_edges" (
+            "tenant_id", "work_order_id", "work_order_code", "operation_name",
+            "output_batch_no", "output_material_id", "output_material_code", "output_material_name"
+        )
+        SELECT DISTINCT ON (tenant_id, work_order_id, batch_no)
+            tenant_id, work_order_id, work_order_code, operation_name,
+            batch_no, material_id, material_code, material_name
+        FROM "apps_kuaizhizao_material_bindings"
+        WHERE binding_type = 'discharging' AND deleted_at IS NULL
+          AND batch_no IS NOT NULL AND batch_no <> ''
+        ORDER BY tenant_id, work_order_id, batch_no, id;
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_apps_kuaizh_material_bindings_tenant_type_batch";
+        DROP TABLE IF EXISTS "apps_kuaizhizao_batch_genealogy_edges" CASCADE;
+    """
@@ -0,0 +1,25 @@
+"""
+为 DemandComputation 模型添加 net_change_state 字段
+
+MRP 全量运算结束时保存需求行展开结果与 BOM 指纹，供净改变重算复用。
+"""
+
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "apps_kuaizhizao_demand_computations"
+        ADD COLUMN IF NOT EXISTS "net_change_state" JSONB NULL;
+
+        COMMENT ON COLUMN "apps_kuaizhizao_demand_computations"."net_change_state" IS '净改变重算状态（需求行展开结果、BOM指纹、物料汇总需求）';
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE "apps_kuaizhizao_demand_computations"
+        DROP COLUMN IF EXISTS "net_change_state";
+    """
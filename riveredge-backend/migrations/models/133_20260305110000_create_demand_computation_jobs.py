@@ -0,0 +1,62 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 需求计算任务表（后台执行进度、断点与取消）
+        -- ============================================
+        CREATE TABLE IF NOT EXISTS "apps_kuaizhizao_demand_computation_jobs" (
+            "uuid" VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+            "tenant_id" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "computation_id" INT NOT NULL,
+            "status" VARCHAR(20) NOT NULL DEFAULT 'pending',
+            "phase" VARCHAR(20) NOT NULL DEFAULT 'explode',
+            "progress" INT NOT NULL DEFAULT 0,
+            "total_materials" INT NOT NULL DEFAULT 0,
+            "processed_materials" INT NOT NULL DEFAULT 0,
+            "checkpoint" JSONB,
+            "cancel_requested" BOOLEAN NOT NULL DEFAULT FALSE,
+            "error_message" TEXT,
+            "started_at" TIMESTAMPTZ,
+            "finished_at" TIMESTAMPTZ,
+            "created_by" INT
+        );
+
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_demand_comp_jobs_tenant_comp"
+            ON "apps_kuaizhizao_demand_computation_jobs" ("tenant_id", "computation_id");
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_demand_comp_jobs_tenant_status"
+            ON "apps_kuaizhizao_demand_computation_jobs" ("tenant_id", "status");
+
+        COMMENT ON TABLE "apps_kuaizhizao_demand_computation_jobs" IS '快格轻制造 - 需求计算任务';
+
+        -- 需求计算任务展开行（展开阶段断点，只追加新展开的需求行）
+        CREATE TABLE IF NOT EXISTS "apps_kuaizhizao_demand_computation_job_lines" (
+            "uuid" VARCHAR(36) NOT NULL DEFAULT gen_random_uuid()::text,
+            "tenant_id" INT,
+            "created_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "updated_at" TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+            "id" SERIAL NOT NULL PRIMARY KEY,
+            "job_id" INT NOT NULL,
+            "demand_item_id" INT NOT NULL,
+            "line_key" VARCHAR(100) NOT NULL,
+            "explosion" JSONB
+        );
+
+        CREATE INDEX IF NOT EXISTS "idx_apps_kuaizh_demand_comp_job_lines_tenant_job"
+            ON "apps_kuaizhizao_demand_computation_job_lines" ("tenant_id", "job_id");
+
+        COMMENT ON TABLE "apps_kuaizhizao_demand_computation_job_lines" IS '快格轻制造 - 需求计算任务展开行';
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS "apps_kuaizhizao_demand_computation_job_lines" CASCADE;
+        DROP TABLE IF EXISTS "apps_kuaizhizao_demand_computation_jobs" CASCADE;
+    """
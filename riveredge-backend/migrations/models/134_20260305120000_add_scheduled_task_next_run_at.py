@@ -0,0 +1,29 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 定时任务：下次计划触发时间与错过触发补偿策略
+        -- ============================================
+        ALTER TABLE "core_scheduled_tasks" ADD COLUMN IF NOT EXISTS "next_run_at" TIMESTAMPTZ;
+        ALTER TABLE "core_scheduled_tasks" ADD COLUMN IF NOT EXISTS "misfire_policy" VARCHAR(20) NOT NULL DEFAULT 'run_once';
+
+        COMMENT ON COLUMN "core_scheduled_tasks"."next_run_at" IS '下次计划触发时间（为空表示不再触发）';
+        COMMENT ON COLUMN "core_scheduled_tasks"."misfire_policy" IS '错过触发补偿策略（run_once、skip、run_all）';
+
+        -- 调度器只扫描到期的启用任务
+        CREATE INDEX IF NOT EXISTS "idx_core_schedu_is_acti_next_run"
+            ON "core_scheduled_tasks" ("is_active", "next_run_at")
+            WHERE "deleted_at" IS NULL;
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_core_schedu_is_acti_next_run";
+        ALTER TABLE "core_scheduled_tasks" DROP COLUMN IF EXISTS "misfire_policy";
+        ALTER TABLE "core_scheduled_tasks" DROP COLUMN IF EXISTS "next_run_at";
+    """
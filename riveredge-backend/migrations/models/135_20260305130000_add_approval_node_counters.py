@@ -0,0 +1,49 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 审批实例：当前节点完成计数（会签/或签 O(1) 判断）
+        -- ============================================
+        ALTER TABLE "core_approval_instances" ADD COLUMN IF NOT EXISTS "node_task_total" INT NOT NULL DEFAULT 0;
+        ALTER TABLE "core_approval_instances" ADD COLUMN IF NOT EXISTS "node_approved_count" INT NOT NULL DEFAULT 0;
+
+        COMMENT ON COLUMN "core_approval_instances"."node_task_total" IS '当前节点审批任务数';
+        COMMENT ON COLUMN "core_approval_instances"."node_approved_count" IS '当前节点已同意任务数';
+
+        -- 回填进行中实例的当前节点计数
+        UPDATE "core_approval_instances" AS i
+        SET "node_task_total" = t."total",
+            "node_approved_count" = t."approved"
+        FROM (
+            SELECT "approval_instance_id", "node_id",
+                   COUNT(*) FILTER (WHERE "status" <> 'cancelled') AS "total",
+                   COUNT(*) FILTER (WHERE "status" = 'approved') AS "approved"
+            FROM "core_approval_tasks"
+            GROUP BY "approval_instance_id", "node_id"
+        ) AS t
+        WHERE t."approval_instance_id" = i."id"
+          AND t."node_id" = i."current_node"
+          AND i."status" = 'pending';
+
+        -- 节点任务取消/统计
+        CREATE INDEX IF NOT EXISTS "idx_core_approv_instanc_node_status"
+            ON "core_approval_tasks" ("approval_instance_id", "node_id", "status");
+
+        -- 待办收件箱：只索引 pending 任务，按创建时间倒序分页
+        CREATE INDEX IF NOT EXISTS "idx_core_approv_inbox_pending"
+            ON "core_approval_tasks" ("tenant_id", "approver_id", "created_at" DESC)
+            WHERE "status" = 'pending';
+    """
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP INDEX IF EXISTS "idx_core_approv_inbox_pending";
+        DROP INDEX IF EXISTS "idx_core_approv_instanc_node_status";
+        ALTER TABLE "core_approval_instances" DROP COLUMN IF EXISTS "node_approved_count";
+        ALTER TABLE "core_approval_instances" DROP COLUMN IF EXISTS "node_task_total";
+    """
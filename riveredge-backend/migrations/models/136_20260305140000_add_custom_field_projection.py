@@ -0,0 +1,114 @@
+from tortoise import BaseDBAsyncClient
+
+RUN_IN_TRANSACTION = True
+
+# 自定义字段逻辑表名（core_custom_fields.table_name） -> 业务主表
+# 按本迁移发布时的 CUSTOM_FIELD_PROJECTION_TABLES 固化，之后新增的投影表由新迁移添加列
+PROJECTION_TABLES = {
+    "apps_kuaizhizao_work_orders": "apps_kuaizhizao_work_orders",
+    "apps_kuaizhizao_rework_orders": "apps_kuaizhizao_rework_orders",
+    "apps_kuaizhizao_outsource_orders": "apps_kuaizhizao_outsource_orders",
+    "apps_kuaizhizao_outsource_work_orders": "apps_kuaizhizao_outsource_work_orders",
+    "apps_kuaizhizao_purchase_orders": "apps_kuaizhizao_purchase_orders",
+    "apps_kuaizhizao_purchase_receipts": "apps_kuaizhizao_purchase_receipts",
+    "apps_kuaizhizao_purchase_returns": "apps_kuaizhizao_purchase_returns",
+    "apps_kuaizhizao_sales_orders": "apps_kuaizhizao_sales_orders",
+    "apps_kuaizhizao_sample_trials": "apps_kuaizhizao_sample_trials",
+    "apps_kuaizhizao_sales_deliveries": "apps_kuaizhizao_sales_deliveries",
+    "apps_kuaizhizao_sales_returns": "apps_kuaizhizao_sales_returns",
+    "apps_kuaizhizao_production_pickings": "apps_kuaizhizao_production_pickings",
+    "apps_kuaizhizao_production_returns": "apps_kuaizhizao_production_returns",
+    "apps_kuaizhizao_other_inbounds": "apps_kuaizhizao_other_inbounds",
+    "apps_kuaizhizao_other_outbounds": "apps_kuaizhizao_other_outbounds",
+    "apps_kuaizhizao_finished_goods_receipts": "apps_kuaizhizao_finished_goods_receipts",
+    "apps_kuaizhizao_incoming_inspections": "apps_kuaizhizao_incoming_inspections",
+    "apps_kuaizhizao_process_inspections": "apps_kuaizhizao_process_inspections",
+    "apps_kuaizhizao_finished_goods_inspections": "apps_kuaizhizao_finished_goods_inspections",
+    "apps_kuaizhizao_production_plans": "apps_kuaizhizao_production_plans",
+    "apps_kuaizhizao_equipment": "apps_kuaizhizao_equipment",
+    "apps_kuaizhizao_molds": "apps_kuaizhizao_molds",
+    "master_data_factory_plants": "apps_master_data_plants",
+    "master_data_factory_workshops": "apps_master_data_workshops",
+    "master_data_factory_production_lines": "apps_master_data_production_lines",
+    "master_data_factory_workstations": "apps_master_data_workstations",
+    "master_data_factory_work_centers": "apps_master_data_work_centers",
+    "master_data_warehouse_warehouses": "apps_master_data_warehouses",
+    "master_data_warehouse_storage_areas": "apps_master_data_storage_areas",
+    "master_data_warehouse_storage_locations": "apps_master_data_storage_locations",
+    "master_data_material_groups": "apps_master_data_material_groups",
+    "master_data_materials": "apps_master_data_materials",
+    "master_data_boms": "apps_master_data_bom",
+    "master_data_defect_types": "apps_master_data_defect_types",
+    "master_data_operations": "apps_master_data_operations",
+    "master_data_process_routes": "apps_master_data_process_routes",
+    "master_data_sops": "apps_master_data_sop",
+    "master_data_customers": "apps_master_data_customers",
+    "master_data_suppliers": "apps_master_data_suppliers",
+    "master_data_holidays": "apps_master_data_holidays",
+    "master_data_skills": "apps_master_data_skills",
+}
+
+
+def _index_name(table: str) -> str:
+    return f"idx_{table[5:]}_custom_fields"[:63]
+
+
+def _upgrade_table(record_table: str, table: str) -> str:
+    return f"""
+        DO $$
+        BEGIN
+            IF to_regclass('public."{table}"') IS NOT NULL THEN
+                ALTER TABLE "{table}" ADD COLUMN IF NOT EXISTS "custom_fields" JSONB;
+                COMMENT ON COLUMN "{table}"."custom_fields" IS '自定义字段值投影（字段代码 -> 值）';
+                CREATE INDEX IF NOT EXISTS "{_index_name(table)}"
+                    ON "{table}" USING GIN ("custom_fields" jsonb_path_ops);
+
+                UPDATE "{table}" AS t
+                SET "custom_fields" = p."data"
+                FROM (
+                    SELECT v."tenant_id", v."record_id",
+                           jsonb_object_agg(
+                               f."code",
+                               COALESCE(to_jsonb(v."value_text"), to_jsonb(v."value_number"),
+                                        to_jsonb(v."value_date"), v."value_json"::jsonb)
+                           ) AS "data"
+                    FROM "core_custom_field_values" AS v
+                    JOIN "core_custom_fields" AS f
+                      ON f."id" = v."custom_field_id" AND f."deleted_at" IS NULL
+                    WHERE v."record_table" = '{record_table}' AND v."deleted_at" IS NULL
+                    GROUP BY v."tenant_id", v."record_id"
+                ) AS p
+                WHERE t."id" = p."record_id" AND t."tenant_id" = p."tenant_id";
+            END IF;
+        END $$;
+    """
+
+
+def _downgrade_table(table: str) -> str:
+    return f"""
+        DROP INDEX IF EXISTS "{_index_name(table)}";
+        DO $$
+        BEGIN
+            IF to_regclass('public."{table}"') IS NOT NULL THEN
+                ALTER TABLE "{table}" DROP COLUMN IF EXISTS "custom_fields";
+            END IF;
+        END $$;
+    """
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        -- ============================================
+        -- 业务主表：自定义字段 JSONB 投影列（列表页按自定义字段过滤）
+        -- ============================================
+        -- 批量读取一页记录的字段值
+        CREATE INDEX IF NOT EXISTS "idx_core_custom_field_values_record"
+            ON "core_custom_field_values" ("tenant_id", "record_table", "record_id")
+            WHERE "deleted_at" IS NULL;
+    """ + "".join(_upgrade_table(record_table, table) for record_table, table in PROJECTION_TABLES.items())
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return "".join(_downgrade_table(table) for table in PROJECTION_TABLES.values()) + """
+        DROP INDEX IF EXISTS "idx_core_custom_field_values_record";
+    """
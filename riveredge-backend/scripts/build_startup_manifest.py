@@ -0,0 +1,56 @@
+"""
+生成启动清单
+
+扫描 src/apps 生成插件、模型模块与路由位置清单（不导入应用模块），供进程启动时直接读取。
+建议在镜像构建或发布时执行；清单过期（文件指纹不一致）时服务首次启动也会自动重建。
+
+用法：
+    python scripts/build_startup_manifest.py            # 生成到默认路径（或 STARTUP_MANIFEST_PATH）
+    python scripts/build_startup_manifest.py --check    # 仅检查清单是否为最新，过期时返回 1
+    python scripts/build_startup_manifest.py --output /tmp/startup_manifest.json
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from core.utils import startup_manifest  # noqa: E402
+
+
+def main(output: str, check: bool) -> int:
+    path = Path(output) if output else startup_manifest._manifest_path()
+    if check:
+        fingerprint = startup_manifest.compute_fingerprint()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                current = json.load(f).get("fingerprint")
+        except (OSError, json.JSONDecodeError):
+            current = None
+        if current != fingerprint:
+            print(f"启动清单已过期或不存在: {path}")
+            return 1
+        print(f"启动清单为最新: {path}")
+        return 0
+
+    data = startup_manifest.build_manifest()
+    startup_manifest.write_manifest(data, path)
+    model_count = sum(len(app["model_modules"]) for app in data["apps"].values())
+    router_count = sum(len(app["api_modules"]) for app in data["apps"].values())
+    print(f"已生成启动清单: {path}")
+    print(f"  插件 {len(data['plugins'])} 个，应用 {len(data['apps'])} 个，模型模块 {model_count} 个，API 模块 {router_count} 个")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成启动清单")
+    parser.add_argument("--output", default="", help="输出路径（默认 STARTUP_MANIFEST_PATH 或 .cache/startup_manifest.json）")
+    parser.add_argument("--check", action="store_true", help="仅检查清单是否为最新")
+    args = parser.parse_args()
+    sys.exit(main(args.output, args.check))
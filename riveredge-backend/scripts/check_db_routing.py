@@ -0,0 +1,84 @@
+"""
+数据库读写路由本地验证
+
+按 DB_REPLICA_* 配置初始化主库与副本两个连接（DB_REPLICA_HOST 可指向第二个 PostgreSQL 实例，
+也可指向主库地址作为“伪副本”），在不同场景下查看读取被路由到哪个连接：
+未标记、标记走副本、请求内写入后、组织写入后的粘滞窗口内、事务内。
+
+用法：
+    DB_REPLICA_HOST=127.0.0.1 DB_REPLICA_PORT=5433 python scripts/check_db_routing.py
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from tortoise import Tortoise  # noqa: E402
+from tortoise.router import router  # noqa: E402
+from tortoise.transactions import in_transaction  # noqa: E402
+
+from infra.config.infra_config import infra_settings  # noqa: E402
+from infra.domain.tenant_context import set_current_tenant_id  # noqa: E402
+from infra.infrastructure.database import db_router  # noqa: E402
+from infra.infrastructure.database.database import TORTOISE_ORM  # noqa: E402
+from infra.models.tenant import Tenant  # noqa: E402
+
+IDENTITY_SQL = (
+    "SELECT current_setting('application_name') AS application_name, "
+    "inet_server_port() AS port, pg_is_in_recovery() AS in_recovery"
+)
+
+
+async def describe(label: str) -> None:
+    db = router.db_for_read(Tenant) or Tenant._meta.db
+    _, rows = await db.execute_query(IDENTITY_SQL)
+    row = dict(rows[0])
+    print(f"{label:<28} -> {db.connection_name:<8} {row['application_name']} port={row['port']} recovery={row['in_recovery']}")
+
+
+async def main() -> int:
+    primary = TORTOISE_ORM["connections"]["default"]
+    replica = db_router.build_replica_connection(primary)
+    if replica is None:
+        print("未配置 DB_REPLICA_HOST，无副本可验证")
+        return 1
+
+    await Tortoise.init(config={
+        "connections": {db_router.PRIMARY_CONNECTION: primary, db_router.REPLICA_CONNECTION: replica},
+        "routers": [db_router.ROUTER_PATH],
+        "apps": {"models": {"models": ["infra.models.tenant"], "default_connection": "default"}},
+        "use_tz": infra_settings.USE_TZ,
+        "timezone": infra_settings.TIMEZONE,
+    })
+    try:
+        set_current_tenant_id(1)
+        await describe("未标记")
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            await describe("标记走副本")
+            async with in_transaction(db_router.PRIMARY_CONNECTION):
+                await describe("事务内")
+            await describe("事务后（粘滞）")
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            db_router.mark_write(tenant_id=2)
+            await describe("本请求写入后")
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            db_router.mark_write(tenant_id=1)
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            await describe("组织写入后的新请求")
+        print(db_router.get_routing_stats())
+    finally:
+        await Tortoise.close_connections()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,210 @@
+"""
+消息发送传输层本地验证
+
+启动本地假 SMTP 服务与假 HTTP 服务（不访问外网与数据库），通过 MessageTransport 批量发送邮件与短信，
+检查 SMTP 会话复用、HTTP keep-alive、按服务商限流与失败回报是否符合预期。
+
+用法：
+    python scripts/check_message_transport.py --emails 500 --sms 200 --rate 100
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from core.services.messaging import message_transport as transport_module  # noqa: E402
+from core.services.messaging.message_transport import MessageTransport, OutboundMessage  # noqa: E402
+
+
+class FakeSMTPServer:
+    """最小 SMTP 服务（EHLO、AUTH PLAIN/LOGIN、MAIL、RCPT、DATA、RSET、NOOP、QUIT），拒绝 reject@ 开头的收件人"""
+
+    def __init__(self):
+        self.connections = 0
+        self.logins = 0
+        self.messages = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        def reply(line: str) -> None:
+            writer.write((line + "\r\n").encode())
+
+        reply("220 fake-smtp ready")
+        await writer.drain()
+        recipients = []
+        while True:
+            raw = await reader.readline()
+            if not raw:
+                break
+            line = raw.decode().rstrip("\r\n")
+            verb = line.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250-fake-smtp\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME\r\n")
+            elif verb == "AUTH":
+                self.logins += 1
+                reply("235 authenticated")
+            elif verb == "MAIL":
+                recipients = []
+                reply("250 ok")
+            elif verb == "RCPT":
+                if "<reject@" in line.lower():
+                    reply("550 mailbox unavailable")
+                else:
+                    recipients.append(line)
+                    reply("250 ok")
+            elif verb == "DATA":
+                reply("354 end with .")
+                await writer.drain()
+                body = []
+                while True:
+                    data_line = await reader.readline()
+                    if data_line in (b".\r\n", b""):
+                        break
+                    body.append(data_line)
+                self.messages.append((recipients, b"".join(body)))
+                reply("250 queued")
+            elif verb in ("RSET", "NOOP"):
+                reply("250 ok")
+            elif verb == "QUIT":
+                reply("221 bye")
+                await writer.drain()
+                break
+            else:
+                reply("502 not implemented")
+            await writer.drain()
+        writer.close()
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+class FakeHTTPServer:
+    """最小 HTTP/1.1 服务（keep-alive），记录请求体，对 recipient 为 fail 的请求返回 500"""
+
+    def __init__(self):
+        self.connections = 0
+        self.requests = []
+        self.server = None
+
+    async def start(self) -> int:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            length = 0
+            while True:
+                header = await reader.readline()
+                if header in (b"\r\n", b""):
+                    break
+                name, _, value = header.decode().partition(":")
+                if name.strip().lower() == "content-length":
+                    length = int(value.strip())
+            payload = json.loads(await reader.readexactly(length)) if length else {}
+            self.requests.append(payload)
+            status = "500 Internal Server Error" if payload.get("recipient") == "fail" else "200 OK"
+            body = b'{"ok": true}'
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+            )
+            await writer.drain()
+        writer.close()
+
+    async def stop(self) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+
+def check(condition: bool, description: str) -> bool:
+    print(f"  [{'OK' if condition else 'FAIL'}] {description}")
+    return condition
+
+
+async def main(emails: int, sms: int, rate: float) -> int:
+    smtp_server, http_server = FakeSMTPServer(), FakeHTTPServer()
+    smtp_port = await smtp_server.start()
+    http_port = await http_server.start()
+    transport = MessageTransport()
+    results = []
+
+    smtp_config = {
+        "smtp_host": "127.0.0.1",
+        "smtp_port": smtp_port,
+        "smtp_username": "robot@example.com",
+        "smtp_password": "secret",
+        "smtp_use_tls": False,
+        "rate_limit_per_second": 0,
+    }
+    items = [
+        OutboundMessage(type="email", recipient=f"user{i}@example.com", subject=f"通知 {i}", content="内容",
+                        config=smtp_config, config_key="smtp")
+        for i in range(emails)
+    ]
+    items.append(OutboundMessage(type="email", recipient="reject@example.com", subject="拒收", content="内容",
+                                 config=smtp_config, config_key="smtp"))
+    started = time.perf_counter()
+    for offset in range(0, len(items), transport_module.BATCH_SIZE):
+        await transport.send_batch(items[offset:offset + transport_module.BATCH_SIZE])
+    elapsed = time.perf_counter() - started
+    print(f"邮件：{emails} 封，耗时 {elapsed:.2f}s，SMTP 连接 {smtp_server.connections} 个，登录 {smtp_server.logins} 次")
+    expected_connections = transport_module.SMTP_POOL_SIZE + emails // transport_module.SMTP_MAX_MESSAGES_PER_CONNECTION + 2
+    results.append(check(len(smtp_server.messages) == emails, "所有邮件送达假 SMTP 服务"))
+    results.append(check(smtp_server.connections <= expected_connections, f"SMTP 会话复用（连接数 <= {expected_connections}）"))
+    results.append(check(not items[-1].success and items[-1].error is not None, "被拒收件人回报失败"))
+    results.append(check(all(item.success for item in items[:-1]), "其余邮件回报成功"))
+
+    http_config = {
+        "api_url": f"http://127.0.0.1:{http_port}/sms/send",
+        "headers": {"X-Api-Key": "test"},
+        "extra_params": {"sign_name": "RiverEdge"},
+        "rate_limit_per_second": rate,
+        "rate_limit_burst": 1,
+    }
+    sms_items = [
+        OutboundMessage(type="sms", recipient=f"1380000{i:04d}", content="验证码 1234", config=http_config, config_key="sms")
+        for i in range(sms)
+    ]
+    sms_items.append(OutboundMessage(type="sms", recipient="fail", content="失败", config=http_config, config_key="sms"))
+    started = time.perf_counter()
+    await transport.send_batch(sms_items)
+    elapsed = time.perf_counter() - started
+    minimum = (len(sms_items) - 1) / rate
+    print(f"短信：{len(sms_items)} 条，耗时 {elapsed:.2f}s，HTTP 连接 {http_server.connections} 个")
+    results.append(check(len(http_server.requests) == len(sms_items), "所有短信请求送达假 HTTP 服务"))
+    results.append(check(elapsed >= minimum * 0.9, f"按服务商限流（>= {minimum:.2f}s）"))
+    results.append(check(http_server.connections <= transport_module.HTTP_MAX_CONNECTIONS, "HTTP 连接复用"))
+    results.append(check(http_server.requests[0].get("sign_name") == "RiverEdge", "extra_params 合并进请求体"))
+    results.append(check(not sms_items[-1].success and "500" in (sms_items[-1].error or ""), "服务商错误回报失败"))
+
+    await transport.close()
+    await smtp_server.stop()
+    await http_server.stop()
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="消息发送传输层本地验证")
+    parser.add_argument("--emails", type=int, default=500)
+    parser.add_argument("--sms", type=int, default=200)
+    parser.add_argument("--rate", type=float, default=100)
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.emails, args.sms, args.rate)))
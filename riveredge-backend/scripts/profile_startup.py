@@ -0,0 +1,105 @@
+"""
+启动耗时分析
+
+在当前进程中导入 server.main（可选执行 lifespan 启动阶段，需要数据库与 Redis），输出各阶段耗时、
+模块导入耗时与数据库耗时；--importtime 时另起子进程以 `python -X importtime` 导入 server.main，
+列出自身导入耗时最高的模块与各顶层包的累计导入耗时。
+
+用法：
+    python scripts/profile_startup.py                  # 只分析模块导入阶段
+    python scripts/profile_startup.py --lifespan       # 同时执行 lifespan 启动（连接数据库）
+    python scripts/profile_startup.py --importtime 30  # 列出导入最慢的 30 个模块
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Any, Dict, List, Tuple
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(SRC_DIR)
+
+
+def print_report(report: Dict[str, Any]) -> None:
+    print(f"总耗时 {report['total_ms']:.0f}ms（导入 {report['import_ms']:.0f}ms，数据库 {report['db_ms']:.0f}ms），"
+          f"已加载模块 {report['modules_loaded']} 个")
+    print(f"{'阶段':<24}{'耗时(ms)':>10}{'导入(ms)':>10}{'数据库(ms)':>12}{'新增模块':>10}")
+    for phase in report["phases"]:
+        print(f"{phase['name']:<24}{phase['duration_ms']:>10.1f}{phase['import_ms']:>10.1f}"
+              f"{phase['db_ms']:>12.1f}{phase['modules_loaded']:>10}")
+
+
+async def run_lifespan(app) -> None:
+    async with app.router.lifespan_context(app):
+        pass
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """解析 -X importtime 输出：(模块名, 自身耗时 us, 累计耗时 us)"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, values = line.split(":", 1)
+            self_us, cumulative_us, name = values.split("|", 2)
+            rows.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return rows
+
+
+def print_importtime(top: int) -> int:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server.main"],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True,
+    )
+    rows = parse_importtime(result.stderr)
+    if not rows:
+        print("未获取到导入耗时数据（server.main 导入失败？）")
+        print(result.stderr[-2000:])
+        return 1
+
+    print(f"\n自身导入耗时最高的 {top} 个模块：")
+    print(f"{'自身(ms)':>10}{'累计(ms)':>10}  模块")
+    for name, self_us, cumulative_us in sorted(rows, key=lambda row: row[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:>10.1f}{cumulative_us / 1000:>10.1f}  {name}")
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        packages[name.split(".", 1)[0]] += self_us
+    print("\n各顶层包导入耗时：")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{self_us / 1000:>10.1f}ms  {package}")
+    return 0
+
+
+def main(lifespan: bool, importtime: int) -> int:
+    from core.utils.startup_profiler import startup_profiler
+
+    from server import main as server_main  # noqa: F401  导入即执行模块级启动阶段
+
+    if lifespan:
+        asyncio.run(run_lifespan(server_main.app))
+    print_report(startup_profiler.report())
+    print(f"延迟加载路由（未导入）: {len(server_main.lazy_routers.pending())} 个")
+
+    if importtime:
+        return print_importtime(importtime)
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="启动耗时分析")
+    parser.add_argument("--lifespan", action="store_true", help="执行 lifespan 启动阶段（需要数据库与 Redis）")
+    parser.add_argument("--importtime", type=int, default=0, help="列出导入最慢的 N 个模块")
+    args = parser.parse_args()
+    sys.exit(main(args.lifespan, args.importtime))
@@ -7,19 +7,29 @@ Author: Luigi Lu
 Date: 2025-01-01
 """
 
-from typing import Type, TypeVar, Generic, Optional, List, Any, Dict
+import hashlib
+import json
+from typing import Type, TypeVar, Generic, Optional, List, Any, Dict, Iterable, Tuple
 from datetime import datetime
+from tortoise.expressions import Q
 from tortoise.models import Model
+from tortoise.queryset import QuerySet
 from tortoise.transactions import in_transaction
 from loguru import logger
 
+from apps.list_query import decode_cursor, encode_cursor
 from core.services.base import BaseService
 from core.services.business.code_generation_service import CodeGenerationService
-from infra.services.user_service import UserService
+from infra.infrastructure.cache.cache_manager import cache_manager
+from infra.services.user_directory import UNKNOWN_USER_NAME, UserDirectory
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
 
 T = TypeVar('T', bound=Model)
 
+# 列表总数缓存
+LIST_TOTAL_CACHE_NAMESPACE = "list_total"
+LIST_TOTAL_CACHE_TTL = 30
+
 
 class AppBaseService(BaseService[T]):
     """
@@ -30,6 +40,7 @@ class AppBaseService(BaseService[T]):
     - 统一的用户信息获取
     - 统一的事务管理
     - 统一的CRUD操作（带租户隔离）
+    - 统一的列表查询（键集分页、总数缓存、批量关联加载）
     """
 
     def __init__(self, model: Optional[Type[T]] = None):
@@ -80,7 +91,7 @@ class AppBaseService(BaseService[T]):
 
     async def get_user_info(self, user_id: int) -> Dict[str, Any]:
         """
-        获取用户信息
+        获取用户信息（经用户目录缓存）
 
         Args:
             user_id: 用户ID
@@ -88,25 +99,21 @@ class AppBaseService(BaseService[T]):
         Returns:
             Dict: 用户信息（包含id, username, name等）
         """
-        user_service = UserService()
-        user = await user_service.get_user_by_id(user_id)
-        if not user:
+        entry = (await UserDirectory.get_entries([user_id])).get(user_id)
+        if not entry:
             return {
                 "id": user_id,
-                "username": "未知用户",
-                "name": "未知用户",
+                "username": UNKNOWN_USER_NAME,
+                "name": UNKNOWN_USER_NAME,
                 "email": ""
             }
         
-        # User模型使用full_name字段，而不是first_name和last_name
-        user_name = user.full_name if hasattr(user, 'full_name') and user.full_name else user.username
-        
         return {
-            "id": user.id,
-            "username": user.username,
-            "name": user_name,
-            "full_name": user.full_name if hasattr(user, 'full_name') else None,
-            "email": user.email if hasattr(user, 'email') else None
+            "id": entry.id,
+            "username": entry.username,
+            "name": entry.display_name,
+            "full_name": entry.full_name,
+            "email": entry.email
         }
 
     async def get_user_name(self, user_id: int) -> str:
@@ -119,8 +126,150 @@ class AppBaseService(BaseService[T]):
         Returns:
             str: 用户名称
         """
-        user_info = await self.get_user_info(user_id)
-        return user_info["name"]
+        names = await UserDirectory.resolve_names([user_id])
+        return names.get(user_id, UNKNOWN_USER_NAME)
+
+    async def resolve_names(self, user_ids: Iterable[Optional[int]]) -> Dict[int, str]:
+        """
+        批量解析用户名称（经用户目录缓存，缺失的用户一次查询补齐）
+
+        Args:
+            user_ids: 用户ID列表（可重复，None 会被忽略）
+
+        Returns:
+            Dict[int, str]: 用户ID -> 用户名称（不存在的用户为 UNKNOWN_USER_NAME）
+        """
+        return await UserDirectory.resolve_names(user_ids)
+
+    # ==================== 列表查询 ====================
+
+    async def paginate(
+        self,
+        query: QuerySet,
+        limit: int,
+        skip: int = 0,
+        cursor: Optional[str] = None,
+        order_field: str = "created_at",
+        descending: bool = True,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """
+        分页查询（传入游标时使用键集分页，否则兼容 skip/limit）
+
+        按 (order_field, id) 排序；排序字段不可为空时返回下一页游标。
+        键集分页不使用 OFFSET，深翻页与第一页成本相同。
+
+        Args:
+            query: 已应用过滤条件的查询集
+            limit: 每页数量
+            skip: 跳过数量（仅无游标时生效）
+            cursor: 上一页返回的游标
+            order_field: 排序字段
+            descending: 是否降序
+
+        Returns:
+            Tuple[List, Optional[str]]: (当前页记录, 下一页游标；无下一页时为 None)
+
+        Raises:
+            ValidationError: 游标无效或排序字段不支持游标分页时抛出
+        """
+        field = query.model._meta.fields_map.get(order_field)
+        keyset = field is not None and not field.null
+
+        if cursor:
+            if not keyset:
+                raise ValidationError(f"排序字段不支持游标分页: {order_field}")
+            position = decode_cursor(cursor, order_field)
+            direction = "lt" if descending else "gt"
+            if order_field == "id":
+                query = query.filter(**{f"id__{direction}": position["id"]})
+            else:
+                query = query.filter(
+                    Q(**{f"{order_field}__{direction}": position["value"]})
+                    | Q(**{order_field: position["value"], f"id__{direction}": position["id"]})
+                )
+        elif skip:
+            query = query.offset(skip)
+
+        ordering = [f"-{order_field}", "-id"] if descending else [order_field, "id"]
+        if order_field == "id":
+            ordering = ordering[:1]
+        records = await query.order_by(*ordering).limit(limit + 1)
+
+        next_cursor = None
+        if len(records) > limit:
+            records = records[:limit]
+            if keyset:
+                last = records[-1]
+                next_cursor = encode_cursor(order_field, getattr(last, order_field), last.id)
+        return records, next_cursor
+
+    async def count_total(
+        self,
+        query: QuerySet,
+        tenant_id: int,
+        cache_filters: Optional[Dict[str, Any]] = None,
+        ttl: int = LIST_TOTAL_CACHE_TTL,
+    ) -> int:
+        """
+        统计列表总数（可选短时缓存）
+
+        传入 cache_filters 时按 (租户, 模型, 过滤条件) 缓存总数，翻页时不再重复 COUNT。
+
+        Args:
+            query: 已应用过滤条件的查询集
+            tenant_id: 租户ID
+            cache_filters: 过滤条件（用于缓存键；为 None 时不缓存）
+            ttl: 缓存时间（秒）
+
+        Returns:
+            int: 总数
+        """
+        if cache_filters is None:
+            return await query.count()
+
+        filters_digest = hashlib.md5(
+            json.dumps(cache_filters, sort_keys=True, default=str).encode("utf-8")
+        ).hexdigest()
+        cache_key = f"{tenant_id}:{query.model.__name__}:{filters_digest}"
+        cached = await cache_manager.get(LIST_TOTAL_CACHE_NAMESPACE, cache_key)
+        if cached is not None:
+            return int(cached)
+
+        total = await query.count()
+        await cache_manager.set(LIST_TOTAL_CACHE_NAMESPACE, cache_key, total, ttl=ttl)
+        return total
+
+    async def load_related(
+        self,
+        model: Type[Model],
+        key_field: str,
+        keys: Iterable[Any],
+        order_by: Optional[List[str]] = None,
+        **filters
+    ) -> Dict[Any, List[Any]]:
+        """
+        批量加载一对多关联记录（一次 IN 查询，按关联键分组）
+
+        Args:
+            model: 关联模型
+            key_field: 关联键字段（如 work_order_id）
+            keys: 关联键列表
+            order_by: 排序字段（可选）
+            **filters: 其他过滤条件（如 tenant_id、deleted_at__isnull）
+
+        Returns:
+            Dict[Any, List]: 关联键 -> 关联记录列表
+        """
+        key_list = [key for key in dict.fromkeys(keys) if key is not None]
+        if not key_list:
+            return {}
+        query = model.filter(**{f"{key_field}__in": key_list}, **filters)
+        if order_by:
+            query = query.order_by(*order_by)
+        grouped: Dict[Any, List[Any]] = {}
+        for record in await query:
+            grouped.setdefault(getattr(record, key_field), []).append(record)
+        return grouped
 
     # ==================== 租户隔离的CRUD操作 ====================
 
@@ -315,7 +464,7 @@ class AppBaseService(BaseService[T]):
                 ...
         """
         async def wrapper(*args, **kwargs):
-            async with in_transaction():
+            async with in_transaction("default"):
                 return await func(*args, **kwargs)
         return wrapper
 
@@ -9,14 +9,18 @@ Date: 2026-01-16
 
 from datetime import date
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from decimal import Decimal
 
 from apps.kuaizhizao.schemas.cost import (
     ProductionCostCalculationRequest,
     ProductionCostCalculationResponse,
+    StandardCostRollupRequest,
+    StandardCostRollupResultResponse,
+    StandardCostResponse,
 )
 from apps.kuaizhizao.services.production_cost_service import ProductionCostService
+from apps.kuaizhizao.services.standard_cost_rollup_service import StandardCostRollupService
 from core.api.deps.deps import get_current_tenant
 from infra.api.deps.deps import get_current_user as soil_get_current_user
 from infra.models.user import User
@@ -58,7 +62,9 @@ async def calculate_production_cost(
             quantity=data.quantity,
             variant_attributes=data.variant_attributes,
             calculation_date=data.calculation_date,
-            created_by=current_user.id if current_user else None
+            created_by=current_user.id if current_user else None,
+            use_standard_cost=data.use_standard_cost,
+            cost_version=data.cost_version
         )
         return ProductionCostCalculationResponse(**result)
     except NotFoundError as e:
@@ -81,3 +87,72 @@ async def calculate_production_cost(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"核算生产成本失败: {str(e)}"
         )
+
+
+@router.post("/standard-rollup", response_model=StandardCostRollupResultResponse, status_code=status.HTTP_200_OK)
+async def rollup_standard_cost(
+    data: StandardCostRollupRequest,
+    current_user: User = Depends(soil_get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    执行标准成本卷积
+    
+    按低层码自底向上计算所有物料的标准单位成本并存储，默认只重算过期和缺失的物料。
+    
+    Args:
+        data: 标准成本卷积请求数据
+        current_user: 当前用户（依赖注入）
+        tenant_id: 当前组织ID（依赖注入）
+        
+    Returns:
+        StandardCostRollupResultResponse: 卷积结果
+    """
+    try:
+        result = await StandardCostRollupService().rollup(
+            tenant_id=tenant_id,
+            cost_version=data.cost_version,
+            full=data.full
+        )
+        return StandardCostRollupResultResponse(**result)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"标准成本卷积失败: {str(e)}"
+        )
+
+
+@router.get("/standard-cost/{material_id}", response_model=StandardCostResponse)
+async def get_standard_cost(
+    material_id: int,
+    cost_version: str = Query("STD", max_length=50, description="成本版本"),
+    current_user: User = Depends(soil_get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    查询物料标准单位成本
+    
+    Args:
+        material_id: 物料ID
+        cost_version: 成本版本
+        current_user: 当前用户（依赖注入）
+        tenant_id: 当前组织ID（依赖注入）
+        
+    Returns:
+        StandardCostResponse: 物料标准成本
+        
+    Raises:
+        HTTPException: 当该成本版本尚未卷积或物料不存在时抛出
+    """
+    standard_cost = await StandardCostRollupService().get_standard_cost(
+        tenant_id=tenant_id,
+        material_id=material_id,
+        cost_version=cost_version,
+        allow_stale=True
+    )
+    if not standard_cost:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"物料 {material_id} 在成本版本 {cost_version} 下无标准成本，请先执行标准成本卷积"
+        )
+    return StandardCostResponse.model_validate(standard_cost)
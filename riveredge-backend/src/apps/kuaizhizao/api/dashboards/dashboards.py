@@ -22,6 +22,7 @@ from apps.kuaizhizao.models.quality_exception import QualityException
 from apps.kuaizhizao.models.inventory_alert import InventoryAlert
 from apps.kuaizhizao.models.work_order import WorkOrder
 from apps.kuaizhizao.models.rework_order import ReworkOrder
+from infra.infrastructure.database.db_router import prefer_replica
 from loguru import logger
 
 router = APIRouter(prefix="/dashboard", tags=["Dashboard"])
@@ -59,7 +60,7 @@ class DashboardResponse(BaseModel):
     statistics: StatisticsResponse = Field(..., description="统计数据")
 
 
-@router.get("/todos", response_model=TodoListResponse, summary="获取待办事项列表")
+@router.get("/todos", response_model=TodoListResponse, summary="获取待办事项列表", dependencies=[Depends(prefer_replica)])
 async def get_todos(
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
@@ -237,7 +238,7 @@ async def handle_todo(
         }
 
 
-@router.get("/statistics", response_model=StatisticsResponse, summary="获取统计数据")
+@router.get("/statistics", response_model=StatisticsResponse, summary="获取统计数据", dependencies=[Depends(prefer_replica)])
 async def get_statistics(
     date_start: Optional[str] = Query(None, description="开始日期（YYYY-MM-DD）"),
     date_end: Optional[str] = Query(None, description="结束日期（YYYY-MM-DD）"),
@@ -448,7 +449,7 @@ class ProcessProgressResponse(BaseModel):
     items: List[ProcessProgressItem] = Field(default_factory=list, description="工序执行进展列表")
 
 
-@router.get("/process-progress", response_model=ProcessProgressResponse, summary="获取工序执行进展")
+@router.get("/process-progress", response_model=ProcessProgressResponse, summary="获取工序执行进展", dependencies=[Depends(prefer_replica)])
 async def get_process_progress(
     include_unstarted: bool = Query(False, description="是否包含未开始生产任务"),
     current_user: User = Depends(get_current_user),
@@ -574,7 +575,7 @@ class ManagementMetricsResponse(BaseModel):
     on_time_delivery_rate: float = Field(..., description="准交率（%）")
 
 
-@router.get("/management-metrics", response_model=ManagementMetricsResponse, summary="获取管理指标")
+@router.get("/management-metrics", response_model=ManagementMetricsResponse, summary="获取管理指标", dependencies=[Depends(prefer_replica)])
 async def get_management_metrics(
     date_start: Optional[str] = Query(None, description="开始日期（YYYY-MM-DD）"),
     date_end: Optional[str] = Query(None, description="结束日期（YYYY-MM-DD）"),
@@ -710,7 +711,7 @@ class ProductionBroadcastResponse(BaseModel):
     items: List[ProductionBroadcastItem] = Field(default_factory=list, description="播报列表")
 
 
-@router.get("/production-broadcast", response_model=ProductionBroadcastResponse, summary="获取生产实时播报")
+@router.get("/production-broadcast", response_model=ProductionBroadcastResponse, summary="获取生产实时播报", dependencies=[Depends(prefer_replica)])
 async def get_production_broadcast(
     limit: int = Query(10, ge=1, le=50, description="返回数量限制"),
     current_user: User = Depends(get_current_user),
@@ -772,7 +773,7 @@ async def get_production_broadcast(
         return ProductionBroadcastResponse(items=[])
 
 
-@router.get("/menu-badge-counts", summary="获取左侧菜单业务单据未完成数量（用于徽标）")
+@router.get("/menu-badge-counts", summary="获取左侧菜单业务单据未完成数量（用于徽标）", dependencies=[Depends(prefer_replica)])
 async def get_menu_badge_counts(
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
@@ -903,7 +904,7 @@ async def get_menu_badge_counts(
     return counts
 
 
-@router.get("", response_model=DashboardResponse, summary="获取工作台数据")
+@router.get("", response_model=DashboardResponse, summary="获取工作台数据", dependencies=[Depends(prefer_replica)])
 async def get_dashboard(
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
@@ -16,12 +16,14 @@ from infra.models.user import User
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
 
 from apps.kuaizhizao.services.demand_computation_service import DemandComputationService
+from apps.kuaizhizao.services.demand_computation_job_service import DemandComputationJobService
 from apps.kuaizhizao.models.demand_computation import DemandComputation
 from apps.kuaizhizao.models.demand_computation_item import DemandComputationItem
 from apps.kuaizhizao.schemas.demand_computation import (
     DemandComputationCreate,
     DemandComputationUpdate,
     DemandComputationResponse,
+    DemandComputationJobResponse,
     ExecuteComputationRequest,
 )
 
@@ -223,24 +225,115 @@ async def execute_computation(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=err_msg)
 
 
+@router.post("/{computation_id}/execute-async", response_model=DemandComputationJobResponse, summary="后台执行需求计算")
+async def execute_computation_async(
+    computation_id: int = Path(..., description="计算ID"),
+    body: Optional[ExecuteComputationRequest] = Body(None, description="可选临时覆盖参数"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    后台执行需求计算（适用于大型计算）
+    
+    创建计算任务后立即返回，任务分阶段执行并分块提交结果，
+    进度通过 WebSocket 频道 demand_computation_job 推送，也可通过任务详情查询。
+    可选传入 computation_params 临时覆盖参数，仅本次执行生效。
+    """
+    try:
+        computation_params_override = body.computation_params if body else None
+        job = await DemandComputationJobService.create_job(
+            tenant_id=tenant_id,
+            computation_id=computation_id,
+            computation_params_override=computation_params_override,
+            created_by=current_user.id,
+        )
+        return DemandComputationJobResponse.model_validate(job)
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except BusinessLogicError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/jobs/{job_uuid}", response_model=DemandComputationJobResponse, summary="获取需求计算任务进度")
+async def get_computation_job(
+    job_uuid: str = Path(..., description="任务UUID"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    获取需求计算任务详情（状态、阶段、进度、已净算物料数）
+    """
+    try:
+        job = await DemandComputationJobService.get_job(tenant_id, job_uuid)
+        return DemandComputationJobResponse.model_validate(job)
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.post("/jobs/{job_uuid}/cancel", response_model=DemandComputationJobResponse, summary="取消需求计算任务")
+async def cancel_computation_job(
+    job_uuid: str = Path(..., description="任务UUID"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    取消需求计算任务
+    
+    执行中的任务在下一个断点处停止，已写入的计算明细会被清理，计算置为失败状态（可重新执行）。
+    """
+    try:
+        job = await DemandComputationJobService.cancel_job(tenant_id, job_uuid)
+        return DemandComputationJobResponse.model_validate(job)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.post("/jobs/{job_uuid}/resume", response_model=DemandComputationJobResponse, summary="重试需求计算任务")
+async def resume_computation_job(
+    job_uuid: str = Path(..., description="任务UUID"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    重试失败的需求计算任务（从断点继续，已提交的分块不会重复计算）
+    """
+    try:
+        job = await DemandComputationJobService.resume_job(tenant_id, job_uuid)
+        return DemandComputationJobResponse.model_validate(job)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
 @router.post("/{computation_id}/recompute", response_model=DemandComputationResponse, summary="重新计算")
 async def recompute_computation(
     computation_id: int = Path(..., description="计算ID"),
+    mode: str = Query("net_change", description="重算模式：net_change（净改变，默认）/ full（全量）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ):
     """
     对已完成或失败的需求计算重新执行计算。
-    会清空原计算结果明细后按原需求重新跑 MRP/LRP。
+    
+    - net_change：MRP 只重算变更的需求行、BOM 与库存影响到的物料，增量更新明细；不满足条件时自动全量重算
+    - full：清空原计算结果明细后按原需求重新跑 MRP/LRP
+    
+    返回的 recalc_report 包含实际重算模式与相对重算前快照的变化。
     """
     try:
         return await computation_service.recompute_computation(
             tenant_id=tenant_id,
             computation_id=computation_id,
             operator_id=current_user.id,
+            mode=mode,
         )
     except NotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     except BusinessLogicError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
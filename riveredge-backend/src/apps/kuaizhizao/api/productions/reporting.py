@@ -20,6 +20,8 @@ from apps.kuaizhizao.services.material_binding_service import MaterialBindingSer
 
 from apps.kuaizhizao.schemas.reporting_record import (
     ReportingRecordCreate,
+    ReportingRecordBatchCreate,
+    ReportingRecordBatchResponse,
     ReportingRecordUpdate,
     ReportingRecordResponse,
     ReportingRecordListResponse,
@@ -69,6 +71,27 @@ async def create_reporting_record(
     )
 
 
+@router.post("/reporting/batch", response_model=ReportingRecordBatchResponse, summary="批量创建报工记录")
+async def batch_create_reporting_records(
+    data: ReportingRecordBatchCreate,
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+) -> ReportingRecordBatchResponse:
+    """
+    批量创建报工记录（产线终端/PLC网关批量上报）
+
+    - **records**: 报工数据列表（单批最多1000条）
+
+    按工单分组批量写入，逐条返回结果；携带 idempotency_key 的记录重试时不会重复创建。
+    """
+    result = await reporting_service.batch_create_reporting_records(
+        tenant_id=tenant_id,
+        records=data.records,
+        reported_by=current_user.id
+    )
+    return ReportingRecordBatchResponse(**result)
+
+
 @router.get("/reporting", response_model=List[ReportingRecordListResponse], summary="获取报工记录列表")
 async def list_reporting_records(
     skip: int = Query(0, ge=0, description="跳过数量"),
@@ -7,8 +7,8 @@
 
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from fastapi import APIRouter, Depends, Query, status as http_status, Path, HTTPException, Body
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse
+from fastapi import APIRouter, Depends, Query, status as http_status, Path, HTTPException, Body, Response
+from fastapi.responses import JSONResponse, HTMLResponse, StreamingResponse
 from loguru import logger
 
 from core.api.deps import get_current_user, get_current_tenant
@@ -221,10 +221,12 @@ async def create_production_picking(
 
 @router.get("/production-pickings", response_model=List[ProductionPickingListResponse], summary="获取生产领料单列表")
 async def list_production_pickings(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过数量"),
     limit: int = Query(100, ge=1, le=1000, description="限制数量"),
     status: Optional[str] = Query(None, description="领料状态"),
     work_order_id: Optional[int] = Query(None, description="工单ID"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页响应头 X-Next-Cursor 的值时使用键集分页，忽略 skip）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ) -> List[ProductionPickingListResponse]:
@@ -232,14 +234,19 @@ async def list_production_pickings(
     获取生产领料单列表
 
     支持状态和工单筛选。
+    有下一页时通过响应头 X-Next-Cursor 返回下一页游标。
     """
-    return await ProductionPickingService().list_production_pickings(
+    items, next_cursor = await ProductionPickingService().list_production_pickings_page(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
+        cursor=cursor,
         status=status,
         work_order_id=work_order_id,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @router.get("/production-pickings/{picking_id}", response_model=ProductionPickingResponse, summary="获取生产领料单详情")
@@ -959,10 +966,12 @@ async def create_finished_goods_receipt(
 
 @router.get("/finished-goods-receipts", response_model=List[FinishedGoodsReceiptResponse], summary="获取成品入库单列表")
 async def list_finished_goods_receipts(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过数量"),
     limit: int = Query(100, ge=1, le=1000, description="限制数量"),
     status: Optional[str] = Query(None, description="入库状态"),
     work_order_id: Optional[int] = Query(None, description="工单ID"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页响应头 X-Next-Cursor 的值时使用键集分页，忽略 skip）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ) -> List[FinishedGoodsReceiptResponse]:
@@ -970,14 +979,19 @@ async def list_finished_goods_receipts(
     获取成品入库单列表
 
     支持状态和工单筛选。
+    有下一页时通过响应头 X-Next-Cursor 返回下一页游标。
     """
-    return await FinishedGoodsReceiptService().list_finished_goods_receipts(
+    items, next_cursor = await FinishedGoodsReceiptService().list_finished_goods_receipts_page(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
+        cursor=cursor,
         status=status,
         work_order_id=work_order_id,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @router.get("/finished-goods-receipts/{receipt_id}", response_model=FinishedGoodsReceiptResponse, summary="获取成品入库单详情")
@@ -1794,10 +1808,12 @@ async def create_sales_delivery(
 
 @router.get("/sales-deliveries", response_model=List[SalesDeliveryResponse], summary="获取销售出库单列表")
 async def list_sales_deliveries(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过数量"),
     limit: int = Query(100, ge=1, le=1000, description="限制数量"),
     status: Optional[str] = Query(None, description="出库状态"),
     sales_order_id: Optional[int] = Query(None, description="销售订单ID"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页响应头 X-Next-Cursor 的值时使用键集分页，忽略 skip）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ) -> List[SalesDeliveryResponse]:
@@ -1805,14 +1821,19 @@ async def list_sales_deliveries(
     获取销售出库单列表
 
     支持状态和销售订单筛选。
+    有下一页时通过响应头 X-Next-Cursor 返回下一页游标。
     """
-    return await SalesDeliveryService().list_sales_deliveries(
+    items, next_cursor = await SalesDeliveryService().list_sales_deliveries_page(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
+        cursor=cursor,
         status=status,
         sales_order_id=sales_order_id,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @router.get("/sales-deliveries/{delivery_id}", response_model=SalesDeliveryResponse, summary="获取销售出库单详情")
@@ -1970,38 +1991,39 @@ async def import_sales_deliveries(
         )
 
 
-@router.get("/sales-deliveries/export", response_class=FileResponse, summary="批量导出销售出库单")
+@router.get("/sales-deliveries/export", summary="批量导出销售出库单")
 async def export_sales_deliveries(
     status: Optional[str] = Query(None, description="出库状态筛选"),
     sales_order_id: Optional[int] = Query(None, description="销售订单ID筛选"),
+    file_format: str = Query("xlsx", pattern="^(xlsx|csv)$", description="导出格式（xlsx/csv）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ):
     """
-    批量导出销售出库单到Excel文件
+    批量导出销售出库单（流式输出，不限行数）
     
     Args:
         status: 出库状态筛选
         sales_order_id: 销售订单ID筛选
+        file_format: 导出格式（xlsx/csv）
         current_user: 当前用户（依赖注入）
         tenant_id: 当前组织ID（依赖注入）
         
     Returns:
-        FileResponse: Excel文件
+        StreamingResponse: Excel/CSV 文件流
     """
-    import os
-    
     try:
         service = SalesDeliveryService()
-        file_path = await service.export_to_excel(
+        export = service.export_to_excel(
             tenant_id=tenant_id,
+            file_format=file_format,
             status=status,
             sales_order_id=sales_order_id,
         )
-        return FileResponse(
-            path=file_path,
-            filename=os.path.basename(file_path),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        return StreamingResponse(
+            await export.open_stream(),
+            media_type=export.media_type,
+            headers=export.headers,
         )
     except Exception as e:
         logger.error(f"导出销售出库单失败: {str(e)}")
@@ -2244,10 +2266,12 @@ async def create_purchase_receipt(
 
 @router.get("/purchase-receipts", response_model=List[PurchaseReceiptResponse], summary="获取采购入库单列表")
 async def list_purchase_receipts(
+    response: Response,
     skip: int = Query(0, ge=0, description="跳过数量"),
     limit: int = Query(100, ge=1, le=1000, description="限制数量"),
     status: Optional[str] = Query(None, description="入库状态"),
     purchase_order_id: Optional[int] = Query(None, description="采购订单ID"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页响应头 X-Next-Cursor 的值时使用键集分页，忽略 skip）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ) -> List[PurchaseReceiptResponse]:
@@ -2255,14 +2279,19 @@ async def list_purchase_receipts(
     获取采购入库单列表
 
     支持状态和采购订单筛选。
+    有下一页时通过响应头 X-Next-Cursor 返回下一页游标。
     """
-    return await PurchaseReceiptService().list_purchase_receipts(
+    items, next_cursor = await PurchaseReceiptService().list_purchase_receipts_page(
         tenant_id=tenant_id,
         skip=skip,
         limit=limit,
+        cursor=cursor,
         status=status,
         purchase_order_id=purchase_order_id,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @router.get("/purchase-receipts/{receipt_id}", response_model=PurchaseReceiptResponse, summary="获取采购入库单详情")
@@ -2350,38 +2379,39 @@ async def import_purchase_receipts(
         )
 
 
-@router.get("/purchase-receipts/export", response_class=FileResponse, summary="批量导出采购入库单")
+@router.get("/purchase-receipts/export", summary="批量导出采购入库单")
 async def export_purchase_receipts(
     status: Optional[str] = Query(None, description="入库状态筛选"),
     purchase_order_id: Optional[int] = Query(None, description="采购订单ID筛选"),
+    file_format: str = Query("xlsx", pattern="^(xlsx|csv)$", description="导出格式（xlsx/csv）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ):
     """
-    批量导出采购入库单到Excel文件
+    批量导出采购入库单（流式输出，不限行数）
     
     Args:
         status: 入库状态筛选
         purchase_order_id: 采购订单ID筛选
+        file_format: 导出格式（xlsx/csv）
         current_user: 当前用户（依赖注入）
         tenant_id: 当前组织ID（依赖注入）
         
     Returns:
-        FileResponse: Excel文件
+        StreamingResponse: Excel/CSV 文件流
     """
-    import os
-    
     try:
         service = PurchaseReceiptService()
-        file_path = await service.export_to_excel(
+        export = service.export_to_excel(
             tenant_id=tenant_id,
+            file_format=file_format,
             status=status,
             purchase_order_id=purchase_order_id,
         )
-        return FileResponse(
-            path=file_path,
-            filename=os.path.basename(file_path),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        return StreamingResponse(
+            await export.open_stream(),
+            media_type=export.media_type,
+            headers=export.headers,
         )
     except Exception as e:
         logger.error(f"导出采购入库单失败: {str(e)}")
@@ -11,6 +11,7 @@ from fastapi.responses import JSONResponse
 from loguru import logger
 
 from core.api.deps import get_current_user, get_current_tenant
+from core.services.business.custom_field_projection import parse_custom_field_filters
 from infra.models.user import User
 from infra.exceptions.exceptions import NotFoundError
 
@@ -155,7 +156,10 @@ async def list_work_orders(
     workshop_id: Optional[int] = Query(None, description="车间ID"),
     work_center_id: Optional[int] = Query(None, description="工作中心ID"),
     assigned_worker_id: Optional[int] = Query(None, description="分配员工ID（只看当前用户时传入）"),
+    custom_fields: Optional[str] = Query(None, description='自定义字段过滤（JSON：{"字段代码": 值或值列表}）'),
     include_operations: bool = Query(False, description="是否包含工序（用于甘特图展示设备/模具/工装）"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的 next_cursor 时使用键集分页，忽略 skip）"),
+    total_mode: str = Query("exact", pattern="^(exact|cached|none)$", description="总数统计方式（exact: 精确, cached: 短时缓存, none: 不统计）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ):
@@ -163,27 +167,17 @@ async def list_work_orders(
     获取工单列表
 
     支持多种筛选条件的高级搜索。
-    返回格式：{ "data": [], "total": 0, "success": true }
+    返回格式：{ "data": [], "total": 0, "next_cursor": null, "success": true }
     """
     try:
         service = WorkOrderService()
-        result = await service.list_work_orders(
+        return await service.list_work_orders_page(
             tenant_id=tenant_id,
             skip=skip,
             limit=limit,
-            code=code,
-            name=name,
-            product_name=product_name,
-            production_mode=production_mode,
-            status=status,
-            workshop_id=workshop_id,
-            work_center_id=work_center_id,
-            assigned_worker_id=assigned_worker_id,
+            cursor=cursor,
+            total_mode=total_mode,
             include_operations=include_operations,
-        )
-        # 返回分页格式，包含总数
-        total = await service.get_work_order_count(
-            tenant_id=tenant_id,
             code=code,
             name=name,
             product_name=product_name,
@@ -192,12 +186,8 @@ async def list_work_orders(
             workshop_id=workshop_id,
             work_center_id=work_center_id,
             assigned_worker_id=assigned_worker_id,
+            custom_fields=parse_custom_field_filters(custom_fields),
         )
-        return {
-            "data": result,
-            "total": total,
-            "success": True
-        }
     except Exception as e:
         from loguru import logger
         logger.error(f"获取工单列表失败: {str(e)}")
@@ -15,6 +15,7 @@ from loguru import logger
 from core.api.deps import get_current_user, get_current_tenant
 from infra.models.user import User
 from infra.exceptions.exceptions import ValidationError
+from infra.infrastructure.database.db_router import prefer_replica
 
 from apps.kuaizhizao.services.report_service import ReportService
 
@@ -22,7 +23,8 @@ from apps.kuaizhizao.services.report_service import ReportService
 report_service = ReportService()
 
 # 创建路由
-router = APIRouter(prefix="/reports", tags=["报表"])
+# 报表接口只读，读取走只读副本（未配置副本时走主库）
+router = APIRouter(prefix="/reports", tags=["报表"], dependencies=[Depends(prefer_replica)])
 
 
 @router.get("/inventory/statistics", summary="获取库存统计（用于指标卡片）")
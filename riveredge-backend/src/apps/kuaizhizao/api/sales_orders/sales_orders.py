@@ -10,6 +10,7 @@ Date: 2026-01-19
 from typing import Optional, Dict, Any, List
 from datetime import date, datetime
 from fastapi import APIRouter, Depends, Query, status as http_status, Path, HTTPException, Body
+from fastapi.responses import StreamingResponse
 from loguru import logger
 
 from core.api.deps import get_current_user, get_current_tenant
@@ -151,6 +152,38 @@ async def get_sales_order_statistics(
     }
 
 
+@router.get("/export", summary="导出销售订单")
+async def export_sales_orders(
+    status: Optional[str] = Query(None, description="订单状态"),
+    review_status: Optional[str] = Query(None, description="审核状态"),
+    start_date: Optional[date] = Query(None, description="开始日期"),
+    end_date: Optional[date] = Query(None, description="结束日期"),
+    customer_name: Optional[str] = Query(None, description="客户名称（模糊匹配）"),
+    file_format: str = Query("xlsx", pattern="^(xlsx|csv)$", description="导出格式（xlsx/csv）"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    导出销售订单（流式输出，不限行数）
+
+    筛选条件与列表接口一致。
+    """
+    export = sales_order_service.export_sales_orders(
+        tenant_id=tenant_id,
+        file_format=file_format,
+        status=status,
+        review_status=review_status,
+        start_date=start_date,
+        end_date=end_date,
+        customer_name=customer_name,
+    )
+    return StreamingResponse(
+        await export.open_stream(),
+        media_type=export.media_type,
+        headers=export.headers,
+    )
+
+
 @router.get("", response_model=SalesOrderListResponse, summary="获取销售订单列表")
 async def list_sales_orders(
     skip: int = Query(0, ge=0, description="跳过数量"),
@@ -162,6 +195,7 @@ async def list_sales_orders(
     customer_name: Optional[str] = Query(None, description="客户名称（模糊匹配）"),
     order_by: Optional[str] = Query(None, description="排序字段，如 order_code、-created_at（前缀-表示降序）"),
     include_items: bool = Query(False, description="是否包含订单明细"),
+    cursor: Optional[str] = Query(None, description="分页游标（传入上一页返回的 next_cursor 时使用键集分页，忽略 skip）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ):
@@ -169,6 +203,7 @@ async def list_sales_orders(
     获取销售订单列表
     
     支持按状态、审核状态、日期范围筛选，支持多字段排序。
+    深翻页时传入上一页返回的 next_cursor（排序条件需保持一致）。
     """
     # 校验 order_by 防止注入
     safe_order_by = None
@@ -189,8 +224,11 @@ async def list_sales_orders(
             customer_name=customer_name,
             order_by=safe_order_by,
             include_items=include_items,
+            cursor=cursor,
         )
         return result
+    except ValidationError as e:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
     except Exception as e:
         logger.error(f"获取销售订单列表失败: {e}")
         raise HTTPException(status_code=http_status.HTTP_500_INTERNAL_SERVER_ERROR, detail="获取销售订单列表失败")
@@ -1,7 +1,13 @@
 from typing import Dict, Literal, List
-from fastapi import APIRouter, Query, Request
+from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
-from apps.kuaizhizao.services.traceability import TraceabilityService
+from core.api.deps import get_current_user, get_current_tenant
+from infra.models.user import User
+from apps.kuaizhizao.services.traceability import (
+    TraceabilityService,
+    DEFAULT_TRACE_MAX_DEPTH,
+    DEFAULT_TRACE_MAX_NODES,
+)
 
 router = APIRouter(tags=["追溯管理"])
 service = TraceabilityService()
@@ -9,16 +15,29 @@ service = TraceabilityService()
 class TraceGraphResponse(BaseModel):
     nodes: List[Dict]
     edges: List[Dict]
+    truncated: bool = False
 
 @router.get("/graph", response_model=TraceGraphResponse, summary="获取追溯图谱")
 async def get_trace_graph(
     batch_no: str = Query(..., description="批次号/条码"), 
-    direction: Literal["forward", "backward", "both"] = Query("both", description="追溯方向 (forward: 原料->成品, backward: 成品->原料, both: 双向)")
+    direction: Literal["forward", "backward", "both"] = Query("both", description="追溯方向 (forward: 原料->成品, backward: 成品->原料, both: 双向)"),
+    max_depth: int = Query(DEFAULT_TRACE_MAX_DEPTH, ge=1, le=100, description="最大追溯层数"),
+    max_nodes: int = Query(DEFAULT_TRACE_MAX_NODES, ge=1, le=50000, description="最大节点数（超过后截断）"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
 ):
     """
     获取指定批次号的正向或反向追溯图谱。
     
     - **batch_no**: 批次号/条码
     - **direction**: 追溯方向 (forward: 原料->成品, backward: 成品->原料, both: 双向)
+    - **max_depth**: 最大追溯层数
+    - **max_nodes**: 最大节点数，达到后返回 truncated=true
     """
-    return await service.get_trace_graph(batch_no, direction)
+    return await service.get_trace_graph(
+        tenant_id=tenant_id,
+        batch_no=batch_no,
+        direction=direction,
+        max_depth=max_depth,
+        max_nodes=max_nodes,
+    )
@@ -0,0 +1,55 @@
+"""
+需求计算任务 Inngest 工作流函数
+
+监听 kuaizhizao/demand-computation-job 事件，后台分阶段执行需求计算任务。
+任务断点保存在 DemandComputationJob 中，Inngest 重试或手动重试时从断点继续。
+按组织限制并发，避免单个组织的大型计算占满工作进程与数据库连接；
+同一任务同时只执行一次（Inngest 重试与手动重试的事件排队执行）。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import inngest
+from inngest import Event, TriggerEvent
+from typing import Dict, Any
+from loguru import logger
+
+from core.inngest.client import inngest_client
+from core.utils.inngest_tenant_isolation import with_tenant_isolation
+from infra.domain.tenant_context import get_current_tenant_id
+from apps.kuaizhizao.services.demand_computation_job_service import (
+    MRP_JOB_EVENT,
+    MRP_JOB_TENANT_CONCURRENCY,
+)
+
+
+@inngest_client.create_function(
+    fn_id="demand-computation-job-workflow",
+    name="需求计算任务",
+    trigger=TriggerEvent(event=MRP_JOB_EVENT),
+    retries=2,
+    concurrency=[
+        inngest.Concurrency(limit=MRP_JOB_TENANT_CONCURRENCY, key="event.data.tenant_id"),
+        inngest.Concurrency(limit=1, key="event.data.job_uuid"),
+    ],
+)
+@with_tenant_isolation
+async def demand_computation_job_workflow(event: Event, **kwargs) -> Dict[str, Any]:
+    """
+    执行需求计算任务。
+
+    租户隔离已由装饰器处理，可直接使用 get_current_tenant_id()。
+    **kwargs 用于兼容 Inngest 运行时可能传入的 step/ctx 等参数。
+    """
+    from apps.kuaizhizao.services.demand_computation_job_service import DemandComputationJobService
+
+    tenant_id = get_current_tenant_id()
+    data = event.data or {}
+    job_uuid = data.get("job_uuid")
+
+    if not job_uuid:
+        logger.warning("需求计算任务工作流：缺少 job_uuid")
+        return {"success": False, "error": "缺少必要参数：job_uuid"}
+
+    return await DemandComputationJobService.run_job(tenant_id=tenant_id, job_uuid=job_uuid)
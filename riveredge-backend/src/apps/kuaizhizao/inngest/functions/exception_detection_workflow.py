@@ -11,7 +11,6 @@ from loguru import logger
 
 from core.inngest.client import inngest_client
 from apps.kuaizhizao.services.exception_service import ExceptionService
-from apps.kuaizhizao.models.work_order import WorkOrder
 from core.utils.inngest_tenant_isolation import with_tenant_isolation
 from infra.domain.tenant_context import get_current_tenant_id
 
@@ -105,26 +104,14 @@ async def exception_detection_worker_function(event: Event) -> Dict[str, Any]:
     }
     
     try:
-        # 1. 检测缺料异常
+        # 1. 检测缺料异常（所有已下达或执行中的工单按优先级、交期一次性ATP分配）
         try:
-            # 获取所有已下达或执行中的工单
-            work_orders = await WorkOrder.filter(
-                tenant_id=tenant_id,
-                status__in=["released", "in_progress"],
-                deleted_at__isnull=True
-            ).all()
-            
-            for work_order in work_orders:
-                try:
-                    exceptions = await exception_service.detect_material_shortage(
-                        tenant_id=tenant_id,
-                        work_order_id=work_order.id,
-                    )
-                    results["material_shortage"]["detected"] += len(exceptions)
-                    results["material_shortage"]["created"] += len(exceptions)
-                except Exception as e:
-                    logger.error(f"检测工单 {work_order.id} 缺料异常失败: {e}")
-                    continue
+            allocation = await exception_service.allocate_material_shortages(tenant_id=tenant_id)
+            results["material_shortage"] = {
+                "detected": allocation["detected"],
+                "created": allocation["created"],
+                "updated": allocation["updated"],
+            }
         except Exception as e:
             logger.error(f"检测缺料异常失败: {e}")
         
@@ -192,36 +179,19 @@ async def exception_detection_by_tenant_function(event: Event) -> Dict[str, Any]
     }
     
     try:
-        # 1. 检测缺料异常
-        if work_order_id:
-            try:
-                exceptions = await exception_service.detect_material_shortage(
-                    tenant_id=tenant_id,
-                    work_order_id=work_order_id,
-                )
-                results["material_shortage"]["detected"] = len(exceptions)
-                results["material_shortage"]["created"] = len(exceptions)
-            except Exception as e:
-                logger.error(f"检测工单 {work_order_id} 缺料异常失败: {e}")
-        else:
-            # 检测所有已下达或执行中的工单
-            work_orders = await WorkOrder.filter(
+        # 1. 检测缺料异常（指定工单时仍与其他工单竞争库存，只为该工单写入异常）
+        try:
+            allocation = await exception_service.allocate_material_shortages(
                 tenant_id=tenant_id,
-                status__in=["released", "in_progress"],
-                deleted_at__isnull=True
-            ).all()
-            
-            for work_order in work_orders:
-                try:
-                    exceptions = await exception_service.detect_material_shortage(
-                        tenant_id=tenant_id,
-                        work_order_id=work_order.id,
-                    )
-                    results["material_shortage"]["detected"] += len(exceptions)
-                    results["material_shortage"]["created"] += len(exceptions)
-                except Exception as e:
-                    logger.error(f"检测工单 {work_order.id} 缺料异常失败: {e}")
-                    continue
+                target_work_order_ids=[work_order_id] if work_order_id else None,
+            )
+            results["material_shortage"] = {
+                "detected": allocation["detected"],
+                "created": allocation["created"],
+                "updated": allocation["updated"],
+            }
+        except Exception as e:
+            logger.error(f"检测缺料异常失败: {e}")
         
         # 2. 检测延期异常
         try:
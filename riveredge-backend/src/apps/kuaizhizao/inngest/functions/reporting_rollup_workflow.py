@@ -0,0 +1,126 @@
+"""
+报工日汇总 Inngest 工作流函数
+
+每天凌晨为所有激活组织刷新最近几天的报工日汇总，也可通过事件按日期区间回填。
+
+Author: Luigi Lu
+Date: 2026-03-02
+"""
+
+from inngest import TriggerCron, Event, TriggerEvent
+from typing import Dict, Any
+from datetime import date, datetime, timedelta
+from loguru import logger
+
+from core.inngest.client import inngest_client
+from apps.kuaizhizao.services.reporting_statistics_service import ReportingStatisticsService
+from core.utils.inngest_tenant_isolation import with_tenant_isolation
+from infra.domain.tenant_context import get_current_tenant_id
+from infra.models.tenant import Tenant, TenantStatus
+
+# 每日刷新回看天数（覆盖跨日补报、次日审核等延迟变更）
+DEFAULT_LOOKBACK_DAYS = 2
+
+
+@inngest_client.create_function(
+    fn_id="reporting-rollup-scheduler",
+    name="报工日汇总调度器",
+    trigger=TriggerCron(cron="10 0 * * *"),  # 每天00:10执行
+)
+async def reporting_rollup_scheduler_function(*args, **kwargs) -> Dict[str, Any]:
+    """
+    报工日汇总调度器工作流函数
+
+    每天执行一次，为每个激活组织发送一条报工日汇总事件（一次批量发送）。
+
+    注意：使用 TriggerCron 时，Inngest 可能会传递 ctx (Context) 参数。
+    使用 *args 和 **kwargs 来接受任意参数，确保兼容不同版本的 SDK。
+
+    Returns:
+        Dict[str, Any]: 调度结果
+    """
+    now = datetime.now()
+
+    try:
+        tenant_ids = await Tenant.filter(status=TenantStatus.ACTIVE).values_list("id", flat=True)
+        if tenant_ids:
+            await inngest_client.send([
+                Event(
+                    name="reporting-stats/rollup",
+                    data={
+                        "tenant_id": tenant_id,
+                        "lookback_days": DEFAULT_LOOKBACK_DAYS,
+                        "timestamp": now.isoformat(),
+                    }
+                )
+                for tenant_id in tenant_ids
+            ])
+        logger.info(f"已发送报工日汇总事件: {len(tenant_ids)} 个组织")
+
+        return {
+            "success": True,
+            "tenant_count": len(tenant_ids),
+            "timestamp": now.isoformat()
+        }
+    except Exception as e:
+        logger.error(f"报工日汇总调度器执行失败: {e}")
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+@inngest_client.create_function(
+    fn_id="reporting-rollup-worker",
+    name="报工日汇总工作流",
+    trigger=TriggerEvent(event="reporting-stats/rollup"),
+    retries=3,
+)
+@with_tenant_isolation  # 添加租户隔离装饰器
+async def reporting_rollup_worker_function(event: Event) -> Dict[str, Any]:
+    """
+    报工日汇总工作流函数
+
+    监听 reporting-stats/rollup 事件，刷新组织的报工日汇总。
+
+    事件数据：
+    - lookback_days: 刷新最近N天（默认2天，不含当天）
+    - start_date / end_date: 回填日期区间（ISO日期，指定时优先于 lookback_days）
+
+    Args:
+        event: Inngest 事件对象
+
+    Returns:
+        Dict[str, Any]: 汇总结果
+    """
+    tenant_id = get_current_tenant_id()
+
+    data = event.data or {}
+    statistics_service = ReportingStatisticsService()
+
+    try:
+        if data.get("start_date"):
+            start_date = date.fromisoformat(data["start_date"])
+            end_date = date.fromisoformat(data["end_date"]) if data.get("end_date") else None
+            day_count = await statistics_service.backfill(tenant_id, start_date, end_date)
+        else:
+            lookback_days = int(data.get("lookback_days", DEFAULT_LOOKBACK_DAYS))
+            today = statistics_service.today()
+            day_count = await statistics_service.refresh_days(
+                tenant_id,
+                [today - timedelta(days=i) for i in range(1, lookback_days + 1)],
+            )
+
+        logger.info(f"组织 {tenant_id} 报工日汇总完成: {day_count} 天")
+        return {
+            "success": True,
+            "tenant_id": tenant_id,
+            "day_count": day_count,
+        }
+    except Exception as e:
+        logger.error(f"报工日汇总工作流执行失败 (tenant_id={tenant_id}): {e}")
+        return {
+            "success": False,
+            "tenant_id": tenant_id,
+            "error": str(e)
+        }
@@ -0,0 +1,53 @@
+"""
+标准成本卷积 Inngest 工作流函数
+
+监听 kuaizhizao/standard-cost-rollup 事件，在后台对组织执行增量标准成本卷积
+（查询命中过期卷积结果时由 StandardCostRollupService.request_rollup 发送），
+避免在成本核算请求内同步卷积整个组织。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import inngest
+from inngest import Event, TriggerEvent
+from typing import Dict, Any
+from loguru import logger
+
+from core.inngest.client import inngest_client
+from core.utils.inngest_tenant_isolation import with_tenant_isolation
+from infra.domain.tenant_context import get_current_tenant_id
+from apps.kuaizhizao.services.standard_cost_rollup_service import (
+    DEFAULT_COST_VERSION,
+    STANDARD_COST_ROLLUP_EVENT,
+    StandardCostRollupService,
+)
+
+
+@inngest_client.create_function(
+    fn_id="standard-cost-rollup-workflow",
+    name="标准成本卷积",
+    trigger=TriggerEvent(event=STANDARD_COST_ROLLUP_EVENT),
+    retries=2,
+    concurrency=[
+        inngest.Concurrency(limit=1, key="event.data.tenant_id"),
+    ],
+)
+@with_tenant_isolation
+async def standard_cost_rollup_workflow(event: Event, **kwargs) -> Dict[str, Any]:
+    """
+    执行增量标准成本卷积（只重算过期与缺失的物料）。
+
+    租户隔离已由装饰器处理，可直接使用 get_current_tenant_id()。
+    **kwargs 用于兼容 Inngest 运行时可能传入的 step/ctx 等参数。
+    """
+    tenant_id = get_current_tenant_id()
+    data = event.data or {}
+    cost_version = data.get("cost_version") or DEFAULT_COST_VERSION
+
+    try:
+        result = await StandardCostRollupService().rollup(tenant_id=tenant_id, cost_version=cost_version)
+        return {"success": True, "tenant_id": tenant_id, **result}
+    except Exception as e:
+        logger.error(f"标准成本卷积工作流执行失败 (tenant_id={tenant_id}, cost_version={cost_version}): {e}")
+        raise
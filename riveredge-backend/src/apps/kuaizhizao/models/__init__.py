@@ -7,9 +7,11 @@
 # 生产执行模块
 from .work_order import WorkOrder
 from .reporting_record import ReportingRecord
+from .reporting_daily_stat import ReportingDailyStat
 from .rework_order import ReworkOrder
 from .cost_rule import CostRule
 from .cost_calculation import CostCalculation
+from .standard_cost_rollup import StandardCostRollup
 from .outsource_order import OutsourceOrder
 from .outsource_work_order import (
     OutsourceWorkOrder,
@@ -22,6 +24,7 @@ from .work_order_operation import WorkOrderOperation
 from .scrap_record import ScrapRecord
 from .defect_record import DefectRecord
 from .material_binding import MaterialBinding
+from .batch_genealogy_edge import BatchGenealogyEdge
 from .stocktaking import Stocktaking, StocktakingItem
 from .inventory_transfer import InventoryTransfer, InventoryTransferItem
 from .assembly_order import AssemblyOrder, AssemblyOrderItem
@@ -103,6 +106,8 @@ from .demand_snapshot import DemandSnapshot
 from .demand_recalc_history import DemandRecalcHistory
 from .demand_computation_snapshot import DemandComputationSnapshot
 from .demand_computation_recalc_history import DemandComputationRecalcHistory
+from .demand_computation_job import DemandComputationJob
+from .demand_computation_job_line import DemandComputationJobLine
 
 # BOM管理模块
 # BOM管理已移至master_data APP，不再需要BillOfMaterials模型
@@ -135,9 +140,11 @@ __all__ = [
     # 生产执行模块
     'WorkOrder',
     'ReportingRecord',
+    'ReportingDailyStat',
     'ReworkOrder',
     'CostRule',
     'CostCalculation',
+    'StandardCostRollup',
     'OutsourceOrder',
     'OutsourceWorkOrder',
     'OutsourceMaterialIssue',
@@ -146,6 +153,7 @@ __all__ = [
     'ScrapRecord',
     'DefectRecord',
     'MaterialBinding',
+    'BatchGenealogyEdge',
     'Stocktaking',
     'StocktakingItem',
     'InventoryTransfer',
@@ -233,6 +241,8 @@ __all__ = [
     'DemandRecalcHistory',
     'DemandComputationSnapshot',
     'DemandComputationRecalcHistory',
+    'DemandComputationJob',
+    'DemandComputationJobLine',
 
     # BOM管理模块
     # BillOfMaterials和BillOfMaterialsItem已移除，BOM管理在master_data APP中
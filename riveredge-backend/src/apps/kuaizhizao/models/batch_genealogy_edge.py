@@ -0,0 +1,69 @@
+"""
+批次谱系边数据模型模块
+
+定义批次谱系边数据模型，由物料绑定记录（上料/下料）物化得到，用于快速正向/反向追溯。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from tortoise import fields
+from core.models.base import BaseModel
+
+
+class BatchGenealogyEdge(BaseModel):
+    """
+    批次谱系边模型
+
+    每行记录工单的一个投料批次（input_*，output_* 为空）或一个产出批次（output_*，input_* 为空），
+    行数与绑定批次数成正比（不存储投料 x 产出的笛卡尔积）；追溯时按批次找到工单，再取同工单另一侧的批次。
+    物料绑定记录创建/删除时只重写对应的一行。
+
+    注意：继承自 BaseModel，自动包含 uuid、tenant_id、created_at、updated_at 字段。
+
+    Attributes:
+        id: 主键ID
+        work_order_id: 工单ID
+        work_order_code: 工单编码
+        operation_name: 工序名称（该批次首个绑定所在工序）
+        input_batch_no: 投料批次号
+        input_material_id: 投料物料ID
+        input_material_code: 投料物料编码
+        input_material_name: 投料物料名称
+        output_batch_no: 产出批次号
+        output_material_id: 产出物料ID
+        output_material_code: 产出物料编码
+        output_material_name: 产出物料名称
+    """
+
+    class Meta:
+        """
+        模型元数据
+        """
+        table = "apps_kuaizhizao_batch_genealogy_edges"
+        table_description = "快格轻制造 - 批次谱系边"
+        indexes = [
+            ("tenant_id", "input_batch_no"),
+            ("tenant_id", "output_batch_no"),
+            ("tenant_id", "work_order_id"),
+        ]
+
+    id = fields.IntField(pk=True, description="主键ID")
+
+    work_order_id = fields.IntField(description="工单ID")
+    work_order_code = fields.CharField(max_length=50, description="工单编码")
+    operation_name = fields.CharField(max_length=200, null=True, description="工序名称")
+
+    input_batch_no = fields.CharField(max_length=100, null=True, description="投料批次号")
+    input_material_id = fields.IntField(null=True, description="投料物料ID")
+    input_material_code = fields.CharField(max_length=50, null=True, description="投料物料编码")
+    input_material_name = fields.CharField(max_length=200, null=True, description="投料物料名称")
+
+    output_batch_no = fields.CharField(max_length=100, null=True, description="产出批次号")
+    output_material_id = fields.IntField(null=True, description="产出物料ID")
+    output_material_code = fields.CharField(max_length=50, null=True, description="产出物料编码")
+    output_material_name = fields.CharField(max_length=200, null=True, description="产出物料名称")
+
+    def __str__(self):
+        """字符串表示"""
+        return f"{self.input_batch_no or '-'} -> {self.work_order_code} -> {self.output_batch_no or '-'}"
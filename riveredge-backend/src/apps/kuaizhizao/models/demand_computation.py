@@ -49,6 +49,9 @@ class DemandComputation(BaseModel):
     # 计算结果汇总（JSON格式，存储汇总结果）
     computation_summary = fields.JSONField(null=True, description="计算结果汇总（JSON格式）")
     
+    # 净改变重算状态（MRP 全量运算后保存，供增量重算复用）
+    net_change_state = fields.JSONField(null=True, description="净改变重算状态（需求行展开结果、BOM指纹、物料汇总需求）")
+    
     # 错误信息
     error_message = fields.TextField(null=True, description="错误信息")
     
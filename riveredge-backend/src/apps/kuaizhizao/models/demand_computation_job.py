@@ -0,0 +1,69 @@
+"""
+需求计算任务模型模块
+
+定义需求计算后台任务数据模型，记录执行进度、断点与取消请求。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from tortoise import fields
+from core.models.base import BaseModel
+
+
+class DemandComputationJob(BaseModel):
+    """
+    需求计算任务模型
+
+    大型需求计算由后台任务执行：先逐需求行展开BOM，再按低层码（BOM层级）逐层分块净算，
+    每个分块的结果明细与断点在同一事务中提交，任务失败后可从断点继续。
+
+    注意：继承自 BaseModel，自动包含 uuid、tenant_id、created_at、updated_at 字段。
+
+    Attributes:
+        id: 主键ID
+        computation_id: 需求计算ID
+        status: 任务状态（pending/running/completed/failed/cancelled）
+        phase: 当前阶段（explode/net/finalize）
+        progress: 进度百分比（0-100）
+        total_materials: 需净算的物料数
+        processed_materials: 已提交结果的物料数（断点）
+        checkpoint: 断点数据（需求行、展开结果、当前低层码等）
+        cancel_requested: 是否已请求取消
+        error_message: 失败原因
+        started_at: 开始时间
+        finished_at: 结束时间
+        created_by: 创建人ID
+    """
+
+    class Meta:
+        """
+        模型元数据
+        """
+        table = "apps_kuaizhizao_demand_computation_jobs"
+        table_description = "快格轻制造 - 需求计算任务"
+        indexes = [
+            ("tenant_id", "computation_id"),
+            ("tenant_id", "status"),
+        ]
+
+    id = fields.IntField(pk=True, description="主键ID")
+
+    computation_id = fields.IntField(description="需求计算ID")
+
+    status = fields.CharField(max_length=20, default="pending", description="任务状态（pending/running/completed/failed/cancelled）")
+    phase = fields.CharField(max_length=20, default="explode", description="当前阶段（explode/net/finalize）")
+    progress = fields.IntField(default=0, description="进度百分比（0-100）")
+    total_materials = fields.IntField(default=0, description="需净算的物料数")
+    processed_materials = fields.IntField(default=0, description="已提交结果的物料数（断点）")
+    checkpoint = fields.JSONField(null=True, description="断点数据（JSON格式）")
+    cancel_requested = fields.BooleanField(default=False, description="是否已请求取消")
+    error_message = fields.TextField(null=True, description="失败原因")
+
+    started_at = fields.DatetimeField(null=True, description="开始时间")
+    finished_at = fields.DatetimeField(null=True, description="结束时间")
+    created_by = fields.IntField(null=True, description="创建人ID")
+
+    def __str__(self):
+        """字符串表示"""
+        return f"DemandComputationJob({self.uuid}, {self.status})"
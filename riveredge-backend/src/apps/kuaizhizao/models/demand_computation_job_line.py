@@ -0,0 +1,50 @@
+"""
+需求计算任务展开行模型模块
+
+定义需求计算任务展开阶段的断点明细：每个已展开的需求行一条记录，断点只追加新展开的行。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from tortoise import fields
+from core.models.base import BaseModel
+
+
+class DemandComputationJobLine(BaseModel):
+    """
+    需求计算任务展开行模型
+
+    展开阶段每个断点只写入本次新展开的需求行，不重写已保存的展开结果；
+    同物料同数量的需求行共用展开结果，只有首个需求行记录 explosion。
+
+    注意：继承自 BaseModel，自动包含 uuid、tenant_id、created_at、updated_at 字段。
+
+    Attributes:
+        id: 主键ID
+        job_id: 需求计算任务ID
+        demand_item_id: 需求明细ID
+        line_key: 展开结果键（物料ID:需求数量）
+        explosion: BOM展开结果（同键的后续需求行为空）
+    """
+
+    class Meta:
+        """
+        模型元数据
+        """
+        table = "apps_kuaizhizao_demand_computation_job_lines"
+        table_description = "快格轻制造 - 需求计算任务展开行"
+        indexes = [
+            ("tenant_id", "job_id"),
+        ]
+
+    id = fields.IntField(pk=True, description="主键ID")
+
+    job_id = fields.IntField(description="需求计算任务ID")
+    demand_item_id = fields.IntField(description="需求明细ID")
+    line_key = fields.CharField(max_length=100, description="展开结果键（物料ID:需求数量）")
+    explosion = fields.JSONField(null=True, description="BOM展开结果（JSON格式）")
+
+    def __str__(self):
+        """字符串表示"""
+        return f"DemandComputationJobLine({self.job_id}, {self.demand_item_id})"
@@ -0,0 +1,58 @@
+"""
+报工日汇总数据模型模块
+
+定义报工日汇总（预聚合）数据模型，用于大时间跨度报工统计。
+"""
+
+from tortoise import fields
+from core.models.base import BaseModel
+
+
+class ReportingDailyStat(BaseModel):
+    """
+    报工日汇总模型
+
+    按组织、日期预聚合报工记录，每天一行总计（dimension=total）及按工序、按操作工的分组行。
+    总计行即使当天无报工也会写入，用作“该日已汇总”的标记。
+
+    Attributes:
+        id: 主键ID
+        stat_date: 统计日期（按报工时间所在日期）
+        dimension: 汇总维度（total/operation/worker）
+        dimension_key: 维度值（工序名称或操作工姓名，总计行为空字符串）
+        record_count: 报工记录数
+        pending_count: 待审核数
+        approved_count: 已审核数
+        rejected_count: 已驳回数
+        reported_quantity: 报工数量合计
+        qualified_quantity: 合格数量合计
+        unqualified_quantity: 不合格数量合计
+        work_hours: 工时合计（小时）
+    """
+
+    class Meta:
+        """
+        模型元数据
+        """
+        table = "apps_kuaizhizao_reporting_daily_stats"
+        table_description = "快格轻制造 - 报工日汇总"
+        unique_together = [("tenant_id", "stat_date", "dimension", "dimension_key")]
+        indexes = [
+            ("tenant_id", "dimension", "stat_date"),
+        ]
+
+    id = fields.IntField(pk=True, description="主键ID")
+
+    stat_date = fields.DateField(description="统计日期")
+    dimension = fields.CharField(max_length=20, description="汇总维度（total/operation/worker）")
+    dimension_key = fields.CharField(max_length=200, default="", description="维度值（工序名称/操作工姓名）")
+
+    record_count = fields.IntField(default=0, description="报工记录数")
+    pending_count = fields.IntField(default=0, description="待审核数")
+    approved_count = fields.IntField(default=0, description="已审核数")
+    rejected_count = fields.IntField(default=0, description="已驳回数")
+
+    reported_quantity = fields.DecimalField(max_digits=18, decimal_places=2, default=0, description="报工数量合计")
+    qualified_quantity = fields.DecimalField(max_digits=18, decimal_places=2, default=0, description="合格数量合计")
+    unqualified_quantity = fields.DecimalField(max_digits=18, decimal_places=2, default=0, description="不合格数量合计")
+    work_hours = fields.DecimalField(max_digits=16, decimal_places=2, default=0, description="工时合计（小时）")
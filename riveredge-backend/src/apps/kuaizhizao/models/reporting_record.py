@@ -38,6 +38,7 @@ class ReportingRecord(BaseModel):
         rejection_reason: 驳回原因
         remarks: 备注
         device_info: 设备信息（JSON格式）
+        idempotency_key: 幂等键（同一组织内唯一，用于批量报工重试去重）
         created_at: 创建时间（继承自BaseModel）
         updated_at: 更新时间（继承自BaseModel）
         deleted_at: 删除时间（软删除）
@@ -96,4 +97,7 @@ class ReportingRecord(BaseModel):
     device_info = fields.JSONField(null=True, description="设备信息（JSON格式）")
     
     # SOP参数数据（核心功能，新增）
-    sop_parameters = fields.JSONField(null=True, description="SOP参数数据（JSON格式，存储报工时收集的SOP参数）")
\ No newline at end of file
+    sop_parameters = fields.JSONField(null=True, description="SOP参数数据（JSON格式，存储报工时收集的SOP参数）")
+
+    # 幂等键（终端/网关重试时防止重复报工，唯一约束在迁移文件中通过部分索引添加）
+    idempotency_key = fields.CharField(max_length=64, null=True, description="幂等键（同一组织内唯一）")
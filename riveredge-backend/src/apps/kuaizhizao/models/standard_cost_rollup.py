@@ -0,0 +1,68 @@
+"""
+标准成本卷积模型模块
+
+定义按成本版本预计算的物料标准单位成本（材料/加工/制造费用），支持多组织隔离。
+
+Author: Luigi Lu
+Date: 2026-03-03
+"""
+
+from tortoise import fields
+from core.models.base import BaseModel
+
+
+class StandardCostRollup(BaseModel):
+    """
+    标准成本卷积模型
+
+    每个成本版本下每个物料一行，按低层码自底向上卷积计算一次后存储，产品成本核算直接查询本表。
+    子件价格或BOM变化时，受影响物料及其所有上层物料被标记为过期（is_stale），下次卷积只重算过期行。
+
+    注意：继承自 BaseModel，自动包含 uuid、tenant_id、created_at、updated_at 字段。
+
+    Attributes:
+        id: 主键ID
+        cost_version: 成本版本（默认STD）
+        material_id: 物料ID
+        material_code: 物料编码
+        material_name: 物料名称
+        source_type: 物料来源类型（Make/Buy/Phantom/Outsource/Configure）
+        low_level_code: 低层码（物料在所有BOM中出现的最大层级，0为顶层）
+        material_cost: 单位材料成本（含下层卷积）
+        labor_cost: 单位加工成本（本层 + 下层卷积）
+        manufacturing_cost: 单位制造费用（本层 + 下层卷积）
+        total_cost: 单位总成本
+        cost_details: 本层成本明细（直接子件、工序、费用规则）
+        is_stale: 是否过期（待重新卷积）
+        calculated_at: 卷积计算时间
+    """
+
+    class Meta:
+        """
+        模型元数据
+        """
+        table = "apps_kuaizhizao_standard_cost_rollups"
+        table_description = "快格轻制造 - 标准成本卷积"
+        unique_together = [("tenant_id", "cost_version", "material_id")]
+        indexes = [
+            ("tenant_id", "cost_version", "is_stale"),
+            ("material_id",),
+        ]
+
+    id = fields.IntField(pk=True, description="主键ID")
+
+    cost_version = fields.CharField(max_length=50, default="STD", description="成本版本")
+    material_id = fields.IntField(description="物料ID")
+    material_code = fields.CharField(max_length=50, description="物料编码")
+    material_name = fields.CharField(max_length=200, description="物料名称")
+    source_type = fields.CharField(max_length=20, description="物料来源类型")
+    low_level_code = fields.IntField(default=0, description="低层码")
+
+    material_cost = fields.DecimalField(max_digits=18, decimal_places=6, default=0, description="单位材料成本")
+    labor_cost = fields.DecimalField(max_digits=18, decimal_places=6, default=0, description="单位加工成本")
+    manufacturing_cost = fields.DecimalField(max_digits=18, decimal_places=6, default=0, description="单位制造费用")
+    total_cost = fields.DecimalField(max_digits=18, decimal_places=6, default=0, description="单位总成本")
+    cost_details = fields.JSONField(null=True, description="本层成本明细（JSON格式）")
+
+    is_stale = fields.BooleanField(default=False, description="是否过期（待重新卷积）")
+    calculated_at = fields.DatetimeField(null=True, description="卷积计算时间")
@@ -300,6 +300,8 @@ class ProductionCostCalculationRequest(BaseModel):
     quantity: Decimal = Field(..., gt=0, description="数量")
     variant_attributes: Optional[Dict[str, Any]] = Field(None, description="变体属性（配置件时必须提供）")
     calculation_date: Optional[date] = Field(None, description="核算日期（可选，默认为当前日期）")
+    use_standard_cost: bool = Field(False, description="是否优先使用标准成本卷积结果（自制件）")
+    cost_version: Optional[str] = Field(None, max_length=50, description="标准成本版本（可选，默认STD）")
 
 
 class ProductionCostCalculationResponse(BaseModel):
@@ -323,6 +325,50 @@ class ProductionCostCalculationResponse(BaseModel):
     calculation_date: date = Field(..., description="核算日期")
 
 
+# ========== 标准成本卷积 Schema ==========
+
+class StandardCostRollupRequest(BaseModel):
+    """
+    标准成本卷积请求Schema
+    
+    用于请求执行标准成本卷积。
+    """
+    cost_version: str = Field("STD", max_length=50, description="成本版本")
+    full: bool = Field(False, description="是否全量重算（默认只重算过期和缺失的物料）")
+
+
+class StandardCostRollupResultResponse(BaseModel):
+    """
+    标准成本卷积结果响应Schema
+    """
+    cost_version: str = Field(..., description="成本版本")
+    material_count: int = Field(..., description="物料总数")
+    recalculated_count: int = Field(..., description="本次重算物料数")
+    cyclic_material_ids: List[int] = Field(default_factory=list, description="BOM循环引用物料ID")
+    duration_ms: int = Field(..., description="耗时（毫秒）")
+
+
+class StandardCostResponse(BaseModel):
+    """
+    物料标准成本响应Schema
+    """
+    material_id: int = Field(..., description="物料ID")
+    material_code: str = Field(..., description="物料编码")
+    material_name: str = Field(..., description="物料名称")
+    source_type: str = Field(..., description="物料来源类型")
+    cost_version: str = Field(..., description="成本版本")
+    low_level_code: int = Field(..., description="低层码")
+    material_cost: Decimal = Field(..., description="单位材料成本")
+    labor_cost: Decimal = Field(..., description="单位加工成本")
+    manufacturing_cost: Decimal = Field(..., description="单位制造费用")
+    total_cost: Decimal = Field(..., description="单位总成本")
+    cost_details: Optional[Dict[str, Any]] = Field(None, description="本层成本明细")
+    is_stale: bool = Field(..., description="是否过期")
+    calculated_at: Optional[datetime] = Field(None, description="卷积计算时间")
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # ========== 委外成本核算 Schema ==========
 
 class OutsourceCostCalculationRequest(BaseModel):
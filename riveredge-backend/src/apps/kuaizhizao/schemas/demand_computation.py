@@ -144,6 +144,28 @@ class DemandComputationResponse(DemandComputationBase):
     updated_by: Optional[int]
     items: Optional[List[DemandComputationItemResponse]] = Field(default_factory=list)
     lifecycle: Optional[dict] = Field(None, description="生命周期（后端计算，供 UniLifecycleStepper 展示）")
+    recalc_report: Optional[Dict[str, Any]] = Field(None, description="重算报告（仅重新计算接口返回：重算模式、统计、与重算前快照的差异）")
+
+    class Config:
+        from_attributes = True
+
+
+class DemandComputationJobResponse(BaseModel):
+    """需求计算任务响应Schema"""
+    uuid: str = Field(..., description="任务UUID")
+    tenant_id: int = Field(..., description="租户ID")
+    computation_id: int = Field(..., description="需求计算ID")
+    status: str = Field(..., description="任务状态（pending/running/completed/failed/cancelled）")
+    phase: str = Field(..., description="当前阶段（explode/net/finalize）")
+    progress: int = Field(..., description="进度百分比（0-100）")
+    total_materials: int = Field(..., description="需净算的物料数")
+    processed_materials: int = Field(..., description="已提交结果的物料数")
+    cancel_requested: bool = Field(..., description="是否已请求取消")
+    error_message: Optional[str] = Field(None, description="失败原因")
+    started_at: Optional[datetime] = Field(None, description="开始时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+    created_at: datetime = Field(..., description="创建时间")
+    updated_at: datetime = Field(..., description="更新时间")
 
     class Config:
         from_attributes = True
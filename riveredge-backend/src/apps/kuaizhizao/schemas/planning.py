@@ -272,6 +272,8 @@ class SchedulingConstraints(BaseSchema):
     consider_equipment: bool = Field(True, description="是否考虑设备约束")
     consider_material: bool = Field(True, description="是否考虑物料齐套")
     consider_mold_tool: bool = Field(True, description="是否考虑模具/工装占用")
+    horizon_days: Optional[int] = Field(None, gt=0, le=366, description="排产周期（天，默认90）")
+    time_budget_seconds: Optional[float] = Field(None, ge=0, le=60, description="局部搜索时间预算（秒，0表示只按优先级构造）")
 
 
 class IntelligentSchedulingRequest(BaseSchema):
@@ -287,6 +289,8 @@ class ScheduledOrder(BaseSchema):
     work_order_code: str = Field(..., description="工单编码")
     planned_start_date: Optional[datetime] = Field(None, description="计划开始时间")
     planned_end_date: Optional[datetime] = Field(None, description="计划结束时间")
+    setup_hours: Optional[float] = Field(None, description="换线时间（小时）")
+    operations: List[Dict[str, Any]] = Field(default_factory=list, description="工序计划时间")
 
 
 class UnscheduledOrder(BaseSchema):
@@ -302,6 +306,12 @@ class SchedulingStatistics(BaseSchema):
     scheduled_count: int = Field(..., description="已排产工单数")
     unscheduled_count: int = Field(..., description="无法排产工单数")
     scheduling_rate: float = Field(..., ge=0, le=1, description="排产成功率")
+    optimize_objective: Optional[str] = Field(None, description="优化目标")
+    makespan_hours: Optional[float] = Field(None, description="完工时间跨度（小时）")
+    total_setup_hours: Optional[float] = Field(None, description="总换线时间（小时）")
+    total_tardiness_hours: Optional[float] = Field(None, description="总拖期（小时）")
+    improvement: Optional[float] = Field(None, description="局部搜索改进程度（百分比）")
+    iterations: Optional[int] = Field(None, description="局部搜索迭代次数")
 
 
 class IntelligentSchedulingResponse(BaseSchema):
@@ -5,7 +5,7 @@
 """
 
 from datetime import datetime
-from typing import Optional, Any
+from typing import Optional, Any, List
 from pydantic import BaseModel, Field, ConfigDict
 from decimal import Decimal
 
@@ -35,6 +35,7 @@ class ReportingRecordBase(BaseModel):
     remarks: Optional[str] = Field(None, description="备注")
     device_info: Optional[Any] = Field(None, description="设备信息")
     sop_parameters: Optional[Any] = Field(None, description="SOP参数数据（JSON格式，存储报工时收集的SOP参数）")
+    idempotency_key: Optional[str] = Field(None, max_length=64, description="幂等键（同一组织内唯一，重试时携带相同值可避免重复报工）")
 
 
 class ReportingRecordCreate(ReportingRecordBase):
@@ -46,6 +47,38 @@ class ReportingRecordCreate(ReportingRecordBase):
     pass
 
 
+class ReportingRecordBatchCreate(BaseModel):
+    """
+    批量报工创建Schema
+
+    用于产线终端、PLC网关在班次结束时批量上报报工记录。
+    """
+    records: List[ReportingRecordCreate] = Field(..., min_length=1, max_length=1000, description="报工记录列表（单批最多1000条）")
+
+
+class ReportingRecordBatchItemResult(BaseModel):
+    """
+    批量报工单条结果Schema
+    """
+    index: int = Field(..., description="在请求列表中的序号（从0开始）")
+    success: bool = Field(..., description="是否成功")
+    record_id: Optional[int] = Field(None, description="报工记录ID（成功或命中幂等键时返回）")
+    duplicate: bool = Field(False, description="是否命中幂等键（已存在的报工记录，未重复创建）")
+    idempotency_key: Optional[str] = Field(None, description="幂等键")
+    error: Optional[str] = Field(None, description="失败原因")
+
+
+class ReportingRecordBatchResponse(BaseModel):
+    """
+    批量报工响应Schema
+    """
+    total: int = Field(..., description="请求记录总数")
+    success_count: int = Field(..., description="成功数量（含命中幂等键的记录）")
+    failed_count: int = Field(..., description="失败数量")
+    duplicate_count: int = Field(0, description="命中幂等键的数量")
+    results: List[ReportingRecordBatchItemResult] = Field(default_factory=list, description="逐条结果（与请求顺序一致）")
+
+
 class ReportingRecordUpdate(BaseModel):
     """
     报工记录更新Schema
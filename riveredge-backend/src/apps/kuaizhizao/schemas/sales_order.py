@@ -182,6 +182,7 @@ class SalesOrderListResponse(BaseSchema):
     """销售订单列表响应schema"""
     data: List[SalesOrderResponse]
     total: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标（无下一页时为空）")
     success: bool = True
 
 
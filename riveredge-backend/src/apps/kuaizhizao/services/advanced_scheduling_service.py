@@ -7,18 +7,55 @@ Author: Auto (AI Assistant)
 Date: 2026-01-27
 """
 
-from typing import List, Optional, Dict, Any, Tuple
-from datetime import datetime, date, timedelta
+import asyncio
+import functools
+from typing import Iterable, List, Optional, Dict, Any, Tuple
+from datetime import datetime, date
 from tortoise.transactions import in_transaction
 from loguru import logger
 
 from apps.kuaizhizao.models.work_order import WorkOrder
 from apps.kuaizhizao.models.work_order_operation import WorkOrderOperation
 from apps.kuaizhizao.models.equipment import Equipment
+from apps.kuaizhizao.utils.finite_capacity_scheduler import (
+    OBJECTIVE_MIN_MAKESPAN,
+    FiniteCapacityScheduler,
+    ScheduleResult,
+    SchedulingJob,
+    SchedulingOperation,
+    WorkCalendar,
+    at_hours,
+    hours_between,
+    periods_for_date,
+)
 from apps.master_data.models.factory import Workshop
+from core.models.working_hours_config import WorkingHoursConfig
 from core.services.base import BaseService
+from infra.config.infra_config import infra_settings
 from infra.exceptions.exceptions import ValidationError, BusinessLogicError
 
+# 排产周期（天）
+SCHEDULING_HORIZON_DAYS = infra_settings.SCHEDULING_HORIZON_DAYS
+
+# 局部搜索时间预算（秒）
+SCHEDULING_TIME_BUDGET_SECONDS = infra_settings.SCHEDULING_TIME_BUDGET_SECONDS
+
+# 工序未维护工时时的默认工时（小时，与 WorkOrderService 推算工序计划时间的默认值一致）
+DEFAULT_OPERATION_HOURS = 1.0
+
+# 无工序工单的默认工时（小时）
+DEFAULT_WORK_ORDER_HOURS = 8.0
+
+# 参与排产/占用产能的工序状态
+ACTIVE_OPERATION_STATUSES = ("pending", "in_progress")
+
+
+def _operation_resource(operation: WorkOrderOperation, work_order: WorkOrder) -> Tuple[str, int]:
+    """工序占用的资源：工作中心，未指定时为车间"""
+    if operation.work_center_id:
+        return ("work_center", operation.work_center_id)
+    return ("workshop", operation.workshop_id or work_order.workshop_id or 0)
+
 
 class AdvancedSchedulingService(BaseService):
     """
@@ -130,83 +167,222 @@ class AdvancedSchedulingService(BaseService):
         """
         执行排产算法
         
-        使用启发式算法（如遗传算法、模拟退火等）进行排产优化。
+        有限产能排产：工序工时取自工单工序（由工艺路线带入的标准工时、准备时间），
+        工作中心产能取自工作时间段配置，已排程的其他工单工序视为已有占用；
+        按优先级构造排产方案后，在时间预算内用模拟退火优化 optimize_objective。
         """
-        # TODO: 实现具体的排产算法
-        # 简单算法：基于优先级的贪心排产 + 车间日产能负荷约束
+        origin = datetime.now().replace(second=0, microsecond=0)
+        scheduler, work_order_map = await self._build_scheduler(tenant_id, work_orders, constraints, origin)
+        result = await self._solve(scheduler, constraints)
+        logger.info(
+            f"有限产能排产完成: 工单 {len(work_orders)} 个，未排入 {len(result.unscheduled)} 个，"
+            f"迭代 {result.iterations} 次，改进 {result.improvement}%"
+        )
+        jobs = {job.key: job for job in scheduler.jobs}
         
         scheduled_orders = []
         unscheduled_orders = []
-        conflicts = []
-        
-        # 维护一个简单的日产能负荷表: {(workshop_id, date): current_hours}
-        daily_load = {}
-        
-        # 按优先级评分排序
-        sorted_orders = sorted(
-            work_orders,
-            key=lambda wo: self._get_priority_score(wo, constraints),
-            reverse=True
-        )
-        
-        # 模拟排产过程
-        for work_order in sorted_orders:
-            try:
-                # 获取计划日期，若无则默认今天
-                current_date = (work_order.planned_start_date or datetime.now()).date()
-                workshop_id = work_order.workshop_id or 0
-                
-                # 预估工单耗时
-                estimated_hours = (work_order.planned_quantity or 1.0) * 0.1
-                capacity_limit = 24.0 # 默认每日 24h
-                
-                # 寻找可用日期 (最多向后搜索 14 天)
-                found_date = None
-                for i in range(14):
-                    check_date = current_date + timedelta(days=i)
-                    load = daily_load.get((workshop_id, check_date), 0.0)
-                    if load + estimated_hours <= capacity_limit:
-                        found_date = check_date
-                        break
-                
-                if found_date:
-                    # 分配产能
-                    daily_load[(workshop_id, found_date)] = daily_load.get((workshop_id, found_date), 0.0) + estimated_hours
-                    
-                    scheduled_orders.append({
-                        "work_order_id": work_order.id,
-                        "work_order_code": work_order.code,
-                        "original_date": current_date,
-                        "scheduled_date": found_date,
-                        "delay_days": (found_date - current_date).days,
-                        "estimated_hours": estimated_hours
-                    })
-                else:
-                    unscheduled_orders.append({
-                        "work_order_id": work_order.id,
-                        "work_order_code": work_order.code,
-                        "reason": "未来 14 天内均无足够车间产能"
-                    })
-            except Exception as e:
-                logger.error(f"排产工单 {work_order.code} 失败: {e}")
+        for work_order_id in result.order:
+            work_order = work_order_map[work_order_id]
+            scheduled = result.jobs.get(work_order_id)
+            if scheduled is None:
                 unscheduled_orders.append({
                     "work_order_id": work_order.id,
                     "work_order_code": work_order.code,
-                    "reason": f"系统错误: {str(e)}"
+                    "reason": f"未来 {constraints['horizon_days']} 天内工作中心产能不足",
                 })
+                continue
+            
+            planned_start = at_hours(origin, scheduled.start)
+            planned_end = at_hours(origin, scheduled.end)
+            original_date = (work_order.planned_start_date or origin).date()
+            scheduled_orders.append({
+                "work_order_id": work_order.id,
+                "work_order_code": work_order.code,
+                "original_date": original_date,
+                "scheduled_date": planned_start.date(),
+                "planned_start_date": planned_start,
+                "planned_end_date": planned_end,
+                "delay_days": (planned_start.date() - original_date).days,
+                "estimated_hours": round(sum(
+                    operation.run_hours + operation.setup_hours
+                    for operation in jobs[work_order_id].operations
+                ), 2),
+                "setup_hours": round(scheduled.setup_hours, 2),
+                "operations": [
+                    {
+                        "operation_id": operation.key,
+                        "work_center_id": operation.resource[1] if operation.resource[0] == "work_center" else None,
+                        "planned_start_date": at_hours(origin, operation.start),
+                        "planned_end_date": at_hours(origin, operation.end),
+                        "setup_hours": round(operation.setup_hours, 2),
+                    }
+                    for operation in scheduled.operations
+                ],
+            })
         
         return {
             "scheduled_orders": scheduled_orders,
             "unscheduled_orders": unscheduled_orders,
-            "conflicts": conflicts,
+            "conflicts": [],
             "statistics": {
                 "total_orders": len(work_orders),
                 "scheduled_count": len(scheduled_orders),
                 "unscheduled_count": len(unscheduled_orders),
-                "scheduling_rate": len(scheduled_orders) / len(work_orders) if work_orders else 0
+                "scheduling_rate": len(scheduled_orders) / len(work_orders) if work_orders else 0,
+                "optimize_objective": constraints.get("optimize_objective"),
+                "makespan_hours": round(result.metrics["makespan_hours"], 2),
+                "total_setup_hours": round(result.metrics["total_setup_hours"], 2),
+                "total_tardiness_hours": round(result.metrics["total_tardiness_hours"], 2),
+                "improvement": result.improvement,
+                "iterations": result.iterations,
             }
         }
     
+    async def _build_scheduler(
+        self,
+        tenant_id: int,
+        work_orders: List[WorkOrder],
+        constraints: Dict[str, Any],
+        origin: datetime,
+    ) -> Tuple[FiniteCapacityScheduler, Dict[int, WorkOrder]]:
+        """
+        构造有限产能排产问题
+        
+        - 资源：工序的工作中心（未指定时为车间）
+        - 工时：剩余数量 × 标准工时 + 准备时间（同产品连续加工免准备）
+        - 日历：工作中心的工作时间段配置，未配置时使用全局配置，均未配置时全天可用
+        - 已有占用：不在本次排产范围内、未完工且已排程的工序
+        """
+        constraints.setdefault("horizon_days", SCHEDULING_HORIZON_DAYS)
+        horizon_days = int(constraints["horizon_days"])
+        work_order_map = {work_order.id: work_order for work_order in work_orders}
+        
+        operations = await WorkOrderOperation.filter(
+            tenant_id=tenant_id,
+            work_order_id__in=list(work_order_map),
+            status__in=ACTIVE_OPERATION_STATUSES,
+            deleted_at__isnull=True,
+        ).order_by("work_order_id", "sequence").all()
+        operations_by_order: Dict[int, List[WorkOrderOperation]] = {}
+        for operation in operations:
+            operations_by_order.setdefault(operation.work_order_id, []).append(operation)
+        
+        jobs = []
+        for work_order in work_orders:
+            quantity = float(work_order.quantity or 1)
+            scheduling_operations = []
+            for operation in operations_by_order.get(work_order.id, []):
+                remaining = max(quantity - float(operation.completed_quantity or 0), 0)
+                run_hours = float(operation.standard_time or 0) * remaining
+                setup_hours = float(operation.setup_time or 0)
+                if run_hours + setup_hours <= 0:
+                    run_hours = DEFAULT_OPERATION_HOURS
+                scheduling_operations.append(SchedulingOperation(
+                    key=operation.id,
+                    resource=_operation_resource(operation, work_order),
+                    run_hours=run_hours,
+                    setup_hours=setup_hours,
+                ))
+            if not scheduling_operations:
+                # 无工序的工单按车间整体占用排产
+                scheduling_operations.append(SchedulingOperation(
+                    key=None,
+                    resource=("workshop", work_order.workshop_id or 0),
+                    run_hours=float(constraints.get("default_work_order_hours") or DEFAULT_WORK_ORDER_HOURS),
+                ))
+            jobs.append(SchedulingJob(
+                key=work_order.id,
+                operations=scheduling_operations,
+                family=work_order.product_id,
+                release=max(hours_between(origin, work_order.planned_start_date) or 0.0, 0.0),
+                due=hours_between(origin, work_order.planned_end_date),
+                score=self._get_priority_score(work_order, constraints),
+            ))
+        
+        resources = {operation.resource for job in jobs for operation in job.operations}
+        calendars, default_calendar = await self._load_calendars(tenant_id, resources, origin, horizon_days)
+        
+        busy: Dict[Any, List[Tuple[float, float]]] = {}
+        occupied = await WorkOrderOperation.filter(
+            tenant_id=tenant_id,
+            status__in=ACTIVE_OPERATION_STATUSES,
+            deleted_at__isnull=True,
+            planned_start_date__isnull=False,
+            planned_end_date__gt=origin,
+        ).exclude(
+            work_order_id__in=list(work_order_map),
+        ).values("work_center_id", "workshop_id", "planned_start_date", "planned_end_date")
+        for row in occupied:
+            resource = ("work_center", row["work_center_id"]) if row["work_center_id"] else ("workshop", row["workshop_id"] or 0)
+            if resource in resources:
+                busy.setdefault(resource, []).append((
+                    hours_between(origin, row["planned_start_date"]),
+                    hours_between(origin, row["planned_end_date"]),
+                ))
+        
+        scheduler = FiniteCapacityScheduler(
+            jobs,
+            calendars,
+            default_calendar,
+            busy=busy,
+            due_date_weight=float(constraints.get("due_date_weight") or 0),
+        )
+        return scheduler, work_order_map
+    
+    async def _load_calendars(
+        self,
+        tenant_id: int,
+        resources: Iterable[Any],
+        origin: datetime,
+        horizon_days: int,
+    ) -> Tuple[Dict[Any, WorkCalendar], WorkCalendar]:
+        """按工作时间段配置展开资源日历（配置相同的资源共用一个日历）"""
+        configs = await WorkingHoursConfig.filter(
+            tenant_id=tenant_id,
+            is_enabled=True,
+            deleted_at__isnull=True,
+        ).order_by("-priority", "id").all()
+        global_configs = [config for config in configs if config.scope_type == "all"]
+        work_center_configs: Dict[int, List[WorkingHoursConfig]] = {}
+        for config in configs:
+            if config.scope_type == "work_center" and config.scope_id is not None:
+                work_center_configs.setdefault(config.scope_id, []).append(config)
+        
+        built: Dict[Tuple[int, ...], WorkCalendar] = {}
+        
+        def build(scope_configs: List[WorkingHoursConfig]) -> WorkCalendar:
+            key = tuple(config.id for config in scope_configs)
+            if key not in built:
+                if scope_configs:
+                    built[key] = WorkCalendar.from_daily_periods(
+                        origin, horizon_days, lambda current: periods_for_date(scope_configs, current)
+                    )
+                else:
+                    built[key] = WorkCalendar.continuous(horizon_days)
+            return built[key]
+        
+        default_calendar = build(global_configs)
+        calendars = {}
+        for resource in resources:
+            kind, resource_id = resource
+            if kind == "work_center" and resource_id in work_center_configs:
+                calendars[resource] = build(work_center_configs[resource_id])
+        return calendars, default_calendar
+    
+    async def _solve(self, scheduler: FiniteCapacityScheduler, constraints: Dict[str, Any]) -> ScheduleResult:
+        """在线程池中求解（局部搜索为CPU密集计算，避免阻塞事件循环）"""
+        time_budget = constraints.get("time_budget_seconds")
+        if time_budget is None:
+            time_budget = SCHEDULING_TIME_BUDGET_SECONDS
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(
+            scheduler.solve,
+            objective=constraints.get("optimize_objective") or OBJECTIVE_MIN_MAKESPAN,
+            time_budget=float(time_budget),
+            max_iterations=constraints.get("max_iterations"),
+        ))
+    
     async def _check_mold_tool_conflicts(self, tenant_id: int) -> List[Dict[str, Any]]:
         """
         检测模具/工装占用冲突
@@ -297,10 +473,19 @@ class AdvancedSchedulingService(BaseService):
         tenant_id: int,
         work_order: WorkOrder
     ) -> bool:
-        """检查工作中心能力"""
-        # TODO: 实现工作中心能力检查
-        # 这里先返回True，表示能力充足
-        return True
+        """
+        检查工作中心能力
+        
+        在已有占用之上单独排入该工单（不做局部搜索），能在排产周期内排入且不晚于计划完工时间时返回 True。
+        """
+        origin = datetime.now().replace(second=0, microsecond=0)
+        scheduler, _ = await self._build_scheduler(tenant_id, [work_order], {}, origin)
+        result = scheduler.solve(time_budget=0)
+        scheduled = result.jobs.get(work_order.id)
+        if scheduled is None:
+            return False
+        due = hours_between(origin, work_order.planned_end_date)
+        return due is None or scheduled.end <= due
     
     async def apply_scheduling_results(
         self,
@@ -311,16 +496,21 @@ class AdvancedSchedulingService(BaseService):
         """
         应用排产结果
         
-        将排产建议的具体日期更新到工单模型中，并推算工序级计划时间。
+        有限产能排产结果（含工序计划时间）直接写入工单与工序；
+        仅有排产日期的结果沿用原逻辑，按工序工时推算工序级计划时间。
         """
         from apps.kuaizhizao.services.work_order_service import WorkOrderService
 
-        async with in_transaction():
+        async with in_transaction("default"):
+            timed = [res for res in results if res.get("work_order_id") and res.get("planned_start_date")]
+            if timed:
+                await self._apply_timed_results(tenant_id, timed, updated_by)
+
             for res in results:
                 wo_id = res.get("work_order_id")
                 scheduled_date = res.get("scheduled_date")
 
-                if not wo_id or not scheduled_date:
+                if not wo_id or not scheduled_date or res.get("planned_start_date"):
                     continue
 
                 wo = await WorkOrder.get_or_none(id=wo_id, tenant_id=tenant_id)
@@ -349,6 +539,48 @@ class AdvancedSchedulingService(BaseService):
                         )
             return True
 
+    async def _apply_timed_results(
+        self,
+        tenant_id: int,
+        results: List[Dict[str, Any]],
+        updated_by: int,
+    ) -> None:
+        """批量写入工单与工序计划时间（各一次查询、一次批量更新）"""
+        by_order = {res["work_order_id"]: res for res in results}
+        operation_times = {
+            operation["operation_id"]: operation
+            for res in results
+            for operation in res.get("operations") or []
+            if operation.get("operation_id")
+        }
+
+        work_orders = await WorkOrder.filter(tenant_id=tenant_id, id__in=list(by_order)).all()
+        for wo in work_orders:
+            wo.planned_start_date = by_order[wo.id]["planned_start_date"]
+            wo.planned_end_date = by_order[wo.id]["planned_end_date"]
+            wo.updated_by = updated_by
+        if work_orders:
+            await WorkOrder.bulk_update(
+                work_orders,
+                fields=["planned_start_date", "planned_end_date", "updated_by"],
+                batch_size=500,
+            )
+
+        if operation_times:
+            operations = await WorkOrderOperation.filter(
+                tenant_id=tenant_id,
+                id__in=list(operation_times),
+            ).all()
+            for op in operations:
+                op.planned_start_date = operation_times[op.id]["planned_start_date"]
+                op.planned_end_date = operation_times[op.id]["planned_end_date"]
+            if operations:
+                await WorkOrderOperation.bulk_update(
+                    operations,
+                    fields=["planned_start_date", "planned_end_date"],
+                    batch_size=500,
+                )
+
     async def optimize_schedule(
         self,
         tenant_id: int,
@@ -357,10 +589,32 @@ class AdvancedSchedulingService(BaseService):
     ) -> Dict[str, Any]:
         """
         优化排产计划
+        
+        对待排产工单执行有限产能排产，返回局部搜索相对优先级构造方案的改进（不写入工单）。
         """
-        # TODO: 实现更复杂的排产优化算法
+        params = optimization_params or {}
+        work_orders = await WorkOrder.filter(
+            tenant_id=tenant_id,
+            status__in=["draft", "released"],
+        ).all()
+        if not work_orders:
+            return {
+                "optimized": False,
+                "improvement": 0.0,
+                "iterations": 0
+            }
+
+        constraints = {
+            "priority_weight": 0.3,
+            "due_date_weight": 0.3,
+            "optimize_objective": params.get("optimization_objective") or OBJECTIVE_MIN_MAKESPAN,
+            "max_iterations": params.get("max_iterations"),
+        }
+        origin = datetime.now().replace(second=0, microsecond=0)
+        scheduler, _ = await self._build_scheduler(tenant_id, work_orders, constraints, origin)
+        result = await self._solve(scheduler, constraints)
         return {
-            "optimized": True,
-            "improvement": 0.0,
-            "iterations": 0
+            "optimized": result.cost < result.initial_cost,
+            "improvement": result.improvement,
+            "iterations": result.iterations
         }
@@ -52,7 +52,7 @@ class AssemblyOrderService(AppBaseService[AssemblyOrder]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "assembly_order")
         if not is_enabled:
             raise BusinessLogicError("组装单节点未启用，无法创建组装单")
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(
                 tenant_id=tenant_id,
@@ -112,7 +112,7 @@ class AssemblyOrderService(AppBaseService[AssemblyOrder]):
         order_data: AssemblyOrderUpdate,
         updated_by: int
     ) -> AssemblyOrderResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await AssemblyOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
@@ -167,7 +167,7 @@ class AssemblyOrderService(AppBaseService[AssemblyOrder]):
         item_data: AssemblyOrderItemCreateInput,
         created_by: int
     ) -> AssemblyOrderItemResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await AssemblyOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
@@ -204,7 +204,7 @@ class AssemblyOrderService(AppBaseService[AssemblyOrder]):
         item_data: AssemblyOrderItemUpdate,
         updated_by: int
     ) -> AssemblyOrderItemResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             item = await AssemblyOrderItem.get_or_none(
                 id=item_id,
                 tenant_id=tenant_id,
@@ -235,7 +235,7 @@ class AssemblyOrderService(AppBaseService[AssemblyOrder]):
         executed_by: int,
         request_data: Optional[ExecuteAssemblyOrderRequest] = None
     ) -> AssemblyOrderResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await AssemblyOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
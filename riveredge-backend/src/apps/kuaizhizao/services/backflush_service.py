@@ -283,7 +283,7 @@ class BackflushService(AppBaseService[BackflushRecord]):
         warehouse_map = {w.id: w for w in line_side_warehouses}
 
         records = []
-        async with in_transaction():
+        async with in_transaction("default"):
             for cons in consumption_list:
                 required = Decimal(str(cons["required_quantity"]))
                 pick_list = await self.auto_pick_batches(
@@ -424,7 +424,7 @@ class BackflushService(AppBaseService[BackflushRecord]):
             return None
 
         record = None
-        async with in_transaction():
+        async with in_transaction("default"):
             for pick in pick_list:
                 inv = await LineSideInventory.get(id=pick["inventory_id"])
                 inv.quantity = inv.quantity - pick["pick_quantity"]
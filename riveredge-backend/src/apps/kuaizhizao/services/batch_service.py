@@ -78,7 +78,7 @@ class BatchOperationService:
         # 使用批量插入（如果支持且数据量较大）
         if use_bulk and len(validated_data_list) >= batch_size:
             try:
-                async with in_transaction():
+                async with in_transaction("default"):
                     # 分批插入
                     for i in range(0, len(validated_data_list), batch_size):
                         batch = validated_data_list[i:i + batch_size]
@@ -106,7 +106,7 @@ class BatchOperationService:
 
         # 如果不使用批量插入或批量插入失败，使用逐条创建
         if not use_bulk or len(success_records) == 0:
-            async with in_transaction():
+            async with in_transaction("default"):
                 for index, data in validated_data_list:
                     try:
                         # 创建记录
@@ -195,7 +195,7 @@ class BatchOperationService:
             }
 
         # 分批更新
-        async with in_transaction():
+        async with in_transaction("default"):
             for i in range(0, len(validated_updates), batch_size):
                 batch = validated_updates[i:i + batch_size]
                 
@@ -301,7 +301,7 @@ class BatchOperationService:
             }
 
         # 批量删除
-        async with in_transaction():
+        async with in_transaction("default"):
             if soft_delete and hasattr(model_class, 'deleted_at'):
                 # 批量软删除
                 deleted_count = await model_class.filter(
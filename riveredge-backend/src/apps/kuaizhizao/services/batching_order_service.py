@@ -46,7 +46,7 @@ class BatchingOrderService(AppBaseService[BatchingOrder]):
         created_by: int,
         items: Optional[List[BatchingOrderItemCreate]] = None,
     ) -> BatchingOrderResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(
                 tenant_id=tenant_id,
@@ -128,7 +128,7 @@ class BatchingOrderService(AppBaseService[BatchingOrder]):
         if not requirements:
             raise ValidationError("工单产品无 BOM 或 BOM 未审核，无法展开物料需求")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(
                 tenant_id=tenant_id,
@@ -262,7 +262,7 @@ class BatchingOrderService(AppBaseService[BatchingOrder]):
         order_id: int,
         executed_by: int,
     ) -> BatchingOrderResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await BatchingOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
@@ -51,7 +51,7 @@ class ComputationConfigService(AppBaseService[ComputationConfig]):
         Returns:
             ComputationConfigResponse: 创建的配置响应
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证配置编码唯一性
             existing = await ComputationConfig.get_or_none(
                 tenant_id=tenant_id,
@@ -182,7 +182,7 @@ class ComputationConfigService(AppBaseService[ComputationConfig]):
         Returns:
             ComputationConfigResponse: 更新后的配置响应
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             config = await ComputationConfig.get_or_none(
                 tenant_id=tenant_id,
                 id=config_id,
@@ -15,6 +15,7 @@ from tortoise.transactions import in_transaction
 from loguru import logger
 
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
+from infra.infrastructure.database.db_router import replica_read
 from apps.master_data.models.material import Material
 from apps.kuaizhizao.models.cost_calculation import CostCalculation
 from apps.kuaizhizao.services.production_cost_service import ProductionCostService
@@ -34,6 +35,7 @@ class CostReportService:
         self.purchase_cost_service = PurchaseCostService()
         self.outsource_cost_service = OutsourceCostService()
 
+    @replica_read
     async def analyze_cost_trend(
         self,
         tenant_id: int,
@@ -162,6 +164,7 @@ class CostReportService:
             },
         }
 
+    @replica_read
     async def analyze_cost_structure(
         self,
         tenant_id: int,
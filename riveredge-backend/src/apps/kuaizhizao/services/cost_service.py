@@ -43,6 +43,20 @@ from apps.kuaizhizao.schemas.cost import (
 )
 from loguru import logger
 
+# 影响标准成本卷积的规则类型
+OVERHEAD_RULE_TYPE = "制造费用"
+
+
+async def _invalidate_standard_cost(tenant_id: int) -> None:
+    """
+    制造费用规则变化时，标记组织的标准成本卷积结果为过期（失败只记录日志，不影响规则维护）
+    """
+    try:
+        from apps.kuaizhizao.services.standard_cost_rollup_service import StandardCostRollupService
+        await StandardCostRollupService().mark_all_stale(tenant_id=tenant_id)
+    except Exception as e:
+        logger.warning(f"标记标准成本过期失败: {e}")
+
 
 class CostRuleService(AppBaseService[CostRule]):
     """
@@ -74,7 +88,7 @@ class CostRuleService(AppBaseService[CostRule]):
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成规则编码（如果未提供）
             if not cost_rule_data.code:
                 today = datetime.now().strftime("%Y%m%d")
@@ -113,7 +127,10 @@ class CostRuleService(AppBaseService[CostRule]):
                 updated_by_name=user_info["name"],
             )
 
-            return CostRuleResponse.model_validate(cost_rule)
+        if cost_rule.rule_type == OVERHEAD_RULE_TYPE:
+            await _invalidate_standard_cost(tenant_id)
+
+        return CostRuleResponse.model_validate(cost_rule)
 
     async def get_cost_rule_by_id(
         self,
@@ -197,8 +214,9 @@ class CostRuleService(AppBaseService[CostRule]):
         Raises:
             NotFoundError: 成本核算规则不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             cost_rule = await self.get_by_id(tenant_id, cost_rule_id, raise_if_not_found=True)
+            previous_rule_type = cost_rule.rule_type
 
             # 获取更新人信息
             user_info = await self.get_user_info(updated_by)
@@ -210,7 +228,10 @@ class CostRuleService(AppBaseService[CostRule]):
                 "updated_by_name": user_info["name"],
             }).save()
 
-            return CostRuleResponse.model_validate(cost_rule)
+        if OVERHEAD_RULE_TYPE in (previous_rule_type, cost_rule.rule_type):
+            await _invalidate_standard_cost(tenant_id)
+
+        return CostRuleResponse.model_validate(cost_rule)
 
     async def delete_cost_rule(
         self,
@@ -227,12 +248,15 @@ class CostRuleService(AppBaseService[CostRule]):
         Raises:
             NotFoundError: 成本核算规则不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             cost_rule = await self.get_by_id(tenant_id, cost_rule_id, raise_if_not_found=True)
 
             cost_rule.deleted_at = datetime.utcnow()
             await cost_rule.save()
 
+        if cost_rule.rule_type == OVERHEAD_RULE_TYPE:
+            await _invalidate_standard_cost(tenant_id)
+
 
 class CostCalculationService(AppBaseService[CostCalculation]):
     """
@@ -268,7 +292,7 @@ class CostCalculationService(AppBaseService[CostCalculation]):
             NotFoundError: 工单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取工单信息
             work_order = await WorkOrder.filter(tenant_id=tenant_id, id=request.work_order_id, deleted_at__isnull=True).first()
             if not work_order:
@@ -354,7 +378,7 @@ class CostCalculationService(AppBaseService[CostCalculation]):
             NotFoundError: 产品不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取产品信息
             product = await Material.filter(tenant_id=tenant_id, id=request.product_id, deleted_at__isnull=True).first()
             if not product:
@@ -63,7 +63,7 @@ class BarcodeMappingRuleService(AppBaseService[BarcodeMappingRule]):
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成映射规则编码
             code = await self.generate_code(
                 tenant_id=tenant_id,
@@ -251,7 +251,7 @@ class CustomerMaterialRegistrationService(AppBaseService[CustomerMaterialRegistr
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 解析条码（如果提供了条码）
             mapped_material_id = None
             mapped_material_code = None
@@ -407,7 +407,7 @@ class CustomerMaterialRegistrationService(AppBaseService[CustomerMaterialRegistr
             NotFoundError: 登记记录不存在
             BusinessLogicError: 登记记录状态不允许处理
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取登记记录
             registration = await CustomerMaterialRegistration.get_or_none(
                 id=registration_id,
@@ -452,7 +452,7 @@ class CustomerMaterialRegistrationService(AppBaseService[CustomerMaterialRegistr
             NotFoundError: 登记记录不存在
             BusinessLogicError: 登记记录状态不允许取消
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取登记记录
             registration = await CustomerMaterialRegistration.get_or_none(
                 id=registration_id,
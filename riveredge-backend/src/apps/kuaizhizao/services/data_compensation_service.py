@@ -62,7 +62,7 @@ class DataCompensationService:
             "total_compensation_count": 0,
         }
         
-        async with in_transaction():
+        async with in_transaction("default"):
             # 1. 计算库存变化补偿
             inventory_result = await self._calculate_inventory_compensation(
                 tenant_id, snapshot_time, launch_date, created_by
@@ -65,7 +65,7 @@ class DefectRecordService(AppBaseService[DefectRecord]):
             ValidationError: 数据验证失败
             BusinessLogicError: 业务逻辑错误
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取不良品记录
             defect_record = await DefectRecord.get_or_none(
                 id=defect_id,
@@ -354,7 +354,7 @@ class DefectRecordService(AppBaseService[DefectRecord]):
         import uuid
         from apps.kuaizhizao.models.incoming_inspection import IncomingInspection
 
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取来料检验单
             inspection = await IncomingInspection.get_or_none(
                 id=inspection_id,
@@ -442,7 +442,7 @@ class DefectRecordService(AppBaseService[DefectRecord]):
         import uuid
         from apps.kuaizhizao.models.process_inspection import ProcessInspection
 
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取过程检验单
             inspection = await ProcessInspection.get_or_none(
                 id=inspection_id,
@@ -535,7 +535,7 @@ class DefectRecordService(AppBaseService[DefectRecord]):
         import uuid
         from apps.kuaizhizao.models.finished_goods_inspection import FinishedGoodsInspection
 
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取成品检验单
             inspection = await FinishedGoodsInspection.get_or_none(
                 id=inspection_id,
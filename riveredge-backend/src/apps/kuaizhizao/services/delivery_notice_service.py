@@ -45,7 +45,7 @@ class DeliveryNoticeService(AppBaseService[DeliveryNotice]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "delivery_notice")
         if not is_enabled:
             raise BusinessLogicError("送货单节点未启用，无法创建送货单")
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "DELIVERY_NOTICE_CODE", prefix=f"DN{today}")
 
@@ -132,7 +132,7 @@ class DeliveryNoticeService(AppBaseService[DeliveryNotice]):
         if notice.status != "待发送":
             raise BusinessLogicError("只能更新待发送状态的送货单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             dump = notice_data.model_dump(exclude_unset=True, exclude={"notice_code"})
             dump["updated_by"] = updated_by
             await DeliveryNotice.filter(tenant_id=tenant_id, id=notice_id).update(**dump)
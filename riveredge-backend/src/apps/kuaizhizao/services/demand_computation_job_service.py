@@ -0,0 +1,518 @@
+"""
+需求计算后台任务服务模块
+
+大型需求计算不再在 HTTP 请求和单个长事务中同步执行，而是创建 DemandComputationJob 后由 Inngest 后台执行：
+- explode：逐需求行展开BOM，定期把新展开的需求行追加写入断点（DemandComputationJobLine）
+- net：按低层码（物料在BOM中出现的最深层级）逐层、分块净算，每块结果明细与断点同一事务提交
+- finalize：保存净改变状态，计算完成
+
+执行过程中通过 WebSocketService 推送进度百分比；支持协作式取消（在断点处检查取消请求），
+并通过 Inngest 并发键限制单个组织同时执行的任务数。执行前以条件更新认领任务，
+Inngest 重试与手动重试的事件不会重复执行同一任务。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+from loguru import logger
+
+from apps.kuaizhizao.models.demand_computation import DemandComputation
+from apps.kuaizhizao.models.demand_computation_item import DemandComputationItem
+from apps.kuaizhizao.models.demand_computation_job import DemandComputationJob
+from apps.kuaizhizao.models.demand_computation_job_line import DemandComputationJobLine
+from apps.kuaizhizao.utils.mrp_net_change import aggregate_requirements, line_key, low_level_codes
+from infra.config.infra_config import infra_settings
+from infra.exceptions.exceptions import BusinessLogicError, NotFoundError, ValidationError
+
+# 净算阶段每个分块的物料数（每块一个事务提交并更新断点）
+MRP_JOB_CHUNK_SIZE = infra_settings.MRP_JOB_CHUNK_SIZE
+
+# 展开阶段每展开多少个需求行写一次断点并检查取消请求
+MRP_JOB_EXPLODE_CHECKPOINT_LINES = infra_settings.MRP_JOB_EXPLODE_CHECKPOINT_LINES
+
+# 单个组织同时执行的需求计算任务数
+MRP_JOB_TENANT_CONCURRENCY = infra_settings.MRP_JOB_TENANT_CONCURRENCY
+
+# 任务执行事件名
+MRP_JOB_EVENT = "kuaizhizao/demand-computation-job"
+
+# 进度推送频道
+MRP_JOB_CHANNEL = "demand_computation_job"
+
+# 各阶段进度区间：展开 0-40，净算 40-95，收尾 95-100
+EXPLODE_PROGRESS_END = 40
+NET_PROGRESS_END = 95
+
+ACTIVE_JOB_STATUSES = ("pending", "running")
+
+# 可被执行认领的任务状态（失败任务由 Inngest 重试或手动重试后从断点继续）
+CLAIMABLE_JOB_STATUSES = ("pending", "failed")
+
+
+class _JobCancelled(Exception):
+    """任务已被请求取消"""
+
+
+class DemandComputationJobService:
+    """需求计算后台任务服务"""
+
+    @staticmethod
+    async def create_job(
+        tenant_id: int,
+        computation_id: int,
+        computation_params_override: Optional[Dict[str, Any]] = None,
+        created_by: Optional[int] = None,
+    ) -> DemandComputationJob:
+        """
+        创建需求计算任务并发送后台执行事件
+
+        Args:
+            tenant_id: 租户ID
+            computation_id: 计算ID
+            computation_params_override: 临时覆盖的计算参数，仅本次执行生效，不持久化
+            created_by: 创建人ID（进度推送给该用户）
+
+        Returns:
+            DemandComputationJob: 计算任务
+
+        Raises:
+            NotFoundError: 计算不存在时抛出
+            BusinessLogicError: 计算状态不允许执行、已有执行中的任务或任务调度失败时抛出
+        """
+        computation = await DemandComputation.get_or_none(tenant_id=tenant_id, id=computation_id)
+        if not computation:
+            raise NotFoundError(f"需求计算不存在: {computation_id}")
+        if computation.computation_status not in ("进行中", "失败"):
+            raise BusinessLogicError(
+                f"只能执行进行中或失败状态的计算，当前状态: {computation.computation_status}"
+            )
+        if await DemandComputationJob.filter(
+            tenant_id=tenant_id,
+            computation_id=computation_id,
+            status__in=ACTIVE_JOB_STATUSES,
+        ).exists():
+            raise BusinessLogicError("该计算已有执行中的任务，请等待完成或取消后再执行")
+
+        job = await DemandComputationJob.create(
+            tenant_id=tenant_id,
+            computation_id=computation_id,
+            checkpoint={"params_override": computation_params_override or {}},
+            created_by=created_by,
+        )
+        await DemandComputationJobService._dispatch_or_fail(job)
+        return job
+
+    @staticmethod
+    async def get_job(tenant_id: int, job_uuid: str) -> DemandComputationJob:
+        """
+        获取需求计算任务（进度查询）
+
+        Raises:
+            NotFoundError: 任务不存在时抛出
+        """
+        job = await DemandComputationJob.get_or_none(tenant_id=tenant_id, uuid=job_uuid)
+        if not job:
+            raise NotFoundError(f"需求计算任务 {job_uuid} 不存在")
+        return job
+
+    @staticmethod
+    async def cancel_job(tenant_id: int, job_uuid: str) -> DemandComputationJob:
+        """
+        取消需求计算任务
+
+        未开始的任务直接取消；执行中的任务记录取消请求，由任务在下一个断点处停止并清理已写入的明细。
+
+        Raises:
+            NotFoundError: 任务不存在时抛出
+            ValidationError: 任务已结束时抛出
+        """
+        job = await DemandComputationJobService.get_job(tenant_id, job_uuid)
+        if job.status in CLAIMABLE_JOB_STATUSES:
+            # 条件更新抢占，避免与同时认领该任务的执行互相覆盖
+            if await DemandComputationJob.filter(id=job.id, status=job.status).update(status="cancelled"):
+                await DemandComputationJobService._mark_cancelled(job)
+                return job
+            await job.refresh_from_db(fields=["status"])
+
+        if job.status != "running":
+            raise ValidationError(f"任务已结束，无法取消，当前状态：{job.status}")
+        job.cancel_requested = True
+        await job.save(update_fields=["cancel_requested", "updated_at"])
+        return job
+
+    @staticmethod
+    async def resume_job(tenant_id: int, job_uuid: str) -> DemandComputationJob:
+        """
+        重新执行失败的计算任务（从断点继续）
+
+        Raises:
+            NotFoundError: 任务不存在时抛出
+            ValidationError: 任务不是失败状态时抛出
+        """
+        job = await DemandComputationJobService.get_job(tenant_id, job_uuid)
+        # 条件更新认领任务：Inngest 自动重试已将任务置为执行中时不再重复发送执行事件
+        claimed = await DemandComputationJob.filter(id=job.id, status="failed").update(
+            status="pending",
+            error_message=None,
+        )
+        if not claimed:
+            await job.refresh_from_db(fields=["status"])
+            raise ValidationError(f"只有失败的计算任务可以重试，当前状态：{job.status}")
+        job.status = "pending"
+        job.error_message = None
+        await DemandComputationJobService._dispatch_or_fail(job)
+        return job
+
+    @staticmethod
+    async def run_job(tenant_id: int, job_uuid: str) -> Dict[str, Any]:
+        """
+        执行需求计算任务（由 Inngest 工作流调用）
+
+        MRP 按 explode -> net -> finalize 阶段执行，每个阶段的进度都写入断点，
+        任务失败后重新执行会跳过已展开的需求行和已提交的分块。
+        LRP 计算按时间段整体展开，仍在单个事务中执行。
+
+        Args:
+            tenant_id: 租户ID
+            job_uuid: 任务UUID
+
+        Returns:
+            Dict[str, Any]: 执行结果
+        """
+        job = await DemandComputationJobService.get_job(tenant_id, job_uuid)
+        computation = await DemandComputation.get_or_none(tenant_id=tenant_id, id=job.computation_id)
+        if not computation:
+            raise NotFoundError(f"需求计算不存在: {job.computation_id}")
+
+        # 条件更新认领任务：Inngest 重试与手动重试发送的事件只有一个能执行，其余直接跳过
+        claimed = await DemandComputationJob.filter(id=job.id, status__in=CLAIMABLE_JOB_STATUSES).update(
+            status="running",
+            started_at=job.started_at or timezone.now(),
+        )
+        if not claimed:
+            logger.info(f"需求计算任务 {job_uuid} 未被认领（已结束或正在执行），跳过")
+            return {"success": True, "job_uuid": job_uuid, "skipped": True}
+        await job.refresh_from_db()
+        if job.cancel_requested:
+            await DemandComputationJobService._mark_cancelled(job)
+            return {"success": False, "job_uuid": job_uuid, "cancelled": True}
+
+        params_override = (job.checkpoint or {}).get("params_override")
+        if params_override:
+            computation.computation_params = {**(computation.computation_params or {}), **params_override}
+
+        await DemandComputation.filter(tenant_id=tenant_id, id=computation.id).update(
+            computation_status="计算中",
+            computation_start_time=datetime.now(),
+        )
+        await DemandComputationJobService._publish(job)
+
+        try:
+            if computation.computation_type == "MRP":
+                await DemandComputationJobService._run_mrp(tenant_id, job, computation)
+            elif computation.computation_type == "LRP":
+                await DemandComputationJobService._run_lrp(tenant_id, job, computation)
+            else:
+                raise ValidationError(f"不支持的计算类型: {computation.computation_type}")
+        except _JobCancelled:
+            logger.info(f"需求计算任务 {job_uuid} 已取消（阶段 {job.phase}）")
+            await DemandComputationJobService._mark_cancelled(job)
+            return {"success": False, "job_uuid": job_uuid, "cancelled": True}
+        except Exception as e:
+            logger.error(
+                f"需求计算任务 {job_uuid} 执行失败（阶段 {job.phase}，断点 {job.processed_materials}）: {e}"
+            )
+            job.status = "failed"
+            job.error_message = str(e)
+            await job.save(update_fields=["status", "error_message", "updated_at"])
+            await DemandComputation.filter(tenant_id=tenant_id, id=computation.id).update(
+                computation_status="失败",
+                computation_end_time=datetime.now(),
+                error_message=str(e)[:2000],
+            )
+            await DemandComputationJobService._publish(job)
+            raise
+
+        logger.info(f"需求计算任务 {job_uuid} 完成：净算 {job.processed_materials} 个物料")
+        return {
+            "success": True,
+            "job_uuid": job_uuid,
+            "computation_id": computation.id,
+            "processed_materials": job.processed_materials,
+        }
+
+    # ==================== 内部实现 ====================
+
+    @staticmethod
+    async def _run_lrp(tenant_id: int, job: DemandComputationJob, computation: DemandComputation) -> None:
+        """执行LRP计算（单事务）"""
+        from apps.kuaizhizao.services.demand_computation_service import DemandComputationService
+
+        job.phase = "finalize"
+        async with in_transaction("default"):
+            await DemandComputationItem.filter(tenant_id=tenant_id, computation_id=computation.id).delete()
+            await DemandComputationService()._execute_lrp_computation(tenant_id, computation)
+            await DemandComputationJobService._complete(tenant_id, job, computation)
+        await DemandComputationJobService._publish(job)
+
+    @staticmethod
+    async def _run_mrp(tenant_id: int, job: DemandComputationJob, computation: DemandComputation) -> None:
+        """按阶段执行MRP计算"""
+        from apps.kuaizhizao.services.demand_computation_service import DemandComputationService
+
+        service = DemandComputationService()
+        computation_params = computation.computation_params or {}
+        bom_context = await service._get_mrp_bom_context(tenant_id, computation_params)
+        checkpoint = job.checkpoint or {}
+
+        # 1. 展开：逐需求行展开BOM（同物料同数量的需求行只展开一次），断点只追加新展开的需求行
+        if job.phase == "explode":
+            demand_items = await service._load_mrp_demand_items(tenant_id, computation)
+            lines, explosions = await DemandComputationJobService._load_lines(job)
+            done = {demand_item_id for demand_item_id, _ in lines}
+            pending = [
+                item for item in demand_items
+                if item.id not in done and float(item.required_quantity or 0) > 0
+            ]
+            total = len(done) + len(pending)
+
+            new_lines: List[DemandComputationJobLine] = []
+            for index, demand_item in enumerate(pending, start=1):
+                required_quantity = float(demand_item.required_quantity)
+                key = line_key(demand_item.material_id, required_quantity)
+                explosion = None
+                if key not in explosions:
+                    explosion = await service._explode_mrp_line(
+                        tenant_id, demand_item.material_id, required_quantity, bom_context
+                    )
+                    explosions[key] = explosion
+                lines.append([demand_item.id, key])
+                new_lines.append(DemandComputationJobLine(
+                    tenant_id=tenant_id,
+                    job_id=job.id,
+                    demand_item_id=demand_item.id,
+                    line_key=key,
+                    explosion=explosion,
+                ))
+                if index % MRP_JOB_EXPLODE_CHECKPOINT_LINES == 0:
+                    await DemandComputationJobService._check_cancel(job)
+                    job.progress = EXPLODE_PROGRESS_END * len(lines) // max(total, 1)
+                    await DemandComputationJobService._save_lines(job, new_lines)
+                    new_lines = []
+                    await DemandComputationJobService._publish(job)
+
+            await DemandComputationJobService._check_cancel(job)
+            requirements = aggregate_requirements((item_id, explosions[key]) for item_id, key in lines)
+            codes = low_level_codes(explosions.values())
+            materials = sorted(requirements, key=lambda material_id: (codes.get(material_id, 0), material_id))
+
+            # 进入净算阶段：剩余展开行、清理旧明细与断点推进同事务（物料列表只在此写入一次）
+            async with in_transaction("default"):
+                if new_lines:
+                    await DemandComputationJobLine.bulk_create(new_lines, batch_size=500)
+                await DemandComputationItem.filter(tenant_id=tenant_id, computation_id=computation.id).delete()
+                checkpoint = {
+                    **checkpoint,
+                    "materials": [[material_id, codes.get(material_id, 0)] for material_id in materials],
+                }
+                job.checkpoint = checkpoint
+                job.phase = "net"
+                job.total_materials = len(materials)
+                job.processed_materials = 0
+                job.progress = EXPLODE_PROGRESS_END
+                await job.save()
+            await DemandComputationJobService._publish(job)
+        else:
+            lines, explosions = await DemandComputationJobService._load_lines(job)
+
+        requirements = aggregate_requirements((item_id, explosions[key]) for item_id, key in lines)
+
+        # 2. 净算：按低层码逐层分块，每块结果明细与断点同事务提交
+        if job.phase == "net":
+            from apps.master_data.models.material import Material
+
+            remaining = checkpoint["materials"][job.processed_materials:]
+            while remaining:
+                level = remaining[0][1]
+                chunk = []
+                for material_id, material_level in remaining:
+                    if material_level != level or len(chunk) >= MRP_JOB_CHUNK_SIZE:
+                        break
+                    chunk.append(material_id)
+                remaining = remaining[len(chunk):]
+
+                await DemandComputationJobService._check_cancel(job)
+                materials = {
+                    material.id: material
+                    for material in await Material.filter(tenant_id=tenant_id, id__in=chunk)
+                }
+                rows = []
+                for material_id in chunk:
+                    material = materials.get(material_id)
+                    if not material:
+                        continue
+                    item_fields = await service._build_mrp_item_fields(
+                        tenant_id, material, requirements[material_id], computation_params
+                    )
+                    rows.append(DemandComputationItem(
+                        tenant_id=tenant_id,
+                        computation_id=computation.id,
+                        **item_fields,
+                    ))
+
+                async with in_transaction("default"):
+                    if rows:
+                        await DemandComputationItem.bulk_create(rows)
+                    job.processed_materials += len(chunk)
+                    job.progress = EXPLODE_PROGRESS_END + (
+                        (NET_PROGRESS_END - EXPLODE_PROGRESS_END)
+                        * job.processed_materials // max(job.total_materials, 1)
+                    )
+                    await job.save(update_fields=["processed_materials", "progress", "updated_at"])
+                await DemandComputationJobService._publish(job)
+
+            job.phase = "finalize"
+            job.progress = NET_PROGRESS_END
+            await job.save(update_fields=["phase", "progress", "updated_at"])
+
+        # 3. 收尾：保存净改变状态，计算完成
+        await DemandComputationJobService._check_cancel(job)
+        async with in_transaction("default"):
+            await service._save_mrp_net_change_state(
+                tenant_id, computation, job.started_at, computation_params, bom_context,
+                explosions, requirements,
+            )
+            await DemandComputationJobService._complete(tenant_id, job, computation)
+        await DemandComputationJobService._publish(job)
+
+    @staticmethod
+    async def _load_lines(job: DemandComputationJob) -> Tuple[List[List[Any]], Dict[str, Dict[str, Any]]]:
+        """
+        读取已展开的需求行断点
+
+        Returns:
+            Tuple: ([[需求明细ID, 展开结果键]], 展开结果键 -> 展开结果)
+        """
+        rows = await DemandComputationJobLine.filter(
+            tenant_id=job.tenant_id,
+            job_id=job.id,
+        ).order_by("id").values_list("demand_item_id", "line_key", "explosion")
+        lines: List[List[Any]] = []
+        explosions: Dict[str, Dict[str, Any]] = {}
+        for demand_item_id, key, explosion in rows:
+            lines.append([demand_item_id, key])
+            if explosion is not None:
+                explosions.setdefault(key, explosion)
+        return lines, explosions
+
+    @staticmethod
+    async def _save_lines(job: DemandComputationJob, new_lines: List[DemandComputationJobLine]) -> None:
+        """追加新展开的需求行并推进进度（同事务）"""
+        async with in_transaction("default"):
+            if new_lines:
+                await DemandComputationJobLine.bulk_create(new_lines, batch_size=500)
+            await job.save(update_fields=["progress", "updated_at"])
+
+    @staticmethod
+    async def _complete(tenant_id: int, job: DemandComputationJob, computation: DemandComputation) -> None:
+        """标记计算与任务完成（清理展开行断点）"""
+        await DemandComputation.filter(tenant_id=tenant_id, id=computation.id).update(
+            computation_status="完成",
+            computation_end_time=datetime.now(),
+            error_message=None,
+        )
+        await DemandComputationJobLine.filter(tenant_id=tenant_id, job_id=job.id).delete()
+        job.status = "completed"
+        job.progress = 100
+        job.finished_at = timezone.now()
+        await job.save(update_fields=["status", "progress", "finished_at", "updated_at"])
+
+    @staticmethod
+    async def _check_cancel(job: DemandComputationJob) -> None:
+        """检查取消请求（协作式取消，在断点处调用）"""
+        cancel_requested = await DemandComputationJob.filter(id=job.id).values_list(
+            "cancel_requested", flat=True
+        ).first()
+        if cancel_requested:
+            job.cancel_requested = True
+            raise _JobCancelled()
+
+    @staticmethod
+    async def _mark_cancelled(job: DemandComputationJob) -> None:
+        """标记任务已取消，清理已写入的明细与展开行断点并将计算置为失败（可重新执行）"""
+        async with in_transaction("default"):
+            await DemandComputationJobLine.filter(tenant_id=job.tenant_id, job_id=job.id).delete()
+            if job.status != "pending":
+                await DemandComputationItem.filter(
+                    tenant_id=job.tenant_id,
+                    computation_id=job.computation_id,
+                ).delete()
+                await DemandComputation.filter(tenant_id=job.tenant_id, id=job.computation_id).update(
+                    computation_status="失败",
+                    computation_end_time=datetime.now(),
+                    error_message="计算已取消",
+                )
+            job.status = "cancelled"
+            job.cancel_requested = True
+            job.finished_at = timezone.now()
+            await job.save(update_fields=["status", "cancel_requested", "finished_at", "updated_at"])
+        await DemandComputationJobService._publish(job)
+
+    @staticmethod
+    async def _publish(job: DemandComputationJob) -> None:
+        """推送任务进度给创建人（推送失败不影响任务执行）"""
+        if job.created_by is None:
+            return
+        try:
+            from core.services.websocket.websocket_service import WebSocketService
+
+            await WebSocketService.push_to_user(job.created_by, MRP_JOB_CHANNEL, {
+                "job_uuid": str(job.uuid),
+                "computation_id": job.computation_id,
+                "status": job.status,
+                "phase": job.phase,
+                "progress": job.progress,
+                "processed_materials": job.processed_materials,
+                "total_materials": job.total_materials,
+                "error_message": job.error_message,
+            })
+        except Exception as e:
+            logger.warning(f"推送需求计算任务进度失败: {e}")
+
+    @staticmethod
+    async def _dispatch_or_fail(job: DemandComputationJob) -> None:
+        """
+        发送执行事件；发送失败时将任务标记为失败（可重试），避免任务停留在待执行状态阻塞后续执行
+
+        Raises:
+            BusinessLogicError: 事件发送失败时抛出
+        """
+        try:
+            await DemandComputationJobService._dispatch_job(job)
+        except Exception as e:
+            logger.error(f"需求计算任务 {job.uuid} 调度失败: {e}")
+            job.status = "failed"
+            job.error_message = f"任务调度失败: {e}"
+            await job.save(update_fields=["status", "error_message", "updated_at"])
+            raise BusinessLogicError("需求计算任务调度失败，请稍后重试") from e
+
+    @staticmethod
+    async def _dispatch_job(job: DemandComputationJob) -> None:
+        """发送计算任务执行事件"""
+        from core.inngest.client import inngest_client
+        from inngest import Event
+
+        await inngest_client.send(
+            Event(
+                name=MRP_JOB_EVENT,
+                data={
+                    "tenant_id": job.tenant_id,
+                    "job_uuid": str(job.uuid),
+                },
+            )
+        )
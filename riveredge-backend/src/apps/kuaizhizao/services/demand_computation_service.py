@@ -13,6 +13,7 @@ import asyncio
 from typing import List, Optional, Dict, Any
 from datetime import datetime, timedelta, date
 from decimal import Decimal
+from tortoise import timezone
 from tortoise.transactions import in_transaction
 from loguru import logger
 
@@ -40,6 +41,22 @@ from apps.kuaizhizao.utils.material_source_helper import (
     SOURCE_TYPE_CONFIGURE,
 )
 from apps.kuaizhizao.utils.inventory_helper import get_material_inventory_info
+from apps.kuaizhizao.utils.mrp_net_change import (
+    NET_CHANGE_STATE_VERSION,
+    RECOMPUTE_MODE_FULL,
+    RECOMPUTE_MODE_NET_CHANGE,
+    aggregate_requirements,
+    diff_item_snapshots,
+    get_bom_fingerprints,
+    get_changed_bom_materials,
+    get_changed_materials,
+    get_stock_changed_materials,
+    has_computation_config_changes,
+    item_snapshot,
+    line_key,
+    params_key,
+    requirement_signature,
+)
 from core.services.business.code_generation_service import CodeGenerationService
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
 from infra.services.business_config_service import BusinessConfigService
@@ -211,7 +228,7 @@ class DemandComputationService:
         Returns:
             DemandComputationResponse: 创建的计算响应
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 解析需求列表（支持 demand_id 或 demand_ids）
             demand_id_list = (
                 computation_data.demand_ids
@@ -489,7 +506,7 @@ class DemandComputationService:
             computation.computation_params = {**base_params, **computation_params_override}
 
         try:
-            async with in_transaction():
+            async with in_transaction("default"):
                 # 失败重试时清理旧明细：理论上事务回滚已清理，此处为防御性保证重试从干净状态开始
                 if computation.computation_status == "失败":
                     await DemandComputationItem.filter(
@@ -565,7 +582,7 @@ class DemandComputationService:
             computation.computation_params = {**base_params, **computation_params_override}
 
         try:
-            async with in_transaction():
+            async with in_transaction("default"):
                 if computation.computation_status == "失败":
                     await DemandComputationItem.filter(
                         tenant_id=tenant_id,
@@ -621,13 +638,22 @@ class DemandComputationService:
         tenant_id: int,
         computation_id: int,
         operator_id: Optional[int] = None,
+        mode: str = RECOMPUTE_MODE_NET_CHANGE,
     ) -> DemandComputationResponse:
         """
         重新计算：仅允许对「完成」或「失败」的计算重新执行。
-        重算前写入需求计算快照与重算历史；再删除原明细、重置状态并执行计算。
+        重算前写入需求计算快照与重算历史。
+        
+        - net_change（默认）：MRP 只重新展开变更的需求行、只重新净算受影响物料，增量更新明细；
+          不满足条件（LRP、上次失败、参数或计算配置已变更、缺少净改变状态）或执行失败时自动改为全量重算
+        - full：删除原明细、重置状态后全量执行计算（兜底与核对用）
+        
+        返回结果的 recalc_report 包含本次重算模式、统计及与重算前快照的差异。
         """
+        if mode not in (RECOMPUTE_MODE_FULL, RECOMPUTE_MODE_NET_CHANGE):
+            raise ValidationError(f"不支持的重算模式: {mode}")
         snapshot_id_saved: Optional[int] = None
-        async with in_transaction():
+        async with in_transaction("default"):
             computation = await DemandComputation.get_or_none(tenant_id=tenant_id, id=computation_id)
             if not computation:
                 raise NotFoundError(f"需求计算不存在: {computation_id}")
@@ -640,15 +666,7 @@ class DemandComputationService:
                 tenant_id=tenant_id, computation_id=computation_id
             ).all()
             summary_snapshot = computation.computation_summary
-            items_snapshot = [
-                {
-                    "material_code": getattr(i, "material_code", None),
-                    "material_name": getattr(i, "material_name", None),
-                    "suggested_work_order_quantity": str(getattr(i, "suggested_work_order_quantity", 0)),
-                    "suggested_purchase_order_quantity": str(getattr(i, "suggested_purchase_order_quantity", 0)),
-                }
-                for i in items_before
-            ]
+            items_snapshot = [item_snapshot(i) for i in items_before]
             snapshot = await DemandComputationSnapshot.create(
                 tenant_id=tenant_id,
                 computation_id=computation_id,
@@ -658,21 +676,57 @@ class DemandComputationService:
                 items_snapshot=items_snapshot,
             )
             snapshot_id_saved = snapshot.id
-            # 删除原计算结果明细
-            await DemandComputationItem.filter(
-                tenant_id=tenant_id,
-                computation_id=computation_id
-            ).delete()
-            # 重置状态与错误信息，便于走执行逻辑
-            await DemandComputation.filter(tenant_id=tenant_id, id=computation_id).update(
-                computation_status="进行中",
-                computation_end_time=None,
-                error_message=None,
-                computation_summary=None,
-            )
-        # 在事务外调用 execute，避免嵌套事务导致 TransactionManagementError
+
+        net_change_stats: Optional[Dict[str, Any]] = None
+        fallback_reason: Optional[str] = None
+        if mode == RECOMPUTE_MODE_NET_CHANGE:
+            fallback_reason = self._net_change_unavailable_reason(computation)
+            if fallback_reason is None:
+                try:
+                    async with in_transaction("default"):
+                        await DemandComputation.filter(tenant_id=tenant_id, id=computation_id).update(
+                            computation_status="计算中",
+                            computation_start_time=datetime.now(),
+                        )
+                        net_change_stats = await self._execute_mrp_net_change(tenant_id, computation)
+                        await DemandComputation.filter(tenant_id=tenant_id, id=computation_id).update(
+                            computation_status="完成",
+                            computation_end_time=datetime.now(),
+                            error_message=None,
+                        )
+                except BusinessLogicError as e:
+                    fallback_reason = str(e)
+                except Exception as e:
+                    logger.warning(f"净改变重算失败，改为全量重算: computation_id={computation_id}, 错误: {e}")
+                    fallback_reason = f"净改变重算失败: {e}"
+
         try:
-            result = await self.execute_computation(tenant_id=tenant_id, computation_id=computation_id)
+            if net_change_stats is not None:
+                result = await self.get_computation_by_id(tenant_id, computation_id)
+            else:
+                async with in_transaction("default"):
+                    # 删除原计算结果明细
+                    await DemandComputationItem.filter(
+                        tenant_id=tenant_id,
+                        computation_id=computation_id
+                    ).delete()
+                    # 重置状态与错误信息，便于走执行逻辑
+                    await DemandComputation.filter(tenant_id=tenant_id, id=computation_id).update(
+                        computation_status="进行中",
+                        computation_end_time=None,
+                        error_message=None,
+                        computation_summary=None,
+                    )
+                # 在事务外调用 execute，避免嵌套事务导致 TransactionManagementError
+                result = await self.execute_computation(tenant_id=tenant_id, computation_id=computation_id)
+
+            changes = diff_item_snapshots(items_snapshot, [item_snapshot(i) for i in result.items or []])
+            result.recalc_report = {
+                "mode": RECOMPUTE_MODE_NET_CHANGE if net_change_stats is not None else RECOMPUTE_MODE_FULL,
+                "fallback_reason": fallback_reason,
+                "stats": net_change_stats,
+                "changes": changes,
+            }
             await DemandComputationRecalcHistory.create(
                 tenant_id=tenant_id,
                 computation_id=computation_id,
@@ -681,7 +735,10 @@ class DemandComputationService:
                 operator_id=operator_id,
                 result="success",
                 snapshot_id=snapshot_id_saved,
-                message="重算完成",
+                message=(
+                    f"重算完成（{'净改变' if net_change_stats is not None else '全量'}）："
+                    f"新增 {len(changes['added'])}，变更 {len(changes['changed'])}，删除 {len(changes['removed'])}"
+                )[:500],
             )
             return result
         except Exception as e:
@@ -871,15 +928,71 @@ class DemandComputationService:
         - 委外件：生成委外工单需求
         - 配置件：按变体展开BOM
         
+        运算结束时保存净改变状态，供 recompute_computation 增量重算。
+        
         Args:
             tenant_id: 租户ID
             computation: 计算对象
         """
-        from apps.kuaizhizao.models.demand_item import DemandItem
         from apps.master_data.models.material import Material
         
         logger.info(f"执行MRP计算: {computation.computation_code}")
+        started_at = timezone.now()
+        
         # 1. 获取需求明细（支持多需求合并）
+        demand_items = await self._load_mrp_demand_items(tenant_id, computation)
+        
+        # 2. 计算参数（库存相关开关、BOM版本）
+        computation_params = computation.computation_params or {}
+        bom_context = await self._get_mrp_bom_context(tenant_id, computation_params)
+        
+        # 3. 逐需求行展开BOM（同物料同数量的需求行只展开一次）
+        explosions: Dict[str, Dict[str, Any]] = {}
+        lines = []
+        for demand_item in demand_items:
+            required_quantity = float(demand_item.required_quantity or 0)
+            if required_quantity <= 0:
+                continue
+            key = line_key(demand_item.material_id, required_quantity)
+            if key not in explosions:
+                explosions[key] = await self._explode_mrp_line(
+                    tenant_id, demand_item.material_id, required_quantity, bom_context
+                )
+            lines.append((demand_item.id, explosions[key]))
+        
+        if not lines:
+            logger.warning(f"需求明细为空，计算ID: {computation.id}")
+        
+        # 4. 汇总所有物料需求
+        all_material_requirements = aggregate_requirements(lines)
+        
+        # 5. 生成计算结果明细
+        materials = {
+            material.id: material
+            for material in await Material.filter(tenant_id=tenant_id, id__in=list(all_material_requirements))
+        }
+        for material_id, req_info in all_material_requirements.items():
+            material = materials.get(material_id)
+            if not material:
+                continue
+            item_fields = await self._build_mrp_item_fields(
+                tenant_id, material, req_info, computation_params
+            )
+            await DemandComputationItem.create(
+                tenant_id=tenant_id,
+                computation_id=computation.id,
+                **item_fields,
+            )
+        
+        await self._save_mrp_net_change_state(
+            tenant_id, computation, started_at, computation_params, bom_context,
+            explosions, all_material_requirements,
+        )
+    
+    async def _load_mrp_demand_items(self, tenant_id: int, computation: DemandComputation) -> list:
+        """获取参与MRP计算的需求明细（按需求顺序）"""
+        from apps.kuaizhizao.models.demand_item import DemandItem
+        
         demand_id_list = computation.demand_ids if computation.demand_ids else [computation.demand_id]
         demand_items = []
         for demand_id in demand_id_list:
@@ -888,62 +1001,102 @@ class DemandComputationService:
                 demand_id=demand_id
             ).all()
             demand_items.extend(items)
-        
-        if not demand_items:
-            logger.warning(f"需求明细为空，计算ID: {computation.id}")
-            return
-        
-        # 2. 计算参数（库存相关开关、BOM版本）
-        computation_params = computation.computation_params or {}
-        include_safety_stock = computation_params.get("include_safety_stock", True)
-        # BOM 版本：根据 bom_multi_version_allowed 决定使用指定版本或默认版本
+        return demand_items
+    
+    async def _get_mrp_bom_context(self, tenant_id: int, computation_params: Dict[str, Any]) -> Dict[str, Any]:
+        """BOM 版本：根据 bom_multi_version_allowed 决定使用指定版本或默认版本"""
         biz_config = BusinessConfigService()
         bom_multi_allowed = await biz_config.get_bom_multi_version_allowed(tenant_id)
         if bom_multi_allowed:
-            bom_version = computation_params.get("bom_version")
-            material_bom_versions = computation_params.get("material_bom_versions")
-            use_default_bom = False
-        else:
-            bom_version = None
-            material_bom_versions = None
-            use_default_bom = True
-
-        # 3. 存储所有物料需求（用于汇总）
-        all_material_requirements = {}  # material_id -> requirement info
+            return {
+                "bom_version": computation_params.get("bom_version"),
+                "material_bom_versions": computation_params.get("material_bom_versions"),
+                "use_default_bom": False,
+            }
+        return {"bom_version": None, "material_bom_versions": None, "use_default_bom": True}
+    
+    async def _explode_mrp_line(
+        self,
+        tenant_id: int,
+        material_id: int,
+        required_quantity: float,
+        bom_context: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """
+        展开单个需求行
         
-        # 4. 处理每个需求明细
-        for demand_item in demand_items:
-            material_id = demand_item.material_id
-            required_quantity = float(demand_item.required_quantity or 0)
-            
-            if required_quantity <= 0:
-                continue
-            
-            # 获取物料信息
-            material = await Material.get_or_none(tenant_id=tenant_id, id=material_id)
-            if not material:
-                logger.warning(f"物料不存在，物料ID: {material_id}")
-                continue
-            
-            # 获取物料来源类型
-            source_type = await get_material_source_type(tenant_id, material_id)
-            
-            # 验证物料来源配置
-            validation_passed, validation_errors = await validate_material_source_config(
+        Returns:
+            Dict: contrib（[物料ID, 数量, 物料信息, 是否记录需求明细追溯] 列表）与 tree（展开涉及的物料ID）
+        """
+        from apps.master_data.models.material import Material
+        from apps.kuaizhizao.utils.bom_helper import get_bom_items_by_material_id
+        
+        bom_version = bom_context["bom_version"]
+        use_default_bom = bom_context["use_default_bom"]
+        material_bom_versions = bom_context["material_bom_versions"]
+        
+        # 获取物料信息
+        material = await Material.get_or_none(tenant_id=tenant_id, id=material_id)
+        if not material:
+            logger.warning(f"物料不存在，物料ID: {material_id}")
+            return {"contrib": [], "tree": [material_id]}
+        
+        # 获取物料来源类型
+        source_type = await get_material_source_type(tenant_id, material_id)
+        visited = {material_id}
+        contrib = []
+        
+        if source_type in (SOURCE_TYPE_PHANTOM, SOURCE_TYPE_CONFIGURE):
+            # 虚拟件：自动跳过，直接展开下层物料
+            # 配置件：按变体展开BOM（TODO: 需要从需求中获取配置信息），暂时按标准BOM展开处理
+            logger.debug(f"处理{'虚拟件' if source_type == SOURCE_TYPE_PHANTOM else '配置件'}，物料ID: {material_id}, 物料编码: {material.main_code}")
+            expanded_requirements = await expand_bom_with_source_control(
                 tenant_id=tenant_id,
                 material_id=material_id,
-                source_type=source_type or "Make"  # 默认自制件
+                required_quantity=required_quantity,
+                only_approved=True,
+                bom_version=bom_version,
+                use_default_bom=use_default_bom,
+                material_bom_versions=material_bom_versions,
+                visited=visited,
+            )
+            contrib.extend(self._requirement_contrib(req, traced=False) for req in expanded_requirements)
+        else:
+            # 其他类型（自制件、采购件、委外件）：正常处理
+            contrib.append([
+                material_id,
+                required_quantity,
+                {
+                    "material_code": material.main_code or material.code,
+                    "material_name": material.name,
+                    "material_type": material.material_type,
+                    "source_type": source_type,
+                    "unit": material.base_unit,
+                    "level": 0,
+                },
+                False,
+            ])
+            
+            # 如果有BOM，展开BOM（顶层物料优先从 material_bom_versions 取版本）
+            top_version = bom_version
+            top_use_default = use_default_bom
+            if material_bom_versions:
+                v = material_bom_versions.get(material_id) or material_bom_versions.get(str(material_id))
+                if v:
+                    top_version = v
+                    top_use_default = False
+                elif not bom_version:
+                    top_use_default = True
+            bom_items = await get_bom_items_by_material_id(
+                tenant_id=tenant_id,
+                material_id=material_id,
+                only_approved=True,
+                version=top_version,
+                use_default=top_use_default,
             )
             
-            # 获取物料来源配置
-            source_config = await get_material_source_config(tenant_id, material_id) or {}
-            
-            # 处理不同来源类型的物料
-            if source_type == SOURCE_TYPE_PHANTOM:
-                # 虚拟件：自动跳过，直接展开下层物料
-                logger.debug(f"处理虚拟件，物料ID: {material_id}, 物料编码: {material.main_code}")
-                
-                # 使用物料来源控制的BOM展开逻辑
+            if bom_items:
+                # 展开BOM（使用物料来源控制逻辑），记录需求明细ID用于追溯
                 expanded_requirements = await expand_bom_with_source_control(
                     tenant_id=tenant_id,
                     material_id=material_id,
@@ -952,203 +1105,289 @@ class DemandComputationService:
                     bom_version=bom_version,
                     use_default_bom=use_default_bom,
                     material_bom_versions=material_bom_versions,
+                    visited=visited,
                 )
-                
-                # 合并到总需求中
-                for req in expanded_requirements:
-                    req_material_id = req["material_id"]
-                    if req_material_id not in all_material_requirements:
-                        all_material_requirements[req_material_id] = {
-                            "material_id": req_material_id,
-                            "material_code": req["material_code"],
-                            "material_name": req["material_name"],
-                            "material_type": req.get("material_type"),
-                            "source_type": req.get("source_type"),
-                            "required_quantity": 0.0,
-                            "unit": req.get("unit"),
-                        }
-                    all_material_requirements[req_material_id]["required_quantity"] += req["required_quantity"]
-                    
-            elif source_type == SOURCE_TYPE_CONFIGURE:
-                # 配置件：按变体展开BOM（TODO: 需要从需求中获取配置信息）
-                logger.debug(f"处理配置件，物料ID: {material_id}, 物料编码: {material.main_code}")
-                
-                # 暂时按标准BOM展开处理（后续需要支持变体选择）
-                expanded_requirements = await expand_bom_with_source_control(
-                    tenant_id=tenant_id,
-                    material_id=material_id,
-                    required_quantity=required_quantity,
-                    only_approved=True,
-                    bom_version=bom_version,
-                    use_default_bom=use_default_bom,
-                    material_bom_versions=material_bom_versions,
-                )
-                
-                # 合并到总需求中
-                for req in expanded_requirements:
-                    req_material_id = req["material_id"]
-                    if req_material_id not in all_material_requirements:
-                        all_material_requirements[req_material_id] = {
-                            "material_id": req_material_id,
-                            "material_code": req["material_code"],
-                            "material_name": req["material_name"],
-                            "material_type": req.get("material_type"),
-                            "source_type": req.get("source_type"),
-                            "required_quantity": 0.0,
-                            "unit": req.get("unit"),
-                        }
-                    all_material_requirements[req_material_id]["required_quantity"] += req["required_quantity"]
-                
+                contrib.extend(self._requirement_contrib(req, traced=True) for req in expanded_requirements)
+        
+        visited.update(entry[0] for entry in contrib)
+        return {"contrib": contrib, "tree": sorted(visited)}
+    
+    @staticmethod
+    def _requirement_contrib(req: Dict[str, Any], traced: bool) -> list:
+        return [
+            req["material_id"],
+            req["required_quantity"],
+            {
+                "material_code": req["material_code"],
+                "material_name": req["material_name"],
+                "material_type": req.get("material_type"),
+                "source_type": req.get("source_type"),
+                "unit": req.get("unit"),
+                "level": req.get("level", 1),
+            },
+            traced,
+        ]
+    
+    async def _build_mrp_item_fields(
+        self,
+        tenant_id: int,
+        material: Any,
+        req_info: Dict[str, Any],
+        computation_params: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """按汇总后的毛需求净算单个物料，返回计算结果明细字段"""
+        material_id = material.id
+        include_safety_stock = computation_params.get("include_safety_stock", True)
+        source_type = req_info.get("source_type") or material.source_type
+        
+        # 验证物料来源配置
+        validation_passed, validation_errors = await validate_material_source_config(
+            tenant_id=tenant_id,
+            material_id=material_id,
+            source_type=source_type or "Make"
+        )
+        
+        # 获取物料来源配置
+        source_config = await get_material_source_config(tenant_id, material_id) or {}
+        
+        # 获取库存信息与安全库存/再订货点
+        inventory_info = await get_material_inventory_info(
+            tenant_id=tenant_id,
+            material_id=material_id,
+            warehouse_id=None,
+        )
+        safety_stock, reorder_point = await _get_material_safety_reorder(
+            tenant_id=tenant_id,
+            material=material,
+            material_id=material_id,
+            computation_params=computation_params,
+        )
+        supply_qty, net_requirement = _compute_supply_and_net(
+            inventory_info=inventory_info,
+            safety_stock=safety_stock,
+            reorder_point=reorder_point,
+            gross_requirement=req_info["required_quantity"],
+            computation_params=computation_params,
+        )
+        available_inventory = float(inventory_info.get("available_quantity", 0))
+        in_transit_qty = float(inventory_info.get("in_transit_quantity", 0))
+        reserved_qty = float(inventory_info.get("reserved_quantity", 0))
+        gross_requirement = req_info["required_quantity"]
+
+        # 根据物料来源类型确定建议行动
+        suggested_work_order_quantity = Decimal(0)
+        suggested_purchase_order_quantity = Decimal(0)
+        
+        if source_type == SOURCE_TYPE_MAKE:
+            # 自制件：建议生成生产工单
+            if net_requirement > 0 and validation_passed:
+                suggested_work_order_quantity = Decimal(str(net_requirement))
+        elif source_type == SOURCE_TYPE_BUY:
+            # 采购件：建议生成采购订单
+            if net_requirement > 0:
+                suggested_purchase_order_quantity = Decimal(str(net_requirement))
+        elif source_type == SOURCE_TYPE_OUTSOURCE:
+            # 委外件：建议生成委外工单（有净需求即显示建议数量，与采购件一致；验证失败时生成工单会拦截）
+            if net_requirement > 0:
+                suggested_work_order_quantity = Decimal(str(net_requirement))
+        # Phantom和Configure已经在BOM展开时处理，不需要单独生成工单或采购单
+        
+        # 计算结果明细（包含需求明细追溯）
+        return dict(
+            material_id=material_id,
+            material_code=req_info["material_code"],
+            material_name=req_info["material_name"],
+            material_spec=material.specification,
+            material_unit=req_info["unit"],
+            required_quantity=Decimal(str(gross_requirement)),
+            available_inventory=Decimal(str(available_inventory)),
+            net_requirement=Decimal(str(net_requirement)),
+            gross_requirement=Decimal(str(gross_requirement)),
+            safety_stock=Decimal(str(safety_stock)) if include_safety_stock else None,
+            reorder_point=Decimal(str(reorder_point)) if computation_params.get("include_reorder_point", False) else None,
+            suggested_work_order_quantity=suggested_work_order_quantity if suggested_work_order_quantity > 0 else None,
+            suggested_purchase_order_quantity=suggested_purchase_order_quantity if suggested_purchase_order_quantity > 0 else None,
+            material_source_type=source_type,
+            material_source_config=source_config,
+            source_validation_passed=validation_passed,
+            source_validation_errors=validation_errors if not validation_passed else None,
+            demand_item_ids=req_info.get("demand_item_ids"),  # 多需求追溯
+            detail_results={"in_transit_quantity": in_transit_qty, "reserved_quantity": reserved_qty},  # 库存追溯
+        )
+    
+    async def _save_mrp_net_change_state(
+        self,
+        tenant_id: int,
+        computation: DemandComputation,
+        started_at: datetime,
+        computation_params: Dict[str, Any],
+        bom_context: Dict[str, Any],
+        explosions: Dict[str, Dict[str, Any]],
+        requirements: Dict[int, Dict[str, Any]],
+    ) -> None:
+        """保存净改变状态（需求行展开结果、BOM 指纹、各物料汇总需求）"""
+        tree_ids = {material_id for explosion in explosions.values() for material_id in explosion["tree"]}
+        state = {
+            "version": NET_CHANGE_STATE_VERSION,
+            "computed_at": started_at.isoformat(),
+            "params_key": params_key(computation_params, bom_context),
+            "lines": explosions,
+            "bom_fingerprints": await get_bom_fingerprints(tenant_id, tree_ids),
+            "requirements": {
+                str(material_id): requirement_signature(requirement)
+                for material_id, requirement in requirements.items()
+            },
+        }
+        await DemandComputation.filter(tenant_id=tenant_id, id=computation.id).update(net_change_state=state)
+        computation.net_change_state = state
+    
+    def _net_change_unavailable_reason(self, computation: DemandComputation) -> Optional[str]:
+        """判断能否净改变重算，不能时返回原因"""
+        if computation.computation_type != "MRP":
+            return "LRP 计算仅支持全量重算"
+        if computation.computation_status != "完成":
+            return "上次计算未成功完成"
+        state = computation.net_change_state
+        if not state or state.get("version") != NET_CHANGE_STATE_VERSION:
+            return "缺少净改变状态（上次计算早于净改变功能上线）"
+        return None
+    
+    async def _execute_mrp_net_change(
+        self,
+        tenant_id: int,
+        computation: DemandComputation,
+    ) -> Dict[str, Any]:
+        """
+        净改变MRP重算：只重新展开脏需求行、只重新净算受影响物料，并增量更新计算结果明细
+        
+        Returns:
+            Dict: 重算统计
+            
+        Raises:
+            BusinessLogicError: 参数或计算配置已变更，需要全量重算
+        """
+        from apps.master_data.models.material import Material
+        
+        state = computation.net_change_state
+        since = datetime.fromisoformat(state["computed_at"])
+        started_at = timezone.now()
+        computation_params = computation.computation_params or {}
+        bom_context = await self._get_mrp_bom_context(tenant_id, computation_params)
+        if state.get("params_key") != params_key(computation_params, bom_context):
+            raise BusinessLogicError("计算参数或BOM版本策略已变更，需要全量重算")
+        if await has_computation_config_changes(tenant_id, since):
+            raise BusinessLogicError("需求计算配置已变更，需要全量重算")
+        
+        # 1. 当前需求行
+        lines = []
+        for demand_item in await self._load_mrp_demand_items(tenant_id, computation):
+            required_quantity = float(demand_item.required_quantity or 0)
+            if required_quantity > 0:
+                lines.append((demand_item.id, demand_item.material_id, required_quantity))
+        
+        # 2. 可复用的展开结果：展开树中 BOM 或物料主数据未变更
+        cached_lines: Dict[str, Dict[str, Any]] = state.get("lines") or {}
+        reusable = {
+            line_key(material_id, quantity)
+            for _, material_id, quantity in lines
+            if line_key(material_id, quantity) in cached_lines
+        }
+        tree_ids = {material_id for key in reusable for material_id in cached_lines[key]["tree"]}
+        changed_boms = await get_changed_bom_materials(tenant_id, tree_ids, state.get("bom_fingerprints") or {})
+        changed_materials = await get_changed_materials(tenant_id, tree_ids, since)
+        dirty_materials = changed_boms | changed_materials
+        
+        # 3. 只重新展开新增/脏需求行
+        explosions: Dict[str, Dict[str, Any]] = {}
+        exploded = 0
+        for _, material_id, quantity in lines:
+            key = line_key(material_id, quantity)
+            if key in explosions:
+                continue
+            cached = cached_lines.get(key)
+            if cached is not None and not dirty_materials.intersection(cached["tree"]):
+                explosions[key] = cached
             else:
-                # 其他类型（自制件、采购件、委外件）：正常处理
-                if material_id not in all_material_requirements:
-                    all_material_requirements[material_id] = {
-                        "material_id": material_id,
-                        "material_code": material.main_code or material.code,
-                        "material_name": material.name,
-                        "material_type": material.material_type,
-                        "source_type": source_type,
-                        "required_quantity": 0.0,
-                        "unit": material.base_unit,
-                    }
-                all_material_requirements[material_id]["required_quantity"] += required_quantity
-                
-                # 如果有BOM，展开BOM（顶层物料优先从 material_bom_versions 取版本）
-                from apps.kuaizhizao.utils.bom_helper import get_bom_items_by_material_id
-                top_version = bom_version
-                top_use_default = use_default_bom
-                if material_bom_versions:
-                    v = material_bom_versions.get(material_id) or material_bom_versions.get(str(material_id))
-                    if v:
-                        top_version = v
-                        top_use_default = False
-                    elif not bom_version:
-                        top_use_default = True
-                bom_items = await get_bom_items_by_material_id(
-                    tenant_id=tenant_id,
-                    material_id=material_id,
-                    only_approved=True,
-                    version=top_version,
-                    use_default=top_use_default,
-                )
-
-                if bom_items:
-                    # 展开BOM（使用物料来源控制逻辑）
-                    expanded_requirements = await expand_bom_with_source_control(
-                        tenant_id=tenant_id,
-                        material_id=material_id,
-                        required_quantity=required_quantity,
-                        only_approved=True,
-                        bom_version=bom_version,
-                        use_default_bom=use_default_bom,
-                        material_bom_versions=material_bom_versions,
-                    )
-
-                    # 合并到总需求中
-                    for req in expanded_requirements:
-                        req_material_id = req["material_id"]
-                        if req_material_id not in all_material_requirements:
-                            all_material_requirements[req_material_id] = {
-                                "material_id": req_material_id,
-                                "material_code": req["material_code"],
-                                "material_name": req["material_name"],
-                                "material_type": req.get("material_type"),
-                                "source_type": req.get("source_type"),
-                                "required_quantity": 0.0,
-                                "unit": req.get("unit"),
-                            }
-                        all_material_requirements[req_material_id]["required_quantity"] += req["required_quantity"]
-                        # 记录需求明细ID用于追溯
-                        if "demand_item_ids" not in all_material_requirements[req_material_id]:
-                            all_material_requirements[req_material_id]["demand_item_ids"] = []
-                        if demand_item.id not in all_material_requirements[req_material_id]["demand_item_ids"]:
-                            all_material_requirements[req_material_id]["demand_item_ids"].append(demand_item.id)
+                explosions[key] = await self._explode_mrp_line(tenant_id, material_id, quantity, bom_context)
+                exploded += 1
         
-        # 5. 生成计算结果明细
-        for material_id, req_info in all_material_requirements.items():
-            # 获取物料信息
-            material = await Material.get_or_none(tenant_id=tenant_id, id=material_id)
+        # 4. 重新汇总（内存计算），与上次汇总对比确定需要重新净算的物料
+        requirements = aggregate_requirements(
+            (demand_item_id, explosions[line_key(material_id, quantity)])
+            for demand_item_id, material_id, quantity in lines
+        )
+        previous_requirements = state.get("requirements") or {}
+        existing = {
+            item.material_id: item
+            for item in await DemandComputationItem.filter(tenant_id=tenant_id, computation_id=computation.id)
+        }
+        stock_changed = await get_stock_changed_materials(tenant_id, requirements, since)
+        material_changed = changed_materials | await get_changed_materials(
+            tenant_id, set(requirements) - tree_ids, since
+        )
+        
+        renet_ids = []
+        trace_updates = []
+        for material_id, requirement in requirements.items():
+            item = existing.get(material_id)
+            if (
+                item is None
+                or material_id in stock_changed
+                or material_id in material_changed
+                or previous_requirements.get(str(material_id)) != requirement_signature(requirement)
+            ):
+                renet_ids.append(material_id)
+            elif (item.demand_item_ids or None) != (requirement.get("demand_item_ids") or None):
+                item.demand_item_ids = requirement.get("demand_item_ids")
+                trace_updates.append(item)
+        removed_ids = [item.id for material_id, item in existing.items() if material_id not in requirements]
+        
+        # 5. 增量更新计算结果明细
+        created = updated = 0
+        materials = {
+            material.id: material
+            for material in await Material.filter(tenant_id=tenant_id, id__in=renet_ids)
+        }
+        for material_id in renet_ids:
+            item = existing.get(material_id)
+            material = materials.get(material_id)
             if not material:
+                if item is not None:
+                    removed_ids.append(item.id)
                 continue
-            
-            source_type = req_info.get("source_type") or material.source_type
-            
-            # 验证物料来源配置
-            validation_passed, validation_errors = await validate_material_source_config(
-                tenant_id=tenant_id,
-                material_id=material_id,
-                source_type=source_type or "Make"
-            )
-            
-            # 获取物料来源配置
-            source_config = await get_material_source_config(tenant_id, material_id) or {}
-            
-            # 获取库存信息与安全库存/再订货点
-            inventory_info = await get_material_inventory_info(
-                tenant_id=tenant_id,
-                material_id=material_id,
-                warehouse_id=None,
-            )
-            safety_stock, reorder_point = await _get_material_safety_reorder(
-                tenant_id=tenant_id,
-                material=material,
-                material_id=material_id,
-                computation_params=computation_params,
-            )
-            supply_qty, net_requirement = _compute_supply_and_net(
-                inventory_info=inventory_info,
-                safety_stock=safety_stock,
-                reorder_point=reorder_point,
-                gross_requirement=req_info["required_quantity"],
-                computation_params=computation_params,
-            )
-            available_inventory = float(inventory_info.get("available_quantity", 0))
-            in_transit_qty = float(inventory_info.get("in_transit_quantity", 0))
-            reserved_qty = float(inventory_info.get("reserved_quantity", 0))
-            gross_requirement = req_info["required_quantity"]
-
-            # 根据物料来源类型确定建议行动
-            suggested_work_order_quantity = Decimal(0)
-            suggested_purchase_order_quantity = Decimal(0)
-            
-            if source_type == SOURCE_TYPE_MAKE:
-                # 自制件：建议生成生产工单
-                if net_requirement > 0 and validation_passed:
-                    suggested_work_order_quantity = Decimal(str(net_requirement))
-            elif source_type == SOURCE_TYPE_BUY:
-                # 采购件：建议生成采购订单
-                if net_requirement > 0:
-                    suggested_purchase_order_quantity = Decimal(str(net_requirement))
-            elif source_type == SOURCE_TYPE_OUTSOURCE:
-                # 委外件：建议生成委外工单（有净需求即显示建议数量，与采购件一致；验证失败时生成工单会拦截）
-                if net_requirement > 0:
-                    suggested_work_order_quantity = Decimal(str(net_requirement))
-            # Phantom和Configure已经在BOM展开时处理，不需要单独生成工单或采购单
-            
-            # 创建计算结果明细（包含需求明细追溯）
-            await DemandComputationItem.create(
-                tenant_id=tenant_id,
-                computation_id=computation.id,
-                material_id=material_id,
-                material_code=req_info["material_code"],
-                material_name=req_info["material_name"],
-                material_spec=material.specification,
-                material_unit=req_info["unit"],
-                required_quantity=Decimal(str(gross_requirement)),
-                available_inventory=Decimal(str(available_inventory)),
-                net_requirement=Decimal(str(net_requirement)),
-                gross_requirement=Decimal(str(gross_requirement)),
-                safety_stock=Decimal(str(safety_stock)) if include_safety_stock else None,
-                reorder_point=Decimal(str(reorder_point)) if computation_params.get("include_reorder_point", False) else None,
-                suggested_work_order_quantity=suggested_work_order_quantity if suggested_work_order_quantity > 0 else None,
-                suggested_purchase_order_quantity=suggested_purchase_order_quantity if suggested_purchase_order_quantity > 0 else None,
-                material_source_type=source_type,
-                material_source_config=source_config,
-                source_validation_passed=validation_passed,
-                source_validation_errors=validation_errors if not validation_passed else None,
-                demand_item_ids=req_info.get("demand_item_ids"),  # 多需求追溯
-                detail_results={"in_transit_quantity": in_transit_qty, "reserved_quantity": reserved_qty},  # 库存追溯
+            item_fields = await self._build_mrp_item_fields(
+                tenant_id, material, requirements[material_id], computation_params
             )
+            if item is None:
+                await DemandComputationItem.create(
+                    tenant_id=tenant_id,
+                    computation_id=computation.id,
+                    **item_fields,
+                )
+                created += 1
+            else:
+                await DemandComputationItem.filter(tenant_id=tenant_id, id=item.id).update(**item_fields)
+                updated += 1
+        if trace_updates:
+            await DemandComputationItem.bulk_update(trace_updates, fields=["demand_item_ids"])
+        if removed_ids:
+            await DemandComputationItem.filter(tenant_id=tenant_id, id__in=removed_ids).delete()
+        
+        await self._save_mrp_net_change_state(
+            tenant_id, computation, started_at, computation_params, bom_context,
+            explosions, requirements,
+        )
+        
+        return {
+            "demand_lines": len(lines),
+            "lines_reexploded": exploded,
+            "materials": len(requirements),
+            "materials_renetted": len(renet_ids),
+            "items_created": created,
+            "items_updated": updated,
+            "items_deleted": len(removed_ids),
+            "trace_updated": len(trace_updates),
+        }
     
     async def _execute_lrp_computation(
         self,
@@ -1492,7 +1731,7 @@ class DemandComputationService:
         Returns:
             DemandComputationResponse: 更新后的计算响应
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             computation = await DemandComputation.get_or_none(tenant_id=tenant_id, id=computation_id)
             if not computation:
                 raise NotFoundError(f"需求计算不存在: {computation_id}")
@@ -1542,7 +1781,7 @@ class DemandComputationService:
 
         DOWNSTREAM_TYPES = ("work_order", "purchase_order", "purchase_requisition", "production_plan")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             computation = await DemandComputation.get_or_none(tenant_id=tenant_id, id=computation_id)
             if not computation:
                 raise NotFoundError(f"需求计算不存在: {computation_id}")
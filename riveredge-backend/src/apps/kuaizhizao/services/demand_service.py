@@ -65,7 +65,7 @@ class DemandService(AppBaseService[Demand]):
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取用户信息
             user_info = await self.get_user_info(created_by)
             
@@ -304,7 +304,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             BusinessLogicError: 需求状态不允许更新
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证需求存在
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
@@ -363,7 +363,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             BusinessLogicError: 需求状态不允许提交
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
                 raise NotFoundError("需求", str(demand_id))
@@ -444,7 +444,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             BusinessLogicError: 需求状态不允许审核
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
                 raise NotFoundError("需求", str(demand_id))
@@ -655,7 +655,7 @@ class DemandService(AppBaseService[Demand]):
 
         DOWNSTREAM_TYPES = ("work_order", "purchase_order", "purchase_requisition", "production_plan")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
                 raise NotFoundError("需求", str(demand_id))
@@ -763,7 +763,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             BusinessLogicError: 需求状态不允许撤销审核
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
                 raise NotFoundError("需求", str(demand_id))
@@ -874,7 +874,7 @@ class DemandService(AppBaseService[Demand]):
         Raises:
             NotFoundError: 需求不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证需求存在
             await self.get_demand_by_id(tenant_id, demand_id)
             
@@ -922,7 +922,7 @@ class DemandService(AppBaseService[Demand]):
         Raises:
             NotFoundError: 需求或明细不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证需求存在
             await self.get_demand_by_id(tenant_id, demand_id)
             
@@ -981,7 +981,7 @@ class DemandService(AppBaseService[Demand]):
         Raises:
             NotFoundError: 需求或明细不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证需求存在
             await self.get_demand_by_id(tenant_id, demand_id)
             
@@ -1020,7 +1020,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             BusinessLogicError: 需求状态不允许删除
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             logger.info(f"DEBUG: delete_demand call with demand_id={demand_id} (type={type(demand_id)}), tenant_id={tenant_id}")
             logger.info(f"DEBUG: Demand model table name: {Demand._meta.db_table}")
             
@@ -1219,7 +1219,7 @@ class DemandService(AppBaseService[Demand]):
         if not orphan_ids:
             return {"cleaned_count": 0, "demand_ids": []}
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await DemandItem.filter(tenant_id=tenant_id, demand_id__in=orphan_ids).delete()
             await Demand.filter(tenant_id=tenant_id, id__in=orphan_ids).delete()
         logger.info("清理孤儿需求(直接删除): tenant_id=%s, 数量=%s, demand_ids=%s", tenant_id, len(orphan_ids), orphan_ids)
@@ -1285,7 +1285,7 @@ class DemandService(AppBaseService[Demand]):
         snapshot_id_saved: Optional[int] = None
 
         try:
-            async with in_transaction():
+            async with in_transaction("default"):
                 # 1. 快照：当前需求 + 明细
                 items_before = await DemandItem.filter(
                     tenant_id=tenant_id, demand_id=demand.id
@@ -1593,7 +1593,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             ValidationError: 需求状态不符合下推条件
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取需求
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
@@ -1705,7 +1705,7 @@ class DemandService(AppBaseService[Demand]):
             NotFoundError: 需求不存在
             BusinessLogicError: 需求状态不允许撤回
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             demand = await Demand.get_or_none(tenant_id=tenant_id, id=demand_id, deleted_at__isnull=True)
             if not demand:
                 raise NotFoundError(f"需求不存在: {demand_id}")
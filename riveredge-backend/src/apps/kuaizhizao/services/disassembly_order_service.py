@@ -47,7 +47,7 @@ class DisassemblyOrderService(AppBaseService[DisassemblyOrder]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "disassembly_order")
         if not is_enabled:
             raise BusinessLogicError("拆卸单节点未启用，无法创建拆卸单")
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(
                 tenant_id=tenant_id,
@@ -107,7 +107,7 @@ class DisassemblyOrderService(AppBaseService[DisassemblyOrder]):
         order_data: DisassemblyOrderUpdate,
         updated_by: int
     ) -> DisassemblyOrderResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await DisassemblyOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
@@ -162,7 +162,7 @@ class DisassemblyOrderService(AppBaseService[DisassemblyOrder]):
         item_data: DisassemblyOrderItemCreateInput,
         created_by: int
     ) -> DisassemblyOrderItemResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await DisassemblyOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
@@ -199,7 +199,7 @@ class DisassemblyOrderService(AppBaseService[DisassemblyOrder]):
         item_data: DisassemblyOrderItemUpdate,
         updated_by: int
     ) -> DisassemblyOrderItemResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             item = await DisassemblyOrderItem.get_or_none(
                 id=item_id,
                 tenant_id=tenant_id,
@@ -229,7 +229,7 @@ class DisassemblyOrderService(AppBaseService[DisassemblyOrder]):
         order_id: int,
         executed_by: int
     ) -> DisassemblyOrderResponse:
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await DisassemblyOrder.get_or_none(
                 id=order_id,
                 tenant_id=tenant_id,
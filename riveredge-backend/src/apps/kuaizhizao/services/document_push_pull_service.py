@@ -70,7 +70,7 @@ class DocumentPushPullService:
             NotFoundError: 源单据不存在
             BusinessLogicError: 下推操作不符合业务规则
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取源单据信息
             source_doc = await self._get_source_document(tenant_id, source_type, source_id)
             if not source_doc:
@@ -141,7 +141,7 @@ class DocumentPushPullService:
             NotFoundError: 源单据或目标单据不存在
             BusinessLogicError: 上拉操作不符合业务规则
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证源单据和目标单据存在
             source_doc = await self._get_source_document(tenant_id, source_type, source_id)
             target_doc = await self._get_source_document(tenant_id, target_type, target_id)
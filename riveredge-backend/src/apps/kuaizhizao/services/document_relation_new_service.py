@@ -8,8 +8,11 @@ Author: Luigi Lu
 Date: 2025-01-14
 """
 
-from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
 from datetime import datetime
+from tortoise import Tortoise
+from tortoise.expressions import Q
 from tortoise.transactions import in_transaction
 from loguru import logger
 
@@ -38,6 +41,86 @@ def _relation_key(source_type: str, source_id: int, target_type: str, target_id:
     return (source_type, source_id, target_type, target_id)
 
 
+# 追溯图递归 CTE：每个方向一个 CTE，path 数组防止环路，depth 限制追溯深度（{table} 为关联表名）
+_TRACE_DOWNSTREAM_CTE = """
+    downstream AS (
+        SELECT r.id, r.source_type, r.source_id, r.target_type, r.target_id,
+               r.target_code AS node_code, r.target_name AS node_name, 1 AS depth,
+               ARRAY[r.source_type || ':' || r.source_id::text, r.target_type || ':' || r.target_id::text] AS path
+        FROM {table} r
+        WHERE r.tenant_id = $1 AND r.source_type = $2 AND r.source_id = $3
+        UNION ALL
+        SELECT r.id, r.source_type, r.source_id, r.target_type, r.target_id,
+               r.target_code, r.target_name, t.depth + 1,
+               t.path || (r.target_type || ':' || r.target_id::text)
+        FROM {table} r
+        JOIN downstream t ON r.source_type = t.target_type AND r.source_id = t.target_id
+        WHERE r.tenant_id = $1 AND t.depth < $4
+          AND NOT (r.target_type || ':' || r.target_id::text) = ANY(t.path)
+    )"""
+
+_TRACE_UPSTREAM_CTE = """
+    upstream AS (
+        SELECT r.id, r.source_type, r.source_id, r.target_type, r.target_id,
+               r.source_code AS node_code, r.source_name AS node_name, 1 AS depth,
+               ARRAY[r.target_type || ':' || r.target_id::text, r.source_type || ':' || r.source_id::text] AS path
+        FROM {table} r
+        WHERE r.tenant_id = $1 AND r.target_type = $2 AND r.target_id = $3
+        UNION ALL
+        SELECT r.id, r.source_type, r.source_id, r.target_type, r.target_id,
+               r.source_code, r.source_name, t.depth + 1,
+               t.path || (r.source_type || ':' || r.source_id::text)
+        FROM {table} r
+        JOIN upstream t ON r.target_type = t.source_type AND r.target_id = t.source_id
+        WHERE r.tenant_id = $1 AND t.depth < $4
+          AND NOT (r.source_type || ':' || r.source_id::text) = ANY(t.path)
+    )"""
+
+_TRACE_SELECT = """
+    SELECT '{direction}' AS direction, MIN(id) AS id, source_type, source_id, target_type, target_id,
+           MAX(node_code) AS node_code, MAX(node_name) AS node_name, MIN(depth) AS depth
+    FROM {direction}
+    GROUP BY source_type, source_id, target_type, target_id"""
+
+
+def _build_trace_tree(
+    edges: Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]],
+    root: Tuple[str, int],
+    max_depth: int,
+) -> List[DocumentTraceNode]:
+    """
+    由邻接表构建追溯树（与逐节点递归追溯的展开规则一致：每个单据只展开一次）
+
+    Args:
+        edges: 单据 -> [(关联单据类型, 关联单据ID, 编码, 名称)]
+        root: 根单据 (类型, ID)
+        max_depth: 最大追溯深度
+
+    Returns:
+        List[DocumentTraceNode]: 根单据的子节点
+    """
+    visited = set()
+
+    def visit(node: Tuple[str, int], level: int) -> List[DocumentTraceNode]:
+        if level >= max_depth or node in visited:
+            return []
+        visited.add(node)
+        nodes: List[DocumentTraceNode] = []
+        for doc_type, doc_id, doc_code, doc_name in edges.get(node, []):
+            children = visit((doc_type, doc_id), level + 1)
+            nodes.append(DocumentTraceNode(
+                document_type=doc_type,
+                document_id=doc_id,
+                document_code=doc_code,
+                document_name=doc_name,
+                level=level + 1,
+                children=children,
+            ))
+        return nodes
+
+    return visit(root, 0)
+
+
 def _derived_to_response(
     doc: Dict[str, Any],
     document_type: str,
@@ -96,6 +179,37 @@ def _derived_to_response(
 class DocumentRelationNewService:
     """单据关联服务（新实现）"""
     
+    async def _get_derived_relations(
+        self,
+        tenant_id: int,
+        document_type: str,
+        document_id: int
+    ) -> Tuple[List[DocumentRelationResponse], List[DocumentRelationResponse]]:
+        """
+        获取业务推导关联（DocumentRelationService，derived 模式）
+
+        Returns:
+            Tuple: (上游关联, 下游关联)；单据类型不在旧服务支持范围内时均为空
+        """
+        from apps.kuaizhizao.services.document_relation_service import DocumentRelationService
+
+        if document_type not in DocumentRelationService.DOCUMENT_TYPES:
+            return [], []
+        legacy_result = await DocumentRelationService().get_document_relations(
+            tenant_id=tenant_id,
+            document_type=document_type,
+            document_id=document_id,
+        )
+        upstream = [
+            _derived_to_response(doc, document_type, document_id, tenant_id, is_upstream=True)
+            for doc in legacy_result.get("upstream_documents", [])
+        ]
+        downstream = [
+            _derived_to_response(doc, document_type, document_id, tenant_id, is_upstream=False)
+            for doc in legacy_result.get("downstream_documents", [])
+        ]
+        return upstream, downstream
+
     async def create_relation(
         self,
         tenant_id: int,
@@ -113,7 +227,7 @@ class DocumentRelationNewService:
         Returns:
             DocumentRelationResponse: 创建的关联关系响应
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 检查关联关系是否已存在
             existing = await DocumentRelation.get_or_none(
                 tenant_id=tenant_id,
@@ -187,37 +301,19 @@ class DocumentRelationNewService:
 
         # 2. 若单据类型在旧服务支持范围内，获取业务推导关联并合并
         try:
-            from apps.kuaizhizao.services.document_relation_service import DocumentRelationService
-            if document_type in DocumentRelationService.DOCUMENT_TYPES:
-                legacy_result = await DocumentRelationService().get_document_relations(
-                    tenant_id=tenant_id,
-                    document_type=document_type,
-                    document_id=document_id,
-                )
-                for doc in legacy_result.get("upstream_documents", []):
-                    key = _relation_key(
-                        doc.get("document_type", ""),
-                        doc.get("document_id", 0),
-                        document_type,
-                        document_id,
-                    )
-                    if key not in table_upstream_keys:
-                        table_upstream_keys.add(key)
-                        upstream_responses.append(_derived_to_response(
-                            doc, document_type, document_id, tenant_id, is_upstream=True
-                        ))
-                for doc in legacy_result.get("downstream_documents", []):
-                    key = _relation_key(
-                        document_type,
-                        document_id,
-                        doc.get("document_type", ""),
-                        doc.get("document_id", 0),
-                    )
-                    if key not in table_downstream_keys:
-                        table_downstream_keys.add(key)
-                        downstream_responses.append(_derived_to_response(
-                            doc, document_type, document_id, tenant_id, is_upstream=False
-                        ))
+            derived_upstream, derived_downstream = await self._get_derived_relations(
+                tenant_id, document_type, document_id
+            )
+            for rel in derived_upstream:
+                key = _relation_key(rel.source_type, rel.source_id, rel.target_type, rel.target_id)
+                if key not in table_upstream_keys:
+                    table_upstream_keys.add(key)
+                    upstream_responses.append(rel)
+            for rel in derived_downstream:
+                key = _relation_key(rel.source_type, rel.source_id, rel.target_type, rel.target_id)
+                if key not in table_downstream_keys:
+                    table_downstream_keys.add(key)
+                    downstream_responses.append(rel)
         except Exception as e:
             logger.warning(f"业务推导关联获取失败，仅返回表驱动结果: {e}")
 
@@ -257,7 +353,7 @@ class DocumentRelationNewService:
         Returns:
             List[DocumentRelationResponse]: 创建的关联关系列表
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             relations = []
             
             for target in target_documents:
@@ -347,6 +443,10 @@ class DocumentRelationNewService:
         
         支持向上追溯（查找所有上游单据）和向下追溯（查找所有下游单据），
         自动避免循环引用。
+
+        关联表（DocumentRelation）通过一次递归 CTE 查询取回追溯图的表驱动关联，再按层展开：
+        每层按推导规则批量取回整层单据的业务推导关联（表记录优先），只经由业务推导关联到达的单据
+        整层一次查询其表驱动关联。单据编码/名称按单据类型批量补全，查询次数与单据数量无关。
         
         Args:
             tenant_id: 租户ID
@@ -358,154 +458,243 @@ class DocumentRelationNewService:
         Returns:
             DocumentTraceResponse: 完整的追溯链
         """
-        # 获取根单据信息
-        root_code, root_name = await self._get_document_info(tenant_id, document_type, document_id)
-        
-        # 初始化追溯结果
-        upstream_chain: List[DocumentTraceNode] = []
-        downstream_chain: List[DocumentTraceNode] = []
-        
-        # 用于避免循环引用的集合
-        visited_upstream = set()
-        visited_downstream = set()
-        
-        if direction in ["upstream", "both"]:
-            # 向上追溯
-            upstream_chain = await self._trace_upstream_recursive(
-                tenant_id=tenant_id,
-                document_type=document_type,
-                document_id=document_id,
-                level=0,
-                max_depth=max_depth,
-                visited=visited_upstream
-            )
-        
-        if direction in ["downstream", "both"]:
-            # 向下追溯
-            downstream_chain = await self._trace_downstream_recursive(
-                tenant_id=tenant_id,
-                document_type=document_type,
-                document_id=document_id,
-                level=0,
-                max_depth=max_depth,
-                visited=visited_downstream
-            )
-        
+        root = (document_type, document_id)
+        directions = [d for d in ("upstream", "downstream") if direction in (d, "both")]
+        table_edges, covered = await self._fetch_trace_edges(
+            tenant_id, document_type, document_id, directions, max_depth
+        )
+        edges = {
+            d: await self._expand_trace_edges(tenant_id, root, d, table_edges[d], covered[d], max_depth)
+            for d in directions
+        }
+
+        # 批量补全根单据与缺少编码的节点信息（每种单据类型一次查询）
+        hydrate_keys = {root}
+        for direction_edges in edges.values():
+            for children in direction_edges.values():
+                hydrate_keys.update((t, i) for t, i, code, _ in children if not code)
+        infos = await self._get_documents_info(tenant_id, hydrate_keys)
+        for direction_edges in edges.values():
+            for node, children in direction_edges.items():
+                direction_edges[node] = [
+                    (t, i, code or infos.get((t, i), {}).get("code"), name or infos.get((t, i), {}).get("name"))
+                    for t, i, code, name in children
+                ]
+        root_info = infos.get(root, {})
+
         return DocumentTraceResponse(
             document_type=document_type,
             document_id=document_id,
-            document_code=root_code,
-            document_name=root_name,
-            upstream_chain=upstream_chain,
-            downstream_chain=downstream_chain
+            document_code=root_info.get("code"),
+            document_name=root_info.get("name"),
+            upstream_chain=_build_trace_tree(edges["upstream"], root, max_depth) if "upstream" in edges else [],
+            downstream_chain=_build_trace_tree(edges["downstream"], root, max_depth) if "downstream" in edges else [],
         )
-    
-    async def _trace_upstream_recursive(
+
+    async def _fetch_trace_edges(
         self,
         tenant_id: int,
         document_type: str,
         document_id: int,
-        level: int,
+        directions: List[str],
         max_depth: int,
-        visited: set
-    ) -> List[DocumentTraceNode]:
-        """递归向上追溯（使用合并后的 get_relations，含表驱动+业务推导）"""
-        if level >= max_depth:
-            return []
-        
-        key = f"{document_type}:{document_id}"
-        if key in visited:
-            return []
-        visited.add(key)
-        
-        result = await self.get_relations(tenant_id, document_type, document_id)
-        nodes: List[DocumentTraceNode] = []
-        
-        for rel in result.upstream:
-            children = await self._trace_upstream_recursive(
-                tenant_id=tenant_id,
-                document_type=rel.source_type,
-                document_id=rel.source_id,
-                level=level + 1,
-                max_depth=max_depth,
-                visited=visited
+    ) -> Tuple[
+        Dict[str, Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]]],
+        Dict[str, Set[Tuple[str, int]]],
+    ]:
+        """
+        一次递归查询取回追溯图的全部表驱动关联边
+
+        Args:
+            tenant_id: 租户ID
+            document_type: 根单据类型
+            document_id: 根单据ID
+            directions: 追溯方向列表（upstream/downstream）
+            max_depth: 最大追溯深度
+
+        Returns:
+            Tuple: (方向 -> 邻接表（单据 -> [(关联单据类型, 关联单据ID, 编码, 名称)]，按关联创建顺序），
+                    方向 -> 已取回关联边的单据集合)
+        """
+        root = (document_type, document_id)
+        edges: Dict[str, Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]]] = {
+            "upstream": {},
+            "downstream": {},
+        }
+        covered: Dict[str, Set[Tuple[str, int]]] = {"upstream": {root}, "downstream": {root}}
+        if not directions or max_depth <= 0:
+            return edges, covered
+
+        table = DocumentRelation._meta.db_table
+        ctes = {"upstream": _TRACE_UPSTREAM_CTE, "downstream": _TRACE_DOWNSTREAM_CTE}
+        sql = (
+            "WITH RECURSIVE"
+            + ",".join(ctes[d].format(table=table) for d in directions)
+            + " UNION ALL ".join(_TRACE_SELECT.format(direction=d) for d in directions)
+            + " ORDER BY id"
+        )
+        conn = Tortoise.get_connection("default")
+        _, rows = await conn.execute_query(sql, [tenant_id, document_type, document_id, max_depth])
+
+        for row in rows:
+            if row["direction"] == "downstream":
+                parent = (row["source_type"], row["source_id"])
+                child = (row["target_type"], row["target_id"])
+            else:
+                parent = (row["target_type"], row["target_id"])
+                child = (row["source_type"], row["source_id"])
+            edges[row["direction"]].setdefault(parent, []).append(
+                (child[0], child[1], row["node_code"], row["node_name"])
             )
-            nodes.append(DocumentTraceNode(
-                document_type=rel.source_type,
-                document_id=rel.source_id,
-                document_code=rel.source_code,
-                document_name=rel.source_name,
-                level=level + 1,
-                children=children
-            ))
-        
-        return nodes
-    
-    async def _trace_downstream_recursive(
+            # 深度未达上限的节点，其下一层关联边已由递归查询取回
+            if row["depth"] < max_depth:
+                covered[row["direction"]].add(child)
+        return edges, covered
+
+    async def _expand_trace_edges(
         self,
         tenant_id: int,
-        document_type: str,
-        document_id: int,
-        level: int,
+        root: Tuple[str, int],
+        direction: str,
+        table_edges: Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]],
+        covered: Set[Tuple[str, int]],
         max_depth: int,
-        visited: set
-    ) -> List[DocumentTraceNode]:
-        """递归向下追溯（使用合并后的 get_relations，含表驱动+业务推导）"""
-        if level >= max_depth:
-            return []
-        
-        key = f"{document_type}:{document_id}"
-        if key in visited:
-            return []
-        visited.add(key)
-        
-        result = await self.get_relations(tenant_id, document_type, document_id)
-        nodes: List[DocumentTraceNode] = []
-        
-        for rel in result.downstream:
-            children = await self._trace_downstream_recursive(
-                tenant_id=tenant_id,
-                document_type=rel.target_type,
-                document_id=rel.target_id,
-                level=level + 1,
-                max_depth=max_depth,
-                visited=visited
-            )
-            nodes.append(DocumentTraceNode(
-                document_type=rel.target_type,
-                document_id=rel.target_id,
-                document_code=rel.target_code,
-                document_name=rel.target_name,
-                level=level + 1,
-                children=children
-            ))
-        
-        return nodes
-    
-    async def _get_document_info(
+    ) -> Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]]:
+        """
+        按层展开追溯图：表驱动关联边合并整层批量推导的业务推导关联（按单据去重，表记录优先）
+
+        Args:
+            tenant_id: 租户ID
+            root: 根单据 (类型, ID)
+            direction: 追溯方向（upstream/downstream）
+            table_edges: 递归查询取回的表驱动邻接表
+            covered: 已取回表驱动关联边的单据集合（其余单据按层批量查询关联表）
+            max_depth: 最大追溯深度
+
+        Returns:
+            Dict: 单据 -> [(关联单据类型, 关联单据ID, 编码, 名称)]
+        """
+        from apps.kuaizhizao.services.document_relation_service import DocumentRelationService
+
+        legacy_service = DocumentRelationService()
+        table_edges = dict(table_edges)
+        edges: Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]] = {}
+        seen = {root}
+        frontier = [root]
+        for _ in range(max_depth):
+            uncovered = [node for node in frontier if node not in covered]
+            if uncovered:
+                table_edges.update(await self._fetch_relation_edges(tenant_id, direction, uncovered))
+            try:
+                derived = await legacy_service.get_derived_links(tenant_id, direction, frontier)
+            except Exception as e:
+                logger.warning(f"业务推导关联获取失败，仅使用表驱动结果: {e}")
+                derived = {}
+
+            next_frontier: List[Tuple[str, int]] = []
+            for node in frontier:
+                children = list(table_edges.get(node, []))
+                child_keys = {(t, i) for t, i, _, _ in children}
+                for child in derived.get(node, []):
+                    if child not in child_keys:
+                        child_keys.add(child)
+                        children.append((child[0], child[1], None, None))
+
+                if children:
+                    edges[node] = children
+                for key in child_keys:
+                    if key not in seen:
+                        seen.add(key)
+                        next_frontier.append(key)
+            if not next_frontier:
+                break
+            frontier = next_frontier
+        return edges
+
+    async def _fetch_relation_edges(
         self,
         tenant_id: int,
-        document_type: str,
-        document_id: int
-    ) -> tuple[Optional[str], Optional[str]]:
-        """获取单据基本信息（编码和名称）"""
-        try:
-            from apps.kuaizhizao.services.document_relation_service import DocumentRelationService
-            if document_type not in DocumentRelationService.DOCUMENT_TYPES:
-                return None, None
-            cfg = DocumentRelationService.DOCUMENT_TYPES[document_type]
+        direction: str,
+        nodes: List[Tuple[str, int]],
+    ) -> Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]]:
+        """
+        一次查询取回一批单据在关联表中的单层关联边
+
+        Returns:
+            Dict: 单据 -> [(关联单据类型, 关联单据ID, 编码, 名称)]（按关联创建顺序）
+        """
+        is_upstream = direction == "upstream"
+        ids_by_type: Dict[str, Set[int]] = defaultdict(set)
+        for doc_type, doc_id in nodes:
+            ids_by_type[doc_type].add(doc_id)
+        if is_upstream:
+            condition = Q(*[Q(target_type=t, target_id__in=list(ids)) for t, ids in ids_by_type.items()], join_type="OR")
+        else:
+            condition = Q(*[Q(source_type=t, source_id__in=list(ids)) for t, ids in ids_by_type.items()], join_type="OR")
+
+        edges: Dict[Tuple[str, int], List[Tuple[str, int, Optional[str], Optional[str]]]] = defaultdict(list)
+        for r in await DocumentRelation.filter(condition, tenant_id=tenant_id).order_by("id"):
+            if is_upstream:
+                edges[(r.target_type, r.target_id)].append((r.source_type, r.source_id, r.source_code, r.source_name))
+            else:
+                edges[(r.source_type, r.source_id)].append((r.target_type, r.target_id, r.target_code, r.target_name))
+        return edges
+
+    async def _get_documents_info(
+        self,
+        tenant_id: int,
+        keys: Iterable[Tuple[str, int]],
+        include_status: bool = False,
+    ) -> Dict[Tuple[str, int], Dict[str, Optional[str]]]:
+        """
+        按单据类型批量获取单据编码、名称（及状态）
+
+        Args:
+            tenant_id: 租户ID
+            keys: (单据类型, 单据ID) 列表
+            include_status: 是否同时获取状态
+
+        Returns:
+            Dict: (单据类型, 单据ID) -> {"code", "name", "status"}
+        """
+        from apps.kuaizhizao.services.document_relation_service import DocumentRelationService
+
+        document_types = {**DocumentRelationService.DOCUMENT_TYPES, **DocumentRelationService.LINK_DOCUMENT_TYPES}
+        ids_by_type: Dict[str, set] = defaultdict(set)
+        for doc_type, doc_id in keys:
+            if doc_type in document_types:
+                ids_by_type[doc_type].add(doc_id)
+
+        result: Dict[Tuple[str, int], Dict[str, Optional[str]]] = {}
+        for doc_type, ids in ids_by_type.items():
+            cfg = document_types[doc_type]
             model = cfg["model"]
+            fields_map = model._meta.fields_map
             code_field = cfg["code_field"]
-            name_field = cfg.get("name_field")
-            doc = await model.get_or_none(tenant_id=tenant_id, id=document_id)
-            if not doc:
-                return None, None
-            code = getattr(doc, code_field, None)
-            name = getattr(doc, name_field, None) if name_field else None
-            return str(code) if code else None, str(name) if name else str(code) if code else None
-        except Exception as e:
-            logger.debug(f"获取单据信息失败 {document_type}#{document_id}: {e}")
-            return None, None
+            name_field = cfg.get("name_field") if cfg.get("name_field") in fields_map else None
+            status_fields: List[str] = []
+            if include_status:
+                # 生产计划优先取流程状态（plan_status），其余按映射取状态字段
+                candidates = ["plan_status", "status"] if doc_type == "production_plan" else [
+                    _CHANGE_IMPACT_STATUS_FIELDS.get(doc_type, "status")
+                ]
+                status_fields = [f for f in candidates if f in fields_map]
+            value_fields = list(dict.fromkeys(["id", code_field, *([name_field] if name_field else []), *status_fields]))
+            try:
+                rows = await model.filter(tenant_id=tenant_id, id__in=list(ids)).values(*value_fields)
+            except Exception as e:
+                logger.debug(f"批量获取单据信息失败 {doc_type}: {e}")
+                continue
+            for row in rows:
+                code = row.get(code_field)
+                name = row.get(name_field) if name_field else None
+                status = next((row.get(f) for f in status_fields if row.get(f)), None)
+                result[(doc_type, row["id"])] = {
+                    "code": str(code) if code else None,
+                    "name": str(name) if name else str(code) if code else None,
+                    "status": str(status) if status else None,
+                }
+        return result
 
     def _flatten_downstream_nodes(
         self,
@@ -527,41 +716,13 @@ class DocumentRelationNewService:
             self._flatten_downstream_nodes(node.children, collected)
         return collected
 
-    async def _get_document_status(
-        self,
-        tenant_id: int,
-        document_type: str,
-        document_id: int,
-    ) -> Optional[str]:
-        """获取单据状态"""
-        try:
-            from apps.kuaizhizao.services.document_relation_service import DocumentRelationService
-            if document_type not in DocumentRelationService.DOCUMENT_TYPES:
-                return None
-            cfg = DocumentRelationService.DOCUMENT_TYPES[document_type]
-            model = cfg["model"]
-            doc = await model.get_or_none(tenant_id=tenant_id, id=document_id)
-            if not doc:
-                return None
-            status_field = _CHANGE_IMPACT_STATUS_FIELDS.get(
-                document_type,
-                "plan_status" if document_type == "production_plan" else "status",
-            )
-            if document_type == "production_plan":
-                val = getattr(doc, "plan_status", None) or getattr(doc, "status", None)
-            else:
-                val = getattr(doc, status_field, None)
-            return str(val) if val else None
-        except Exception:
-            return None
-
     async def get_change_impact_demand(
         self,
         tenant_id: int,
         demand_id: int,
     ) -> Dict[str, Any]:
         """
-        获取需求变更对下游的影响范围（与 trace 使用相同数据源 get_relations）
+        获取需求变更对下游的影响范围（与 trace 使用相同数据源，状态按单据类型批量获取）
         """
         from apps.kuaizhizao.models.demand import Demand
 
@@ -585,14 +746,16 @@ class DocumentRelationNewService:
             max_depth=10,
         )
         collected = self._flatten_downstream_nodes(trace.downstream_chain)
+        infos = await self._get_documents_info(
+            tenant_id, [("demand", demand_id), *collected.keys()], include_status=True
+        )
 
         # 需求本身作为受影响项
-        demand_status = await self._get_document_status(tenant_id, "demand", demand_id)
         affected_demands = [{
             "id": demand_id,
             "code": getattr(demand, "demand_code", None),
             "name": getattr(demand, "demand_name", None),
-            "status": demand_status,
+            "status": infos.get(("demand", demand_id), {}).get("status"),
         }]
 
         affected_computations = []
@@ -600,7 +763,7 @@ class DocumentRelationNewService:
         affected_work_orders = []
 
         for (doc_type, doc_id), info in collected.items():
-            status = await self._get_document_status(tenant_id, doc_type, doc_id)
+            status = infos.get((doc_type, doc_id), {}).get("status")
             item = {
                 "id": doc_id,
                 "code": info.get("document_code"),
@@ -638,7 +801,7 @@ class DocumentRelationNewService:
         order_id: int,
     ) -> Dict[str, Any]:
         """
-        获取销售订单变更对下游的影响范围（与 trace 使用相同数据源 get_relations）
+        获取销售订单变更对下游的影响范围（与 trace 使用相同数据源，状态按单据类型批量获取）
         """
         from apps.kuaizhizao.models.sales_order import SalesOrder
 
@@ -662,6 +825,7 @@ class DocumentRelationNewService:
             max_depth=10,
         )
         collected = self._flatten_downstream_nodes(trace.downstream_chain)
+        infos = await self._get_documents_info(tenant_id, collected.keys(), include_status=True)
 
         affected_demands = []
         affected_computations = []
@@ -669,7 +833,7 @@ class DocumentRelationNewService:
         affected_work_orders = []
 
         for (doc_type, doc_id), info in collected.items():
-            status = await self._get_document_status(tenant_id, doc_type, doc_id)
+            status = infos.get((doc_type, doc_id), {}).get("status")
             item = {
                 "id": doc_id,
                 "code": info.get("document_code"),
@@ -7,7 +7,8 @@ Author: Luigi Lu
 Date: 2025-01-01
 """
 
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from typing import List, Dict, Any, Iterable, Optional, Tuple
 from datetime import datetime
 from loguru import logger
 
@@ -22,6 +23,7 @@ from apps.kuaizhizao.models.quotation import Quotation
 from apps.kuaizhizao.models.material_borrow import MaterialBorrow
 from apps.kuaizhizao.models.material_return import MaterialReturn
 from apps.kuaizhizao.models.demand import Demand
+from apps.kuaizhizao.models.demand_item import DemandItem
 from apps.kuaizhizao.models.sales_delivery import SalesDelivery
 from apps.kuaizhizao.models.sales_return import SalesReturn
 from apps.kuaizhizao.models.delivery_notice import DeliveryNotice
@@ -70,6 +72,47 @@ class DocumentRelationService:
         "finished_goods_inspection": {"model": FinishedGoodsInspection, "code_field": "inspection_code", "name_field": None},
     }
 
+    # 只作为推导关联端点出现的单据类型（不支持单独查询关联，仅用于补全编码）
+    LINK_DOCUMENT_TYPES = {
+        "sales_return": {"model": SalesReturn, "code_field": "return_code", "name_field": None},
+        "purchase_return": {"model": PurchaseReturn, "code_field": "return_code", "name_field": None},
+        "rework_order": {"model": ReworkOrder, "code_field": "code", "name_field": None},
+        "outsource_order": {"model": OutsourceOrder, "code_field": "code", "name_field": None},
+    }
+
+    # 业务推导关联规则（单跳）：(模型, 上游单据类型, 上游ID字段, 下游单据类型, 下游ID字段, 附加过滤条件)
+    # 与 get_document_relations 的逐单据推导对应，供追溯按层批量推导；
+    # 经由中间单据的跨层关联（如应付单 -> 采购单）在追溯中由中间单据逐层到达，不单独建规则。
+    DERIVED_LINKS = [
+        (Demand, "sales_forecast", "source_id", "demand", "id", {"source_type": "sales_forecast", "deleted_at__isnull": True}),
+        (Demand, "sales_order", "source_id", "demand", "id", {"source_type": "sales_order", "deleted_at__isnull": True}),
+        (Demand, "demand", "id", "demand_computation", "computation_id", {"deleted_at__isnull": True}),
+        (DemandComputation, "demand", "demand_id", "demand_computation", "id", {}),
+        (DemandItem, "demand", "demand_id", "work_order", "work_order_id", {}),
+        (WorkOrder, "sales_order", "sales_order_id", "work_order", "id", {}),
+        (ProductionPicking, "work_order", "work_order_id", "production_picking", "id", {}),
+        (ProductionReturn, "work_order", "work_order_id", "production_return", "id", {}),
+        (ProductionReturn, "production_picking", "picking_id", "production_return", "id", {}),
+        (ReportingRecord, "work_order", "work_order_id", "reporting_record", "id", {}),
+        (FinishedGoodsReceipt, "work_order", "work_order_id", "finished_goods_receipt", "id", {}),
+        (ReworkOrder, "work_order", "original_work_order_id", "rework_order", "id", {"deleted_at__isnull": True}),
+        (OutsourceOrder, "work_order", "work_order_id", "outsource_order", "id", {"deleted_at__isnull": True}),
+        (ProcessInspection, "work_order", "work_order_id", "process_inspection", "id", {}),
+        (FinishedGoodsInspection, "work_order", "work_order_id", "finished_goods_inspection", "id", {}),
+        (PurchaseOrder, "demand_computation", "source_id", "purchase_order", "id", {"source_type__in": ("MRP", "LRP", "demand_computation")}),
+        (PurchaseReceipt, "purchase_order", "purchase_order_id", "purchase_receipt", "id", {}),
+        (Payable, "purchase_receipt", "source_id", "payable", "id", {"source_type": "采购入库"}),
+        (IncomingInspection, "purchase_receipt", "purchase_receipt_id", "incoming_inspection", "id", {}),
+        (PurchaseReturn, "purchase_receipt", "purchase_receipt_id", "purchase_return", "id", {"deleted_at__isnull": True}),
+        (SalesDelivery, "sales_order", "sales_order_id", "sales_delivery", "id", {}),
+        (Receivable, "sales_delivery", "source_id", "receivable", "id", {"source_type": "销售出库"}),
+        (DeliveryNotice, "sales_delivery", "sales_delivery_id", "delivery_notice", "id", {"deleted_at__isnull": True}),
+        (DeliveryNotice, "sales_order", "sales_order_id", "delivery_notice", "id", {"deleted_at__isnull": True}),
+        (SalesReturn, "sales_delivery", "sales_delivery_id", "sales_return", "id", {"deleted_at__isnull": True}),
+        (Quotation, "quotation", "id", "sales_order", "sales_order_id", {"deleted_at__isnull": True}),
+        (MaterialReturn, "material_borrow", "borrow_id", "material_return", "id", {"deleted_at__isnull": True}),
+    ]
+
     async def get_document_relations(
         self,
         tenant_id: int,
@@ -203,6 +246,46 @@ class DocumentRelationService:
             "downstream_count": len(downstream_documents)
         }
 
+    async def get_derived_links(
+        self,
+        tenant_id: int,
+        direction: str,
+        keys: Iterable[Tuple[str, int]]
+    ) -> Dict[Tuple[str, int], List[Tuple[str, int]]]:
+        """
+        按推导规则批量获取一批单据的业务推导关联（每条适用规则一次查询，与单据数量无关）
+
+        Args:
+            tenant_id: 租户ID
+            direction: 方向（upstream: 上游, downstream: 下游）
+            keys: (单据类型, 单据ID) 列表
+
+        Returns:
+            Dict: 单据 -> [(关联单据类型, 关联单据ID)]（按规则顺序）
+        """
+        ids_by_type: Dict[str, set] = defaultdict(set)
+        for doc_type, doc_id in keys:
+            ids_by_type[doc_type].add(doc_id)
+
+        result: Dict[Tuple[str, int], List[Tuple[str, int]]] = defaultdict(list)
+        for model, up_type, up_field, down_type, down_field, filters in self.DERIVED_LINKS:
+            if direction == "upstream":
+                from_type, from_field, to_type, to_field = down_type, down_field, up_type, up_field
+            else:
+                from_type, from_field, to_type, to_field = up_type, up_field, down_type, down_field
+            ids = ids_by_type.get(from_type)
+            if not ids:
+                continue
+            rows = await model.filter(
+                tenant_id=tenant_id,
+                **{f"{from_field}__in": list(ids)},
+                **filters,
+            ).order_by("id").values_list(from_field, to_field)
+            for from_id, to_id in rows:
+                if to_id:
+                    result[(from_type, from_id)].append((to_type, to_id))
+        return result
+
     async def trace_document_chain(
         self,
         tenant_id: int,
@@ -8,13 +8,18 @@ Date: 2025-01-15
 """
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from decimal import Decimal
 
+from tortoise import timezone
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+
 from apps.kuaizhizao.models.material_shortage_exception import MaterialShortageException
 from apps.kuaizhizao.models.delivery_delay_exception import DeliveryDelayException
 from apps.kuaizhizao.models.quality_exception import QualityException
 from apps.kuaizhizao.models.work_order import WorkOrder
+from apps.master_data.models.material import Material
 from apps.kuaizhizao.schemas.material_shortage_exception import (
     MaterialShortageExceptionCreate,
     MaterialShortageExceptionUpdate,
@@ -31,12 +36,22 @@ from apps.kuaizhizao.schemas.delivery_delay_exception import (
 )
 from apps.base_service import AppBaseService
 from apps.kuaizhizao.services.work_order_service import WorkOrderService
-from apps.kuaizhizao.utils.bom_helper import calculate_material_requirements_from_bom
-from apps.kuaizhizao.utils.inventory_helper import get_material_available_quantity
+from apps.kuaizhizao.utils.bom_helper import get_bom_items_by_material_ids
+from apps.kuaizhizao.utils.inventory_helper import get_materials_available_quantities
 from infra.exceptions.exceptions import NotFoundError, ValidationError
 from loguru import logger
 
 
+# 参与缺料ATP分配的工单状态
+SHORTAGE_OPEN_WORK_ORDER_STATUSES = ["released", "in_progress"]
+
+# 未处理的缺料异常状态（再次检测时更新而非新建）
+OPEN_SHORTAGE_STATUSES = ["pending", "processing"]
+
+# 工单优先级分配顺序（数字越小越先分配库存）
+WORK_ORDER_PRIORITY_RANK = {"urgent": 0, "high": 1, "normal": 2, "low": 3}
+
+
 class ExceptionService:
     """
     异常处理服务类
@@ -55,83 +70,186 @@ class ExceptionService:
         """
         检测工单缺料并创建缺料异常记录
 
+        与其他未完工工单按优先级、交期竞争库存（ATP分配），只为本工单写入缺料异常。
+
         Args:
             tenant_id: 租户ID
             work_order_id: 工单ID
 
         Returns:
-            List[MaterialShortageExceptionResponse]: 缺料异常记录列表
+            List[MaterialShortageExceptionResponse]: 本工单未处理的缺料异常记录列表
         """
         work_order = await WorkOrder.get_or_none(id=work_order_id, tenant_id=tenant_id)
         if not work_order:
             raise NotFoundError("工单不存在")
 
-        # 获取BOM物料需求
-        try:
-            material_requirements = await calculate_material_requirements_from_bom(
-                tenant_id=tenant_id,
-                material_id=work_order.product_id,
-                required_quantity=float(work_order.quantity),
-                only_approved=True
-            )
-        except NotFoundError:
-            # 如果没有BOM，返回空列表
-            logger.warning(f"工单 {work_order.code} 的产品没有BOM，跳过缺料检测")
-            return []
-
-        # 检测缺料
-        exceptions = []
-        for req in material_requirements:
-            material_id = req.get("material_id")
-            required_qty = Decimal(str(req.get("required_quantity", 0)))
-            
-            # 获取可用库存
-            available_qty = await get_material_available_quantity(
+        await self.allocate_material_shortages(
+            tenant_id=tenant_id,
+            target_work_order_ids=[work_order_id],
+        )
+
+        exceptions = await MaterialShortageException.filter(
+            tenant_id=tenant_id,
+            work_order_id=work_order_id,
+            status__in=OPEN_SHORTAGE_STATUSES,
+            deleted_at__isnull=True,
+        ).order_by("id")
+        return [MaterialShortageExceptionResponse.model_validate(e) for e in exceptions]
+
+    async def allocate_material_shortages(
+        self,
+        tenant_id: int,
+        target_work_order_ids: Optional[List[int]] = None,
+    ) -> Dict[str, Any]:
+        """
+        批量ATP分配检测缺料
+
+        一次性加载所有已下达/执行中工单、其BOM需求和库存快照，按优先级、计划完工时间依次分配库存，
+        分配不足的部分即为缺料；缺料异常批量新增或更新（已存在未处理的异常时刷新数量和预警级别）。
+        工单需求按未完工数量（计划数量 - 已完成数量）计算，跳过替代料。
+
+        Args:
+            tenant_id: 租户ID
+            target_work_order_ids: 只为这些工单写入缺料异常（可选，None 时为所有参与分配的工单）；
+                这些工单即使不在已下达/执行中状态也会参与分配
+
+        Returns:
+            Dict[str, Any]: 分配结果（参与工单数、缺料数、新增数、更新数）
+        """
+        order_filter = Q(status__in=SHORTAGE_OPEN_WORK_ORDER_STATUSES)
+        if target_work_order_ids:
+            order_filter |= Q(id__in=target_work_order_ids)
+        work_orders = await WorkOrder.filter(
+            order_filter,
+            tenant_id=tenant_id,
+            deleted_at__isnull=True,
+        ).all()
+
+        # 分配顺序：优先级高的先分配，同优先级按计划完工时间、计划开工时间、ID
+        work_orders.sort(key=lambda wo: (
+            WORK_ORDER_PRIORITY_RANK.get(wo.priority, WORK_ORDER_PRIORITY_RANK["normal"]),
+            wo.planned_end_date is None, wo.planned_end_date,
+            wo.planned_start_date is None, wo.planned_start_date,
+            wo.id,
+        ))
+
+        bom_items_by_product = await get_bom_items_by_material_ids(
+            tenant_id=tenant_id,
+            material_ids=[wo.product_id for wo in work_orders],
+            only_approved=True,
+        )
+
+        # 各工单按子件汇总需求（同一子件多行时合并）
+        order_requirements: Dict[int, Dict[int, Decimal]] = {}
+        for wo in work_orders:
+            open_qty = Decimal(str(wo.quantity or 0)) - Decimal(str(wo.completed_quantity or 0))
+            if open_qty <= 0:
+                continue
+            requirements: Dict[int, Decimal] = {}
+            for item in bom_items_by_product.get(wo.product_id, []):
+                if item.is_alternative:
+                    continue
+                requirements[item.component_id] = (
+                    requirements.get(item.component_id, Decimal("0"))
+                    + Decimal(str(item.quantity)) * open_qty
+                )
+            if requirements:
+                order_requirements[wo.id] = requirements
+
+        component_ids = {mid for reqs in order_requirements.values() for mid in reqs}
+        remaining = await get_materials_available_quantities(tenant_id=tenant_id, material_ids=component_ids)
+        materials = {
+            row["id"]: row
+            for row in await Material.filter(tenant_id=tenant_id, id__in=list(component_ids)).values("id", "main_code", "name")
+        } if component_ids else {}
+
+        target_ids = set(target_work_order_ids) if target_work_order_ids else None
+        shortages = []
+        for wo in work_orders:
+            for material_id, required_qty in order_requirements.get(wo.id, {}).items():
+                allocated = min(remaining.get(material_id, Decimal("0")), required_qty)
+                remaining[material_id] = remaining.get(material_id, Decimal("0")) - allocated
+                if allocated >= required_qty:
+                    continue
+                if target_ids is not None and wo.id not in target_ids:
+                    continue
+                shortages.append((wo, material_id, required_qty, allocated))
+
+        # 批量新增/更新缺料异常
+        existing = {}
+        if shortages:
+            existing_rows = await MaterialShortageException.filter(
                 tenant_id=tenant_id,
-                material_id=material_id,
-            )
-
-            if available_qty < required_qty:
-                shortage_qty = required_qty - available_qty
-                
-                # 计算预警级别
-                shortage_rate = float(shortage_qty / required_qty) if required_qty > 0 else 0
-                if shortage_rate >= 0.8:
-                    alert_level = "critical"
-                elif shortage_rate >= 0.5:
-                    alert_level = "high"
-                elif shortage_rate >= 0.3:
-                    alert_level = "medium"
-                else:
-                    alert_level = "low"
-
-                # 检查是否已存在异常记录
-                existing = await MaterialShortageException.filter(
+                work_order_id__in=list({wo.id for wo, _, _, _ in shortages}),
+                status__in=OPEN_SHORTAGE_STATUSES,
+                deleted_at__isnull=True,
+            ).all()
+            existing = {(e.work_order_id, e.material_id): e for e in existing_rows}
+
+        now = timezone.now()
+        to_create = []
+        to_update = []
+        for wo, material_id, required_qty, allocated in shortages:
+            shortage_qty = required_qty - allocated
+            alert_level = self._get_shortage_alert_level(shortage_qty, required_qty)
+            exception = existing.get((wo.id, material_id))
+            if exception:
+                exception.shortage_quantity = shortage_qty
+                exception.available_quantity = allocated
+                exception.required_quantity = required_qty
+                exception.alert_level = alert_level
+                exception.updated_at = now
+                to_update.append(exception)
+            else:
+                material = materials.get(material_id, {})
+                to_create.append(MaterialShortageException(
                     tenant_id=tenant_id,
-                    work_order_id=work_order_id,
+                    work_order_id=wo.id,
+                    work_order_code=wo.code,
                     material_id=material_id,
-                    status__in=["pending", "processing"],
-                ).first()
-
-                if not existing:
-                    # 创建缺料异常记录
-                    exception = await MaterialShortageException.create(
-                        tenant_id=tenant_id,
-                        work_order_id=work_order_id,
-                        work_order_code=work_order.code,
-                        material_id=material_id,
-                        material_code=req.get("material_code", ""),
-                        material_name=req.get("material_name", ""),
-                        shortage_quantity=shortage_qty,
-                        available_quantity=available_qty,
-                        required_quantity=required_qty,
-                        alert_level=alert_level,
-                        status="pending",
-                        suggested_action="purchase",  # 默认建议采购
+                    material_code=material.get("main_code", ""),
+                    material_name=material.get("name", ""),
+                    shortage_quantity=shortage_qty,
+                    available_quantity=allocated,
+                    required_quantity=required_qty,
+                    alert_level=alert_level,
+                    status="pending",
+                    suggested_action="purchase",  # 默认建议采购
+                ))
+
+        if to_create or to_update:
+            async with in_transaction("default"):
+                if to_create:
+                    await MaterialShortageException.bulk_create(to_create, batch_size=500)
+                if to_update:
+                    await MaterialShortageException.bulk_update(
+                        to_update,
+                        fields=["shortage_quantity", "available_quantity", "required_quantity", "alert_level", "updated_at"],
+                        batch_size=500,
                     )
-                    exceptions.append(MaterialShortageExceptionResponse.model_validate(exception))
 
-        return exceptions
+        logger.info(
+            f"租户 {tenant_id} 缺料ATP分配完成: 工单 {len(order_requirements)} 个，"
+            f"缺料 {len(shortages)} 项，新增 {len(to_create)}，更新 {len(to_update)}"
+        )
+        return {
+            "work_order_count": len(order_requirements),
+            "detected": len(shortages),
+            "created": len(to_create),
+            "updated": len(to_update),
+        }
+
+    @staticmethod
+    def _get_shortage_alert_level(shortage_qty: Decimal, required_qty: Decimal) -> str:
+        """根据缺料比例计算预警级别"""
+        shortage_rate = float(shortage_qty / required_qty) if required_qty > 0 else 0
+        if shortage_rate >= 0.8:
+            return "critical"
+        elif shortage_rate >= 0.5:
+            return "high"
+        elif shortage_rate >= 0.3:
+            return "medium"
+        return "low"
 
     async def list_material_shortage_exceptions(
         self,
@@ -47,7 +47,7 @@ class PayableService(AppBaseService[Payable]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "payable")
         if not is_enabled:
             raise BusinessLogicError("应付账款节点未启用，无法创建应付单")
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "PAYABLE_CODE", prefix=f"PY{today}")
@@ -87,7 +87,7 @@ class PayableService(AppBaseService[Payable]):
 
     async def update_payable(self, tenant_id: int, payable_id: int, payable_data: PayableUpdate, updated_by: int) -> PayableResponse:
         """更新应付单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             payable = await self.get_payable_by_id(tenant_id, payable_id)
             update_data = payable_data.model_dump(exclude_unset=True, exclude={'updated_by'})
             update_data['updated_by'] = updated_by
@@ -98,7 +98,7 @@ class PayableService(AppBaseService[Payable]):
 
     async def record_payment(self, tenant_id: int, payable_id: int, payment_data: PaymentRecordCreate, recorded_by: int) -> PayableResponse:
         """记录付款"""
-        async with in_transaction():
+        async with in_transaction("default"):
             payable = await self.get_payable_by_id(tenant_id, payable_id)
 
             if payable.status == '已结清':
@@ -128,7 +128,7 @@ class PayableService(AppBaseService[Payable]):
 
     async def approve_payable(self, tenant_id: int, payable_id: int, approved_by: int, rejection_reason: Optional[str] = None) -> PayableResponse:
         """审核应付单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             payable = await self.get_payable_by_id(tenant_id, payable_id)
 
             if payable.review_status != '待审核':
@@ -159,7 +159,7 @@ class PurchaseInvoiceService(AppBaseService[PurchaseInvoice]):
 
     async def create_purchase_invoice(self, tenant_id: int, invoice_data: PurchaseInvoiceCreate, created_by: int) -> PurchaseInvoiceResponse:
         """创建采购发票"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "PURCHASE_INVOICE_CODE", prefix=f"PI{today}")
@@ -197,7 +197,7 @@ class PurchaseInvoiceService(AppBaseService[PurchaseInvoice]):
 
     async def approve_invoice(self, tenant_id: int, invoice_id: int, approved_by: int, rejection_reason: Optional[str] = None) -> PurchaseInvoiceResponse:
         """审核采购发票"""
-        async with in_transaction():
+        async with in_transaction("default"):
             invoice = await self.get_purchase_invoice_by_id(tenant_id, invoice_id)
 
             if invoice.review_status != '待审核':
@@ -243,7 +243,7 @@ class ReceivableService(AppBaseService[Receivable]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "receivable")
         if not is_enabled:
             raise BusinessLogicError("应收账款节点未启用，无法创建应收单")
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "RECEIVABLE_CODE", prefix=f"YS{today}")
@@ -283,7 +283,7 @@ class ReceivableService(AppBaseService[Receivable]):
 
     async def record_receipt(self, tenant_id: int, receivable_id: int, receipt_data: ReceiptRecordCreate, recorded_by: int) -> ReceivableResponse:
         """记录收款"""
-        async with in_transaction():
+        async with in_transaction("default"):
             receivable = await self.get_receivable_by_id(tenant_id, receivable_id)
 
             if receivable.status == '已结清':
@@ -313,7 +313,7 @@ class ReceivableService(AppBaseService[Receivable]):
 
     async def approve_receivable(self, tenant_id: int, receivable_id: int, approved_by: int, rejection_reason: Optional[str] = None) -> ReceivableResponse:
         """审核应收单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             receivable = await self.get_receivable_by_id(tenant_id, receivable_id)
 
             if receivable.review_status != '待审核':
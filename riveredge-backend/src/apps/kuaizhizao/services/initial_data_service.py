@@ -124,7 +124,7 @@ class InitialDataService:
         # 用于批量创建入库单（按仓库分组）
         receipts_by_warehouse: Dict[str, Dict[str, Any]] = {}
         
-        async with in_transaction():
+        async with in_transaction("default"):
             for row, row_idx in non_empty_rows:
                 try:
                     # 解析行数据
@@ -419,7 +419,7 @@ class InitialDataService:
         failure_count = 0
         errors = []
         
-        async with in_transaction():
+        async with in_transaction("default"):
             
             for row, row_idx in non_empty_rows:
                 try:
@@ -711,7 +711,7 @@ class InitialDataService:
         failure_count = 0
         errors = []
         
-        async with in_transaction():
+        async with in_transaction("default"):
             for row, row_idx in non_empty_rows:
                 try:
                     # 解析行数据
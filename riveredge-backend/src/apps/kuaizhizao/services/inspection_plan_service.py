@@ -42,7 +42,7 @@ class InspectionPlanService(AppBaseService[InspectionPlan]):
         created_by: Optional[int] = None,
     ) -> InspectionPlanResponse:
         """创建质检方案（含步骤）"""
-        async with in_transaction():
+        async with in_transaction("default"):
             if not plan_data.plan_code:
                 code_rule_service = CodeRuleService()
                 plan_code = await code_rule_service.generate_code(
@@ -159,7 +159,7 @@ class InspectionPlanService(AppBaseService[InspectionPlan]):
         updated_by: Optional[int] = None,
     ) -> InspectionPlanResponse:
         """更新质检方案（含步骤替换）"""
-        async with in_transaction():
+        async with in_transaction("default"):
             plan = await InspectionPlan.filter(
                 tenant_id=tenant_id,
                 id=plan_id,
@@ -193,7 +193,7 @@ class InspectionPlanService(AppBaseService[InspectionPlan]):
         plan_id: int,
     ) -> None:
         """删除质检方案（软删除）"""
-        async with in_transaction():
+        async with in_transaction("default"):
             plan = await InspectionPlan.filter(
                 tenant_id=tenant_id,
                 id=plan_id,
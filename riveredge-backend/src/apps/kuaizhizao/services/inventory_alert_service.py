@@ -60,7 +60,7 @@ class InventoryAlertRuleService(AppBaseService[InventoryAlertRule]):
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成预警规则编码
             code = await self.generate_code(
                 tenant_id=tenant_id,
@@ -184,7 +184,7 @@ class InventoryAlertRuleService(AppBaseService[InventoryAlertRule]):
             NotFoundError: 预警规则不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取预警规则
             rule = await InventoryAlertRule.get_or_none(
                 id=rule_id,
@@ -437,7 +437,7 @@ class InventoryAlertService(AppBaseService[InventoryAlert]):
             NotFoundError: 预警记录不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取预警记录
             alert = await InventoryAlert.get_or_none(
                 id=alert_id,
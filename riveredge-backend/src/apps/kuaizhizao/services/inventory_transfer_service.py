@@ -66,7 +66,7 @@ class InventoryTransferService(AppBaseService[InventoryTransfer]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "inventory_transfer")
         if not is_enabled:
             raise BusinessLogicError("调拨单节点未启用，无法创建调拨单")
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证调出和调入仓库不能相同
             if transfer_data.from_warehouse_id == transfer_data.to_warehouse_id:
                 raise ValidationError("调出仓库和调入仓库不能相同")
@@ -185,7 +185,7 @@ class InventoryTransferService(AppBaseService[InventoryTransfer]):
             NotFoundError: 调拨单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取调拨单
             transfer = await InventoryTransfer.get_or_none(
                 id=transfer_id,
@@ -306,7 +306,7 @@ class InventoryTransferService(AppBaseService[InventoryTransfer]):
             NotFoundError: 调拨单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 检查调拨单是否存在
             transfer = await InventoryTransfer.get_or_none(
                 id=transfer_id,
@@ -381,7 +381,7 @@ class InventoryTransferService(AppBaseService[InventoryTransfer]):
             NotFoundError: 调拨明细不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取调拨明细
             item = await InventoryTransferItem.get_or_none(
                 id=item_id,
@@ -441,7 +441,7 @@ class InventoryTransferService(AppBaseService[InventoryTransfer]):
             NotFoundError: 调拨单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取调拨单
             transfer = await InventoryTransfer.get_or_none(
                 id=transfer_id,
@@ -34,7 +34,7 @@ class InvoiceService(AppBaseService[Invoice]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "invoice")
         if not is_enabled:
             raise BusinessLogicError("发票节点未启用，无法创建发票")
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成系统编号
             prefix = "INV-IN-" if data.category == "IN" else "INV-OUT-"
             code = await self.generate_code(tenant_id, "INVOICE_CODE", prefix=prefix)
@@ -47,7 +47,7 @@ class LaunchCountdownService(AppBaseService[LaunchCountdown]):
         Returns:
             LaunchCountdown: 上线倒计时对象
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 查找现有的倒计时（进行中或待开始）
             existing = await LaunchCountdown.filter(
                 tenant_id=tenant_id,
@@ -18,6 +18,7 @@ from tortoise.transactions import in_transaction
 from apps.kuaizhizao.models.material_binding import MaterialBinding
 from apps.kuaizhizao.models.reporting_record import ReportingRecord
 from apps.kuaizhizao.models.work_order import WorkOrder
+from apps.kuaizhizao.services.traceability import TraceabilityService
 from apps.kuaizhizao.schemas.material_binding import (
     MaterialBindingCreateFromReporting,
     MaterialBindingResponse,
@@ -61,7 +62,7 @@ class MaterialBindingService(AppBaseService[MaterialBinding]):
             NotFoundError: 报工记录不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取报工记录
             reporting_record = await ReportingRecord.get_or_none(
                 id=reporting_record_id,
@@ -148,6 +149,12 @@ class MaterialBindingService(AppBaseService[MaterialBinding]):
             #         source_type='material_binding',
             #         source_id=material_binding.id
             #     )
+            # 维护批次谱系边（用于批次追溯）
+            if material_binding.batch_no:
+                await TraceabilityService().sync_binding_edge(
+                    tenant_id, material_binding.work_order_id, material_binding.binding_type, material_binding.batch_no
+                )
+
             from loguru import logger
             logger.info(
                 f"物料绑定记录已创建: {material_binding.id}, "
@@ -206,9 +213,16 @@ class MaterialBindingService(AppBaseService[MaterialBinding]):
         if not binding:
             raise NotFoundError(f"物料绑定记录不存在: {binding_id}")
 
-        # 软删除
-        binding.deleted_at = datetime.now()
-        await binding.save()
+        async with in_transaction("default"):
+            # 软删除
+            binding.deleted_at = datetime.now()
+            await binding.save()
+
+            # 维护批次谱系边（用于批次追溯）
+            if binding.batch_no:
+                await TraceabilityService().sync_binding_edge(
+                    tenant_id, binding.work_order_id, binding.binding_type, binding.batch_no
+                )
 
         # TODO: 恢复库存（根据绑定类型进行反向操作）
 
@@ -47,7 +47,7 @@ class OutsourceCollaborationService(BaseService):
         Returns:
             Dict[str, Any]: 下发结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取委外工单
             outsource_work_order = await OutsourceWorkOrder.filter(
                 tenant_id=tenant_id,
@@ -114,7 +114,7 @@ class OutsourceCollaborationService(BaseService):
         Returns:
             Dict[str, Any]: 更新结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取委外工单
             outsource_work_order = await OutsourceWorkOrder.filter(
                 tenant_id=tenant_id,
@@ -178,7 +178,7 @@ class OutsourceCollaborationService(BaseService):
         Returns:
             Dict[str, Any]: 提交结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取委外工单
             outsource_work_order = await OutsourceWorkOrder.filter(
                 tenant_id=tenant_id,
@@ -59,7 +59,7 @@ class OutsourceMaterialIssueService(AppBaseService[OutsourceMaterialIssue]):
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证委外工单是否存在
             outsource_work_order = await OutsourceWorkOrder.filter(
                 tenant_id=tenant_id,
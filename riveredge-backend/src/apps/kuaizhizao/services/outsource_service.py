@@ -63,7 +63,7 @@ class OutsourceService(AppBaseService[OutsourceOrder]):
             ValidationError: 数据验证失败
             NotFoundError: 工单或工序不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证工单是否存在
             work_order = await WorkOrder.filter(
                 tenant_id=tenant_id,
@@ -369,7 +369,7 @@ class OutsourceService(AppBaseService[OutsourceOrder]):
             NotFoundError: 委外单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             outsource_order = await OutsourceOrder.filter(
                 tenant_id=tenant_id,
                 id=outsource_order_id,
@@ -440,7 +440,7 @@ class OutsourceService(AppBaseService[OutsourceOrder]):
             NotFoundError: 委外单不存在
             BusinessLogicError: 委外单状态不允许删除
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             outsource_order = await OutsourceOrder.filter(
                 tenant_id=tenant_id,
                 id=outsource_order_id,
@@ -488,7 +488,7 @@ class OutsourceService(AppBaseService[OutsourceOrder]):
             NotFoundError: 委外单或采购入库单不存在
             BusinessLogicError: 业务逻辑错误
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             outsource_order = await OutsourceOrder.filter(
                 tenant_id=tenant_id,
                 id=outsource_order_id,
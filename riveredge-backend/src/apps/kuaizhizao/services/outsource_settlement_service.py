@@ -102,7 +102,7 @@ class OutsourceSettlementService(BaseService):
         Returns:
             Dict[str, Any]: 委外结算单
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取供应商信息
             supplier = await Supplier.filter(
                 tenant_id=tenant_id,
@@ -200,7 +200,7 @@ class OutsourceSettlementService(BaseService):
         Returns:
             Dict[str, Any]: 对账结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取供应商信息
             supplier = await Supplier.filter(
                 tenant_id=tenant_id,
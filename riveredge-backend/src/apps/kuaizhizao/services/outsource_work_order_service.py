@@ -85,7 +85,7 @@ class OutsourceWorkOrderService(AppBaseService[OutsourceWorkOrder]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "outsource_order")
         if not is_enabled:
             raise BusinessLogicError("委外工单节点未启用，无法创建委外工单")
-        async with in_transaction():
+        async with in_transaction("default"):
             # 处理委外工单编码
             code = work_order_data.code
             if not code:
@@ -266,7 +266,7 @@ class OutsourceWorkOrderService(AppBaseService[OutsourceWorkOrder]):
             NotFoundError: 委外工单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取委外工单
             outsource_work_order = await OutsourceWorkOrder.filter(
                 tenant_id=tenant_id,
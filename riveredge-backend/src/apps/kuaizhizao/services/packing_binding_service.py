@@ -64,7 +64,7 @@ class PackingBindingService(AppBaseService[PackingBinding]):
             NotFoundError: 成品入库单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取成品入库单
             receipt = await FinishedGoodsReceipt.get_or_none(
                 id=receipt_id,
@@ -172,7 +172,7 @@ class PackingBindingService(AppBaseService[PackingBinding]):
         """
         从销售出库单创建装箱绑定记录（发货时按箱登记，用于出货追溯）
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             delivery = await SalesDelivery.get_or_none(
                 id=delivery_id,
                 tenant_id=tenant_id,
@@ -414,7 +414,7 @@ class PackingBindingService(AppBaseService[PackingBinding]):
             NotFoundError: 装箱绑定记录不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取装箱绑定记录
             binding = await PackingBinding.get_or_none(
                 id=binding_id,
@@ -32,7 +32,7 @@ class ProductionPlanningService(BaseService):
 
     async def create_production_plan(self, tenant_id: int, plan_data: Any, created_by: int) -> ProductionPlanResponse:
         """手动创建生产计划"""
-        async with in_transaction():
+        async with in_transaction("default"):
             # 1. 生成编码
             plan_code = await self._generate_plan_code(tenant_id, plan_data.plan_type or "MANUAL")
             
@@ -215,7 +215,7 @@ class ProductionPlanningService(BaseService):
         from apps.kuaizhizao.services.document_push_pull_service import DocumentPushPullService
         from infra.services.business_config_service import BusinessConfigService
         
-        async with in_transaction():
+        async with in_transaction("default"):
             plan = await ProductionPlan.get_or_none(tenant_id=tenant_id, id=plan_id)
             if not plan:
                 raise NotFoundError(f"生产计划不存在: {plan_id}")
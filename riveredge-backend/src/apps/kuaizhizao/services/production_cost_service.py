@@ -22,6 +22,66 @@ from apps.kuaizhizao.models.cost_calculation import CostCalculation
 from apps.kuaizhizao.models.cost_rule import CostRule
 from apps.kuaizhizao.utils.bom_helper import get_bom_items_by_material_id, calculate_material_requirements_from_bom
 
+# TODO: 从成本规则或配置获取标准工时单价和默认单价
+DEFAULT_HOURLY_RATE = Decimal("50.00")  # 默认工时单价
+DEFAULT_UNIT_PRICE = Decimal("100.00")  # 未维护标准采购价时的默认单价
+
+
+def resolve_standard_unit_price(defaults: Optional[Dict[str, Any]]) -> Decimal:
+    """
+    从物料默认值（defaults.purchase.standard_price）解析标准单价，未维护时返回默认单价
+    """
+    purchase_defaults = (defaults or {}).get("purchase", {}) or {}
+    standard_price = purchase_defaults.get("standard_price")
+    if standard_price:
+        return Decimal(str(standard_price))
+    return DEFAULT_UNIT_PRICE
+
+
+def apply_overhead_rules(
+    rules: List[CostRule],
+    material_cost: Decimal,
+    labor_cost: Decimal,
+    quantity: Decimal,
+) -> tuple[Decimal, List[Dict[str, Any]]]:
+    """
+    按制造费用规则计算制造费用
+
+    - 按比例：材料成本 × rate（默认0.1）
+    - 按工时：加工成本 × rate（默认0.2）
+    - 按固定值：fixed_value × 数量
+
+    Returns:
+        tuple[Decimal, List[Dict[str, Any]]]: (制造费用, 费用明细)
+    """
+    total_cost = Decimal(0)
+    cost_breakdown = []
+
+    for rule in rules:
+        rule_cost = Decimal(0)
+
+        if rule.calculation_method == "按比例":
+            rate = Decimal(str(rule.rule_parameters.get("rate", 0.1))) if rule.rule_parameters else Decimal(0.1)
+            rule_cost = material_cost * rate
+        elif rule.calculation_method == "按工时":
+            rate = Decimal(str(rule.rule_parameters.get("rate", 0.2))) if rule.rule_parameters else Decimal(0.2)
+            rule_cost = labor_cost * rate
+        elif rule.calculation_method == "按固定值":
+            fixed_value = Decimal(str(rule.rule_parameters.get("fixed_value", 0))) if rule.rule_parameters else Decimal(0)
+            rule_cost = fixed_value * quantity
+
+        total_cost += rule_cost
+
+        cost_breakdown.append({
+            "rule_id": rule.id,
+            "rule_code": rule.code,
+            "rule_name": rule.name,
+            "calculation_method": rule.calculation_method,
+            "cost": float(rule_cost),
+        })
+
+    return total_cost, cost_breakdown
+
 
 class ProductionCostService:
     """
@@ -40,13 +100,16 @@ class ProductionCostService:
         quantity: Decimal,
         variant_attributes: Optional[Dict[str, Any]] = None,
         calculation_date: Optional[date] = None,
-        created_by: Optional[int] = None
+        created_by: Optional[int] = None,
+        use_standard_cost: bool = False,
+        cost_version: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         核算生产成本
         
         根据物料来源类型计算生产成本：
         - 自制件（Make）：材料成本（BOM展开）+ 加工成本（工序成本）+ 制造费用
+          use_standard_cost 时优先读取未过期的标准成本卷积结果，否则实时展开BOM计算
         - 虚拟件（Phantom）：不单独核算，成本直接计入上层物料
         - 配置件（Configure）：根据选择的变体BOM，按变体计算成本
         
@@ -57,6 +120,8 @@ class ProductionCostService:
             variant_attributes: 变体属性（配置件时需要）
             calculation_date: 核算日期
             created_by: 创建人ID
+            use_standard_cost: 是否优先使用标准成本卷积结果
+            cost_version: 标准成本版本（默认STD）
             
         Returns:
             Dict[str, Any]: 成本核算结果
@@ -79,7 +144,27 @@ class ProductionCostService:
         source_type = material.source_type or "Make"  # 默认自制件
         
         # 根据物料来源类型计算成本
-        if source_type == "Make":
+        standard_cost = None
+        if source_type == "Make" and use_standard_cost:
+            from apps.kuaizhizao.services.standard_cost_rollup_service import (
+                StandardCostRollupService,
+                DEFAULT_COST_VERSION,
+            )
+            standard_cost = await StandardCostRollupService().get_standard_cost(
+                tenant_id=tenant_id,
+                material_id=material.id,
+                cost_version=cost_version or DEFAULT_COST_VERSION,
+            )
+
+        if standard_cost:
+            # 自制件成本核算：单行读取标准成本卷积结果
+            result = self._build_cost_from_standard(
+                material=material,
+                standard_cost=standard_cost,
+                quantity=quantity,
+                calculation_date=calculation_date or date.today()
+            )
+        elif source_type == "Make":
             # 自制件成本核算
             result = await self._calculate_make_cost(
                 tenant_id=tenant_id,
@@ -114,6 +199,52 @@ class ProductionCostService:
         
         return result
 
+    def _build_cost_from_standard(
+        self,
+        material: Material,
+        standard_cost: Any,
+        quantity: Decimal,
+        calculation_date: date
+    ) -> Dict[str, Any]:
+        """
+        根据标准成本卷积结果构造成本核算结果
+        
+        Args:
+            material: 物料对象
+            standard_cost: 标准成本卷积记录（StandardCostRollup）
+            quantity: 数量
+            calculation_date: 核算日期
+            
+        Returns:
+            Dict[str, Any]: 成本核算结果
+        """
+        material_cost = standard_cost.material_cost * quantity
+        labor_cost = standard_cost.labor_cost * quantity
+        manufacturing_cost = standard_cost.manufacturing_cost * quantity
+        total_cost = material_cost + labor_cost + manufacturing_cost
+        details = standard_cost.cost_details or {}
+        
+        return {
+            "material_id": material.id,
+            "material_code": material.main_code,
+            "material_name": material.name,
+            "source_type": material.source_type or "Make",
+            "quantity": quantity,
+            "material_cost": material_cost,
+            "labor_cost": labor_cost,
+            "manufacturing_cost": manufacturing_cost,
+            "total_cost": total_cost,
+            "unit_cost": standard_cost.total_cost,
+            "cost_details": {
+                "material_cost_breakdown": details.get("components", []),
+                "labor_cost_breakdown": details.get("operations", []),
+                "manufacturing_cost_breakdown": details.get("overheads", []),
+                "cost_version": standard_cost.cost_version,
+                "calculated_at": standard_cost.calculated_at.isoformat() if standard_cost.calculated_at else None,
+            },
+            "calculation_date": calculation_date,
+        }
+
     async def _calculate_make_cost(
         self,
         tenant_id: int,
@@ -521,15 +652,15 @@ class ProductionCostService:
         total_cost = Decimal(0)
         cost_breakdown = []
         
-        # 获取工艺路线
-        process_route = material.process_route
-        if not process_route:
+        # 获取工艺路线（material.process_route 为未预取的关联，直接使用外键ID）
+        process_route_id = material.process_route_id
+        if not process_route_id:
             # 如果没有工艺路线，返回0
             return Decimal(0), []
         
         process_route_obj = await ProcessRoute.filter(
             tenant_id=tenant_id,
-            id=process_route.id,
+            id=process_route_id,
             deleted_at__isnull=True,
             is_active=True
         ).first()
@@ -540,8 +671,7 @@ class ProductionCostService:
         # 获取工序序列
         operation_sequence = process_route_obj.operation_sequence or []
         
-        # TODO: 从成本规则或配置获取标准工时和工时单价
-        standard_hourly_rate = Decimal(50.00)  # 默认工时单价
+        standard_hourly_rate = DEFAULT_HOURLY_RATE
         
         for op_data in operation_sequence:
             op_id = op_data.get("operation_id")
@@ -600,9 +730,6 @@ class ProductionCostService:
         Returns:
             tuple[Decimal, List[Dict[str, Any]]]: (制造费用, 费用明细)
         """
-        total_cost = Decimal(0)
-        cost_breakdown = []
-        
         # 获取制造费用规则
         rules = await CostRule.filter(
             tenant_id=tenant_id,
@@ -611,33 +738,7 @@ class ProductionCostService:
             deleted_at__isnull=True
         ).all()
         
-        for rule in rules:
-            rule_cost = Decimal(0)
-            
-            if rule.calculation_method == "按比例":
-                # 按材料成本比例
-                rate = Decimal(str(rule.rule_parameters.get("rate", 0.1))) if rule.rule_parameters else Decimal(0.1)
-                rule_cost = material_cost * rate
-            elif rule.calculation_method == "按工时":
-                # 按人工成本比例
-                rate = Decimal(str(rule.rule_parameters.get("rate", 0.2))) if rule.rule_parameters else Decimal(0.2)
-                rule_cost = labor_cost * rate
-            elif rule.calculation_method == "按固定值":
-                # 固定值
-                fixed_value = Decimal(str(rule.rule_parameters.get("fixed_value", 0))) if rule.rule_parameters else Decimal(0)
-                rule_cost = fixed_value * quantity
-            
-            total_cost += rule_cost
-            
-            cost_breakdown.append({
-                "rule_id": rule.id,
-                "rule_code": rule.code,
-                "rule_name": rule.name,
-                "calculation_method": rule.calculation_method,
-                "cost": float(rule_cost),
-            })
-        
-        return total_cost, cost_breakdown
+        return apply_overhead_rules(rules, material_cost, labor_cost, quantity)
 
     async def _get_material_unit_price(
         self,
@@ -656,14 +757,5 @@ class ProductionCostService:
         Returns:
             Decimal: 单价
         """
-        # TODO: 从物料默认值（defaults.purchase.standard_price）或价格表获取
-        # 这里简化处理，使用默认值
-        defaults = material.defaults or {}
-        purchase_defaults = defaults.get("purchase", {})
-        standard_price = purchase_defaults.get("standard_price")
-        
-        if standard_price:
-            return Decimal(str(standard_price))
-        
-        # 默认单价
-        return Decimal(100.00)
+        # TODO: 从价格表获取
+        return resolve_standard_unit_price(material.defaults)
@@ -58,7 +58,7 @@ class PurchaseRequisitionService(AppBaseService[PurchaseRequisition]):
         if not is_enabled:
             raise BusinessLogicError("采购申请模块未启用，无法创建")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             if not data.requisition_code:
                 data.requisition_code = await self._generate_requisition_code(tenant_id)
 
@@ -54,7 +54,7 @@ class PurchaseService(AppBaseService[PurchaseOrder]):
         Returns:
             PurchaseOrderResponse: 创建的订单信息
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成订单编码
             if not order_data.order_code:
                 today = datetime.now().strftime("%Y%m%d")
@@ -241,7 +241,7 @@ class PurchaseService(AppBaseService[PurchaseOrder]):
         Returns:
             PurchaseOrderResponse: 更新后的订单信息
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await PurchaseOrder.get_or_none(tenant_id=tenant_id, id=order_id)
             if not order:
                 raise NotFoundError(f"采购订单不存在: {order_id}")
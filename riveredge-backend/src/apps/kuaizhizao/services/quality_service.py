@@ -40,7 +40,7 @@ class IncomingInspectionService(AppBaseService[IncomingInspection]):
 
     async def create_incoming_inspection(self, tenant_id: int, inspection_data: IncomingInspectionCreate, created_by: int) -> IncomingInspectionResponse:
         """创建来料检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "INCOMING_INSPECTION_CODE", prefix=f"IQ{today}")
@@ -102,7 +102,7 @@ class IncomingInspectionService(AppBaseService[IncomingInspection]):
 
     async def update_incoming_inspection(self, tenant_id: int, inspection_id: int, inspection_data: IncomingInspectionUpdate, updated_by: int) -> IncomingInspectionResponse:
         """更新来料检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_incoming_inspection_by_id(tenant_id, inspection_id)
             update_data = inspection_data.model_dump(exclude_unset=True, exclude={'updated_by'})
             update_data['updated_by'] = updated_by
@@ -113,7 +113,7 @@ class IncomingInspectionService(AppBaseService[IncomingInspection]):
 
     async def conduct_inspection(self, tenant_id: int, inspection_id: int, inspection_data: dict, inspected_by: int) -> IncomingInspectionResponse:
         """执行检验"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_incoming_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.status != '待检验':
@@ -148,7 +148,7 @@ class IncomingInspectionService(AppBaseService[IncomingInspection]):
 
     async def approve_inspection(self, tenant_id: int, inspection_id: int, approved_by: int, rejection_reason: Optional[str] = None) -> IncomingInspectionResponse:
         """审核检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_incoming_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.review_status != '待审核':
@@ -186,7 +186,7 @@ class IncomingInspectionService(AppBaseService[IncomingInspection]):
         from apps.kuaizhizao.models.purchase_receipt import PurchaseReceipt
         from apps.kuaizhizao.models.purchase_receipt_item import PurchaseReceiptItem
         
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取采购入库单
             receipt = await PurchaseReceipt.get_or_none(tenant_id=tenant_id, id=purchase_receipt_id)
             if not receipt:
@@ -481,7 +481,7 @@ class ProcessInspectionService(AppBaseService[ProcessInspection]):
 
     async def create_process_inspection(self, tenant_id: int, inspection_data: ProcessInspectionCreate, created_by: int) -> ProcessInspectionResponse:
         """创建过程检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "PROCESS_INSPECTION_CODE", prefix=f"PQ{today}")
@@ -532,7 +532,7 @@ class ProcessInspectionService(AppBaseService[ProcessInspection]):
 
     async def conduct_inspection(self, tenant_id: int, inspection_id: int, inspection_data: dict, inspected_by: int) -> ProcessInspectionResponse:
         """执行过程检验"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_process_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.status != '待检验':
@@ -579,7 +579,7 @@ class ProcessInspectionService(AppBaseService[ProcessInspection]):
         self, tenant_id: int, inspection_id: int, approved_by: int, rejection_reason: Optional[str] = None
     ) -> ProcessInspectionResponse:
         """审核工序检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_process_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.review_status != '待审核':
@@ -653,7 +653,7 @@ class ProcessInspectionService(AppBaseService[ProcessInspection]):
         from apps.kuaizhizao.models.work_order import WorkOrder
         from apps.master_data.models.routing import RoutingOperation
         
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取工单
             work_order = await WorkOrder.get_or_none(tenant_id=tenant_id, id=work_order_id)
             if not work_order:
@@ -900,7 +900,7 @@ class FinishedGoodsInspectionService(AppBaseService[FinishedGoodsInspection]):
 
     async def create_finished_goods_inspection(self, tenant_id: int, inspection_data: FinishedGoodsInspectionCreate, created_by: int) -> FinishedGoodsInspectionResponse:
         """创建成品检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "FINISHED_GOODS_INSPECTION_CODE", prefix=f"FQ{today}")
@@ -951,7 +951,7 @@ class FinishedGoodsInspectionService(AppBaseService[FinishedGoodsInspection]):
 
     async def conduct_inspection(self, tenant_id: int, inspection_id: int, inspection_data: dict, inspected_by: int) -> FinishedGoodsInspectionResponse:
         """执行成品检验"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_finished_goods_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.status != '待检验':
@@ -988,7 +988,7 @@ class FinishedGoodsInspectionService(AppBaseService[FinishedGoodsInspection]):
         self, tenant_id: int, inspection_id: int, approved_by: int, rejection_reason: Optional[str] = None
     ) -> FinishedGoodsInspectionResponse:
         """审核成品检验单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_finished_goods_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.review_status != '待审核':
@@ -1013,7 +1013,7 @@ class FinishedGoodsInspectionService(AppBaseService[FinishedGoodsInspection]):
 
     async def issue_certificate(self, tenant_id: int, inspection_id: int, certificate_number: str, issued_by: int) -> FinishedGoodsInspectionResponse:
         """出具放行证书"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inspection = await self.get_finished_goods_inspection_by_id(tenant_id, inspection_id)
 
             if inspection.quality_status != '合格':
@@ -1056,7 +1056,7 @@ class FinishedGoodsInspectionService(AppBaseService[FinishedGoodsInspection]):
         """
         from apps.kuaizhizao.models.work_order import WorkOrder
         
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取工单
             work_order = await WorkOrder.get_or_none(tenant_id=tenant_id, id=work_order_id)
             if not work_order:
@@ -54,7 +54,7 @@ class QualityStandardService(AppBaseService[QualityStandard]):
         Returns:
             QualityStandardResponse: 创建的质检标准
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 如果没有提供标准编码，自动生成
             if not standard_data.standard_code:
                 code_rule_service = CodeRuleService()
@@ -184,7 +184,7 @@ class QualityStandardService(AppBaseService[QualityStandard]):
         Returns:
             QualityStandardResponse: 更新后的质检标准
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             standard = await QualityStandard.filter(
                 tenant_id=tenant_id,
                 id=standard_id,
@@ -218,7 +218,7 @@ class QualityStandardService(AppBaseService[QualityStandard]):
             tenant_id: 组织ID
             standard_id: 标准ID
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             standard = await QualityStandard.filter(
                 tenant_id=tenant_id,
                 id=standard_id,
@@ -195,7 +195,7 @@ class QuotationService:
             pass
         # #endregion
 
-        async with in_transaction():
+        async with in_transaction("default"):
             q_dict = quotation_data.model_dump(exclude={"items"})
             q_dict["created_by"] = created_by
             q_dict["updated_by"] = created_by
@@ -303,7 +303,7 @@ class QuotationService:
                 f"只能更新草稿状态的报价单，当前状态: {quotation.status}"
             )
 
-        async with in_transaction():
+        async with in_transaction("default"):
             upd = quotation_data.model_dump(exclude_unset=True, exclude={"items"})
             upd["updated_by"] = updated_by
             if upd:
@@ -438,7 +438,7 @@ class QuotationService:
             created_by=created_by,
         )
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await Quotation.filter(id=quotation_id).update(
                 status="已转订单",
                 sales_order_id=sales_order.id,
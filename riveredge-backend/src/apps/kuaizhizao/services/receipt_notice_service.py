@@ -45,7 +45,7 @@ class ReceiptNoticeService(AppBaseService[ReceiptNotice]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "receipt_notice")
         if not is_enabled:
             raise BusinessLogicError("收货通知单节点未启用，无法创建收货通知单")
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "RECEIPT_NOTICE_CODE", prefix=f"RN{today}")
 
@@ -130,7 +130,7 @@ class ReceiptNoticeService(AppBaseService[ReceiptNotice]):
         if notice.status != "待收货":
             raise BusinessLogicError("只能更新待收货状态的收货通知单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             dump = notice_data.model_dump(exclude_unset=True, exclude={"notice_code"})
             dump["updated_by"] = updated_by
             await ReceiptNotice.filter(tenant_id=tenant_id, id=notice_id).update(**dump)
@@ -52,7 +52,7 @@ class ReplenishmentSuggestionService(AppBaseService[ReplenishmentSuggestion]):
         Returns:
             List[ReplenishmentSuggestionResponse]: 生成的补货建议列表
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取待处理的低库存预警
             if alert_ids:
                 alerts = await InventoryAlert.filter(
@@ -233,7 +233,7 @@ class ReplenishmentSuggestionService(AppBaseService[ReplenishmentSuggestion]):
             NotFoundError: 补货建议不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取补货建议
             suggestion = await ReplenishmentSuggestion.get_or_none(
                 id=suggestion_id,
@@ -14,6 +14,7 @@ from decimal import Decimal
 from apps.base_service import AppBaseService
 from apps.kuaizhizao.utils.inventory_helper import get_material_available_quantity, get_material_inventory_info
 from infra.exceptions.exceptions import NotFoundError, ValidationError
+from infra.infrastructure.database.db_router import replica_read
 from loguru import logger
 
 
@@ -24,6 +25,7 @@ class ReportService:
     处理各类报表分析相关的业务逻辑。
     """
 
+    @replica_read
     async def get_inventory_report(
         self,
         tenant_id: int,
@@ -224,6 +226,7 @@ class ReportService:
             "items": [],
         }
 
+    @replica_read
     async def get_production_report(
         self,
         tenant_id: int,
@@ -451,6 +454,7 @@ class ReportService:
             "items": [],
         }
 
+    @replica_read
     async def get_quality_report(
         self,
         tenant_id: int,
@@ -673,6 +677,7 @@ class ReportService:
         }
 
 
+    @replica_read
     async def query_batch_inventory(
         self,
         tenant_id: int,
@@ -10,9 +10,10 @@ Date: 2025-01-01
 import uuid
 import math
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Dict, Any, Tuple
 from decimal import Decimal
 
+from tortoise.exceptions import IntegrityError
 from tortoise.queryset import Q
 from tortoise.transactions import in_transaction
 from loguru import logger
@@ -23,6 +24,7 @@ from apps.kuaizhizao.models.reporting_record import ReportingRecord
 from apps.kuaizhizao.models.scrap_record import ScrapRecord
 from apps.kuaizhizao.models.defect_record import DefectRecord
 from apps.kuaizhizao.services.rework_order_service import ReworkOrderService
+from apps.kuaizhizao.services.reporting_statistics_service import ReportingStatisticsService
 from apps.kuaizhizao.schemas.rework_order import ReworkOrderCreate
 from apps.kuaizhizao.schemas.reporting_record import (
     ReportingRecordCreate,
@@ -74,12 +76,46 @@ class ReportingService(AppBaseService[ReportingRecord]):
             ValidationError: 数据验证失败
             NotFoundError: 工单不存在
         """
-        async with in_transaction():
-            # 验证工单是否存在且状态正确
-            work_order = await WorkOrder.get_or_none(
+        # 幂等：相同幂等键的报工记录已存在时直接返回，避免终端重试导致重复报工
+        if reporting_data.idempotency_key:
+            existing = await ReportingRecord.get_or_none(
+                tenant_id=tenant_id,
+                idempotency_key=reporting_data.idempotency_key,
+            )
+            if existing:
+                return ReportingRecordResponse.model_validate(existing)
+
+        try:
+            response = await self._create_reporting_record(tenant_id, reporting_data, reported_by)
+        except IntegrityError:
+            # 并发提交相同幂等键时，唯一约束兜底：返回先写入的记录
+            if not reporting_data.idempotency_key:
+                raise
+            existing = await ReportingRecord.get_or_none(
+                tenant_id=tenant_id,
+                idempotency_key=reporting_data.idempotency_key,
+            )
+            if not existing:
+                raise
+            return ReportingRecordResponse.model_validate(existing)
+
+        # 补报历史日期时刷新报工日汇总（事务提交后执行，刷新失败不影响已提交的报工）
+        await ReportingStatisticsService().refresh_for_reported_at(tenant_id, reporting_data.reported_at)
+        return response
+
+    async def _create_reporting_record(
+        self,
+        tenant_id: int,
+        reporting_data: ReportingRecordCreate,
+        reported_by: int
+    ) -> ReportingRecordResponse:
+        """创建报工记录（事务内锁定工单与工单工序后校验并累计进度）"""
+        async with in_transaction("default") as conn:
+            # 验证工单是否存在且状态正确（行锁，避免并发报工覆盖进度）
+            work_order = await WorkOrder.filter(
                 id=reporting_data.work_order_id,
                 tenant_id=tenant_id
-            )
+            ).select_for_update().using_db(conn).first()
 
             if not work_order:
                 raise NotFoundError(f"工单不存在: {reporting_data.work_order_id}")
@@ -92,63 +128,31 @@ class ReportingService(AppBaseService[ReportingRecord]):
                 raise ValidationError("只能对已下达或进行中的工单进行报工")
 
             # 获取工单工序信息（用于校验跳转规则和报工类型）
-            work_order_operation = await WorkOrderOperation.get_or_none(
+            work_order_operation = await WorkOrderOperation.filter(
                 tenant_id=tenant_id,
                 work_order_id=reporting_data.work_order_id,
                 operation_id=reporting_data.operation_id,
-
-            )
+                deleted_at__isnull=True,
+            ).select_for_update().using_db(conn).first()
 
             if not work_order_operation:
                 raise NotFoundError(f"工单工序不存在: 工单ID={reporting_data.work_order_id}, 工序ID={reporting_data.operation_id}")
 
             # 工序跳转规则校验（核心功能，新增）
-            # 优先使用工单级别的跳转控制，如果没有则使用工序级别的
-            allow_jump = work_order.allow_operation_jump if hasattr(work_order, 'allow_operation_jump') else work_order_operation.allow_jump
-            
-            if not allow_jump:
-                # 不允许跳转：检查前序工序的报工数量
-                previous_operations = await WorkOrderOperation.filter(
+            previous_operation = None
+            if not self._resolve_allow_jump(work_order, work_order_operation):
+                # 不允许跳转：检查前序工序的报工数量（取sequence最大的前序工序）
+                previous_operation = await WorkOrderOperation.filter(
                     tenant_id=tenant_id,
                     work_order_id=reporting_data.work_order_id,
                     sequence__lt=work_order_operation.sequence,
-
-                ).order_by('sequence').all()
-
-                if previous_operations:
-                    # 获取前一道工序（sequence最大的前序工序）
-                    previous_operation = previous_operations[-1]
-                    
-                    # 检查前序工序的报工数量
-                    previous_completed = Decimal(str(previous_operation.completed_quantity or 0))
-                    current_completed = Decimal(str(work_order_operation.completed_quantity or 0))
-                    reported_quantity = Decimal(str(reporting_data.reported_quantity))
-                    new_total = current_completed + reported_quantity
-                    
-                    # 下一道工序的报工数量不可超过上一道工序
-                    if new_total > previous_completed:
-                        raise BusinessLogicError(
-                            f"工序跳转规则：当前工序的累计报工数量（{new_total}）不能超过前序工序 '{previous_operation.operation_name}' 的报工数量（{previous_completed}）"
-                        )
+                    deleted_at__isnull=True,
+                ).order_by('-sequence').using_db(conn).first()
+            self._check_operation_jump(work_order_operation, previous_operation, reporting_data.reported_quantity)
 
             # 根据报工类型验证数据（核心功能，新增）
             reporting_type = work_order_operation.reporting_type or "quantity"
-            
-            if reporting_type == "status":
-                # 按状态报工：不需要数量，只需要状态
-                # 对于按状态报工，reported_quantity应该为0或1（0表示未完成，1表示完成）
-                if reporting_data.reported_quantity not in [0, 1]:
-                    raise ValidationError("按状态报工模式下，报工数量只能是0（未完成）或1（完成）")
-                # 按状态报工不需要合格/不合格数量
-                if reporting_data.qualified_quantity != 0 or reporting_data.unqualified_quantity != 0:
-                    logger.warning("按状态报工模式下，合格数量和不合格数量将被忽略")
-            else:
-                # 按数量报工：需要验证数量合理性
-                if reporting_data.reported_quantity <= 0:
-                    raise ValidationError("报工数量必须大于0")
-
-                if reporting_data.qualified_quantity + reporting_data.unqualified_quantity != reporting_data.reported_quantity:
-                    raise ValidationError("合格数量 + 不合格数量必须等于报工数量")
+            self._check_reporting_quantities(reporting_type, reporting_data)
 
             # 检查是否开启自动审核
             from infra.services.business_config_service import BusinessConfigService
@@ -190,53 +194,21 @@ class ReportingService(AppBaseService[ReportingRecord]):
                 approved_at=approved_at,
                 approved_by=approved_by,
                 approved_by_name=approved_by_name,
+                idempotency_key=reporting_data.idempotency_key,
             )
 
             # 更新工单工序状态和进度（核心功能，新增）
-            if work_order_operation.status == 'pending':
-                work_order_operation.status = 'in_progress'
-                work_order_operation.actual_start_date = work_order_operation.actual_start_date or datetime.now()
-            
-            # 更新工序完成数量
-            work_order_operation.completed_quantity = (work_order_operation.completed_quantity or Decimal('0')) + reporting_data.reported_quantity
-            work_order_operation.qualified_quantity = (work_order_operation.qualified_quantity or Decimal('0')) + reporting_data.qualified_quantity
-            work_order_operation.unqualified_quantity = (work_order_operation.unqualified_quantity or Decimal('0')) + reporting_data.unqualified_quantity
-            
-            # 检查工序是否完成（按数量报工：完成数量>=计划数量，按状态报工：reported_quantity=1）
-            if reporting_type == "status":
-                # 按状态报工：reported_quantity=1表示完成
-                if reporting_data.reported_quantity == 1:
-                    work_order_operation.status = 'completed'
-                    work_order_operation.actual_end_date = datetime.now()
-            else:
-                # 按数量报工：完成数量>=计划数量（工单数量）
-                if work_order_operation.completed_quantity >= work_order.quantity:
-                    work_order_operation.status = 'completed'
-                    work_order_operation.actual_end_date = datetime.now()
+            self._apply_reporting_to_operation(work_order_operation, work_order, reporting_type, reporting_data)
             
             await work_order_operation.save()
 
-            # 更新工单状态为进行中（如果是从released变为in_progress）
-            if work_order.status == 'released':
-                work_order.status = 'in_progress'
-                work_order.actual_start_date = work_order.actual_start_date or datetime.now()
-            
-            # 更新工单完成数量
-            work_order.completed_quantity = (work_order.completed_quantity or Decimal('0')) + reporting_data.reported_quantity
-            work_order.qualified_quantity = (work_order.qualified_quantity or Decimal('0')) + reporting_data.qualified_quantity
-            work_order.unqualified_quantity = (work_order.unqualified_quantity or Decimal('0')) + reporting_data.unqualified_quantity
-            
             # 检查工单是否完成（所有工序都完成）
             all_operations = await WorkOrderOperation.filter(
                 tenant_id=tenant_id,
                 work_order_id=work_order.id,
-
-            ).all()
-            
-            all_completed = all(op.status == 'completed' for op in all_operations)
-            if all_completed and work_order.status != 'completed':
-                work_order.status = 'completed'
-                work_order.actual_end_date = work_order.actual_end_date or datetime.now()
+                deleted_at__isnull=True,
+            ).using_db(conn).all()
+            self._apply_reporting_to_work_order(work_order, [reporting_data], all_operations)
             
             await work_order.save()
 
@@ -275,6 +247,419 @@ class ReportingService(AppBaseService[ReportingRecord]):
 
             return ReportingRecordResponse.model_validate(reporting_record)
 
+    async def batch_create_reporting_records(
+        self,
+        tenant_id: int,
+        records: List[ReportingRecordCreate],
+        reported_by: int
+    ) -> Dict[str, Any]:
+        """
+        批量创建报工记录
+
+        面向产线终端、PLC网关班次结束时的集中上报。与逐条调用 create_reporting_record 相比：
+        - 按工单分组，每个工单一个事务：锁定工单与工单工序后，工序跳转规则基于同一份内存快照校验
+          （同批次内前序工序的报工会计入后续工序的校验）
+        - 报工记录使用 bulk_create 批量插入，工单/工序进度每个工单只写一次
+        - 逐条返回结果，单条校验失败不影响同工单其他记录
+        - 支持幂等键：已存在的幂等键直接返回原记录ID，重试安全
+
+        Args:
+            tenant_id: 组织ID
+            records: 报工创建数据列表
+            reported_by: 报工人ID
+
+        Returns:
+            Dict: 批量结果（total, success_count, failed_count, duplicate_count, results）
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+
+        # 1. 幂等键去重（一次查询）
+        idempotency_keys = [r.idempotency_key for r in records if r.idempotency_key]
+        existing_keys: Dict[str, int] = {}
+        if idempotency_keys:
+            existing_rows = await ReportingRecord.filter(
+                tenant_id=tenant_id,
+                idempotency_key__in=list(set(idempotency_keys)),
+            ).values("id", "idempotency_key")
+            existing_keys = {row["idempotency_key"]: row["id"] for row in existing_rows}
+
+        groups: Dict[int, List[Tuple[int, ReportingRecordCreate]]] = {}
+        seen_keys: Dict[str, int] = {}
+        for index, reporting_data in enumerate(records):
+            key = reporting_data.idempotency_key
+            if key and key in existing_keys:
+                results[index] = self._batch_result(index, reporting_data, record_id=existing_keys[key], duplicate=True)
+                continue
+            if key and key in seen_keys:
+                results[index] = self._batch_result(
+                    index, reporting_data, error=f"幂等键与第 {seen_keys[key]} 条记录重复"
+                )
+                continue
+            if key:
+                seen_keys[key] = index
+            groups.setdefault(reporting_data.work_order_id, []).append((index, reporting_data))
+
+        if groups:
+            # 2. 自动审核配置只读取一次
+            from infra.services.business_config_service import BusinessConfigService
+            biz_config = await BusinessConfigService().get_business_config(tenant_id)
+            auto_approve = biz_config.get("parameters", {}).get("reporting", {}).get("auto_approve", False)
+
+            # 3. 按工单校验并写入
+            post_actions: List[Tuple[ReportingRecord, WorkOrderOperation, WorkOrder]] = []
+            for work_order_id, items in groups.items():
+                group_results, created = await self._ingest_work_order_reports(
+                    tenant_id=tenant_id,
+                    work_order_id=work_order_id,
+                    items=items,
+                    auto_approve=auto_approve,
+                    reported_by=reported_by,
+                )
+                results.update(group_results)
+                post_actions.extend(created)
+
+            # 4. 事务提交后的倒冲与模具使用次数累计（失败仅记录日志，与单条报工一致）
+            for record, operation, work_order in post_actions:
+                try:
+                    from apps.kuaizhizao.services.backflush_service import BackflushService
+                    await BackflushService().backflush_materials(
+                        tenant_id=tenant_id,
+                        work_order_id=work_order.id,
+                        report_id=record.id,
+                        report_quantity=float(record.reported_quantity),
+                        operation_id=record.operation_id,
+                        operation_code=record.operation_code,
+                        processed_by=reported_by,
+                    )
+                except Exception as backflush_err:
+                    logger.warning(
+                        f"批量报工成功但物料倒冲失败：工单 {work_order.code}，报工ID {record.id}，错误: {backflush_err}"
+                    )
+                if record.approved_at is not None:
+                    await self._create_mold_usage_from_reporting(
+                        tenant_id=tenant_id,
+                        work_order_operation=operation,
+                        work_order=work_order,
+                        qualified_quantity=float(record.qualified_quantity),
+                        reporting_record_id=record.id,
+                        operator_name=record.worker_name,
+                    )
+
+            # 补报历史日期时刷新报工日汇总
+            await ReportingStatisticsService().refresh_for_reported_at(
+                tenant_id, *[record.reported_at for record, _, _ in post_actions]
+            )
+
+        ordered = [results[i] for i in range(len(records))]
+        success_count = sum(1 for r in ordered if r["success"])
+        duplicate_count = sum(1 for r in ordered if r["duplicate"])
+        logger.info(
+            f"批量报工完成：共 {len(records)} 条，成功 {success_count} 条（幂等命中 {duplicate_count} 条），"
+            f"失败 {len(records) - success_count} 条，涉及工单 {len(groups)} 个"
+        )
+        return {
+            "total": len(records),
+            "success_count": success_count,
+            "failed_count": len(records) - success_count,
+            "duplicate_count": duplicate_count,
+            "results": ordered,
+        }
+
+    async def _ingest_work_order_reports(
+        self,
+        tenant_id: int,
+        work_order_id: int,
+        items: List[Tuple[int, ReportingRecordCreate]],
+        auto_approve: bool,
+        reported_by: int,
+    ) -> Tuple[Dict[int, Dict[str, Any]], List[Tuple[ReportingRecord, WorkOrderOperation, WorkOrder]]]:
+        """
+        批量报工：校验并写入单个工单的报工记录
+
+        在一个事务内锁定工单与工单工序（select_for_update），基于锁定后的快照在内存中逐条校验、累计进度，
+        再批量插入报工记录并保存工序与工单；并发报工按工单串行，进度不会互相覆盖。
+
+        Returns:
+            Tuple: (逐条结果, 已创建的(报工记录, 工单工序, 工单)列表)
+        """
+        try:
+            async with in_transaction("default") as conn:
+                work_order = await WorkOrder.filter(
+                    tenant_id=tenant_id, id=work_order_id
+                ).select_for_update().using_db(conn).first()
+                operations = await WorkOrderOperation.filter(
+                    tenant_id=tenant_id,
+                    work_order_id=work_order_id,
+                    deleted_at__isnull=True,
+                ).order_by("sequence").select_for_update().using_db(conn)
+
+                results, accepted = self._validate_work_order_reports(
+                    tenant_id, work_order, work_order_id, operations, items, auto_approve, reported_by
+                )
+                if not accepted:
+                    return results, []
+
+                await ReportingRecord.bulk_create([record for _, _, record, _ in accepted], using_db=conn)
+                touched_operations = {operation.id: operation for _, _, _, operation in accepted}
+                for operation in touched_operations.values():
+                    await operation.save(update_fields=[
+                        "status", "actual_start_date", "actual_end_date",
+                        "completed_quantity", "qualified_quantity", "unqualified_quantity",
+                    ], using_db=conn)
+                self._apply_reporting_to_work_order(
+                    work_order, [data for _, data, _, _ in accepted], operations
+                )
+                await work_order.save(using_db=conn)
+        except IntegrityError as e:
+            # 并发提交了相同幂等键：已写入的按幂等命中返回，其余记录整组失败，由终端重试
+            logger.warning(f"批量报工幂等键冲突：工单ID {work_order_id}，错误: {e}")
+            keys = [data.idempotency_key for _, data in items if data.idempotency_key]
+            existing_keys = dict(await ReportingRecord.filter(
+                tenant_id=tenant_id, idempotency_key__in=keys,
+            ).values_list("idempotency_key", "id")) if keys else {}
+            results = {}
+            for index, reporting_data in items:
+                record_id = existing_keys.get(reporting_data.idempotency_key)
+                if record_id is not None:
+                    results[index] = self._batch_result(index, reporting_data, record_id=record_id, duplicate=True)
+                else:
+                    results[index] = self._batch_result(index, reporting_data, error=f"报工写入冲突，请重试: {e}")
+            return results, []
+        except Exception as e:
+            logger.error(f"批量报工写入失败：工单ID {work_order_id}，错误: {e}")
+            return {
+                index: self._batch_result(index, reporting_data, error=f"报工写入失败: {e}")
+                for index, reporting_data in items
+            }, []
+
+        # bulk_create 不回填自增ID，按 uuid 一次性回查
+        id_map = dict(await ReportingRecord.filter(
+            tenant_id=tenant_id,
+            uuid__in=[record.uuid for _, _, record, _ in accepted],
+        ).values_list("uuid", "id"))
+
+        created = []
+        for index, reporting_data, record, operation in accepted:
+            record.id = id_map.get(record.uuid)
+            results[index] = self._batch_result(index, reporting_data, record_id=record.id)
+            created.append((record, operation, work_order))
+        return results, created
+
+    def _validate_work_order_reports(
+        self,
+        tenant_id: int,
+        work_order: Optional[WorkOrder],
+        work_order_id: int,
+        operations: List[WorkOrderOperation],
+        items: List[Tuple[int, ReportingRecordCreate]],
+        auto_approve: bool,
+        reported_by: int,
+    ) -> Tuple[Dict[int, Dict[str, Any]], List[Tuple[int, ReportingRecordCreate, ReportingRecord, WorkOrderOperation]]]:
+        """
+        批量报工：基于工序快照逐条校验并构建报工记录，同时在快照上累计工序进度（不写库）
+
+        Returns:
+            Tuple: (校验失败的逐条结果, 通过校验的(序号, 报工数据, 报工记录, 工单工序)列表)
+        """
+        results: Dict[int, Dict[str, Any]] = {}
+
+        # 工单级校验失败时，整组记录失败
+        group_error = None
+        if not work_order:
+            group_error = f"工单不存在: {work_order_id}"
+        elif work_order.is_frozen:
+            group_error = f"工单已冻结，不能报工。冻结原因：{work_order.freeze_reason or '无'}"
+        elif work_order.status not in ['released', 'in_progress']:
+            group_error = "只能对已下达或进行中的工单进行报工"
+        if group_error:
+            for index, reporting_data in items:
+                results[index] = self._batch_result(index, reporting_data, error=group_error)
+            return results, []
+
+        operation_map = {op.operation_id: op for op in operations}
+        accepted: List[Tuple[int, ReportingRecordCreate, ReportingRecord, WorkOrderOperation]] = []
+
+        for index, reporting_data in items:
+            work_order_operation = operation_map.get(reporting_data.operation_id)
+            try:
+                if not work_order_operation:
+                    raise NotFoundError(
+                        f"工单工序不存在: 工单ID={work_order_id}, 工序ID={reporting_data.operation_id}"
+                    )
+
+                previous_operation = None
+                if not self._resolve_allow_jump(work_order, work_order_operation):
+                    previous_operations = [op for op in operations if op.sequence < work_order_operation.sequence]
+                    previous_operation = previous_operations[-1] if previous_operations else None
+                self._check_operation_jump(work_order_operation, previous_operation, reporting_data.reported_quantity)
+
+                reporting_type = work_order_operation.reporting_type or "quantity"
+                self._check_reporting_quantities(reporting_type, reporting_data)
+            except (NotFoundError, ValidationError, BusinessLogicError) as e:
+                results[index] = self._batch_result(index, reporting_data, error=str(e))
+                continue
+
+            status = reporting_data.status
+            approved_at = None
+            approved_by = None
+            approved_by_name = None
+            if auto_approve and status == 'pending':
+                status = 'approved'
+                approved_at = datetime.now()
+                approved_by = reported_by
+                approved_by_name = reporting_data.worker_name or "自动审核"
+
+            record = ReportingRecord(
+                tenant_id=tenant_id,
+                uuid=str(uuid.uuid4()),
+                work_order_id=reporting_data.work_order_id,
+                work_order_code=reporting_data.work_order_code,
+                work_order_name=reporting_data.work_order_name,
+                operation_id=reporting_data.operation_id,
+                operation_code=reporting_data.operation_code,
+                operation_name=reporting_data.operation_name,
+                worker_id=reporting_data.worker_id,
+                worker_name=reporting_data.worker_name,
+                reported_quantity=reporting_data.reported_quantity,
+                qualified_quantity=reporting_data.qualified_quantity,
+                unqualified_quantity=reporting_data.unqualified_quantity,
+                work_hours=reporting_data.work_hours,
+                status=status,
+                reported_at=reporting_data.reported_at,
+                remarks=reporting_data.remarks,
+                device_info=reporting_data.device_info,
+                sop_parameters=reporting_data.sop_parameters,
+                approved_at=approved_at,
+                approved_by=approved_by,
+                approved_by_name=approved_by_name,
+                idempotency_key=reporting_data.idempotency_key,
+            )
+
+            # 在快照上累计工序进度，后续记录的跳转校验基于累计后的数量
+            self._apply_reporting_to_operation(work_order_operation, work_order, reporting_type, reporting_data)
+            accepted.append((index, reporting_data, record, work_order_operation))
+
+        return results, accepted
+
+    @staticmethod
+    def _batch_result(
+        index: int,
+        reporting_data: ReportingRecordCreate,
+        record_id: Optional[int] = None,
+        duplicate: bool = False,
+        error: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """构建批量报工单条结果"""
+        return {
+            "index": index,
+            "success": error is None,
+            "record_id": record_id,
+            "duplicate": duplicate,
+            "idempotency_key": reporting_data.idempotency_key,
+            "error": error,
+        }
+
+    @staticmethod
+    def _resolve_allow_jump(work_order: WorkOrder, work_order_operation: WorkOrderOperation) -> bool:
+        """优先使用工单级别的跳转控制，如果没有则使用工序级别的"""
+        if hasattr(work_order, 'allow_operation_jump'):
+            return work_order.allow_operation_jump
+        return work_order_operation.allow_jump
+
+    @staticmethod
+    def _check_operation_jump(
+        work_order_operation: WorkOrderOperation,
+        previous_operation: Optional[WorkOrderOperation],
+        reported_quantity: Decimal,
+    ) -> None:
+        """
+        工序跳转规则校验：当前工序的累计报工数量不可超过前一道工序的报工数量
+
+        Raises:
+            BusinessLogicError: 超过前序工序报工数量时抛出
+        """
+        if previous_operation is None:
+            return
+
+        previous_completed = Decimal(str(previous_operation.completed_quantity or 0))
+        current_completed = Decimal(str(work_order_operation.completed_quantity or 0))
+        new_total = current_completed + Decimal(str(reported_quantity))
+
+        if new_total > previous_completed:
+            raise BusinessLogicError(
+                f"工序跳转规则：当前工序的累计报工数量（{new_total}）不能超过前序工序 '{previous_operation.operation_name}' 的报工数量（{previous_completed}）"
+            )
+
+    @staticmethod
+    def _check_reporting_quantities(reporting_type: str, reporting_data: ReportingRecordCreate) -> None:
+        """
+        根据报工类型验证报工数量
+
+        Raises:
+            ValidationError: 数量不合法时抛出
+        """
+        if reporting_type == "status":
+            # 按状态报工：reported_quantity应该为0或1（0表示未完成，1表示完成）
+            if reporting_data.reported_quantity not in [0, 1]:
+                raise ValidationError("按状态报工模式下，报工数量只能是0（未完成）或1（完成）")
+            # 按状态报工不需要合格/不合格数量
+            if reporting_data.qualified_quantity != 0 or reporting_data.unqualified_quantity != 0:
+                logger.warning("按状态报工模式下，合格数量和不合格数量将被忽略")
+        else:
+            # 按数量报工：需要验证数量合理性
+            if reporting_data.reported_quantity <= 0:
+                raise ValidationError("报工数量必须大于0")
+
+            if reporting_data.qualified_quantity + reporting_data.unqualified_quantity != reporting_data.reported_quantity:
+                raise ValidationError("合格数量 + 不合格数量必须等于报工数量")
+
+    @staticmethod
+    def _apply_reporting_to_operation(
+        work_order_operation: WorkOrderOperation,
+        work_order: WorkOrder,
+        reporting_type: str,
+        reporting_data: ReportingRecordCreate,
+    ) -> None:
+        """将一条报工累计到工单工序（仅修改内存对象，由调用方保存）"""
+        if work_order_operation.status == 'pending':
+            work_order_operation.status = 'in_progress'
+            work_order_operation.actual_start_date = work_order_operation.actual_start_date or datetime.now()
+
+        work_order_operation.completed_quantity = (work_order_operation.completed_quantity or Decimal('0')) + reporting_data.reported_quantity
+        work_order_operation.qualified_quantity = (work_order_operation.qualified_quantity or Decimal('0')) + reporting_data.qualified_quantity
+        work_order_operation.unqualified_quantity = (work_order_operation.unqualified_quantity or Decimal('0')) + reporting_data.unqualified_quantity
+
+        # 检查工序是否完成（按数量报工：完成数量>=计划数量，按状态报工：reported_quantity=1）
+        if reporting_type == "status":
+            if reporting_data.reported_quantity == 1:
+                work_order_operation.status = 'completed'
+                work_order_operation.actual_end_date = datetime.now()
+        else:
+            if work_order_operation.completed_quantity >= work_order.quantity:
+                work_order_operation.status = 'completed'
+                work_order_operation.actual_end_date = datetime.now()
+
+    @staticmethod
+    def _apply_reporting_to_work_order(
+        work_order: WorkOrder,
+        reporting_list: List[ReportingRecordCreate],
+        all_operations: List[WorkOrderOperation],
+    ) -> None:
+        """将报工累计到工单，并在所有工序完成时完成工单（仅修改内存对象，由调用方保存）"""
+        if work_order.status == 'released':
+            work_order.status = 'in_progress'
+            work_order.actual_start_date = work_order.actual_start_date or datetime.now()
+
+        for reporting_data in reporting_list:
+            work_order.completed_quantity = (work_order.completed_quantity or Decimal('0')) + reporting_data.reported_quantity
+            work_order.qualified_quantity = (work_order.qualified_quantity or Decimal('0')) + reporting_data.qualified_quantity
+            work_order.unqualified_quantity = (work_order.unqualified_quantity or Decimal('0')) + reporting_data.unqualified_quantity
+
+        all_completed = all(op.status == 'completed' for op in all_operations)
+        if all_completed and work_order.status != 'completed':
+            work_order.status = 'completed'
+            work_order.actual_end_date = work_order.actual_end_date or datetime.now()
+
     async def get_reporting_record_by_id(
         self,
         tenant_id: int,
@@ -380,7 +765,7 @@ class ReportingService(AppBaseService[ReportingRecord]):
             NotFoundError: 报工记录不存在
             ValidationError: 审核状态错误
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             record = await ReportingRecord.get_or_none(
                 id=record_id,
                 tenant_id=tenant_id,
@@ -449,7 +834,10 @@ class ReportingService(AppBaseService[ReportingRecord]):
                         operator_name=record.worker_name,
                     )
 
-            return ReportingRecordResponse.model_validate(record)
+        # 审核状态变化影响历史日期的日汇总（事务提交后刷新）
+        await ReportingStatisticsService().refresh_for_reported_at(tenant_id, record.reported_at)
+
+        return ReportingRecordResponse.model_validate(record)
 
     async def delete_reporting_record(
         self,
@@ -482,6 +870,8 @@ class ReportingService(AppBaseService[ReportingRecord]):
         # 硬删除（报工记录表暂无 deleted_at 字段，后续可改为软删除）
         await record.delete()
 
+        await ReportingStatisticsService().refresh_for_reported_at(tenant_id, record.reported_at)
+
     async def get_reporting_statistics(
         self,
         tenant_id: int,
@@ -491,6 +881,8 @@ class ReportingService(AppBaseService[ReportingRecord]):
         """
         获取报工统计信息
 
+        统计在数据库侧分组聚合完成，已汇总的完整日期读取报工日汇总，详见 ReportingStatisticsService。
+
         Args:
             tenant_id: 组织ID
             date_start: 开始日期
@@ -499,109 +891,12 @@ class ReportingService(AppBaseService[ReportingRecord]):
         Returns:
             dict: 统计信息
         """
-        query = ReportingRecord.filter(
-            tenant_id=tenant_id
+        return await ReportingStatisticsService().get_statistics(
+            tenant_id=tenant_id,
+            date_start=date_start,
+            date_end=date_end,
         )
 
-        if date_start:
-            query = query.filter(reported_at__gte=date_start)
-        if date_end:
-            query = query.filter(reported_at__lte=date_end)
-
-        records = await query.all()
-
-        total_count = len(records)
-        pending_count = sum(1 for r in records if r.status == 'pending')
-        approved_count = sum(1 for r in records if r.status == 'approved')
-        rejected_count = sum(1 for r in records if r.status == 'rejected')
-
-        total_reported_quantity = sum(r.reported_quantity for r in records) or Decimal("0")
-        total_qualified_quantity = sum(r.qualified_quantity for r in records) or Decimal("0")
-        total_unqualified_quantity = sum(r.unqualified_quantity for r in records) or Decimal("0")
-        total_work_hours = sum(r.work_hours for r in records) or Decimal("0")
-
-        # 计算合格率
-        qualification_rate = float((total_qualified_quantity / total_reported_quantity * 100)) if total_reported_quantity > 0 else 0
-
-        # 效率分析：平均每小时报工数量
-        avg_quantity_per_hour = float(total_reported_quantity / total_work_hours) if total_work_hours > 0 else 0
-
-        # 异常分析：统计不合格率
-        unqualified_rate = float((total_unqualified_quantity / total_reported_quantity * 100)) if total_reported_quantity > 0 else 0
-
-        # 按工序统计（前10个）
-        operation_stats = {}
-        for r in records:
-            op_name = r.operation_name
-            if op_name not in operation_stats:
-                operation_stats[op_name] = {
-                    'count': 0,
-                    'reported_quantity': Decimal("0"),
-                    'qualified_quantity': Decimal("0"),
-                    'work_hours': Decimal("0"),
-                }
-            operation_stats[op_name]['count'] += 1
-            operation_stats[op_name]['reported_quantity'] += r.reported_quantity
-            operation_stats[op_name]['qualified_quantity'] += r.qualified_quantity
-            operation_stats[op_name]['work_hours'] += r.work_hours
-
-        # 转换为列表并计算合格率
-        operation_stats_list = []
-        for op_name, stats in sorted(operation_stats.items(), key=lambda x: x[1]['count'], reverse=True)[:10]:
-            op_rate = float((stats['qualified_quantity'] / stats['reported_quantity'] * 100)) if stats['reported_quantity'] > 0 else 0
-            operation_stats_list.append({
-                'operation_name': op_name,
-                'count': stats['count'],
-                'reported_quantity': float(stats['reported_quantity']),
-                'qualified_quantity': float(stats['qualified_quantity']),
-                'work_hours': float(stats['work_hours']),
-                'qualification_rate': op_rate,
-            })
-
-        # 按操作工统计（前10个）
-        worker_stats = {}
-        for r in records:
-            worker_name = r.worker_name
-            if worker_name not in worker_stats:
-                worker_stats[worker_name] = {
-                    'count': 0,
-                    'reported_quantity': Decimal("0"),
-                    'qualified_quantity': Decimal("0"),
-                    'work_hours': Decimal("0"),
-                }
-            worker_stats[worker_name]['count'] += 1
-            worker_stats[worker_name]['reported_quantity'] += r.reported_quantity
-            worker_stats[worker_name]['qualified_quantity'] += r.qualified_quantity
-            worker_stats[worker_name]['work_hours'] += r.work_hours
-
-        worker_stats_list = []
-        for worker_name, stats in sorted(worker_stats.items(), key=lambda x: x[1]['count'], reverse=True)[:10]:
-            worker_rate = float((stats['qualified_quantity'] / stats['reported_quantity'] * 100)) if stats['reported_quantity'] > 0 else 0
-            worker_stats_list.append({
-                'worker_name': worker_name,
-                'count': stats['count'],
-                'reported_quantity': float(stats['reported_quantity']),
-                'qualified_quantity': float(stats['qualified_quantity']),
-                'work_hours': float(stats['work_hours']),
-                'qualification_rate': worker_rate,
-            })
-
-        return {
-            'total_count': total_count,
-            'pending_count': pending_count,
-            'approved_count': approved_count,
-            'rejected_count': rejected_count,
-            'total_reported_quantity': float(total_reported_quantity),
-            'total_qualified_quantity': float(total_qualified_quantity),
-            'total_unqualified_quantity': float(total_unqualified_quantity),
-            'total_work_hours': float(total_work_hours),
-            'qualification_rate': qualification_rate,
-            'unqualified_rate': unqualified_rate,
-            'avg_quantity_per_hour': avg_quantity_per_hour,
-            'operation_stats': operation_stats_list,
-            'worker_stats': worker_stats_list,
-        }
-
     async def _create_mold_usage_from_reporting(
         self,
         tenant_id: int,
@@ -766,7 +1061,7 @@ class ReportingService(AppBaseService[ReportingRecord]):
             NotFoundError: 报工记录不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取报工记录
             reporting_record = await ReportingRecord.get_or_none(
                 id=reporting_record_id,
@@ -882,7 +1177,7 @@ class ReportingService(AppBaseService[ReportingRecord]):
             NotFoundError: 报工记录不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取报工记录
             reporting_record = await ReportingRecord.get_or_none(
                 id=reporting_record_id,
@@ -1052,7 +1347,7 @@ class ReportingService(AppBaseService[ReportingRecord]):
         if not correction_reason or not correction_reason.strip():
             raise ValidationError("修正原因不能为空")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取报工记录
             reporting_record = await ReportingRecord.get_or_none(
                 id=record_id,
@@ -1125,4 +1420,11 @@ class ReportingService(AppBaseService[ReportingRecord]):
             # 修正历史已记录在remarks字段中（见上面的correction_note）
 
             logger.info(f"报工记录 {record_id} 修正成功，修正人: {user_info['name']}, 原因: {correction_reason}")
-            return ReportingRecordResponse.model_validate(updated_record)
+
+        # 数量或报工时间变化影响日汇总（事务提交后刷新，原日期与新日期都需要刷新）
+        if has_quantity_change or updated_record.reported_at != reporting_record.reported_at:
+            await ReportingStatisticsService().refresh_for_reported_at(
+                tenant_id, reporting_record.reported_at, updated_record.reported_at
+            )
+
+        return ReportingRecordResponse.model_validate(updated_record)
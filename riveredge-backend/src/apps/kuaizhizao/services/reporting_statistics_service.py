@@ -0,0 +1,432 @@
+"""
+报工统计查询服务模块
+
+提供报工统计的 SQL 侧聚合查询与日汇总（预聚合）维护。
+
+- 统计查询使用分组聚合（状态计数使用 FILTER 子句，按工序/操作工 GROUP BY + LIMIT 取前10），
+  不再把报工记录全部加载到 Python 中计算
+- 已汇总的完整自然日直接读取 ReportingDailyStat 日汇总行，其余时间段（当天、边界不完整的日期、
+  尚未汇总的日期）读取报工明细，两部分在同一条 SQL 中合并，结果与纯明细统计一致
+
+Author: Luigi Lu
+Date: 2026-03-02
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from tortoise import Tortoise
+from loguru import logger
+
+from apps.kuaizhizao.models.reporting_record import ReportingRecord
+from apps.kuaizhizao.models.reporting_daily_stat import ReportingDailyStat
+from infra.config.infra_config import infra_settings
+
+
+RECORDS_TABLE = ReportingRecord._meta.db_table
+DAILY_STATS_TABLE = ReportingDailyStat._meta.db_table
+
+# 分组统计维度 -> 报工记录字段
+GROUP_DIMENSIONS = {
+    "operation": "operation_name",
+    "worker": "worker_name",
+}
+
+TOP_N = 10
+
+
+class _SqlParams:
+    """按 asyncpg 占位符（$1, $2...）顺序收集 SQL 参数"""
+
+    def __init__(self):
+        self.values: List[Any] = []
+
+    def add(self, value: Any) -> str:
+        self.values.append(value)
+        return f"${len(self.values)}"
+
+
+class ReportingStatisticsService:
+    """
+    报工统计查询服务类
+
+    处理报工统计聚合查询及报工日汇总的刷新、回填。
+    """
+
+    async def get_statistics(
+        self,
+        tenant_id: int,
+        date_start: Optional[datetime] = None,
+        date_end: Optional[datetime] = None,
+        use_rollup: bool = True,
+    ) -> Dict[str, Any]:
+        """
+        获取报工统计信息
+
+        Args:
+            tenant_id: 组织ID
+            date_start: 开始时间（可选）
+            date_end: 结束时间（可选）
+            use_rollup: 是否使用日汇总（默认True；False 时全部从报工明细聚合，可用于校验）
+
+        Returns:
+            dict: 统计信息（字段与 ReportingService.get_reporting_statistics 保持一致）
+        """
+        rollup_days = await self._get_rollup_days(tenant_id, date_start, date_end) if use_rollup else []
+
+        summary = await self._query_summary(tenant_id, date_start, date_end, rollup_days)
+        operation_stats = await self._query_top_groups(tenant_id, "operation", date_start, date_end, rollup_days)
+        worker_stats = await self._query_top_groups(tenant_id, "worker", date_start, date_end, rollup_days)
+
+        total_reported_quantity = Decimal(str(summary["reported_quantity"] or 0))
+        total_qualified_quantity = Decimal(str(summary["qualified_quantity"] or 0))
+        total_unqualified_quantity = Decimal(str(summary["unqualified_quantity"] or 0))
+        total_work_hours = Decimal(str(summary["work_hours"] or 0))
+
+        # 合格率、不合格率、平均每小时报工数量
+        qualification_rate = float(total_qualified_quantity / total_reported_quantity * 100) if total_reported_quantity > 0 else 0
+        unqualified_rate = float(total_unqualified_quantity / total_reported_quantity * 100) if total_reported_quantity > 0 else 0
+        avg_quantity_per_hour = float(total_reported_quantity / total_work_hours) if total_work_hours > 0 else 0
+
+        return {
+            'total_count': int(summary["record_count"] or 0),
+            'pending_count': int(summary["pending_count"] or 0),
+            'approved_count': int(summary["approved_count"] or 0),
+            'rejected_count': int(summary["rejected_count"] or 0),
+            'total_reported_quantity': float(total_reported_quantity),
+            'total_qualified_quantity': float(total_qualified_quantity),
+            'total_unqualified_quantity': float(total_unqualified_quantity),
+            'total_work_hours': float(total_work_hours),
+            'qualification_rate': qualification_rate,
+            'unqualified_rate': unqualified_rate,
+            'avg_quantity_per_hour': avg_quantity_per_hour,
+            'operation_stats': [self._group_row_to_dict('operation_name', row) for row in operation_stats],
+            'worker_stats': [self._group_row_to_dict('worker_name', row) for row in worker_stats],
+        }
+
+    # ==================== 日汇总维护 ====================
+
+    async def refresh_daily_rollup(self, tenant_id: int, stat_date: date) -> int:
+        """
+        重新计算指定日期的报工日汇总
+
+        一条语句完成：GROUPING SETS 聚合出总计行、按工序行、按操作工行，按唯一键
+        (tenant_id, stat_date, dimension, dimension_key) upsert，并删除该日不再出现的维度行。
+        并发刷新同一日期时由唯一键串行化，不会出现删除后重复插入的冲突。
+        工序/操作工为空（NULL）时与空字符串归为同一维度值，分组与唯一键口径一致。
+        当天无报工时仍写入一行计数为0的总计行，表示该日已汇总。
+
+        Args:
+            tenant_id: 组织ID
+            stat_date: 统计日期
+
+        Returns:
+            int: 写入的汇总行数
+        """
+        params = _SqlParams()
+        p_tenant = params.add(tenant_id)
+        p_date = params.add(stat_date)
+
+        sql = f"""
+            WITH fresh AS (
+                SELECT
+                    CASE
+                        WHEN GROUPING(r."operation_key") = 0 THEN 'operation'
+                        WHEN GROUPING(r."worker_key") = 0 THEN 'worker'
+                        ELSE 'total'
+                    END AS "dimension",
+                    CASE
+                        WHEN GROUPING(r."operation_key") = 0 THEN r."operation_key"
+                        WHEN GROUPING(r."worker_key") = 0 THEN r."worker_key"
+                        ELSE ''
+                    END AS "dimension_key",
+                    {self._aggregate_columns_sql()}
+                FROM (
+                    SELECT
+                        "status", "reported_quantity", "qualified_quantity", "unqualified_quantity", "work_hours",
+                        COALESCE("operation_name", '') AS "operation_key",
+                        COALESCE("worker_name", '') AS "worker_key"
+                    FROM "{RECORDS_TABLE}"
+                    WHERE "tenant_id" = {p_tenant}
+                      AND "reported_at" >= {p_date}::date
+                      AND "reported_at" < {p_date}::date + 1
+                ) AS r
+                GROUP BY GROUPING SETS ((), (r."operation_key"), (r."worker_key"))
+            ),
+            upserted AS (
+                INSERT INTO "{DAILY_STATS_TABLE}" (
+                    "tenant_id", "stat_date", "dimension", "dimension_key",
+                    "record_count", "pending_count", "approved_count", "rejected_count",
+                    "reported_quantity", "qualified_quantity", "unqualified_quantity", "work_hours",
+                    "created_at", "updated_at"
+                )
+                SELECT {p_tenant}, {p_date}::date, fresh.*, NOW(), NOW()
+                FROM fresh
+                ON CONFLICT ("tenant_id", "stat_date", "dimension", "dimension_key") DO UPDATE SET
+                    "record_count" = EXCLUDED."record_count",
+                    "pending_count" = EXCLUDED."pending_count",
+                    "approved_count" = EXCLUDED."approved_count",
+                    "rejected_count" = EXCLUDED."rejected_count",
+                    "reported_quantity" = EXCLUDED."reported_quantity",
+                    "qualified_quantity" = EXCLUDED."qualified_quantity",
+                    "unqualified_quantity" = EXCLUDED."unqualified_quantity",
+                    "work_hours" = EXCLUDED."work_hours",
+                    "updated_at" = NOW()
+                RETURNING "id"
+            ),
+            removed AS (
+                DELETE FROM "{DAILY_STATS_TABLE}"
+                WHERE "tenant_id" = {p_tenant}
+                  AND "stat_date" = {p_date}::date
+                  AND "id" NOT IN (SELECT "id" FROM upserted)
+                RETURNING "id"
+            )
+            SELECT (SELECT COUNT(*) FROM upserted) AS written, (SELECT COUNT(*) FROM removed) AS removed
+        """
+
+        rows = await self._fetch(sql, params.values)
+        return int(rows[0]["written"]) if rows else 0
+
+    async def refresh_days(self, tenant_id: int, days: Iterable[date]) -> int:
+        """
+        刷新多个日期的日汇总（只处理已结束的日期，当天及未来日期始终从明细统计）
+
+        报工新增/审核/修正/删除影响历史日期时调用，保证日汇总与明细一致。
+
+        Args:
+            tenant_id: 组织ID
+            days: 日期列表
+
+        Returns:
+            int: 刷新的日期数
+        """
+        today = self.today()
+        closed_days = sorted({d for d in days if d is not None and d < today})
+        for day in closed_days:
+            await self.refresh_daily_rollup(tenant_id, day)
+        return len(closed_days)
+
+    async def refresh_for_reported_at(self, tenant_id: int, *reported_ats: Optional[datetime]) -> None:
+        """
+        按报工时间刷新对应日期的日汇总（失败仅记录日志，不影响业务操作）
+
+        须在业务事务提交后调用：刷新使用独立语句写入，若在调用方事务内执行，
+        刷新失败会使 PostgreSQL 中止整个外层事务。
+
+        Args:
+            tenant_id: 组织ID
+            reported_ats: 报工时间
+        """
+        try:
+            await self.refresh_days(tenant_id, [self._local_date(dt) for dt in reported_ats if dt])
+        except Exception as e:
+            logger.warning(f"刷新报工日汇总失败（组织 {tenant_id}）: {e}")
+
+    async def backfill(self, tenant_id: int, start_date: date, end_date: Optional[date] = None) -> int:
+        """
+        回填日期区间内的日汇总
+
+        Args:
+            tenant_id: 组织ID
+            start_date: 开始日期（含）
+            end_date: 结束日期（含，默认昨天）
+
+        Returns:
+            int: 回填的日期数
+        """
+        end_date = min(end_date or self.today() - timedelta(days=1), self.today() - timedelta(days=1))
+        days = []
+        day = start_date
+        while day <= end_date:
+            days.append(day)
+            day += timedelta(days=1)
+        return await self.refresh_days(tenant_id, days)
+
+    # ==================== 查询实现 ====================
+
+    @staticmethod
+    def _aggregate_columns_sql() -> str:
+        """报工记录聚合列（状态计数使用 FILTER 子句）"""
+        return """
+                COUNT(*),
+                COUNT(*) FILTER (WHERE "status" = 'pending'),
+                COUNT(*) FILTER (WHERE "status" = 'approved'),
+                COUNT(*) FILTER (WHERE "status" = 'rejected'),
+                COALESCE(SUM("reported_quantity"), 0),
+                COALESCE(SUM("qualified_quantity"), 0),
+                COALESCE(SUM("unqualified_quantity"), 0),
+                COALESCE(SUM("work_hours"), 0)"""
+
+    def _records_where_sql(
+        self,
+        params: _SqlParams,
+        tenant_id: int,
+        date_start: Optional[datetime],
+        date_end: Optional[datetime],
+        rollup_days: List[date],
+    ) -> str:
+        """报工明细部分的 WHERE 条件（排除已由日汇总覆盖的日期）"""
+        conditions = [f'"tenant_id" = {params.add(tenant_id)}']
+        if date_start:
+            conditions.append(f'"reported_at" >= {params.add(date_start)}')
+        if date_end:
+            conditions.append(f'"reported_at" <= {params.add(date_end)}')
+        if rollup_days:
+            conditions.append(f'NOT ("reported_at"::date = ANY({params.add(rollup_days)}::date[]))')
+        return " AND ".join(conditions)
+
+    async def _query_summary(
+        self,
+        tenant_id: int,
+        date_start: Optional[datetime],
+        date_end: Optional[datetime],
+        rollup_days: List[date],
+    ) -> Dict[str, Any]:
+        """总计：报工明细聚合 + 日汇总总计行"""
+        params = _SqlParams()
+        records_sql = f"""
+            SELECT {self._aggregate_columns_sql()}
+            FROM "{RECORDS_TABLE}"
+            WHERE {self._records_where_sql(params, tenant_id, date_start, date_end, rollup_days)}
+        """
+        if rollup_days:
+            records_sql += f"""
+            UNION ALL
+            SELECT
+                COALESCE(SUM("record_count"), 0), COALESCE(SUM("pending_count"), 0),
+                COALESCE(SUM("approved_count"), 0), COALESCE(SUM("rejected_count"), 0),
+                COALESCE(SUM("reported_quantity"), 0), COALESCE(SUM("qualified_quantity"), 0),
+                COALESCE(SUM("unqualified_quantity"), 0), COALESCE(SUM("work_hours"), 0)
+            FROM "{DAILY_STATS_TABLE}"
+            WHERE "tenant_id" = {params.add(tenant_id)}
+              AND "dimension" = 'total'
+              AND "stat_date" = ANY({params.add(rollup_days)}::date[])
+            """
+
+        sql = f"""
+            SELECT
+                SUM(t.c0) AS record_count, SUM(t.c1) AS pending_count,
+                SUM(t.c2) AS approved_count, SUM(t.c3) AS rejected_count,
+                SUM(t.c4) AS reported_quantity, SUM(t.c5) AS qualified_quantity,
+                SUM(t.c6) AS unqualified_quantity, SUM(t.c7) AS work_hours
+            FROM ({records_sql}) AS t (c0, c1, c2, c3, c4, c5, c6, c7)
+        """
+        rows = await self._fetch(sql, params.values)
+        return rows[0] if rows else {}
+
+    async def _query_top_groups(
+        self,
+        tenant_id: int,
+        dimension: str,
+        date_start: Optional[datetime],
+        date_end: Optional[datetime],
+        rollup_days: List[date],
+    ) -> List[Dict[str, Any]]:
+        """按工序/操作工分组统计，按报工次数倒序取前 TOP_N 个（空值与空字符串归为同一组，与日汇总口径一致）"""
+        column = GROUP_DIMENSIONS[dimension]
+        params = _SqlParams()
+        records_sql = f"""
+            SELECT COALESCE("{column}", ''), COUNT(*), COALESCE(SUM("reported_quantity"), 0),
+                   COALESCE(SUM("qualified_quantity"), 0), COALESCE(SUM("work_hours"), 0)
+            FROM "{RECORDS_TABLE}"
+            WHERE {self._records_where_sql(params, tenant_id, date_start, date_end, rollup_days)}
+            GROUP BY COALESCE("{column}", '')
+        """
+        if rollup_days:
+            records_sql += f"""
+            UNION ALL
+            SELECT "dimension_key", "record_count", "reported_quantity", "qualified_quantity", "work_hours"
+            FROM "{DAILY_STATS_TABLE}"
+            WHERE "tenant_id" = {params.add(tenant_id)}
+              AND "dimension" = {params.add(dimension)}
+              AND "stat_date" = ANY({params.add(rollup_days)}::date[])
+            """
+
+        sql = f"""
+            SELECT
+                t.dim_key, SUM(t.record_count) AS record_count,
+                SUM(t.reported_quantity) AS reported_quantity,
+                SUM(t.qualified_quantity) AS qualified_quantity,
+                SUM(t.work_hours) AS work_hours
+            FROM ({records_sql}) AS t (dim_key, record_count, reported_quantity, qualified_quantity, work_hours)
+            GROUP BY t.dim_key
+            ORDER BY record_count DESC, t.dim_key
+            LIMIT {TOP_N}
+        """
+        return await self._fetch(sql, params.values)
+
+    async def _get_rollup_days(
+        self,
+        tenant_id: int,
+        date_start: Optional[datetime],
+        date_end: Optional[datetime],
+    ) -> List[date]:
+        """
+        获取可以使用日汇总的日期：已汇总且整日都落在查询时间范围内的日期
+        """
+        first_day, last_day = self._full_day_bounds(date_start, date_end)
+        if first_day and last_day and first_day > last_day:
+            return []
+
+        query = ReportingDailyStat.filter(tenant_id=tenant_id, dimension="total")
+        if first_day:
+            query = query.filter(stat_date__gte=first_day)
+        if last_day:
+            query = query.filter(stat_date__lte=last_day)
+        return list(await query.values_list("stat_date", flat=True))
+
+    def _full_day_bounds(
+        self,
+        date_start: Optional[datetime],
+        date_end: Optional[datetime],
+    ) -> Tuple[Optional[date], Optional[date]]:
+        """计算查询时间范围内完整覆盖的第一天与最后一天（None 表示不限）"""
+        first_day = None
+        last_day = None
+        if date_start:
+            local_start = self._to_local(date_start)
+            first_day = local_start.date()
+            if local_start.time() != time.min:
+                first_day += timedelta(days=1)
+        if date_end:
+            local_end = self._to_local(date_end)
+            last_day = local_end.date()
+            # 结束时间需覆盖到当日最后一秒才算完整一天
+            if local_end < datetime.combine(last_day, time(23, 59, 59)):
+                last_day -= timedelta(days=1)
+        return first_day, last_day
+
+    @staticmethod
+    def _to_local(value: datetime) -> datetime:
+        """转换为数据库会话时区的本地时间（不带时区），与 SQL 中的 ::date 口径一致"""
+        if value.tzinfo is not None:
+            value = value.astimezone(ZoneInfo(infra_settings.TIMEZONE))
+        return value.replace(tzinfo=None)
+
+    def _local_date(self, value: datetime) -> date:
+        """数据库会话时区下的日期"""
+        return self._to_local(value).date()
+
+    def today(self) -> date:
+        """数据库会话时区的当天日期"""
+        return datetime.now(ZoneInfo(infra_settings.TIMEZONE)).date()
+
+    @staticmethod
+    def _group_row_to_dict(name_field: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        reported = Decimal(str(row["reported_quantity"] or 0))
+        qualified = Decimal(str(row["qualified_quantity"] or 0))
+        return {
+            name_field: row["dim_key"],
+            'count': int(row["record_count"] or 0),
+            'reported_quantity': float(reported),
+            'qualified_quantity': float(qualified),
+            'work_hours': float(row["work_hours"] or 0),
+            'qualification_rate': float(qualified / reported * 100) if reported > 0 else 0,
+        }
+
+    @staticmethod
+    async def _fetch(sql: str, params: List[Any]) -> List[Dict[str, Any]]:
+        conn = Tortoise.get_connection("default")
+        return await conn.execute_query_dict(sql, params)
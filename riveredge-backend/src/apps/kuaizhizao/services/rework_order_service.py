@@ -64,7 +64,7 @@ class ReworkOrderService(AppBaseService[ReworkOrder]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "rework_order")
         if not is_enabled:
             raise BusinessLogicError("返工工单节点未启用，无法创建返工工单")
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成返工单编码（如果未提供）
             if not rework_order_data.code:
                 today = datetime.now().strftime("%Y%m%d")
@@ -187,7 +187,7 @@ class ReworkOrderService(AppBaseService[ReworkOrder]):
             NotFoundError: 原工单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取原工单
             original_work_order = await WorkOrder.get_or_none(
                 tenant_id=tenant_id,
@@ -378,7 +378,7 @@ class ReworkOrderService(AppBaseService[ReworkOrder]):
             NotFoundError: 返工单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取返工单
             rework_order = await self.get_by_id(tenant_id, rework_order_id, raise_if_not_found=True)
 
@@ -430,7 +430,7 @@ class ReworkOrderService(AppBaseService[ReworkOrder]):
             NotFoundError: 返工单不存在
             BusinessLogicError: 已完成的返工单不允许删除
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取返工单
             rework_order = await self.get_by_id(tenant_id, rework_order_id, raise_if_not_found=True)
 
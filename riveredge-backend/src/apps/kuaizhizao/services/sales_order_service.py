@@ -29,11 +29,13 @@ from apps.kuaizhizao.schemas.sales_order import (
     SalesOrderItemCreate, SalesOrderItemResponse,
 )
 from apps.kuaizhizao.constants import DemandStatus, ReviewStatus, LEGACY_AUDITED_VALUES
+from apps.base_service import AppBaseService
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
 from infra.services.business_config_service import BusinessConfigService
+from core.utils.stream_export import ExportColumn, StreamExport
 
 
-class SalesOrderService:
+class SalesOrderService(AppBaseService[SalesOrder]):
     """
     销售订单管理服务
 
@@ -42,6 +44,7 @@ class SalesOrderService:
     """
 
     def __init__(self):
+        super().__init__(SalesOrder)
         self.business_config_service = BusinessConfigService()
 
     async def _log_state_transition(
@@ -275,7 +278,7 @@ class SalesOrderService:
                 tenant_id, sales_order_data.order_date
             )
 
-        async with in_transaction():
+        async with in_transaction("default"):
             order_dict = sales_order_data.model_dump(exclude={"items", "order_name"})
             order_dict["status"] = sales_order_data.status
             order_dict["review_status"] = sales_order_data.review_status
@@ -390,20 +393,16 @@ class SalesOrderService:
             material_fallback=material_fallback,
         )
 
-    async def list_sales_orders(
-        self,
+    @staticmethod
+    def _build_list_query(
         tenant_id: int,
-        skip: int = 0,
-        limit: int = 100,
         status: Optional[str] = None,
         review_status: Optional[str] = None,
         start_date: Optional[date] = None,
         end_date: Optional[date] = None,
         customer_name: Optional[str] = None,
-        order_by: Optional[str] = None,
-        include_items: bool = False,
-    ) -> SalesOrderListResponse:
-        """获取销售订单列表。order_by 如 order_code、-created_at（前缀-表示降序）"""
+    ):
+        """构建销售订单列表查询（列表与导出共用过滤条件）"""
         query = SalesOrder.filter(tenant_id=tenant_id, deleted_at__isnull=True)
         if status:
             query = query.filter(status=status)
@@ -415,12 +414,52 @@ class SalesOrderService:
             query = query.filter(order_date__lte=end_date)
         if customer_name and str(customer_name).strip():
             query = query.filter(customer_name__icontains=customer_name.strip())
-        total = await query.count()
+        return query
+
+    async def list_sales_orders(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        status: Optional[str] = None,
+        review_status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        customer_name: Optional[str] = None,
+        order_by: Optional[str] = None,
+        include_items: bool = False,
+        cursor: Optional[str] = None,
+    ) -> SalesOrderListResponse:
+        """
+        获取销售订单列表。order_by 如 order_code、-created_at（前缀-表示降序）
+
+        传入 cursor（上一页返回的 next_cursor）时使用键集分页，忽略 skip；翻页时总数短时缓存，第一页始终精确统计。
+        """
+        query = self._build_list_query(tenant_id, status, review_status, start_date, end_date, customer_name)
+        paging = bool(cursor or skip)
+        total = await self.count_total(
+            query,
+            tenant_id,
+            cache_filters={
+                "status": status,
+                "review_status": review_status,
+                "start_date": start_date,
+                "end_date": end_date,
+                "customer_name": customer_name,
+            } if paging else None,
+        )
         order_clause = order_by if order_by else "-created_at"
-        orders = await query.offset(skip).limit(limit).order_by(order_clause)
+        orders, next_cursor = await self.paginate(
+            query,
+            limit=limit,
+            skip=skip,
+            cursor=cursor,
+            order_field=order_clause.lstrip("-"),
+            descending=order_clause.startswith("-"),
+        )
 
         if not orders:
-            return SalesOrderListResponse(data=[], total=total, success=True)
+            return SalesOrderListResponse(data=[], total=total, next_cursor=None, success=True)
 
         order_ids = [o.id for o in orders]
 
@@ -575,7 +614,57 @@ class SalesOrderService:
                     material_fallback=material_fallback_all.get(order.id) if include_items else None,
                 )
             )
-        return SalesOrderListResponse(data=sales_orders, total=total, success=True)
+        return SalesOrderListResponse(data=sales_orders, total=total, next_cursor=next_cursor, success=True)
+
+    def export_sales_orders(
+        self,
+        tenant_id: int,
+        file_format: str = "xlsx",
+        status: Optional[str] = None,
+        review_status: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        customer_name: Optional[str] = None,
+    ) -> StreamExport:
+        """
+        导出销售订单（流式，不限行数）
+
+        Args:
+            tenant_id: 租户ID
+            file_format: 导出格式（xlsx/csv）
+            status: 订单状态
+            review_status: 审核状态
+            start_date: 开始日期
+            end_date: 结束日期
+            customer_name: 客户名称（模糊匹配）
+
+        Returns:
+            StreamExport: 流式导出对象
+        """
+        columns = [
+            ExportColumn("订单编号", "order_code"),
+            ExportColumn("客户名称", "customer_name"),
+            ExportColumn("订单类型", "order_type"),
+            ExportColumn("订单日期", "order_date"),
+            ExportColumn("交货日期", "delivery_date"),
+            ExportColumn("状态", "status"),
+            ExportColumn("审核状态", "review_status"),
+            ExportColumn("总数量", "total_quantity", lambda row: row["total_quantity"] or 0),
+            ExportColumn("总金额", "total_amount", lambda row: row["total_amount"] or 0),
+            ExportColumn("销售员", "salesman_name"),
+            ExportColumn("发货方式", "shipping_method"),
+            ExportColumn("收货地址", "shipping_address"),
+            ExportColumn("付款条件", "payment_terms"),
+            ExportColumn("备注", "notes"),
+            ExportColumn("创建时间", "created_at"),
+        ]
+        return StreamExport(
+            queryset=self._build_list_query(tenant_id, status, review_status, start_date, end_date, customer_name),
+            columns=columns,
+            filename=f"sales_orders_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            file_format=file_format,
+            sheet_title="销售订单",
+        )
 
     async def update_sales_order(
         self,
@@ -612,7 +701,7 @@ class SalesOrderService:
         }
         items_changed = sales_order_data.items is not None
 
-        async with in_transaction():
+        async with in_transaction("default"):
             upd = sales_order_data.model_dump(exclude_unset=True, exclude={"items"})
             upd["updated_by"] = updated_by
             # status/review_status 由工作流控制，禁止通过 update 修改，确保二者始终同步
@@ -751,7 +840,7 @@ class SalesOrderService:
             logger.info("销售订单 %s 蓝图配置为自动审核，提交后直接通过", sales_order_id)
             from apps.base_service import AppBaseService
             submitter_name = await AppBaseService().get_user_name(submitted_by)
-            async with in_transaction():
+            async with in_transaction("default"):
                 await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                     status=DemandStatus.PENDING_REVIEW,
                     review_status=ReviewStatus.PENDING,
@@ -778,7 +867,7 @@ class SalesOrderService:
         if instance:
             from apps.base_service import AppBaseService
             submitter_name = await AppBaseService().get_user_name(submitted_by)
-            async with in_transaction():
+            async with in_transaction("default"):
                 await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                     status=DemandStatus.PENDING_REVIEW,
                     review_status=ReviewStatus.PENDING,
@@ -795,7 +884,7 @@ class SalesOrderService:
         # 审批流程不存在，设为待审核，需手动调用审核接口
         from apps.base_service import AppBaseService
         submitter_name = await AppBaseService().get_user_name(submitted_by)
-        async with in_transaction():
+        async with in_transaction("default"):
             await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                 status=DemandStatus.PENDING_REVIEW,
                 review_status=ReviewStatus.PENDING,
@@ -829,7 +918,7 @@ class SalesOrderService:
         from apps.base_service import AppBaseService
         approver_name = await AppBaseService().get_user_name(approved_by)
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                 reviewer_id=approved_by,
                 reviewer_name=approver_name,
@@ -877,7 +966,7 @@ class SalesOrderService:
         from apps.base_service import AppBaseService
         approver_name = await AppBaseService().get_user_name(approved_by)
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                 reviewer_id=approved_by,
                 reviewer_name=approver_name,
@@ -933,7 +1022,7 @@ class SalesOrderService:
 
         from apps.base_service import AppBaseService
         unapprover_name = await AppBaseService().get_user_name(unapproved_by)
-        async with in_transaction():
+        async with in_transaction("default"):
             await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                 status=DemandStatus.PENDING_REVIEW,
                 review_status=ReviewStatus.PENDING,
@@ -1628,7 +1717,7 @@ class SalesOrderService:
         if order.status not in pending_ok:
             raise BusinessLogicError(f"只能撤回待审核的订单，当前: {order.status}")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                 status=DemandStatus.DRAFT,
                 review_status=ReviewStatus.PENDING,
@@ -1659,7 +1748,7 @@ class SalesOrderService:
         if not deletable:
             raise BusinessLogicError(f"只能删除草稿或待审核状态的订单，当前: {order.status}")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             demand = await self._get_linked_demand(tenant_id, sales_order_id)
             if demand:
                 from apps.kuaizhizao.services.demand_service import DemandService
@@ -1701,7 +1790,7 @@ class SalesOrderService:
         if not self._is_audited(order.status):
             raise BusinessLogicError("只有已审核状态的销售订单才能确认")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await SalesOrder.filter(tenant_id=tenant_id, id=sales_order_id).update(
                 status=DemandStatus.CONFIRMED,
                 updated_by=confirmed_by,
@@ -1772,7 +1861,7 @@ class SalesOrderService:
             tenant_id, "SHIPMENT_NOTICE_CODE", prefix=f"SN{today}"
         )
 
-        async with in_transaction():
+        async with in_transaction("default"):
             notice = await ShipmentNotice.create(
                 tenant_id=tenant_id,
                 notice_code=code,
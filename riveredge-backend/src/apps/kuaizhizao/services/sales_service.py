@@ -44,7 +44,7 @@ class SalesForecastService(AppBaseService[SalesForecast]):
 
     async def create_sales_forecast(self, tenant_id: int, forecast_data: SalesForecastCreate, created_by: int) -> SalesForecastResponse:
         """创建销售预测"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             code = getattr(forecast_data, "forecast_code", None) or ""
             code = (code.strip() if isinstance(code, str) else "") or None
@@ -111,7 +111,7 @@ class SalesForecastService(AppBaseService[SalesForecast]):
     async def update_sales_forecast(self, tenant_id: int, forecast_id: int, forecast_data: SalesForecastUpdate, updated_by: int) -> SalesForecastResponse:
         """更新销售预测；若提供 items 则先删后增，覆盖全部明细。已审核预测更新后同步关联需求。"""
         forecast_before = await self.get_sales_forecast_by_id(tenant_id, forecast_id)
-        async with in_transaction():
+        async with in_transaction("default"):
             dumped = forecast_data.model_dump(exclude_unset=True, exclude={'updated_by'})
             items_data = dumped.pop('items', None)
             update_data = {k: v for k, v in dumped.items() if k != 'items'}
@@ -258,7 +258,7 @@ class SalesForecastService(AppBaseService[SalesForecast]):
         """审核销售预测"""
         from apps.kuaizhizao.constants import DocumentStatus, ReviewStatus, REVIEW_STATUS_ALIASES
 
-        async with in_transaction():
+        async with in_transaction("default"):
             forecast = await self.get_sales_forecast_by_id(tenant_id, forecast_id)
 
             current_review = str(forecast.review_status or "").strip()
@@ -301,7 +301,7 @@ class SalesForecastService(AppBaseService[SalesForecast]):
 
     async def add_forecast_item(self, tenant_id: int, forecast_id: int, item_data: SalesForecastItemCreate) -> SalesForecastItemResponse:
         """添加销售预测明细"""
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证预测存在
             await self.get_sales_forecast_by_id(tenant_id, forecast_id)
 
@@ -337,7 +337,7 @@ class SalesForecastService(AppBaseService[SalesForecast]):
         """
         from apps.kuaizhizao.constants import DocumentStatus, ReviewStatus, is_draft_status
 
-        async with in_transaction():
+        async with in_transaction("default"):
             forecast = await self.get_sales_forecast_by_id(tenant_id, forecast_id)
             
             if not is_draft_status(forecast.status):
@@ -651,7 +651,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
 
     async def create_sales_order(self, tenant_id: int, order_data: SalesOrderCreate, created_by: int) -> SalesOrderResponse:
         """创建销售订单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             from apps.kuaizhizao.models.sales_order_item import SalesOrderItem
             
             user_info = await self.get_user_info(created_by)
@@ -762,7 +762,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
 
     async def update_sales_order(self, tenant_id: int, order_id: int, order_data: SalesOrderUpdate, updated_by: int) -> SalesOrderResponse:
         """更新销售订单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await self.get_sales_order_by_id(tenant_id, order_id)
             update_data = order_data.model_dump(exclude_unset=True, exclude={'updated_by'})
             update_data['updated_by'] = updated_by
@@ -775,7 +775,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
         """审核销售订单"""
         from apps.kuaizhizao.constants import DocumentStatus, ReviewStatus, REVIEW_STATUS_ALIASES
 
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await self.get_sales_order_by_id(tenant_id, order_id)
 
             current_review = str(order.review_status or "").strip()
@@ -802,7 +802,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
 
     async def confirm_order(self, tenant_id: int, order_id: int, confirmed_by: int) -> SalesOrderResponse:
         """确认销售订单（转为MTO模式执行）"""
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await self.get_sales_order_by_id(tenant_id, order_id)
 
             from apps.kuaizhizao.constants import DocumentStatus, LEGACY_AUDITED_VALUES
@@ -824,7 +824,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
 
     async def add_order_item(self, tenant_id: int, order_id: int, item_data: SalesOrderItemCreate) -> SalesOrderItemResponse:
         """添加销售订单明细"""
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证订单存在
             await self.get_sales_order_by_id(tenant_id, order_id)
 
@@ -1002,7 +1002,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
 
     async def update_delivery_status(self, tenant_id: int, order_id: int, item_id: int, delivered_quantity: float, updated_by: int) -> SalesOrderItemResponse:
         """更新交货状态"""
-        async with in_transaction():
+        async with in_transaction("default"):
             item = await SalesOrderItem.get_or_none(tenant_id=tenant_id, id=item_id, sales_order_id=order_id)
             if not item:
                 raise NotFoundError(f"销售订单明细不存在: {item_id}")
@@ -1072,7 +1072,7 @@ class SalesOrderService(AppBaseService[SalesOrder]):
             NotFoundError: 销售订单不存在
             BusinessLogicError: 销售订单状态不是草稿
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             order = await self.get_sales_order_by_id(tenant_id, order_id)
             
             from apps.kuaizhizao.constants import DocumentStatus, ReviewStatus, is_draft_status
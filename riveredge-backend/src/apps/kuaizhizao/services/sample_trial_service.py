@@ -56,7 +56,7 @@ class SampleTrialService(AppBaseService[SampleTrial]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "sample_trial")
         if not is_enabled:
             raise BusinessLogicError("样品试用单节点未启用，无法创建样品试用单")
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "SAMPLE_TRIAL_CODE", prefix=f"ST{today}")
 
@@ -139,7 +139,7 @@ class SampleTrialService(AppBaseService[SampleTrial]):
         if trial.status != "草稿":
             raise BusinessLogicError("只能更新草稿状态的样品试用单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             dump = trial_data.model_dump(exclude_unset=True, exclude={"trial_code", "items"})
             dump["updated_by"] = updated_by
             items = getattr(trial_data, "items", None)
@@ -249,7 +249,7 @@ class SampleTrialService(AppBaseService[SampleTrial]):
             created_by=created_by,
         )
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await SampleTrial.filter(id=trial_id).update(
                 status="已转订单",
                 sales_order_id=sales_order.id,
@@ -337,7 +337,7 @@ class SampleTrialService(AppBaseService[SampleTrial]):
             created_by=created_by,
         )
 
-        async with in_transaction():
+        async with in_transaction("default"):
             await SampleTrial.filter(tenant_id=tenant_id, id=trial_id).update(
                 other_outbound_id=outbound.id,
                 other_outbound_code=outbound.outbound_code,
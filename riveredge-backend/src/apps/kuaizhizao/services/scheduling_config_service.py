@@ -38,7 +38,7 @@ class SchedulingConfigService(AppBaseService[SchedulingConfig]):
         created_by: int
     ) -> SchedulingConfigResponse:
         """创建排程配置"""
-        async with in_transaction():
+        async with in_transaction("default"):
             existing = await SchedulingConfig.get_or_none(
                 tenant_id=tenant_id,
                 config_code=config_data.config_code,
@@ -120,7 +120,7 @@ class SchedulingConfigService(AppBaseService[SchedulingConfig]):
         if not config:
             raise NotFoundError(f"排程配置不存在: {config_id}")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             if config_data.is_default is True:
                 await SchedulingConfig.filter(tenant_id=tenant_id).update(is_default=False)
 
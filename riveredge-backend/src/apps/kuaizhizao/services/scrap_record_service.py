@@ -63,7 +63,7 @@ class ScrapRecordService(AppBaseService[ScrapRecord]):
             ValidationError: 数据验证失败
             BusinessLogicError: 业务逻辑错误
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取报废记录
             scrap_record = await ScrapRecord.get_or_none(
                 id=scrap_id,
@@ -45,7 +45,7 @@ class ShipmentNoticeService(AppBaseService[ShipmentNotice]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "shipment_notice")
         if not is_enabled:
             raise BusinessLogicError("发货通知单节点未启用，无法创建发货通知单")
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "SHIPMENT_NOTICE_CODE", prefix=f"SN{today}")
 
@@ -130,7 +130,7 @@ class ShipmentNoticeService(AppBaseService[ShipmentNotice]):
         if notice.status != "待发货":
             raise BusinessLogicError("只能更新待发货状态的发货通知单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             dump = notice_data.model_dump(exclude_unset=True, exclude={"notice_code"})
             dump["updated_by"] = updated_by
             await ShipmentNotice.filter(tenant_id=tenant_id, id=notice_id).update(**dump)
@@ -0,0 +1,535 @@
+"""
+标准成本卷积服务模块
+
+按低层码自底向上计算每个物料的标准单位成本（材料/加工/制造费用），按成本版本存入 StandardCostRollup，
+产品成本核算由逐层递归展开BOM（每个节点若干次查询）变为单行查询。
+
+卷积口径与实时核算（ProductionCostService._calculate_make_cost）一致：
+- 采购件/配置件/委外件等：材料成本 = 标准单价，无加工成本与制造费用
+- 自制件/虚拟件：
+  - 材料成本 = Σ 子件用量 ×（1 + 损耗率）× 子件材料成本（采购类子件取标准单价，自制/虚拟子件取其卷积材料成本）
+  - 加工成本 = 本层工艺路线工序成本（子件的加工成本不计入上层）
+  - 制造费用 = 按本层材料成本、本层加工成本套用制造费用规则
+
+失效策略：子件价格、BOM、工艺路线变化时调用 mark_stale / mark_routes_stale，通过递归CTE把该物料及其所有
+上层物料标记为过期；制造费用规则变化时 mark_all_stale。查询到过期或缺失的行时回退到实时核算，
+并通过 Inngest 事件请求后台增量卷积（只重算过期与缺失的物料，未变化的下层物料直接复用已存储的成本）。
+
+Author: Luigi Lu
+Date: 2026-03-03
+"""
+
+import time
+import zlib
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from tortoise import Tortoise
+from tortoise.transactions import in_transaction
+from loguru import logger
+
+from apps.master_data.models.material import Material, BOM
+from apps.master_data.models.process import ProcessRoute, Operation
+from apps.kuaizhizao.models.cost_rule import CostRule
+from apps.kuaizhizao.models.standard_cost_rollup import StandardCostRollup
+from apps.kuaizhizao.services.production_cost_service import (
+    DEFAULT_HOURLY_RATE,
+    apply_overhead_rules,
+    resolve_standard_unit_price,
+)
+
+
+DEFAULT_COST_VERSION = "STD"
+
+# 需要展开BOM卷积的来源类型，其余类型按标准单价计入材料成本
+ROLLUP_SOURCE_TYPES = ("Make", "Phantom")
+
+BULK_BATCH_SIZE = 1000
+
+# 后台卷积事件（同一组织、成本版本在间隔内只请求一次）
+STANDARD_COST_ROLLUP_EVENT = "kuaizhizao/standard-cost-rollup"
+ROLLUP_REQUEST_INTERVAL_SECONDS = 60
+
+# (组织ID, 成本版本) -> 最近一次请求后台卷积的时间（time.monotonic；超过请求间隔的条目在下次请求时清除）
+_rollup_requested_at: Dict[Tuple[int, str], float] = {}
+
+
+def _evict_expired_rollup_requests(now: float) -> None:
+    """清除已超过请求间隔的卷积请求记录，避免长期运行的进程中记录无限增长"""
+    expired = [
+        key for key, requested_at in _rollup_requested_at.items()
+        if now - requested_at >= ROLLUP_REQUEST_INTERVAL_SECONDS
+    ]
+    for key in expired:
+        del _rollup_requested_at[key]
+
+
+def compute_low_level_codes(children: Dict[int, List[int]]) -> Tuple[Dict[int, int], Set[int]]:
+    """
+    计算低层码（物料在所有BOM结构中出现的最大层级）
+
+    使用拓扑排序（Kahn算法）一次遍历父子关系，LLC(子件) = max(LLC(父件) + 1)。
+    无法进入拓扑序的物料处于循环引用中，单独返回。
+
+    Args:
+        children: 父件ID -> 子件ID列表
+
+    Returns:
+        Tuple[Dict[int, int], Set[int]]: (物料ID -> 低层码, 循环引用物料ID集合)
+    """
+    nodes: Set[int] = set(children.keys())
+    in_degree: Dict[int, int] = {}
+    for parent, components in children.items():
+        for component in components:
+            nodes.add(component)
+            in_degree[component] = in_degree.get(component, 0) + 1
+
+    llc = {node: 0 for node in nodes}
+    queue = [node for node in nodes if in_degree.get(node, 0) == 0]
+    visited = 0
+    while queue:
+        node = queue.pop()
+        visited += 1
+        for component in children.get(node, []):
+            llc[component] = max(llc[component], llc[node] + 1)
+            in_degree[component] -= 1
+            if in_degree[component] == 0:
+                queue.append(component)
+
+    cyclic = {node for node, degree in in_degree.items() if degree > 0} if visited < len(nodes) else set()
+    return llc, cyclic
+
+
+class StandardCostRollupService:
+    """
+    标准成本卷积服务类
+
+    处理标准成本卷积计算、增量失效与查询。
+    """
+
+    async def rollup(
+        self,
+        tenant_id: int,
+        cost_version: str = DEFAULT_COST_VERSION,
+        full: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        执行标准成本卷积
+
+        一次性加载物料、已审核BOM、工艺路线、工序、制造费用规则（固定5次查询），
+        按低层码自底向上计算并批量写入卷积表。
+
+        Args:
+            tenant_id: 组织ID
+            cost_version: 成本版本
+            full: 是否全量重算（默认只重算过期和缺失的物料）
+
+        Returns:
+            Dict[str, Any]: 卷积结果（物料数、重算数、循环引用物料、耗时）
+        """
+        started = time.monotonic()
+        snapshot = await self._load_snapshot(tenant_id)
+        materials = snapshot["materials"]
+        bom_children = snapshot["bom_children"]
+
+        llc, cyclic = compute_low_level_codes(
+            {parent: [item["component_id"] for item in items] for parent, items in bom_children.items()}
+        )
+        if cyclic:
+            logger.warning(f"标准成本卷积检测到BOM循环引用（组织 {tenant_id}），物料ID: {sorted(cyclic)}")
+
+        # 未过期的已有卷积结果直接复用
+        costs: Dict[int, Dict[str, Decimal]] = {}
+        targets: Set[int] = set(materials.keys())
+        if not full:
+            existing = await StandardCostRollup.filter(
+                tenant_id=tenant_id,
+                cost_version=cost_version,
+            ).values("material_id", "material_cost", "labor_cost", "manufacturing_cost", "is_stale")
+            for row in existing:
+                if row["is_stale"] or row["material_id"] not in materials:
+                    continue
+                costs[row["material_id"]] = {
+                    "material_cost": row["material_cost"],
+                    "labor_cost": row["labor_cost"],
+                    "manufacturing_cost": row["manufacturing_cost"],
+                }
+            targets -= set(costs.keys())
+
+        # 自底向上：低层码大的先算
+        ordered_targets = sorted(targets, key=lambda material_id: llc.get(material_id, 0), reverse=True)
+        now = datetime.now()
+        rows: List[StandardCostRollup] = []
+        for material_id in ordered_targets:
+            material = materials[material_id]
+            unit_cost, details = self._compute_unit_cost(material, snapshot, costs, cyclic)
+            costs[material_id] = unit_cost
+            rows.append(StandardCostRollup(
+                tenant_id=tenant_id,
+                cost_version=cost_version,
+                material_id=material_id,
+                material_code=material["main_code"],
+                material_name=material["name"],
+                source_type=material["source_type"] or "Make",
+                low_level_code=llc.get(material_id, 0),
+                material_cost=unit_cost["material_cost"],
+                labor_cost=unit_cost["labor_cost"],
+                manufacturing_cost=unit_cost["manufacturing_cost"],
+                total_cost=unit_cost["material_cost"] + unit_cost["labor_cost"] + unit_cost["manufacturing_cost"],
+                cost_details=details,
+                is_stale=False,
+                calculated_at=now,
+            ))
+
+        async with in_transaction("default") as conn:
+            # 同一组织、成本版本的卷积写入串行执行（事务级咨询锁，提交或回滚时释放）
+            await conn.execute_query(
+                "SELECT pg_advisory_xact_lock($1, $2)",
+                [tenant_id, zlib.crc32(f"standard_cost_rollup:{cost_version}".encode()) & 0x7FFFFFFF],
+            )
+            delete_query = StandardCostRollup.filter(tenant_id=tenant_id, cost_version=cost_version)
+            if not full:
+                delete_query = delete_query.filter(material_id__in=list(targets) or [0])
+            await delete_query.using_db(conn).delete()
+            for i in range(0, len(rows), BULK_BATCH_SIZE):
+                await StandardCostRollup.bulk_create(rows[i:i + BULK_BATCH_SIZE], using_db=conn)
+
+        duration_ms = int((time.monotonic() - started) * 1000)
+        logger.info(
+            f"标准成本卷积完成（组织 {tenant_id}，版本 {cost_version}）：物料 {len(materials)} 个，"
+            f"重算 {len(rows)} 个，耗时 {duration_ms}ms"
+        )
+        return {
+            "cost_version": cost_version,
+            "material_count": len(materials),
+            "recalculated_count": len(rows),
+            "cyclic_material_ids": sorted(cyclic),
+            "duration_ms": duration_ms,
+        }
+
+    async def get_standard_cost(
+        self,
+        tenant_id: int,
+        material_id: int,
+        cost_version: str = DEFAULT_COST_VERSION,
+        allow_stale: bool = False,
+    ) -> Optional[StandardCostRollup]:
+        """
+        查询物料标准单位成本
+
+        命中过期行或该版本下缺少该物料时，请求后台增量卷积（不在当前请求内卷积）；
+        默认返回None由调用方回退到实时计算，allow_stale=True 时返回过期行（is_stale=True）。
+        该成本版本从未卷积过时返回None。
+
+        Args:
+            tenant_id: 组织ID
+            material_id: 物料ID
+            cost_version: 成本版本
+            allow_stale: 是否允许返回过期行
+
+        Returns:
+            Optional[StandardCostRollup]: 卷积结果
+        """
+        row = await StandardCostRollup.get_or_none(
+            tenant_id=tenant_id,
+            cost_version=cost_version,
+            material_id=material_id,
+        )
+        if row is not None and not row.is_stale:
+            return row
+        if row is None and not await StandardCostRollup.filter(tenant_id=tenant_id, cost_version=cost_version).exists():
+            return None
+
+        await self.request_rollup(tenant_id=tenant_id, cost_version=cost_version)
+        return row if allow_stale else None
+
+    async def request_rollup(self, tenant_id: int, cost_version: str = DEFAULT_COST_VERSION) -> bool:
+        """
+        请求后台增量卷积（发送 Inngest 事件，同一组织、成本版本在间隔内只发送一次）
+
+        Args:
+            tenant_id: 组织ID
+            cost_version: 成本版本
+
+        Returns:
+            bool: 是否已发送事件
+        """
+        key = (tenant_id, cost_version)
+        now = time.monotonic()
+        _evict_expired_rollup_requests(now)
+        if key in _rollup_requested_at:
+            return False
+        _rollup_requested_at[key] = now
+
+        try:
+            from core.inngest.client import inngest_client
+            from inngest import Event
+
+            await inngest_client.send(
+                Event(
+                    name=STANDARD_COST_ROLLUP_EVENT,
+                    data={"tenant_id": tenant_id, "cost_version": cost_version},
+                )
+            )
+            return True
+        except Exception as e:
+            _rollup_requested_at.pop(key, None)
+            logger.warning(f"请求后台标准成本卷积失败（组织 {tenant_id}，版本 {cost_version}）: {e}")
+            return False
+
+    async def mark_stale(
+        self,
+        tenant_id: int,
+        material_ids: Iterable[int],
+        cost_version: Optional[str] = None,
+    ) -> int:
+        """
+        将物料及其所有上层物料（where-used）标记为过期
+
+        使用一条递归CTE沿BOM向上查找父件（UNION 去重，循环引用不会无限递归）。
+
+        Args:
+            tenant_id: 组织ID
+            material_ids: 发生变化的物料ID（子件价格变化、BOM变化的父件等）
+            cost_version: 成本版本（不传则所有版本）
+
+        Returns:
+            int: 标记为过期的行数
+        """
+        material_ids = [int(material_id) for material_id in material_ids if material_id]
+        if not material_ids:
+            return 0
+
+        params: List[Any] = [tenant_id, material_ids]
+        version_condition = ""
+        if cost_version:
+            params.append(cost_version)
+            version_condition = 'AND r."cost_version" = $3'
+
+        sql = f"""
+            WITH RECURSIVE affected("material_id") AS (
+                SELECT unnest($2::int[])
+                UNION
+                SELECT b."material_id"
+                FROM "{BOM._meta.db_table}" b
+                JOIN affected a ON b."component_id" = a."material_id"
+                WHERE b."tenant_id" = $1 AND b."deleted_at" IS NULL
+            )
+            UPDATE "{StandardCostRollup._meta.db_table}" r
+            SET "is_stale" = TRUE, "updated_at" = NOW()
+            WHERE r."tenant_id" = $1
+              AND r."is_stale" = FALSE
+              AND r."material_id" IN (SELECT "material_id" FROM affected)
+              {version_condition}
+        """
+        conn = Tortoise.get_connection("default")
+        row_count, _ = await conn.execute_query(sql, params)
+        if row_count:
+            logger.info(f"标准成本失效（组织 {tenant_id}）：物料 {material_ids} 影响 {row_count} 行")
+        return row_count
+
+    async def mark_routes_stale(self, tenant_id: int, process_route_ids: Iterable[int]) -> int:
+        """
+        工艺路线变化（工序、工时、启用状态、删除）时，将使用这些工艺路线的物料及其上层物料标记为过期
+
+        Args:
+            tenant_id: 组织ID
+            process_route_ids: 工艺路线ID
+
+        Returns:
+            int: 标记为过期的行数
+        """
+        process_route_ids = [int(route_id) for route_id in process_route_ids if route_id]
+        if not process_route_ids:
+            return 0
+        material_ids = await Material.filter(
+            tenant_id=tenant_id,
+            process_route_id__in=process_route_ids,
+            deleted_at__isnull=True,
+        ).values_list("id", flat=True)
+        return await self.mark_stale(tenant_id=tenant_id, material_ids=material_ids)
+
+    async def mark_all_stale(self, tenant_id: int) -> int:
+        """
+        制造费用规则变化时，将组织所有卷积结果标记为过期
+
+        Args:
+            tenant_id: 组织ID
+
+        Returns:
+            int: 标记为过期的行数
+        """
+        row_count = await StandardCostRollup.filter(
+            tenant_id=tenant_id,
+            is_stale=False,
+        ).update(is_stale=True, updated_at=datetime.now())
+        if row_count:
+            logger.info(f"标准成本失效（组织 {tenant_id}）：制造费用规则变化，影响 {row_count} 行")
+        return row_count
+
+    # ==================== 内部实现 ====================
+
+    async def _load_snapshot(self, tenant_id: int) -> Dict[str, Any]:
+        """一次性加载卷积所需的主数据"""
+        material_rows = await Material.filter(
+            tenant_id=tenant_id,
+            deleted_at__isnull=True,
+        ).values("id", "main_code", "name", "source_type", "defaults", "process_route_id")
+        materials = {row["id"]: row for row in material_rows}
+
+        bom_rows = await BOM.filter(
+            tenant_id=tenant_id,
+            deleted_at__isnull=True,
+            approval_status="approved",
+        ).values(
+            "id", "material_id", "component_id", "quantity", "waste_rate",
+            "unit", "version", "bom_code", "priority", "created_at",
+        )
+
+        route_rows = await ProcessRoute.filter(
+            tenant_id=tenant_id,
+            deleted_at__isnull=True,
+            is_active=True,
+        ).values("id", "operation_sequence")
+
+        operation_rows = await Operation.filter(
+            tenant_id=tenant_id,
+            deleted_at__isnull=True,
+            is_active=True,
+        ).values("id", "code", "name")
+
+        overhead_rules = await CostRule.filter(
+            tenant_id=tenant_id,
+            rule_type="制造费用",
+            is_active=True,
+            deleted_at__isnull=True,
+        ).all()
+
+        return {
+            "materials": materials,
+            "bom_children": self._select_current_bom_items(bom_rows),
+            "routes": {row["id"]: row["operation_sequence"] or [] for row in route_rows},
+            "operations": {row["id"]: row for row in operation_rows},
+            "overhead_rules": overhead_rules,
+        }
+
+    @staticmethod
+    def _select_current_bom_items(bom_rows: List[Dict[str, Any]]) -> Dict[int, List[Dict[str, Any]]]:
+        """
+        为每个父件选出当前生效的BOM明细
+
+        与 bom_helper.get_bom_items_by_material_id 口径一致：取版本号最大（同版本取最新创建）的BOM，
+        按 bom_code 关联明细（bom_code 为空时按版本关联），按优先级、ID排序。
+        """
+        rows_by_parent: Dict[int, List[Dict[str, Any]]] = {}
+        for row in bom_rows:
+            rows_by_parent.setdefault(row["material_id"], []).append(row)
+
+        current: Dict[int, List[Dict[str, Any]]] = {}
+        for parent, rows in rows_by_parent.items():
+            header = max(rows, key=lambda r: (r["version"] or "", r["created_at"]))
+            if header["bom_code"]:
+                items = [r for r in rows if r["bom_code"] == header["bom_code"]]
+            else:
+                items = [r for r in rows if r["version"] == header["version"]]
+            current[parent] = sorted(items, key=lambda r: (r["priority"], r["id"]))
+        return current
+
+    def _compute_unit_cost(
+        self,
+        material: Dict[str, Any],
+        snapshot: Dict[str, Any],
+        costs: Dict[int, Dict[str, Decimal]],
+        cyclic: Set[int],
+    ) -> Tuple[Dict[str, Decimal], Dict[str, Any]]:
+        """计算单个物料的单位标准成本（子件成本已在 costs 中）"""
+        source_type = material["source_type"] or "Make"
+        zero = Decimal(0)
+
+        if source_type not in ROLLUP_SOURCE_TYPES:
+            unit_price = resolve_standard_unit_price(material["defaults"])
+            return (
+                {"material_cost": unit_price, "labor_cost": zero, "manufacturing_cost": zero},
+                {"unit_price": float(unit_price)},
+            )
+
+        materials = snapshot["materials"]
+        material_cost = zero
+        component_breakdown = []
+
+        for item in snapshot["bom_children"].get(material["id"], []):
+            component = materials.get(item["component_id"])
+            if not component:
+                continue
+            component_qty = Decimal(str(item["quantity"])) * (
+                Decimal(1) + Decimal(str(item["waste_rate"] or 0)) / Decimal(100)
+            )
+            component_source_type = component["source_type"] or "Make"
+            component_cost = costs.get(component["id"])
+            if component_cost is None:
+                if component["id"] in cyclic:
+                    logger.warning(f"物料 {component['main_code']} 处于BOM循环引用中，成本按0计入")
+                component_cost = {"material_cost": zero, "labor_cost": zero, "manufacturing_cost": zero}
+
+            # 与实时核算一致：自制/虚拟子件只计其材料成本（子件加工成本与制造费用不计入上层）
+            item_material_cost = component_qty * component_cost["material_cost"]
+            material_cost += item_material_cost
+
+            component_breakdown.append({
+                "material_id": component["id"],
+                "material_code": component["main_code"],
+                "material_name": component["name"],
+                "source_type": component_source_type,
+                "quantity": float(component_qty),
+                "unit": item["unit"],
+                "unit_cost": float(component_cost["material_cost"]),
+                "material_cost": float(item_material_cost),
+            })
+
+        labor_cost, operation_breakdown = self._compute_route_cost(material, snapshot)
+        overhead, overhead_breakdown = apply_overhead_rules(
+            snapshot["overhead_rules"], material_cost, labor_cost, Decimal(1)
+        )
+
+        return (
+            {
+                "material_cost": material_cost,
+                "labor_cost": labor_cost,
+                "manufacturing_cost": overhead,
+            },
+            {
+                "components": component_breakdown,
+                "operations": operation_breakdown,
+                "overheads": overhead_breakdown,
+            },
+        )
+
+    @staticmethod
+    def _compute_route_cost(
+        material: Dict[str, Any],
+        snapshot: Dict[str, Any],
+    ) -> Tuple[Decimal, List[Dict[str, Any]]]:
+        """本层单位加工成本：工艺路线各工序标准工时 × 工时单价"""
+        route_id = material["process_route_id"]
+        if not route_id or route_id not in snapshot["routes"]:
+            return Decimal(0), []
+
+        total_cost = Decimal(0)
+        breakdown = []
+        for op_data in snapshot["routes"][route_id]:
+            operation = snapshot["operations"].get(op_data.get("operation_id"))
+            if not operation:
+                continue
+            standard_time = Decimal(str(op_data.get("standard_time", 1.0)))
+            operation_cost = standard_time * DEFAULT_HOURLY_RATE
+            total_cost += operation_cost
+            breakdown.append({
+                "operation_id": operation["id"],
+                "operation_code": operation["code"],
+                "operation_name": operation["name"],
+                "standard_time": float(standard_time),
+                "hourly_rate": float(DEFAULT_HOURLY_RATE),
+                "cost": float(operation_cost),
+            })
+        return total_cost, breakdown
@@ -186,7 +186,7 @@ class StateTransitionService:
         Raises:
             BusinessLogicError: 状态流转不允许
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 检查是否可以流转
             if not await self.can_transition(tenant_id, entity_type, from_state, to_state, operator_id):
                 raise BusinessLogicError(f"不允许从状态 {from_state} 流转到 {to_state}")
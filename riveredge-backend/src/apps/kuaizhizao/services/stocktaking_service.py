@@ -69,7 +69,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
         if not is_enabled:
             raise BusinessLogicError("盘点单节点未启用，无法创建盘点单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             # 生成盘点单号
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(
@@ -183,7 +183,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
             NotFoundError: 盘点单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取盘点单
             stocktaking = await Stocktaking.get_or_none(
                 id=stocktaking_id,
@@ -246,7 +246,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
         if not is_enabled:
             raise BusinessLogicError("盘点单节点未启用，无法开始盘点")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取盘点单
             stocktaking = await Stocktaking.get_or_none(
                 id=stocktaking_id,
@@ -295,7 +295,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
             NotFoundError: 盘点单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 检查盘点单是否存在
             stocktaking = await Stocktaking.get_or_none(
                 id=stocktaking_id,
@@ -372,7 +372,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
             NotFoundError: 盘点明细不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取盘点明细
             item = await StocktakingItem.get_or_none(
                 id=item_id,
@@ -487,7 +487,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
             NotFoundError: 盘点单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 检查盘点单是否存在
             stocktaking = await Stocktaking.get_or_none(
                 id=stocktaking_id,
@@ -582,7 +582,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
             NotFoundError: 盘点明细不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取盘点明细
             item = await StocktakingItem.get_or_none(
                 id=item_id,
@@ -654,7 +654,7 @@ class StocktakingService(AppBaseService[Stocktaking]):
             NotFoundError: 盘点单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取盘点单
             stocktaking = await Stocktaking.get_or_none(
                 id=stocktaking_id,
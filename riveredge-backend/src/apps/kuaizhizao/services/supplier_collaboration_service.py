@@ -47,7 +47,7 @@ class SupplierCollaborationService(BaseService):
         Returns:
             Dict[str, Any]: 下发结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取采购订单
             purchase_order = await PurchaseOrder.filter(
                 tenant_id=tenant_id,
@@ -112,7 +112,7 @@ class SupplierCollaborationService(BaseService):
         Returns:
             Dict[str, Any]: 更新结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取采购订单
             purchase_order = await PurchaseOrder.filter(
                 tenant_id=tenant_id,
@@ -180,7 +180,7 @@ class SupplierCollaborationService(BaseService):
         Returns:
             Dict[str, Any]: 提交结果
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取采购订单
             purchase_order = await PurchaseOrder.filter(
                 tenant_id=tenant_id,
@@ -3,193 +3,349 @@
 
 提供物料批次的正向和反向追溯功能。
 
+追溯按层（frontier）批量展开：每一层对当前所有批次只发一次查询，而不是每个批次、每个工单各查一次。
+默认读取批次谱系边表（BatchGenealogyEdge，物料绑定创建/删除时只维护受影响的一行）；
+关闭 TRACEABILITY_USE_GENEALOGY_EDGES 时直接按层查询物料绑定记录。两种方式每层均为两次查询。
+
 Author: AI Assistant
 Date: 2024-05-20
 """
 
-from typing import List, Dict, Set, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from tortoise.transactions import in_transaction
+
+from apps.kuaizhizao.models.batch_genealogy_edge import BatchGenealogyEdge
 from apps.kuaizhizao.models.material_binding import MaterialBinding
+from infra.config.infra_config import infra_settings
+
+# 是否使用批次谱系边表追溯
+USE_GENEALOGY_EDGES = infra_settings.TRACEABILITY_USE_GENEALOGY_EDGES
+# 默认最大追溯层数（批次 -> 工单 -> 批次 为一层）
+DEFAULT_TRACE_MAX_DEPTH = 20
+# 默认最大节点数（超过后截断，防止召回调查拖垮数据库）
+DEFAULT_TRACE_MAX_NODES = 5000
+
+_BINDING_FIELDS = (
+    "work_order_id",
+    "work_order_code",
+    "operation_name",
+    "batch_no",
+    "material_id",
+    "material_code",
+    "material_name",
+)
+
 
 class TraceabilityService:
     """
     追溯服务类
     """
 
-    async def get_trace_graph(self, batch_no: str, direction: str = "both") -> Dict:
+    async def get_trace_graph(
+        self,
+        tenant_id: int,
+        batch_no: str,
+        direction: str = "both",
+        max_depth: int = DEFAULT_TRACE_MAX_DEPTH,
+        max_nodes: int = DEFAULT_TRACE_MAX_NODES,
+    ) -> Dict:
         """
         获取追溯图谱
-        
+
         Args:
+            tenant_id: 组织ID
             batch_no: 批次号
             direction: 追溯方向 ('forward', 'backward', 'both')
-            
+            max_depth: 最大追溯层数
+            max_nodes: 最大节点数（达到后停止展开并标记 truncated）
+
         Returns:
-            Dict: 包含 nodes 和 edges 的图谱数据
+            Dict: 包含 nodes、edges 和 truncated 的图谱数据
         """
-        nodes = {}
-        edges = []
-        visited = set()
+        graph = _TraceGraph(max_nodes)
 
         # 初始节点
-        nodes[batch_no] = {
+        graph.add_node(batch_no, {
             "id": batch_no,
             "label": batch_no,
             "type": "batch"
-        }
+        })
 
         if direction in ["forward", "both"]:
-            await self._trace_forward(batch_no, nodes, edges, visited)
-        
-        # 重置 visited 以便反向追溯
-        visited = set()
+            await self._trace(tenant_id, batch_no, graph, max_depth, forward=True)
+
         if direction in ["backward", "both"]:
-            await self._trace_backward(batch_no, nodes, edges, visited)
+            await self._trace(tenant_id, batch_no, graph, max_depth, forward=False)
 
         return {
-            "nodes": list(nodes.values()),
-            "edges": edges
+            "nodes": list(graph.nodes.values()),
+            "edges": graph.edges,
+            "truncated": graph.truncated,
         }
 
-    async def _trace_forward(self, current_batch: str, nodes: Dict, edges: List, visited: Set):
+    async def _trace(
+        self,
+        tenant_id: int,
+        batch_no: str,
+        graph: "_TraceGraph",
+        max_depth: int,
+        forward: bool,
+    ) -> None:
         """
-        正向追溯（原料 -> 成品）
+        按层展开追溯（正向：原料 -> 成品；反向：成品 -> 原料）
+
+        边的方向始终表示物料流动方向：原料批次 -> 工单 -> 产出批次。
         """
-        if current_batch in visited:
-            return
-        visited.add(current_batch)
-
-        # 1. 查找该批次作为原料被投料的记录 (feeding)
-        feedings = await MaterialBinding.filter(
-            batch_no=current_batch, 
-            binding_type="feeding"
-        ).all()
-
-        for feeding in feedings:
-            wo_node_id = f"WO-{feeding.work_order_code}"
-            
-            # 添加工单节点
-            if wo_node_id not in nodes:
-                nodes[wo_node_id] = {
+        visited: Set[str] = {batch_no}
+        frontier = [batch_no]
+        depth = 0
+        while frontier and depth < max_depth and not graph.truncated:
+            depth += 1
+            links = await self._load_links(tenant_id, frontier, forward)
+            next_frontier: List[str] = []
+            for link in links:
+                wo_node_id = f"WO-{link['work_order_code']}"
+                graph.add_node(wo_node_id, {
                     "id": wo_node_id,
-                    "label": f"工单: {feeding.work_order_code}",
+                    "label": f"工单: {link['work_order_code']}",
                     "type": "work_order",
                     "data": {
-                        "work_order_id": feeding.work_order_id,
-                        "operation_name": feeding.operation_name
+                        "work_order_id": link["work_order_id"],
+                        "operation_name": link["operation_name"],
                     }
-                }
-            
-            # 添加边: 原料批次 -> 工单
-            edges.append({
-                "source": current_batch,
-                "target": wo_node_id,
-                "label": "投料"
-            })
-
-            # 2. 查找该工单产出的记录 (discharging)
-            dischargings = await MaterialBinding.filter(
-                work_order_id=feeding.work_order_id,
-                binding_type="discharging"
-            ).all()
-
-            for discharging in dischargings:
-                if not discharging.batch_no:
+                })
+
+                if forward:
+                    next_batch, next_prefix = link["output_batch_no"], "output"
+                    graph.add_edge(link["input_batch_no"], wo_node_id, "投料")
+                else:
+                    next_batch, next_prefix = link["input_batch_no"], "input"
+                    graph.add_edge(wo_node_id, link["output_batch_no"], "产出")
+
+                if not next_batch:
                     continue
-                    
-                output_batch = discharging.batch_no
-                
-                # 添加产出批次节点
-                if output_batch not in nodes:
-                    nodes[output_batch] = {
-                        "id": output_batch,
-                        "label": output_batch,
-                        "type": "batch",
-                        "data": {
-                            "material_name": discharging.material_name,
-                            "material_code": discharging.material_code
-                        }
+
+                graph.add_node(next_batch, {
+                    "id": next_batch,
+                    "label": next_batch,
+                    "type": "batch",
+                    "data": {
+                        "material_name": link[f"{next_prefix}_material_name"],
+                        "material_code": link[f"{next_prefix}_material_code"],
                     }
-                
-                # 添加边: 工单 -> 产出批次
-                edges.append({
-                    "source": wo_node_id,
-                    "target": output_batch,
-                    "label": "产出"
                 })
+                if forward:
+                    graph.add_edge(wo_node_id, next_batch, "产出")
+                else:
+                    graph.add_edge(next_batch, wo_node_id, "投料")
+
+                if next_batch not in visited:
+                    visited.add(next_batch)
+                    next_frontier.append(next_batch)
+
+                if graph.truncated:
+                    break
+            frontier = next_frontier
+
+    async def _load_links(self, tenant_id: int, batches: List[str], forward: bool) -> List[Dict[str, Any]]:
+        """
+        获取一层批次的全部谱系链接（投料批次 -> 工单 -> 产出批次）
+
+        Args:
+            tenant_id: 组织ID
+            batches: 当前层批次号
+            forward: 是否正向（正向按投料批次查找，反向按产出批次查找）
+
+        Returns:
+            List[Dict[str, Any]]: 链接列表（字段见 _make_link：work_order_id、work_order_code、operation_name 及 input_/output_ 批次号、物料编码、物料名称）
+        """
+        if USE_GENEALOGY_EDGES:
+            from_rows, to_rows = await self._load_edge_sides(tenant_id, batches, forward)
+        else:
+            from_rows, to_rows = await self._load_binding_sides(tenant_id, batches, forward)
+
+        to_by_work_order: Dict[int, List[Dict[str, Any]]] = {}
+        for row in to_rows:
+            to_by_work_order.setdefault(row["work_order_id"], []).append(row)
+
+        links: List[Dict[str, Any]] = []
+        for row in from_rows:
+            for other in to_by_work_order.get(row["work_order_id"]) or [None]:
+                feeding, discharging = (row, other) if forward else (other, row)
+                links.append(_make_link(row, feeding, discharging))
+        return links
 
-                # 递归追溯
-                await self._trace_forward(output_batch, nodes, edges, visited)
+    async def _load_edge_sides(
+        self,
+        tenant_id: int,
+        batches: List[str],
+        forward: bool,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        从谱系边表取一层的两侧记录：先按批次找到工单，再一次取这些工单另一侧的批次
 
-    async def _trace_backward(self, current_batch: str, nodes: Dict, edges: List, visited: Set):
+        Returns:
+            Tuple: (当前批次侧记录, 同工单另一侧记录)，字段同物料绑定（batch_no、material_code 等）
         """
-        反向追溯（成品 -> 原料）
+        from_side, to_side = ("input", "output") if forward else ("output", "input")
+        from_rows = await BatchGenealogyEdge.filter(
+            tenant_id=tenant_id,
+            **{f"{from_side}_batch_no__in": batches},
+        ).order_by("id").values(**_edge_side_fields(from_side))
+        if not from_rows:
+            return [], []
+
+        to_rows = await BatchGenealogyEdge.filter(
+            tenant_id=tenant_id,
+            work_order_id__in=list({row["work_order_id"] for row in from_rows}),
+            **{f"{to_side}_batch_no__isnull": False},
+        ).order_by("id").values(**_edge_side_fields(to_side))
+        return from_rows, to_rows
+
+    async def _load_binding_sides(
+        self,
+        tenant_id: int,
+        batches: List[str],
+        forward: bool,
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
         """
-        if current_batch in visited:
+        直接查询物料绑定取一层的两侧记录：先按批次找到工单，再一次取这些工单的另一侧绑定
+
+        Returns:
+            Tuple: (当前批次侧绑定, 同工单另一侧绑定)
+        """
+        from_type, to_type = ("feeding", "discharging") if forward else ("discharging", "feeding")
+        from_bindings = await MaterialBinding.filter(
+            tenant_id=tenant_id,
+            binding_type=from_type,
+            batch_no__in=batches,
+            deleted_at__isnull=True,
+        ).order_by("id").values(*_BINDING_FIELDS)
+        if not from_bindings:
+            return [], []
+
+        to_bindings = await MaterialBinding.filter(
+            tenant_id=tenant_id,
+            binding_type=to_type,
+            work_order_id__in=list({b["work_order_id"] for b in from_bindings}),
+            deleted_at__isnull=True,
+            batch_no__isnull=False,
+        ).exclude(batch_no="").order_by("id").values(*_BINDING_FIELDS)
+        return from_bindings, to_bindings
+
+    async def sync_binding_edge(
+        self,
+        tenant_id: int,
+        work_order_id: int,
+        binding_type: str,
+        batch_no: str,
+    ) -> None:
+        """
+        同步单个物料绑定对应的谱系边（物料绑定创建/删除后调用）
+
+        谱系边表中每个工单的每个投料批次、每个产出批次各一行，只重写该绑定所在的一行：
+        该工单该批次仍有有效绑定时以最早的绑定为准，否则删除。
+
+        Args:
+            tenant_id: 组织ID
+            work_order_id: 工单ID
+            binding_type: 绑定类型（feeding/discharging）
+            batch_no: 批次号
+        """
+        if binding_type not in ("feeding", "discharging") or not batch_no:
             return
-        visited.add(current_batch)
-
-        # 1. 查找该批次作为产出被记录的记录 (discharging)
-        # 这意味着它是某个工单产出的
-        dischargings = await MaterialBinding.filter(
-            batch_no=current_batch,
-            binding_type="discharging"
-        ).all()
-
-        for discharging in dischargings:
-            wo_node_id = f"WO-{discharging.work_order_code}"
-            
-            # 添加工单节点
-            if wo_node_id not in nodes:
-                nodes[wo_node_id] = {
-                    "id": wo_node_id,
-                    "label": f"工单: {discharging.work_order_code}",
-                    "type": "work_order",
-                    "data": {
-                        "work_order_id": discharging.work_order_id,
-                        "operation_name": discharging.operation_name
-                    }
-                }
-            
-            # 添加边: 工单 -> 产出批次 (反向展示时，逻辑上流向是 工单->批次，但追溯是反向的)
-            # 在图谱中通常还是展示流向，即 工单 -> current_batch
-            # 这里我们需要确保边的方向一致性，即始终表示"流动"方向
-            # 所以即便是反向追溯，边的方向还是：原料 -> 工单 -> 成品
-            edges.append({
-                "source": wo_node_id,
-                "target": current_batch,
-                "label": "产出"
-            })
-
-            # 2. 查找该工单投料的记录 (feeding)
-            feedings = await MaterialBinding.filter(
-                work_order_id=discharging.work_order_id,
-                binding_type="feeding"
-            ).all()
-
-            for feeding in feedings:
-                if not feeding.batch_no:
-                    continue
-                
-                input_batch = feeding.batch_no
-                
-                # 添加原料批次节点
-                if input_batch not in nodes:
-                    nodes[input_batch] = {
-                        "id": input_batch,
-                        "label": input_batch,
-                        "type": "batch",
-                        "data": {
-                            "material_name": feeding.material_name,
-                            "material_code": feeding.material_code
-                        }
-                    }
-                
-                # 添加边: 原料批次 -> 工单
-                edges.append({
-                    "source": input_batch,
-                    "target": wo_node_id,
-                    "label": "投料"
-                })
+        side = "input" if binding_type == "feeding" else "output"
+        async with in_transaction("default") as conn:
+            binding = await MaterialBinding.filter(
+                tenant_id=tenant_id,
+                work_order_id=work_order_id,
+                binding_type=binding_type,
+                batch_no=batch_no,
+                deleted_at__isnull=True,
+            ).using_db(conn).order_by("id").first().values(*_BINDING_FIELDS)
+
+            await BatchGenealogyEdge.filter(
+                tenant_id=tenant_id,
+                work_order_id=work_order_id,
+                **{f"{side}_batch_no": batch_no},
+            ).using_db(conn).delete()
+            if not binding:
+                return
+
+            await BatchGenealogyEdge.create(
+                tenant_id=tenant_id,
+                work_order_id=work_order_id,
+                work_order_code=binding["work_order_code"],
+                operation_name=binding["operation_name"],
+                **{
+                    f"{side}_batch_no": binding["batch_no"],
+                    f"{side}_material_id": binding["material_id"],
+                    f"{side}_material_code": binding["material_code"],
+                    f"{side}_material_name": binding["material_name"],
+                },
+                using_db=conn,
+            )
+
+
+def _edge_side_fields(side: str) -> Dict[str, str]:
+    """谱系边单侧字段（别名 -> 字段，映射为与物料绑定相同的字段名）"""
+    return {
+        "work_order_id": "work_order_id",
+        "work_order_code": "work_order_code",
+        "operation_name": "operation_name",
+        "batch_no": f"{side}_batch_no",
+        "material_code": f"{side}_material_code",
+        "material_name": f"{side}_material_name",
+    }
+
+
+def _make_link(
+    base: Dict[str, Any],
+    feeding: Optional[Dict[str, Any]],
+    discharging: Optional[Dict[str, Any]],
+) -> Dict[str, Any]:
+    """由一对投料/产出绑定构造谱系链接"""
+    return {
+        "work_order_id": base["work_order_id"],
+        "work_order_code": base["work_order_code"],
+        "operation_name": base["operation_name"],
+        "input_batch_no": feeding["batch_no"] if feeding else None,
+        "input_material_code": feeding["material_code"] if feeding else None,
+        "input_material_name": feeding["material_name"] if feeding else None,
+        "output_batch_no": discharging["batch_no"] if discharging else None,
+        "output_material_code": discharging["material_code"] if discharging else None,
+        "output_material_name": discharging["material_name"] if discharging else None,
+    }
 
-                # 递归追溯
-                await self._trace_backward(input_batch, nodes, edges, visited)
+
+class _TraceGraph:
+    """追溯图谱（节点去重、边去重、节点数上限）"""
+
+    def __init__(self, max_nodes: int):
+        self.max_nodes = max_nodes
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.edges: List[Dict[str, str]] = []
+        self.truncated = False
+        self._edge_keys: Set[Tuple[str, str, str]] = set()
+
+    def add_node(self, node_id: str, node: Dict[str, Any]) -> None:
+        """添加节点（已存在则忽略，超过上限则标记截断）"""
+        if node_id in self.nodes:
+            return
+        if len(self.nodes) >= self.max_nodes:
+            self.truncated = True
+            return
+        self.nodes[node_id] = node
+
+    def add_edge(self, source: str, target: str, label: str) -> None:
+        """添加边（两端节点均存在且未重复时）"""
+        key = (source, target, label)
+        if key in self._edge_keys or source not in self.nodes or target not in self.nodes:
+            return
+        self._edge_keys.add(key)
+        self.edges.append({
+            "source": source,
+            "target": target,
+            "label": label
+        })
@@ -7,7 +7,7 @@ Author: Luigi Lu
 Date: 2025-12-30
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from datetime import datetime, timedelta
 from decimal import Decimal
 import uuid
@@ -79,6 +79,8 @@ from apps.kuaizhizao.schemas.warehouse import (
 from apps.base_service import AppBaseService
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
 from infra.services.business_config_service import BusinessConfigService
+from core.utils.stream_export import ExportColumn, StreamExport
+
 
 class ProductionPickingService(AppBaseService[ProductionPicking]):
     """生产领料单服务"""
@@ -88,7 +90,7 @@ class ProductionPickingService(AppBaseService[ProductionPicking]):
 
     async def create_production_picking(self, tenant_id: int, picking_data: ProductionPickingCreate, created_by: int) -> ProductionPickingResponse:
         """创建生产领料单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "PRODUCTION_PICKING_CODE", prefix=f"PP{today}")
@@ -143,6 +145,18 @@ class ProductionPickingService(AppBaseService[ProductionPicking]):
 
     async def list_production_pickings(self, tenant_id: int, skip: int = 0, limit: int = 20, **filters) -> List[ProductionPickingListResponse]:
         """获取生产领料单列表"""
+        pickings, _ = await self.list_production_pickings_page(tenant_id, skip=skip, limit=limit, **filters)
+        return pickings
+
+    async def list_production_pickings_page(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Tuple[List[ProductionPickingListResponse], Optional[str]]:
+        """获取生产领料单分页列表（传入 cursor 时使用键集分页），返回 (列表, 下一页游标)"""
         query = ProductionPicking.filter(tenant_id=tenant_id)
 
         # 应用过滤条件
@@ -151,12 +165,12 @@ class ProductionPickingService(AppBaseService[ProductionPicking]):
         if filters.get('work_order_id'):
             query = query.filter(work_order_id=filters['work_order_id'])
 
-        pickings = await query.offset(skip).limit(limit).order_by('-created_at')
-        return [ProductionPickingListResponse.model_validate(picking) for picking in pickings]
+        pickings, next_cursor = await self.paginate(query, limit=limit, skip=skip, cursor=cursor)
+        return [ProductionPickingListResponse.model_validate(picking) for picking in pickings], next_cursor
 
     async def update_production_picking(self, tenant_id: int, picking_id: int, picking_data: ProductionPickingUpdate, updated_by: int) -> ProductionPickingResponse:
         """更新生产领料单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             picking = await self.get_production_picking_by_id(tenant_id, picking_id)
             update_data = picking_data.model_dump(exclude_unset=True, exclude={'updated_by'})
             update_data['updated_by'] = updated_by
@@ -182,7 +196,7 @@ class ProductionPickingService(AppBaseService[ProductionPicking]):
 
     async def confirm_picking(self, tenant_id: int, picking_id: int, confirmed_by: int) -> ProductionPickingResponse:
         """确认领料"""
-        async with in_transaction():
+        async with in_transaction("default"):
             picking = await self.get_production_picking_by_id(tenant_id, picking_id)
 
             if picking.status != '待领料':
@@ -258,7 +272,7 @@ class ProductionPickingService(AppBaseService[ProductionPicking]):
         from apps.kuaizhizao.services.work_order_service import WorkOrderService
         from decimal import Decimal
         
-        async with in_transaction():
+        async with in_transaction("default"):
             # 1. 获取工单信息
             work_order = await WorkOrder.get_or_none(tenant_id=tenant_id, id=work_order_id)
             if not work_order:
@@ -409,7 +423,7 @@ class ProductionReturnService(AppBaseService[ProductionReturn]):
         created_by: int
     ) -> ProductionReturnResponse:
         """创建生产退料单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "PRODUCTION_RETURN_CODE", prefix=f"PR{today}")
@@ -538,7 +552,7 @@ class ProductionReturnService(AppBaseService[ProductionReturn]):
         updated_by: int
     ) -> ProductionReturnResponse:
         """更新生产退料单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             await self.get_production_return_by_id(tenant_id, return_id)
             dump = return_data.model_dump(exclude_unset=True, exclude={"return_code"})
             dump["updated_by"] = updated_by
@@ -568,7 +582,7 @@ class ProductionReturnService(AppBaseService[ProductionReturn]):
         confirmed_by: int
     ) -> ProductionReturnResponse:
         """确认退料"""
-        async with in_transaction():
+        async with in_transaction("default"):
             ret = await self.get_production_return_by_id(tenant_id, return_id)
             if ret.status != "待退料":
                 raise BusinessLogicError("只有待退料状态的生产退料单才能确认退料")
@@ -624,7 +638,7 @@ class FinishedGoodsReceiptService(AppBaseService[FinishedGoodsReceipt]):
 
     async def create_finished_goods_receipt(self, tenant_id: int, receipt_data: FinishedGoodsReceiptCreate, created_by: int, items: Optional[List[FinishedGoodsReceiptItemCreate]] = None) -> FinishedGoodsReceiptResponse:
         """创建成品入库单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             # 如果未提供receipt_code，则自动生成
             if receipt_data.receipt_code:
@@ -748,6 +762,18 @@ class FinishedGoodsReceiptService(AppBaseService[FinishedGoodsReceipt]):
 
     async def list_finished_goods_receipts(self, tenant_id: int, skip: int = 0, limit: int = 20, **filters) -> List[FinishedGoodsReceiptResponse]:
         """获取成品入库单列表"""
+        receipts, _ = await self.list_finished_goods_receipts_page(tenant_id, skip=skip, limit=limit, **filters)
+        return receipts
+
+    async def list_finished_goods_receipts_page(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Tuple[List[FinishedGoodsReceiptResponse], Optional[str]]:
+        """获取成品入库单分页列表（传入 cursor 时使用键集分页），返回 (列表, 下一页游标)"""
         query = FinishedGoodsReceipt.filter(tenant_id=tenant_id)
 
         # 应用过滤条件
@@ -756,12 +782,12 @@ class FinishedGoodsReceiptService(AppBaseService[FinishedGoodsReceipt]):
         if filters.get('work_order_id'):
             query = query.filter(work_order_id=filters['work_order_id'])
 
-        receipts = await query.offset(skip).limit(limit).order_by('-created_at')
-        return [FinishedGoodsReceiptResponse.model_validate(receipt) for receipt in receipts]
+        receipts, next_cursor = await self.paginate(query, limit=limit, skip=skip, cursor=cursor)
+        return [FinishedGoodsReceiptResponse.model_validate(receipt) for receipt in receipts], next_cursor
 
     async def confirm_receipt(self, tenant_id: int, receipt_id: int, confirmed_by: int) -> FinishedGoodsReceiptResponse:
         """确认入库"""
-        async with in_transaction():
+        async with in_transaction("default"):
             receipt = await self.get_finished_goods_receipt_by_id(tenant_id, receipt_id)
 
             if receipt.status != '待入库':
@@ -839,7 +865,7 @@ class FinishedGoodsReceiptService(AppBaseService[FinishedGoodsReceipt]):
         from apps.kuaizhizao.models.finished_goods_receipt_item import FinishedGoodsReceiptItem
         from decimal import Decimal
         
-        async with in_transaction():
+        async with in_transaction("default"):
             # 1. 获取工单信息
             work_order = await WorkOrder.get_or_none(tenant_id=tenant_id, id=work_order_id)
             if not work_order:
@@ -998,7 +1024,7 @@ class SalesDeliveryService(AppBaseService[SalesDelivery]):
         if not is_enabled:
             raise BusinessLogicError("销售发货模块未启用，无法创建出库单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             
             # 2. 检查是否需要审核
@@ -1210,8 +1236,8 @@ class SalesDeliveryService(AppBaseService[SalesDelivery]):
         resp = SalesDeliveryResponse.model_validate(delivery)
         return resp.model_copy(update={"lifecycle": get_sales_delivery_lifecycle(delivery)})
 
-    async def list_sales_deliveries(self, tenant_id: int, skip: int = 0, limit: int = 20, **filters) -> List[SalesDeliveryResponse]:
-        """获取销售出库单列表"""
+    def _build_sales_delivery_query(self, tenant_id: int, **filters):
+        """构建销售出库单查询（列表与导出共用过滤条件）"""
         query = SalesDelivery.filter(tenant_id=tenant_id)
 
         # 应用过滤条件
@@ -1219,13 +1245,29 @@ class SalesDeliveryService(AppBaseService[SalesDelivery]):
             query = query.filter(status=filters['status'])
         if filters.get('sales_order_id'):
             query = query.filter(sales_order_id=filters['sales_order_id'])
+        return query
+
+    async def list_sales_deliveries(self, tenant_id: int, skip: int = 0, limit: int = 20, **filters) -> List[SalesDeliveryResponse]:
+        """获取销售出库单列表"""
+        deliveries, _ = await self.list_sales_deliveries_page(tenant_id, skip=skip, limit=limit, **filters)
+        return deliveries
 
-        deliveries = await query.offset(skip).limit(limit).order_by('-created_at')
-        return [SalesDeliveryResponse.model_validate(delivery) for delivery in deliveries]
+    async def list_sales_deliveries_page(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Tuple[List[SalesDeliveryResponse], Optional[str]]:
+        """获取销售出库单分页列表（传入 cursor 时使用键集分页），返回 (列表, 下一页游标)"""
+        query = self._build_sales_delivery_query(tenant_id, **filters)
+        deliveries, next_cursor = await self.paginate(query, limit=limit, skip=skip, cursor=cursor)
+        return [SalesDeliveryResponse.model_validate(delivery) for delivery in deliveries], next_cursor
 
     async def confirm_delivery(self, tenant_id: int, delivery_id: int, confirmed_by: int) -> SalesDeliveryResponse:
         """确认出库"""
-        async with in_transaction():
+        async with in_transaction("default"):
             delivery = await self.get_sales_delivery_by_id(tenant_id, delivery_id)
 
             if delivery.status != '待出库':
@@ -1548,68 +1590,47 @@ class SalesDeliveryService(AppBaseService[SalesDelivery]):
             }
         }
 
-    async def export_to_excel(
+    def export_to_excel(
         self,
         tenant_id: int,
+        file_format: str = "xlsx",
         **filters
-    ) -> str:
+    ) -> StreamExport:
         """
-        导出销售出库单到Excel文件
-        
+        导出销售出库单（流式，不限行数）
+
+        按主键游标分批读取，直接映射字典行，由 API 层以 StreamingResponse 输出。
+
         Args:
             tenant_id: 租户ID
+            file_format: 导出格式（xlsx/csv）
             **filters: 过滤条件
-            
+
         Returns:
-            str: Excel文件路径
+            StreamExport: 流式导出对象
         """
-        import csv
-        import os
-        import tempfile
-        from datetime import datetime
-        
-        # 查询所有符合条件的销售出库单（不分页）
-        deliveries = await self.list_sales_deliveries(tenant_id, skip=0, limit=10000, **filters)
-        
-        # 创建导出目录
-        export_dir = os.path.join(tempfile.gettempdir(), 'riveredge_exports')
-        os.makedirs(export_dir, exist_ok=True)
-        
-        # 生成文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"sales_deliveries_{timestamp}.csv"
-        file_path = os.path.join(export_dir, filename)
-        
-        # 写入CSV文件
-        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            
-            # 写入表头
-            writer.writerow([
-                '出库单编号', '销售订单编号', '客户名称', '仓库名称',
-                '出库时间', '状态', '总数量', '总金额',
-                '发货方式', '物流单号', '收货地址', '备注', '创建时间'
-            ])
-            
-            # 写入数据
-            for delivery in deliveries:
-                writer.writerow([
-                    delivery.delivery_code,
-                    delivery.sales_order_code or '',
-                    delivery.customer_name or '',
-                    delivery.warehouse_name or '',
-                    delivery.delivery_time.strftime('%Y-%m-%d %H:%M:%S') if delivery.delivery_time else '',
-                    delivery.status,
-                    str(delivery.total_quantity) if delivery.total_quantity else '0',
-                    str(delivery.total_amount) if delivery.total_amount else '0',
-                    delivery.shipping_method or '',
-                    delivery.tracking_number or '',
-                    delivery.shipping_address or '',
-                    delivery.notes or '',
-                    delivery.created_at.strftime('%Y-%m-%d %H:%M:%S') if delivery.created_at else '',
-                ])
-        
-        return file_path
+        columns = [
+            ExportColumn('出库单编号', 'delivery_code'),
+            ExportColumn('销售订单编号', 'sales_order_code'),
+            ExportColumn('客户名称', 'customer_name'),
+            ExportColumn('仓库名称', 'warehouse_name'),
+            ExportColumn('出库时间', 'delivery_time'),
+            ExportColumn('状态', 'status'),
+            ExportColumn('总数量', 'total_quantity', lambda row: row['total_quantity'] or 0),
+            ExportColumn('总金额', 'total_amount', lambda row: row['total_amount'] or 0),
+            ExportColumn('发货方式', 'shipping_method'),
+            ExportColumn('物流单号', 'tracking_number'),
+            ExportColumn('收货地址', 'shipping_address'),
+            ExportColumn('备注', 'notes'),
+            ExportColumn('创建时间', 'created_at'),
+        ]
+        return StreamExport(
+            queryset=self._build_sales_delivery_query(tenant_id, **filters),
+            columns=columns,
+            filename=f"sales_deliveries_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            file_format=file_format,
+            sheet_title="销售出库单",
+        )
 
 
 class PurchaseReceiptService(AppBaseService[PurchaseReceipt]):
@@ -1621,7 +1642,7 @@ class PurchaseReceiptService(AppBaseService[PurchaseReceipt]):
 
     async def create_purchase_receipt(self, tenant_id: int, receipt_data: PurchaseReceiptCreate, created_by: int) -> PurchaseReceiptResponse:
         """创建采购入库单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "PURCHASE_RECEIPT_CODE", prefix=f"PR{today}")
@@ -1711,8 +1732,8 @@ class PurchaseReceiptService(AppBaseService[PurchaseReceipt]):
         resp = PurchaseReceiptResponse.model_validate(receipt)
         return resp.model_copy(update={"lifecycle": get_purchase_receipt_lifecycle(receipt)})
 
-    async def list_purchase_receipts(self, tenant_id: int, skip: int = 0, limit: int = 20, **filters) -> List[PurchaseReceiptResponse]:
-        """获取采购入库单列表"""
+    def _build_purchase_receipt_query(self, tenant_id: int, **filters):
+        """构建采购入库单查询（列表与导出共用过滤条件）"""
         query = PurchaseReceipt.filter(tenant_id=tenant_id)
 
         # 应用过滤条件
@@ -1720,13 +1741,29 @@ class PurchaseReceiptService(AppBaseService[PurchaseReceipt]):
             query = query.filter(status=filters['status'])
         if filters.get('purchase_order_id'):
             query = query.filter(purchase_order_id=filters['purchase_order_id'])
+        return query
 
-        receipts = await query.offset(skip).limit(limit).order_by('-created_at')
-        return [PurchaseReceiptResponse.model_validate(receipt) for receipt in receipts]
+    async def list_purchase_receipts(self, tenant_id: int, skip: int = 0, limit: int = 20, **filters) -> List[PurchaseReceiptResponse]:
+        """获取采购入库单列表"""
+        receipts, _ = await self.list_purchase_receipts_page(tenant_id, skip=skip, limit=limit, **filters)
+        return receipts
+
+    async def list_purchase_receipts_page(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        **filters
+    ) -> Tuple[List[PurchaseReceiptResponse], Optional[str]]:
+        """获取采购入库单分页列表（传入 cursor 时使用键集分页），返回 (列表, 下一页游标)"""
+        query = self._build_purchase_receipt_query(tenant_id, **filters)
+        receipts, next_cursor = await self.paginate(query, limit=limit, skip=skip, cursor=cursor)
+        return [PurchaseReceiptResponse.model_validate(receipt) for receipt in receipts], next_cursor
 
     async def confirm_receipt(self, tenant_id: int, receipt_id: int, confirmed_by: int) -> PurchaseReceiptResponse:
         """确认入库"""
-        async with in_transaction():
+        async with in_transaction("default"):
             receipt = await self.get_purchase_receipt_by_id(tenant_id, receipt_id)
 
             if receipt.status != '待入库':
@@ -2066,65 +2103,42 @@ class PurchaseReceiptService(AppBaseService[PurchaseReceipt]):
             }
         }
 
-    async def export_to_excel(
+    def export_to_excel(
         self,
         tenant_id: int,
+        file_format: str = "xlsx",
         **filters
-    ) -> str:
+    ) -> StreamExport:
         """
-        导出采购入库单到Excel文件
-        
+        导出采购入库单（流式，不限行数）
+
         Args:
             tenant_id: 租户ID
+            file_format: 导出格式（xlsx/csv）
             **filters: 过滤条件
-            
+
         Returns:
-            str: Excel文件路径
+            StreamExport: 流式导出对象
         """
-        import csv
-        import os
-        import tempfile
-        from datetime import datetime
-        
-        # 查询所有符合条件的采购入库单（不分页）
-        receipts = await self.list_purchase_receipts(tenant_id, skip=0, limit=10000, **filters)
-        
-        # 创建导出目录
-        export_dir = os.path.join(tempfile.gettempdir(), 'riveredge_exports')
-        os.makedirs(export_dir, exist_ok=True)
-        
-        # 生成文件名
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        filename = f"purchase_receipts_{timestamp}.csv"
-        file_path = os.path.join(export_dir, filename)
-        
-        # 写入CSV文件
-        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            
-            # 写入表头
-            writer.writerow([
-                '入库单编号', '采购订单编号', '供应商名称', '仓库名称',
-                '入库时间', '状态', '总数量', '总金额',
-                '备注', '创建时间'
-            ])
-            
-            # 写入数据
-            for receipt in receipts:
-                writer.writerow([
-                    receipt.receipt_code,
-                    receipt.purchase_order_code or '',
-                    receipt.supplier_name or '',
-                    receipt.warehouse_name or '',
-                    receipt.receipt_time.strftime('%Y-%m-%d %H:%M:%S') if receipt.receipt_time else '',
-                    receipt.status,
-                    str(receipt.total_quantity) if receipt.total_quantity else '0',
-                    str(receipt.total_amount) if receipt.total_amount else '0',
-                    receipt.notes or '',
-                    receipt.created_at.strftime('%Y-%m-%d %H:%M:%S') if receipt.created_at else '',
-                ])
-        
-        return file_path
+        columns = [
+            ExportColumn('入库单编号', 'receipt_code'),
+            ExportColumn('采购订单编号', 'purchase_order_code'),
+            ExportColumn('供应商名称', 'supplier_name'),
+            ExportColumn('仓库名称', 'warehouse_name'),
+            ExportColumn('入库时间', 'receipt_time'),
+            ExportColumn('状态', 'status'),
+            ExportColumn('总数量', 'total_quantity', lambda row: row['total_quantity'] or 0),
+            ExportColumn('总金额', 'total_amount', lambda row: row['total_amount'] or 0),
+            ExportColumn('备注', 'notes'),
+            ExportColumn('创建时间', 'created_at'),
+        ]
+        return StreamExport(
+            queryset=self._build_purchase_receipt_query(tenant_id, **filters),
+            columns=columns,
+            filename=f"purchase_receipts_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+            file_format=file_format,
+            sheet_title="采购入库单",
+        )
 
     async def pull_from_sales_order(
         self,
@@ -2408,7 +2422,7 @@ class SalesReturnService(AppBaseService[SalesReturn]):
 
     async def create_sales_return(self, tenant_id: int, return_data: SalesReturnCreate, created_by: int) -> SalesReturnResponse:
         """创建销售退货单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             # 如果未提供return_code，则自动生成
             if return_data.return_code:
@@ -2563,7 +2577,7 @@ class SalesReturnService(AppBaseService[SalesReturn]):
 
     async def confirm_return(self, tenant_id: int, return_id: int, confirmed_by: int) -> SalesReturnResponse:
         """确认退货"""
-        async with in_transaction():
+        async with in_transaction("default"):
             return_obj = await self.get_sales_return_by_id(tenant_id, return_id)
 
             if return_obj.status != '待退货':
@@ -2661,7 +2675,7 @@ class PurchaseReturnService(AppBaseService[PurchaseReturn]):
 
     async def create_purchase_return(self, tenant_id: int, return_data: PurchaseReturnCreate, created_by: int) -> PurchaseReturnResponse:
         """创建采购退货单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             # 如果未提供return_code，则自动生成
             if return_data.return_code:
@@ -2816,7 +2830,7 @@ class PurchaseReturnService(AppBaseService[PurchaseReturn]):
 
     async def confirm_return(self, tenant_id: int, return_id: int, confirmed_by: int) -> PurchaseReturnResponse:
         """确认退货"""
-        async with in_transaction():
+        async with in_transaction("default"):
             return_obj = await self.get_purchase_return_by_id(tenant_id, return_id)
 
             if return_obj.status != '待退货':
@@ -2923,7 +2937,7 @@ class OtherInboundService(AppBaseService[OtherInbound]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "inbound")
         if not is_enabled:
             raise BusinessLogicError("入库管理节点未启用，无法创建其他入库单")
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "OTHER_INBOUND_CODE", prefix=f"OI{today}")
@@ -3006,7 +3020,7 @@ class OtherInboundService(AppBaseService[OtherInbound]):
         updated_by: int
     ) -> OtherInboundResponse:
         """更新其他入库单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             await self.get_other_inbound_by_id(tenant_id, inbound_id)
             dump = inbound_data.model_dump(exclude_unset=True, exclude={"inbound_code"})
             dump["updated_by"] = updated_by
@@ -3036,7 +3050,7 @@ class OtherInboundService(AppBaseService[OtherInbound]):
         confirmed_by: int
     ) -> OtherInboundResponse:
         """确认入库"""
-        async with in_transaction():
+        async with in_transaction("default"):
             inbound = await self.get_other_inbound_by_id(tenant_id, inbound_id)
             if inbound.status != "待入库":
                 raise BusinessLogicError("只有待入库状态的其他入库单才能确认入库")
@@ -3078,7 +3092,7 @@ class OtherOutboundService(AppBaseService[OtherOutbound]):
         is_enabled = await self.business_config_service.check_node_enabled(tenant_id, "outbound")
         if not is_enabled:
             raise BusinessLogicError("出库管理节点未启用，无法创建其他出库单")
-        async with in_transaction():
+        async with in_transaction("default"):
             user_info = await self.get_user_info(created_by)
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "OTHER_OUTBOUND_CODE", prefix=f"OO{today}")
@@ -3161,7 +3175,7 @@ class OtherOutboundService(AppBaseService[OtherOutbound]):
         updated_by: int
     ) -> OtherOutboundResponse:
         """更新其他出库单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             await self.get_other_outbound_by_id(tenant_id, outbound_id)
             dump = outbound_data.model_dump(exclude_unset=True, exclude={"outbound_code"})
             dump["updated_by"] = updated_by
@@ -3191,7 +3205,7 @@ class OtherOutboundService(AppBaseService[OtherOutbound]):
         confirmed_by: int
     ) -> OtherOutboundResponse:
         """确认出库"""
-        async with in_transaction():
+        async with in_transaction("default"):
             outbound = await self.get_other_outbound_by_id(tenant_id, outbound_id)
             if outbound.status != "待出库":
                 raise BusinessLogicError("只有待出库状态的其他出库单才能确认出库")
@@ -3229,7 +3243,7 @@ class MaterialBorrowService(AppBaseService[MaterialBorrow]):
         created_by: int
     ) -> MaterialBorrowResponse:
         """创建借料单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             today = datetime.now().strftime("%Y%m%d")
             code = await self.generate_code(tenant_id, "MATERIAL_BORROW_CODE", prefix=f"MB{today}")
 
@@ -3305,7 +3319,7 @@ class MaterialBorrowService(AppBaseService[MaterialBorrow]):
         if borrow.status != "待借出":
             raise BusinessLogicError("只能更新待借出状态的借料单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             dump = borrow_data.model_dump(exclude_unset=True, exclude={"borrow_code"})
             dump["updated_by"] = updated_by
             await MaterialBorrow.filter(tenant_id=tenant_id, id=borrow_id).update(**dump)
@@ -3333,7 +3347,7 @@ class MaterialBorrowService(AppBaseService[MaterialBorrow]):
         confirmed_by: int
     ) -> MaterialBorrowResponse:
         """确认借出"""
-        async with in_transaction():
+        async with in_transaction("default"):
             borrow = await self.get_material_borrow_by_id(tenant_id, borrow_id)
             if borrow.status != "待借出":
                 raise BusinessLogicError("只有待借出状态的借料单才能确认借出")
@@ -3371,7 +3385,7 @@ class MaterialReturnService(AppBaseService[MaterialReturn]):
         created_by: int
     ) -> MaterialReturnResponse:
         """创建还料单"""
-        async with in_transaction():
+        async with in_transaction("default"):
             borrow = await MaterialBorrow.get_or_none(tenant_id=tenant_id, id=return_data.borrow_id, deleted_at__isnull=True)
             if not borrow:
                 raise NotFoundError(f"借料单不存在: {return_data.borrow_id}")
@@ -3454,7 +3468,7 @@ class MaterialReturnService(AppBaseService[MaterialReturn]):
         if return_obj.status != "待归还":
             raise BusinessLogicError("只能更新待归还状态的还料单")
 
-        async with in_transaction():
+        async with in_transaction("default"):
             dump = return_data.model_dump(exclude_unset=True, exclude={"return_code"})
             dump["updated_by"] = updated_by
             await MaterialReturn.filter(tenant_id=tenant_id, id=return_id).update(**dump)
@@ -3482,7 +3496,7 @@ class MaterialReturnService(AppBaseService[MaterialReturn]):
         confirmed_by: int
     ) -> MaterialReturnResponse:
         """确认归还"""
-        async with in_transaction():
+        async with in_transaction("default"):
             return_obj = await self.get_material_return_by_id(tenant_id, return_id)
             if return_obj.status != "待归还":
                 raise BusinessLogicError("只有待归还状态的还料单才能确认归还")
@@ -9,7 +9,7 @@ Date: 2025-01-01
 
 import uuid
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from decimal import Decimal
 
 from tortoise.queryset import Q
@@ -17,6 +17,8 @@ from tortoise.transactions import in_transaction
 from tortoise import timezone
 
 from infra.exceptions.exceptions import NotFoundError, ValidationError, BusinessLogicError
+from infra.services.user_directory import UNKNOWN_USER_NAME
+from core.services.business.custom_field_projection import apply_custom_field_filters
 
 from apps.base_service import AppBaseService
 from apps.kuaizhizao.models.work_order import WorkOrder
@@ -442,7 +444,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         Raises:
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 处理工单编码
             # 1. 如果提供了 code，验证唯一性并使用（手工填写）
             # 2. 如果未提供 code 但提供了 code_rule，使用编码规则生成
@@ -748,11 +750,9 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         response.lifecycle = get_work_order_lifecycle(work_order)
         return response
 
-    async def list_work_orders(
+    async def _build_work_order_query(
         self,
         tenant_id: int,
-        skip: int = 0,
-        limit: int = 100,
         code: Optional[str] = None,
         name: Optional[str] = None,
         product_name: Optional[str] = None,
@@ -761,26 +761,9 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         workshop_id: Optional[int] = None,
         work_center_id: Optional[int] = None,
         assigned_worker_id: Optional[int] = None,
-        include_operations: bool = False,
-    ) -> List[WorkOrderListResponse]:
-        """
-        获取工单列表
-
-        Args:
-            tenant_id: 组织ID
-            skip: 跳过数量
-            limit: 限制数量
-            code: 工单编码（模糊搜索）
-            name: 工单名称（模糊搜索）
-            product_name: 产品名称（模糊搜索）
-            production_mode: 生产模式
-            status: 工单状态
-            workshop_id: 车间ID
-            work_center_id: 工作中心ID
-
-        Returns:
-            List[WorkOrderListResponse]: 工单列表
-        """
+        custom_fields: Optional[Dict[str, Any]] = None,
+    ):
+        """构建工单列表查询（列表与总数共用筛选条件）"""
         query = WorkOrder.filter(
             tenant_id=tenant_id,
             deleted_at__isnull=True  # 只查询未删除的工单
@@ -814,28 +797,76 @@ class WorkOrderService(AppBaseService[WorkOrder]):
                 query = query.filter(id__in=wo_id_set)
             else:
                 query = query.filter(id__in=[])  # 无匹配
+        if custom_fields:
+            # 按自定义字段过滤（走主表 custom_fields 投影列的 GIN 索引）
+            query = await apply_custom_field_filters(
+                query, tenant_id, WorkOrder._meta.db_table, custom_fields
+            )
+        return query
 
-        # 获取总数（用于分页）
-        total = await query.count()
-        
-        # 获取分页数据
-        work_orders = await query.offset(skip).limit(limit).order_by("-created_at").all()
+    async def list_work_orders_page(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact",
+        include_operations: bool = False,
+        **filters
+    ) -> Dict[str, Any]:
+        """
+        分页获取工单列表
+
+        传入 cursor 时使用键集分页；关联的创建人名称与工序按页批量加载（每个关联一次查询）。
+
+        Args:
+            tenant_id: 组织ID
+            skip: 跳过数量（无游标时生效）
+            limit: 限制数量
+            cursor: 上一页返回的游标
+            total_mode: 总数统计方式（exact: 精确统计, cached: 短时缓存, none: 不统计）
+            include_operations: 是否包含工序
+            **filters: 筛选条件（同 list_work_orders）
+
+        Returns:
+            Dict[str, Any]: {"data": 工单列表, "total": 总数, "next_cursor": 下一页游标, "success": True}
+        """
+        query = await self._build_work_order_query(tenant_id, **filters)
+        work_orders, next_cursor = await self.paginate(query, limit=limit, skip=skip, cursor=cursor)
+
+        total = None
+        if total_mode != "none":
+            total = await self.count_total(
+                query,
+                tenant_id,
+                cache_filters=filters if total_mode == "cached" else None,
+            )
+
+        # 批量补全创建人名称
+        work_orders_to_update = [wo for wo in work_orders if not wo.created_by_name]
+        if work_orders_to_update:
+            user_names = await self.resolve_names(wo.created_by for wo in work_orders_to_update)
+            for wo in work_orders_to_update:
+                wo.created_by_name = user_names.get(wo.created_by, UNKNOWN_USER_NAME)
+
+        # 批量加载工序
+        operations_by_wo: Dict[int, List[WorkOrderOperation]] = {}
+        if include_operations and work_orders:
+            operations_by_wo = await self.load_related(
+                WorkOrderOperation,
+                "work_order_id",
+                [wo.id for wo in work_orders],
+                order_by=["work_order_id", "sequence"],
+                tenant_id=tenant_id,
+                deleted_at__isnull=True,
+            )
 
         # 转换为响应格式，添加错误处理
         result = []
-        work_orders_to_update = []
-        
         for wo in work_orders:
             try:
-                # 确保 created_by_name 不为空
-                if not wo.created_by_name:
-                    user_info = await self.get_user_info(wo.created_by)
-                    wo.created_by_name = user_info.get("name", "未知用户")
-                    work_orders_to_update.append(wo)
-                
                 item_dict = WorkOrderListResponse.model_validate(wo).model_dump()
                 if include_operations:
-                    ops = await self.get_work_order_operations(tenant_id, wo.id)
                     item_dict["operations"] = [
                         {
                             "id": op.id,
@@ -847,7 +878,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
                             "assigned_mold_name": op.assigned_mold_name,
                             "assigned_tool_name": op.assigned_tool_name,
                         }
-                        for op in ops
+                        for op in operations_by_wo.get(wo.id, [])
                     ]
                 result.append(WorkOrderListResponse.model_validate(item_dict))
             except Exception as e:
@@ -856,13 +887,67 @@ class WorkOrderService(AppBaseService[WorkOrder]):
                 logger.exception(e)
                 # 跳过有问题的工单，继续处理其他工单
                 continue
-        
+
         # 批量更新 created_by_name 为空的工单
         if work_orders_to_update:
-            for wo in work_orders_to_update:
-                await wo.save(update_fields=["created_by_name"])
-        
-        return result
+            await WorkOrder.bulk_update(work_orders_to_update, fields=["created_by_name"])
+
+        return {
+            "data": result,
+            "total": total,
+            "next_cursor": next_cursor,
+            "success": True,
+        }
+
+    async def list_work_orders(
+        self,
+        tenant_id: int,
+        skip: int = 0,
+        limit: int = 100,
+        code: Optional[str] = None,
+        name: Optional[str] = None,
+        product_name: Optional[str] = None,
+        production_mode: Optional[str] = None,
+        status: Optional[str] = None,
+        workshop_id: Optional[int] = None,
+        work_center_id: Optional[int] = None,
+        assigned_worker_id: Optional[int] = None,
+        include_operations: bool = False,
+    ) -> List[WorkOrderListResponse]:
+        """
+        获取工单列表
+
+        Args:
+            tenant_id: 组织ID
+            skip: 跳过数量
+            limit: 限制数量
+            code: 工单编码（模糊搜索）
+            name: 工单名称（模糊搜索）
+            product_name: 产品名称（模糊搜索）
+            production_mode: 生产模式
+            status: 工单状态
+            workshop_id: 车间ID
+            work_center_id: 工作中心ID
+
+        Returns:
+            List[WorkOrderListResponse]: 工单列表
+        """
+        page = await self.list_work_orders_page(
+            tenant_id=tenant_id,
+            skip=skip,
+            limit=limit,
+            total_mode="none",
+            include_operations=include_operations,
+            code=code,
+            name=name,
+            product_name=product_name,
+            production_mode=production_mode,
+            status=status,
+            workshop_id=workshop_id,
+            work_center_id=work_center_id,
+            assigned_worker_id=assigned_worker_id,
+        )
+        return page["data"]
 
     async def get_work_order_count(
         self,
@@ -893,39 +978,17 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         Returns:
             int: 工单总数
         """
-        query = WorkOrder.filter(
-            tenant_id=tenant_id,
-            deleted_at__isnull=True  # 只查询未删除的工单
+        query = await self._build_work_order_query(
+            tenant_id,
+            code=code,
+            name=name,
+            product_name=product_name,
+            production_mode=production_mode,
+            status=status,
+            workshop_id=workshop_id,
+            work_center_id=work_center_id,
+            assigned_worker_id=assigned_worker_id,
         )
-
-        # 添加筛选条件（与 list_work_orders 保持一致）
-        if code:
-            query = query.filter(code__icontains=code)
-        if name:
-            query = query.filter(name__icontains=name)
-        if product_name:
-            query = query.filter(product_name__icontains=product_name)
-        if production_mode:
-            query = query.filter(production_mode=production_mode)
-        if status:
-            query = query.filter(status=status)
-        if workshop_id:
-            query = query.filter(workshop_id=workshop_id)
-        if work_center_id:
-            query = query.filter(work_center_id=work_center_id)
-        if assigned_worker_id:
-            from apps.kuaizhizao.models.work_order_operation import WorkOrderOperation
-            wo_ids = await WorkOrderOperation.filter(
-                tenant_id=tenant_id,
-                assigned_worker_id=assigned_worker_id,
-                deleted_at__isnull=True
-            ).values_list("work_order_id", flat=True)
-            wo_id_set = set(wo_ids)
-            if wo_id_set:
-                query = query.filter(id__in=wo_id_set)
-            else:
-                query = query.filter(id__in=[])
-
         return await query.count()
 
     async def update_work_order(
@@ -951,7 +1014,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             ValidationError: 数据验证失败
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 更新字段
             update_data = work_order_data.model_dump(exclude_unset=True)
             
@@ -980,7 +1043,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         """
         if not updates:
             return
-        async with in_transaction():
+        async with in_transaction("default"):
             for item in updates[:50]:  # 单次最多 50 条
                 wo_id = item.work_order_id if hasattr(item, 'work_order_id') else item.get('work_order_id')
                 start = item.planned_start_date if hasattr(item, 'planned_start_date') else item.get('planned_start_date')
@@ -1010,7 +1073,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         """
         if not updates:
             return
-        async with in_transaction():
+        async with in_transaction("default"):
             for item in updates[:50]:
                 op_id = item.operation_id if hasattr(item, 'operation_id') else item.get('operation_id')
                 start = item.planned_start_date if hasattr(item, 'planned_start_date') else item.get('planned_start_date')
@@ -1061,7 +1124,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             ValidationError: 不允许删除的工单状态
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             def validate_work_order(wo):
@@ -1198,7 +1261,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             ValidationError: 不允许下达的工单状态
             BusinessLogicError: 存在缺料时抛出（如果check_shortage=True）
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             if work_order.status != 'draft':
@@ -1446,7 +1509,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             ValidationError: 数据验证失败
             BusinessLogicError: 业务逻辑错误（如已报工不能拆分）
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取原工单
             original_work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
@@ -1673,7 +1736,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             ValidationError: 数据验证失败
             BusinessLogicError: 业务逻辑错误（如已报工工序不能修改）
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取原工单
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
@@ -1818,7 +1881,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
         Returns:
             WorkOrderOperationResponse: 更新后的工单工序
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取工单工序
             work_order_operation = await WorkOrderOperation.get_or_none(
                 tenant_id=tenant_id,
@@ -1880,7 +1943,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单或工序不存在
             BusinessLogicError: 业务逻辑错误（如工序状态不正确）
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 获取工单
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
@@ -1963,7 +2026,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             BusinessLogicError: 工单已冻结或状态不允许冻结
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             # 检查工单是否已冻结
@@ -2010,7 +2073,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             BusinessLogicError: 工单未冻结
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             # 检查工单是否已冻结
@@ -2054,7 +2117,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             ValidationError: 优先级值无效
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             # 验证优先级值
@@ -2096,7 +2159,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             ValidationError: 优先级值无效或工单ID列表为空
             NotFoundError: 部分工单不存在
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             # 验证优先级值
             valid_priorities = ['low', 'normal', 'high', 'urgent']
             if batch_data.priority not in valid_priorities:
@@ -2144,7 +2207,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             BusinessLogicError: 业务逻辑错误（如不能合并）
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             if len(merge_data.work_order_ids) < 2:
                 raise ValidationError("至少需要2个工单才能合并")
 
@@ -2311,7 +2374,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             ValidationError: 不允许撤回的工单状态
             BusinessLogicError: 工单已有报工记录，不允许撤回
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             # 检查工单状态：只能撤回已下达或指定结束的工单
@@ -2386,7 +2449,7 @@ class WorkOrderService(AppBaseService[WorkOrder]):
             NotFoundError: 工单不存在
             ValidationError: 不允许指定结束的工单状态
         """
-        async with in_transaction():
+        async with in_transaction("default"):
             work_order = await self.get_by_id(tenant_id, work_order_id, raise_if_not_found=True)
 
             # 检查工单状态：不能对已取消的工单指定结束
@@ -7,7 +7,7 @@ Author: Luigi Lu
 Date: 2025-01-01
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 from decimal import Decimal
 from loguru import logger
 
@@ -131,6 +131,53 @@ async def get_bom_items_by_material_id(
     return items
 
 
+async def get_bom_items_by_material_ids(
+    tenant_id: int,
+    material_ids: Iterable[int],
+    only_approved: bool = True
+) -> Dict[int, List[BOM]]:
+    """
+    批量获取多个物料的BOM明细（一次查询，按物料分组）
+
+    口径与 get_bom_items_by_material_id 默认行为一致：每个物料取版本号最大（同版本取最新创建）的BOM，
+    优先按 bom_code 关联明细，bom_code 为空时按版本关联，按优先级、ID排序。
+
+    Args:
+        tenant_id: 租户ID
+        material_ids: 物料ID列表
+        only_approved: 是否只返回已审核的BOM（默认：True）
+
+    Returns:
+        物料ID -> BOM明细列表（无BOM的物料不在结果中）
+    """
+    material_ids = list(set(material_ids))
+    if not material_ids:
+        return {}
+
+    query = BOM.filter(
+        tenant_id=tenant_id,
+        material_id__in=material_ids,
+        deleted_at__isnull=True
+    )
+    if only_approved:
+        query = query.filter(approval_status="approved")
+    rows = await query.all()
+
+    rows_by_material: Dict[int, List[BOM]] = {}
+    for row in rows:
+        rows_by_material.setdefault(row.material_id, []).append(row)
+
+    result: Dict[int, List[BOM]] = {}
+    for material_id, material_rows in rows_by_material.items():
+        header = max(material_rows, key=lambda r: (r.version or "", r.created_at))
+        if header.bom_code:
+            items = [r for r in material_rows if r.bom_code == header.bom_code]
+        else:
+            items = [r for r in material_rows if r.version == header.version]
+        result[material_id] = sorted(items, key=lambda r: (r.priority, r.id))
+    return result
+
+
 async def calculate_material_requirements_from_bom(
     tenant_id: int,
     material_id: int,
@@ -0,0 +1,613 @@
+"""
+有限产能排产引擎模块
+
+纯计算模块（不访问数据库），供 AdvancedSchedulingService 与基准测试脚本使用：
+- WorkCalendar：工作日历（由工作时间段配置展开为排产周期内的工作区间），
+  实际时间与“累计工作时长”之间的换算均为二分查找
+- ResourceTimeline：单个资源（工作中心）的占用时间轴，以累计工作时长为坐标按开始时间有序存储，
+  空档查找先二分定位再向后检查空档；支持顺序相关换线（同一产品连续加工免换线）
+- FiniteCapacityScheduler：按工单顺序逐工序插入时间轴构造排产方案，
+  再在时间预算内用模拟退火调整工单顺序以优化目标（min_makespan/min_total_time/min_setup_time）
+
+时间统一用相对排产起点（origin）的小时数（float）表示。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import math
+import random
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+# 优化目标
+OBJECTIVE_MIN_MAKESPAN = "min_makespan"
+OBJECTIVE_MIN_TOTAL_TIME = "min_total_time"
+OBJECTIVE_MIN_SETUP_TIME = "min_setup_time"
+OBJECTIVES = (OBJECTIVE_MIN_MAKESPAN, OBJECTIVE_MIN_TOTAL_TIME, OBJECTIVE_MIN_SETUP_TIME)
+
+# 工作时间段：(开始小时, 结束小时)，如 (8.0, 12.0)
+Period = Tuple[float, float]
+
+
+def parse_clock(value: str) -> Optional[float]:
+    """把 "HH:MM" 解析为小时数（支持 24:00），格式错误返回 None"""
+    try:
+        hours, minutes = str(value).split(":")[:2]
+        result = int(hours) + int(minutes) / 60
+    except (TypeError, ValueError):
+        return None
+    return result if 0 <= result <= 24 else None
+
+
+def parse_periods(working_hours: Optional[Iterable[Dict[str, Any]]]) -> List[Period]:
+    """把工作时间段配置（[{"start": "08:00", "end": "12:00"}, ...]）解析为小时区间（跨零点的时间段截到 24:00）"""
+    periods = []
+    for period in working_hours or []:
+        start = parse_clock(period.get("start", "00:00"))
+        end = parse_clock(period.get("end", "23:59"))
+        if start is None or end is None:
+            continue
+        if end <= start:
+            end = 24.0
+        periods.append((start, end))
+    return periods
+
+
+class WorkCalendar:
+    """
+    工作日历
+
+    排产周期内的工作区间按时间排序，同时记录每个区间开始前的累计工作时长，
+    实际时间 <-> 累计工作时长 的换算都是一次二分查找。
+    """
+
+    __slots__ = ("_starts", "_ends", "_cum", "capacity")
+
+    def __init__(self, intervals: Iterable[Period]):
+        """
+        Args:
+            intervals: 工作区间（相对排产起点的小时数，可无序、可重叠）
+        """
+        merged: List[List[float]] = []
+        for start, end in sorted(intervals):
+            if end <= start:
+                continue
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        self._starts = [interval[0] for interval in merged]
+        self._ends = [interval[1] for interval in merged]
+        self._cum: List[float] = []
+        total = 0.0
+        for start, end in merged:
+            self._cum.append(total)
+            total += end - start
+        self.capacity = total
+
+    @classmethod
+    def from_daily_periods(
+        cls,
+        origin: datetime,
+        horizon_days: int,
+        periods_for_day: Callable[[date], List[Period]],
+    ) -> "WorkCalendar":
+        """
+        按天展开工作日历
+
+        Args:
+            origin: 排产起点
+            horizon_days: 排产周期（天）
+            periods_for_day: 函数，入参为日期，返回当天的工作时间段列表
+        """
+        day_zero = datetime.combine(origin.date(), datetime.min.time())
+        offset = (origin - day_zero).total_seconds() / 3600
+        intervals = []
+        for day in range(horizon_days + 1):
+            current = origin.date() + timedelta(days=day)
+            base = day * 24 - offset
+            for start, end in periods_for_day(current):
+                start_h, end_h = max(base + start, 0.0), base + end
+                if end_h > start_h:
+                    intervals.append((start_h, end_h))
+        return cls(intervals)
+
+    @classmethod
+    def continuous(cls, horizon_days: int) -> "WorkCalendar":
+        """全天候工作日历（未配置工作时间段时使用）"""
+        return cls([(0.0, horizon_days * 24.0)])
+
+    def position(self, at: float) -> float:
+        """实际时间 -> 累计工作时长"""
+        index = bisect_right(self._starts, at) - 1
+        if index < 0:
+            return 0.0
+        return self._cum[index] + min(at, self._ends[index]) - self._starts[index]
+
+    def time_at(self, position: float, is_end: bool = False) -> float:
+        """
+        累计工作时长 -> 实际时间
+
+        Args:
+            position: 累计工作时长
+            is_end: 是否为结束时间（恰好落在区间边界时，开始时间取下一个区间开始，结束时间取本区间结束）
+        """
+        if not self._starts:
+            return position
+        if is_end:
+            index = max(bisect_left(self._cum, position) - 1, 0)
+        else:
+            index = max(bisect_right(self._cum, position) - 1, 0)
+        return self._starts[index] + position - self._cum[index]
+
+
+class ResourceTimeline:
+    """
+    资源占用时间轴（坐标为该资源日历的累计工作时长）
+
+    每个占用记录开始、结束（含换线）、产品族、实际换线时长与完整换线时长。
+    已有占用（不参与本次排产的工序）产品族为 None、换线为 0。
+    """
+
+    __slots__ = ("starts", "ends", "families", "setups", "full_setups")
+
+    def __init__(self):
+        self.starts: List[float] = []
+        self.ends: List[float] = []
+        self.families: List[Any] = []
+        self.setups: List[float] = []
+        self.full_setups: List[float] = []
+
+    def copy(self) -> "ResourceTimeline":
+        timeline = ResourceTimeline.__new__(ResourceTimeline)
+        timeline.starts = self.starts[:]
+        timeline.ends = self.ends[:]
+        timeline.families = self.families[:]
+        timeline.setups = self.setups[:]
+        timeline.full_setups = self.full_setups[:]
+        return timeline
+
+    def find_slot(
+        self,
+        ready: float,
+        family: Any,
+        setup_hours: float,
+        run_hours: float,
+    ) -> Tuple[int, float, float]:
+        """
+        查找最早可用空档
+
+        二分定位第一个结束时间晚于 ready 的占用，再向后检查空档：空档需容纳换线与加工，
+        且插入后不能增加后一个占用的换线（后一个占用已付完整换线或与本工序同产品族）。
+
+        Returns:
+            Tuple[int, float, float]: (插入位置, 开始时间, 换线时长)
+        """
+        starts, ends, families = self.starts, self.ends, self.families
+        count = len(starts)
+        index = bisect_right(ends, ready)
+        while True:
+            if index > 0:
+                previous_end = ends[index - 1]
+                setup = 0.0 if families[index - 1] == family and family is not None else setup_hours
+            else:
+                previous_end = 0.0
+                setup = setup_hours
+            start = max(ready, previous_end)
+            if index == count:
+                return index, start, setup
+            if start + setup + run_hours <= starts[index]:
+                next_family = families[index]
+                if next_family is None or next_family == family or self.setups[index] >= self.full_setups[index]:
+                    return index, start, setup
+            index += 1
+
+    def insert(self, index: int, start: float, end: float, family: Any, setup: float, full_setup: float) -> None:
+        self.starts.insert(index, start)
+        self.ends.insert(index, end)
+        self.families.insert(index, family)
+        self.setups.insert(index, setup)
+        self.full_setups.insert(index, full_setup)
+
+    def add_busy(self, start: float, end: float) -> None:
+        """加入已有占用（与已有记录重叠时合并）"""
+        index = bisect_left(self.starts, start)
+        if index > 0 and self.ends[index - 1] >= start:
+            index -= 1
+            start = self.starts[index]
+            end = max(end, self.ends[index])
+            self.remove(index)
+        while index < len(self.starts) and self.starts[index] <= end:
+            end = max(end, self.ends[index])
+            self.remove(index)
+        self.insert(index, start, end, None, 0.0, 0.0)
+
+    def remove(self, index: int) -> None:
+        del self.starts[index], self.ends[index], self.families[index], self.setups[index], self.full_setups[index]
+
+    def remove_at(self, start: float) -> None:
+        """按开始时间移除占用（撤销工单时使用）"""
+        index = bisect_left(self.starts, start)
+        if index < len(self.starts) and self.starts[index] == start:
+            self.remove(index)
+
+
+@dataclass
+class SchedulingOperation:
+    """
+    待排工序
+
+    Attributes:
+        key: 工序标识（工单工序ID，无工序的工单为 None）
+        resource: 资源标识（工作中心等）
+        run_hours: 加工工时（标准工时 × 数量）
+        setup_hours: 完整换线时长（前一工序为同产品族时免换线）
+    """
+    key: Any
+    resource: Hashable
+    run_hours: float
+    setup_hours: float = 0.0
+
+
+@dataclass
+class SchedulingJob:
+    """
+    待排工单
+
+    Attributes:
+        key: 工单标识
+        operations: 按顺序排列的工序
+        family: 产品族（换线判断依据，一般为产品ID）
+        release: 最早开始时间（小时）
+        due: 交期（小时，可选）
+        score: 优先级得分（初始排序依据，越大越优先）
+    """
+    key: Any
+    operations: List[SchedulingOperation]
+    family: Any = None
+    release: float = 0.0
+    due: Optional[float] = None
+    score: float = 0.0
+
+
+@dataclass
+class ScheduledOperation:
+    key: Any
+    resource: Hashable
+    start: float
+    end: float
+    setup_hours: float
+
+
+@dataclass
+class ScheduledJob:
+    key: Any
+    start: float
+    end: float
+    setup_hours: float
+    operations: List[ScheduledOperation] = field(default_factory=list)
+
+
+@dataclass
+class ScheduleResult:
+    """
+    排产结果
+
+    Attributes:
+        jobs: 已排工单（按工单标识）
+        unscheduled: 无法排产的工单标识 -> 原因
+        order: 最终工单顺序
+        cost: 目标函数值
+        initial_cost: 构造解的目标函数值
+        iterations: 局部搜索迭代次数
+        metrics: 完工时间跨度、总流程时间、总换线、总拖期（小时）
+    """
+    jobs: Dict[Any, ScheduledJob]
+    unscheduled: Dict[Any, str]
+    order: List[Any]
+    cost: float
+    initial_cost: float
+    iterations: int
+    metrics: Dict[str, float]
+
+    @property
+    def improvement(self) -> float:
+        """局部搜索相对构造解的改进百分比"""
+        if self.initial_cost <= 0:
+            return 0.0
+        return round((self.initial_cost - self.cost) / self.initial_cost * 100, 2)
+
+
+class _Decoded:
+    """一个工单顺序的解码结果（检查点快照供局部搜索从变更位置开始重新解码）"""
+
+    __slots__ = ("order", "placements", "snapshots", "cost", "metrics")
+
+    def __init__(self, order, placements, snapshots, cost, metrics):
+        self.order = order
+        self.placements = placements
+        self.snapshots = snapshots
+        self.cost = cost
+        self.metrics = metrics
+
+
+class FiniteCapacityScheduler:
+    """
+    有限产能排产器
+
+    Usage:
+        scheduler = FiniteCapacityScheduler(jobs, calendars, default_calendar)
+        result = scheduler.solve(objective="min_makespan", time_budget=2.0)
+    """
+
+    def __init__(
+        self,
+        jobs: Sequence[SchedulingJob],
+        calendars: Dict[Hashable, WorkCalendar],
+        default_calendar: WorkCalendar,
+        busy: Optional[Dict[Hashable, List[Tuple[float, float]]]] = None,
+        due_date_weight: float = 0.0,
+    ):
+        """
+        Args:
+            jobs: 待排工单
+            calendars: 资源 -> 工作日历（未配置的资源使用默认日历）
+            default_calendar: 默认日历
+            busy: 资源 -> 已有占用（实际时间区间，不参与本次排产的工序）
+            due_date_weight: 拖期惩罚权重（目标函数 = 优化目标 + 权重 × 总拖期）
+        """
+        self.jobs = list(jobs)
+        self.due_date_weight = due_date_weight
+        resources = {op.resource for job in self.jobs for op in job.operations}
+        self.calendars = {
+            resource: calendars.get(resource, default_calendar)
+            for resource in resources
+        }
+        self._resources = sorted(resources, key=repr)
+        self._resource_index = {resource: i for i, resource in enumerate(self._resources)}
+        self._jobs_ops = [
+            [
+                (self._resource_index[op.resource], self.calendars[op.resource], op.run_hours, op.setup_hours)
+                for op in job.operations
+            ]
+            for job in self.jobs
+        ]
+        self._horizon = max((cal.capacity for cal in self.calendars.values()), default=0.0)
+
+        initial = []
+        for resource in self._resources:
+            timeline = ResourceTimeline()
+            calendar = self.calendars[resource]
+            for start, end in (busy or {}).get(resource, ()):
+                busy_start, busy_end = calendar.position(start), calendar.position(end)
+                if busy_end > busy_start:
+                    timeline.add_busy(busy_start, busy_end)
+            initial.append(timeline)
+        self._initial_timelines = initial
+        # 每解码多少个工单保存一次检查点快照
+        self._checkpoint_every = max(1, len(self.jobs) // 32)
+
+    # ==================== 求解 ====================
+
+    def solve(
+        self,
+        objective: str = OBJECTIVE_MIN_MAKESPAN,
+        time_budget: float = 2.0,
+        max_iterations: Optional[int] = None,
+        seed: Optional[int] = 0,
+    ) -> ScheduleResult:
+        """
+        构造排产方案并在时间预算内做模拟退火改进
+
+        Args:
+            objective: 优化目标
+            time_budget: 局部搜索时间预算（秒），0 表示只做构造
+            max_iterations: 最大迭代次数（可选）
+            seed: 随机种子（相同输入得到相同结果）
+
+        Returns:
+            ScheduleResult: 排产结果
+        """
+        if objective not in OBJECTIVES:
+            objective = OBJECTIVE_MIN_MAKESPAN
+        order = sorted(
+            range(len(self.jobs)),
+            key=lambda i: (
+                -self.jobs[i].score,
+                self.jobs[i].due if self.jobs[i].due is not None else math.inf,
+                self.jobs[i].release,
+                i,
+            ),
+        )
+        current = self._decode(order, objective)
+        initial_cost = current.cost
+        best = current
+        iterations = 0
+
+        if time_budget > 0 and len(order) > 1:
+            rng = random.Random(seed)
+            started = time.perf_counter()
+            deadline = started + time_budget
+            temperature0 = max(abs(current.cost) * 0.02, 1e-6)
+            size = len(order)
+            window = max(2, min(size, 50))
+            while True:
+                now = time.perf_counter()
+                if now >= deadline or (max_iterations is not None and iterations >= max_iterations):
+                    break
+                iterations += 1
+                temperature = temperature0 * (0.001 ** ((now - started) / time_budget))
+
+                i = rng.randrange(size)
+                j = min(size - 1, max(0, i + rng.randint(-window, window)))
+                if i == j:
+                    continue
+                candidate_order = current.order[:]
+                if rng.random() < 0.5:
+                    candidate_order[i], candidate_order[j] = candidate_order[j], candidate_order[i]
+                else:
+                    candidate_order.insert(j, candidate_order.pop(i))
+                candidate = self._decode(candidate_order, objective, base=current, changed_from=min(i, j))
+
+                delta = candidate.cost - current.cost
+                if delta <= 0 or rng.random() < math.exp(-delta / temperature):
+                    current = candidate
+                    if current.cost < best.cost:
+                        best = current
+
+        return self._build_result(best, initial_cost, iterations)
+
+    # ==================== 解码 ====================
+
+    def _decode(
+        self,
+        order: List[int],
+        objective: str,
+        base: Optional[_Decoded] = None,
+        changed_from: int = 0,
+    ) -> _Decoded:
+        """按工单顺序逐工序插入时间轴（从 changed_from 之前最近的检查点开始）"""
+        every = self._checkpoint_every
+        if base is None:
+            checkpoint = 0
+            snapshots = [self._initial_timelines]
+            placements: List[Optional[list]] = []
+        else:
+            checkpoint = min(changed_from // every, len(base.snapshots) - 1)
+            snapshots = base.snapshots[:checkpoint + 1]
+            placements = base.placements[:checkpoint * every]
+        timelines = [timeline.copy() for timeline in snapshots[checkpoint]]
+
+        for position in range(checkpoint * every, len(order)):
+            placements.append(self._place_job(order[position], timelines))
+            if (position + 1) % every == 0:
+                snapshots.append([timeline.copy() for timeline in timelines])
+
+        cost, metrics = self._evaluate(order, placements, objective)
+        return _Decoded(order, placements, snapshots, cost, metrics)
+
+    def _place_job(self, job_index: int, timelines: List[ResourceTimeline]) -> Optional[list]:
+        """排入一个工单（所有工序按顺序排入，任一工序超出排产周期则撤销并返回 None）"""
+        job = self.jobs[job_index]
+        family = job.family
+        ready_time = job.release
+        placed = []
+        for resource, calendar, run_hours, setup_hours in self._jobs_ops[job_index]:
+            timeline = timelines[resource]
+            index, start, setup = timeline.find_slot(calendar.position(ready_time), family, setup_hours, run_hours)
+            end = start + setup + run_hours
+            if end > calendar.capacity:
+                for placed_resource, placed_start, _, _, _ in placed:
+                    timelines[placed_resource].remove_at(placed_start)
+                return None
+            timeline.insert(index, start, end, family, setup, setup_hours)
+            start_time = calendar.time_at(start)
+            ready_time = calendar.time_at(end, is_end=True)
+            placed.append((resource, start, start_time, ready_time, setup))
+        return placed
+
+    def _evaluate(self, order: List[int], placements: List[Optional[list]], objective: str) -> Tuple[float, Dict[str, float]]:
+        makespan = 0.0
+        total_time = 0.0
+        total_setup = 0.0
+        tardiness = 0.0
+        unscheduled = 0
+        for job_index, placed in zip(order, placements):
+            if not placed:
+                unscheduled += 1
+                continue
+            job = self.jobs[job_index]
+            end = placed[-1][3]
+            makespan = max(makespan, end)
+            total_time += end - job.release
+            total_setup += sum(item[4] for item in placed)
+            if job.due is not None and end > job.due:
+                tardiness += end - job.due
+
+        metrics = {
+            "makespan_hours": makespan,
+            "total_time_hours": total_time,
+            "total_setup_hours": total_setup,
+            "total_tardiness_hours": tardiness,
+        }
+        primary = {
+            OBJECTIVE_MIN_MAKESPAN: makespan,
+            OBJECTIVE_MIN_TOTAL_TIME: total_time,
+            OBJECTIVE_MIN_SETUP_TIME: total_setup,
+        }[objective]
+        # 无法排入的工单按一个完整排产周期计罚，避免局部搜索用“丢弃工单”换取目标值
+        cost = primary + self.due_date_weight * tardiness + unscheduled * max(self._horizon, 1.0) * 10
+        return cost, metrics
+
+    def _build_result(self, decoded: _Decoded, initial_cost: float, iterations: int) -> ScheduleResult:
+        jobs: Dict[Any, ScheduledJob] = {}
+        unscheduled: Dict[Any, str] = {}
+        for job_index, placed in zip(decoded.order, decoded.placements):
+            job = self.jobs[job_index]
+            if not placed:
+                unscheduled[job.key] = "排产周期内资源产能不足"
+                continue
+            operations = [
+                ScheduledOperation(
+                    key=op.key,
+                    resource=op.resource,
+                    start=start_time,
+                    end=end_time,
+                    setup_hours=setup,
+                )
+                for op, (_, _, start_time, end_time, setup) in zip(job.operations, placed)
+            ]
+            jobs[job.key] = ScheduledJob(
+                key=job.key,
+                start=operations[0].start,
+                end=operations[-1].end,
+                setup_hours=sum(op.setup_hours for op in operations),
+                operations=operations,
+            )
+        return ScheduleResult(
+            jobs=jobs,
+            unscheduled=unscheduled,
+            order=[self.jobs[i].key for i in decoded.order],
+            cost=decoded.cost,
+            initial_cost=initial_cost,
+            iterations=iterations,
+            metrics=decoded.metrics,
+        )
+
+
+def hours_between(origin: datetime, value: Optional[datetime]) -> Optional[float]:
+    """相对排产起点的小时数"""
+    if value is None:
+        return None
+    return (value - origin).total_seconds() / 3600
+
+
+def at_hours(origin: datetime, hours: float) -> datetime:
+    """排产起点之后若干小时的时间（精确到秒）"""
+    return origin + timedelta(seconds=round(hours * 3600))
+
+
+def periods_for_date(configs: Sequence[Any], current: date) -> List[Period]:
+    """
+    按工作时间段配置取某天的工作时间段（与 WorkingHoursConfigService.calculate_working_hours 的匹配规则一致：
+    按优先级取第一个日期范围与星期几都匹配的配置）
+
+    Args:
+        configs: 已按优先级从高到低排序的配置（需有 start_date/end_date/day_of_week/working_hours 属性）
+        current: 日期
+    """
+    weekday = current.weekday()
+    for config in configs:
+        if config.start_date and current < config.start_date:
+            continue
+        if config.end_date and current > config.end_date:
+            continue
+        if config.day_of_week is not None and config.day_of_week != weekday:
+            continue
+        return parse_periods(config.working_hours)
+    return []
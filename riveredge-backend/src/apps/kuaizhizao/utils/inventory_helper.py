@@ -9,7 +9,7 @@ Date: 2025-01-01
 """
 
 from datetime import date
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Iterable
 from decimal import Decimal
 from tortoise.functions import Sum
 from tortoise.expressions import Q
@@ -127,3 +127,68 @@ async def get_material_inventory_info(
         "total_quantity": float(on_hand),
     }
 
+
+
+async def get_materials_available_quantities(
+    tenant_id: int,
+    material_ids: Iterable[int],
+    warehouse_id: Optional[int] = None
+) -> Dict[int, Decimal]:
+    """
+    批量获取物料的可用库存数量（按物料分组汇总，固定2次查询）
+
+    口径与 get_material_inventory_info 一致：主仓批次在库数量 + 线边仓（数量 - 预留）。
+
+    Args:
+        tenant_id: 租户ID
+        material_ids: 物料ID列表
+        warehouse_id: 线边仓ID（可选，None 时查询所有仓库）
+
+    Returns:
+        物料ID -> 可用库存数量（Decimal），未出现在库存中的物料为 0
+    """
+    material_ids = list(set(material_ids))
+    available: Dict[int, Decimal] = {material_id: Decimal("0") for material_id in material_ids}
+    if not material_ids:
+        return available
+
+    # 1. MaterialBatch：主仓批次库存
+    try:
+        from apps.master_data.models.material_batch import MaterialBatch
+
+        batch_rows = await MaterialBatch.filter(
+            tenant_id=tenant_id,
+            material_id__in=material_ids,
+            deleted_at__isnull=True,
+            status="in_stock",
+            quantity__gt=0,
+        ).filter(
+            Q(expiry_date__isnull=True) | Q(expiry_date__gte=date.today())
+        ).annotate(total=Sum("quantity")).group_by("material_id").values("material_id", "total")
+        for row in batch_rows:
+            available[row["material_id"]] += Decimal(str(row["total"] or 0))
+    except Exception as e:
+        logger.warning(f"MaterialBatch 批量查询失败: {e}")
+
+    # 2. LineSideInventory：线边仓库存（可用 = 数量 - 预留）
+    try:
+        from apps.kuaizhizao.models.line_side_inventory import LineSideInventory
+
+        line_query = LineSideInventory.filter(
+            tenant_id=tenant_id,
+            material_id__in=material_ids,
+            deleted_at__isnull=True,
+            status="available",
+        )
+        if warehouse_id is not None:
+            line_query = line_query.filter(warehouse_id=warehouse_id)
+        line_rows = await line_query.annotate(
+            total=Sum("quantity"),
+            reserved=Sum("reserved_quantity"),
+        ).group_by("material_id").values("material_id", "total", "reserved")
+        for row in line_rows:
+            available[row["material_id"]] += Decimal(str(row["total"] or 0)) - Decimal(str(row["reserved"] or 0))
+    except Exception as e:
+        logger.warning(f"LineSideInventory 批量查询失败: {e}")
+
+    return {material_id: max(qty, Decimal("0")) for material_id, qty in available.items()}
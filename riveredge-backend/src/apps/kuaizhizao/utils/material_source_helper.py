@@ -16,7 +16,7 @@ Author: Auto (AI Assistant)
 Date: 2026-01-16
 """
 
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Dict, Any, Optional, List, Set, Tuple
 from decimal import Decimal
 from loguru import logger
 
@@ -238,7 +238,8 @@ async def expand_bom_with_source_control(
     max_level: int = 10,
     bom_version: Optional[str] = None,
     use_default_bom: bool = False,
-    material_bom_versions: Optional[Dict[int, str]] = None
+    material_bom_versions: Optional[Dict[int, str]] = None,
+    visited: Optional[Set[int]] = None,
 ) -> List[Dict[str, Any]]:
     """
     展开BOM，自动跳过虚拟件（物料来源控制）
@@ -253,6 +254,7 @@ async def expand_bom_with_source_control(
         bom_version: 全局 BOM 版本（可选），用于顶层物料
         use_default_bom: 是否使用默认版本（is_default=True），当 bom_version 未指定时生效
         material_bom_versions: 按物料ID指定版本（可选），格式 {material_id: version}
+        visited: 展开过程中访问的物料ID集合（可选，含被跳过的虚拟件，供净改变重算判断BOM变更影响范围）
         
     Returns:
         List[Dict]: 展开后的物料需求列表，虚拟件已跳过
@@ -260,6 +262,8 @@ async def expand_bom_with_source_control(
     if level >= max_level:
         logger.warning(f"BOM展开达到最大层级 {max_level}，物料ID: {material_id}")
         return []
+    if visited is not None:
+        visited.add(material_id)
     
     # 获取物料的来源类型
     material = await Material.get_or_none(tenant_id=tenant_id, id=material_id)
@@ -327,6 +331,7 @@ async def expand_bom_with_source_control(
                 bom_version=bom_version,
                 use_default_bom=use_default_bom,
                 material_bom_versions=material_bom_versions,
+                visited=visited,
             )
             
             # 合并需求（如果有子物料展开的结果，使用子物料的结果；否则添加当前物料）
@@ -406,6 +411,7 @@ async def expand_bom_with_source_control(
                 bom_version=bom_version,
                 use_default_bom=use_default_bom,
                 material_bom_versions=material_bom_versions,
+                visited=visited,
             )
             requirements.extend(child_requirements)
         else:
@@ -443,6 +449,7 @@ async def expand_bom_with_source_control(
                     bom_version=bom_version,
                     use_default_bom=use_default_bom,
                     material_bom_versions=material_bom_versions,
+                    visited=visited,
                 )
                 requirements.extend(child_requirements)
 
@@ -0,0 +1,242 @@
+"""
+MRP 净改变（net-change）重算辅助工具模块
+
+全量 MRP 运算结束时把每个需求行（物料 + 数量）的 BOM 展开结果、展开树涉及的物料
+以及这些物料的 BOM 指纹保存为净改变状态（DemandComputation.net_change_state）。
+重算时只有以下“脏”输入需要重新处理：
+- 新增/变更的需求行（展开结果按 物料:数量 缓存，未变的行直接复用）
+- 展开树中 BOM 变更（行数或最后更新时间变化）或物料主数据变更的需求行
+- 上次运算后有库存变动（批次/线边仓更新、批次跨过有效期）的物料（只重新净算，不重新展开）
+
+本系统的 MRP 毛需求由上层毛需求展开、各物料独立净算，因此受影响的子图就是脏需求行的 BOM 展开树。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from tortoise.functions import Count, Max
+
+NET_CHANGE_STATE_VERSION = 1
+
+# 重算模式
+RECOMPUTE_MODE_FULL = "full"
+RECOMPUTE_MODE_NET_CHANGE = "net_change"
+
+# 需求信息中参与净算比对的物料信息字段（见 requirement_signature）
+REQUIREMENT_META_FIELDS = ("material_code", "material_name", "material_type", "source_type", "unit")
+
+
+def line_key(material_id: int, required_quantity: float) -> str:
+    """需求行缓存键（同物料同数量的需求行展开结果相同）"""
+    return f"{material_id}:{required_quantity!r}"
+
+
+def params_key(computation_params: Dict[str, Any], bom_context: Dict[str, Any]) -> str:
+    """计算参数指纹（参数或 BOM 版本策略变化时不能复用展开结果）"""
+    return json.dumps(
+        {"params": computation_params or {}, "bom": bom_context},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+
+
+def aggregate_requirements(lines: Iterable[Tuple[int, Dict[str, Any]]]) -> Dict[int, Dict[str, Any]]:
+    """
+    按需求明细顺序汇总各需求行的展开结果（与全量运算的汇总顺序、首个物料信息优先规则一致）
+
+    Args:
+        lines: (需求明细ID, 展开结果) 列表；展开结果的 contrib 每项为
+            [物料ID, 数量, 物料信息, 是否记录需求明细追溯]
+
+    Returns:
+        Dict[int, Dict]: 物料ID -> 需求信息（required_quantity、物料信息、demand_item_ids）
+    """
+    requirements: Dict[int, Dict[str, Any]] = {}
+    for demand_item_id, explosion in lines:
+        for material_id, quantity, meta, traced in explosion["contrib"]:
+            requirement = requirements.get(material_id)
+            if requirement is None:
+                requirement = {"material_id": material_id, **meta, "required_quantity": 0.0}
+                requirements[material_id] = requirement
+            requirement["required_quantity"] += quantity
+            if traced:
+                demand_item_ids = requirement.setdefault("demand_item_ids", [])
+                if demand_item_id not in demand_item_ids:
+                    demand_item_ids.append(demand_item_id)
+    return requirements
+
+
+def low_level_codes(explosions: Iterable[Dict[str, Any]]) -> Dict[int, int]:
+    """按展开结果计算各物料的低层码（在任一BOM中出现的最深层级，顶层物料为 0）"""
+    codes: Dict[int, int] = {}
+    for explosion in explosions:
+        for material_id, _, meta, _ in explosion["contrib"]:
+            level = meta.get("level", 0)
+            if level > codes.get(material_id, -1):
+                codes[material_id] = level
+    return codes
+
+
+def requirement_signature(requirement: Dict[str, Any]) -> List[Any]:
+    """需求信息中影响净算结果的部分（不含需求明细追溯）"""
+    return [requirement["required_quantity"], *[requirement.get(field) for field in REQUIREMENT_META_FIELDS]]
+
+
+async def get_bom_fingerprints(tenant_id: int, material_ids: Iterable[int]) -> Dict[str, List[Any]]:
+    """
+    获取物料作为父件的 BOM 指纹（行数含已删除行、最后更新时间），一次分组查询
+
+    Returns:
+        Dict[str, List]: 物料ID（字符串）-> [行数, 最后更新时间 ISO]，无 BOM 的物料不在结果中
+    """
+    from apps.master_data.models.material import BOM
+
+    material_ids = list(set(material_ids))
+    if not material_ids:
+        return {}
+    rows = await BOM.filter(
+        tenant_id=tenant_id,
+        material_id__in=material_ids,
+    ).annotate(
+        row_count=Count("id"),
+        last_updated=Max("updated_at"),
+    ).group_by("material_id").values("material_id", "row_count", "last_updated")
+    return {
+        str(row["material_id"]): [row["row_count"], row["last_updated"].isoformat() if row["last_updated"] else None]
+        for row in rows
+    }
+
+
+async def get_changed_bom_materials(
+    tenant_id: int,
+    material_ids: Iterable[int],
+    fingerprints: Dict[str, List[Any]],
+) -> Set[int]:
+    """对比保存的 BOM 指纹，返回 BOM 已变更的物料ID"""
+    material_ids = set(material_ids)
+    current = await get_bom_fingerprints(tenant_id, material_ids)
+    return {
+        material_id
+        for material_id in material_ids
+        if current.get(str(material_id)) != fingerprints.get(str(material_id))
+    }
+
+
+async def get_changed_materials(tenant_id: int, material_ids: Iterable[int], since: datetime) -> Set[int]:
+    """返回上次运算后物料主数据有更新的物料ID"""
+    from apps.master_data.models.material import Material
+
+    material_ids = list(set(material_ids))
+    if not material_ids:
+        return set()
+    return set(
+        await Material.filter(
+            tenant_id=tenant_id,
+            id__in=material_ids,
+            updated_at__gt=since,
+        ).values_list("id", flat=True)
+    )
+
+
+async def get_stock_changed_materials(tenant_id: int, material_ids: Iterable[int], since: datetime) -> Set[int]:
+    """
+    返回上次运算后库存有变动的物料ID
+
+    口径与 get_material_inventory_info 一致：主仓批次、线边仓记录有更新，或主仓批次在此期间过期。
+    """
+    from apps.kuaizhizao.models.line_side_inventory import LineSideInventory
+    from apps.master_data.models.material_batch import MaterialBatch
+
+    material_ids = list(set(material_ids))
+    if not material_ids:
+        return set()
+
+    changed: Set[int] = set(
+        await MaterialBatch.filter(
+            tenant_id=tenant_id,
+            material_id__in=material_ids,
+            updated_at__gt=since,
+        ).distinct().values_list("material_id", flat=True)
+    )
+    changed.update(
+        await LineSideInventory.filter(
+            tenant_id=tenant_id,
+            material_id__in=material_ids,
+            updated_at__gt=since,
+        ).distinct().values_list("material_id", flat=True)
+    )
+    today = date.today()
+    if since.date() < today:
+        changed.update(
+            await MaterialBatch.filter(
+                tenant_id=tenant_id,
+                material_id__in=material_ids,
+                deleted_at__isnull=True,
+                expiry_date__gte=since.date(),
+                expiry_date__lt=today,
+            ).distinct().values_list("material_id", flat=True)
+        )
+    return changed
+
+
+async def has_computation_config_changes(tenant_id: int, since: datetime) -> bool:
+    """上次运算后是否修改过需求计算配置（安全库存、再订货点等来源）"""
+    from apps.kuaizhizao.models.computation_config import ComputationConfig
+
+    return await ComputationConfig.filter(tenant_id=tenant_id, updated_at__gt=since).exists()
+
+
+def item_snapshot(item: Any) -> Dict[str, Any]:
+    """计算明细快照（与重算前快照格式一致）"""
+    return {
+        "material_code": getattr(item, "material_code", None),
+        "material_name": getattr(item, "material_name", None),
+        "suggested_work_order_quantity": str(getattr(item, "suggested_work_order_quantity", 0)),
+        "suggested_purchase_order_quantity": str(getattr(item, "suggested_purchase_order_quantity", 0)),
+    }
+
+
+def diff_item_snapshots(
+    before: List[Dict[str, Any]],
+    after: List[Dict[str, Any]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    对比重算前后的明细快照（按物料编码）
+
+    Returns:
+        Dict: added（新增物料）、removed（不再需要的物料）、changed（建议数量变化）
+    """
+    before_by_code = {row["material_code"]: row for row in before}
+    after_by_code = {row["material_code"]: row for row in after}
+    fields = ("suggested_work_order_quantity", "suggested_purchase_order_quantity")
+
+    changed = []
+    for code, row in after_by_code.items():
+        previous = before_by_code.get(code)
+        if previous is None:
+            continue
+        differences = {
+            field: {"before": previous.get(field), "after": row.get(field)}
+            for field in fields
+            if _normalize_quantity(previous.get(field)) != _normalize_quantity(row.get(field))
+        }
+        if differences:
+            changed.append({"material_code": code, "material_name": row.get("material_name"), "differences": differences})
+
+    return {
+        "added": [row for code, row in after_by_code.items() if code not in before_by_code],
+        "removed": [row for code, row in before_by_code.items() if code not in after_by_code],
+        "changed": changed,
+    }
+
+
+def _normalize_quantity(value: Optional[str]) -> Decimal:
+    if value in (None, "", "None"):
+        return Decimal("0")
+    return Decimal(value)
@@ -0,0 +1,73 @@
+"""
+列表查询工具模块
+
+为高数据量列表接口提供不透明游标（cursor）编码/解码，用于键集分页（keyset pagination），
+翻页成本与页码无关。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict
+
+from infra.exceptions.exceptions import ValidationError
+
+
+def encode_cursor(order_field: str, value: Any, record_id: int) -> str:
+    """
+    编码分页游标
+
+    Args:
+        order_field: 排序字段
+        value: 最后一条记录的排序字段值
+        record_id: 最后一条记录的ID（同值时的次序键）
+
+    Returns:
+        str: URL 安全的不透明游标
+    """
+    if isinstance(value, datetime):
+        typed = {"t": "dt", "v": value.isoformat()}
+    elif isinstance(value, date):
+        typed = {"t": "d", "v": value.isoformat()}
+    elif isinstance(value, Decimal):
+        typed = {"t": "dec", "v": str(value)}
+    else:
+        typed = {"t": "raw", "v": value}
+    payload = json.dumps({"f": order_field, "id": record_id, **typed}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order_field: str) -> Dict[str, Any]:
+    """
+    解码分页游标
+
+    Args:
+        cursor: 游标字符串
+        order_field: 当前排序字段（须与游标一致）
+
+    Returns:
+        Dict[str, Any]: {"value": 排序字段值, "id": 记录ID}
+
+    Raises:
+        ValidationError: 游标无效或与排序字段不一致时抛出
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8"))
+        value_type, value = payload["t"], payload["v"]
+        if value_type == "dt":
+            value = datetime.fromisoformat(value)
+        elif value_type == "d":
+            value = date.fromisoformat(value)
+        elif value_type == "dec":
+            value = Decimal(value)
+        record_id = int(payload["id"])
+    except Exception:
+        raise ValidationError("无效的分页游标")
+    if payload.get("f") != order_field:
+        raise ValidationError("分页游标与排序字段不一致，请从第一页重新查询")
+    return {"value": value, "id": record_id}
@@ -10,6 +10,7 @@ from typing import List, Optional, Annotated, Dict, Any
 from core.api.deps.deps import get_current_user, get_current_tenant
 from infra.models.user import User
 from apps.master_data.services.material_service import MaterialService
+from apps.master_data.services.bom_import_service import BOMImportService
 from apps.master_data.services.material_code_mapping_service import MaterialCodeMappingService
 from apps.master_data.services.material_batch_service import MaterialBatchService
 from apps.master_data.services.material_serial_service import MaterialSerialService
@@ -23,6 +24,7 @@ from apps.master_data.schemas.material_schemas import (
     MaterialCreate, MaterialUpdate, MaterialResponse,
     BOMCreate, BOMUpdate, BOMResponse, BOMBatchCreate,
     BOMBatchImport, BOMVersionCreate, BOMVersionCompare,
+    BOMImportJobCreate, BOMImportJobResponse,
     MaterialGroupTreeResponse,
     MaterialCodeMappingCreate, MaterialCodeMappingUpdate, MaterialCodeMappingResponse,
     MaterialCodeMappingListResponse, MaterialCodeConvertRequest, MaterialCodeConvertResponse,
@@ -30,7 +32,7 @@ from apps.master_data.schemas.material_schemas import (
     MaterialSerialCreate, MaterialSerialUpdate, MaterialSerialResponse, MaterialSerialListResponse
 )
 from apps.master_data.services.ai.material_ai_service import MaterialAIService
-from infra.exceptions.exceptions import NotFoundError, ValidationError
+from infra.exceptions.exceptions import BusinessLogicError, NotFoundError, ValidationError
 
 router = APIRouter(prefix="/materials", tags=["Material"])
 
@@ -523,6 +525,95 @@ async def batch_import_bom(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
 
 
+@router.post("/bom/import-jobs", response_model=BOMImportJobResponse, summary="创建BOM大批量导入任务")
+async def create_bom_import_job(
+    data: BOMImportJobCreate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    tenant_id: Annotated[int, Depends(get_current_tenant)]
+):
+    """
+    创建BOM大批量导入任务（后台执行）
+    
+    适用于ERP迁移等大文件导入。文件先通过文件管理上传（CSV 或 xlsx），
+    后台任务分块流式读取、批量映射编码、检测循环依赖并分批写入，可通过任务详情查询进度。
+    
+    - **file_uuid**: 导入文件UUID（必填）
+    - **version**: BOM版本号（可选，默认：1.0）
+    - **bom_code**: BOM编码（可选）
+    - **effective_date**: 生效日期（可选）
+    - **description**: 描述（可选）
+    """
+    try:
+        job = await BOMImportService.create_job(tenant_id, data, created_by=current_user.id)
+        return BOMImportJobResponse.model_validate(job)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except BusinessLogicError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.get("/bom/import-jobs/{job_uuid}", response_model=BOMImportJobResponse, summary="获取BOM导入任务进度")
+async def get_bom_import_job(
+    job_uuid: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    tenant_id: Annotated[int, Depends(get_current_tenant)]
+):
+    """
+    获取BOM导入任务详情（状态、阶段、已写入行数、校验错误）
+    
+    - **job_uuid**: 任务UUID
+    """
+    try:
+        job = await BOMImportService.get_job(tenant_id, job_uuid)
+        return BOMImportJobResponse.model_validate(job)
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
+@router.post("/bom/import-jobs/{job_uuid}/resume", response_model=BOMImportJobResponse, summary="重试BOM导入任务")
+async def resume_bom_import_job(
+    job_uuid: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    tenant_id: Annotated[int, Depends(get_current_tenant)]
+):
+    """
+    重试失败的BOM导入任务（从断点继续，已写入的分块不会重复写入）
+    
+    - **job_uuid**: 任务UUID
+    """
+    try:
+        job = await BOMImportService.resume_job(tenant_id, job_uuid)
+        return BOMImportJobResponse.model_validate(job)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except BusinessLogicError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+@router.post("/bom/import-jobs/{job_uuid}/cancel", response_model=BOMImportJobResponse, summary="取消BOM导入任务")
+async def cancel_bom_import_job(
+    job_uuid: str,
+    current_user: Annotated[User, Depends(get_current_user)],
+    tenant_id: Annotated[int, Depends(get_current_tenant)]
+):
+    """
+    取消未执行或失败的BOM导入任务（删除已写入但未发布的暂存BOM行，原BOM不受影响）
+    
+    - **job_uuid**: 任务UUID
+    """
+    try:
+        job = await BOMImportService.cancel_job(tenant_id, job_uuid)
+        return BOMImportJobResponse.model_validate(job)
+    except ValidationError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except NotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+
 @router.get("/bom/material/{material_id}/hierarchy", summary="生成BOM层级结构")
 async def get_bom_hierarchy(
     material_id: int,
@@ -0,0 +1,49 @@
+"""
+BOM导入 Inngest 工作流函数
+
+监听 bom/import-job 事件，后台分块执行BOM大批量导入任务。
+任务断点保存在 BOMImportJob 中，Inngest 重试或手动重试时从断点继续；
+同一任务同时只执行一次（Inngest 重试与手动重试的事件排队执行）。
+
+Author: Luigi Lu
+Date: 2026-03-04
+"""
+
+import inngest
+from inngest import Event, TriggerEvent
+from typing import Dict, Any
+from loguru import logger
+
+from core.inngest.client import inngest_client
+from core.utils.inngest_tenant_isolation import with_tenant_isolation
+from infra.domain.tenant_context import get_current_tenant_id
+
+
+@inngest_client.create_function(
+    fn_id="bom-import-job-workflow",
+    name="BOM批量导入任务",
+    trigger=TriggerEvent(event="bom/import-job"),
+    retries=2,
+    concurrency=[
+        inngest.Concurrency(limit=1, key="event.data.job_uuid"),
+    ],
+)
+@with_tenant_isolation
+async def bom_import_job_workflow(event: Event, **kwargs) -> Dict[str, Any]:
+    """
+    执行BOM导入任务。
+
+    租户隔离已由装饰器处理，可直接使用 get_current_tenant_id()。
+    **kwargs 用于兼容 Inngest 运行时可能传入的 step/ctx 等参数。
+    """
+    from apps.master_data.services.bom_import_service import BOMImportService
+
+    tenant_id = get_current_tenant_id()
+    data = event.data or {}
+    job_uuid = data.get("job_uuid")
+
+    if not job_uuid:
+        logger.warning("BOM导入任务工作流：缺少 job_uuid")
+        return {"success": False, "error": "缺少必要参数：job_uuid"}
+
+    return await BOMImportService.run_job(tenant_id=tenant_id, job_uuid=job_uuid)
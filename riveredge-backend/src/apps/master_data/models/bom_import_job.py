@@ -0,0 +1,77 @@
+"""
+BOM导入任务模型模块
+
+定义BOM大批量导入任务数据模型，记录导入进度与断点，支持失败后断点续传。
+
+Author: Luigi Lu
+Date: 2026-03-04
+"""
+
+from tortoise import fields
+from core.models.base import BaseModel
+
+
+class BOMImportJob(BaseModel):
+    """
+    BOM导入任务模型
+
+    上传的BOM文件（CSV/Excel）由后台任务分块流式读取、校验并批量写入。
+    每个分块写入与断点更新在同一事务中提交，任务失败后可从断点继续。
+
+    注意：继承自 BaseModel，自动包含 uuid、tenant_id、created_at、updated_at 字段。
+
+    Attributes:
+        id: 主键ID
+        file_uuid: 导入文件UUID（文件管理）
+        file_name: 导入文件名
+        version: 目标BOM版本号
+        bom_code: BOM编码（可选，不传则沿用或自动生成）
+        effective_date: 生效日期
+        description: 描述
+        status: 任务状态（pending/running/completed/failed/cancelled）
+        phase: 当前阶段（validate/insert/finalize）
+        total_rows: 文件数据行数
+        processed_rows: 已写入行数（断点）
+        checkpoint: 断点数据（各父件BOM编码、替换前最大BOM ID等）
+        errors: 校验错误列表
+        error_message: 失败原因
+        started_at: 开始时间
+        finished_at: 结束时间
+        created_by: 创建人ID
+    """
+
+    class Meta:
+        """
+        模型元数据
+        """
+        table = "apps_master_data_bom_import_jobs"
+        table_description = "基础数据管理 - BOM导入任务"
+        indexes = [
+            ("tenant_id", "status"),
+            ("created_at",),
+        ]
+
+    id = fields.IntField(pk=True, description="主键ID")
+
+    file_uuid = fields.CharField(max_length=36, description="导入文件UUID")
+    file_name = fields.CharField(max_length=255, null=True, description="导入文件名")
+    version = fields.CharField(max_length=50, default="1.0", description="目标BOM版本号")
+    bom_code = fields.CharField(max_length=100, null=True, description="BOM编码")
+    effective_date = fields.DatetimeField(null=True, description="生效日期")
+    description = fields.TextField(null=True, description="描述")
+
+    status = fields.CharField(max_length=20, default="pending", description="任务状态（pending/running/completed/failed/cancelled）")
+    phase = fields.CharField(max_length=20, default="validate", description="当前阶段（validate/insert/finalize）")
+    total_rows = fields.IntField(default=0, description="文件数据行数")
+    processed_rows = fields.IntField(default=0, description="已写入行数（断点）")
+    checkpoint = fields.JSONField(null=True, description="断点数据（JSON格式）")
+    errors = fields.JSONField(null=True, description="校验错误列表（JSON格式）")
+    error_message = fields.TextField(null=True, description="失败原因")
+
+    started_at = fields.DatetimeField(null=True, description="开始时间")
+    finished_at = fields.DatetimeField(null=True, description="结束时间")
+    created_by = fields.IntField(null=True, description="创建人ID")
+
+    def __str__(self):
+        """字符串表示"""
+        return f"BOMImportJob({self.uuid}, {self.status})"
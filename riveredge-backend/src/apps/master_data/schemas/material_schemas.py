@@ -633,6 +633,45 @@ class BOMBatchImport(BaseModel):
         return v
 
 
+class BOMImportJobCreate(BaseModel):
+    """
+    BOM导入任务创建 Schema（大批量文件导入）
+    
+    文件先通过文件管理上传（支持 CSV、xlsx），后台任务分块流式读取、校验并批量写入。
+    文件列：父件编码、子件编码、数量、单位、损耗率、是否必选、备注（支持中文或英文列名）。
+    """
+    
+    file_uuid: str = Field(..., max_length=36, description="导入文件UUID（文件管理上传后返回）")
+    version: Optional[str] = Field("1.0", max_length=50, description="BOM版本号（可选，默认：1.0）")
+    bom_code: Optional[str] = Field(None, max_length=100, description="BOM编码（可选）")
+    effective_date: Optional[datetime] = Field(None, description="生效日期（可选）")
+    description: Optional[str] = Field(None, description="描述（可选）")
+
+
+class BOMImportJobResponse(BaseModel):
+    """BOM导入任务响应 Schema"""
+    
+    uuid: str = Field(..., description="任务UUID")
+    tenant_id: int = Field(..., description="租户ID")
+    file_uuid: str = Field(..., description="导入文件UUID")
+    file_name: Optional[str] = Field(None, description="导入文件名")
+    version: str = Field(..., description="目标BOM版本号")
+    bom_code: Optional[str] = Field(None, description="BOM编码")
+    status: str = Field(..., description="任务状态（pending/running/completed/failed/cancelled）")
+    phase: str = Field(..., description="当前阶段（validate/insert/finalize）")
+    total_rows: int = Field(..., description="文件数据行数")
+    processed_rows: int = Field(..., description="已写入行数")
+    errors: Optional[List[Dict[str, Any]]] = Field(None, description="校验错误列表")
+    error_message: Optional[str] = Field(None, description="失败原因")
+    started_at: Optional[datetime] = Field(None, description="开始时间")
+    finished_at: Optional[datetime] = Field(None, description="结束时间")
+    created_at: datetime = Field(..., description="创建时间")
+    updated_at: datetime = Field(..., description="更新时间")
+    
+    class Config:
+        from_attributes = True
+
+
 class BOMVersionCreate(BaseModel):
     """
     BOM版本创建 Schema
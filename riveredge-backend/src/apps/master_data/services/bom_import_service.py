@@ -0,0 +1,951 @@
+"""
+BOM导入服务模块
+
+提供BOM大批量导入能力：编码批量映射、单次图遍历检测循环依赖、bulk_create 分批写入，
+以及基于 BOMImportJob 的后台分块导入（进度上报、失败后从断点续传）。
+执行前以条件更新认领任务，Inngest 重试与手动重试的事件不会重复写入同一分块。
+
+Author: Luigi Lu
+Date: 2026-03-04
+"""
+
+import asyncio
+import csv
+import os
+from collections import deque
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from tortoise import Tortoise, timezone
+from tortoise.transactions import in_transaction
+from loguru import logger
+
+from apps.master_data.models.material import Material, BOM
+from apps.master_data.models.material_code_alias import MaterialCodeAlias
+from apps.master_data.models.bom_import_job import BOMImportJob
+from apps.master_data.schemas.material_schemas import BOMImportJobCreate
+from core.services.business.code_generation_service import CodeGenerationService
+from infra.exceptions.exceptions import BusinessLogicError, NotFoundError, ValidationError
+
+
+# 文件分块读取行数（每块一个事务提交并更新断点）
+CHUNK_SIZE = 5000
+
+# bulk_create 单批行数
+BULK_BATCH_SIZE = 1000
+
+# 编码批量查询单批数量（避免 IN 列表过长）
+CODE_LOOKUP_BATCH_SIZE = 5000
+
+# 任务最多记录的校验错误数
+MAX_IMPORT_ERRORS = 200
+
+# 可被执行认领的任务状态（失败任务由 Inngest 重试或手动重试后从断点继续）
+CLAIMABLE_JOB_STATUSES = ("pending", "failed")
+
+# 导入文件列名映射（支持中文/英文列名）
+COLUMN_ALIASES = {
+    "parent_code": ("parent_code", "父件编码", "父件", "主物料编码"),
+    "component_code": ("component_code", "子件编码", "子件", "子物料编码"),
+    "quantity": ("quantity", "数量", "用量", "子件数量"),
+    "unit": ("unit", "单位"),
+    "waste_rate": ("waste_rate", "损耗率", "损耗率(%)"),
+    "is_required": ("is_required", "是否必选", "必选"),
+    "remark": ("remark", "备注"),
+}
+
+FALSE_VALUES = {"否", "false", "0", "n", "no"}
+
+
+def find_bom_cycle(
+    graph: Dict[int, Set[int]],
+    roots: Optional[Iterable[int]] = None
+) -> Optional[List[int]]:
+    """
+    检测BOM依赖图中经过指定物料的循环（迭代式 Tarjan 强连通分量，不受递归深度限制）
+
+    只报告包含 roots 中物料的循环：图中与本次变更无关的既有循环不会阻断保存。
+
+    Args:
+        graph: 父件ID -> 子件ID集合
+        roots: 需检测的物料ID（通常为本次变更结构的父件），不传时检测全图
+
+    Returns:
+        Optional[List[int]]: 循环路径（首尾为同一物料），无循环时返回None
+    """
+    targets = set(graph.keys()) if roots is None else set(roots)
+    index: Dict[int, int] = {}
+    low: Dict[int, int] = {}
+    stack: List[int] = []
+    on_stack: Set[int] = set()
+    for root in sorted(targets):
+        if root in index:
+            continue
+        index[root] = low[root] = len(index)
+        stack.append(root)
+        on_stack.add(root)
+        work: List[Tuple[int, Iterator[int]]] = [(root, iter(graph.get(root, ())))]
+        while work:
+            node, children = work[-1]
+            child = next(children, None)
+            if child is None:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component: Set[int] = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.add(member)
+                        if member == node:
+                            break
+                    hits = component & targets
+                    if len(component) > 1 and hits:
+                        return _cycle_path(graph, component, min(hits))
+                continue
+            if child not in index:
+                index[child] = low[child] = len(index)
+                stack.append(child)
+                on_stack.add(child)
+                work.append((child, iter(graph.get(child, ()))))
+            elif child in on_stack:
+                low[node] = min(low[node], index[child])
+    return None
+
+
+def _cycle_path(graph: Dict[int, Set[int]], component: Set[int], start: int) -> List[int]:
+    """在强连通分量内查找从 start 出发回到 start 的最短路径"""
+    previous: Dict[int, int] = {}
+    queue = deque([start])
+    while queue:
+        node = queue.popleft()
+        for child in graph.get(node, ()):
+            if child not in component:
+                continue
+            if child == start:
+                path = [node]
+                while path[-1] != start:
+                    path.append(previous[path[-1]])
+                return list(reversed(path)) + [start]
+            if child not in previous:
+                previous[child] = node
+                queue.append(child)
+    return [start, start]
+
+
+class BOMImportService:
+    """BOM导入服务"""
+
+    # ==================== 公共批量工具 ====================
+
+    @staticmethod
+    async def resolve_material_codes(
+        tenant_id: int,
+        codes: Iterable[str]
+    ) -> Dict[str, int]:
+        """
+        批量将物料编码（主编码或部门编码）映射为物料ID
+
+        先按主编码分批查询，未命中的再按编码别名分批查询，查询次数与编码数量的批次数成正比。
+
+        Args:
+            tenant_id: 租户ID
+            codes: 编码集合
+
+        Returns:
+            Dict[str, int]: 编码 -> 物料ID（未找到的编码不在结果中）
+        """
+        codes = list(set(code for code in codes if code))
+        code_map: Dict[str, int] = {}
+        for i in range(0, len(codes), CODE_LOOKUP_BATCH_SIZE):
+            rows = await Material.filter(
+                tenant_id=tenant_id,
+                main_code__in=codes[i:i + CODE_LOOKUP_BATCH_SIZE],
+                deleted_at__isnull=True
+            ).values("id", "main_code")
+            for row in rows:
+                code_map[row["main_code"]] = row["id"]
+
+        unresolved = [code for code in codes if code not in code_map]
+        for i in range(0, len(unresolved), CODE_LOOKUP_BATCH_SIZE):
+            alias_rows = await MaterialCodeAlias.filter(
+                tenant_id=tenant_id,
+                code__in=unresolved[i:i + CODE_LOOKUP_BATCH_SIZE],
+                deleted_at__isnull=True
+            ).values("code", "material_id")
+            alias_map = {row["code"]: row["material_id"] for row in alias_rows}
+            if not alias_map:
+                continue
+            alive_ids = set(await Material.filter(
+                tenant_id=tenant_id,
+                id__in=list(set(alias_map.values())),
+                deleted_at__isnull=True
+            ).values_list("id", flat=True))
+            for code, material_id in alias_map.items():
+                if material_id in alive_ids:
+                    code_map.setdefault(code, material_id)
+        return code_map
+
+    @staticmethod
+    async def resolve_bom_codes(
+        tenant_id: int,
+        parent_ids: Iterable[int],
+        version: str,
+        bom_code: Optional[str] = None
+    ) -> Dict[int, str]:
+        """
+        批量确定各父件的BOM编码
+
+        优先级：请求指定编码 > 该父件同版本现有编码 > 该父件其他版本编码 > 编码规则生成（失败时按时间戳生成）。
+
+        Args:
+            tenant_id: 租户ID
+            parent_ids: 父件ID集合
+            version: 目标版本
+            bom_code: 请求指定的BOM编码（可选）
+
+        Returns:
+            Dict[int, str]: 父件ID -> BOM编码
+        """
+        parent_ids = list(set(parent_ids))
+        if bom_code:
+            return {pid: bom_code for pid in parent_ids}
+
+        same_version: Dict[int, str] = {}
+        any_version: Dict[int, str] = {}
+        for i in range(0, len(parent_ids), CODE_LOOKUP_BATCH_SIZE):
+            rows = await BOM.filter(
+                tenant_id=tenant_id,
+                material_id__in=parent_ids[i:i + CODE_LOOKUP_BATCH_SIZE],
+                bom_code__isnull=False,
+                deleted_at__isnull=True
+            ).order_by("id").values("material_id", "version", "bom_code")
+            for row in rows:
+                any_version.setdefault(row["material_id"], row["bom_code"])
+                if row["version"] == version:
+                    same_version.setdefault(row["material_id"], row["bom_code"])
+
+        result: Dict[int, str] = {}
+        missing = []
+        for pid in parent_ids:
+            code = same_version.get(pid) or any_version.get(pid)
+            if code:
+                result[pid] = code
+            else:
+                missing.append(pid)
+
+        if missing:
+            main_codes = dict(await Material.filter(
+                tenant_id=tenant_id,
+                id__in=missing
+            ).values_list("id", "main_code"))
+            for pid in missing:
+                main_code = main_codes.get(pid) or str(pid)
+                try:
+                    result[pid] = await CodeGenerationService.generate_code(
+                        tenant_id=tenant_id,
+                        rule_code="ENGINEERING_BOM_CODE",
+                        context={
+                            "date": datetime.now().strftime("%Y%m%d"),
+                            "material_code": main_code,
+                            "version": version,
+                        }
+                    )
+                except Exception as e:
+                    logger.warning(f"BOM编码生成失败，使用降级方案: {e}")
+                    result[pid] = f"BOM-{main_code}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+        return result
+
+    @staticmethod
+    async def check_cycles(
+        tenant_id: int,
+        edges: Iterable[Tuple[int, int]],
+        replaced_parent_ids: Set[int],
+        id_to_code: Optional[Dict[int, str]] = None
+    ) -> None:
+        """
+        对导入结构与库中其他父件的现有结构合并成的依赖图做一次循环检测
+
+        被导入替换的父件只使用导入数据中的结构；只加载从导入子件出发可达的现有BOM结构，
+        并只报告经过被导入父件的循环（库中与本次导入无关的既有循环不阻断保存）。
+
+        Args:
+            tenant_id: 租户ID
+            edges: 导入的 (父件ID, 子件ID) 列表
+            replaced_parent_ids: 本次导入替换结构的父件ID集合
+            id_to_code: 物料ID -> 编码（用于错误提示）
+
+        Raises:
+            ValidationError: 存在循环依赖时抛出
+        """
+        graph: Dict[int, Set[int]] = {}
+        for parent_id, component_id in edges:
+            graph.setdefault(parent_id, set()).add(component_id)
+        if not graph:
+            return
+        imported_parent_ids = set(graph.keys())
+
+        component_ids = sorted({child for children in graph.values() for child in children})
+        table = BOM._meta.db_table
+        existing_edges = await Tortoise.get_connection("default").execute_query_dict(
+            f"""
+            WITH RECURSIVE reachable(material_id) AS (
+                SELECT unnest($2::bigint[])
+                UNION
+                SELECT b.component_id
+                FROM {table} b
+                JOIN reachable r ON b.material_id = r.material_id
+                WHERE b.tenant_id = $1
+                  AND b.deleted_at IS NULL
+                  AND b.material_id <> ALL($3::bigint[])
+            )
+            SELECT DISTINCT b.material_id, b.component_id
+            FROM {table} b
+            JOIN reachable r ON b.material_id = r.material_id
+            WHERE b.tenant_id = $1
+              AND b.deleted_at IS NULL
+              AND b.material_id <> ALL($3::bigint[])
+            """,
+            [tenant_id, component_ids, sorted(replaced_parent_ids)],
+        )
+        for edge in existing_edges:
+            graph.setdefault(edge["material_id"], set()).add(edge["component_id"])
+
+        cycle = find_bom_cycle(graph, imported_parent_ids)
+        if cycle:
+            id_to_code = id_to_code or {}
+            missing_ids = [mid for mid in cycle if mid not in id_to_code]
+            if missing_ids:
+                id_to_code = {
+                    **dict(await Material.filter(
+                        tenant_id=tenant_id,
+                        id__in=missing_ids
+                    ).values_list("id", "main_code")),
+                    **id_to_code,
+                }
+            cycle_codes = [id_to_code.get(mid, str(mid)) for mid in cycle]
+            raise ValidationError(f"检测到循环依赖：{' -> '.join(cycle_codes)}，请检查BOM配置")
+
+    @staticmethod
+    async def check_approved_versions(
+        tenant_id: int,
+        parent_ids: Iterable[int],
+        version: str
+    ) -> None:
+        """
+        校验目标版本未审核（已审核版本不可直接覆盖导入）
+
+        Raises:
+            ValidationError: 任一父件的目标版本已审核时抛出
+        """
+        approved = await BOM.filter(
+            tenant_id=tenant_id,
+            material_id__in=list(set(parent_ids)),
+            version=version,
+            approval_status="approved",
+            deleted_at__isnull=True,
+        ).exists()
+        if approved:
+            raise ValidationError(
+                f"版本 {version} 已审核通过，禁止直接修改。请先升版或使用「另存为新版本」。"
+            )
+
+    @staticmethod
+    async def get_max_bom_id(tenant_id: int) -> int:
+        """获取当前最大BOM ID（导入写入的新行ID均大于该值，用于替换旧结构）"""
+        max_id = await BOM.filter(tenant_id=tenant_id).order_by("-id").first().values_list("id", flat=True)
+        return max_id or 0
+
+    @staticmethod
+    async def replace_previous_rows(
+        tenant_id: int,
+        parent_ids: Iterable[int],
+        version: str,
+        max_existing_id: int
+    ) -> int:
+        """
+        软删除父件目标版本在导入前已存在的BOM行（ID不大于 max_existing_id）
+
+        Returns:
+            int: 软删除的行数
+        """
+        return await BOM.filter(
+            tenant_id=tenant_id,
+            material_id__in=list(set(parent_ids)),
+            version=version,
+            id__lte=max_existing_id,
+            deleted_at__isnull=True
+        ).update(deleted_at=timezone.now())
+
+    @staticmethod
+    async def publish_staged_rows(
+        tenant_id: int,
+        parent_ids: Iterable[int],
+        version: str,
+        max_existing_id: int,
+        staged_at: datetime
+    ) -> int:
+        """
+        发布后台导入暂存的BOM行（清除暂存标记 deleted_at=staged_at）
+
+        应与 replace_previous_rows 在同一事务中调用，使新旧结构一次切换。
+
+        Returns:
+            int: 发布的行数
+        """
+        return await BOM.filter(
+            tenant_id=tenant_id,
+            material_id__in=list(set(parent_ids)),
+            version=version,
+            id__gt=max_existing_id,
+            deleted_at=staged_at
+        ).update(deleted_at=None)
+
+    @staticmethod
+    async def purge_staged_rows(
+        tenant_id: int,
+        version: str,
+        max_existing_id: int,
+        staged_at: datetime
+    ) -> int:
+        """
+        物理删除后台导入暂存但未发布的BOM行（任务取消或校验失败时清理）
+
+        暂存行从未对业务可见，直接删除，不留下与普通软删除行混杂的记录；
+        暂存标记为任务创建断点时的时间戳，无需再按父件过滤。
+
+        Returns:
+            int: 删除的行数
+        """
+        return await BOM.filter(
+            tenant_id=tenant_id,
+            version=version,
+            id__gt=max_existing_id,
+            deleted_at=staged_at
+        ).delete()
+
+    @staticmethod
+    async def bulk_insert_bom_rows(rows: List[BOM]) -> None:
+        """按 BULK_BATCH_SIZE 分批 bulk_create BOM 行"""
+        for i in range(0, len(rows), BULK_BATCH_SIZE):
+            await BOM.bulk_create(rows[i:i + BULK_BATCH_SIZE])
+
+    # ==================== 后台导入任务 ====================
+
+    @staticmethod
+    async def create_job(
+        tenant_id: int,
+        data: BOMImportJobCreate,
+        created_by: Optional[int] = None
+    ) -> BOMImportJob:
+        """
+        创建BOM导入任务并发送后台执行事件
+
+        Args:
+            tenant_id: 租户ID
+            data: 导入任务数据
+            created_by: 创建人ID
+
+        Returns:
+            BOMImportJob: 导入任务
+
+        Raises:
+            NotFoundError: 导入文件不存在时抛出
+            ValidationError: 文件格式不支持时抛出
+            BusinessLogicError: 任务调度失败时抛出
+        """
+        from core.services.file.file_service import FileService
+
+        file = await FileService.get_file_by_uuid(tenant_id, data.file_uuid)
+        BOMImportService._detect_file_format(file.original_name or file.file_path)
+
+        job = await BOMImportJob.create(
+            tenant_id=tenant_id,
+            file_uuid=data.file_uuid,
+            file_name=file.original_name,
+            version=data.version or "1.0",
+            bom_code=data.bom_code,
+            effective_date=data.effective_date,
+            description=data.description,
+            created_by=created_by,
+        )
+        await BOMImportService._dispatch_or_fail(job)
+        return job
+
+    @staticmethod
+    async def get_job(tenant_id: int, job_uuid: str) -> BOMImportJob:
+        """
+        获取BOM导入任务（进度查询）
+
+        Raises:
+            NotFoundError: 任务不存在时抛出
+        """
+        job = await BOMImportJob.get_or_none(tenant_id=tenant_id, uuid=job_uuid)
+        if not job:
+            raise NotFoundError(f"BOM导入任务 {job_uuid} 不存在")
+        return job
+
+    @staticmethod
+    async def resume_job(tenant_id: int, job_uuid: str) -> BOMImportJob:
+        """
+        重新执行失败的导入任务（从断点继续）
+
+        Raises:
+            NotFoundError: 任务不存在时抛出
+            ValidationError: 任务不是失败状态时抛出
+            BusinessLogicError: 任务调度失败时抛出
+        """
+        job = await BOMImportService.get_job(tenant_id, job_uuid)
+        # 条件更新认领任务：Inngest 自动重试已将任务置为执行中时不再重复发送执行事件
+        claimed = await BOMImportJob.filter(id=job.id, status="failed").update(
+            status="pending",
+            error_message=None,
+            errors=None,
+        )
+        if not claimed:
+            await job.refresh_from_db(fields=["status"])
+            raise ValidationError(f"只有失败的导入任务可以重试，当前状态：{job.status}")
+        job.status = "pending"
+        job.error_message = None
+        job.errors = None
+        await BOMImportService._dispatch_or_fail(job)
+        return job
+
+    @staticmethod
+    async def cancel_job(tenant_id: int, job_uuid: str) -> BOMImportJob:
+        """
+        取消未执行或失败的导入任务，并删除已写入的暂存BOM行
+
+        Raises:
+            NotFoundError: 任务不存在时抛出
+            ValidationError: 任务执行中或已结束时抛出
+        """
+        job = await BOMImportService.get_job(tenant_id, job_uuid)
+        async with in_transaction("default"):
+            # 条件更新抢占，避免与同时认领该任务的执行互相覆盖
+            cancelled = await BOMImportJob.filter(id=job.id, status__in=CLAIMABLE_JOB_STATUSES).update(
+                status="cancelled",
+                finished_at=timezone.now(),
+            )
+            if not cancelled:
+                await job.refresh_from_db(fields=["status"])
+                raise ValidationError(f"只有未执行或失败的导入任务可以取消，当前状态：{job.status}")
+            purged = await BOMImportService._purge_job_rows(job)
+        await job.refresh_from_db()
+        logger.info(f"BOM导入任务 {job_uuid} 已取消，删除暂存BOM行 {purged} 行")
+        return job
+
+    @staticmethod
+    async def run_job(tenant_id: int, job_uuid: str) -> Dict[str, Any]:
+        """
+        执行BOM导入任务（由 Inngest 工作流调用）
+
+        阶段：
+        1. validate：流式读取文件，批量映射编码，校验数量/损耗率/重复子件/自引用，单次图遍历检测循环；
+           首次执行时确定各父件BOM编码并记录当前最大BOM ID，写入断点；
+           校验失败时删除已写入的暂存行并重置断点
+        2. insert：从断点行开始分块读取文件，每块 bulk_create 并在同一事务中推进断点；
+           写入的行以 deleted_at=staged_at 暂存，完成前对业务查询不可见
+        3. finalize：同一事务中软删除父件目标版本导入前已存在的BOM行并发布暂存行，任务完成
+
+        任务失败后重新执行会跳过已提交的分块，从断点继续；未完成的任务不会留下可见的重复BOM行。
+
+        Args:
+            tenant_id: 租户ID
+            job_uuid: 任务UUID
+
+        Returns:
+            Dict[str, Any]: 执行结果
+        """
+        job = await BOMImportService.get_job(tenant_id, job_uuid)
+        # 条件更新认领任务：Inngest 重试与手动重试发送的事件只有一个能执行，其余直接跳过
+        claimed = await BOMImportJob.filter(id=job.id, status__in=CLAIMABLE_JOB_STATUSES).update(
+            status="running",
+            started_at=job.started_at or timezone.now(),
+        )
+        if not claimed:
+            logger.info(f"BOM导入任务 {job_uuid} 未被认领（已结束或正在执行），跳过")
+            return {"success": True, "job_uuid": job_uuid, "skipped": True}
+        await job.refresh_from_db()
+
+        try:
+            from core.services.file.file_service import FileService
+
+            file = await FileService.get_file_by_uuid(tenant_id, job.file_uuid)
+            full_path = os.path.join(FileService.UPLOAD_DIR, file.file_path)
+            file_format = BOMImportService._detect_file_format(file.original_name or file.file_path)
+
+            # 1. 校验（不写库，重跑时重新计算编码映射）
+            code_map, parent_ids, total_rows, errors = await BOMImportService._validate_file(
+                tenant_id, job, full_path, file_format
+            )
+            if errors:
+                # 校验失败需修正文件后重新导入，清理断点续传时已写入的暂存行
+                async with in_transaction("default"):
+                    await BOMImportService._purge_job_rows(job)
+                    job.status = "failed"
+                    job.errors = errors[:MAX_IMPORT_ERRORS]
+                    job.error_message = f"校验失败，共 {len(errors)} 处错误"
+                    job.total_rows = total_rows
+                    job.processed_rows = 0
+                    job.phase = "validate"
+                    job.checkpoint = None
+                    job.finished_at = timezone.now()
+                    await job.save()
+                return {"success": False, "job_uuid": job_uuid, "error_count": len(errors)}
+
+            if job.phase == "validate":
+                bom_codes = await BOMImportService.resolve_bom_codes(
+                    tenant_id, parent_ids, job.version, job.bom_code
+                )
+                job.checkpoint = {
+                    "bom_codes": {str(pid): code for pid, code in bom_codes.items()},
+                    "max_existing_id": await BOMImportService.get_max_bom_id(tenant_id),
+                    "staged_at": timezone.now().isoformat(),
+                }
+                job.total_rows = total_rows
+                job.processed_rows = 0
+                job.phase = "insert"
+                await job.save()
+
+            # 2. 分块写入（分块写入与断点推进同事务）
+            if job.phase == "insert":
+                bom_codes = {int(pid): code for pid, code in job.checkpoint["bom_codes"].items()}
+                staged_at = BOMImportService._staged_at(job)
+                async for chunk in BOMImportService._aiter_chunks(full_path, file_format, start_row=job.processed_rows):
+                    rows = [
+                        BOMImportService._build_bom_row(tenant_id, job, item, code_map, bom_codes, staged_at)
+                        for item in chunk
+                    ]
+                    async with in_transaction("default"):
+                        await BOMImportService.bulk_insert_bom_rows(rows)
+                        job.processed_rows += len(chunk)
+                        await job.save(update_fields=["processed_rows", "updated_at"])
+                    logger.info(f"BOM导入任务 {job_uuid} 进度: {job.processed_rows}/{job.total_rows}")
+                job.phase = "finalize"
+                await job.save(update_fields=["phase", "updated_at"])
+
+            # 3. 替换旧结构并发布暂存行（同一事务）
+            async with in_transaction("default"):
+                replaced = await BOMImportService.replace_previous_rows(
+                    tenant_id, parent_ids, job.version, job.checkpoint["max_existing_id"]
+                )
+                staged_at = BOMImportService._staged_at(job)
+                if staged_at is not None:
+                    await BOMImportService.publish_staged_rows(
+                        tenant_id, parent_ids, job.version, job.checkpoint["max_existing_id"], staged_at
+                    )
+                job.status = "completed"
+                job.finished_at = timezone.now()
+                await job.save(update_fields=["status", "finished_at", "updated_at"])
+
+            logger.info(
+                f"BOM导入任务 {job_uuid} 完成：写入 {job.processed_rows} 行，替换旧BOM行 {replaced} 行"
+            )
+            return {
+                "success": True,
+                "job_uuid": job_uuid,
+                "processed_rows": job.processed_rows,
+                "replaced_rows": replaced,
+            }
+        except Exception as e:
+            logger.error(f"BOM导入任务 {job_uuid} 执行失败（阶段 {job.phase}，断点 {job.processed_rows}）: {e}")
+            job.status = "failed"
+            job.error_message = str(e)
+            await job.save(update_fields=["status", "error_message", "updated_at"])
+            raise
+
+    # ==================== 内部实现 ====================
+
+    @staticmethod
+    async def _purge_job_rows(job: BOMImportJob) -> int:
+        """删除任务已写入但未发布的暂存BOM行"""
+        staged_at = BOMImportService._staged_at(job)
+        if job.phase == "validate" or staged_at is None:
+            return 0
+        return await BOMImportService.purge_staged_rows(
+            job.tenant_id, job.version, job.checkpoint["max_existing_id"], staged_at
+        )
+
+    @staticmethod
+    async def _dispatch_or_fail(job: BOMImportJob) -> None:
+        """
+        发送执行事件；发送失败时将任务标记为失败（可重试），避免任务永久停留在待执行状态
+
+        Raises:
+            BusinessLogicError: 事件发送失败时抛出
+        """
+        try:
+            await BOMImportService._dispatch_job(job)
+        except Exception as e:
+            logger.error(f"BOM导入任务 {job.uuid} 调度失败: {e}")
+            job.status = "failed"
+            job.error_message = f"任务调度失败: {e}"
+            await job.save(update_fields=["status", "error_message", "updated_at"])
+            raise BusinessLogicError("BOM导入任务调度失败，请稍后重试") from e
+
+    @staticmethod
+    async def _dispatch_job(job: BOMImportJob) -> None:
+        """发送导入任务执行事件"""
+        from core.inngest.client import inngest_client
+        from inngest import Event
+
+        await inngest_client.send(
+            Event(
+                name="bom/import-job",
+                data={
+                    "tenant_id": job.tenant_id,
+                    "job_uuid": str(job.uuid),
+                },
+            )
+        )
+
+    @staticmethod
+    async def _validate_file(
+        tenant_id: int,
+        job: BOMImportJob,
+        full_path: str,
+        file_format: str
+    ) -> Tuple[Dict[str, int], Set[int], int, List[Dict[str, Any]]]:
+        """
+        流式校验导入文件
+
+        Returns:
+            Tuple: (编码映射, 父件ID集合, 数据行数, 错误列表)
+        """
+        errors: List[Dict[str, Any]] = []
+        pairs: List[Tuple[int, str, str]] = []
+        codes: Set[str] = set()
+        total_rows = 0
+        async for chunk in BOMImportService._aiter_chunks(full_path, file_format):
+            for item in chunk:
+                total_rows += 1
+                if item.get("error"):
+                    errors.append({"row": item["row"], "error": item["error"]})
+                    continue
+                pairs.append((item["row"], item["parent_code"], item["component_code"]))
+                codes.add(item["parent_code"])
+                codes.add(item["component_code"])
+
+        if total_rows == 0:
+            errors.append({"row": 0, "error": "导入文件没有数据行"})
+            return {}, set(), 0, errors
+
+        code_map = await BOMImportService.resolve_material_codes(tenant_id, codes)
+        for code in sorted(codes - set(code_map.keys())):
+            errors.append({"row": None, "error": f"编码不存在：{code}，请先创建物料"})
+
+        edges: Set[Tuple[int, int]] = set()
+        parent_ids: Set[int] = set()
+        for row, parent_code, component_code in pairs:
+            parent_id = code_map.get(parent_code)
+            component_id = code_map.get(component_code)
+            if parent_id is None or component_id is None:
+                continue
+            if parent_id == component_id:
+                errors.append({"row": row, "error": f"父件 {parent_code} 与子件 {component_code} 不能相同"})
+                continue
+            if (parent_id, component_id) in edges:
+                errors.append({"row": row, "error": f"父件 {parent_code} 下，子件 {component_code} 重复"})
+                continue
+            edges.add((parent_id, component_id))
+            parent_ids.add(parent_id)
+
+        if errors:
+            return code_map, parent_ids, total_rows, errors
+
+        try:
+            if job.phase == "validate":
+                await BOMImportService.check_approved_versions(tenant_id, parent_ids, job.version)
+            await BOMImportService.check_cycles(
+                tenant_id,
+                edges,
+                parent_ids,
+                {material_id: code for code, material_id in code_map.items()},
+            )
+        except ValidationError as e:
+            errors.append({"row": None, "error": str(e)})
+        return code_map, parent_ids, total_rows, errors
+
+    @staticmethod
+    def _build_bom_row(
+        tenant_id: int,
+        job: BOMImportJob,
+        item: Dict[str, Any],
+        code_map: Dict[str, int],
+        bom_codes: Dict[int, str],
+        staged_at: Optional[datetime] = None
+    ) -> BOM:
+        """根据解析后的文件行构造BOM对象（未保存，staged_at 非空时作为暂存行）"""
+        parent_id = code_map[item["parent_code"]]
+        component_id = code_map[item["component_code"]]
+        return BOM(
+            tenant_id=tenant_id,
+            material_id=parent_id,
+            component_id=component_id,
+            quantity=item["quantity"],
+            unit=item["unit"],
+            waste_rate=item["waste_rate"],
+            is_required=item["is_required"],
+            level=1,
+            path=f"{parent_id}/{component_id}",
+            version=job.version,
+            bom_code=bom_codes.get(parent_id),
+            effective_date=job.effective_date,
+            description=job.description,
+            remark=item["remark"],
+            is_active=True,
+            deleted_at=staged_at,
+        )
+
+    @staticmethod
+    def _staged_at(job: BOMImportJob) -> Optional[datetime]:
+        """任务暂存标记（旧断点中没有该字段时返回 None，即直接写入可见行）"""
+        staged_at = (job.checkpoint or {}).get("staged_at")
+        return datetime.fromisoformat(staged_at) if staged_at else None
+
+    @staticmethod
+    def _detect_file_format(file_name: str) -> str:
+        """根据文件扩展名识别导入格式"""
+        extension = os.path.splitext(file_name or "")[1].lower()
+        if extension == ".csv":
+            return "csv"
+        if extension in (".xlsx", ".xlsm"):
+            return "xlsx"
+        raise ValidationError(f"不支持的BOM导入文件格式：{extension or file_name}，请使用 CSV 或 xlsx")
+
+    @staticmethod
+    async def _aiter_chunks(
+        full_path: str,
+        file_format: str,
+        start_row: int = 0
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        """在线程中分块读取并解析导入文件（csv/openpyxl 解析不阻塞事件循环）"""
+        chunks = BOMImportService._iter_chunks(full_path, file_format, start_row=start_row)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            chunks.close()
+
+    @staticmethod
+    def _iter_chunks(
+        full_path: str,
+        file_format: str,
+        start_row: int = 0
+    ) -> Iterator[List[Dict[str, Any]]]:
+        """
+        分块流式读取导入文件（跳过前 start_row 个数据行）
+
+        Yields:
+            List[Dict[str, Any]]: 每块最多 CHUNK_SIZE 个解析后的数据行
+        """
+        if not os.path.exists(full_path):
+            raise NotFoundError("导入文件不存在")
+
+        chunk: List[Dict[str, Any]] = []
+        for index, (row_number, raw) in enumerate(BOMImportService._iter_raw_rows(full_path, file_format)):
+            if index < start_row:
+                continue
+            chunk.append(BOMImportService._parse_row(row_number, raw))
+            if len(chunk) >= CHUNK_SIZE:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _iter_raw_rows(full_path: str, file_format: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """逐行读取文件，按表头映射为字段字典（跳过空行）"""
+        if file_format == "csv":
+            with open(full_path, "r", encoding="utf-8-sig", newline="") as f:
+                reader = csv.reader(f)
+                header = next(reader, None)
+                if header is None:
+                    return
+                columns = BOMImportService._map_columns(header)
+                for row_number, values in enumerate(reader, start=2):
+                    if not any((v or "").strip() for v in values):
+                        continue
+                    yield row_number, {
+                        field: values[idx] if idx < len(values) else None
+                        for field, idx in columns.items()
+                    }
+        else:
+            from openpyxl import load_workbook
+
+            workbook = load_workbook(full_path, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = next(rows, None)
+                if header is None:
+                    return
+                columns = BOMImportService._map_columns(header)
+                for row_number, values in enumerate(rows, start=2):
+                    if not any(v not in (None, "") for v in values):
+                        continue
+                    yield row_number, {
+                        field: values[idx] if idx < len(values) else None
+                        for field, idx in columns.items()
+                    }
+            finally:
+                workbook.close()
+
+    @staticmethod
+    def _map_columns(header: Iterable[Any]) -> Dict[str, int]:
+        """表头映射：字段名 -> 列序号"""
+        normalized = [str(h).strip().lower() if h is not None else "" for h in header]
+        columns: Dict[str, int] = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            for alias in aliases:
+                if alias.lower() in normalized:
+                    columns[field] = normalized.index(alias.lower())
+                    break
+        missing = [f for f in ("parent_code", "component_code", "quantity") if f not in columns]
+        if missing:
+            raise ValidationError(f"导入文件缺少必填列：{', '.join(missing)}")
+        return columns
+
+    @staticmethod
+    def _parse_row(row_number: int, raw: Dict[str, Any]) -> Dict[str, Any]:
+        """解析并校验单行数据，错误记录在 error 字段"""
+        parent_code = str(raw.get("parent_code") or "").strip()
+        component_code = str(raw.get("component_code") or "").strip()
+        item: Dict[str, Any] = {
+            "row": row_number,
+            "parent_code": parent_code,
+            "component_code": component_code,
+        }
+        if not parent_code or not component_code:
+            item["error"] = "父件编码和子件编码不能为空"
+            return item
+
+        try:
+            quantity = Decimal(str(raw.get("quantity")).strip())
+            waste_text = str(raw.get("waste_rate") or "0").strip().rstrip("%") or "0"
+            waste_rate = Decimal(waste_text)
+        except (InvalidOperation, ValueError):
+            item["error"] = "数量或损耗率不是有效数字"
+            return item
+        if quantity <= 0:
+            item["error"] = "子件数量必须大于0"
+            return item
+        if waste_rate < 0 or waste_rate > 100:
+            item["error"] = "损耗率必须在0-100之间"
+            return item
+
+        is_required = raw.get("is_required")
+        item.update({
+            "quantity": quantity,
+            "waste_rate": waste_rate,
+            "unit": (str(raw.get("unit")).strip() or None) if raw.get("unit") is not None else None,
+            "is_required": str(is_required).strip().lower() not in FALSE_VALUES if is_required not in (None, "") else True,
+            "remark": (str(raw.get("remark")).strip() or None) if raw.get("remark") is not None else None,
+        })
+        return item
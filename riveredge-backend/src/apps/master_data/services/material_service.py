@@ -10,6 +10,7 @@ import asyncio
 import json
 
 from tortoise.models import Q
+from tortoise.transactions import in_transaction
 from apps.master_data.models.material import MaterialGroup, Material, BOM
 from apps.master_data.models.material_code_alias import MaterialCodeAlias
 from apps.master_data.services.material_code_service import MaterialCodeService
@@ -65,6 +66,17 @@ def _material_to_response_data(material) -> Dict[str, Any]:
     }
 
 
+async def _invalidate_standard_cost(tenant_id: int, material_ids) -> None:
+    """
+    标记物料及其上层物料的标准成本卷积结果为过期（失败只记录日志，不影响主数据操作）
+    """
+    try:
+        from apps.kuaizhizao.services.standard_cost_rollup_service import StandardCostRollupService
+        await StandardCostRollupService().mark_stale(tenant_id=tenant_id, material_ids=material_ids)
+    except Exception as e:
+        logger.warning(f"标记标准成本过期失败: {e}")
+
+
 if TYPE_CHECKING:
     from apps.master_data.schemas.material_schemas import (
         MaterialGroupTreeResponse,
@@ -1222,6 +1234,9 @@ class MaterialService:
         resp_data["code_aliases"] = [MaterialCodeAliasResponse.model_validate(a) for a in aliases]
         response = MaterialResponse.model_validate(resp_data)
 
+        # 价格、来源类型、工艺路线变化影响本物料及上层物料标准成本
+        await _invalidate_standard_cost(tenant_id, [material.id])
+
         # 发送 Inngest 事件，触发物料变更通知工作流（下游单据提示）
         try:
             from core.inngest.client import inngest_client
@@ -1351,6 +1366,8 @@ class MaterialService:
         payload["path"] = f"{data.material_id}/{data.component_id}"
         
         bom = await BOM.create(tenant_id=tenant_id, **payload)
+        if bom.approval_status == "approved":
+            await _invalidate_standard_cost(tenant_id, [bom.material_id])
         return BOMResponse.model_validate(bom)
     
     @staticmethod
@@ -1398,15 +1415,13 @@ class MaterialService:
         if data.material_id in component_ids:
             raise ValidationError("主物料和子物料不能相同")
         
-        # 循环依赖检测（PLM 最佳实践：禁止成环）
-        for item in data.items:
-            has_cycle = await MaterialService.detect_bom_cycle(
-                tenant_id, data.material_id, item.component_id
-            )
-            if has_cycle:
-                raise ValidationError(
-                    f"添加子物料 {item.component_id} 将导致 BOM 循环依赖，请检查层级关系"
-                )
+        # 循环依赖检测（PLM 最佳实践：禁止成环）：所有新增子件与现有结构合并后一次图遍历
+        from apps.master_data.services.bom_import_service import BOMImportService
+        await BOMImportService.check_cycles(
+            tenant_id,
+            [(data.material_id, component_id) for component_id in component_ids],
+            replaced_parent_ids=set(),
+        )
         
         # 获取主物料信息（用于编码生成上下文）
         material = await Material.filter(
@@ -1450,7 +1465,7 @@ class MaterialService:
         # 批量创建BOM（PLM 层级：根主料 level 0，直接子件 level 1；path 为 父/子 路径）
         bom_list = []
         for item in data.items:
-            bom = await BOM.create(
+            bom = BOM(
                 tenant_id=tenant_id,
                 material_id=data.material_id,
                 component_id=item.component_id,
@@ -1473,6 +1488,16 @@ class MaterialService:
                 is_active=data.is_active,
             )
             bom_list.append(bom)
+        await BOMImportService.bulk_insert_bom_rows(bom_list)
+        
+        # bulk_create 不回填主键，按客户端生成的 uuid 重新查询
+        bom_list = await BOM.filter(
+            tenant_id=tenant_id,
+            uuid__in=[bom.uuid for bom in bom_list]
+        ).order_by("id")
+        
+        if data.approval_status == "approved":
+            await _invalidate_standard_cost(tenant_id, [data.material_id])
         
         return [BOMResponse.model_validate(bom) for bom in bom_list]
     
@@ -1744,6 +1769,7 @@ class MaterialService:
         bom.approval_comment = approval_comment
         
         await bom.save()
+        await _invalidate_standard_cost(tenant_id, [bom.material_id])
         
         return BOMResponse.model_validate(bom)
     
@@ -1841,6 +1867,12 @@ class MaterialService:
                id__in=list(target_ids)
             ).update(**update_data)
             
+            # 审核/反审核改变生效BOM，上层物料标准成本随之失效
+            affected_material_ids = await BOM.filter(
+                id__in=list(target_ids)
+            ).distinct().values_list("material_id", flat=True)
+            await _invalidate_standard_cost(tenant_id, affected_material_ids)
+            
             # Re-fetch updated records to return
             # 只返回最初请求的BOM
             result = await BOM.filter(
@@ -2202,36 +2234,24 @@ class MaterialService:
             ValidationError: 当编码不存在、循环依赖、重复子件等时抛出
         """
         from collections import defaultdict
+        from apps.master_data.services.bom_import_service import BOMImportService
         
-        # 步骤1：编码映射 - 将部门编码映射到物料ID
-        code_to_material = {}  # 编码 -> 物料ID的映射
-        material_id_to_code = {}  # 物料ID -> 编码的映射（用于错误提示）
-        
-        # 收集所有需要查询的编码
+        # 步骤1：编码映射 - 一次批量查询将主编码/部门编码映射到物料ID
         all_codes = set()
         for item in data.items:
             all_codes.add(item.parent_code)
             all_codes.add(item.component_code)
         
-        # 批量查询物料（通过主编码和部门编码）
+        code_to_material = await BOMImportService.resolve_material_codes(tenant_id, all_codes)
         for code in all_codes:
-            material = await MaterialCodeService.get_material_by_code(
-                tenant_id=tenant_id,
-                code=code
-            )
-            if not material:
+            if code not in code_to_material:
                 raise ValidationError(f"编码不存在：{code}，请先创建物料")
-            code_to_material[code] = material.id
-            material_id_to_code[material.id] = code
-        
-        # 步骤2：数据完整性验证
-        # 验证父件编码是否存在（已在步骤1完成）
-        # 验证子件编码是否存在（已在步骤1完成）
-        # 验证子件数量是否大于0（已在Schema验证）
-        # 验证损耗率（已在Schema验证）
+        material_id_to_code = {material_id: code for code, material_id in code_to_material.items()}
         
+        # 步骤2：数据完整性验证（数量、损耗率已在Schema验证）
         # 步骤3：检测重复子件（同一父件下，子件编码不能重复）
-        parent_component_map = defaultdict(set)  # 父件ID -> 子件编码集合
+        parent_component_map = defaultdict(set)  # 父件ID -> 子件ID集合
+        edges = []
         for item in data.items:
             parent_id = code_to_material[item.parent_code]
             component_id = code_to_material[item.component_code]
@@ -2240,204 +2260,63 @@ class MaterialService:
                     f"父件 {item.parent_code} 下，子件 {item.component_code} 重复"
                 )
             parent_component_map[parent_id].add(component_id)
+            edges.append((parent_id, component_id))
         
-        # 步骤4：检测循环依赖
-        # 构建物料依赖图
-        dependency_graph = defaultdict(set)  # 物料ID -> 依赖的物料ID集合
-        for item in data.items:
-            parent_id = code_to_material[item.parent_code]
-            component_id = code_to_material[item.component_code]
-            dependency_graph[parent_id].add(component_id)
+        # 步骤4：检测循环依赖（导入结构 + 其他父件现有结构，单次图遍历）
+        parent_ids = set(parent_component_map.keys())
+        await BOMImportService.check_cycles(tenant_id, edges, parent_ids, material_id_to_code)
         
-        # 检测循环依赖（使用DFS）
-        def has_cycle(node: int, visited: set, rec_stack: set) -> bool:
-            """检测从node开始的路径是否有循环"""
-            visited.add(node)
-            rec_stack.add(node)
-            
-            for neighbor in dependency_graph.get(node, set()):
-                if neighbor not in visited:
-                    if has_cycle(neighbor, visited, rec_stack):
-                        return True
-                elif neighbor in rec_stack:
-                    # 找到循环
-                    return True
-            
-            rec_stack.remove(node)
-            return False
-        
-        # 检查所有节点是否有循环
-        all_nodes = set(dependency_graph.keys()) | set(
-            component_id for components in dependency_graph.values() for component_id in components
-        )
-        visited = set()
-        for node in all_nodes:
-            if node not in visited:
-                if has_cycle(node, visited, set()):
-                    # 找到循环，构建循环路径用于提示
-                    cycle_path = []
-                    rec_stack = set()
-                    def find_cycle_path(node: int, path: list):
-                        if node in rec_stack:
-                            # 找到循环起点
-                            cycle_start = path.index(node)
-                            cycle_path.extend(path[cycle_start:] + [node])
-                            return True
-                        rec_stack.add(node)
-                        path.append(node)
-                        for neighbor in dependency_graph.get(node, set()):
-                            if find_cycle_path(neighbor, path):
-                                return True
-                        path.pop()
-                        rec_stack.remove(node)
-                        return False
-                    find_cycle_path(node, [])
-                    cycle_codes = [material_id_to_code.get(nid, str(nid)) for nid in cycle_path]
-                    raise ValidationError(
-                        f"检测到循环依赖：{' -> '.join(cycle_codes)}，请检查BOM配置"
-                    )
-        
-        # 步骤5：生成BOM层级结构
-        # 构建父件到子件的映射（用于计算层级）
-        parent_to_children = defaultdict(list)
-        for item in data.items:
-            parent_id = code_to_material[item.parent_code]
-            component_id = code_to_material[item.component_code]
-            parent_to_children[parent_id].append((component_id, item))
-        
-        # 计算层级和路径
-        def calculate_level_and_path(
-            material_id: int,
-            current_level: int = 0,
-            current_path: str = ""
-        ) -> tuple:
-            """递归计算层级和路径"""
-            if current_path:
-                new_path = f"{current_path}/{material_id}"
-            else:
-                new_path = str(material_id)
-            
-            return current_level, new_path
-        
-        # 步骤5.5：校验已审核版本不可直接修改
+        # 步骤5：校验已审核版本不可直接修改
         target_version = data.version or "1.0"
-        parent_ids = set(code_to_material[item.parent_code] for item in data.items)
-        for pid in parent_ids:
-            approved_exists = await BOM.filter(
-                tenant_id=tenant_id,
-                material_id=pid,
-                version=target_version,
-                approval_status="approved",
-                deleted_at__isnull=True,
-            ).exists()
-            if approved_exists:
-                raise ValidationError(
-                    f"版本 {target_version} 已审核通过，禁止直接修改。请先升版或使用「另存为新版本」。"
-                )
+        await BOMImportService.check_approved_versions(tenant_id, parent_ids, target_version)
         
-        # 步骤6：创建BOM数据 (Refactored: Clean Replace & Auto-Numbering)
-        from tortoise import timezone
-        from datetime import datetime
+        # 步骤6：创建BOM数据（Clean Replace：先批量写入新结构，再软删除该版本原有行）
+        bom_codes = await BOMImportService.resolve_bom_codes(
+            tenant_id, parent_ids, target_version, data.bom_code
+        )
         
         bom_list = []
-        # 按父件ID分组处理
-        parent_items_map = defaultdict(list)
         for item in data.items:
             parent_id = code_to_material[item.parent_code]
-            parent_items_map[parent_id].append(item)
-            
-        for parent_id, items in parent_items_map.items():
-            # 1. 目标版本已在步骤5.5确定
-            # 2. 确定 BOM 编码 (Auto-Numbering)
-            # 优先使用现有同版本的编码，或者请求中指定的编码
-            bom_code = data.bom_code
+            component_id = code_to_material[item.component_code]
             
-            # 如果请求未指定，尝试查找该父件该版本的现有编码
-            if not bom_code:
-                existing_version_bom = await BOM.filter(
-                    tenant_id=tenant_id,
-                    material_id=parent_id,
-                    version=target_version,
-                    deleted_at__isnull=True
-                ).first()
-                if existing_version_bom:
-                    bom_code = existing_version_bom.bom_code
+            # 检查主物料和子物料不能相同
+            if parent_id == component_id:
+                continue
             
-            # 如果当前版本没有（如新版本），尝试查找该父件的其他版本以继承 BOM 编码
-            # 根据模型定义：同一主物料的不同版本使用相同编码
-            if not bom_code:
-                any_existing_bom = await BOM.filter(
-                    tenant_id=tenant_id,
-                    material_id=parent_id,
-                    deleted_at__isnull=True
-                ).first()
-                if any_existing_bom:
-                    bom_code = any_existing_bom.bom_code
-
-            # 如果仍无编码，生成新编码
-            if not bom_code:
-                try:
-                    parent_material = await Material.get(id=parent_id)
-                    context = {
-                        "date": datetime.now().strftime("%Y%m%d"),
-                        "material_code": parent_material.main_code,
-                        "version": target_version
-                    }
-                    bom_code = await CodeGenerationService.generate_code(
-                        tenant_id=tenant_id,
-                        rule_code="ENGINEERING_BOM_CODE",
-                        context=context
-                    )
-                except Exception as e:
-                    # 降级方案：使用时间戳
-                    logger.warning(f"BOM编码生成失败，使用降级方案: {e}")
-                    # 重新获父物料信息（如果上面try块失败）
-                    parent_material = await Material.get(id=parent_id)
-                    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-                    bom_code = f"BOM-{parent_material.main_code}-{timestamp}"
-
-            # 3. 全量替换 (Clean Replace)
-            # 软删除当前父件+当前版本的所有现有BOM行
-            # 注意：这会删除旧的结构，用新的结构完全替代
-            await BOM.filter(
+            bom_list.append(BOM(
                 tenant_id=tenant_id,
                 material_id=parent_id,
+                component_id=component_id,
+                quantity=item.quantity,
+                unit=item.unit,
+                waste_rate=item.waste_rate or Decimal("0.00"),
+                is_required=item.is_required if item.is_required is not None else True,
+                level=1,
+                path=f"{parent_id}/{component_id}",
                 version=target_version,
-                deleted_at__isnull=True
-            ).update(deleted_at=timezone.now())
-
-            # 4. 创建新条目
-            for item in items:
-                component_id = code_to_material[item.component_code]
-                
-                # 检查主物料和子物料不能相同
-                if parent_id == component_id:
-                     # 理论上前面检查过了，这里双重保险或忽略
-                    continue
-
-                level = 1
-                path = f"{parent_id}/{component_id}"
-
-                bom = await BOM.create(
-                    tenant_id=tenant_id,
-                    material_id=parent_id,
-                    component_id=component_id,
-                    quantity=item.quantity,
-                    unit=item.unit,
-                    waste_rate=item.waste_rate or Decimal("0.00"),
-                    is_required=item.is_required if item.is_required is not None else True,
-                    level=level,
-                    path=path,
-                    version=target_version,
-                    bom_code=bom_code,
-                    effective_date=data.effective_date,
-                    description=data.description,
-                    remark=item.remark,
-                    is_active=True,
-                )
-                bom_list.append(bom)
+                bom_code=bom_codes.get(parent_id),
+                effective_date=data.effective_date,
+                description=data.description,
+                remark=item.remark,
+                is_active=True,
+            ))
+        
+        async with in_transaction("default"):
+            max_existing_id = await BOMImportService.get_max_bom_id(tenant_id)
+            await BOMImportService.bulk_insert_bom_rows(bom_list)
+            await BOMImportService.replace_previous_rows(
+                tenant_id, parent_ids, target_version, max_existing_id
+            )
+        
+        # bulk_create 不回填主键，按客户端生成的 uuid 重新查询
+        bom_list = await BOM.filter(
+            tenant_id=tenant_id,
+            uuid__in=[bom.uuid for bom in bom_list]
+        ).order_by("id")
         
         logger.info(f"批量导入BOM成功 (Clean Replace)，共创建 {len(bom_list)} 条BOM记录")
+        await _invalidate_standard_cost(tenant_id, {bom.material_id for bom in bom_list})
         
         return [BOMResponse.model_validate(bom) for bom in bom_list]
     
@@ -19,6 +19,22 @@ from apps.master_data.schemas.process_schemas import (
     SOPCreate, SOPUpdate, SOPResponse
 )
 from infra.exceptions.exceptions import NotFoundError, ValidationError
+from loguru import logger
+
+
+async def _invalidate_standard_cost(tenant_id: int, process_route_ids: Optional[List[int]] = None, material_ids: Optional[List[int]] = None) -> None:
+    """
+    工艺路线或物料绑定变化时，标记相关物料及其上层物料的标准成本卷积结果为过期（失败只记录日志）
+    """
+    try:
+        from apps.kuaizhizao.services.standard_cost_rollup_service import StandardCostRollupService
+        service = StandardCostRollupService()
+        if process_route_ids:
+            await service.mark_routes_stale(tenant_id=tenant_id, process_route_ids=process_route_ids)
+        if material_ids:
+            await service.mark_stale(tenant_id=tenant_id, material_ids=material_ids)
+    except Exception as e:
+        logger.warning(f"标记标准成本过期失败: {e}")
 
 
 async def _resolve_default_operator_uuids(tenant_id: int, default_operator_uuids: Optional[List[str]]) -> List[int]:
@@ -887,6 +903,9 @@ class ProcessService:
                 raise ValidationError(f"工艺路线编码 {data.code or process_route.code} 已存在（可能已被软删除，请检查）")
             raise
         
+        # 工序、工时、启用状态变化影响使用该工艺路线的物料标准成本
+        await _invalidate_standard_cost(tenant_id, process_route_ids=[process_route.id])
+        
         return await ProcessService._to_process_route_response(process_route)
     
     @staticmethod
@@ -917,6 +936,7 @@ class ProcessService:
         from tortoise import timezone
         process_route.deleted_at = timezone.now()
         await process_route.save()
+        await _invalidate_standard_cost(tenant_id, process_route_ids=[process_route.id])
     
     # ==================== 级联查询相关方法 ====================
     
@@ -1913,6 +1933,7 @@ class ProcessService:
         # 绑定工艺路线到物料
         material.process_route_id = process_route.id
         await material.save()
+        await _invalidate_standard_cost(tenant_id, material_ids=[material.id])
     
     @staticmethod
     async def unbind_material(
@@ -1944,6 +1965,7 @@ class ProcessService:
         # 解绑工艺路线
         material.process_route_id = None
         await material.save()
+        await _invalidate_standard_cost(tenant_id, material_ids=[material.id])
     
     @staticmethod
     async def get_process_route_for_material(
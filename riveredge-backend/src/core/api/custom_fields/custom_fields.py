@@ -15,6 +15,7 @@ from core.schemas.custom_field import (
     CustomFieldValueRequest,
     CustomFieldValueResponse,
     BatchSetFieldValuesRequest,
+    BulkFieldValuesRequest,
     CustomFieldPageConfigResponse,
 )
 from core.services.business.custom_field_service import CustomFieldService
@@ -264,6 +265,30 @@ async def batch_set_field_values(
     return result
 
 
+@router.post("/values/bulk", response_model=Dict[int, Dict[str, Any]])
+async def get_field_values_bulk(
+    data: BulkFieldValuesRequest,
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    批量获取记录的自定义字段值
+    
+    列表页一次获取当前页所有记录的自定义字段值（按记录聚合）。
+    
+    Args:
+        data: 批量获取字段值请求数据
+        tenant_id: 当前组织ID（依赖注入）
+        
+    Returns:
+        Dict[int, Dict[str, Any]]: 记录ID -> 字段值字典（key 为字段代码，value 为字段值）
+    """
+    return await CustomFieldService.get_field_values_bulk(
+        tenant_id=tenant_id,
+        record_table=data.record_table,
+        record_ids=data.record_ids
+    )
+
+
 @router.get("/values/{record_table}/{record_id}", response_model=Dict[str, Any])
 async def get_field_values(
     record_table: str,
@@ -6,7 +6,7 @@ API 依赖模块
 """
 
 from typing import Optional
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, Request, status, Header
 
 # 复用 soil 模块的依赖函数
 from infra.api.deps.deps import (
@@ -15,17 +15,18 @@ from infra.api.deps.deps import (
 )
 from infra.models.user import User
 from infra.domain.tenant_context import get_current_tenant_id as get_tenant_id_from_context, set_current_tenant_id
-from infra.domain.security.infra_superadmin_security import get_infra_superadmin_token_payload
+from infra.domain.auth_context import get_request_auth_context, hash_token, verify_token_cached
 
 
-async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), request: Request = None) -> User:
     """
     获取当前登录用户
 
-    复用 soil 模块的 get_current_user 函数。
+    复用 soil 模块的 get_current_user 函数（同一请求内复用认证上下文）。
 
     Args:
         token: JWT Token（从请求头 Authorization: Bearer <token> 中提取）
+        request: 当前请求（由 FastAPI 注入）
 
     Returns:
         User: 当前用户对象
@@ -33,12 +34,13 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> User:
     Raises:
         HTTPException: 当认证失败时抛出
     """
-    return await soil_get_current_user(token)
+    return await soil_get_current_user(token, request)
 
 
 async def get_current_tenant(
     x_tenant_id: Optional[str] = Header(None, alias="X-Tenant-ID"),
-    token: Optional[str] = Depends(oauth2_scheme)
+    token: Optional[str] = Depends(oauth2_scheme),
+    request: Request = None,
 ) -> int:
     """
     获取当前组织ID
@@ -49,6 +51,7 @@ async def get_current_tenant(
     Args:
         x_tenant_id: 从请求头获取的组织ID
         token: JWT Token（用于检查是否为平台超级管理员）
+        request: 当前请求（由 FastAPI 注入，已认证时复用认证上下文，不再重复验证 Token）
     
     Returns:
         int: 当前组织ID
@@ -58,10 +61,13 @@ async def get_current_tenant(
     """
     # ⚠️ 关键修复：检查是否为平台超级管理员 Token
     is_infra_superadmin = False
+    context = get_request_auth_context(request)
     if token:
-        infra_superadmin_payload = get_infra_superadmin_token_payload(token)
-        if infra_superadmin_payload:
-            is_infra_superadmin = True
+        if context is not None and context.token.token_hash == hash_token(token):
+            is_infra_superadmin = context.is_infra_superadmin
+        else:
+            verified = verify_token_cached(token)
+            is_infra_superadmin = verified is not None and verified.is_infra_superadmin
     
     tenant_id = None
 
@@ -95,6 +101,8 @@ async def get_current_tenant(
 
     # 设置到上下文（确保后续操作都能获取到）
     set_current_tenant_id(tenant_id)
+    if context is not None:
+        context.tenant_id = tenant_id
     
     return tenant_id
 
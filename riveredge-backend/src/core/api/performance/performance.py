@@ -12,6 +12,8 @@ from typing import Optional
 from loguru import logger
 
 from core.middleware.performance_middleware import PerformanceMiddleware
+from core.services.authorization.access_control_service import AccessControlService
+from core.services.websocket.websocket_service import WebSocketService
 from infra.infrastructure.cache.cache_manager import cache_manager
 from infra.api.deps.deps import get_current_user
 from core.api.deps.deps import get_current_tenant
@@ -30,17 +32,21 @@ async def get_performance_stats(
     """
     获取性能统计信息
     
-    返回所有API的性能统计信息，包括响应时间、调用次数等。
+    返回所有API的性能统计信息，包括响应时间、调用次数等，以及访问控制判定耗时与WebSocket推送统计（本进程）。
     """
     try:
         stats = PerformanceMiddleware.get_stats()
         slow_apis = PerformanceMiddleware.get_slow_apis(limit=limit)
         cache_stats = cache_manager.get_stats()
+        access_decision_stats = AccessControlService.get_decision_stats()
+        websocket_stats = WebSocketService.get_stats()
         
         return {
             "api_stats": stats,
             "slow_apis": slow_apis,
             "cache_stats": cache_stats,
+            "access_decision_stats": access_decision_stats,
+            "websocket_stats": websocket_stats,
         }
     except Exception as e:
         logger.error(f"获取性能统计信息失败: {e}")
@@ -82,6 +88,8 @@ async def reset_performance_stats(
     """
     try:
         PerformanceMiddleware.reset_stats()
+        AccessControlService.reset_decision_stats()
+        WebSocketService.reset_stats()
         return {
             "success": True,
             "message": "性能统计已重置",
@@ -9,7 +9,7 @@ Date: 2025-01-15
 
 from typing import List, Optional
 from fastapi import APIRouter, Depends, Query, Path, status
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from loguru import logger
 
 from core.api.deps import get_current_user, get_current_tenant
@@ -135,21 +135,36 @@ async def delete_report_template(
 async def generate_report(
     template_id: int = Path(..., description="模板ID"),
     format: str = Query("excel", description="输出格式（excel/pdf）"),
+    async_mode: Optional[bool] = Query(None, description="是否后台渲染（不传则按数据量自动判断）"),
     current_user: User = Depends(get_current_user),
     tenant_id: int = Depends(get_current_tenant),
 ):
     """
     生成报表文件
 
+    大报表转为后台渲染，返回 202 与任务轮询地址；渲染完成后通过文件管理下载。
+
     - **template_id**: 模板ID
     - **format**: 输出格式（excel/pdf）
+    - **async_mode**: 是否后台渲染
     """
-    file_content = await report_template_service.generate_report(
+    result = await report_template_service.render_report(
         tenant_id=tenant_id,
         template_id=template_id,
         format=format,
+        async_mode=async_mode,
     )
 
+    if "job" in result:
+        job = result["job"]
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={
+                **job,
+                "poll_url": f"/api/v1/core/reports/templates/render-jobs/{job['job_id']}",
+            },
+        )
+
     # 确定文件扩展名和MIME类型
     if format == "excel":
         filename = "report.xlsx"
@@ -159,8 +174,24 @@ async def generate_report(
         media_type = "application/pdf"
 
     return StreamingResponse(
-        iter([file_content]),
+        iter([result["content"]]),
         media_type=media_type,
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
 
+
+@router.get("/render-jobs/{job_id}", summary="查询报表渲染任务")
+async def get_render_job(
+    job_id: str = Path(..., description="渲染任务ID"),
+    current_user: User = Depends(get_current_user),
+    tenant_id: int = Depends(get_current_tenant),
+):
+    """
+    查询报表后台渲染任务状态
+
+    任务完成后返回 file_uuid 与 download_url。
+
+    - **job_id**: 渲染任务ID
+    """
+    return await report_template_service.get_render_job(tenant_id=tenant_id, job_id=job_id)
+
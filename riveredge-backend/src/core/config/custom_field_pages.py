@@ -390,3 +390,37 @@ CUSTOM_FIELD_PAGES: List[CustomFieldPageConfig] = [
         "module_icon": "tool",
     },
 ]
+
+# 主数据页面的逻辑表名（table_name）与物理表的对应关系；快格轻制造页面的逻辑表名即物理表名
+_MASTER_DATA_PHYSICAL_TABLES: Dict[str, str] = {
+    "master_data_factory_plants": "apps_master_data_plants",
+    "master_data_factory_workshops": "apps_master_data_workshops",
+    "master_data_factory_production_lines": "apps_master_data_production_lines",
+    "master_data_factory_workstations": "apps_master_data_workstations",
+    "master_data_factory_work_centers": "apps_master_data_work_centers",
+    "master_data_warehouse_warehouses": "apps_master_data_warehouses",
+    "master_data_warehouse_storage_areas": "apps_master_data_storage_areas",
+    "master_data_warehouse_storage_locations": "apps_master_data_storage_locations",
+    "master_data_material_groups": "apps_master_data_material_groups",
+    "master_data_materials": "apps_master_data_materials",
+    "master_data_boms": "apps_master_data_bom",
+    "master_data_defect_types": "apps_master_data_defect_types",
+    "master_data_operations": "apps_master_data_operations",
+    "master_data_process_routes": "apps_master_data_process_routes",
+    "master_data_sops": "apps_master_data_sop",
+    "master_data_customers": "apps_master_data_customers",
+    "master_data_suppliers": "apps_master_data_suppliers",
+    "master_data_holidays": "apps_master_data_holidays",
+    "master_data_skills": "apps_master_data_skills",
+}
+
+# 自定义字段值投影到业务主表 custom_fields 列的表（逻辑表名 -> 物理表名），
+# 投影同步以本配置为准；添加投影列的迁移各自固化当时的表清单，新增页面后须新增迁移为其主表添加 custom_fields 列
+CUSTOM_FIELD_PROJECTION_TABLES: Dict[str, str] = {
+    **{
+        page["table_name"]: page["table_name"]
+        for page in CUSTOM_FIELD_PAGES
+        if page["table_name"].startswith("apps_")
+    },
+    **_MASTER_DATA_PHYSICAL_TABLES,
+}
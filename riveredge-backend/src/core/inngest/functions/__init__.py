@@ -20,8 +20,13 @@ except ImportError:
     sop_execution_workflow_function = None
     sop_node_complete_workflow_function = None
     material_change_notification_workflow = None
+    bom_import_job_workflow = None
     data_backup_workflow = None
     data_restore_workflow = None
+    reporting_rollup_scheduler_function = None
+    reporting_rollup_worker_function = None
+    demand_computation_job_workflow = None
+    standard_cost_rollup_workflow = None
 
 # 只有在inngest可用时才导入函数
 if INNGEST_AVAILABLE:
@@ -78,6 +83,13 @@ if INNGEST_AVAILABLE:
     except ImportError:
         material_change_notification_workflow = None
     
+    try:
+        from apps.master_data.inngest.functions.bom_import_workflow import (
+            bom_import_job_workflow
+        )
+    except ImportError:
+        bom_import_job_workflow = None
+    
     try:
         from apps.kuaizhizao.inngest.functions.exception_detection_workflow import (
             exception_detection_scheduler_function,
@@ -107,6 +119,29 @@ if INNGEST_AVAILABLE:
         maintenance_reminder_scheduler_function = None
         maintenance_reminder_checker_function = None
     
+    try:
+        from apps.kuaizhizao.inngest.functions.reporting_rollup_workflow import (
+            reporting_rollup_scheduler_function,
+            reporting_rollup_worker_function
+        )
+    except ImportError:
+        reporting_rollup_scheduler_function = None
+        reporting_rollup_worker_function = None
+    
+    try:
+        from apps.kuaizhizao.inngest.functions.demand_computation_job_workflow import (
+            demand_computation_job_workflow
+        )
+    except ImportError:
+        demand_computation_job_workflow = None
+    
+    try:
+        from apps.kuaizhizao.inngest.functions.standard_cost_rollup_workflow import (
+            standard_cost_rollup_workflow
+        )
+    except ImportError:
+        standard_cost_rollup_workflow = None
+    
     try:
         from core.inngest.functions.backup_functions import (
             data_backup_workflow,
@@ -127,6 +162,7 @@ __all__ = [
     "sop_node_complete_workflow_function",
     "material_ai_suggestion_workflow",
     "material_change_notification_workflow",
+    "bom_import_job_workflow",
     "exception_detection_scheduler_function",
     "exception_detection_worker_function",
     "exception_detection_by_tenant_function",
@@ -134,6 +170,10 @@ __all__ = [
     "exception_process_step_transition_workflow_function",
     "maintenance_reminder_scheduler_function",
     "maintenance_reminder_checker_function",
+    "reporting_rollup_scheduler_function",
+    "reporting_rollup_worker_function",
+    "demand_computation_job_workflow",
+    "standard_cost_rollup_workflow",
     "data_backup_workflow",
     "data_restore_workflow",
 ]
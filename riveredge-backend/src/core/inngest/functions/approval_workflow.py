@@ -13,6 +13,7 @@ from core.inngest.client import inngest_client
 from core.models.approval_instance import ApprovalInstance
 from core.models.approval_process import ApprovalProcess
 from core.services.approval.approval_instance_service import ApprovalInstanceService
+from core.services.approval.approval_graph import get_process_graph
 from infra.exceptions.exceptions import NotFoundError, ValidationError
 from core.utils.inngest_tenant_isolation import with_tenant_isolation
 from infra.domain.tenant_context import get_current_tenant_id
@@ -76,12 +77,8 @@ async def approval_workflow_function(event: Event) -> Dict[str, Any]:
             approval_instance.inngest_run_id = str(inngest_run_id)
             await approval_instance.save()
         
-        # 解析流程节点配置
-        nodes = process.nodes or {}
-        config = process.config or {}
-        
-        # 获取起始节点
-        start_node = _get_start_node(nodes)
+        # 获取起始节点（流程图按版本编译缓存）
+        start_node = get_process_graph(process).start_node()
         if not start_node:
             return {
                 "success": False,
@@ -182,7 +179,7 @@ async def approval_action_workflow_function(event: Event) -> Dict[str, Any]:
             # 需要判断是否有下一个节点，如果有则进入下一个节点
             if approval_instance.status == "approved":
                 # 判断是否有下一个节点
-                next_node = _get_next_node(process.nodes, approval_instance.current_node)
+                next_node = get_process_graph(process).next_node(approval_instance.current_node)
                 
                 if next_node:
                     # 进入下一个节点
@@ -238,65 +235,6 @@ async def approval_action_workflow_function(event: Event) -> Dict[str, Any]:
         }
 
 
-def _get_start_node(nodes: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    获取起始节点
-    
-    Args:
-        nodes: 流程节点配置
-        
-    Returns:
-        Dict[str, Any]: 起始节点配置
-    """
-    if not nodes:
-        return None
-    
-    # 查找类型为 "start" 的节点
-    node_list = nodes.get("nodes", [])
-    for node in node_list:
-        if node.get("type") == "start" or node.get("data", {}).get("type") == "start":
-            return node
-    
-    # 如果没有找到起始节点，返回第一个节点
-    if node_list:
-        return node_list[0]
-    
-    return None
-
-
-def _get_next_node(nodes: Dict[str, Any], current_node_id: str) -> Dict[str, Any]:
-    """
-    获取下一个节点
-    
-    Args:
-        nodes: 流程节点配置
-        current_node_id: 当前节点ID
-        
-    Returns:
-        Dict[str, Any]: 下一个节点配置，如果没有则返回 None
-    """
-    if not nodes or not current_node_id:
-        return None
-    
-    # 查找当前节点的出边
-    edges = nodes.get("edges", [])
-    node_list = nodes.get("nodes", [])
-    
-    # 找到从当前节点出发的边
-    for edge in edges:
-        if edge.get("source") == current_node_id:
-            next_node_id = edge.get("target")
-            # 查找目标节点
-            for node in node_list:
-                if node.get("id") == next_node_id:
-                    # 跳过结束节点
-                    if node.get("type") == "end" or node.get("data", {}).get("type") == "end":
-                        return None
-                    return node
-    
-    return None
-
-
 def _get_node_approver(node: Dict[str, Any], approval_instance: ApprovalInstance) -> int:
     """
     获取节点的审批人
@@ -2,17 +2,38 @@
 定时任务调度器 Inngest 工作流函数
 
 定期检查需要执行的定时任务，并触发任务执行。
+
+每个任务保存下次计划触发时间（next_run_at），调度器按 (is_active, next_run_at) 索引只取到期任务，
+调度开销与到期任务数相关，与任务总数无关。到期任务以 FOR UPDATE SKIP LOCKED 锁定，
+多个调度器实例同时运行时同一任务只会被一个实例处理；同一批任务的执行事件一次批量发送，
+发送成功后才提交新的 next_run_at（至少一次投递）。
+触发时间计算失败的任务记录失败状态与错误信息，并在 SCHEDULED_TASK_ERROR_RETRY_SECONDS 秒后重试，不会停止调度。
 """
 
 from inngest import TriggerCron
-from typing import Dict, Any
-from datetime import datetime, timedelta
+from datetime import timedelta
+from typing import Dict, Any, List
 from loguru import logger
 
+from tortoise import timezone
+from tortoise.transactions import in_transaction
+
 from core.inngest.client import inngest_client
 from core.models.scheduled_task import ScheduledTask
+from core.services.scheduling.task_trigger import due_fires, initial_run_at
+from infra.config.infra_config import infra_settings
 from inngest import Event as InngestEvent
 
+# 每批锁定的到期任务数
+SCHEDULER_BATCH_SIZE = infra_settings.SCHEDULED_TASK_SCHEDULER_BATCH_SIZE
+# 单次调度最多处理的批数（剩余到期任务留给下一次调度）
+SCHEDULER_MAX_BATCHES = infra_settings.SCHEDULED_TASK_SCHEDULER_MAX_BATCHES
+# 触发时间计算失败后的重试间隔（秒）
+SCHEDULER_ERROR_RETRY_SECONDS = infra_settings.SCHEDULED_TASK_ERROR_RETRY_SECONDS
+
+# 本进程是否已为历史任务补齐 next_run_at
+_backfilled = False
+
 
 @inngest_client.create_function(
     fn_id="scheduled-task-scheduler",
@@ -22,51 +43,34 @@ from inngest import Event as InngestEvent
 async def scheduled_task_scheduler_function(*args, **kwargs) -> Dict[str, Any]:
     """
     定时任务调度器工作流函数
-    
-    每分钟执行一次，检查所有启用的定时任务，判断是否需要执行。
-    如果需要执行，发送事件触发任务执行。
-    
+
+    每分钟执行一次，只取 next_run_at 已到期的启用任务，按错过触发补偿策略计算本次触发，
+    批量发送事件触发任务执行，并推进 next_run_at。
+    正在运行的任务保持到期状态，运行结束后的下一次调度再按补偿策略处理。
+
     注意：使用 TriggerCron 时，Inngest 可能会传递 ctx (Context) 参数。
     使用 *args 和 **kwargs 来接受任意参数，确保兼容不同版本的 SDK。
-    
+
     Returns:
         Dict[str, Any]: 调度结果
     """
-    now = datetime.now()
+    now = timezone.now()
+    checked_count = 0
     executed_count = 0
-    
+
     try:
-        # 获取所有启用的定时任务
-        active_tasks = await ScheduledTask.filter(
-            is_active=True,
-            deleted_at__isnull=True
-        ).all()
-        
-        for task in active_tasks:
-            try:
-                # 判断任务是否需要执行
-                should_execute = await _should_execute_task(task, now)
-                
-                if should_execute:
-                    # 发送事件触发任务执行
-                    await inngest_client.send(
-                        InngestEvent(
-                            name="scheduled-task/execute",
-                            data={
-                                "tenant_id": task.tenant_id,
-                                "task_uuid": str(task.uuid),
-                            }
-                        )
-                    )
-                    executed_count += 1
-                    logger.info(f"触发定时任务执行: {task.name} ({task.uuid})")
-            except Exception as e:
-                logger.error(f"检查定时任务失败: {task.uuid}, 错误: {e}")
-                continue
-        
+        await _backfill_next_run_at(now)
+
+        for _ in range(SCHEDULER_MAX_BATCHES):
+            locked, sent = await _dispatch_batch(now)
+            checked_count += locked
+            executed_count += sent
+            if locked < SCHEDULER_BATCH_SIZE:
+                break
+
         return {
             "success": True,
-            "checked_count": len(active_tasks),
+            "checked_count": checked_count,
             "executed_count": executed_count,
             "timestamp": now.isoformat()
         }
@@ -78,122 +82,92 @@ async def scheduled_task_scheduler_function(*args, **kwargs) -> Dict[str, Any]:
         }
 
 
-async def _should_execute_task(task: ScheduledTask, now: datetime) -> bool:
+async def _dispatch_batch(now) -> tuple:
     """
-    判断定时任务是否需要执行
-    
-    Args:
-        task: 定时任务对象
-        now: 当前时间
-        
+    锁定一批到期任务，批量发送执行事件并推进 next_run_at
+
     Returns:
-        bool: 是否需要执行
+        tuple: (锁定的任务数, 发送的事件数)
     """
-    trigger_type = task.trigger_type
-    trigger_config = task.trigger_config or {}
-    
-    # 如果任务正在运行，跳过
-    if task.is_running:
-        return False
-    
-    if trigger_type == "cron":
-        # Cron 触发器：检查 cron 表达式是否匹配当前时间
-        cron_expr = trigger_config.get("cron")
-        if not cron_expr:
-            return False
-        
-        # 简单的 cron 匹配（仅支持基本格式）
-        # 实际应该使用 croniter 库进行精确匹配
-        # 这里简化处理，每分钟检查一次，如果匹配就执行
-        return _match_cron(cron_expr, now)
-    
-    elif trigger_type == "interval":
-        # Interval 触发器：检查上次执行时间
-        seconds = trigger_config.get("seconds", 0)
-        if seconds <= 0:
-            return False
-        
-        if not task.last_run_at:
-            # 首次执行
-            return True
-        
-        # 检查是否到了执行时间
-        next_run_time = task.last_run_at + timedelta(seconds=seconds)
-        return now >= next_run_time
-    
-    elif trigger_type == "date":
-        # Date 触发器：检查是否到了指定时间
-        at_time = trigger_config.get("at")
-        if not at_time:
-            return False
-        
-        try:
-            if isinstance(at_time, str):
-                target_time = datetime.fromisoformat(at_time.replace("Z", "+00:00"))
-            else:
-                target_time = at_time
-            
-            # 如果已经执行过，不再执行
-            if task.last_run_at:
-                return False
-            
-            # 检查是否到了执行时间（允许1分钟误差）
-            time_diff = abs((now - target_time).total_seconds())
-            return time_diff <= 60
-        except Exception as e:
-            logger.error(f"解析日期触发器失败: {at_time}, 错误: {e}")
-            return False
-    
-    return False
+    async with in_transaction("default") as conn:
+        tasks = await ScheduledTask.filter(
+            is_active=True,
+            is_running=False,
+            deleted_at__isnull=True,
+            next_run_at__lte=now,
+        ).order_by("next_run_at").limit(SCHEDULER_BATCH_SIZE).select_for_update(skip_locked=True).using_db(conn)
+        if not tasks:
+            return 0, 0
 
+        events: List[InngestEvent] = []
+        failed: List[ScheduledTask] = []
+        for task in tasks:
+            try:
+                fires, next_run_at = due_fires(
+                    task.trigger_type,
+                    task.trigger_config,
+                    task.next_run_at,
+                    now,
+                    task.misfire_policy,
+                )
+            except Exception as e:
+                # 记录失败状态（任务列表可见），稍后重试，不清空 next_run_at
+                logger.error(
+                    f"计算定时任务触发时间失败，{SCHEDULER_ERROR_RETRY_SECONDS} 秒后重试: {task.uuid}, 错误: {e}"
+                )
+                task.next_run_at = now + timedelta(seconds=SCHEDULER_ERROR_RETRY_SECONDS)
+                task.last_run_status = "failed"
+                task.last_error = f"计算触发时间失败: {e}"
+                failed.append(task)
+                continue
 
-def _match_cron(cron_expr: str, now: datetime) -> bool:
-    """
-    简单的 cron 表达式匹配（仅支持基本格式）
-    
-    注意：这是一个简化实现，仅用于演示。
-    实际应该使用 croniter 库进行精确匹配。
-    
-    Args:
-        cron_expr: Cron 表达式（格式：分 时 日 月 周）
-        now: 当前时间
-        
-    Returns:
-        bool: 是否匹配
-    """
-    try:
-        parts = cron_expr.strip().split()
-        if len(parts) != 5:
-            return False
-        
-        minute, hour, day, month, weekday = parts
-        
-        # 检查分钟
-        if minute != "*" and str(now.minute) != minute:
-            return False
-        
-        # 检查小时
-        if hour != "*" and str(now.hour) != hour:
-            return False
-        
-        # 检查日期
-        if day != "*" and str(now.day) != day:
-            return False
-        
-        # 检查月份
-        if month != "*" and str(now.month) != month:
-            return False
-        
-        # 检查星期（简化处理）
-        if weekday != "*":
-            # 0=周日, 1=周一, ..., 6=周六
-            current_weekday = now.weekday() + 1  # Python weekday: 0=周一, 6=周日
-            if current_weekday == 7:
-                current_weekday = 0
-            if str(current_weekday) != weekday:
-                return False
-        
-        return True
-    except Exception:
-        return False
+            for scheduled_for in fires:
+                events.append(
+                    InngestEvent(
+                        name="scheduled-task/execute",
+                        data={
+                            "tenant_id": task.tenant_id,
+                            "task_uuid": str(task.uuid),
+                            "scheduled_for": scheduled_for.isoformat(),
+                        }
+                    )
+                )
+            if fires:
+                logger.info(f"触发定时任务执行: {task.name} ({task.uuid}) x{len(fires)}")
+            task.next_run_at = next_run_at
+
+        await ScheduledTask.bulk_update(tasks, fields=["next_run_at"], using_db=conn)
+        if failed:
+            await ScheduledTask.bulk_update(failed, fields=["last_run_status", "last_error"], using_db=conn)
+        # 发送失败时抛出异常回滚事务，任务保持到期，下一次调度重试
+        if events:
+            await inngest_client.send(events)
+        return len(tasks), len(events)
+
+
+async def _backfill_next_run_at(now) -> None:
+    """为升级前创建、尚未计算 next_run_at 的启用任务补齐触发时间（每个进程只执行一次）"""
+    global _backfilled
+    if _backfilled:
+        return
+
+    tasks = await ScheduledTask.filter(
+        is_active=True,
+        deleted_at__isnull=True,
+        next_run_at__isnull=True,
+    ).exclude(trigger_type="date", last_run_at__isnull=False).all()
+
+    updated = []
+    for task in tasks:
+        try:
+            task.next_run_at = initial_run_at(task.trigger_type, task.trigger_config, now, task.last_run_at)
+        except Exception as e:
+            logger.warning(f"定时任务触发器配置无效，跳过: {task.uuid}, 错误: {e}")
+            continue
+        if task.next_run_at is not None:
+            updated.append(task)
 
+    if updated:
+        await ScheduledTask.bulk_update(updated, fields=["next_run_at"], batch_size=SCHEDULER_BATCH_SIZE)
+        logger.info(f"已为 {len(updated)} 个定时任务补齐下次触发时间")
+    _backfilled = True
@@ -148,50 +148,37 @@ class OperationLogMiddleware(BaseHTTPMiddleware):
             user_id = None
             
             try:
-                from infra.domain.security.security import get_token_payload
+                from infra.domain.auth_context import get_request_auth_context, verify_token_cached
                 from infra.models.user import User
                 
-                # 获取 Token
-                authorization = request.headers.get("Authorization")
-                if authorization and authorization.startswith("Bearer "):
-                    token = authorization.replace("Bearer ", "")
-                    payload = get_token_payload(token)
-                    if payload:
-                        # 从 Token 中获取 tenant_id
-                        tenant_id = payload.get("tenant_id")
-                        if tenant_id:
-                            tenant_id = int(tenant_id)
-                        
-                        # 从 Token 中获取 user_id（sub 字段是用户ID，不是UUID）
-                        user_id_str = payload.get("sub")
-                        if user_id_str:
-                            try:
-                                # sub 字段存储的是用户ID（数字），直接转换为整数
-                                user_id = int(user_id_str)
-                                # 验证用户是否存在（可选，但建议验证）
-                                user = await User.get_or_none(id=user_id)
-                                if not user:
-                                    logger.warning(
-                                        f"无法找到用户: user_id={user_id}, path={request.url.path}"
-                                    )
-                                    user_id = None  # 用户不存在，设置为None
-                            except (ValueError, TypeError) as e:
+                # 优先复用认证依赖构建的请求认证上下文（Token 已验证、用户已加载）
+                context = get_request_auth_context(request)
+                if context is not None:
+                    if not context.is_infra_superadmin:
+                        tenant_id = context.token.tenant_id
+                        user_id = context.user_id
+                else:
+                    # 未经过认证依赖的请求：验证 Token（带缓存）并确认用户存在
+                    authorization = request.headers.get("Authorization")
+                    if authorization and authorization.startswith("Bearer "):
+                        token = authorization.replace("Bearer ", "")
+                        verified = verify_token_cached(token)
+                        if verified and not verified.is_infra_superadmin:
+                            tenant_id = verified.tenant_id
+                            user_id = verified.subject_id
+                            if not await User.filter(id=user_id).exists():
                                 logger.warning(
-                                    f"无法解析用户ID: sub={user_id_str}, path={request.url.path}, error={e}"
+                                    f"无法找到用户: user_id={user_id}, path={request.url.path}"
                                 )
-                                user_id = None
+                                user_id = None  # 用户不存在，设置为None
                         else:
                             logger.warning(
-                                f"Token中缺少sub字段: path={request.url.path}"
+                                f"无法解析Token payload: path={request.url.path}"
                             )
                     else:
                         logger.warning(
-                            f"无法解析Token payload: path={request.url.path}"
+                            f"请求中缺少Authorization头或格式不正确: path={request.url.path}"
                         )
-                else:
-                    logger.warning(
-                        f"请求中缺少Authorization头或格式不正确: path={request.url.path}"
-                    )
             except Exception as e:
                 # 如果无法获取，记录详细错误信息
                 logger.error(
@@ -15,6 +15,8 @@ from typing import Callable, Dict, List, Any
 from collections import defaultdict
 from loguru import logger
 
+from infra.infrastructure.database.pool_manager import reset_connection_holder, set_connection_holder
+
 
 class PerformanceMiddleware(BaseHTTPMiddleware):
     """
@@ -62,6 +64,9 @@ class PerformanceMiddleware(BaseHTTPMiddleware):
         # 记录开始时间
         start_time = time.time()
         
+        # 标记当前请求为数据库连接占用者（连接池看门狗据此定位长时间占用连接的请求）
+        holder_token = set_connection_holder(f"{request.method} {request.url.path}")
+        
         # 执行请求
         try:
             response = await call_next(request)
@@ -70,6 +75,8 @@ class PerformanceMiddleware(BaseHTTPMiddleware):
             elapsed_time = (time.time() - start_time) * 1000
             self._record_performance(request, elapsed_time, success=False)
             raise
+        finally:
+            reset_connection_holder(holder_token)
         
         # 记录结束时间
         elapsed_time = (time.time() - start_time) * 1000
@@ -0,0 +1,34 @@
+"""
+读路由中间件模块
+
+为每个 API 请求建立读路由状态（infra.infrastructure.database.db_router），
+使写后读粘滞在整个请求内生效：请求中发生写入后，即使之后调用了标记为走副本的服务方法，读取也回到主库。
+
+未配置只读副本时直接放行。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from typing import Callable
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from infra.infrastructure.database.db_router import read_routing_scope, replica_configured
+
+
+class ReadRoutingMiddleware(BaseHTTPMiddleware):
+    """
+    读路由中间件
+
+    为 /api/ 下的请求建立请求级读路由状态。
+    """
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        if not replica_configured() or not request.url.path.startswith("/api/"):
+            return await call_next(request)
+
+        with read_routing_scope():
+            return await call_next(request)
@@ -39,6 +39,9 @@ class ApprovalInstance(BaseModel):
     status = fields.CharField(max_length=20, default="pending", description="审批状态（pending、approved、rejected、cancelled）")
     current_node = fields.CharField(max_length=100, null=True, description="当前节点")
     current_approver_id = fields.IntField(null=True, description="当前审批人ID")
+    # 当前节点完成计数（会签/或签判断，审批操作无需重新加载节点任务）
+    node_task_total = fields.IntField(default=0, description="当前节点审批任务数")
+    node_approved_count = fields.IntField(default=0, description="当前节点已同意任务数")
     
     # Inngest 关联
     inngest_run_id = fields.CharField(max_length=100, null=True, description="Inngest 运行ID（关联 Inngest 工作流实例）")
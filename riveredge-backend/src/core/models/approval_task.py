@@ -32,6 +32,7 @@ class ApprovalTask(BaseModel):
         table = "core_approval_tasks"
         indexes = [
             ("tenant_id", "approver_id", "status"),  # 用户查询待办任务
+            ("approval_instance_id", "node_id", "status"),  # 节点任务取消/统计
             ("tenant_id", "approval_instance_id"),   # 实例查询任务
             ("uuid",),
         ]
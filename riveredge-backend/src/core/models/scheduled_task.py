@@ -42,6 +42,10 @@ class ScheduledTask(BaseModel):
     last_run_status = fields.CharField(max_length=20, null=True, description="最后运行状态（success、failed）")
     last_error = fields.TextField(null=True, description="最后错误信息")
     
+    # 调度状态（调度器按 is_active + next_run_at 索引只取到期任务）
+    next_run_at = fields.DatetimeField(null=True, description="下次计划触发时间（为空表示不再触发）")
+    misfire_policy = fields.CharField(max_length=20, default="run_once", description="错过触发补偿策略（run_once、skip、run_all）")
+    
     # 软删除字段
     deleted_at = fields.DatetimeField(null=True, description="删除时间（软删除）")
     
@@ -57,6 +61,7 @@ class ScheduledTask(BaseModel):
             ("uuid",),
             ("code",),
             ("is_active",),
+            ("is_active", "next_run_at"),
             ("created_at",),
         ]
         unique_together = [("tenant_id", "code")]
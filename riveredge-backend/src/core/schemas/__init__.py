@@ -43,6 +43,7 @@ from .custom_field import (
     CustomFieldValueResponse,
     BatchSetFieldValuesRequest,
     CustomFieldPageConfigResponse,
+    BulkFieldValuesRequest,
 )
 
 # 站点设置 Schema
@@ -305,6 +306,7 @@ __all__ = [
     "CustomFieldValueResponse",
     "BatchSetFieldValuesRequest",
     "CustomFieldPageConfigResponse",
+    "BulkFieldValuesRequest",
     # 站点设置 Schema
     "SiteSettingUpdate",
     "SiteSettingResponse",
@@ -160,6 +160,16 @@ class BatchSetFieldValuesRequest(BaseModel):
     values: List[CustomFieldValueRequest] = Field(..., description="字段值列表")
 
 
+class BulkFieldValuesRequest(BaseModel):
+    """
+    批量获取字段值请求 Schema
+    
+    用于列表页一次获取一页记录的自定义字段值。
+    """
+    record_table: str = Field(..., min_length=1, max_length=50, description="关联表名")
+    record_ids: List[int] = Field(..., max_length=1000, description="关联记录ID列表（最多 1000 条）")
+
+
 class CustomFieldPageConfigResponse(BaseModel):
     """
     自定义字段页面配置响应 Schema
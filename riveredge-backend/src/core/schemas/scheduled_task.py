@@ -10,6 +10,15 @@ from datetime import datetime
 from uuid import UUID
 
 
+MISFIRE_POLICIES = ['run_once', 'skip', 'run_all']
+
+
+def _validate_misfire_policy(v):
+    if v is not None and v not in MISFIRE_POLICIES:
+        raise ValueError(f'错过触发补偿策略必须是 {MISFIRE_POLICIES} 之一')
+    return v
+
+
 class ScheduledTaskBase(BaseModel):
     """定时任务基础 Schema"""
     name: str = Field(..., max_length=100, description="任务名称")
@@ -20,6 +29,7 @@ class ScheduledTaskBase(BaseModel):
     trigger_config: Dict[str, Any] = Field(..., description="触发器配置")
     task_config: Dict[str, Any] = Field(..., description="任务配置")
     is_active: bool = Field(True, description="是否启用")
+    misfire_policy: str = Field("run_once", max_length=20, description="错过触发补偿策略（run_once、skip、run_all）")
     
     @field_validator('trigger_type')
     @classmethod
@@ -38,6 +48,12 @@ class ScheduledTaskBase(BaseModel):
         if v not in allowed_types:
             raise ValueError(f'任务类型必须是 {allowed_types} 之一')
         return v
+    
+    @field_validator('misfire_policy')
+    @classmethod
+    def validate_misfire_policy(cls, v):
+        """验证错过触发补偿策略"""
+        return _validate_misfire_policy(v)
 
 
 class ScheduledTaskCreate(ScheduledTaskBase):
@@ -53,6 +69,13 @@ class ScheduledTaskUpdate(BaseModel):
     trigger_config: Optional[Dict[str, Any]] = Field(None, description="触发器配置")
     task_config: Optional[Dict[str, Any]] = Field(None, description="任务配置")
     is_active: Optional[bool] = Field(None, description="是否启用")
+    misfire_policy: Optional[str] = Field(None, max_length=20, description="错过触发补偿策略")
+    
+    @field_validator('misfire_policy')
+    @classmethod
+    def validate_misfire_policy(cls, v):
+        """验证错过触发补偿策略"""
+        return _validate_misfire_policy(v)
 
 
 class ScheduledTaskResponse(ScheduledTaskBase):
@@ -64,6 +87,7 @@ class ScheduledTaskResponse(ScheduledTaskBase):
     last_run_at: Optional[datetime] = Field(None, description="最后运行时间")
     last_run_status: Optional[str] = Field(None, description="最后运行状态")
     last_error: Optional[str] = Field(None, description="最后错误信息")
+    next_run_at: Optional[datetime] = Field(None, description="下次计划触发时间")
     created_at: datetime = Field(..., description="创建时间")
     updated_at: datetime = Field(..., description="更新时间")
     
@@ -21,6 +21,7 @@ from loguru import logger
 from core.services.application.application_service import ApplicationService
 from core.services.application.application_route_manager import get_route_manager
 from core.models.application import Application
+from core.utils.startup_profiler import startup_profiler
 
 
 class ApplicationRegistryService:
@@ -81,21 +82,22 @@ class ApplicationRegistryService:
         try:
             # 使用数据库连接查询应用
             from infra.infrastructure.database.database import get_db_connection
-            conn = await get_db_connection()
+            with startup_profiler.track_db():
+                conn = await get_db_connection()
 
-            # 查询所有已安装且启用的应用（系统级配置，不按租户隔离）
-            rows = await conn.fetch("""
-                SELECT uuid, code, name, description, version, changelog,
-                       route_path, entry_point, menu_config,
-                       is_system, is_active, is_installed,
-                       created_at, updated_at
-                FROM core_applications
-                WHERE is_installed = TRUE
-                  AND is_active = TRUE
-                  AND deleted_at IS NULL
-                  AND tenant_id = 1
-                ORDER BY sort_order, created_at
-            """)
+                # 查询所有已安装且启用的应用（系统级配置，不按租户隔离）
+                rows = await conn.fetch("""
+                    SELECT uuid, code, name, description, version, changelog,
+                           route_path, entry_point, menu_config,
+                           is_system, is_active, is_installed,
+                           created_at, updated_at
+                    FROM core_applications
+                    WHERE is_installed = TRUE
+                      AND is_active = TRUE
+                      AND deleted_at IS NULL
+                      AND tenant_id = 1
+                    ORDER BY sort_order, created_at
+                """)
 
             apps = []
             logger.info(f"📊 查询返回 {len(rows)} 行数据")
@@ -192,7 +194,8 @@ class ApplicationRegistryService:
                 # 检查模块是否存在
                 if cls._module_exists(model_module_path):
                     # 动态导入模型模块
-                    model_module = importlib.import_module(model_module_path)
+                    with startup_profiler.track_import():
+                        model_module = importlib.import_module(model_module_path)
 
                     # ⚠️ 关键修复：确保模型使用正确的数据库连接
                     # 在 Tortoise ORM 中，每个模型的 _meta.db 属性指定其数据库连接
@@ -287,7 +290,8 @@ class ApplicationRegistryService:
                             for m in modules_to_remove:
                                 del sys.modules[m]
                         
-                        route_module = importlib.import_module(route_module_path)
+                        with startup_profiler.track_import():
+                            route_module = importlib.import_module(route_module_path)
 
                         # 获取路由对象（通常命名为router）
                         router = getattr(route_module, 'router', None)
@@ -344,6 +348,14 @@ class ApplicationRegistryService:
         Returns:
             bool: 模块文件是否存在
         """
+        if module_path.startswith("apps."):
+            try:
+                # 应用模块以启动清单为准
+                from core.utils.startup_manifest import get_startup_manifest
+                return get_startup_manifest().has_module(module_path)
+            except Exception as e:
+                logger.debug(f"读取启动清单失败，回退到文件检查: {e}")
+
         try:
             # 将模块路径转换为文件路径
             # apps.master_data.api.router -> apps/master_data/api/router.py
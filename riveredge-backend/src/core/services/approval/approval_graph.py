@@ -0,0 +1,132 @@
+"""
+审批流程图编译缓存模块
+
+审批流程定义（ApprovalProcess.nodes）按版本（流程 updated_at）编译为邻接表后缓存在进程内存中，
+审批操作查找当前节点、下一节点、会签/或签类型均为 O(1)，不再每次线性扫描节点与连线。
+
+兼容两种流程定义格式：
+- ProFlow 设计器格式：{"nodes": [{"id", "type", "data"}, ...], "edges": [{"source", "target"}, ...]}
+- 旧版字典格式：{节点ID: {"type", "data", "edges": [{"target"}]}, ...}
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+APPROVAL_TYPE_AND = "AND"  # 会签：节点所有审批人都同意
+APPROVAL_TYPE_OR = "OR"  # 或签：节点任一审批人同意
+
+# 进程内最多缓存的流程图数量
+GRAPH_CACHE_SIZE = 512
+
+
+def _node_type(node: Dict[str, Any]) -> str:
+    return node.get("type") or (node.get("data") or {}).get("type") or ""
+
+
+class CompiledApprovalGraph:
+    """
+    编译后的审批流程图
+
+    Attributes:
+        nodes: 节点ID -> 节点配置（含 id）
+        successors: 节点ID -> 后继节点ID列表（按定义顺序）
+        start_node_id: 起始节点ID
+    """
+
+    __slots__ = ("nodes", "successors", "start_node_id")
+
+    def __init__(self, definition: Optional[Dict[str, Any]]):
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        self.successors: Dict[str, List[str]] = {}
+        self.start_node_id: Optional[str] = None
+
+        definition = definition or {}
+        if isinstance(definition.get("nodes"), list):
+            for node in definition["nodes"]:
+                if isinstance(node, dict) and node.get("id") is not None:
+                    self.nodes[str(node["id"])] = node
+                    self.successors.setdefault(str(node["id"]), [])
+            for edge in definition.get("edges") or []:
+                if isinstance(edge, dict) and edge.get("source") is not None and edge.get("target") is not None:
+                    self.successors.setdefault(str(edge["source"]), []).append(str(edge["target"]))
+        else:
+            for node_id, node in definition.items():
+                if not isinstance(node, dict):
+                    continue
+                self.nodes[str(node_id)] = {"id": node_id, **node}
+                self.successors[str(node_id)] = [
+                    str(edge["target"])
+                    for edge in node.get("edges") or []
+                    if isinstance(edge, dict) and edge.get("target") is not None
+                ]
+
+        for node_id, node in self.nodes.items():
+            if _node_type(node) == "start" or node_id == "start":
+                self.start_node_id = node_id
+                break
+        if self.start_node_id is None and self.nodes:
+            self.start_node_id = next(iter(self.nodes))
+
+    def node(self, node_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """获取节点配置"""
+        if node_id is None:
+            return None
+        return self.nodes.get(str(node_id))
+
+    def start_node(self) -> Optional[Dict[str, Any]]:
+        """获取起始节点"""
+        return self.node(self.start_node_id)
+
+    def next_node(self, node_id: Optional[str]) -> Optional[Dict[str, Any]]:
+        """获取下一个节点（取第一条出边；指向结束节点或没有出边时返回 None）"""
+        if node_id is None:
+            return None
+        for target in self.successors.get(str(node_id), []):
+            node = self.nodes.get(target)
+            if node is None:
+                continue
+            if _node_type(node) == "end":
+                return None
+            return node
+        return None
+
+    def approval_type(self, node_id: Optional[str]) -> str:
+        """节点审批方式（AND 会签 / OR 或签，默认或签）"""
+        node = self.node(node_id) or {}
+        value = str((node.get("data") or {}).get("approval_type") or APPROVAL_TYPE_OR).upper()
+        return APPROVAL_TYPE_AND if value == APPROVAL_TYPE_AND else APPROVAL_TYPE_OR
+
+
+_graph_cache: "OrderedDict[int, Tuple[Any, CompiledApprovalGraph]]" = OrderedDict()
+
+
+def get_process_graph(process: Any) -> CompiledApprovalGraph:
+    """
+    获取审批流程的编译图（按流程ID + updated_at 版本缓存，流程修改后自动重新编译）
+
+    Args:
+        process: ApprovalProcess 实例
+
+    Returns:
+        CompiledApprovalGraph: 编译后的流程图
+    """
+    version = getattr(process, "updated_at", None)
+    cached = _graph_cache.get(process.id)
+    if cached is not None and cached[0] == version:
+        _graph_cache.move_to_end(process.id)
+        return cached[1]
+
+    graph = CompiledApprovalGraph(process.nodes)
+    _graph_cache[process.id] = (version, graph)
+    _graph_cache.move_to_end(process.id)
+    while len(_graph_cache) > GRAPH_CACHE_SIZE:
+        _graph_cache.popitem(last=False)
+    return graph
+
+
+def invalidate_process_graph(process_id: int) -> None:
+    """移除流程的编译图缓存（流程删除时调用）"""
+    _graph_cache.pop(process_id, None)
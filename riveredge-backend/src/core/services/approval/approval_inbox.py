@@ -0,0 +1,54 @@
+"""
+审批待办收件箱模块
+
+为“我的待办”列表和角标提供每个用户的待办审批任务数：
+- 待办任务走 core_approval_tasks 上仅包含 pending 行的部分索引（tenant_id, approver_id, created_at），
+  已处理的历史任务不会拖慢待办查询
+- 待办数物化在 Redis（approval:pending_count:{tenant_id}:{user_id}），任务创建或状态变化时
+  使相关审批人的计数失效，读取时未命中再按索引重算
+
+Redis 不可用时直接查询数据库。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from typing import Iterable
+
+from loguru import logger
+
+from core.models.approval_task import ApprovalTask
+from infra.infrastructure.cache.cache import cache
+
+PENDING_COUNT_CACHE_TTL = 600
+
+
+def _pending_count_key(tenant_id: int, user_id: int) -> str:
+    return f"approval:pending_count:{tenant_id}:{user_id}"
+
+
+async def get_pending_count(tenant_id: int, user_id: int) -> int:
+    """获取用户的待办审批任务数"""
+    key = _pending_count_key(tenant_id, user_id)
+    try:
+        cached = await cache.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        logger.debug(f"读取待办审批数缓存失败: {e}")
+
+    count = await ApprovalTask.filter(tenant_id=tenant_id, approver_id=user_id, status="pending").count()
+    try:
+        await cache.set(key, str(count), expire=PENDING_COUNT_CACHE_TTL)
+    except Exception as e:
+        logger.debug(f"写入待办审批数缓存失败: {e}")
+    return count
+
+
+async def invalidate_pending_counts(tenant_id: int, user_ids: Iterable[int]) -> None:
+    """使审批人的待办数缓存失效（任务创建、处理、取消后调用）"""
+    for user_id in set(user_ids):
+        try:
+            await cache.delete(_pending_count_key(tenant_id, user_id))
+        except Exception as e:
+            logger.debug(f"清除待办审批数缓存失败: {e}")
@@ -13,11 +13,14 @@ from loguru import logger
 from core.models.approval_history import ApprovalHistory
 
 from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
 
 from core.models.approval_instance import ApprovalInstance
 from core.models.approval_process import ApprovalProcess
 from core.models.approval_task import ApprovalTask
 from core.schemas.approval_instance import ApprovalInstanceCreate, ApprovalInstanceUpdate, ApprovalInstanceAction
+from core.services.approval.approval_graph import APPROVAL_TYPE_OR, CompiledApprovalGraph, get_process_graph
+from core.services.approval.approval_inbox import invalidate_pending_counts
 from core.services.messaging.message_service import MessageService
 from core.schemas.message_template import SendMessageRequest
 from infra.models.user import User
@@ -319,6 +322,8 @@ class ApprovalInstanceService:
         instance.current_node = None
         instance.current_approver_id = None
         await instance.save()
+        approver_ids = await ApprovalInstanceService._cancel_pending_tasks(instance.id, None)
+        await invalidate_pending_counts(tenant_id, approver_ids)
         logger.info(f"审批流程已取消: {entity_type}:{entity_id}")
         return True
 
@@ -475,26 +480,71 @@ class ApprovalInstanceService:
         Returns:
             ApprovalInstance: 更新后的审批实例对象
         """
-        # 获取任务
-        task = await ApprovalTask.filter(
-            tenant_id=tenant_id,
-            uuid=task_uuid,
-            approver_id=user_id,
-            status="pending"
-        ).prefetch_related("approval_instance__process").first()
+        affected_approver_ids = {user_id}
         
-        if not task:
-            raise NotFoundError("任务不存在或已处理")
+        # 锁定任务与实例，同一实例的并发审批操作串行执行（会签计数不会丢失）
+        async with in_transaction("default") as conn:
+            task = await ApprovalTask.filter(
+                tenant_id=tenant_id,
+                uuid=task_uuid,
+                approver_id=user_id,
+                status="pending"
+            ).select_for_update().using_db(conn).first()
+            
+            if not task:
+                raise NotFoundError("任务不存在或已处理")
+            
+            instance = await ApprovalInstance.filter(
+                id=task.approval_instance_id
+            ).select_for_update().using_db(conn).first()
+            if not instance or instance.status != "pending":
+                raise ValidationError("审批流程已结束")
+            await instance.fetch_related("process", using_db=conn)
+            node_id = instance.current_node
+            
+            # 更新任务状态
+            task.status = "approved" if action_data.action == "approve" else "rejected"
+            task.action_at = datetime.now()
+            task.comment = action_data.comment
+            await task.save(using_db=conn)
             
-        instance = task.approval_instance
-        if instance.status != "pending":
-            raise ValidationError("审批流程已结束")
+            # 检查节点是否完成
+            node_completed, instance_status = await ApprovalInstanceService._check_node_completion(
+                instance, action_data.action, task=task, using_db=conn
+            )
             
-        # 更新任务状态
-        task.status = "approved" if action_data.action == "approve" else "rejected"
-        task.action_at = datetime.now()
-        task.comment = action_data.comment
-        await task.save()
+            if node_completed:
+                # 节点已有结论，取消该节点其他待办任务（或签其余审批人、拒绝后的剩余审批人）
+                affected_approver_ids.update(
+                    await ApprovalInstanceService._cancel_pending_tasks(instance.id, node_id, using_db=conn)
+                )
+                
+                if instance_status == "rejected":
+                    # 全盘拒绝
+                    instance.status = "rejected"
+                    instance.completed_at = datetime.now()
+                    instance.current_node = None
+                    instance.current_approver_id = None
+                else:
+                    # 节点通过，寻找下一个节点
+                    next_node = get_process_graph(instance.process).next_node(node_id)
+                    if next_node:
+                        # 进入下一个节点并创建新节点的任务
+                        instance.current_node = next_node.get("id")
+                        tasks = await ApprovalInstanceService._create_node_tasks(
+                            tenant_id, instance, next_node, using_db=conn
+                        )
+                        affected_approver_ids.update(t.approver_id for t in tasks)
+                    else:
+                        # 全部完成
+                        instance.status = "approved"
+                        instance.completed_at = datetime.now()
+                        instance.current_node = None
+                        instance.current_approver_id = None
+            
+            await instance.save(using_db=conn)
+        
+        await invalidate_pending_counts(tenant_id, affected_approver_ids)
         
         # 记录审批历史
         await ApprovalInstanceService._create_approval_history(
@@ -503,75 +553,66 @@ class ApprovalInstanceService:
             action=action_data.action,
             action_by=user_id,
             comment=action_data.comment,
-            from_node=instance.current_node,
-            to_node=instance.current_node,
+            from_node=node_id,
+            to_node=node_id,
             from_approver_id=user_id,
             to_approver_id=None
         )
         
-        # 检查节点是否完成
-        node_completed, instance_status = await ApprovalInstanceService._check_node_completion(instance, action_data.action)
-        
-        if node_completed:
-            if instance_status == "rejected":
-                # 全盘拒绝
-                instance.status = "rejected"
-                instance.completed_at = datetime.now()
-                instance.current_node = None
-                instance.current_approver_id = None
-                await instance.save()
-                
-                # 取消该节点其他待办任务
-                await ApprovalTask.filter(
-                    approval_instance_id=instance.id,
-                    node_id=instance.current_node,
-                    status="pending"
-                ).update(status="cancelled")
-            else:
-                # 节点通过，寻找下一个节点
-                next_node = ApprovalInstanceService._get_next_node(instance.process.nodes, instance.current_node)
-                if next_node:
-                    # 进入下一个节点
-                    instance.current_node = next_node.get("id")
-                    await instance.save()
-                    # 创建新节点的任务
-                    await ApprovalInstanceService._create_node_tasks(tenant_id, instance, next_node)
-                else:
-                    # 全部完成
-                    instance.status = "approved"
-                    instance.completed_at = datetime.now()
-                    instance.current_node = None
-                    instance.current_approver_id = None
-                    await instance.save()
-            
-            # 触发业务回调
-            if instance.status in ["approved", "rejected"]:
-                await ApprovalInstanceService._handle_approval_completion(tenant_id, instance)
+        # 触发业务回调
+        if instance.status in ["approved", "rejected"]:
+            await ApprovalInstanceService._handle_approval_completion(tenant_id, instance)
 
         return instance
 
     @staticmethod
-    async def _create_node_tasks(tenant_id: int, instance: ApprovalInstance, node: dict) -> List[ApprovalTask]:
-        """为节点创建审批任务"""
-        approvers = await ApprovalInstanceService._resolve_node_approvers(node, instance)
-        tasks = []
-        for approver_id in approvers:
-            task = await ApprovalTask.create(
+    async def _create_node_tasks(
+        tenant_id: int,
+        instance: ApprovalInstance,
+        node: dict,
+        using_db=None
+    ) -> List[ApprovalTask]:
+        """
+        为节点批量创建审批任务，并重置实例的节点完成计数
+        
+        传入 using_db 时由调用方负责保存实例；否则在此保存并刷新审批人的待办数。
+        """
+        approvers = list(dict.fromkeys(await ApprovalInstanceService._resolve_node_approvers(node, instance)))
+        tasks = [
+            ApprovalTask(
                 tenant_id=tenant_id,
-                approval_instance=instance,
+                approval_instance_id=instance.id,
                 node_id=node.get("id"),
                 approver_id=approver_id,
                 status="pending"
             )
-            tasks.append(task)
-            
+            for approver_id in approvers
+        ]
+        if tasks:
+            await ApprovalTask.bulk_create(tasks, using_db=using_db)
+        
+        instance.node_task_total = len(tasks)
+        instance.node_approved_count = 0
         # 更新实例的当前主审批人（仅作显示用）
         if approvers:
             instance.current_approver_id = approvers[0]
+        
+        if using_db is None:
             await instance.save()
-            
+            await invalidate_pending_counts(tenant_id, approvers)
         return tasks
 
+    @staticmethod
+    async def _cancel_pending_tasks(instance_id: int, node_id: Optional[str], using_db=None) -> List[int]:
+        """取消节点（node_id 为 None 时为整个实例）的待办任务，返回受影响的审批人ID"""
+        query = ApprovalTask.filter(approval_instance_id=instance_id, status="pending")
+        if node_id is not None:
+            query = query.filter(node_id=node_id)
+        approver_ids = await query.using_db(using_db).values_list("approver_id", flat=True)
+        if approver_ids:
+            await query.using_db(using_db).update(status="cancelled")
+        return list(approver_ids)
+
     @staticmethod
     async def _resolve_node_approvers(node: dict, instance: ApprovalInstance) -> List[int]:
         """解析节点审批人"""
@@ -588,39 +629,43 @@ class ApprovalInstanceService:
         return [instance.submitter_id]
 
     @staticmethod
-    async def _check_node_completion(instance: ApprovalInstance, last_action: str) -> (bool, str):
+    async def _check_node_completion(
+        instance: ApprovalInstance,
+        last_action: str,
+        task: Optional[ApprovalTask] = None,
+        using_db=None
+    ) -> (bool, str):
         """
-        检查节点是否完成
+        检查节点是否完成（按实例上的节点计数判断，O(1)）
+        
+        task 为本次处理的任务（已更新状态），同意时累加实例的已同意计数。
         返回: (是否完成, 建议状态)
         """
         node_id = instance.current_node
-        process_nodes = instance.process.nodes or {}
-        
-        # 查找当前节点配置
-        current_node_config = None
-        for node in process_nodes.get("nodes", []):
-            if node.get("id") == node_id:
-                current_node_config = node
-                break
-                
-        if not current_node_config:
+        graph = get_process_graph(instance.process)
+        if graph.node(node_id) is None:
             return True, "approved"
-            
-        approval_type = current_node_config.get("data", {}).get("approval_type", "OR") # AND (会签), OR (或签)
-        
-        # 获取该节点所有任务
-        tasks = await ApprovalTask.filter(approval_instance=instance, node_id=node_id).all()
         
         if last_action == "reject":
             return True, "rejected" # 只要有一个拒绝，立即节点拒绝
-            
-        if approval_type == "OR":
+        
+        if instance.node_task_total <= 0:
+            # 计数未初始化（节点任务由旧版本创建），按任务表统计一次
+            statuses = await ApprovalTask.filter(
+                approval_instance_id=instance.id, node_id=node_id
+            ).exclude(status="cancelled").using_db(using_db).values_list("status", flat=True)
+            instance.node_task_total = len(statuses)
+            instance.node_approved_count = sum(1 for status in statuses if status == "approved")
+        elif task is not None and task.status == "approved":
+            instance.node_approved_count += 1
+        
+        if graph.approval_type(node_id) == APPROVAL_TYPE_OR:
             # 或签：只要有一个同意，即完成
-            if any(t.status == "approved" for t in tasks):
+            if instance.node_approved_count >= 1:
                 return True, "approved"
         else:
             # 会签：所有人都必须同意
-            if all(t.status == "approved" for t in tasks):
+            if instance.node_approved_count >= instance.node_task_total:
                 return True, "approved"
                 
         return False, "pending"
@@ -662,7 +707,7 @@ class ApprovalInstanceService:
         
         # 执行操作
         if action.action == "approve":
-            next_node = ApprovalInstanceService._get_next_node(process.nodes, approval_instance.current_node)
+            next_node = get_process_graph(process).next_node(approval_instance.current_node)
             if next_node:
                 approval_instance.current_node = next_node.get("id")
                 approval_instance.current_approver_id = ApprovalInstanceService._get_node_approver(next_node, approval_instance)
@@ -927,24 +972,7 @@ class ApprovalInstanceService:
         Returns:
             Optional[dict]: 起始节点配置
         """
-        if not nodes:
-            return None
-        
-        # 查找起始节点（通常节点类型为 "start" 或第一个节点）
-        for node_id, node_config in nodes.items():
-            if isinstance(node_config, dict):
-                node_type = node_config.get("type", "")
-                if node_type == "start" or node_id == "start":
-                    return {"id": node_id, **node_config}
-        
-        # 如果没有找到起始节点，返回第一个节点
-        if nodes:
-            first_node_id = list(nodes.keys())[0]
-            first_node = nodes[first_node_id]
-            if isinstance(first_node, dict):
-                return {"id": first_node_id, **first_node}
-        
-        return None
+        return CompiledApprovalGraph(nodes).start_node()
     
     @staticmethod
     def _get_next_node(nodes: dict, current_node_id: Optional[str]) -> Optional[dict]:
@@ -958,32 +986,7 @@ class ApprovalInstanceService:
         Returns:
             Optional[dict]: 下一个节点配置，如果没有则返回None
         """
-        if not nodes or not current_node_id:
-            return None
-        
-        current_node = nodes.get(current_node_id)
-        if not isinstance(current_node, dict):
-            return None
-        
-        # 获取当前节点的出边（edges）
-        edges = current_node.get("edges", [])
-        if not edges:
-            return None
-        
-        # 获取第一个出边指向的节点
-        first_edge = edges[0] if isinstance(edges, list) else None
-        if not first_edge:
-            return None
-        
-        next_node_id = first_edge.get("target") if isinstance(first_edge, dict) else None
-        if not next_node_id:
-            return None
-        
-        next_node = nodes.get(next_node_id)
-        if isinstance(next_node, dict):
-            return {"id": next_node_id, **next_node}
-        
-        return None
+        return CompiledApprovalGraph(nodes).next_node(current_node_id)
     
     @staticmethod
     def _get_node_approver(node: dict, approval_instance: ApprovalInstance) -> Optional[int]:
@@ -12,6 +12,7 @@ from tortoise.exceptions import IntegrityError
 
 from core.models.approval_process import ApprovalProcess
 from core.schemas.approval_process import ApprovalProcessCreate, ApprovalProcessUpdate
+from core.services.approval.approval_graph import invalidate_process_graph
 from core.inngest.approval_registration import register_approval_workflow, unregister_approval_workflow
 from infra.exceptions.exceptions import NotFoundError, ValidationError
 
@@ -209,4 +210,5 @@ class ApprovalProcessService:
 
         approval_process.deleted_at = datetime.now()
         await approval_process.save()
+        invalidate_process_graph(approval_process.id)
 
@@ -3,18 +3,20 @@
 
 顺序：
 1) RBAC
-2) ABAC（策略）
+2) ABAC（策略，经编译后的租户策略索引评估，见 policy_index）
+
+判定耗时按结果原因统计（进程内），通过性能监控接口查看。
 """
 
 from __future__ import annotations
 
+import time
+from collections import defaultdict
 from dataclasses import dataclass
 from typing import Any
 
-from tortoise.expressions import Q
-
-from core.models.access_policy import AccessPolicy, AccessPolicyEffect
-from core.models.policy_binding import PolicyBinding, PolicySubjectType
+from core.models.access_policy import AccessPolicyEffect
+from core.services.authorization.policy_index import PolicyIndexRegistry
 from core.services.authorization.user_permission_service import UserPermissionService
 
 
@@ -27,6 +29,13 @@ class AccessDecision:
 
 
 class AccessControlService:
+    # 判定耗时统计（内存中，重启后丢失），按判定原因分组
+    _decision_stats: dict[str, dict[str, float]] = defaultdict(lambda: {
+        "count": 0,
+        "total_time": 0.0,
+        "max_time": 0.0,
+    })
+
     @staticmethod
     def build_permission_code(resource: str, action: str) -> str:
         return f"{resource}:{action}"
@@ -44,24 +53,51 @@ class AccessControlService:
         require_all: bool = False,
         required_permissions: list[str] | None = None,
         env: dict[str, Any] | None = None,
+    ) -> AccessDecision:
+        started = time.perf_counter()
+        decision = await AccessControlService._decide(
+            user_id=user_id,
+            tenant_id=tenant_id,
+            resource=resource,
+            action=action,
+            is_infra_admin=is_infra_admin,
+            is_tenant_admin=is_tenant_admin,
+            check_abac=check_abac,
+            require_all=require_all,
+            required_permissions=required_permissions,
+            env=env,
+        )
+        AccessControlService._record_decision(decision.reason, (time.perf_counter() - started) * 1000)
+        return decision
+
+    @staticmethod
+    async def _decide(
+        *,
+        user_id: int,
+        tenant_id: int,
+        resource: str,
+        action: str,
+        is_infra_admin: bool = False,
+        is_tenant_admin: bool = False,
+        check_abac: bool = True,
+        require_all: bool = False,
+        required_permissions: list[str] | None = None,
+        env: dict[str, Any] | None = None,
     ) -> AccessDecision:
         if is_infra_admin or is_tenant_admin:
             return AccessDecision(True, "admin_bypass", [])
 
         needed = required_permissions or [AccessControlService.build_permission_code(resource, action)]
 
+        # 管理员已由调用方判定，这里直接取（缓存的）权限集合
+        permissions = await UserPermissionService.get_user_permissions(
+            user_id=user_id,
+            tenant_id=tenant_id,
+        )
         if require_all:
-            has_rbac = await UserPermissionService.has_all_permissions(
-                user_id=user_id,
-                tenant_id=tenant_id,
-                permission_codes=needed,
-            )
+            has_rbac = set(needed).issubset(permissions)
         else:
-            has_rbac = await UserPermissionService.has_any_permission(
-                user_id=user_id,
-                tenant_id=tenant_id,
-                permission_codes=needed,
-            )
+            has_rbac = not permissions.isdisjoint(needed)
         if not has_rbac:
             return AccessDecision(False, "rbac_denied", needed)
 
@@ -89,51 +125,23 @@ class AccessControlService:
         action: str,
         env: dict[str, Any],
     ) -> AccessDecision | None:
-        # 获取用户角色ID
-        from core.models.user_role import UserRole
-
-        user_roles = await UserRole.filter(user_id=user_id).all()
-        role_ids = [ur.role_id for ur in user_roles]
-
-        # 查询绑定策略
-        binding_query = Q(subject_type=PolicySubjectType.USER, subject_id=user_id)
-        if role_ids:
-            binding_query = binding_query | Q(
-                subject_type=PolicySubjectType.ROLE,
-                subject_id__in=role_ids,
-            )
-        bindings = await PolicyBinding.filter(binding_query).all()
-        if not bindings:
+        index = await PolicyIndexRegistry.get_index(tenant_id)
+        if not index.has_target(resource, action):
             return None
 
-        policy_ids = [b.policy_id for b in bindings]
-        policies = await AccessPolicy.filter(
-            tenant_id=tenant_id,
-            id__in=policy_ids,
-            enabled=True,
-            deleted_at__isnull=True,
-            target_resource=resource,
-            target_action=action,
-        ).order_by("priority", "id").all()
-        if not policies:
-            return None
+        role_ids: tuple[int, ...] = ()
+        if index.needs_roles(resource, action):
+            role_ids = await PolicyIndexRegistry.get_user_role_ids(tenant_id, user_id)
 
-        for policy in policies:
-            if AccessControlService._condition_match(policy.condition_expr or {}, env):
-                if policy.effect == AccessPolicyEffect.DENY:
-                    return AccessDecision(
-                        allowed=False,
-                        reason="abac_denied",
-                        required=[AccessControlService.build_permission_code(resource, action)],
-                        matched_policy=policy.name,
-                    )
-                return AccessDecision(
-                    allowed=True,
-                    reason="abac_allowed",
-                    required=[AccessControlService.build_permission_code(resource, action)],
-                    matched_policy=policy.name,
-                )
-        return None
+        policy = index.match(resource, action, user_id, role_ids, env)
+        if policy is None:
+            return None
+        return AccessDecision(
+            allowed=policy.effect != AccessPolicyEffect.DENY,
+            reason="abac_denied" if policy.effect == AccessPolicyEffect.DENY else "abac_allowed",
+            required=[AccessControlService.build_permission_code(resource, action)],
+            matched_policy=policy.name,
+        )
 
     @staticmethod
     def _condition_match(condition_expr: dict[str, Any], env: dict[str, Any]) -> bool:
@@ -158,3 +166,34 @@ class AccessControlService:
                 return False
 
         return True
+
+    @classmethod
+    def _record_decision(cls, reason: str, duration_ms: float) -> None:
+        stats = cls._decision_stats[reason]
+        stats["count"] += 1
+        stats["total_time"] += duration_ms
+        stats["max_time"] = max(stats["max_time"], duration_ms)
+
+    @classmethod
+    def get_decision_stats(cls) -> dict[str, Any]:
+        """获取访问判定耗时统计（毫秒）"""
+        by_reason = {
+            reason: {
+                "count": int(stats["count"]),
+                "avg_time": round(stats["total_time"] / stats["count"], 3) if stats["count"] else 0.0,
+                "max_time": round(stats["max_time"], 3),
+            }
+            for reason, stats in cls._decision_stats.items()
+        }
+        total_count = sum(stats["count"] for stats in cls._decision_stats.values())
+        total_time = sum(stats["total_time"] for stats in cls._decision_stats.values())
+        return {
+            "count": int(total_count),
+            "avg_time": round(total_time / total_count, 3) if total_count else 0.0,
+            "by_reason": by_reason,
+            "policy_index": PolicyIndexRegistry.get_stats(),
+        }
+
+    @classmethod
+    def reset_decision_stats(cls) -> None:
+        cls._decision_stats.clear()
@@ -1,8 +1,29 @@
 """
 权限版本服务
+
+版本号持久化在 PermissionVersion 表；读取时经过共享缓存与进程内短时缓存，
+权限判定热路径在检查间隔内不访问数据库。bump 时同步刷新共享缓存与本进程缓存，
+其他 worker 最迟在一个检查间隔后看到新版本。
 """
 
+import time
+
 from core.models.permission_version import PermissionVersion
+from infra.config.infra_config import infra_settings
+from infra.infrastructure.cache.cache_manager import cache_manager
+
+PERMISSION_VERSION_NAMESPACE = "permission_version"
+# 进程内版本号检查间隔（秒）
+PERMISSION_VERSION_CHECK_INTERVAL = infra_settings.PERMISSION_VERSION_CHECK_INTERVAL
+# 回源填充共享缓存的有效期（秒）；bump 写入的版本号使用最大有效期
+PERMISSION_VERSION_FILL_TTL = infra_settings.PERMISSION_VERSION_FILL_TTL
+
+# (tenant_id, user_id) -> (版本号, 检查时间)
+_local_versions: dict[tuple[int, int | None], tuple[int, float]] = {}
+
+
+def _version_cache_key(tenant_id: int, user_id: int | None) -> str:
+    return f"{tenant_id}:{user_id or 0}"
 
 
 class PermissionVersionService:
@@ -13,6 +34,35 @@ class PermissionVersionService:
             return 1
         return record.version
 
+    @staticmethod
+    async def get_cached_version(tenant_id: int, user_id: int | None = None) -> int:
+        """
+        获取权限版本号（进程内缓存 -> 共享缓存 -> 数据库）
+
+        缓存未命中时以 NX 方式回填：与 bump 并发时不会用读到的旧版本覆盖 bump 写入的新版本
+        （bump 在提交后无条件写入，回填晚于 bump 时 NX 失败，早于 bump 时被 bump 覆盖）；
+        回填失败时重新读取共享缓存中的版本号。回填有效期较短，作为共享缓存写入失败时的兜底。
+        """
+        key = (tenant_id, user_id)
+        now = time.monotonic()
+        cached = _local_versions.get(key)
+        if cached is not None and now - cached[1] < PERMISSION_VERSION_CHECK_INTERVAL:
+            return cached[0]
+
+        cache_key = _version_cache_key(tenant_id, user_id)
+        version = await cache_manager.get(PERMISSION_VERSION_NAMESPACE, cache_key)
+        if version is None:
+            version = await PermissionVersionService.get_version(tenant_id=tenant_id, user_id=user_id)
+            filled = await cache_manager.set(
+                PERMISSION_VERSION_NAMESPACE, cache_key, version, ttl=PERMISSION_VERSION_FILL_TTL, nx=True
+            )
+            if not filled:
+                current = await cache_manager.get(PERMISSION_VERSION_NAMESPACE, cache_key)
+                if current is not None:
+                    version = max(int(current), int(version))
+        _local_versions[key] = (int(version), now)
+        return int(version)
+
     @staticmethod
     async def bump(tenant_id: int, user_id: int | None = None) -> int:
         record = await PermissionVersion.get_or_none(tenant_id=tenant_id, user_id=user_id)
@@ -22,7 +72,14 @@ class PermissionVersionService:
                 user_id=user_id,
                 version=2,
             )
-            return record.version
-        record.version += 1
-        await record.save()
+        else:
+            record.version += 1
+            await record.save()
+        await cache_manager.set(
+            PERMISSION_VERSION_NAMESPACE,
+            _version_cache_key(tenant_id, user_id),
+            record.version,
+            ttl=cache_manager.config.max_ttl,
+        )
+        _local_versions[(tenant_id, user_id)] = (record.version, time.monotonic())
         return record.version
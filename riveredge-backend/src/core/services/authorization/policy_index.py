@@ -0,0 +1,229 @@
+"""
+ABAC 策略索引（编译后的策略评估器）
+
+按租户把启用的访问策略编译为内存索引：
+(resource, action) -> 主体(subject_type, subject_id) -> 按优先级排序的策略（条件预编译为闭包）。
+
+索引以租户级权限版本号（PermissionVersionService）为版本，版本变化后下一次访问时重建；
+用户角色按用户级版本号缓存。没有策略命中目标资源时无需任何查询。
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from core.models.access_policy import AccessPolicy
+from core.models.policy_binding import PolicyBinding, PolicySubjectType
+from core.services.authorization.permission_version_service import PermissionVersionService
+from infra.domain.auth_context import get_auth_context_for_user
+
+Predicate = Callable[[dict[str, Any]], bool]
+
+
+def _always_true(env: dict[str, Any]) -> bool:
+    return True
+
+
+def _always_false(env: dict[str, Any]) -> bool:
+    return False
+
+
+def compile_condition(condition_expr: dict[str, Any] | None) -> Predicate:
+    """
+    把条件表达式编译为判定闭包（语义与 AccessControlService._condition_match 一致）：
+    - all: {k:v} 所有键值必须匹配
+    - any: {k:[v1,v2]} 每个键的取值须在候选列表中
+    """
+    if not condition_expr:
+        return _always_true
+
+    all_items = tuple((condition_expr.get("all") or {}).items())
+    any_cond = condition_expr.get("any") or {}
+    if any(not isinstance(values, list) for values in any_cond.values()):
+        return _always_false
+    any_items = tuple((key, tuple(values)) for key, values in any_cond.items())
+
+    if not all_items and not any_items:
+        return _always_true
+
+    def predicate(env: dict[str, Any]) -> bool:
+        for key, value in all_items:
+            if env.get(key) != value:
+                return False
+        for key, values in any_items:
+            if env.get(key) not in values:
+                return False
+        return True
+
+    return predicate
+
+
+@dataclass(frozen=True)
+class CompiledPolicy:
+    policy_id: int
+    name: str
+    effect: str
+    priority: int
+    predicate: Predicate
+
+    @property
+    def sort_key(self) -> tuple[int, int]:
+        return (self.priority, self.policy_id)
+
+
+class TenantPolicyIndex:
+    """单个租户的策略索引（构建后只读）"""
+
+    def __init__(
+        self,
+        version: int,
+        targets: dict[tuple[str, str], dict[tuple[str, int], tuple[CompiledPolicy, ...]]],
+    ):
+        self.version = version
+        self._targets = targets
+
+    @property
+    def target_count(self) -> int:
+        return len(self._targets)
+
+    def has_target(self, resource: str, action: str) -> bool:
+        return (resource, action) in self._targets
+
+    def needs_roles(self, resource: str, action: str) -> bool:
+        """目标资源是否存在绑定到角色的策略（不存在时无需加载用户角色）"""
+        subjects = self._targets.get((resource, action)) or {}
+        return any(subject_type == PolicySubjectType.ROLE for subject_type, _ in subjects)
+
+    def match(
+        self,
+        resource: str,
+        action: str,
+        user_id: int,
+        role_ids: tuple[int, ...],
+        env: dict[str, Any],
+    ) -> CompiledPolicy | None:
+        """按优先级返回第一条条件匹配的策略，无匹配时返回 None"""
+        subjects = self._targets.get((resource, action))
+        if not subjects:
+            return None
+
+        candidates: dict[int, CompiledPolicy] = {}
+        for policy in subjects.get((PolicySubjectType.USER, user_id), ()):
+            candidates[policy.policy_id] = policy
+        for role_id in role_ids:
+            for policy in subjects.get((PolicySubjectType.ROLE, role_id), ()):
+                candidates[policy.policy_id] = policy
+        if not candidates:
+            return None
+
+        for policy in sorted(candidates.values(), key=lambda p: p.sort_key):
+            if policy.predicate(env):
+                return policy
+        return None
+
+
+class PolicyIndexRegistry:
+    """策略索引注册表（进程内，按租户懒加载，版本变化后重建）"""
+
+    _indexes: dict[int, TenantPolicyIndex] = {}
+    _locks: dict[int, asyncio.Lock] = {}
+    # (tenant_id, user_id) -> (用户级版本, 租户级版本, 角色ID)
+    _user_roles: dict[tuple[int, int], tuple[int, int, tuple[int, ...]]] = {}
+
+    @classmethod
+    async def get_index(cls, tenant_id: int) -> TenantPolicyIndex:
+        version = await PermissionVersionService.get_cached_version(tenant_id=tenant_id, user_id=None)
+        index = cls._indexes.get(tenant_id)
+        if index is not None and index.version == version:
+            return index
+
+        lock = cls._locks.setdefault(tenant_id, asyncio.Lock())
+        async with lock:
+            index = cls._indexes.get(tenant_id)
+            if index is None or index.version != version:
+                index = await cls._build_index(tenant_id, version)
+                cls._indexes[tenant_id] = index
+        return index
+
+    @classmethod
+    async def get_user_role_ids(cls, tenant_id: int, user_id: int) -> tuple[int, ...]:
+        """获取用户角色ID（用户级或租户级版本变化后重新加载）"""
+        from core.models.user_role import UserRole
+
+        context = get_auth_context_for_user(user_id)
+        if context is not None and context.role_ids is not None:
+            return context.role_ids
+
+        user_version = await PermissionVersionService.get_cached_version(tenant_id=tenant_id, user_id=user_id)
+        tenant_version = await PermissionVersionService.get_cached_version(tenant_id=tenant_id, user_id=None)
+        cached = cls._user_roles.get((tenant_id, user_id))
+        if cached is not None and cached[0] == user_version and cached[1] == tenant_version:
+            role_ids = cached[2]
+        else:
+            role_ids = tuple(await UserRole.filter(user_id=user_id).values_list("role_id", flat=True))
+            cls._user_roles[(tenant_id, user_id)] = (user_version, tenant_version, role_ids)
+        if context is not None:
+            context.role_ids = role_ids
+        return role_ids
+
+    @classmethod
+    def invalidate(cls, tenant_id: int | None = None) -> None:
+        if tenant_id is None:
+            cls._indexes.clear()
+            cls._user_roles.clear()
+            return
+        cls._indexes.pop(tenant_id, None)
+        for key in [key for key in cls._user_roles if key[0] == tenant_id]:
+            cls._user_roles.pop(key, None)
+
+    @classmethod
+    def get_stats(cls) -> dict[str, Any]:
+        return {
+            "tenants": len(cls._indexes),
+            "targets": sum(index.target_count for index in cls._indexes.values()),
+            "cached_user_roles": len(cls._user_roles),
+        }
+
+    @staticmethod
+    async def _build_index(tenant_id: int, version: int) -> TenantPolicyIndex:
+        policies = await AccessPolicy.filter(
+            tenant_id=tenant_id,
+            enabled=True,
+            deleted_at__isnull=True,
+        ).values("id", "name", "effect", "priority", "target_resource", "target_action", "condition_expr")
+        if not policies:
+            return TenantPolicyIndex(version, {})
+
+        compiled = {
+            row["id"]: (
+                (row["target_resource"], row["target_action"]),
+                CompiledPolicy(
+                    policy_id=row["id"],
+                    name=row["name"],
+                    effect=row["effect"],
+                    priority=row["priority"],
+                    predicate=compile_condition(row["condition_expr"]),
+                ),
+            )
+            for row in policies
+        }
+        bindings = await PolicyBinding.filter(policy_id__in=list(compiled)).values(
+            "policy_id", "subject_type", "subject_id"
+        )
+
+        grouped: dict[tuple[str, str], dict[tuple[str, int], list[CompiledPolicy]]] = {}
+        for binding in bindings:
+            target, policy = compiled[binding["policy_id"]]
+            subject = (binding["subject_type"], binding["subject_id"])
+            grouped.setdefault(target, {}).setdefault(subject, []).append(policy)
+
+        targets = {
+            target: {
+                subject: tuple(sorted(items, key=lambda p: p.sort_key))
+                for subject, items in subjects.items()
+            }
+            for target, subjects in grouped.items()
+        }
+        return TenantPolicyIndex(version, targets)
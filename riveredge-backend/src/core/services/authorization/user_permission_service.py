@@ -7,7 +7,8 @@ Author: Luigi Lu
 Date: 2026-01-27
 """
 
-from typing import List, Set
+from collections import OrderedDict
+from typing import Iterable, List, Set
 
 from core.models.user_role import UserRole
 from core.models.role_permission import RolePermission
@@ -15,9 +16,23 @@ from core.models.role import Role
 from core.models.permission import Permission
 from core.services.authorization.permission_version_service import PermissionVersionService
 from infra.models.user import User
+from infra.domain.auth_context import get_auth_context_for_user
 from infra.exceptions.exceptions import AuthorizationError
 from infra.infrastructure.cache.cache_manager import cache_manager
 
+# 进程内权限集合缓存（LRU，键包含租户级与用户级权限版本，版本变化后自然失效）
+LOCAL_PERMISSION_CACHE_SIZE = 10000
+_local_permissions: "OrderedDict[str, frozenset]" = OrderedDict()
+
+
+def _remember_permissions(cache_key: str, permission_codes: Iterable[str]) -> Set[str]:
+    """写入进程内权限缓存并返回可修改的副本"""
+    _local_permissions[cache_key] = frozenset(permission_codes)
+    _local_permissions.move_to_end(cache_key)
+    while len(_local_permissions) > LOCAL_PERMISSION_CACHE_SIZE:
+        _local_permissions.popitem(last=False)
+    return set(_local_permissions[cache_key])
+
 
 class UserPermissionService:
     """
@@ -46,11 +61,19 @@ class UserPermissionService:
         Returns:
             Set[str]: 权限代码集合
         """
-        version = await PermissionVersionService.get_version(tenant_id=tenant_id, user_id=user_id)
-        cache_key = f"{tenant_id}:{user_id}:v{version}:inactive:{int(include_inactive_roles)}"
+        user_version = await PermissionVersionService.get_cached_version(tenant_id=tenant_id, user_id=user_id)
+        tenant_version = await PermissionVersionService.get_cached_version(tenant_id=tenant_id, user_id=None)
+        cache_key = f"{tenant_id}:{user_id}:v{tenant_version}.{user_version}:inactive:{int(include_inactive_roles)}"
+        context = get_auth_context_for_user(user_id)
+        if context is not None:
+            context.permission_version = f"{tenant_version}.{user_version}"
+        local = _local_permissions.get(cache_key)
+        if local is not None:
+            _local_permissions.move_to_end(cache_key)
+            return set(local)
         cached = await cache_manager.get("permissions", cache_key)
         if isinstance(cached, list):
-            return set(cached)
+            return _remember_permissions(cache_key, cached)
 
         # 获取用户的所有角色（通过UserRole关联表）
         user_roles_query = UserRole.filter(user_id=user_id)
@@ -64,7 +87,7 @@ class UserPermissionService:
 
         if not user_roles:
             await cache_manager.set("permissions", cache_key, [], ttl=1800)
-            return set()
+            return _remember_permissions(cache_key, [])
 
         role_ids = [ur.role_id for ur in user_roles]
         role_permissions_query = RolePermission.filter(role_id__in=role_ids)
@@ -93,8 +116,17 @@ class UserPermissionService:
             permission_codes |= {p.code for p in all_permissions if p.code}
 
         await cache_manager.set("permissions", cache_key, sorted(permission_codes), ttl=1800)
-        return permission_codes
+        return _remember_permissions(cache_key, permission_codes)
     
+    @staticmethod
+    async def _is_admin_user(user_id: int) -> bool:
+        """是否为组织管理员或平台管理员（当前请求用户直接使用认证上下文，不再查询）"""
+        context = get_auth_context_for_user(user_id)
+        if context is not None:
+            return context.is_admin
+        user = await User.get_or_none(id=user_id)
+        return bool(user and (user.is_tenant_admin or user.is_infra_admin))
+
     @staticmethod
     async def has_permission(
         user_id: int,
@@ -115,10 +147,8 @@ class UserPermissionService:
             bool: 如果用户具有权限则返回True，否则返回False
         """
         # 如果是组织管理员或平台管理员，默认拥有所有权限
-        user = await User.get_or_none(id=user_id)
-        if user:
-            if user.is_tenant_admin or user.is_infra_admin:
-                return True
+        if await UserPermissionService._is_admin_user(user_id):
+            return True
         
         # 获取用户的所有权限
         user_permissions = await UserPermissionService.get_user_permissions(
@@ -150,10 +180,8 @@ class UserPermissionService:
             bool: 如果用户具有任意一个权限则返回True，否则返回False
         """
         # 如果是组织管理员或平台管理员，默认拥有所有权限
-        user = await User.get_or_none(id=user_id)
-        if user:
-            if user.is_tenant_admin or user.is_infra_admin:
-                return True
+        if await UserPermissionService._is_admin_user(user_id):
+            return True
         
         # 获取用户的所有权限
         user_permissions = await UserPermissionService.get_user_permissions(
@@ -185,10 +213,8 @@ class UserPermissionService:
             bool: 如果用户具有所有权限则返回True，否则返回False
         """
         # 如果是组织管理员或平台管理员，默认拥有所有权限
-        user = await User.get_or_none(id=user_id)
-        if user:
-            if user.is_tenant_admin or user.is_infra_admin:
-                return True
+        if await UserPermissionService._is_admin_user(user_id):
+            return True
         
         # 获取用户的所有权限
         user_permissions = await UserPermissionService.get_user_permissions(
@@ -0,0 +1,233 @@
+"""
+自定义字段投影模块
+
+自定义字段值以 EAV 方式存储在 core_custom_field_values（数据源），同时冗余一份到业务主表的
+custom_fields JSONB 列（{字段代码: 值}，由迁移添加并建 GIN jsonb_path_ops 索引），供列表页按
+自定义字段过滤时直接走主表索引，而不必逐行关联 EAV 表：
+- sync_projection：写入字段值时在同一事务内合并更新主表 custom_fields 列
+- remove_projection_key / rename_projection_key：删除字段或修改字段代码时同步移除、重命名投影中的键
+- apply_custom_field_filters：在列表查询上追加自定义字段过滤（@> 包含查询，如工单列表的 custom_fields 参数）
+
+投影表登记在 core.config.custom_field_pages.CUSTOM_FIELD_PROJECTION_TABLES（新增投影表须新增迁移添加列）。
+custom_fields 列不在各业务模型上声明，只通过原生 SQL 读写；未登记投影的表不做同步。
+可通过 CUSTOM_FIELD_PROJECTION_ENABLED 配置关闭投影同步。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from tortoise import Tortoise
+from tortoise.expressions import RawSQL
+
+from core.config.custom_field_pages import CUSTOM_FIELD_PROJECTION_TABLES
+from core.models.custom_field import CustomField
+from infra.config.infra_config import infra_settings
+from infra.exceptions.exceptions import ValidationError
+
+PROJECTION_TABLES = CUSTOM_FIELD_PROJECTION_TABLES
+
+
+def projection_enabled() -> bool:
+    return infra_settings.CUSTOM_FIELD_PROJECTION_ENABLED
+
+
+def get_projection_table(record_table: str) -> Optional[str]:
+    """获取逻辑表名对应的物理主表（未登记投影时返回 None）"""
+    return PROJECTION_TABLES.get(record_table)
+
+
+def to_json_value(value: Any) -> Any:
+    """将字段值（CustomFieldValue.get_value() 的结果）转换为可写入 JSONB 的值"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def _sql_literal(value: Any) -> str:
+    return "'" + json.dumps(value, ensure_ascii=False, default=str).replace("'", "''") + "'"
+
+
+async def sync_projection(
+    tenant_id: int,
+    record_table: str,
+    record_id: int,
+    values_by_code: Dict[str, Any],
+    using_db: Any = None,
+) -> None:
+    """
+    将字段值合并写入主表 custom_fields 列
+
+    Args:
+        tenant_id: 组织ID
+        record_table: 关联表名（逻辑表名）
+        record_id: 关联记录ID
+        values_by_code: 字段代码 -> 字段值
+        using_db: 事务连接（可选，与字段值写入放在同一事务）
+    """
+    table = get_projection_table(record_table)
+    if not table or not values_by_code or not projection_enabled():
+        return
+
+    payload = json.dumps(
+        {code: to_json_value(value) for code, value in values_by_code.items()},
+        ensure_ascii=False,
+        default=str,
+    )
+    conn = using_db or Tortoise.get_connection("default")
+    await conn.execute_query(
+        f'UPDATE "{table}" SET "custom_fields" = COALESCE("custom_fields", \'{{}}\'::jsonb) || $1::jsonb '
+        f'WHERE "id" = $2 AND "tenant_id" = $3',
+        [payload, record_id, tenant_id],
+    )
+
+
+async def remove_projection_key(
+    tenant_id: int,
+    record_table: str,
+    code: str,
+    using_db: Any = None,
+) -> None:
+    """
+    从主表 custom_fields 列中移除字段（删除字段时调用）
+
+    Args:
+        tenant_id: 组织ID
+        record_table: 关联表名（逻辑表名）
+        code: 字段代码
+        using_db: 事务连接（可选）
+    """
+    table = get_projection_table(record_table)
+    if not table or not projection_enabled():
+        return
+
+    conn = using_db or Tortoise.get_connection("default")
+    await conn.execute_query(
+        f'UPDATE "{table}" SET "custom_fields" = "custom_fields" - $1::text '
+        f'WHERE "tenant_id" = $2 AND "custom_fields" ? $1::text',
+        [code, tenant_id],
+    )
+
+
+async def rename_projection_key(
+    tenant_id: int,
+    record_table: str,
+    old_code: str,
+    new_code: str,
+    using_db: Any = None,
+) -> None:
+    """
+    重命名主表 custom_fields 列中的字段键（修改字段代码时调用）
+
+    Args:
+        tenant_id: 组织ID
+        record_table: 关联表名（逻辑表名）
+        old_code: 原字段代码
+        new_code: 新字段代码
+        using_db: 事务连接（可选）
+    """
+    table = get_projection_table(record_table)
+    if not table or old_code == new_code or not projection_enabled():
+        return
+
+    conn = using_db or Tortoise.get_connection("default")
+    await conn.execute_query(
+        f'UPDATE "{table}" SET "custom_fields" = ("custom_fields" - $1::text) '
+        f'|| jsonb_build_object($2::text, "custom_fields" -> $1::text) '
+        f'WHERE "tenant_id" = $3 AND "custom_fields" ? $1::text',
+        [old_code, new_code, tenant_id],
+    )
+
+
+def parse_custom_field_filters(text: Optional[str]) -> Optional[Dict[str, Any]]:
+    """
+    解析列表接口的自定义字段过滤参数（JSON：{"字段代码": 值或值列表}）
+
+    Raises:
+        ValidationError: 参数不是 JSON 对象时抛出
+    """
+    if not text:
+        return None
+    try:
+        filters = json.loads(text)
+    except ValueError:
+        filters = None
+    if not isinstance(filters, dict):
+        raise ValidationError('自定义字段过滤参数须为 JSON 对象，如 {"字段代码": 值}')
+    return filters or None
+
+
+def _filter_value(field_type: str, value: Any) -> Any:
+    """过滤值按字段类型转换为与投影中一致的 JSON 值（数值统一为数字、文本统一为字符串）"""
+    if value is None:
+        return None
+    try:
+        if field_type == "number":
+            return float(value)
+        if field_type in ("text", "textarea", "select"):
+            return str(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"自定义字段过滤值 {value} 无效")
+    return to_json_value(value)
+
+
+async def apply_custom_field_filters(
+    query: Any,
+    tenant_id: int,
+    record_table: str,
+    filters: Optional[Dict[str, Any]] = None,
+) -> Any:
+    """
+    在列表查询上追加自定义字段过滤
+
+    过滤为等值匹配（列表值表示任一匹配），走 custom_fields 的 GIN 索引。
+
+    Args:
+        query: 主表 QuerySet（如 WorkOrder.filter(tenant_id=...)）
+        tenant_id: 组织ID
+        record_table: 关联表名（逻辑表名）
+        filters: 字段代码 -> 过滤值
+
+    Returns:
+        QuerySet: 追加过滤后的查询
+
+    Raises:
+        ValidationError: 表未登记投影、投影已关闭或字段代码不存在时抛出
+    """
+    if not filters:
+        return query
+    if not get_projection_table(record_table) or not projection_enabled():
+        raise ValidationError(f"表 {record_table} 不支持按自定义字段过滤")
+
+    fields = {
+        field.code: field
+        for field in await CustomField.filter(
+            tenant_id=tenant_id,
+            table_name=record_table,
+            code__in=list(filters),
+            is_active=True,
+            deleted_at__isnull=True,
+        )
+    }
+    column = f'"{query.model._meta.db_table}"."custom_fields"'
+
+    for index, (code, value) in enumerate(filters.items()):
+        field = fields.get(code)
+        if field is None or not field.is_searchable:
+            raise ValidationError(f"自定义字段 {code} 不存在或不可搜索")
+        candidates: List[Any] = value if isinstance(value, (list, tuple, set)) else [value]
+        if not candidates:
+            continue
+        condition = " OR ".join(
+            f"{column} @> {_sql_literal({code: _filter_value(field.field_type, item)})}::jsonb"
+            for item in candidates
+        )
+        alias = f"cf_filter_{index}"
+        query = query.annotate(**{alias: RawSQL(f"({condition})")}).filter(**{alias: True})
+    return query
@@ -6,13 +6,20 @@
 
 from typing import Optional, List, Dict, Any, Tuple
 from uuid import UUID
+from tortoise import timezone
 from tortoise.exceptions import IntegrityError
+from tortoise.transactions import in_transaction
 
 from core.models.custom_field import CustomField
 from core.models.custom_field_value import CustomFieldValue
 from core.models.data_dictionary import DataDictionary
 from core.models.dictionary_item import DictionaryItem
 from core.schemas.custom_field import CustomFieldCreate, CustomFieldUpdate
+from core.services.business.custom_field_projection import (
+    remove_projection_key,
+    rename_projection_key,
+    sync_projection,
+)
 from core.services.data.data_dictionary_service import DataDictionaryService
 from infra.exceptions.exceptions import NotFoundError, ValidationError
 
@@ -244,10 +251,15 @@ class CustomFieldService:
                 config["options"] = options
                 update_data["config"] = config
         
+        old_code = field.code
         for key, value in update_data.items():
             setattr(field, key, value)
         
-        await field.save()
+        async with in_transaction("default") as conn:
+            await field.save(using_db=conn)
+            if field.code != old_code:
+                # 字段代码变更：同步重命名主表投影中的键
+                await rename_projection_key(tenant_id, field.table_name, old_code, field.code, using_db=conn)
         return field
     
     @staticmethod
@@ -267,10 +279,12 @@ class CustomFieldService:
         """
         field = await CustomFieldService.get_field_by_uuid(tenant_id, uuid)
         
-        # 软删除
+        # 软删除，并从主表投影中移除该字段
         from datetime import datetime
         field.deleted_at = datetime.now()
-        await field.save()
+        async with in_transaction("default") as conn:
+            await field.save(using_db=conn)
+            await remove_projection_key(tenant_id, field.table_name, field.code, using_db=conn)
     
     @staticmethod
     async def set_field_value(
@@ -316,7 +330,13 @@ class CustomFieldService:
             )
         
         field_value.set_value(value, field.field_type)
-        await field_value.save()
+        async with in_transaction("default") as conn:
+            await field_value.save(using_db=conn)
+            await sync_projection(
+                tenant_id, record_table, record_id,
+                {field.code: field_value.get_value()},
+                using_db=conn,
+            )
         
         return field_value
     
@@ -337,26 +357,54 @@ class CustomFieldService:
         Returns:
             Dict[str, Any]: 字段值字典（key 为字段代码，value 为字段值）
         """
+        values = await CustomFieldService.get_field_values_bulk(
+            tenant_id, record_table, [record_id]
+        )
+        return values[record_id]
+    
+    @staticmethod
+    async def get_field_values_bulk(
+        tenant_id: int,
+        record_table: str,
+        record_ids: List[int]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        批量获取多条记录的自定义字段值（列表页一页记录只查询一次字段值）
+        
+        Args:
+            tenant_id: 组织ID
+            record_table: 关联表名
+            record_ids: 关联记录ID列表
+            
+        Returns:
+            Dict[int, Dict[str, Any]]: 记录ID -> 字段值字典（key 为字段代码，未设置的字段为 None）
+        """
+        record_ids = list(dict.fromkeys(record_ids))
         fields = await CustomFieldService.get_fields_by_table(
             tenant_id, record_table, is_active=True
         )
         
         if not fields:
-            return {}
+            return {record_id: {} for record_id in record_ids}
         
-        field_ids = [f.id for f in fields]
+        result = {
+            record_id: {field.code: None for field in fields}
+            for record_id in record_ids
+        }
+        if not record_ids:
+            return result
+        
+        code_by_id = {field.id: field.code for field in fields}
         values = await CustomFieldValue.filter(
-            custom_field_id__in=field_ids,
+            custom_field_id__in=list(code_by_id),
             tenant_id=tenant_id,
             record_table=record_table,
-            record_id=record_id,
+            record_id__in=record_ids,
             deleted_at__isnull=True
         )
         
-        result = {}
-        for field in fields:
-            value_obj = next((v for v in values if v.custom_field_id == field.id), None)
-            result[field.code] = value_obj.get_value() if value_obj else None
+        for value_obj in values:
+            result[value_obj.record_id][code_by_id[value_obj.custom_field_id]] = value_obj.get_value()
         
         return result
     
@@ -370,6 +418,8 @@ class CustomFieldService:
         """
         批量设置字段值
         
+        一次查询字段定义与已有字段值，在同一事务内批量更新/批量插入，并同步主表 custom_fields 投影。
+        
         Args:
             tenant_id: 组织ID
             record_table: 关联表名
@@ -378,15 +428,64 @@ class CustomFieldService:
             
         Returns:
             Dict[str, Any]: 设置结果
+            
+        Raises:
+            NotFoundError: 当字段不存在时抛出
         """
-        for item in values:
-            await CustomFieldService.set_field_value(
+        if not values:
+            return {"success": True, "count": 0}
+        
+        # 同一字段出现多次时以最后一次为准
+        value_by_uuid = {str(item["field_uuid"]): item["value"] for item in values}
+        fields = await CustomField.filter(
+            tenant_id=tenant_id,
+            uuid__in=list(value_by_uuid),
+            deleted_at__isnull=True
+        )
+        if len(fields) != len(value_by_uuid):
+            raise NotFoundError("自定义字段不存在")
+        
+        existing = {
+            value_obj.custom_field_id: value_obj
+            for value_obj in await CustomFieldValue.filter(
+                custom_field_id__in=[field.id for field in fields],
                 tenant_id=tenant_id,
-                field_uuid=item["field_uuid"],
                 record_table=record_table,
                 record_id=record_id,
-                value=item["value"]
+                deleted_at__isnull=True
             )
+        }
+        
+        now = timezone.now()
+        to_update: List[CustomFieldValue] = []
+        to_create: List[CustomFieldValue] = []
+        projection: Dict[str, Any] = {}
+        for field in fields:
+            field_value = existing.get(field.id)
+            if field_value is None:
+                field_value = CustomFieldValue(
+                    custom_field_id=field.id,
+                    tenant_id=tenant_id,
+                    record_table=record_table,
+                    record_id=record_id
+                )
+                to_create.append(field_value)
+            else:
+                field_value.updated_at = now
+                to_update.append(field_value)
+            field_value.set_value(value_by_uuid[str(field.uuid)], field.field_type)
+            projection[field.code] = field_value.get_value()
+        
+        async with in_transaction("default") as conn:
+            if to_update:
+                await CustomFieldValue.bulk_update(
+                    to_update,
+                    fields=["value_text", "value_number", "value_date", "value_json", "updated_at"],
+                    using_db=conn
+                )
+            if to_create:
+                await CustomFieldValue.bulk_create(to_create, using_db=conn)
+            await sync_projection(tenant_id, record_table, record_id, projection, using_db=conn)
         
         return {"success": True, "count": len(values)}
     
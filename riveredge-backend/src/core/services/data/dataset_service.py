@@ -562,22 +562,12 @@ class DatasetService:
             # 将 :param 占位符转为 asyncpg 的 $1,$2 格式
             sql, args = self._convert_named_params_to_positional(sql, query_params)
 
-            # 使用 asyncpg 直接连接执行
-            import asyncpg
-            config = integration_config.get_config()
-            conn = await asyncpg.connect(
-                host=config.get('host', 'localhost'),
-                port=int(config.get('port', 5432)),
-                user=config.get('user') or config.get('username', ''),
-                password=config.get('password', ''),
-                database=config.get('database', ''),
-            )
-            try:
+            # 从外部数据源共享连接池借出连接执行（按连接参数复用，空闲超时后关闭）
+            from infra.infrastructure.database.pool_manager import external_connection
+            async with external_connection(integration_config.get_config()) as conn:
                 rows = await conn.fetch(sql, *args) if args else await conn.fetch(sql)
                 columns = list(rows[0].keys()) if rows else []
                 data = [dict(row) for row in rows]
-            finally:
-                await conn.close()
             
             return {
                 'success': True,
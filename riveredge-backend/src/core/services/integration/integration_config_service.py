@@ -474,28 +474,16 @@ class IntegrationConfigService:
             }
         config = integration.get_config()
         try:
-            import asyncpg
-            host = config.get("host", "localhost")
-            port = config.get("port", 5432)
-            database = config.get("database", "")
-            user = config.get("user") or config.get("username", "")
-            password = config.get("password", "")
-            conn = await asyncpg.connect(
-                host=host,
-                port=int(port),
-                user=user,
-                password=password,
-                database=database,
-            )
-            rows = await conn.fetch(
-                """
-                SELECT table_schema, table_name, column_name, data_type, ordinal_position
-                FROM information_schema.columns
-                WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
-                ORDER BY table_schema, table_name, ordinal_position
-                """
-            )
-            await conn.close()
+            from infra.infrastructure.database.pool_manager import external_connection
+            async with external_connection(config) as conn:
+                rows = await conn.fetch(
+                    """
+                    SELECT table_schema, table_name, column_name, data_type, ordinal_position
+                    FROM information_schema.columns
+                    WHERE table_schema NOT IN ('pg_catalog', 'information_schema')
+                    ORDER BY table_schema, table_name, ordinal_position
+                    """
+                )
             tables_map: Dict[str, List[Dict[str, str]]] = {}
             for row in rows:
                 tbl = f"{row['table_schema']}.{row['table_name']}"
@@ -518,21 +506,9 @@ class IntegrationConfigService:
         """测试 PostgreSQL 连接（config: host, port, database, user/username, password）"""
         config = integration.get_config()
         try:
-            import asyncpg
-            host = config.get("host", "localhost")
-            port = config.get("port", 5432)
-            database = config.get("database", "")
-            user = config.get("user") or config.get("username", "")
-            password = config.get("password", "")
-            conn = await asyncpg.connect(
-                host=host,
-                port=int(port),
-                user=user,
-                password=password,
-                database=database,
-            )
-            await conn.fetchval("SELECT 1")
-            await conn.close()
+            from infra.infrastructure.database.pool_manager import external_connection
+            async with external_connection(config) as conn:
+                await conn.fetchval("SELECT 1")
             return {"success": True, "message": "PostgreSQL 连接成功"}
         except Exception as e:
             return {"success": False, "message": f"PostgreSQL 连接失败: {str(e)}"}
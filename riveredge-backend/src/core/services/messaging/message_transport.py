@@ -0,0 +1,414 @@
+"""
+消息发送传输层模块
+
+为消息发送工作流提供连接复用、微批发送与限流：
+- 邮件：按 SMTP 配置（主机、端口、账号、TLS）维护连接池，复用已登录的会话，连接被服务器关闭时自动重连
+- 短信/推送：共享 httpx.AsyncClient（连接池 + keep-alive），按配置中的 api_url 调用 HTTP 服务商
+- 限流：按消息配置的令牌桶限流（配置项 rate_limit_per_second），避免触发服务商频控；
+  未配置限速时不限流，配置变更后按新的限速重建令牌桶
+- 微批：同一进程内并发到达的消息合并为一批发送，发送状态批量回写 MessageLog
+
+传输层（MessageTransport）不访问数据库，可用本地假 SMTP/HTTP 服务验证
+（见 scripts/check_message_transport.py 与 tests/test_message_transport.py）。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from email.mime.text import MIMEText
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+import aiosmtplib
+import httpx
+from loguru import logger
+
+from infra.config.infra_config import infra_settings
+
+# 每个 SMTP 配置的最大连接数
+SMTP_POOL_SIZE = infra_settings.MESSAGE_SMTP_POOL_SIZE
+# 空闲连接保留时间（秒），大多数 SMTP 服务器会在几分钟后关闭空闲会话
+SMTP_IDLE_TIMEOUT = infra_settings.MESSAGE_SMTP_IDLE_TIMEOUT
+# 单个连接最多发送的邮件数（部分服务器限制单会话邮件数）
+SMTP_MAX_MESSAGES_PER_CONNECTION = infra_settings.MESSAGE_SMTP_MAX_MESSAGES_PER_CONNECTION
+SMTP_TIMEOUT = 10
+HTTP_TIMEOUT = 10
+HTTP_MAX_CONNECTIONS = infra_settings.MESSAGE_HTTP_MAX_CONNECTIONS
+# 未在配置中指定 rate_limit_per_second 时，每个服务商配置的默认限速（条/秒，默认 0 表示不限速）
+DEFAULT_RATE_LIMIT = infra_settings.MESSAGE_PROVIDER_RATE_LIMIT
+# 微批：单批最大条数与等待凑批的最长时间（秒）
+BATCH_SIZE = infra_settings.MESSAGE_SEND_BATCH_SIZE
+BATCH_WINDOW = infra_settings.MESSAGE_SEND_BATCH_WINDOW
+
+
+@dataclass
+class OutboundMessage:
+    """
+    待发送的消息
+
+    config_key 用于区分连接池与限流桶（通常为消息配置UUID），发送后写入 success/error。
+    """
+    type: str
+    recipient: str
+    content: str
+    subject: Optional[str] = None
+    config: Dict[str, Any] = field(default_factory=dict)
+    config_key: str = ""
+    message_log: Any = None
+    success: bool = False
+    message: Optional[str] = None
+    error: Optional[str] = None
+
+
+class TokenBucket:
+    """令牌桶限流器（rate 条/秒，允许 burst 条突发）"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = float(rate)
+        self.burst = burst
+        self.capacity = max(float(burst or rate), 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class _PooledSMTP:
+    __slots__ = ("client", "sent", "last_used")
+
+    def __init__(self, client: aiosmtplib.SMTP):
+        self.client = client
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPPool:
+    """
+    单个 SMTP 配置的连接池
+
+    连接建立并登录后放回池中复用；空闲超时、达到单连接邮件上限或发送出错的连接会被关闭。
+    """
+
+    def __init__(self, config: Dict[str, Any], size: int = SMTP_POOL_SIZE):
+        self.host = config.get("smtp_host")
+        self.port = config.get("smtp_port", 465)
+        self.username = config.get("smtp_username")
+        self.password = config.get("smtp_password")
+        self.use_tls = config.get("smtp_use_tls", True)
+        self.size = size
+        self.connections_opened = 0
+        self.last_used = time.monotonic()
+        self._idle: Deque[_PooledSMTP] = deque()
+        self._semaphore = asyncio.Semaphore(size)
+
+    async def _connect(self) -> _PooledSMTP:
+        client = aiosmtplib.SMTP(
+            hostname=self.host,
+            port=self.port,
+            use_tls=self.use_tls,
+            timeout=SMTP_TIMEOUT,
+        )
+        await client.connect()
+        if self.username and self.password:
+            await client.login(self.username, self.password)
+        self.connections_opened += 1
+        return _PooledSMTP(client)
+
+    async def _acquire(self) -> _PooledSMTP:
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.client.is_connected and time.monotonic() - pooled.last_used < SMTP_IDLE_TIMEOUT:
+                return pooled
+            await self._close(pooled)
+        return await self._connect()
+
+    def _release(self, pooled: _PooledSMTP) -> None:
+        pooled.last_used = self.last_used = time.monotonic()
+        self._idle.append(pooled)
+
+    @staticmethod
+    async def _close(pooled: _PooledSMTP) -> None:
+        try:
+            if pooled.client.is_connected:
+                await pooled.client.quit()
+        except Exception:
+            pooled.client.close()
+
+    async def send(self, message: MIMEText) -> None:
+        """
+        通过池中连接发送邮件
+
+        Raises:
+            aiosmtplib.SMTPException: 发送失败时抛出
+        """
+        async with self._semaphore:
+            pooled = await self._acquire()
+            try:
+                try:
+                    await pooled.client.send_message(message)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # 复用的连接已被服务器关闭，重连后重试一次
+                    await self._close(pooled)
+                    pooled = await self._connect()
+                    await pooled.client.send_message(message)
+            except BaseException:
+                await self._close(pooled)
+                raise
+            pooled.sent += 1
+            if pooled.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+                await self._close(pooled)
+            else:
+                self._release(pooled)
+
+    async def prune(self) -> None:
+        """关闭空闲超时的连接"""
+        now = time.monotonic()
+        keep: Deque[_PooledSMTP] = deque()
+        while self._idle:
+            pooled = self._idle.popleft()
+            if now - pooled.last_used < SMTP_IDLE_TIMEOUT and pooled.client.is_connected:
+                keep.append(pooled)
+            else:
+                await self._close(pooled)
+        self._idle = keep
+
+    @property
+    def idle(self) -> bool:
+        return not self._idle and time.monotonic() - self.last_used >= SMTP_IDLE_TIMEOUT
+
+    async def close(self) -> None:
+        while self._idle:
+            await self._close(self._idle.pop())
+
+
+class MessageTransport:
+    """
+    消息发送传输层
+
+    按消息配置复用 SMTP 连接池、共享 HTTP 客户端并限流，一批消息按服务商分组并发发送。
+    """
+
+    def __init__(self):
+        self._smtp_pools: Dict[Tuple[Any, ...], SMTPPool] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """共享 HTTP 客户端（短信、推送服务商共用连接池）"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=HTTP_MAX_CONNECTIONS,
+                ),
+            )
+        return self._http_client
+
+    def smtp_pool(self, config: Dict[str, Any]) -> SMTPPool:
+        key = (
+            config.get("smtp_host"),
+            config.get("smtp_port", 465),
+            config.get("smtp_username"),
+            config.get("smtp_password"),
+            config.get("smtp_use_tls", True),
+        )
+        pool = self._smtp_pools.get(key)
+        if pool is None:
+            pool = SMTPPool(config)
+            self._smtp_pools[key] = pool
+        return pool
+
+    def _bucket(self, item: OutboundMessage) -> TokenBucket:
+        key = f"{item.type}:{item.config_key}"
+        rate = float(item.config.get("rate_limit_per_second", DEFAULT_RATE_LIMIT) or 0)
+        burst = item.config.get("rate_limit_burst")
+        bucket = self._buckets.get(key)
+        if bucket is None or bucket.rate != rate or bucket.burst != burst:
+            # 首次使用或限速配置已变更：按当前配置重建令牌桶
+            bucket = TokenBucket(rate, burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def send_batch(self, items: List[OutboundMessage]) -> None:
+        """
+        发送一批消息，结果写入各消息的 success/message/error
+
+        不同服务商并发发送，同一服务商受连接池大小与限流约束。
+        """
+        for key, pool in list(self._smtp_pools.items()):
+            await pool.prune()
+            if pool.idle:
+                del self._smtp_pools[key]
+
+        groups: Dict[str, List[OutboundMessage]] = defaultdict(list)
+        for item in items:
+            groups[f"{item.type}:{item.config_key}"].append(item)
+        await asyncio.gather(*(self._send_group(group) for group in groups.values()))
+
+    async def _send_group(self, items: List[OutboundMessage]) -> None:
+        bucket = self._bucket(items[0])
+
+        async def send_one(item: OutboundMessage) -> None:
+            try:
+                await bucket.acquire()
+                await self.send(item)
+            except Exception as e:
+                logger.error(f"发送{item.type}消息失败（接收人：{item.recipient}）: {e}")
+                item.success, item.error = False, str(e)
+
+        await asyncio.gather(*(send_one(item) for item in items))
+
+    async def send(self, item: OutboundMessage) -> None:
+        """发送单条消息（不限流）"""
+        if item.type == "email":
+            await self._send_email(item)
+        elif item.type in ("sms", "push"):
+            await self._send_http(item)
+        elif item.type == "internal":
+            # 站内信已经在创建 MessageLog 时完成
+            item.success, item.message = True, "站内信已创建"
+        else:
+            item.success, item.error = False, f"不支持的消息类型: {item.type}"
+
+    async def _send_email(self, item: OutboundMessage) -> None:
+        config = item.config
+        username = config.get("smtp_username")
+        if not all([config.get("smtp_host"), username, config.get("smtp_password")]):
+            item.success, item.error = False, "邮件配置不完整：缺少 host, username 或 password"
+            return
+
+        message = MIMEText(item.content or "", "html" if config.get("content_type") == "html" else "plain", "utf-8")
+        message["From"] = f"{config.get('from_name', 'RiverEdge')} <{config.get('from_email') or username}>"
+        message["To"] = item.recipient
+        message["Subject"] = item.subject or ""
+        await self.smtp_pool(config).send(message)
+        item.success, item.message = True, "邮件发送成功"
+
+    async def _send_http(self, item: OutboundMessage) -> None:
+        """
+        通过 HTTP 服务商发送短信/推送
+
+        配置 api_url 时以 JSON 调用（method、headers、extra_params 可选），未配置时沿用模拟发送。
+        """
+        config = item.config
+        api_url = config.get("api_url")
+        if not api_url:
+            logger.info(f"发送{item.type}消息到 {item.recipient}（模拟）: {item.subject or item.content}")
+            item.success, item.message = True, "发送成功（模拟）"
+            return
+
+        payload = {
+            **(config.get("extra_params") or {}),
+            "recipient": item.recipient,
+            "subject": item.subject,
+            "content": item.content,
+        }
+        response = await self.http_client.request(
+            config.get("method", "POST"),
+            api_url,
+            json=payload,
+            headers=config.get("headers") or None,
+        )
+        if response.is_success:
+            item.success, item.message = True, "发送成功"
+        else:
+            item.success, item.error = False, f"服务商返回 HTTP {response.status_code}: {response.text[:200]}"
+
+    async def close(self) -> None:
+        """关闭所有 SMTP 连接与共享 HTTP 客户端"""
+        for pool in self._smtp_pools.values():
+            await pool.close()
+        self._smtp_pools.clear()
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+class MessageBatcher:
+    """
+    消息微批发送器
+
+    并发提交的消息在 BATCH_WINDOW 内凑成一批（最多 BATCH_SIZE 条）发送，
+    每批只用一条 SQL 标记发送中、一条批量 UPDATE 回写结果。
+    """
+
+    def __init__(self, transport: MessageTransport):
+        self.transport = transport
+        self._pending: List[Tuple[OutboundMessage, asyncio.Future]] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, item: OutboundMessage) -> OutboundMessage:
+        """提交消息并等待所在批次发送完成"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        if len(self._pending) >= BATCH_SIZE:
+            self._wakeup.set()
+        return await future
+
+    async def _run(self) -> None:
+        while self._pending:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=BATCH_WINDOW)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            batch, self._pending = self._pending[:BATCH_SIZE], self._pending[BATCH_SIZE:]
+            try:
+                await self._process([item for item, _ in batch])
+            except Exception as e:
+                logger.error(f"消息批量发送失败: {e}")
+                for item, _ in batch:
+                    item.success, item.error = False, item.error or str(e)
+            for item, future in batch:
+                if not future.done():
+                    future.set_result(item)
+
+    async def _process(self, items: List[OutboundMessage]) -> None:
+        from core.models.message_log import MessageLog
+
+        logs = [item.message_log for item in items if item.message_log is not None]
+        now = datetime.now()
+        if logs:
+            await MessageLog.filter(id__in=[log.id for log in logs]).update(status="sending", sent_at=now)
+
+        await self.transport.send_batch(items)
+
+        for item in items:
+            log = item.message_log
+            if log is None:
+                continue
+            log.sent_at = now
+            if item.success:
+                log.status = "success"
+                log.error_message = None
+            else:
+                log.status = "failed"
+                log.error_message = item.error or "未知错误"
+        if logs:
+            await MessageLog.bulk_update(logs, fields=["status", "error_message", "sent_at"])
+
+
+message_transport = MessageTransport()
+message_batcher = MessageBatcher(message_transport)
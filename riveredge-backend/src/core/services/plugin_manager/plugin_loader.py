@@ -9,6 +9,7 @@ from pathlib import Path
 from typing import Dict, List, Any, Optional
 from fastapi import APIRouter
 
+from core.utils.startup_manifest import APPS_DIR, get_startup_manifest
 from .plugin_discovery import PluginDiscoveryService, DiscoveredPlugin
 
 
@@ -119,6 +120,23 @@ class PluginLoaderService:
             api_module_path: API模块路径
             routers: 路由列表
         """
+        if plugin.path.resolve().parent == APPS_DIR:
+            # 内置应用：按启动清单中预先解析的 APIRouter 对象名导入，不再遍历目录与 dir() 扫描
+            depth = api_module_path.count(".") + 3
+            for submodule_path, router_names in get_startup_manifest().api_routers(plugin.code):
+                if submodule_path.count(".") + 1 != depth or not submodule_path.startswith(f"{api_module_path}."):
+                    continue
+                try:
+                    module = importlib.import_module(submodule_path)
+                    for attr_name in router_names:
+                        attr = getattr(module, attr_name, None)
+                        if isinstance(attr, APIRouter):
+                            routers.append(attr)
+                            print(f"  📍 从 {submodule_path} 注册路由: {attr_name}")
+                except Exception as e:
+                    print(f"  ⚠️ 加载子模块 {submodule_path} 失败: {str(e)}")
+            return
+
         api_dir = plugin.path / "api"
 
         if not api_dir.exists():
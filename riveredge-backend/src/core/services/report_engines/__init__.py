@@ -6,6 +6,7 @@ Date: 2025-01-15
 """
 
 from .excel_engine import ExcelEngine
+from .render_pool import RenderPool, render_pool
 
 # PDFEngine 在 Windows 上可能不可用（需要 GTK+ 运行时），使用延迟导入
 try:
@@ -13,6 +14,8 @@ try:
     __all__ = [
         "ExcelEngine",
         "PDFEngine",
+        "RenderPool",
+        "render_pool",
     ]
 except (ImportError, OSError):
     # 如果 PDFEngine 导入失败（通常是 WeasyPrint 依赖问题），只导出 ExcelEngine
@@ -22,5 +25,7 @@ except (ImportError, OSError):
     PDFEngine = None  # type: ignore
     __all__ = [
         "ExcelEngine",
+        "RenderPool",
+        "render_pool",
     ]
 
@@ -0,0 +1,243 @@
+"""
+报表渲染进程池模块
+
+ExcelEngine（openpyxl）与 PDFEngine（WeasyPrint）均为 CPU 密集的同步调用，直接在请求协程中执行会阻塞
+整个 uvicorn worker 的事件循环。本模块提供有界进程池：
+- worker 启动时预导入 openpyxl / WeasyPrint 并预热字体配置（首个 PDF 不再承担字体扫描开销）
+- 按租户轮询出队，单个租户的大量渲染不会饿死其他租户
+- 每租户排队上限、渲染超时
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import asyncio
+import multiprocessing
+import os
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from loguru import logger
+
+from infra.config.infra_config import infra_settings as settings
+from infra.exceptions.exceptions import BusinessLogicError, ValidationError
+
+
+# 渲染进程数（默认 CPU 核数，最多 4 个）
+RENDER_WORKERS = settings.REPORT_RENDER_WORKERS or min(4, os.cpu_count() or 1)
+# 单次渲染超时（秒，含排队时间）
+RENDER_TIMEOUT = settings.REPORT_RENDER_TIMEOUT
+# 每个租户最多排队的渲染任务数
+RENDER_MAX_QUEUED_PER_TENANT = settings.REPORT_RENDER_MAX_QUEUED_PER_TENANT
+
+
+def _init_render_worker() -> None:
+    """
+    渲染进程初始化：预导入渲染库并预热字体
+
+    WeasyPrint 首次渲染需要加载 Pango/fontconfig 并扫描系统字体，在 worker 启动时完成，
+    避免首个请求承担数秒的冷启动开销。
+    """
+    import openpyxl  # noqa: F401
+
+    try:
+        from weasyprint import HTML
+        HTML(string="<p style=\"font-family: 'Microsoft YaHei', Arial, sans-serif\">预热</p>").write_pdf()
+    except Exception as e:
+        # WeasyPrint 不可用时仅 Excel 渲染可用，PDF 渲染会返回友好错误
+        logger.debug(f"渲染进程 WeasyPrint 预热跳过: {e}")
+
+
+def _ping_render_worker() -> int:
+    """空任务，用于提前拉起 worker 进程"""
+    return os.getpid()
+
+
+def render_report_bytes(format: str, config: Dict[str, Any], data: Dict[str, Any]) -> bytes:
+    """
+    渲染报表为字节（在渲染进程中执行，也可在当前进程内联调用）
+
+    Args:
+        format: 输出格式（excel/pdf）
+        config: 报表配置
+        data: 报表数据
+
+    Returns:
+        bytes: 报表文件内容
+    """
+    from core.services.report_engines import ExcelEngine, PDFEngine
+
+    if format == "excel":
+        return ExcelEngine().generate(config, data).getvalue()
+    if format == "pdf":
+        if PDFEngine is None:
+            raise RuntimeError(
+                "PDF 生成功能不可用。"
+                "在 Windows 上需要安装 GTK+ 运行时库。"
+                "请参考：https://doc.courtbouillon.org/weasyprint/stable/first_steps.html#installation"
+            )
+        return PDFEngine().generate(config, data).getvalue()
+    raise ValueError(f"不支持的格式: {format}")
+
+
+class RenderPool:
+    """
+    报表渲染进程池
+
+    进程池懒加载创建（spawn 方式，避免 fork 继承事件循环与数据库连接），
+    调度在事件循环线程内完成，无需加锁。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = RENDER_WORKERS,
+        timeout: int = RENDER_TIMEOUT,
+        max_queued_per_tenant: int = RENDER_MAX_QUEUED_PER_TENANT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_queued_per_tenant = max_queued_per_tenant
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 租户ID -> 待渲染任务队列；OrderedDict 顺序即轮询顺序
+        self._queues: "OrderedDict[int, Deque[Tuple[str, Dict[str, Any], Dict[str, Any], asyncio.Future]]]" = OrderedDict()
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """获取（必要时创建）进程池"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_render_worker,
+            )
+            logger.info(f"报表渲染进程池已创建: {self.max_workers} 个 worker")
+        return self._executor
+
+    def warm_up(self) -> None:
+        """提前拉起全部 worker 进程（完成预导入与字体预热）"""
+        executor = self._get_executor()
+        for _ in range(self.max_workers):
+            executor.submit(_ping_render_worker)
+
+    def shutdown(self) -> None:
+        """关闭进程池（应用关闭时调用）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(
+        self,
+        tenant_id: int,
+        format: str,
+        config: Dict[str, Any],
+        data: Dict[str, Any],
+        timeout: Optional[int] = None,
+    ) -> bytes:
+        """
+        提交渲染任务并等待结果
+
+        Args:
+            tenant_id: 租户ID（用于公平调度与排队上限）
+            format: 输出格式（excel/pdf）
+            config: 报表配置
+            data: 报表数据
+            timeout: 超时秒数（默认 RENDER_TIMEOUT，含排队时间）
+
+        Returns:
+            bytes: 报表文件内容
+
+        Raises:
+            ValidationError: 租户排队任务已达上限时抛出
+            BusinessLogicError: 渲染超时时抛出
+        """
+        queue = self._queues.get(tenant_id)
+        if queue is not None and len(queue) >= self.max_queued_per_tenant:
+            raise ValidationError("报表渲染任务过多，请稍后再试")
+
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        job = (format, config, data, future)
+        self._queues.setdefault(tenant_id, deque()).append(job)
+        self._dispatch()
+
+        timeout = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            self._timed_out += 1
+            # 仍在排队的任务直接移除；已在 worker 中执行的任务会继续占用槽位直到结束，结果被丢弃
+            queue = self._queues.get(tenant_id)
+            if queue is not None and job in queue:
+                queue.remove(job)
+                if not queue:
+                    del self._queues[tenant_id]
+            future.cancel()
+            raise BusinessLogicError(f"报表渲染超时（{timeout} 秒）")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取进程池运行状态"""
+        return {
+            "max_workers": self.max_workers,
+            "running": self._running,
+            "queued": {tenant_id: len(queue) for tenant_id, queue in self._queues.items()},
+            "completed": self._completed,
+            "failed": self._failed,
+            "timed_out": self._timed_out,
+        }
+
+    def _dispatch(self) -> None:
+        """按租户轮询把排队任务派发到空闲 worker"""
+        loop = asyncio.get_running_loop()
+        while self._running < self.max_workers and self._queues:
+            tenant_id, queue = next(iter(self._queues.items()))
+            format, config, data, future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(tenant_id)
+            else:
+                del self._queues[tenant_id]
+            if future.done():
+                continue
+
+            self._running += 1
+            executor = self._get_executor()
+            exec_future = loop.run_in_executor(executor, render_report_bytes, format, config, data)
+            exec_future.add_done_callback(partial(self._on_done, future, executor))
+
+    def _on_done(
+        self,
+        future: asyncio.Future,
+        executor: ProcessPoolExecutor,
+        exec_future: asyncio.Future,
+    ) -> None:
+        """worker 完成回调：回传结果并继续派发"""
+        self._running -= 1
+        if exec_future.cancelled():
+            if not future.done():
+                future.cancel()
+        else:
+            error = exec_future.exception()
+            if error is not None:
+                self._failed += 1
+                if isinstance(error, BrokenProcessPool):
+                    # worker 异常退出（如内存不足被杀），回收损坏的进程池并在下次派发时重建
+                    # （同一损坏进程池的其余任务回调不会影响已重建的新进程池）
+                    if self._executor is executor:
+                        logger.error(f"报表渲染进程池异常，将重建: {error}")
+                        self._executor = None
+                    executor.shutdown(wait=False, cancel_futures=True)
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                self._completed += 1
+                if not future.done():
+                    future.set_result(exec_future.result())
+        self._dispatch()
+
+
+# 全局渲染进程池（每个 uvicorn worker 一个）
+render_pool = RenderPool()
@@ -7,8 +7,12 @@ Author: Luigi Lu
 Date: 2025-01-15
 """
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+import asyncio
+import os
+import socket
+import uuid
+from typing import List, Optional, Dict, Any, Set
+from datetime import datetime, timedelta
 
 from core.models.report_template import ReportTemplate
 from core.models.integration_config import IntegrationConfig
@@ -20,7 +24,9 @@ from core.schemas.report import (
     ReportConfig,
 )
 from core.services.base import BaseService
-from core.services.report_engines import ExcelEngine
+from core.services.report_engines.render_pool import RENDER_TIMEOUT, render_pool, render_report_bytes
+from core.services.file.file_service import FileService
+from infra.infrastructure.cache.cache_manager import cache_manager
 from infra.exceptions.exceptions import NotFoundError, ValidationError
 from loguru import logger
 import httpx
@@ -31,6 +37,55 @@ try:
 except ImportError:
     PDFEngine = None  # type: ignore
 
+# 不超过该行数的报表在请求协程内直接渲染（进程间序列化开销大于渲染本身）
+INLINE_RENDER_MAX_ROWS = {"excel": 2000, "pdf": 200}
+# 超过该行数的报表默认转为后台任务，接口立即返回任务ID
+ASYNC_RENDER_MIN_ROWS = {"excel": 50000, "pdf": 3000}
+# 报表渲染任务状态缓存
+RENDER_JOB_CACHE_NAMESPACE = "report_render_job"
+RENDER_JOB_TTL = 3600
+# 未结束的渲染任务超过该时长（渲染超时 + 保存文件余量）视为已中断
+RENDER_JOB_ORPHAN_SECONDS = RENDER_TIMEOUT + 60
+
+# 当前进程标识（主机:进程号:启动标记），记录在渲染任务中用于识别进程重启后遗留的任务
+RENDER_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+REPORT_FILE_EXTENSIONS = {"excel": "xlsx", "pdf": "pdf"}
+
+# 后台渲染任务引用（防止任务对象被垃圾回收）
+_background_render_tasks: Set[asyncio.Task] = set()
+
+
+def _is_orphaned_render_job(job: Dict[str, Any]) -> bool:
+    """
+    判断渲染任务是否已中断
+
+    未结束的任务满足任一条件即视为中断：
+    - 由本机进程创建，且该进程已退出（或进程号已被当前进程复用）
+    - 创建后超过 RENDER_JOB_ORPHAN_SECONDS 仍未结束（其他主机的进程无法探测存活）
+    """
+    if job.get("status") not in ("pending", "running"):
+        return False
+    worker = job.get("worker") or ""
+    if worker and worker != RENDER_WORKER_ID:
+        host, _, rest = worker.partition(":")
+        pid_text = rest.partition(":")[0]
+        if host == socket.gethostname() and pid_text.isdigit():
+            pid = int(pid_text)
+            if pid == os.getpid():
+                return True
+            try:
+                os.kill(pid, 0)
+            except ProcessLookupError:
+                return True
+            except PermissionError:
+                pass
+    try:
+        created_at = datetime.fromisoformat(job["created_at"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return datetime.now() - created_at > timedelta(seconds=RENDER_JOB_ORPHAN_SECONDS)
+
 
 class ReportTemplateService(BaseService):
     """
@@ -261,6 +316,8 @@ class ReportTemplateService(BaseService):
         """
         生成报表文件
 
+        小报表在当前协程内渲染，较大的报表交给渲染进程池，不阻塞事件循环。
+
         Args:
             tenant_id: 租户ID
             template_id: 模板ID
@@ -270,34 +327,228 @@ class ReportTemplateService(BaseService):
         Returns:
             bytes: 报表文件内容
         """
-        # 获取模板
+        self._check_format(format)
+        template = await self._get_template_or_raise(tenant_id, template_id)
+
+        # 获取数据
+        data = await self._fetch_report_data(template.config, params or {}, tenant_id)
+        return await self._render(tenant_id, format, template.config, data)
+
+    async def render_report(
+        self,
+        tenant_id: int,
+        template_id: int,
+        format: str = "excel",
+        params: Optional[Dict[str, Any]] = None,
+        async_mode: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        渲染报表（按数据规模自动选择同步返回或后台任务）
+
+        Args:
+            tenant_id: 租户ID
+            template_id: 模板ID
+            format: 输出格式（excel/pdf）
+            params: 报表参数（可选）
+            async_mode: 是否后台渲染（None 表示按数据行数自动判断）
+
+        Returns:
+            Dict[str, Any]: 同步渲染返回 {"content": bytes}；后台渲染返回 {"job": 任务信息}
+        """
+        self._check_format(format)
+        template = await self._get_template_or_raise(tenant_id, template_id)
+        data = await self._fetch_report_data(template.config, params or {}, tenant_id)
+
+        if async_mode is None:
+            async_mode = self._estimate_rows(data) >= ASYNC_RENDER_MIN_ROWS[format]
+
+        if not async_mode:
+            return {"content": await self._render(tenant_id, format, template.config, data)}
+
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "template_id": template_id,
+            "format": format,
+            "status": "pending",
+            "file_uuid": None,
+            "download_url": None,
+            "error_message": None,
+            "created_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "worker": RENDER_WORKER_ID,
+        }
+        await self._save_render_job(tenant_id, job)
+
+        task = asyncio.create_task(
+            self._run_render_job(tenant_id, job, template.code, template.config, data)
+        )
+        _background_render_tasks.add(task)
+        task.add_done_callback(_background_render_tasks.discard)
+        return {"job": job}
+
+    async def get_render_job(self, tenant_id: int, job_id: str) -> Dict[str, Any]:
+        """
+        获取报表渲染任务状态
+
+        Args:
+            tenant_id: 租户ID
+            job_id: 任务ID
+
+        Returns:
+            Dict[str, Any]: 任务信息（完成后包含 file_uuid 与 download_url）
+
+        Raises:
+            NotFoundError: 任务不存在或已过期时抛出
+        """
+        job = await cache_manager.get(RENDER_JOB_CACHE_NAMESPACE, f"{tenant_id}:{job_id}")
+        if not job:
+            raise NotFoundError("报表渲染任务不存在或已过期")
+        if _is_orphaned_render_job(job):
+            await self._fail_orphaned_render_job(tenant_id, job)
+        return job
+
+    @staticmethod
+    async def fail_orphaned_render_jobs() -> int:
+        """
+        将进程重启后遗留的未完成渲染任务标记为失败（应用启动时调用）
+
+        后台渲染任务运行在 uvicorn worker 进程内，进程退出后 Redis 中的任务会一直停留在
+        pending/running 状态；本方法扫描任务状态，标记本机已退出进程的任务与超时未结束的任务。
+
+        Returns:
+            int: 标记为失败的任务数
+        """
+        failed = 0
+        for key in await cache_manager.keys(RENDER_JOB_CACHE_NAMESPACE):
+            job = await cache_manager.get(RENDER_JOB_CACHE_NAMESPACE, key)
+            if not job or not _is_orphaned_render_job(job):
+                continue
+            tenant_id = int(key.split(":", 1)[0])
+            await ReportTemplateService._fail_orphaned_render_job(tenant_id, job)
+            failed += 1
+        if failed:
+            logger.warning(f"已将 {failed} 个中断的报表渲染任务标记为失败")
+        return failed
+
+    @staticmethod
+    async def _fail_orphaned_render_job(tenant_id: int, job: Dict[str, Any]) -> None:
+        """标记中断的渲染任务为失败"""
+        job["status"] = "failed"
+        job["error_message"] = "渲染进程已退出，任务中断，请重新生成"
+        job["finished_at"] = datetime.now().isoformat()
+        await ReportTemplateService._save_render_job(tenant_id, job)
+
+    async def _run_render_job(
+        self,
+        tenant_id: int,
+        job: Dict[str, Any],
+        template_code: str,
+        config: Dict[str, Any],
+        data: Dict[str, Any],
+    ) -> None:
+        """
+        执行后台渲染任务，结果保存到文件管理
+
+        Args:
+            tenant_id: 租户ID
+            job: 任务信息
+            template_code: 模板编码（用于文件名）
+            config: 报表配置
+            data: 报表数据
+        """
+        job["status"] = "running"
+        await self._save_render_job(tenant_id, job)
+        try:
+            content = await render_pool.render(tenant_id, job["format"], config, data)
+            file = await FileService.save_uploaded_file(
+                tenant_id=tenant_id,
+                file_content=content,
+                original_name=f"{template_code}.{REPORT_FILE_EXTENSIONS[job['format']]}",
+                category="report",
+                description="报表渲染结果",
+            )
+            job["status"] = "completed"
+            job["file_uuid"] = file.uuid
+            job["download_url"] = f"/api/v1/core/files/{file.uuid}/download"
+        except Exception as e:
+            logger.error(f"报表后台渲染失败: job_id={job['job_id']}, error={e}")
+            job["status"] = "failed"
+            job["error_message"] = str(e)
+        job["finished_at"] = datetime.now().isoformat()
+        await self._save_render_job(tenant_id, job)
+
+    @staticmethod
+    async def _save_render_job(tenant_id: int, job: Dict[str, Any]) -> None:
+        """保存渲染任务状态"""
+        await cache_manager.set(
+            RENDER_JOB_CACHE_NAMESPACE,
+            f"{tenant_id}:{job['job_id']}",
+            job,
+            ttl=RENDER_JOB_TTL,
+        )
+
+    async def _render(
+        self,
+        tenant_id: int,
+        format: str,
+        config: Dict[str, Any],
+        data: Dict[str, Any],
+    ) -> bytes:
+        """
+        渲染报表：小报表内联渲染，其余交给渲染进程池
+
+        Args:
+            tenant_id: 租户ID
+            format: 输出格式（excel/pdf）
+            config: 报表配置
+            data: 报表数据
+
+        Returns:
+            bytes: 报表文件内容
+        """
+        if self._estimate_rows(data) <= INLINE_RENDER_MAX_ROWS[format]:
+            return render_report_bytes(format, config, data)
+        return await render_pool.render(tenant_id, format, config, data)
+
+    def _check_format(self, format: str) -> None:
+        """校验输出格式"""
+        if format not in REPORT_FILE_EXTENSIONS:
+            raise ValidationError(f"不支持的格式: {format}")
+        if format == "pdf" and PDFEngine is None:
+            raise ValidationError(
+                "PDF 生成功能不可用。"
+                "在 Windows 上需要安装 GTK+ 运行时库。"
+                "请参考：https://doc.courtbouillon.org/weasyprint/stable/first_steps.html#installation"
+            )
+
+    async def _get_template_or_raise(self, tenant_id: int, template_id: int) -> ReportTemplate:
+        """获取报表模板，不存在时抛出 NotFoundError"""
         template = await ReportTemplate.get_or_none(
             id=template_id,
             tenant_id=tenant_id,
         )
         if not template:
             raise NotFoundError("报表模板不存在")
+        return template
 
-        # 获取数据
-        data = await self._fetch_report_data(template.config, params or {}, tenant_id)
+    @staticmethod
+    def _estimate_rows(data: Dict[str, Any]) -> int:
+        """
+        估算报表数据行数（用于选择渲染方式）
 
-        # 生成报表
-        if format == "excel":
-            engine = ExcelEngine()
-            file_stream = engine.generate(template.config, data)
-            return file_stream.read()
-        elif format == "pdf":
-            if PDFEngine is None:
-                raise ValidationError(
-                    "PDF 生成功能不可用。"
-                    "在 Windows 上需要安装 GTK+ 运行时库。"
-                    "请参考：https://doc.courtbouillon.org/weasyprint/stable/first_steps.html#installation"
-                )
-            engine = PDFEngine()
-            file_stream = engine.generate(template.config, data)
-            return file_stream.read()
-        else:
-            raise ValidationError(f"不支持的格式: {format}")
+        Args:
+            data: 报表数据（数据源ID -> 数据）
+
+        Returns:
+            int: 各数据源行数之和
+        """
+        total = 0
+        for value in data.values():
+            if isinstance(value, dict):
+                value = value.get("items") or value.get("data") or []
+            if isinstance(value, list):
+                total += len(value)
+        return total
 
     async def _fetch_report_data(
         self,
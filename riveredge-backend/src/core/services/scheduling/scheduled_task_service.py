@@ -12,6 +12,7 @@ from tortoise.exceptions import IntegrityError
 
 from core.models.scheduled_task import ScheduledTask
 from core.schemas.scheduled_task import ScheduledTaskCreate, ScheduledTaskUpdate
+from core.services.scheduling.task_trigger import initial_run_at, validate_trigger
 from core.services.messaging.message_service import MessageService
 from core.schemas.message_template import SendMessageRequest
 from infra.models.user import User
@@ -41,13 +42,14 @@ class ScheduledTaskService:
             ScheduledTask: 创建的定时任务对象
             
         Raises:
-            ValidationError: 当任务代码已存在时抛出
+            ValidationError: 当任务代码已存在或触发器配置无效时抛出
         """
         try:
             scheduled_task = ScheduledTask(
                 tenant_id=tenant_id,
                 **data.model_dump()
             )
+            ScheduledTaskService._schedule_next_run(scheduled_task)
             await scheduled_task.save()
             
             # TODO: 集成 Inngest 函数注册
@@ -149,6 +151,7 @@ class ScheduledTaskService:
             
         Raises:
             NotFoundError: 当定时任务不存在时抛出
+            ValidationError: 当触发器配置无效时抛出
         """
         scheduled_task = await ScheduledTaskService.get_scheduled_task_by_uuid(tenant_id, uuid)
         
@@ -156,6 +159,10 @@ class ScheduledTaskService:
         for key, value in update_data.items():
             setattr(scheduled_task, key, value)
         
+        # 触发器或启用状态变化时重新计算下次触发时间
+        if update_data.keys() & {"trigger_type", "trigger_config", "is_active"}:
+            ScheduledTaskService._schedule_next_run(scheduled_task)
+        
         await scheduled_task.save()
         
         # TODO: 集成 Inngest 函数更新
@@ -220,6 +227,7 @@ class ScheduledTaskService:
         scheduled_task = await ScheduledTaskService.get_scheduled_task_by_uuid(tenant_id, uuid)
         
         scheduled_task.is_active = True
+        ScheduledTaskService._schedule_next_run(scheduled_task)
         await scheduled_task.save()
         
         # TODO: 集成 Inngest 函数注册
@@ -253,6 +261,7 @@ class ScheduledTaskService:
         scheduled_task = await ScheduledTaskService.get_scheduled_task_by_uuid(tenant_id, uuid)
         
         scheduled_task.is_active = False
+        scheduled_task.next_run_at = None
         await scheduled_task.save()
         
         # TODO: 集成 Inngest 函数注销
@@ -263,6 +272,27 @@ class ScheduledTaskService:
         
         return scheduled_task
     
+    @staticmethod
+    def _schedule_next_run(scheduled_task: ScheduledTask) -> None:
+        """
+        计算并设置任务的下次计划触发时间（停用的任务不触发）
+        
+        Raises:
+            ValidationError: 当触发器配置无效时抛出
+        """
+        if not scheduled_task.is_active:
+            scheduled_task.next_run_at = None
+            return
+        try:
+            validate_trigger(scheduled_task.trigger_type, scheduled_task.trigger_config)
+            scheduled_task.next_run_at = initial_run_at(
+                scheduled_task.trigger_type,
+                scheduled_task.trigger_config,
+                last_run_at=scheduled_task.last_run_at,
+            )
+        except ValueError as e:
+            raise ValidationError(f"触发器配置无效: {e}")
+    
     @staticmethod
     async def mark_task_running(
         tenant_id: int,
@@ -0,0 +1,189 @@
+"""
+定时任务触发时间计算模块
+
+根据触发器配置计算定时任务的下次触发时间（next_run_at），供调度器按索引只取到期任务。
+
+错过触发（调度器停机、任务长时间运行等）时的补偿策略：
+- run_once：错过的多次触发合并为一次，立即补跑一次（默认）
+- skip：超过宽限期的触发直接跳过，只按计划时间继续
+- run_all：每次错过的触发都补跑，单次调度最多补 SCHEDULED_TASK_MAX_CATCHUP 次
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+from tortoise import timezone
+
+from core.utils.cron import CronExpression
+from infra.config.infra_config import infra_settings
+
+MISFIRE_RUN_ONCE = "run_once"
+MISFIRE_SKIP = "skip"
+MISFIRE_RUN_ALL = "run_all"
+MISFIRE_POLICIES = (MISFIRE_RUN_ONCE, MISFIRE_SKIP, MISFIRE_RUN_ALL)
+
+# skip 策略下，晚于计划时间多少秒以内仍视为按时触发
+MISFIRE_GRACE_SECONDS = infra_settings.SCHEDULED_TASK_MISFIRE_GRACE_SECONDS
+# run_all 策略下单次调度最多补跑的次数
+MAX_CATCHUP = infra_settings.SCHEDULED_TASK_MAX_CATCHUP
+# 回放错过的 cron 触发时最多逐次计算的次数
+CATCHUP_SCAN_LIMIT = 10000
+CATCHUP_LOOKBACK = timedelta(days=1)
+
+
+@lru_cache(maxsize=1024)
+def _cron(expression: str) -> CronExpression:
+    return CronExpression(expression)
+
+
+def parse_datetime(value: Any) -> Optional[datetime]:
+    """解析 date 触发器的 at 配置（ISO 字符串或 datetime），按当前时区设置对齐"""
+    if not value:
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return _align(value, timezone.now())
+
+
+def _align(value: datetime, reference: datetime) -> datetime:
+    """使 value 与 reference 的时区感知一致（未启用时区时统一为本地 naive 时间）"""
+    if timezone.is_aware(reference):
+        return value if timezone.is_aware(value) else timezone.make_aware(value)
+    return timezone.make_naive(value) if timezone.is_aware(value) else value
+
+
+def validate_trigger(trigger_type: str, trigger_config: Dict[str, Any]) -> None:
+    """
+    校验触发器配置
+
+    Raises:
+        ValueError: 配置无效时抛出
+    """
+    trigger_config = trigger_config or {}
+    if trigger_type == "cron":
+        _cron(trigger_config.get("cron") or "")
+    elif trigger_type == "interval":
+        try:
+            seconds = float(trigger_config.get("seconds") or 0)
+        except (TypeError, ValueError):
+            seconds = 0
+        if seconds <= 0:
+            raise ValueError("间隔触发器的 seconds 必须大于 0")
+    elif trigger_type == "date":
+        try:
+            at_time = parse_datetime(trigger_config.get("at"))
+        except (TypeError, ValueError):
+            at_time = None
+        if at_time is None:
+            raise ValueError("日期触发器的 at 必须是有效的时间")
+
+
+def following(trigger_type: str, trigger_config: Dict[str, Any], after: datetime) -> Optional[datetime]:
+    """
+    计算严格晚于 after 的下一次计划触发时间（date 触发器只有一次，不会有“下一次”）
+
+    cron 表达式按本地时区的墙上时间计算。夏令时切换时：跳过的墙上时间（如 02:30 不存在）
+    按标准时间换算（顺延到切换后），重复的墙上时间只触发一次（按标准时间）。
+    """
+    trigger_config = trigger_config or {}
+    if trigger_type == "cron":
+        cron = _cron(trigger_config.get("cron") or "")
+        if timezone.is_aware(after):
+            local_next = cron.next_after(timezone.localtime(after).replace(tzinfo=None))
+            return timezone.make_aware(local_next, is_dst=False) if local_next else None
+        return cron.next_after(after)
+    if trigger_type == "interval":
+        return after + timedelta(seconds=float(trigger_config.get("seconds") or 0))
+    return None
+
+
+def initial_run_at(
+    trigger_type: str,
+    trigger_config: Dict[str, Any],
+    now: Optional[datetime] = None,
+    last_run_at: Optional[datetime] = None,
+) -> Optional[datetime]:
+    """
+    计算任务启用（创建、修改触发器、启动）时的首次触发时间
+
+    interval 任务从未执行过时立即触发，否则从上次执行时间起算；date 任务执行过后不再触发。
+    """
+    now = now or timezone.now()
+    if trigger_type == "date":
+        if last_run_at:
+            return None
+        return parse_datetime((trigger_config or {}).get("at"))
+    if trigger_type == "interval":
+        if not last_run_at:
+            return now
+        return max(following(trigger_type, trigger_config, _align(last_run_at, now)), now)
+    return following(trigger_type, trigger_config, now)
+
+
+def due_fires(
+    trigger_type: str,
+    trigger_config: Dict[str, Any],
+    next_run_at: datetime,
+    now: datetime,
+    misfire_policy: str = MISFIRE_RUN_ONCE,
+) -> Tuple[List[datetime], Optional[datetime]]:
+    """
+    计算到期任务本次应触发的计划时间，以及触发后的下次计划时间
+
+    Args:
+        trigger_type: 触发器类型
+        trigger_config: 触发器配置
+        next_run_at: 已到期的计划触发时间（<= now）
+        now: 当前时间
+        misfire_policy: 错过触发补偿策略
+
+    Returns:
+        Tuple[List[datetime], Optional[datetime]]: (本次触发的计划时间列表, 新的 next_run_at，None 表示不再触发)
+    """
+    next_run_at = _align(next_run_at, now)
+    if trigger_type == "date":
+        if misfire_policy == MISFIRE_SKIP and now - next_run_at > timedelta(seconds=MISFIRE_GRACE_SECONDS):
+            return [], None
+        return [next_run_at], None
+
+    # 所有已到期的计划时间（只关心最近 MAX_CATCHUP 次，更早的直接合并）
+    missed: List[datetime] = []
+    scheduled = next_run_at
+    if trigger_type == "interval":
+        step = timedelta(seconds=float((trigger_config or {}).get("seconds") or 0))
+        if step <= timedelta(0):
+            return [], None
+        count = int((now - next_run_at) / step) + 1
+        first = max(count - MAX_CATCHUP, 0)
+        missed = [next_run_at + step * index for index in range(first, count)]
+        scheduled = next_run_at + step * count
+    else:
+        steps = 0
+        while scheduled is not None and scheduled <= now:
+            missed.append(scheduled)
+            if len(missed) > MAX_CATCHUP:
+                missed.pop(0)
+            steps += 1
+            if steps == CATCHUP_SCAN_LIMIT:
+                # 停机过久时不再逐次回放，只从最近一天内的计划时间继续计算
+                restart = following(trigger_type, trigger_config, now - CATCHUP_LOOKBACK)
+                if restart is not None and restart <= now:
+                    missed = []
+                    scheduled = restart
+                    continue
+            scheduled = following(trigger_type, trigger_config, scheduled)
+    if not missed:
+        return [], scheduled
+
+    if misfire_policy == MISFIRE_RUN_ALL:
+        fires = missed
+    elif misfire_policy == MISFIRE_SKIP:
+        latest = missed[-1]
+        fires = [latest] if now - latest <= timedelta(seconds=MISFIRE_GRACE_SECONDS) else []
+    else:
+        fires = [missed[-1]]
+    return fires, scheduled
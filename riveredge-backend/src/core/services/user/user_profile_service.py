@@ -10,6 +10,7 @@ from uuid import UUID
 
 from infra.models.user import User
 from infra.models.infra_superadmin import InfraSuperAdmin
+from infra.services.user_directory import UserDirectory
 from core.schemas.user_profile import UserProfileUpdate, UserProfileResponse
 from core.services.file.file_service import FileService
 from infra.exceptions.exceptions import NotFoundError, ValidationError, ValidationError
@@ -234,6 +235,7 @@ class UserProfileService:
                 setattr(user, key, value)
         
         await user.save()
+        await UserDirectory.invalidate(user.tenant_id, user.id)
         
         # 如果头像被删除，异步清理文件管理中的文件
         if avatar_deleted and old_avatar_uuid and tenant_id:
@@ -20,6 +20,7 @@ from core.models.role import Role
 from core.models.user_role import UserRole
 from core.schemas.user import UserCreate, UserUpdate
 from core.services.authorization.permission_version_service import PermissionVersionService
+from infra.services.user_directory import UserDirectory
 from infra.exceptions.exceptions import NotFoundError, ValidationError, AuthorizationError
 
 # 向后兼容别名
@@ -120,7 +121,7 @@ class UserService:
         password_hash = User.hash_password(data.password)
 
         # 创建用户与角色分配放在同一事务中，并显式使用同一连接
-        async with in_transaction() as conn:
+        async with in_transaction("default") as conn:
             user = await User.create(
                 tenant_id=tenant_id,
                 username=data.username,
@@ -402,7 +403,7 @@ class UserService:
                 setattr(user, key, value)
         
         # 用户保存与角色更新放在同一事务中，并显式使用同一连接
-        async with in_transaction() as conn:
+        async with in_transaction("default") as conn:
             await user.save(using_db=conn)
             db_user = await User.filter(
                 uuid=user_uuid,
@@ -439,6 +440,7 @@ class UserService:
                         using_db=conn,
                     )
         await PermissionVersionService.bump(tenant_id=tenant_id, user_id=user.id)
+        await UserDirectory.invalidate(tenant_id, user.id)
         
         # 重新加载关联数据
         await user.fetch_related('roles', 'department', 'position')
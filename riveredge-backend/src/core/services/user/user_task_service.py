@@ -15,6 +15,7 @@ from loguru import logger
 from core.models.approval_instance import ApprovalInstance
 from core.models.approval_task import ApprovalTask
 from core.services.approval.approval_instance_service import ApprovalInstanceService
+from core.services.approval.approval_inbox import get_pending_count
 from core.schemas.approval_instance import ApprovalInstanceAction
 from core.schemas.user_task import (
     UserTaskResponse,
@@ -79,7 +80,7 @@ class UserTaskService:
                         updated_at=inst.updated_at
                     ))
             else:
-                # 查询我的待办任务（基于任务表）
+                # 查询我的待办任务（基于任务表 pending 部分索引；总数与列表同源，物化的待办数只用于角标）
                 query = Q(tenant_id=tenant_id, approver_id=user_id, status="pending")
                 total = await ApprovalTask.filter(query).count()
                 tasks = await ApprovalTask.filter(query).prefetch_related("approval_instance__process").order_by("-created_at").offset(offset).limit(page_size)
@@ -244,12 +245,8 @@ class UserTaskService:
         获取用户任务统计
         """
         try:
-            # 待处理任务（基于任务表）
-            pending = await ApprovalTask.filter(
-                tenant_id=tenant_id,
-                approver_id=user_id,
-                status="pending"
-            ).count()
+            # 待处理任务（角标，取物化的待办数）
+            pending = await get_pending_count(tenant_id, user_id)
             
             # 我提交的任务（基于实例表）
             submitted = await ApprovalInstance.filter(
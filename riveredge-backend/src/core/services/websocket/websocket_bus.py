@@ -0,0 +1,148 @@
+"""
+WebSocket 跨进程消息总线模块
+
+WebSocket 连接只存在于接受它的 uvicorn worker 中。推送通过 Redis pub/sub 广播到所有 worker：
+发布方先投递给本进程连接，再把消息（已序列化的文本）发布到总线；其他 worker 收到后直接投递，
+不再重复序列化。Redis 不可用时退化为仅本进程投递。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, Optional, Union
+
+from loguru import logger
+
+from infra.config.infra_config import infra_settings as settings
+from infra.infrastructure.cache.cache import cache
+
+# 总线频道名
+WEBSOCKET_BUS_CHANNEL = settings.WEBSOCKET_BUS_CHANNEL
+# 订阅断开后的重连间隔（秒）
+WEBSOCKET_BUS_RETRY_INTERVAL = settings.WEBSOCKET_BUS_RETRY_INTERVAL
+
+# 投递目标类型
+TARGET_TENANT = "tenant"
+TARGET_USER = "user"
+TARGET_CHANNEL = "channel"
+
+
+class WebSocketBus:
+    """
+    WebSocket 消息总线
+
+    Attributes:
+        manager: 本进程的 WebSocketManager（提供 deliver 方法）
+        worker_id: 本进程标识（忽略自己发布的消息）
+    """
+
+    def __init__(self, manager: Any):
+        self.manager = manager
+        self.worker_id = uuid.uuid4().hex
+        self._task: Optional[asyncio.Task] = None
+        self._published = 0
+        self._received = 0
+        self._publish_errors = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """启动总线订阅（应用启动时调用，需先连接 Redis）"""
+        if self.running:
+            return
+        if cache._redis is None:
+            logger.warning("Redis 未连接，WebSocket 推送仅投递到本进程连接")
+            return
+        self._task = asyncio.create_task(self._listen())
+        logger.info(f"WebSocket 消息总线已启动: {WEBSOCKET_BUS_CHANNEL} (worker: {self.worker_id})")
+
+    async def stop(self) -> None:
+        """停止总线订阅（应用关闭时调用）"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def publish(self, target: str, key: Union[int, str], message: Dict[str, Any]) -> int:
+        """
+        发布消息：投递到本进程连接并广播到其他 worker
+
+        Args:
+            target: 投递目标类型（tenant / user / channel）
+            key: 租户ID、用户ID或频道名
+            message: 消息内容
+
+        Returns:
+            int: 本进程投递的连接数
+        """
+        text = json.dumps(message, ensure_ascii=False)
+        published_at = time.time()
+        delivered = self.manager.deliver(target, key, text, published_at)
+
+        if cache._redis is not None:
+            envelope = json.dumps(
+                {"o": self.worker_id, "t": target, "k": key, "ts": published_at, "m": text},
+                ensure_ascii=False,
+            )
+            try:
+                await cache._redis.publish(WEBSOCKET_BUS_CHANNEL, envelope)
+                self._published += 1
+            except Exception as e:
+                self._publish_errors += 1
+                logger.warning(f"WebSocket 消息发布到总线失败（仅本进程已投递）: {e}")
+        return delivered
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取总线统计信息"""
+        return {
+            "worker_id": self.worker_id,
+            "running": self.running,
+            "published": self._published,
+            "received": self._received,
+            "publish_errors": self._publish_errors,
+        }
+
+    async def _listen(self) -> None:
+        """订阅总线（断开后自动重连）"""
+        while True:
+            pubsub = cache._redis.pubsub() if cache._redis is not None else None
+            if pubsub is None:
+                await asyncio.sleep(WEBSOCKET_BUS_RETRY_INTERVAL)
+                continue
+            try:
+                await pubsub.subscribe(WEBSOCKET_BUS_CHANNEL)
+                async for item in pubsub.listen():
+                    if item.get("type") == "message":
+                        self._handle(item.get("data"))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"WebSocket 消息总线订阅中断，{WEBSOCKET_BUS_RETRY_INTERVAL} 秒后重连: {e}")
+                await asyncio.sleep(WEBSOCKET_BUS_RETRY_INTERVAL)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _handle(self, data: Any) -> None:
+        """处理总线消息（跳过本进程发布的消息）"""
+        try:
+            envelope = json.loads(data)
+        except (TypeError, ValueError):
+            logger.warning(f"WebSocket 总线消息格式错误: {data!r}")
+            return
+        if envelope.get("o") == self.worker_id:
+            return
+        self._received += 1
+        self.manager.deliver(envelope.get("t"), envelope.get("k"), envelope.get("m"), envelope.get("ts") or time.time())
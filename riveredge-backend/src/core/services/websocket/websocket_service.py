@@ -3,17 +3,120 @@ WebSocket服务模块
 
 提供WebSocket连接管理和实时数据推送功能。
 
+推送采用扇出（fan-out）模式：每条消息只序列化一次，放入各连接的有界发送队列，
+由每个连接独立的发送任务并发写出；队列写满或发送超时的慢连接会被断开，不会拖慢其他连接。
+跨 worker 推送经 WebSocketBus（Redis pub/sub）转发。
+
 Author: Luigi Lu
 Date: 2026-01-27
 """
 
-from typing import Dict, Any, Set, Optional
+from collections import deque
+from typing import Dict, Any, Set, Optional, Iterable, Union
 from fastapi import WebSocket, WebSocketDisconnect
 from loguru import logger
 import json
 import asyncio
+import time
 from datetime import datetime
 
+from core.services.websocket.websocket_bus import (
+    TARGET_CHANNEL,
+    TARGET_TENANT,
+    TARGET_USER,
+    WebSocketBus,
+)
+from infra.config.infra_config import infra_settings as settings
+
+# 每个连接的发送队列长度（写满视为慢连接并断开）
+WEBSOCKET_SEND_QUEUE_SIZE = settings.WEBSOCKET_SEND_QUEUE_SIZE
+# 单条消息发送超时（秒）
+WEBSOCKET_SEND_TIMEOUT = settings.WEBSOCKET_SEND_TIMEOUT
+# 慢连接关闭码（1013: Try Again Later）
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# 投递延迟采样数
+LATENCY_SAMPLE_SIZE = 1000
+
+
+class FanoutStats:
+    """
+    推送统计
+
+    Attributes:
+        messages: 扇出的消息数
+        enqueued: 进入发送队列的消息数
+        delivered: 已发送的消息数
+        evicted: 被断开的慢连接数
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.messages = 0
+        self.enqueued = 0
+        self.delivered = 0
+        self.evicted = 0
+        self.max_latency = 0.0
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLE_SIZE)
+
+    def record_delivery(self, latency: float) -> None:
+        self.delivered += 1
+        self._latencies.append(latency)
+        if latency > self.max_latency:
+            self.max_latency = latency
+
+    def to_dict(self) -> Dict[str, Any]:
+        samples = sorted(self._latencies)
+        avg = sum(samples) / len(samples) if samples else 0.0
+        p95 = samples[int(len(samples) * 0.95) - 1] if samples else 0.0
+        return {
+            "messages": self.messages,
+            "enqueued": self.enqueued,
+            "delivered": self.delivered,
+            "evicted": self.evicted,
+            "latency_avg_ms": round(avg * 1000, 2),
+            "latency_p95_ms": round(p95 * 1000, 2),
+            "latency_max_ms": round(self.max_latency * 1000, 2),
+        }
+
+
+class _ConnectionSender:
+    """
+    单个连接的发送器（有界队列 + 独立发送任务）
+    """
+
+    def __init__(self, manager: "WebSocketManager", connection_id: str, websocket: WebSocket):
+        self.manager = manager
+        self.connection_id = connection_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=WEBSOCKET_SEND_QUEUE_SIZE)
+        self.task = asyncio.create_task(self._run())
+
+    def offer(self, text: str, published_at: float) -> bool:
+        """放入发送队列，队列已满时返回 False"""
+        try:
+            self.queue.put_nowait((text, published_at))
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            text, published_at = await self.queue.get()
+            try:
+                await asyncio.wait_for(self.websocket.send_text(text), timeout=WEBSOCKET_SEND_TIMEOUT)
+            except asyncio.CancelledError:
+                raise
+            except asyncio.TimeoutError:
+                self.manager.evict(self.connection_id, "发送超时")
+                return
+            except Exception as e:
+                logger.error(f"发送消息失败: {self.connection_id}, 错误: {e}")
+                self.manager.disconnect(self.connection_id)
+                return
+            self.manager.stats.record_delivery(max(time.time() - published_at, 0.0))
+
 
 class WebSocketManager:
     """
@@ -33,6 +136,10 @@ class WebSocketManager:
         self.user_connections: Dict[int, Set[str]] = {}
         # 按频道分组：{channel: Set[connection_id]}
         self.channel_connections: Dict[str, Set[str]] = {}
+        # 连接发送器：{connection_id: _ConnectionSender}
+        self._senders: Dict[str, _ConnectionSender] = {}
+        # 推送统计
+        self.stats = FanoutStats()
     
     def generate_connection_id(self, tenant_id: int, user_id: int) -> str:
         """
@@ -66,6 +173,7 @@ class WebSocketManager:
         
         # 存储连接
         self.active_connections[connection_id] = websocket
+        self._senders[connection_id] = _ConnectionSender(self, connection_id, websocket)
         self.connection_info[connection_id] = {
             "tenant_id": tenant_id,
             "user_id": user_id,
@@ -136,12 +244,94 @@ class WebSocketManager:
                 if not self.channel_connections[channel]:
                     del self.channel_connections[channel]
         
+        # 停止发送任务
+        sender = self._senders.pop(connection_id, None)
+        if sender is not None and sender.task is not asyncio.current_task():
+            sender.task.cancel()
+        
         # 移除连接
         del self.active_connections[connection_id]
         del self.connection_info[connection_id]
         
         logger.info(f"WebSocket连接断开: {connection_id}")
     
+    def evict(self, connection_id: str, reason: str):
+        """
+        断开慢连接（发送队列已满或发送超时）
+        
+        Args:
+            connection_id: 连接ID
+            reason: 断开原因
+        """
+        websocket = self.active_connections.get(connection_id)
+        if websocket is None:
+            return
+        self.stats.evicted += 1
+        logger.warning(f"WebSocket慢连接已断开: {connection_id}, 原因: {reason}")
+        self.disconnect(connection_id)
+        asyncio.create_task(self._close_quietly(websocket))
+    
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket):
+        try:
+            await asyncio.wait_for(
+                websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="消息消费过慢"),
+                timeout=WEBSOCKET_SEND_TIMEOUT,
+            )
+        except Exception:
+            pass
+    
+    def _fan_out(self, connection_ids: Iterable[str], text: str, published_at: float) -> int:
+        """
+        把已序列化的消息放入各连接的发送队列
+        
+        Args:
+            connection_ids: 连接ID列表
+            text: 已序列化的消息
+            published_at: 发布时间（time.time()，用于统计投递延迟）
+            
+        Returns:
+            int: 投递的连接数
+        """
+        self.stats.messages += 1
+        delivered = 0
+        for connection_id in list(connection_ids):
+            sender = self._senders.get(connection_id)
+            if sender is None:
+                continue
+            if sender.offer(text, published_at):
+                delivered += 1
+            else:
+                self.evict(connection_id, "发送队列已满")
+        self.stats.enqueued += delivered
+        return delivered
+    
+    def deliver(self, target: str, key: Union[int, str], text: str, published_at: float) -> int:
+        """
+        向本进程内的目标连接投递已序列化的消息
+        
+        Args:
+            target: 投递目标类型（tenant / user / channel）
+            key: 租户ID、用户ID或频道名
+            text: 已序列化的消息
+            published_at: 发布时间
+            
+        Returns:
+            int: 投递的连接数
+        """
+        if target == TARGET_TENANT:
+            connection_ids = self.tenant_connections.get(key)
+        elif target == TARGET_USER:
+            connection_ids = self.user_connections.get(key)
+        elif target == TARGET_CHANNEL:
+            connection_ids = self.channel_connections.get(key)
+        else:
+            logger.warning(f"未知的推送目标类型: {target}")
+            return 0
+        if not connection_ids:
+            return 0
+        return self._fan_out(connection_ids, text, published_at)
+    
     async def send_personal_message(self, connection_id: str, message: Dict[str, Any]):
         """
         发送个人消息
@@ -154,57 +344,37 @@ class WebSocketManager:
             logger.warning(f"连接不存在: {connection_id}")
             return
         
-        websocket = self.active_connections[connection_id]
-        try:
-            await websocket.send_text(json.dumps(message, ensure_ascii=False))
-        except Exception as e:
-            logger.error(f"发送消息失败: {connection_id}, 错误: {e}")
-            self.disconnect(connection_id)
+        self._fan_out([connection_id], json.dumps(message, ensure_ascii=False), time.time())
     
     async def broadcast_to_tenant(self, tenant_id: int, message: Dict[str, Any]):
         """
-        向租户内所有连接广播消息
+        向本进程内租户的所有连接广播消息（跨 worker 推送请使用 WebSocketService）
         
         Args:
             tenant_id: 租户ID
             message: 消息内容
         """
-        if tenant_id not in self.tenant_connections:
-            return
-        
-        connection_ids = list(self.tenant_connections[tenant_id])
-        for connection_id in connection_ids:
-            await self.send_personal_message(connection_id, message)
+        self.deliver(TARGET_TENANT, tenant_id, json.dumps(message, ensure_ascii=False), time.time())
     
     async def broadcast_to_user(self, user_id: int, message: Dict[str, Any]):
         """
-        向用户的所有连接广播消息
+        向本进程内用户的所有连接广播消息（跨 worker 推送请使用 WebSocketService）
         
         Args:
             user_id: 用户ID
             message: 消息内容
         """
-        if user_id not in self.user_connections:
-            return
-        
-        connection_ids = list(self.user_connections[user_id])
-        for connection_id in connection_ids:
-            await self.send_personal_message(connection_id, message)
+        self.deliver(TARGET_USER, user_id, json.dumps(message, ensure_ascii=False), time.time())
     
     async def broadcast_to_channel(self, channel: str, message: Dict[str, Any]):
         """
-        向频道内所有连接广播消息
+        向本进程内频道的所有连接广播消息（跨 worker 推送请使用 WebSocketService）
         
         Args:
             channel: 频道名称
             message: 消息内容
         """
-        if channel not in self.channel_connections:
-            return
-        
-        connection_ids = list(self.channel_connections[channel])
-        for connection_id in connection_ids:
-            await self.send_personal_message(connection_id, message)
+        self.deliver(TARGET_CHANNEL, channel, json.dumps(message, ensure_ascii=False), time.time())
     
     async def subscribe_channel(self, connection_id: str, channel: str):
         """
@@ -262,11 +432,30 @@ class WebSocketManager:
             "users": len(self.user_connections),
             "channels": len(self.channel_connections),
         }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取推送统计信息（含发送队列深度）
+        
+        Returns:
+            Dict[str, Any]: 推送统计信息
+        """
+        depths = [sender.queue.qsize() for sender in self._senders.values()]
+        return {
+            "connections": self.get_connection_count(),
+            **self.stats.to_dict(),
+            "queue_depth_total": sum(depths),
+            "queue_depth_max": max(depths) if depths else 0,
+            "queue_capacity": WEBSOCKET_SEND_QUEUE_SIZE,
+        }
 
 
 # 全局WebSocket管理器实例
 websocket_manager = WebSocketManager()
 
+# 全局WebSocket消息总线实例（跨 worker 推送）
+websocket_bus = WebSocketBus(websocket_manager)
+
 
 class WebSocketService:
     """
@@ -362,7 +551,7 @@ class WebSocketService:
             "data": data,
             "timestamp": datetime.now().isoformat(),
         }
-        await websocket_manager.broadcast_to_tenant(tenant_id, message)
+        await websocket_bus.publish(TARGET_TENANT, tenant_id, message)
     
     @staticmethod
     async def push_to_user(user_id: int, channel: str, data: Dict[str, Any]):
@@ -380,7 +569,7 @@ class WebSocketService:
             "data": data,
             "timestamp": datetime.now().isoformat(),
         }
-        await websocket_manager.broadcast_to_user(user_id, message)
+        await websocket_bus.publish(TARGET_USER, user_id, message)
     
     @staticmethod
     async def push_to_channel(channel: str, data: Dict[str, Any]):
@@ -397,4 +586,22 @@ class WebSocketService:
             "data": data,
             "timestamp": datetime.now().isoformat(),
         }
-        await websocket_manager.broadcast_to_channel(channel, message)
+        await websocket_bus.publish(TARGET_CHANNEL, channel, message)
+    
+    @staticmethod
+    def get_stats() -> Dict[str, Any]:
+        """
+        获取WebSocket推送统计（本进程扇出统计与总线统计）
+        
+        Returns:
+            Dict[str, Any]: 统计信息
+        """
+        return {
+            "fanout": websocket_manager.get_stats(),
+            "bus": websocket_bus.get_stats(),
+        }
+    
+    @staticmethod
+    def reset_stats():
+        """重置推送统计"""
+        websocket_manager.stats.reset()
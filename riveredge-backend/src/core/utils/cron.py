@@ -0,0 +1,177 @@
+"""
+Cron 表达式解析与迭代模块
+
+支持标准 5 段 cron 表达式（分 时 日 月 周）：
+- 通配 *、?，列表 a,b，范围 a-b，步长 */n、a-b/n、a/n
+- 月份与星期名称（JAN-DEC、SUN-SAT），星期 0 与 7 都表示周日
+- 预定义表达式 @yearly/@annually、@monthly、@weekly、@daily/@midnight、@hourly
+- 日与周同时限定时按“或”匹配（与 Vixie cron 一致）
+
+时间按传入的墙上时间计算（精确到分钟），不做时区换算。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import calendar
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+MACROS = {
+    "@yearly": "0 0 1 1 *",
+    "@annually": "0 0 1 1 *",
+    "@monthly": "0 0 1 * *",
+    "@weekly": "0 0 * * 0",
+    "@daily": "0 0 * * *",
+    "@midnight": "0 0 * * *",
+    "@hourly": "0 * * * *",
+}
+
+MONTH_NAMES = {name: index for index, name in enumerate(
+    ("JAN", "FEB", "MAR", "APR", "MAY", "JUN", "JUL", "AUG", "SEP", "OCT", "NOV", "DEC"), start=1
+)}
+WEEKDAY_NAMES = {name: index for index, name in enumerate(("SUN", "MON", "TUE", "WED", "THU", "FRI", "SAT"))}
+
+# 向后搜索的最大年数（如 2 月 30 日这类永远不会触发的表达式）
+MAX_SEARCH_YEARS = 5
+
+
+def _parse_value(token: str, names: Dict[str, int]) -> int:
+    upper = token.upper()
+    if upper in names:
+        return names[upper]
+    return int(token)
+
+
+def _parse_field(
+    expr: str,
+    low: int,
+    high: int,
+    names: Optional[Dict[str, int]] = None,
+) -> Tuple[List[int], bool]:
+    """
+    解析单个字段
+
+    Returns:
+        Tuple[List[int], bool]: (有序取值列表, 是否为通配)
+    """
+    names = names or {}
+    values = set()
+    wildcard = expr in ("*", "?")
+    for part in expr.split(","):
+        if not part:
+            raise ValueError(f"无效的 cron 字段: {expr}")
+        step = 1
+        if "/" in part:
+            part, step_text = part.split("/", 1)
+            step = int(step_text)
+            if step <= 0:
+                raise ValueError(f"无效的 cron 步长: {expr}")
+        if part in ("*", "?"):
+            start, end = low, high
+        elif "-" in part:
+            start_text, end_text = part.split("-", 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            end = high if step > 1 else start
+        if start < low or end > high or start > end:
+            raise ValueError(f"cron 字段超出范围 {low}-{high}: {expr}")
+        values.update(range(start, end + 1, step))
+    return sorted(values), wildcard
+
+
+class CronExpression:
+    """
+    Cron 表达式
+
+    Usage:
+        cron = CronExpression("*/15 8-18 * * MON-FRI")
+        next_time = cron.next_after(datetime.now())
+    """
+
+    __slots__ = ("expression", "minutes", "hours", "days", "months", "weekdays", "_day_wildcard", "_weekday_wildcard")
+
+    def __init__(self, expression: str):
+        """
+        Args:
+            expression: cron 表达式
+
+        Raises:
+            ValueError: 表达式无效时抛出
+        """
+        text = (expression or "").strip()
+        self.expression = text
+        parts = MACROS.get(text.lower(), text).split()
+        if len(parts) != 5:
+            raise ValueError(f"cron 表达式必须为 5 段（分 时 日 月 周）: {expression}")
+        try:
+            self.minutes, _ = _parse_field(parts[0], 0, 59)
+            self.hours, _ = _parse_field(parts[1], 0, 23)
+            days, self._day_wildcard = _parse_field(parts[2], 1, 31)
+            self.months, _ = _parse_field(parts[3], 1, 12, MONTH_NAMES)
+            weekdays, self._weekday_wildcard = _parse_field(parts[4], 0, 7, WEEKDAY_NAMES)
+        except ValueError as e:
+            raise ValueError(f"无效的 cron 表达式 {expression}: {e}") from None
+        self.days = set(days)
+        # cron 星期 0/7=周日，转换为 Python weekday（0=周一）
+        self.weekdays = {(value - 1) % 7 for value in weekdays}
+
+    def _day_matches(self, value: datetime) -> bool:
+        day_ok = value.day in self.days
+        weekday_ok = value.weekday() in self.weekdays
+        if self._day_wildcard or self._weekday_wildcard:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+
+    def matches(self, value: datetime) -> bool:
+        """时间（分钟精度）是否匹配表达式"""
+        return (
+            value.month in self.months
+            and self._day_matches(value)
+            and value.hour in self.hours
+            and value.minute in self.minutes
+        )
+
+    def next_after(self, value: datetime) -> Optional[datetime]:
+        """
+        返回严格晚于 value 的下一个触发时间（保留 value 的 tzinfo），
+        MAX_SEARCH_YEARS 年内无触发时间时返回 None
+        """
+        current = value.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit_year = value.year + MAX_SEARCH_YEARS
+        while current.year <= limit_year:
+            if current.month not in self.months:
+                index = bisect_left(self.months, current.month)
+                if index < len(self.months):
+                    current = current.replace(month=self.months[index], day=1, hour=0, minute=0)
+                else:
+                    current = current.replace(year=current.year + 1, month=self.months[0], day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(current):
+                last_day = calendar.monthrange(current.year, current.month)[1]
+                if current.day >= last_day:
+                    current = (current.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+                else:
+                    current = current.replace(day=current.day + 1, hour=0, minute=0)
+                continue
+            if current.hour not in self.hours:
+                index = bisect_left(self.hours, current.hour)
+                if index < len(self.hours):
+                    current = current.replace(hour=self.hours[index], minute=0)
+                else:
+                    current = current.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            index = bisect_left(self.minutes, current.minute)
+            if index < len(self.minutes):
+                return current.replace(minute=self.minutes[index])
+            current = current.replace(minute=0) + timedelta(hours=1)
+        return None
+
+    def iter_after(self, value: datetime) -> Iterator[datetime]:
+        """从 value 之后依次迭代触发时间"""
+        current = self.next_after(value)
+        while current is not None:
+            yield current
+            current = self.next_after(current)
@@ -0,0 +1,176 @@
+"""
+延迟加载路由工具模块
+
+不常用的路由模块（帮助文档、上线向导、数据质量等）在启动时不导入，只按路由前缀注册一个占位路由：
+第一次访问该前缀时才导入路由模块、注册到应用并移除占位路由，再把请求重新分发给真实路由。
+路由前缀通过解析模块源码中的 `router = APIRouter(prefix=...)` 得到，解析失败时退化为启动时导入。
+
+生成 OpenAPI 文档前会加载全部延迟路由，保证文档完整。
+LAZY_ROUTERS_ENABLED=False 时注册即导入（与原先行为一致）。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import ast
+import importlib
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from loguru import logger
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+from core.utils.startup_profiler import startup_profiler
+from infra.config.infra_config import infra_settings
+
+SRC_DIR = Path(__file__).resolve().parent.parent.parent
+
+
+def _module_file(module_path: str) -> Optional[Path]:
+    base = SRC_DIR.joinpath(*module_path.split("."))
+    for candidate in (base.with_suffix(".py"), base / "__init__.py"):
+        if candidate.exists():
+            return candidate
+    return None
+
+
+def read_router_prefix(module_path: str, attr: str = "router") -> Optional[str]:
+    """
+    解析路由模块源码，获取模块级 `attr = APIRouter(prefix="...")` 的前缀（不导入模块）
+
+    Returns:
+        Optional[str]: 路由前缀，未找到时返回 None
+    """
+    file_path = _module_file(module_path)
+    if file_path is None:
+        return None
+    try:
+        tree = ast.parse(file_path.read_text(encoding="utf-8"))
+    except (SyntaxError, UnicodeDecodeError, OSError):
+        return None
+    for node in tree.body:
+        if not isinstance(node, ast.Assign) or not isinstance(node.value, ast.Call):
+            continue
+        if not any(isinstance(target, ast.Name) and target.id == attr for target in node.targets):
+            continue
+        for keyword in node.value.keywords:
+            if keyword.arg == "prefix" and isinstance(keyword.value, ast.Constant) and isinstance(keyword.value.value, str):
+                return keyword.value.value or None
+    return None
+
+
+class LazyRouterEntry:
+    """延迟加载的路由模块"""
+
+    __slots__ = ("module_path", "attr", "prefix", "path_prefix", "route", "loaded")
+
+    def __init__(self, module_path: str, attr: str, prefix: str, path_prefix: str):
+        self.module_path = module_path
+        self.attr = attr
+        self.prefix = prefix
+        self.path_prefix = path_prefix
+        self.route: Optional["LazyRouterRoute"] = None
+        self.loaded = False
+
+
+class LazyRouterRoute(BaseRoute):
+    """占位路由：匹配路由前缀下的 HTTP 请求，首次命中时加载真实路由并重新分发"""
+
+    def __init__(self, registry: "LazyRouterRegistry", entry: LazyRouterEntry):
+        self.registry = registry
+        self.entry = entry
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        if scope["type"] == "http" and not self.entry.loaded:
+            path = scope.get("path", "")
+            prefix = self.entry.path_prefix
+            if path == prefix or path.startswith(prefix + "/"):
+                return Match.FULL, {}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: Any):
+        raise NoMatchFound(name, path_params)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.registry.load(self.entry)
+        await self.registry.app.router(scope, receive, send)
+
+
+class LazyRouterRegistry:
+    """
+    延迟加载路由注册表
+
+    Attributes:
+        app: FastAPI 应用实例
+        entries: 已登记的延迟路由
+    """
+
+    def __init__(self, app: FastAPI):
+        self.app = app
+        self.entries: List[LazyRouterEntry] = []
+        self._original_openapi: Callable[[], Dict[str, Any]] = app.openapi
+        app.openapi = self._openapi
+
+    def _openapi(self) -> Dict[str, Any]:
+        self.load_all()
+        return self._original_openapi()
+
+    def add(self, module_path: str, prefix: str = "", attr: str = "router") -> LazyRouterEntry:
+        """
+        登记延迟加载的路由模块
+
+        Args:
+            module_path: 路由模块路径（如 core.api.help_documents.help_documents）
+            prefix: include_router 使用的前缀（如 /api/v1/core）
+            attr: 模块中的路由对象名
+
+        Returns:
+            LazyRouterEntry: 登记项
+        """
+        router_prefix = read_router_prefix(module_path, attr)
+        entry = LazyRouterEntry(module_path, attr, prefix, f"{prefix}{router_prefix or ''}")
+        self.entries.append(entry)
+
+        if not router_prefix or not infra_settings.LAZY_ROUTERS_ENABLED:
+            # 无法确定路由前缀或已关闭延迟加载：立即导入
+            self.load(entry)
+            return entry
+
+        entry.route = LazyRouterRoute(self, entry)
+        self.app.router.routes.append(entry.route)
+        return entry
+
+    def load(self, entry: LazyRouterEntry) -> None:
+        """导入路由模块并注册到应用（导入失败时移除占位路由，请求按 404 处理）"""
+        if entry.loaded:
+            return
+        entry.loaded = True
+        started = time.perf_counter()
+        modules_before = len(sys.modules)
+        try:
+            router = getattr(importlib.import_module(entry.module_path), entry.attr)
+            self.app.include_router(router, prefix=entry.prefix)
+        except Exception as e:
+            logger.error(f"❌ 加载路由模块 {entry.module_path} 失败: {e}")
+        finally:
+            if entry.route is not None and entry.route in self.app.router.routes:
+                self.app.router.routes.remove(entry.route)
+            self.app.openapi_schema = None
+
+        if entry.route is not None:
+            duration = time.perf_counter() - started
+            startup_profiler.record_lazy_load(entry.module_path, duration, len(sys.modules) - modules_before)
+            logger.info(f"✅ 延迟加载路由 {entry.module_path}（{entry.path_prefix}），耗时 {duration * 1000:.0f}ms")
+
+    def load_all(self) -> None:
+        """加载全部尚未加载的延迟路由"""
+        for entry in self.entries:
+            self.load(entry)
+
+    def pending(self) -> List[str]:
+        """尚未加载的路由模块"""
+        return [entry.module_path for entry in self.entries if not entry.loaded]
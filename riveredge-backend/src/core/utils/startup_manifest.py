@@ -0,0 +1,262 @@
+"""
+启动清单缓存工具模块
+
+进程启动时需要知道：有哪些插件应用（apps/*/manifest.json）、每个应用有哪些模型模块、路由入口与
+API 子模块中的 APIRouter 对象名。原先这些信息通过 find_spec / import_module 逐个探测得到，
+find_spec 子模块会连带执行父包，导致 worker 启动与扩容都很慢。
+
+本模块只扫描文件系统生成清单（不导入任何应用模块，APIRouter 对象名通过 AST 解析得到），
+并以 apps 目录下相关文件的 (路径, mtime, 大小) 计算指纹：
+- 构建时可运行 scripts/build_startup_manifest.py 预生成
+- 首次启动时若清单不存在或指纹不一致则重新生成并写回
+- 同一进程内只校验一次
+
+清单文件路径由 STARTUP_MANIFEST_PATH 配置（默认 riveredge-backend/.cache/startup_manifest.json），
+STARTUP_MANIFEST_ENABLED=False 时每次启动都重新扫描、不读写文件。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import ast
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+MANIFEST_VERSION = 1
+
+SRC_DIR = Path(__file__).resolve().parent.parent.parent
+APPS_DIR = SRC_DIR / "apps"
+DEFAULT_MANIFEST_PATH = SRC_DIR.parent / ".cache" / "startup_manifest.json"
+
+_manifest: Optional["StartupManifest"] = None
+
+
+def _settings_value(name: str, default: Any) -> Any:
+    """读取配置项（预生成脚本可能在配置不可用的环境运行，此时使用默认值）"""
+    try:
+        from infra.config.infra_config import infra_settings
+    except Exception:
+        return default
+    return getattr(infra_settings, name)
+
+
+def _module_path(file_path: Path) -> str:
+    relative = file_path.relative_to(SRC_DIR).with_suffix("")
+    parts = list(relative.parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _python_files(directory: Path) -> List[Path]:
+    """递归列出目录下的 .py 文件（跳过 __pycache__）"""
+    files: List[Path] = []
+    if not directory.is_dir():
+        return files
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if d != "__pycache__" and not d.startswith("."))
+        files.extend(Path(root) / name for name in sorted(names) if name.endswith(".py"))
+    return files
+
+
+def _tracked_files(apps_dir: Path) -> List[Path]:
+    """参与指纹计算的文件：各应用的 manifest.json、models 与 api 目录下的 .py 文件"""
+    files: List[Path] = []
+    if not apps_dir.is_dir():
+        return files
+    for app_dir in sorted(p for p in apps_dir.iterdir() if p.is_dir() and not p.name.startswith("__")):
+        manifest_file = app_dir / "manifest.json"
+        if manifest_file.exists():
+            files.append(manifest_file)
+        files.extend(_python_files(app_dir / "models"))
+        files.extend(_python_files(app_dir / "api"))
+    return files
+
+
+def compute_fingerprint(apps_dir: Path = APPS_DIR) -> str:
+    """按相关文件的路径、mtime 与大小计算清单指纹"""
+    digest = hashlib.sha1(f"v{MANIFEST_VERSION}".encode())
+    for file_path in _tracked_files(apps_dir):
+        stat = file_path.stat()
+        digest.update(f"{file_path.relative_to(apps_dir)}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def _router_names(file_path: Path) -> List[str]:
+    """解析模块源码中模块级 `xxx = APIRouter(...)` 赋值的变量名"""
+    try:
+        tree = ast.parse(file_path.read_text(encoding="utf-8"))
+    except (SyntaxError, UnicodeDecodeError, OSError):
+        return []
+    names = []
+    for node in tree.body:
+        if not isinstance(node, (ast.Assign, ast.AnnAssign)) or not isinstance(node.value, ast.Call):
+            continue
+        func = node.value.func
+        func_name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+        if func_name != "APIRouter":
+            continue
+        targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+        names.extend(target.id for target in targets if isinstance(target, ast.Name))
+    return names
+
+
+def _scan_app(app_dir: Path) -> Dict[str, Any]:
+    models_dir = app_dir / "models"
+    api_dir = app_dir / "api"
+    model_modules = [_module_path(p) for p in _python_files(models_dir)]
+    api_modules = {
+        _module_path(p): names
+        for p in _python_files(api_dir)
+        if p.name != "__init__.py" and (names := _router_names(p))
+    }
+    router_file = api_dir / "router.py"
+    return {
+        "module_code": app_dir.name,
+        "model_modules": model_modules,
+        "router_module": _module_path(router_file) if router_file.exists() else None,
+        "api_modules": api_modules,
+    }
+
+
+def build_manifest(apps_dir: Path = APPS_DIR) -> Dict[str, Any]:
+    """
+    扫描 apps 目录生成启动清单（不导入任何应用模块）
+
+    Returns:
+        Dict[str, Any]: 清单数据（version、fingerprint、plugins、apps）
+    """
+    plugins: List[Dict[str, Any]] = []
+    apps: Dict[str, Dict[str, Any]] = {}
+    if apps_dir.is_dir():
+        for app_dir in sorted(p for p in apps_dir.iterdir() if p.is_dir() and not p.name.startswith("__")):
+            manifest_file = app_dir / "manifest.json"
+            if manifest_file.exists():
+                try:
+                    with open(manifest_file, "r", encoding="utf-8") as f:
+                        manifest_data = json.load(f)
+                    plugins.append({"dir": app_dir.name, "manifest": manifest_data})
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.warning(f"警告: 无法读取插件 {app_dir.name} 的 manifest.json: {e}")
+            apps[app_dir.name] = _scan_app(app_dir)
+
+    return {
+        "version": MANIFEST_VERSION,
+        "fingerprint": compute_fingerprint(apps_dir),
+        "generated_at": datetime.now().isoformat(),
+        "plugins": plugins,
+        "apps": apps,
+    }
+
+
+class StartupManifest:
+    """
+    启动清单
+
+    Attributes:
+        data: 清单数据
+        source: 清单来源（cache 读取缓存文件 / built 重新扫描生成）
+    """
+
+    def __init__(self, data: Dict[str, Any], source: str):
+        self.data = data
+        self.source = source
+        self._modules = set()
+        for app in data.get("apps", {}).values():
+            self._modules.update(app.get("model_modules", []))
+            self._modules.update(app.get("api_modules", {}).keys())
+            if app.get("router_module"):
+                self._modules.add(app["router_module"])
+
+    def _app(self, app_code: str) -> Dict[str, Any]:
+        return self.data.get("apps", {}).get(app_code.replace("-", "_"), {})
+
+    def plugins(self) -> List[Dict[str, Any]]:
+        """插件 manifest.json 列表（含 _plugin_dir）"""
+        return [
+            {**plugin["manifest"], "_plugin_dir": str(APPS_DIR / plugin["dir"])}
+            for plugin in self.data.get("plugins", [])
+        ]
+
+    def model_modules(self, app_code: str) -> List[str]:
+        """应用的模型模块列表"""
+        return list(self._app(app_code).get("model_modules", []))
+
+    def router_module(self, app_code: str) -> Optional[str]:
+        """应用的路由入口模块（apps.{code}.api.router，不存在时为 None）"""
+        return self._app(app_code).get("router_module")
+
+    def api_routers(self, app_code: str) -> List[Tuple[str, List[str]]]:
+        """应用 API 子模块及其中的 APIRouter 对象名"""
+        return sorted(self._app(app_code).get("api_modules", {}).items())
+
+    def has_module(self, module_path: str) -> bool:
+        """apps 下的模型 / API 模块是否存在"""
+        return module_path in self._modules
+
+
+def _manifest_path() -> Path:
+    return Path(_settings_value("STARTUP_MANIFEST_PATH", None) or DEFAULT_MANIFEST_PATH)
+
+
+def _load_cached(path: Path, fingerprint: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    if data.get("version") != MANIFEST_VERSION or data.get("fingerprint") != fingerprint:
+        return None
+    return data
+
+
+def write_manifest(data: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """原子写入清单文件"""
+    path = path or _manifest_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return path
+
+
+def get_startup_manifest(refresh: bool = False) -> StartupManifest:
+    """
+    获取启动清单（进程内只校验一次；缓存文件指纹不一致时重新扫描并写回）
+
+    Args:
+        refresh: 是否强制重新扫描
+
+    Returns:
+        StartupManifest: 启动清单
+    """
+    global _manifest
+    if _manifest is not None and not refresh:
+        return _manifest
+
+    enabled = bool(_settings_value("STARTUP_MANIFEST_ENABLED", True))
+    path = _manifest_path()
+    data = None
+    if enabled and not refresh:
+        data = _load_cached(path, compute_fingerprint())
+
+    if data is not None:
+        _manifest = StartupManifest(data, source="cache")
+        return _manifest
+
+    data = build_manifest()
+    if enabled:
+        try:
+            write_manifest(data, path)
+            logger.info(f"启动清单已生成: {path}")
+        except OSError as e:
+            logger.warning(f"写入启动清单失败（本次启动仍使用扫描结果）: {e}")
+    _manifest = StartupManifest(data, source="built")
+    return _manifest
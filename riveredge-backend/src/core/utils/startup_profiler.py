@@ -0,0 +1,137 @@
+"""
+启动耗时分析工具模块
+
+按阶段记录进程启动（路由导入、ORM 初始化、应用注册等）的耗时，区分阶段内的模块导入耗时与数据库耗时，
+并记录延迟加载路由的首次导入耗时，供 /health/startup 接口与 scripts/profile_startup.py 输出。
+
+用法：
+    with startup_profiler.phase("导入核心路由"):
+        with startup_profiler.track_import():
+            import ...
+
+    with startup_profiler.track_db():
+        rows = await conn.fetch(...)
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class StartupPhase:
+    """启动阶段耗时记录"""
+
+    __slots__ = ("name", "started", "duration", "import_time", "db_time", "modules_loaded")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.import_time = 0.0
+        self.db_time = 0.0
+        self.modules_loaded = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "duration_ms": round(self.duration * 1000, 1),
+            "import_ms": round(self.import_time * 1000, 1),
+            "db_ms": round(self.db_time * 1000, 1),
+            "modules_loaded": self.modules_loaded,
+        }
+
+
+class StartupProfiler:
+    """
+    启动耗时分析器
+
+    阶段按进入顺序记录；track_import / track_db 的耗时累计到当前（最内层）阶段，
+    不在任何阶段内时累计到“其他”。启动期间代码按顺序执行，不考虑并发归属。
+    """
+
+    def __init__(self):
+        self.created_at = datetime.now()
+        self._origin = time.perf_counter()
+        self._phases: List[StartupPhase] = []
+        self._stack: List[StartupPhase] = []
+        self._lazy_loads: List[Dict[str, Any]] = []
+        self._ready_at: Optional[float] = None
+
+    def _current(self) -> StartupPhase:
+        if self._stack:
+            return self._stack[-1]
+        if not self._phases or self._phases[-1].name != "其他":
+            self._phases.append(StartupPhase("其他"))
+        return self._phases[-1]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[StartupPhase]:
+        """记录一个启动阶段（可嵌套，嵌套阶段的耗时同时计入外层阶段的总耗时）"""
+        record = StartupPhase(name)
+        modules_before = len(sys.modules)
+        self._phases.append(record)
+        self._stack.append(record)
+        try:
+            yield record
+        finally:
+            self._stack.pop()
+            record.duration = time.perf_counter() - record.started
+            record.modules_loaded = len(sys.modules) - modules_before
+
+    @contextmanager
+    def track_import(self) -> Iterator[None]:
+        """将代码块耗时计为当前阶段的模块导入耗时"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current().import_time += time.perf_counter() - started
+
+    @contextmanager
+    def track_db(self) -> Iterator[None]:
+        """将代码块耗时计为当前阶段的数据库耗时（可包裹 await）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current().db_time += time.perf_counter() - started
+
+    def record_lazy_load(self, name: str, duration: float, modules_loaded: int) -> None:
+        """记录延迟加载路由的首次导入"""
+        self._lazy_loads.append({
+            "name": name,
+            "duration_ms": round(duration * 1000, 1),
+            "modules_loaded": modules_loaded,
+            "loaded_at": datetime.now().isoformat(),
+        })
+
+    def mark_ready(self) -> None:
+        """标记启动完成（lifespan 启动阶段结束）"""
+        self._ready_at = time.perf_counter()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        生成启动耗时报告
+
+        Returns:
+            Dict[str, Any]: 启动时间、总耗时、各阶段耗时（含导入与数据库耗时）与延迟加载记录
+        """
+        finished = [phase for phase in self._phases if phase not in self._stack]
+        return {
+            "started_at": self.created_at.isoformat(),
+            "ready": self._ready_at is not None,
+            "total_ms": round(((self._ready_at or time.perf_counter()) - self._origin) * 1000, 1),
+            "import_ms": round(sum(phase.import_time for phase in finished) * 1000, 1),
+            "db_ms": round(sum(phase.db_time for phase in finished) * 1000, 1),
+            "modules_loaded": len(sys.modules),
+            "phases": [phase.to_dict() for phase in finished],
+            "lazy_loads": list(self._lazy_loads),
+        }
+
+
+startup_profiler = StartupProfiler()
@@ -0,0 +1,226 @@
+"""
+流式导出工具模块
+
+提供与数据量无关的恒定内存导出：按主键游标（keyset）分批读取查询集，直接映射字典行（不构建 Pydantic 对象），
+以 CSV 流式写出或 openpyxl 只写模式（write-only）写出 Excel，并以分块字节流返回给 HTTP 响应。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import asyncio
+import csv
+import io
+import os
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from loguru import logger
+from openpyxl import Workbook
+from tortoise.queryset import QuerySet
+
+# 每批读取行数
+EXPORT_BATCH_SIZE = 2000
+# 输出字节块大小
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+
+class ExportColumn:
+    """
+    导出列定义
+
+    Attributes:
+        header: 表头
+        field: 查询字段名（从 values() 结果中取值）
+        formatter: 取值格式化函数（可选，入参为整行字典）
+    """
+
+    def __init__(self, header: str, field: Optional[str] = None, formatter: Optional[Callable[[Dict[str, Any]], Any]] = None):
+        self.header = header
+        self.field = field
+        self.formatter = formatter
+
+    def get_value(self, row: Dict[str, Any]) -> Any:
+        """获取单元格值"""
+        if self.formatter is not None:
+            return self.formatter(row)
+        return row.get(self.field) if self.field else None
+
+
+def format_export_value(value: Any) -> Any:
+    """
+    统一单元格格式：日期时间转为字符串，None 转为空字符串
+
+    Args:
+        value: 原始值
+
+    Returns:
+        Any: 可写入 CSV/Excel 的值
+    """
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, date):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+async def iter_queryset_keyset(
+    queryset: QuerySet,
+    fields: Sequence[str],
+    batch_size: int = EXPORT_BATCH_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    按主键倒序游标分批读取查询集（每批一次查询，不使用 OFFSET）
+
+    Args:
+        queryset: 已应用过滤条件的查询集
+        fields: 需要读取的字段
+        batch_size: 每批行数
+
+    Yields:
+        List[Dict[str, Any]]: 一批字典行
+    """
+    value_fields = list(dict.fromkeys(["id", *fields]))
+    last_id: Optional[int] = None
+    while True:
+        batch_query = queryset if last_id is None else queryset.filter(id__lt=last_id)
+        rows = await batch_query.order_by("-id").limit(batch_size).values(*value_fields)
+        if not rows:
+            break
+        yield rows
+        if len(rows) < batch_size:
+            break
+        last_id = rows[-1]["id"]
+
+
+class StreamExport:
+    """
+    流式导出对象
+
+    由服务层构建（查询集 + 列定义），API 层通过 await open_stream() 取得字节流交给 StreamingResponse。
+    """
+
+    def __init__(
+        self,
+        queryset: QuerySet,
+        columns: List[ExportColumn],
+        filename: str,
+        file_format: str = "xlsx",
+        sheet_title: str = "Sheet1",
+        batch_size: int = EXPORT_BATCH_SIZE,
+    ):
+        if file_format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"不支持的导出格式: {file_format}")
+        self.queryset = queryset
+        self.columns = columns
+        self.file_format = file_format
+        self.filename = f"{filename}.{file_format}"
+        self.sheet_title = sheet_title
+        self.batch_size = batch_size
+
+    @property
+    def media_type(self) -> str:
+        """响应 MIME 类型"""
+        return EXPORT_MEDIA_TYPES[self.file_format]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """响应头（下载文件名，RFC 5987 编码支持中文）"""
+        return {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(self.filename)}"}
+
+    async def open_stream(self) -> AsyncIterator[bytes]:
+        """
+        预读首个字节块后返回字节流
+
+        StreamingResponse 在开始迭代前已发送响应头，迭代中的异常只能中断连接。预读首块使查询与
+        Excel 生成阶段的错误在返回响应前抛出（Excel 在生成完成后才输出首块），由接口返回错误响应；
+        之后的异常记录日志并继续抛出，中断连接，避免客户端收到被截断却看似完整的文件。
+
+        Returns:
+            AsyncIterator[bytes]: 字节流
+        """
+        iterator = self.iter_bytes()
+        try:
+            first = await iterator.__anext__()
+        except StopAsyncIteration:
+            first = b""
+        except BaseException:
+            await iterator.aclose()
+            raise
+        return self._resume_stream(first, iterator)
+
+    async def _resume_stream(self, first: bytes, iterator: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """输出预读的首块与剩余字节块"""
+        try:
+            if first:
+                yield first
+            async for chunk in iterator:
+                yield chunk
+        except Exception as e:
+            logger.error(f"流式导出中断: {self.filename}, error={e}")
+            raise
+        finally:
+            await iterator.aclose()
+
+    def iter_bytes(self) -> AsyncIterator[bytes]:
+        """按格式返回字节流"""
+        if self.file_format == "csv":
+            return self._iter_csv()
+        return self._iter_xlsx()
+
+    async def _iter_rows(self) -> AsyncIterator[List[List[Any]]]:
+        """分批读取并映射为单元格值列表"""
+        fields = [column.field for column in self.columns if column.field]
+        async for rows in iter_queryset_keyset(self.queryset, fields, self.batch_size):
+            yield [[format_export_value(column.get_value(row)) for column in self.columns] for row in rows]
+
+    async def _iter_csv(self) -> AsyncIterator[bytes]:
+        """CSV 流：每批写完即输出（UTF-8 BOM 便于 Excel 识别中文）"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow([column.header for column in self.columns])
+        yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+        async for values in self._iter_rows():
+            buffer.seek(0)
+            buffer.truncate(0)
+            writer.writerows(
+                [[str(v) if isinstance(v, Decimal) else v for v in row] for row in values]
+            )
+            yield buffer.getvalue().encode("utf-8")
+
+    async def _iter_xlsx(self) -> AsyncIterator[bytes]:
+        """
+        Excel 流：openpyxl 只写模式逐行写入（行数据落盘，不驻留内存），
+        保存到临时文件后分块输出并删除
+        """
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(title=self.sheet_title)
+        worksheet.append([column.header for column in self.columns])
+        async for values in self._iter_rows():
+            for row in values:
+                worksheet.append(row)
+
+        fd, path = tempfile.mkstemp(suffix=".xlsx", prefix="riveredge_export_")
+        os.close(fd)
+        try:
+            # 保存时压缩写出 zip，CPU 密集，放到线程中执行以免阻塞事件循环
+            await asyncio.to_thread(workbook.save, path)
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(EXPORT_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            os.remove(path)
@@ -5,17 +5,24 @@ API 依赖模块
 """
 
 from typing import Optional
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 
 from infra.models.user import User
 from infra.models.infra_superadmin import InfraSuperAdmin
-from infra.domain.security.security import get_token_payload
 # 注意：SuperAdmin安全模块已移除
 from infra.domain.security.infra_superadmin_security import (
     get_infra_superadmin_token_payload
 )
 from infra.domain.tenant_context import set_current_tenant_id
+from infra.domain.auth_context import (
+    AUTH_CONTEXT_STATE_KEY,
+    RequestAuthContext,
+    get_request_auth_context,
+    hash_token,
+    set_current_auth_context,
+    verify_token_cached,
+)
 from infra.services.auth_service import AuthService
 
 # OAuth2 密码流（用于从请求头获取 Token）
@@ -31,7 +38,8 @@ infra_superadmin_oauth2_scheme = OAuth2PasswordBearer(
 
 
 async def get_current_user(
-    token: str = Depends(oauth2_scheme)
+    token: str = Depends(oauth2_scheme),
+    request: Request = None,
 ) -> User:
     """
     获取当前用户依赖
@@ -40,8 +48,12 @@ async def get_current_user(
     自动设置组织上下文。
     ⚠️ 关键修复：支持平台超级管理员 Token（全局生效）
     
+    同一请求内只验证一次 Token、只查询一次用户：结果保存为请求认证上下文
+    （request.state.auth_context 与 ContextVar），后续依赖、权限检查和操作日志直接复用。
+    
     Args:
         token: JWT Token（从请求头 Authorization: Bearer <token> 中提取）
+        request: 当前请求（由 FastAPI 注入）
         
     Returns:
         User: 当前用户对象
@@ -65,78 +77,88 @@ async def get_current_user(
             detail="Token缺失",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    logger.debug(f"🔍 get_current_user: 收到 Token，长度: {len(token) if token else 0}")
 
-    # ⚠️ 关键修复：先尝试验证平台超级管理员 Token
-    infra_superadmin_payload = get_infra_superadmin_token_payload(token)
-    if infra_superadmin_payload:
-        # 这是平台超级管理员 Token，允许全局访问
-        # 创建一个虚拟的 User 对象，标记为平台超级管理员
-        from loguru import logger
-        logger.info(f"✅ 检测到平台超级管理员 Token，允许全局访问")
-        
-        # 获取平台超级管理员 ID
-        admin_id = int(infra_superadmin_payload.get("sub"))
-        admin = await InfraSuperAdmin.get_or_none(id=admin_id)
-        if not admin:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="平台超级管理员不存在",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        
-        if not admin.is_active:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="平台超级管理员未激活",
-            )
-        
-        # ⚠️ 关键：为平台超级管理员创建一个虚拟 User 对象
-        # 这个 User 对象用于兼容现有代码，但标记为平台超级管理员
-        # 注意：这里不设置 tenant_id，允许全局访问
-        # 使用 User 模型的构造函数创建临时对象（不保存到数据库）
-        virtual_user = User()
-        # 使用 setattr 确保属性正确设置（Tortoise ORM 模型需要）
-        setattr(virtual_user, 'id', admin_id)
-        setattr(virtual_user, 'username', admin.username)
-        setattr(virtual_user, 'email', getattr(admin, 'email', None))
-        setattr(virtual_user, 'is_active', True)
-        setattr(virtual_user, 'tenant_id', None)  # 平台超级管理员不属于任何租户
-        setattr(virtual_user, 'password_hash', "")  # 虚拟用户不需要密码
-        setattr(virtual_user, 'full_name', getattr(admin, 'full_name', admin.username))
-        # 设置一个标记，表示这是平台超级管理员
-        setattr(virtual_user, '_is_infra_superadmin', True)
-        setattr(virtual_user, '_infra_superadmin_id', admin_id)
-        
-        # 确保 id 属性可以直接访问
-        if not hasattr(virtual_user, 'id') or virtual_user.id is None:
-            virtual_user.id = admin_id
-        
-        return virtual_user
+    # 同一请求已认证（多个依赖共享）
+    context = get_request_auth_context(request)
+    if context is not None and context.token.token_hash == hash_token(token):
+        set_current_auth_context(context)
+        if context.token.tenant_id and not context.is_infra_superadmin:
+            set_current_tenant_id(context.token.tenant_id)
+        return context.user
 
-    # 验证普通用户 Token
-    from loguru import logger
-    logger.debug(f"🔍 开始验证普通用户 Token，Token 长度: {len(token) if token else 0}")
-    payload = get_token_payload(token)
-    if not payload:
-        logger.error(f"❌ 普通用户 Token 验证失败，Token 前50个字符: {token[:50] if token else 'None'}")
+    verified = verify_token_cached(token)
+    if verified is None:
+        logger.error(f"❌ Token 验证失败，Token 前50个字符: {token[:50]}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="无效的 Token",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    logger.debug(f"✅ 普通用户 Token 验证成功，user_id: {payload.get('sub')}, tenant_id: {payload.get('tenant_id')}")
+
+    if verified.is_infra_superadmin:
+        user = await _load_infra_superadmin_user(verified.subject_id)
+    else:
+        user = await _load_tenant_user(verified.subject_id, verified.tenant_id)
+
+    context = RequestAuthContext(token=verified, user=user, tenant_id=None if verified.is_infra_superadmin else verified.tenant_id)
+    set_current_auth_context(context)
+    if request is not None:
+        setattr(request.state, AUTH_CONTEXT_STATE_KEY, context)
+    return user
+
+
+async def _load_infra_superadmin_user(admin_id: int) -> User:
+    """
+    加载平台超级管理员并构建虚拟 User 对象（允许全局访问）
+    """
+    admin = await InfraSuperAdmin.get_or_none(id=admin_id)
+    if not admin:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="平台超级管理员不存在",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    if not admin.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="平台超级管理员未激活",
+        )
     
-    # 获取用户 ID 和组织 ID
-    user_id = int(payload.get("sub"))
-    tenant_id = payload.get("tenant_id")  # ⭐ 关键：从 Token 中获取组织 ID
+    # ⚠️ 关键：为平台超级管理员创建一个虚拟 User 对象
+    # 这个 User 对象用于兼容现有代码，但标记为平台超级管理员
+    # 注意：这里不设置 tenant_id，允许全局访问
+    # 使用 User 模型的构造函数创建临时对象（不保存到数据库）
+    virtual_user = User()
+    # 使用 setattr 确保属性正确设置（Tortoise ORM 模型需要）
+    setattr(virtual_user, 'id', admin_id)
+    setattr(virtual_user, 'username', admin.username)
+    setattr(virtual_user, 'email', getattr(admin, 'email', None))
+    setattr(virtual_user, 'is_active', True)
+    setattr(virtual_user, 'tenant_id', None)  # 平台超级管理员不属于任何租户
+    setattr(virtual_user, 'password_hash', "")  # 虚拟用户不需要密码
+    setattr(virtual_user, 'full_name', getattr(admin, 'full_name', admin.username))
+    # 设置一个标记，表示这是平台超级管理员
+    setattr(virtual_user, '_is_infra_superadmin', True)
+    setattr(virtual_user, '_infra_superadmin_id', admin_id)
     
+    # 确保 id 属性可以直接访问
+    if not hasattr(virtual_user, 'id') or virtual_user.id is None:
+        virtual_user.id = admin_id
+    
+    return virtual_user
+
+
+async def _load_tenant_user(user_id: int, tenant_id: Optional[int]) -> User:
+    """
+    加载普通用户（设置组织上下文并检查激活状态）
+    """
+    from loguru import logger
+
     # 设置组织上下文 ⭐ 关键：自动设置组织上下文
     if tenant_id:
         set_current_tenant_id(tenant_id)
     
-    # 获取用户
-    logger.debug(f"🔍 开始查询用户，user_id: {user_id}")
     user = await User.get_or_none(id=user_id)
     if not user:
         logger.error(f"❌ 用户不存在，user_id: {user_id}")
@@ -145,7 +167,6 @@ async def get_current_user(
             detail="用户不存在",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    logger.debug(f"✅ 用户查询成功，user_id: {user.id}, username: {user.username}, is_active: {user.is_active}")
     
     if not user.is_active:
         logger.error(f"❌ 用户未激活，user_id: {user.id}, username: {user.username}")
@@ -154,7 +175,6 @@ async def get_current_user(
             detail="用户未激活",
         )
     
-    logger.debug(f"✅ get_current_user 返回用户，user_id: {user.id}, username: {user.username}")
     return user
 
 
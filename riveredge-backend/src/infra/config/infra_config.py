@@ -4,7 +4,7 @@
 提供平台级配置的单独管理，独立于系统级配置
 """
 
-from typing import List, Union
+from typing import List, Optional, Union
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -45,6 +45,32 @@ class InfraSettings(BaseSettings):
     DB_PASSWORD: str = Field(default="postgres", description="数据库密码")
     DB_NAME: str = Field(default="riveredge", description="数据库名称")
 
+    # 只读副本配置（未配置 DB_REPLICA_HOST 时不启用读写路由；端口、用户、密码、数据库名为空时沿用主库）
+    DB_REPLICA_HOST: Optional[str] = Field(default=None, description="只读副本主机")
+    DB_REPLICA_ENABLED: bool = Field(default=True, description="是否启用只读副本（已配置 DB_REPLICA_HOST 时）")
+    DB_REPLICA_PORT: Optional[int] = Field(default=None, description="只读副本端口")
+    DB_REPLICA_USER: Optional[str] = Field(default=None, description="只读副本用户")
+    DB_REPLICA_PASSWORD: Optional[str] = Field(default=None, description="只读副本密码")
+    DB_REPLICA_NAME: Optional[str] = Field(default=None, description="只读副本数据库名称")
+    DB_REPLICA_POOL_MAX_SIZE: Optional[int] = Field(default=None, description="只读副本连接池最大连接数（为空时沿用主库）")
+    DB_REPLICA_STICKY_SECONDS: float = Field(default=5, description="组织写入后多少秒内读取回到主库（规避复制延迟）")
+
+    # 数据库连接池配置（DB_POOL_MAX_SIZE 为空时按 DB_CONNECTION_BUDGET 与 worker 数计算，两者都为空时为 20）
+    DB_POOL_MIN_SIZE: int = Field(default=5, description="ORM 连接池最小连接数")
+    DB_POOL_MAX_SIZE: Optional[int] = Field(default=None, description="ORM 连接池最大连接数")
+    DB_CONNECTION_BUDGET: Optional[int] = Field(default=None, description="单实例所有 worker 可用的数据库连接总数（按 WEB_CONCURRENCY 分摊）")
+    DB_POOL_ACQUIRE_TIMEOUT: float = Field(default=30, description="借出连接的超时时间（秒，0 表示不限）")
+    DB_POOL_MAX_QUERIES: int = Field(default=50000, description="单个连接执行多少次查询后重建")
+    DB_POOL_MAX_INACTIVE_LIFETIME: float = Field(default=300.0, description="空闲连接关闭时间（秒）")
+    DB_POOL_COMMAND_TIMEOUT: float = Field(default=60, description="SQL 执行超时时间（秒）")
+    DB_RAW_POOL_MIN_SIZE: int = Field(default=1, description="原生 SQL 连接池最小连接数")
+    DB_RAW_POOL_MAX_SIZE: int = Field(default=5, description="原生 SQL 连接池最大连接数")
+    EXTERNAL_DB_POOL_MAX_SIZE: int = Field(default=3, description="外部数据源单个连接池的最大连接数")
+    EXTERNAL_DB_POOL_IDLE_SECONDS: float = Field(default=600, description="外部数据源连接池空闲多久后关闭（秒）")
+    EXTERNAL_DB_POOL_LIMIT: int = Field(default=20, description="最多保留的外部数据源连接池数量")
+    DB_POOL_WATCHDOG_INTERVAL: float = Field(default=30, description="连接池看门狗检查间隔（秒）")
+    DB_POOL_HOLD_WARN_SECONDS: float = Field(default=10, description="连接占用超过多少秒时告警")
+
     @property
     def DB_URL(self) -> str:
         """
@@ -250,6 +276,70 @@ class InfraSettings(BaseSettings):
     base_url_override: str = Field(default="", alias="BASE_URL", description="文件/图片链接基础URL，不设置则使用相对路径")
     KKFILEVIEW_URL: str = Field(default="http://localhost:8400", description="kkFileView 服务地址")
 
+    # 报表渲染进程池配置
+    REPORT_RENDER_WORKERS: int = Field(default=0, description="报表渲染进程数（0 表示按 CPU 核数，最多 4 个）")
+    REPORT_RENDER_TIMEOUT: int = Field(default=120, description="单次报表渲染超时（秒，含排队时间）")
+    REPORT_RENDER_MAX_QUEUED_PER_TENANT: int = Field(default=10, description="每个组织最多排队的报表渲染任务数")
+    REPORT_RENDER_WARM_UP: bool = Field(default=True, description="启动时预热报表渲染进程（预导入渲染库与字体）")
+
+    # 批次追溯配置
+    TRACEABILITY_USE_GENEALOGY_EDGES: bool = Field(default=True, description="批次追溯是否读取批次谱系边表（关闭时直接查询物料绑定记录）")
+
+    # 业务配置快照配置
+    BUSINESS_CONFIG_VERSION_CHECK_INTERVAL: int = Field(default=5, description="业务配置快照版本号检查间隔（秒），间隔内直接使用进程内快照")
+    BUSINESS_CONFIG_SNAPSHOT_MAX_AGE: int = Field(default=300, description="业务配置快照最长有效期（秒），共享缓存不可用时兜底刷新")
+
+    # 权限版本配置
+    PERMISSION_VERSION_CHECK_INTERVAL: int = Field(default=2, description="权限版本号进程内缓存检查间隔（秒）")
+    PERMISSION_VERSION_FILL_TTL: int = Field(default=300, description="权限版本号缓存未命中回填的有效期（秒）")
+
+    # 认证 Token 缓存配置
+    AUTH_TOKEN_CACHE_TTL: int = Field(default=60, description="已验证 Token 进程内缓存时间（秒，不超过 Token 剩余有效期）")
+    AUTH_TOKEN_CACHE_MAX_SIZE: int = Field(default=20000, description="已验证 Token 进程内缓存最大条目数")
+
+    # 用户目录缓存配置
+    USER_DIRECTORY_VERSION_CHECK_INTERVAL: int = Field(default=5, description="用户目录进程内缓存版本号检查间隔（秒）")
+    USER_DIRECTORY_MAX_USERS_PER_TENANT: int = Field(default=50000, description="用户目录每个组织最多缓存的用户数")
+
+    # WebSocket 配置
+    WEBSOCKET_BUS_CHANNEL: str = Field(default="riveredge:ws:fanout", description="WebSocket 跨进程消息总线 Redis 频道名")
+    WEBSOCKET_BUS_RETRY_INTERVAL: float = Field(default=3, description="WebSocket 消息总线订阅断开后的重连间隔（秒）")
+    WEBSOCKET_SEND_QUEUE_SIZE: int = Field(default=256, description="WebSocket 每个连接的发送队列长度（写满视为慢连接并断开）")
+    WEBSOCKET_SEND_TIMEOUT: float = Field(default=5, description="WebSocket 单条消息发送超时（秒）")
+
+    # 需求计算后台任务配置
+    MRP_JOB_CHUNK_SIZE: int = Field(default=200, description="净算阶段每个分块的物料数（每块一个事务提交并更新断点）")
+    MRP_JOB_EXPLODE_CHECKPOINT_LINES: int = Field(default=50, description="展开阶段每展开多少个需求行写一次断点并检查取消请求")
+    MRP_JOB_TENANT_CONCURRENCY: int = Field(default=2, description="单个组织同时执行的需求计算任务数")
+
+    # 高级排产配置
+    SCHEDULING_HORIZON_DAYS: int = Field(default=90, description="排产周期（天）")
+    SCHEDULING_TIME_BUDGET_SECONDS: float = Field(default=2.0, description="排产局部搜索时间预算（秒）")
+
+    # 定时任务调度配置
+    SCHEDULED_TASK_SCHEDULER_BATCH_SIZE: int = Field(default=200, description="定时任务调度器每批锁定的到期任务数")
+    SCHEDULED_TASK_SCHEDULER_MAX_BATCHES: int = Field(default=20, description="定时任务调度器单次调度最多处理的批数")
+    SCHEDULED_TASK_ERROR_RETRY_SECONDS: int = Field(default=300, description="定时任务触发时间计算失败后的重试间隔（秒）")
+    SCHEDULED_TASK_MISFIRE_GRACE_SECONDS: int = Field(default=60, description="skip 策略下晚于计划时间多少秒以内仍视为按时触发")
+    SCHEDULED_TASK_MAX_CATCHUP: int = Field(default=10, description="run_all 策略下单次调度最多补跑的次数")
+
+    # 消息发送配置
+    MESSAGE_SMTP_POOL_SIZE: int = Field(default=4, description="每个 SMTP 配置的最大连接数")
+    MESSAGE_SMTP_IDLE_TIMEOUT: int = Field(default=60, description="SMTP 空闲连接保留时间（秒）")
+    MESSAGE_SMTP_MAX_MESSAGES_PER_CONNECTION: int = Field(default=100, description="单个 SMTP 连接最多发送的邮件数")
+    MESSAGE_HTTP_MAX_CONNECTIONS: int = Field(default=50, description="短信/推送共享 HTTP 客户端的最大连接数")
+    MESSAGE_PROVIDER_RATE_LIMIT: float = Field(default=0, description="消息配置未指定 rate_limit_per_second 时的默认限速（条/秒，0 表示不限速）")
+    MESSAGE_SEND_BATCH_SIZE: int = Field(default=100, description="消息微批发送的单批最大条数")
+    MESSAGE_SEND_BATCH_WINDOW: float = Field(default=0.05, description="消息微批发送等待凑批的最长时间（秒）")
+
+    # 自定义字段投影配置
+    CUSTOM_FIELD_PROJECTION_ENABLED: bool = Field(default=True, description="是否将自定义字段值同步到业务主表 custom_fields 列（列表按自定义字段过滤）")
+
+    # 启动清单与路由延迟加载配置
+    STARTUP_MANIFEST_ENABLED: bool = Field(default=True, description="是否读写启动清单缓存（关闭时每次启动都重新扫描应用）")
+    STARTUP_MANIFEST_PATH: Optional[str] = Field(default=None, description="启动清单文件路径（为空时使用 riveredge-backend/.cache/startup_manifest.json）")
+    LAZY_ROUTERS_ENABLED: bool = Field(default=True, description="是否延迟导入应用路由模块（首次请求对应前缀时导入）")
+
     @property
     def BASE_URL(self) -> str:
         """
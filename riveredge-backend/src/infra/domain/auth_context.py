@@ -0,0 +1,178 @@
+"""
+请求认证上下文模块
+
+每个请求只验证一次 JWT、只加载一次用户：认证依赖构建 RequestAuthContext 后保存到
+request.state 与 ContextVar，组织依赖、权限服务、操作日志中间件直接复用。
+
+Token 验证结果按 Token 哈希做短时进程内缓存（不超过 Token 过期时间），
+同一 Token 的后续请求无需重复解码验签。用户记录不跨请求缓存，避免用户被禁用或修改后仍使用旧数据。
+"""
+
+import hashlib
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from infra.config.infra_config import infra_settings
+
+# 已验证 Token 缓存时间（秒）
+AUTH_TOKEN_CACHE_TTL = infra_settings.AUTH_TOKEN_CACHE_TTL
+# 已验证 Token 缓存最大条目数
+AUTH_TOKEN_CACHE_MAX_SIZE = infra_settings.AUTH_TOKEN_CACHE_MAX_SIZE
+
+# 请求状态属性名（request.state.auth_context）
+AUTH_CONTEXT_STATE_KEY = "auth_context"
+
+TOKEN_KIND_USER = "user"
+TOKEN_KIND_INFRA_SUPERADMIN = "infra_superadmin"
+
+
+@dataclass(frozen=True)
+class VerifiedToken:
+    """
+    已验证的 Token
+
+    Attributes:
+        token_hash: Token 哈希（SHA-256）
+        kind: Token 类型（user / infra_superadmin）
+        claims: Token 载荷
+    """
+    token_hash: str
+    kind: str
+    claims: Dict[str, Any]
+
+    @property
+    def is_infra_superadmin(self) -> bool:
+        return self.kind == TOKEN_KIND_INFRA_SUPERADMIN
+
+    @property
+    def subject_id(self) -> int:
+        return int(self.claims.get("sub"))
+
+    @property
+    def tenant_id(self) -> Optional[int]:
+        tenant_id = self.claims.get("tenant_id")
+        return int(tenant_id) if tenant_id else None
+
+
+@dataclass
+class RequestAuthContext:
+    """
+    请求认证上下文（每个请求构建一次）
+
+    Attributes:
+        token: 已验证的 Token
+        user: 当前用户（平台超级管理员为虚拟 User 对象）
+        tenant_id: 当前组织ID（get_current_tenant 解析后回填）
+        role_ids: 用户角色ID（首次需要时加载）
+        permission_version: 权限集合版本（首次权限检查时回填）
+    """
+    token: VerifiedToken
+    user: Any
+    tenant_id: Optional[int] = None
+    role_ids: Optional[Tuple[int, ...]] = None
+    permission_version: Optional[str] = None
+
+    @property
+    def user_id(self) -> int:
+        return int(self.user.id)
+
+    @property
+    def is_infra_superadmin(self) -> bool:
+        return self.token.is_infra_superadmin
+
+    @property
+    def is_admin(self) -> bool:
+        """是否为组织管理员或平台管理员（拥有全部权限）"""
+        return bool(getattr(self.user, "is_tenant_admin", False) or getattr(self.user, "is_infra_admin", False))
+
+
+_auth_context: ContextVar[Optional[RequestAuthContext]] = ContextVar("auth_context", default=None)
+
+# token_hash -> (VerifiedToken, 缓存过期时间 monotonic)
+_verified_tokens: Dict[str, Tuple[VerifiedToken, float]] = {}
+
+
+def hash_token(token: str) -> str:
+    """计算 Token 哈希（缓存键，不保存原始 Token）"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def verify_token_cached(token: str) -> Optional[VerifiedToken]:
+    """
+    验证 Token（带短时缓存）
+
+    先识别平台超级管理员 Token，再验证普通用户 Token，与 get_current_user 的判定顺序一致。
+
+    Args:
+        token: JWT Token 字符串
+
+    Returns:
+        Optional[VerifiedToken]: 验证结果，Token 无效时返回 None
+    """
+    if not token:
+        return None
+
+    token_hash = hash_token(token)
+    now = time.monotonic()
+    cached = _verified_tokens.get(token_hash)
+    if cached is not None:
+        if cached[1] > now:
+            return cached[0]
+        _verified_tokens.pop(token_hash, None)
+
+    from infra.domain.security.infra_superadmin_security import get_infra_superadmin_token_payload
+    from infra.domain.security.security import get_token_payload
+
+    claims = get_infra_superadmin_token_payload(token)
+    kind = TOKEN_KIND_INFRA_SUPERADMIN
+    if not claims:
+        claims = get_token_payload(token)
+        kind = TOKEN_KIND_USER
+    if not claims or claims.get("sub") is None:
+        return None
+
+    verified = VerifiedToken(token_hash=token_hash, kind=kind, claims=claims)
+    ttl = AUTH_TOKEN_CACHE_TTL
+    exp = claims.get("exp")
+    if exp:
+        ttl = min(ttl, float(exp) - time.time())
+    if ttl > 0:
+        if len(_verified_tokens) >= AUTH_TOKEN_CACHE_MAX_SIZE:
+            _prune_verified_tokens(now)
+        _verified_tokens[token_hash] = (verified, now + ttl)
+    return verified
+
+
+def _prune_verified_tokens(now: float) -> None:
+    """清理过期条目；仍超过上限时丢弃最早写入的一半"""
+    for token_hash in [key for key, (_, expires_at) in _verified_tokens.items() if expires_at <= now]:
+        _verified_tokens.pop(token_hash, None)
+    if len(_verified_tokens) >= AUTH_TOKEN_CACHE_MAX_SIZE:
+        for token_hash in list(_verified_tokens)[: len(_verified_tokens) // 2]:
+            _verified_tokens.pop(token_hash, None)
+
+
+def get_current_auth_context() -> Optional[RequestAuthContext]:
+    """获取当前请求的认证上下文（未认证时返回 None）"""
+    return _auth_context.get()
+
+
+def set_current_auth_context(context: Optional[RequestAuthContext]) -> None:
+    """设置当前请求的认证上下文"""
+    _auth_context.set(context)
+
+
+def get_request_auth_context(request: Any) -> Optional[RequestAuthContext]:
+    """从 request.state 获取认证上下文（中间件在请求结束后使用）"""
+    state = getattr(request, "state", None)
+    return getattr(state, AUTH_CONTEXT_STATE_KEY, None) if state is not None else None
+
+
+def get_auth_context_for_user(user_id: int) -> Optional[RequestAuthContext]:
+    """获取属于指定用户的当前认证上下文（用户不一致或为平台超级管理员时返回 None）"""
+    context = _auth_context.get()
+    if context is not None and not context.is_infra_superadmin and context.user_id == user_id:
+        return context
+    return None
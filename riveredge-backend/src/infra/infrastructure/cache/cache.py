@@ -4,7 +4,7 @@ Redis 缓存工具模块
 提供 Redis 缓存操作的封装
 """
 
-from typing import Optional
+from typing import List, Optional
 
 from loguru import logger
 from redis.asyncio import Redis
@@ -82,6 +82,7 @@ class Cache:
         key: str,
         value: str,
         expire: Optional[int] = None,
+        nx: bool = False,
     ) -> bool:
         """
         设置缓存值
@@ -90,14 +91,15 @@ class Cache:
             key: 缓存键
             value: 缓存值
             expire: 过期时间（秒），None 表示不过期
+            nx: 仅在键不存在时设置
 
         Returns:
-            bool: 是否设置成功
+            bool: 是否设置成功（nx=True 且键已存在时返回 False）
         """
         if not cls._redis:
             raise RuntimeError("Redis 未连接，请先调用 connect()")
 
-        return await cls._redis.set(key, value, ex=expire)
+        return bool(await cls._redis.set(key, value, ex=expire, nx=nx))
 
     @classmethod
     async def delete(cls, key: str) -> int:
@@ -134,6 +136,22 @@ class Cache:
             return await cls._redis.delete(*keys)
         return 0
 
+    @classmethod
+    async def scan_keys(cls, pattern: str) -> List[str]:
+        """
+        按照模式查询缓存键（SCAN 增量遍历，不阻塞 Redis）
+
+        Args:
+            pattern: 匹配模式，如 "riveredge:report_render_job:*"
+
+        Returns:
+            List[str]: 匹配的缓存键
+        """
+        if not cls._redis:
+            raise RuntimeError("Redis 未连接，请先调用 connect()")
+
+        return [key async for key in cls._redis.scan_iter(match=pattern, count=500)]
+
     @classmethod
     async def exists(cls, key: str) -> bool:
         """
@@ -119,7 +119,8 @@ class CacheManager:
         namespace: str,
         key: str,
         value: Any,
-        ttl: Optional[int] = None
+        ttl: Optional[int] = None,
+        nx: bool = False
     ) -> bool:
         """
         设置缓存值
@@ -129,6 +130,7 @@ class CacheManager:
             key: 缓存键
             value: 缓存值
             ttl: 过期时间（秒）
+            nx: 仅在键不存在时设置（用于回源填充，不覆盖并发写入的新值）
 
         Returns:
             bool: 是否设置成功
@@ -148,11 +150,11 @@ class CacheManager:
             if self.config.enable_compression:
                 serialized_value = self._compress(serialized_value)
 
-            success = await cache.set(cache_key, serialized_value, ttl)
+            success = await cache.set(cache_key, serialized_value, ttl, nx=nx)
 
             if success:
                 self.stats.sets += 1
-            else:
+            elif not nx:
                 self.stats.errors += 1
 
             return success
@@ -213,6 +215,26 @@ class CacheManager:
             self.stats.errors += 1
             return 0
 
+    async def keys(self, namespace: str, pattern: str = "*") -> List[str]:
+        """
+        查询命名空间下匹配模式的缓存键
+
+        Args:
+            namespace: 命名空间
+            pattern: 匹配模式，如 "1:*"
+
+        Returns:
+            List[str]: 原始键（不含前缀与命名空间）
+        """
+        try:
+            prefix = self._make_key(namespace, "")
+            full_keys = await cache.scan_keys(self._make_key(namespace, pattern))
+            return [key[len(prefix):] for key in full_keys]
+        except Exception as e:
+            logger.warning(f"缓存键查询失败: {e}")
+            self.stats.errors += 1
+            return []
+
     async def exists(self, namespace: str, key: str) -> bool:
         """
         检查缓存是否存在
@@ -10,8 +10,18 @@ from tortoise import Tortoise
 from tortoise.exceptions import OperationalError
 from loguru import logger
 import asyncio
+import importlib
+
+from core.utils.startup_profiler import startup_profiler
 
 from infra.config.infra_config import infra_settings as settings
+from infra.infrastructure.database.db_router import (
+    REPLICA_CONNECTION,
+    ROUTER_PATH,
+    build_replica_connection,
+)
+from infra.infrastructure.database.instrumented_asyncpg import ENGINE as INSTRUMENTED_ENGINE
+from infra.infrastructure.database.pool_manager import close_shared_pools, get_raw_pool, pool_options
 
 
 # Tortoise ORM 配置
@@ -40,19 +50,17 @@ async def get_dynamic_tortoise_config() -> dict:
     config = {
         "connections": {
             "default": {
-                "engine": "tortoise.backends.asyncpg",
+                # 带连接池指标的 asyncpg 引擎（借出等待、使用中/空闲连接数、超时、占用者）
+                "engine": INSTRUMENTED_ENGINE,
                 "credentials": {
                     "host": db_host,
                     "port": settings.DB_PORT,
                     "user": settings.DB_USER,
                     "password": settings.DB_PASSWORD,
                     "database": settings.DB_NAME,
-                    # 连接池配置（解决连接中断问题）
-                    "min_size": 5,  # 最小连接池大小
-                    "max_size": 20,  # 最大连接池大小（增加以支持并发请求）
-                    "max_queries": 50000,  # 每个连接最大查询次数
-                    "max_inactive_connection_lifetime": 300.0,  # 非活跃连接最大生存时间（秒）
-                    "command_timeout": 60,  # 命令超时（秒）
+                    # 连接池配置：min_size、max_size、max_queries、max_inactive_connection_lifetime、command_timeout
+                    # 按部署配置（DB_POOL_* / DB_CONNECTION_BUDGET），见 pool_manager.resolve_pool_size
+                    **pool_options(),
                     "server_settings": {
                         "application_name": "riveredge_asyncpg",
                         "timezone": settings.TIMEZONE
@@ -67,6 +75,13 @@ async def get_dynamic_tortoise_config() -> dict:
         "timezone": dynamic_config["timezone"],
     }
 
+    # 只读副本（配置 DB_REPLICA_HOST 时启用）：增加 replica 连接并注册读写路由
+    replica = build_replica_connection(config["connections"]["default"])
+    if replica:
+        config["connections"][REPLICA_CONNECTION] = replica
+        config["routers"] = [ROUTER_PATH]
+        logger.info(f"✅ 已启用只读副本路由: {replica['credentials']['host']}:{replica['credentials']['port']}")
+
     logger.info("✅ 动态 Tortoise ORM 配置生成完成")
     return config
 
@@ -82,13 +97,8 @@ TORTOISE_ORM = {
                 "user": settings.DB_USER,
                 "password": settings.DB_PASSWORD,
                 "database": settings.DB_NAME,
-                # 连接池配置（解决连接中断问题）
-                # 这些参数会传递给 asyncpg.create_pool()
-                "min_size": 5,  # 最小连接池大小
-                "max_size": 20,  # 最大连接池大小（增加以支持并发请求）
-                "max_queries": 50000,  # 每个连接最大查询次数
-                "max_inactive_connection_lifetime": 300.0,  # 非活跃连接最大生存时间（秒，必须是浮点数）
-                "command_timeout": 60,  # 命令超时（秒）
+                # 连接池配置（传递给 asyncpg.create_pool()，按部署配置 DB_POOL_* / DB_CONNECTION_BUDGET）
+                **pool_options(),
                 "server_settings": {
                     "application_name": "riveredge_asyncpg",
                     "timezone": settings.TIMEZONE  # 使用与Tortoise ORM相同的时区
@@ -265,7 +275,8 @@ async def register_db(app) -> None:
 
     try:
         # 使用动态配置生成器获取配置
-        config = await get_dynamic_tortoise_config()
+        with startup_profiler.phase("生成 ORM 配置"):
+            config = await get_dynamic_tortoise_config()
         
         # 确保 routers 字段存在且是列表（不能是 None）
         if "routers" not in config or config["routers"] is None:
@@ -282,7 +293,16 @@ async def register_db(app) -> None:
         # ⚠️ 关键修复：直接使用 Tortoise.init() 而不是 register_tortoise
         # register_tortoise 在某些情况下可能不会正确设置 router
         # 先手动初始化 Tortoise ORM，确保 router 正确设置
-        await Tortoise.init(config=config)
+        # 先导入模型模块（Tortoise.init 同样会导入，提前导入只为分开统计导入耗时与建连耗时）
+        with startup_profiler.phase("导入模型模块"), startup_profiler.track_import():
+            for app_config in config["apps"].values():
+                for module_path in app_config.get("models", []):
+                    try:
+                        importlib.import_module(module_path)
+                    except Exception as import_error:
+                        logger.debug(f"预导入模型模块 {module_path} 失败（交由 Tortoise.init 处理）: {import_error}")
+        with startup_profiler.phase("Tortoise 初始化"), startup_profiler.track_db():
+            await Tortoise.init(config=config)
         logger.info("Tortoise ORM 初始化完成")
         
         # ⚠️ 关键修复：验证 Tortoise ORM 是否正确初始化
@@ -318,6 +338,7 @@ async def register_db(app) -> None:
         async def close_db_connections():
             logger.info("关闭 Tortoise ORM 数据库连接...")
             await Tortoise.close_connections()
+            await close_shared_pools()
             logger.info("数据库连接已关闭")
             
     except Exception as e:
@@ -332,18 +353,16 @@ async def get_db_connection():
     """
     获取数据库连接
 
-    返回一个新的 asyncpg 连接，用于直接数据库操作
+    从原生 SQL 共享连接池借出一个连接，用于直接数据库操作；用完调用 close() 归还连接池
 
     Returns:
-        asyncpg.Connection: 数据库连接对象
+        PooledConnection: 数据库连接对象（接口与 asyncpg.Connection 相同）
 
     Raises:
         OperationalError: 当连接失败时抛出
     """
     try:
-        import asyncpg
-        conn = await asyncpg.connect(**DB_CONFIG)
-        return conn
+        return await get_raw_pool(DB_CONFIG).acquire()
     except Exception as e:
         logger.error(f"获取数据库连接失败: {e}")
         raise OperationalError(f"数据库连接失败: {e}")
@@ -359,9 +378,8 @@ async def check_db_connection() -> bool:
         bool: True 如果连接正常，False 如果连接失败
     """
     try:
-        import asyncpg
-        conn = await asyncpg.connect(**DB_CONFIG)
-        await conn.close()
+        async with get_raw_pool(DB_CONFIG).connection() as conn:
+            await conn.fetchval("SELECT 1")
         return True
     except Exception as e:
         logger.warning(f"数据库连接检查失败: {e}")
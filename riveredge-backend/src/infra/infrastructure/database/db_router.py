@@ -0,0 +1,245 @@
+"""
+数据库读写路由模块
+
+为 Tortoise ORM 增加只读副本连接（replica）与连接路由：
+- 配置了 DB_REPLICA_HOST 时，Tortoise 配置中增加 replica 连接并注册 ReplicaRouter
+- 只有显式标记的读取才走副本：接口使用 Depends(prefer_replica)，只读服务方法使用 @replica_read
+- 写后读一致：同一请求内一旦发生写入（router.db_for_write 或 mark_write），后续读取全部回到主库；
+  组织发生写入后 DB_REPLICA_STICKY_SECONDS 秒内（本进程内）该组织的读取也回到主库，规避复制延迟
+- 事务内的读取始终走主库（default 连接已被事务包装时不路由）
+
+配置副本后存在多个连接，Tortoise 要求事务显式指定连接名：事务统一写作 in_transaction("default")
+（未指定时 Tortoise 抛出 ParamsError，不会误用副本）。
+
+注意：显式传入 using_db 的写入不经过路由，不会触发粘滞；在标记为走副本的请求中使用事务写入时，
+应在写入后调用 mark_write()。
+
+本地测试可将 DB_REPLICA_HOST 指向第二个 PostgreSQL 实例，或指向主库地址（建立第二个连接池，
+作为“伪副本”验证路由），通过 GET /health/db-routing 或日志确认读取去向。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Type
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseTransactionWrapper
+from tortoise.exceptions import ConfigurationError
+
+from infra.config.infra_config import infra_settings
+from infra.domain.tenant_context import get_current_tenant_id
+
+PRIMARY_CONNECTION = "default"
+REPLICA_CONNECTION = "replica"
+
+ROUTER_PATH = "infra.infrastructure.database.db_router.ReplicaRouter"
+
+# 是否已在 Tortoise 配置中加入副本连接（由 build_replica_connection 设置）
+_replica_configured = False
+
+# 组织最近一次写入时间（time.monotonic），用于跨请求的写后读粘滞
+_tenant_writes: Dict[int, float] = {}
+
+# 路由统计（进程内）
+_stats: Dict[str, int] = {"replica_reads": 0, "primary_reads": 0, "writes": 0}
+
+
+class ReadRoutingState:
+    """
+    请求内的读路由状态
+
+    Attributes:
+        prefer_replica: 当前读取是否希望走副本
+        wrote: 当前请求是否已发生写入（发生后本请求的读取全部走主库）
+    """
+
+    __slots__ = ("prefer_replica", "wrote")
+
+    def __init__(self, prefer_replica: bool = False):
+        self.prefer_replica = prefer_replica
+        self.wrote = False
+
+
+_routing_state: ContextVar[Optional[ReadRoutingState]] = ContextVar("read_routing_state", default=None)
+
+
+def build_replica_connection(primary: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    根据配置生成副本连接配置（未配置 DB_REPLICA_HOST 或已关闭时返回 None）
+
+    未单独配置的端口、用户、密码、数据库名沿用主库配置。
+
+    Args:
+        primary: 主库（default）连接配置
+
+    Returns:
+        Optional[Dict[str, Any]]: 副本连接配置
+    """
+    global _replica_configured
+    host = infra_settings.DB_REPLICA_HOST
+    if not host or not infra_settings.DB_REPLICA_ENABLED:
+        _replica_configured = False
+        return None
+
+    credentials = dict(primary["credentials"])
+    credentials.update({
+        "host": "127.0.0.1" if host == "localhost" else host,
+        "port": infra_settings.DB_REPLICA_PORT or credentials["port"],
+        "user": infra_settings.DB_REPLICA_USER or credentials["user"],
+        "password": infra_settings.DB_REPLICA_PASSWORD or credentials["password"],
+        "database": infra_settings.DB_REPLICA_NAME or credentials["database"],
+        "max_size": infra_settings.DB_REPLICA_POOL_MAX_SIZE or credentials.get("max_size", 20),
+        "server_settings": {
+            **credentials.get("server_settings", {}),
+            "application_name": "riveredge_asyncpg_replica",
+        },
+    })
+    _replica_configured = True
+    return {"engine": primary["engine"], "credentials": credentials}
+
+
+def replica_configured() -> bool:
+    """是否已配置副本连接"""
+    return _replica_configured
+
+
+def _sticky_seconds() -> float:
+    return float(infra_settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def _in_transaction() -> bool:
+    try:
+        return isinstance(connections.get(PRIMARY_CONNECTION), BaseTransactionWrapper)
+    except ConfigurationError:
+        return False
+
+
+def mark_write(tenant_id: Optional[int] = None) -> None:
+    """
+    记录一次写入：当前请求及该组织在粘滞窗口内的读取回到主库
+
+    Args:
+        tenant_id: 组织ID（不传时取当前请求的组织上下文）
+    """
+    _stats["writes"] += 1
+    state = _routing_state.get()
+    if state is not None:
+        state.wrote = True
+    tenant_id = tenant_id if tenant_id is not None else get_current_tenant_id()
+    if tenant_id is not None:
+        _tenant_writes[tenant_id] = time.monotonic()
+
+
+def _tenant_recently_wrote(tenant_id: Optional[int]) -> bool:
+    if tenant_id is None:
+        return False
+    written_at = _tenant_writes.get(tenant_id)
+    if written_at is None:
+        return False
+    if time.monotonic() - written_at < _sticky_seconds():
+        return True
+    _tenant_writes.pop(tenant_id, None)
+    return False
+
+
+def should_use_replica() -> bool:
+    """当前上下文中的读取是否走副本"""
+    if not _replica_configured:
+        return False
+    state = _routing_state.get()
+    if state is None or not state.prefer_replica or state.wrote:
+        return False
+    if _in_transaction():
+        # 事务内读取走主库，且视为本请求已写入（事务内的写入可能未经过路由）
+        state.wrote = True
+        return False
+    return not _tenant_recently_wrote(get_current_tenant_id())
+
+
+class ReplicaRouter:
+    """
+    Tortoise ORM 连接路由
+
+    db_for_read 在允许时返回副本连接名；db_for_write 只记录写入（返回 None 即使用模型默认的主库连接）。
+    """
+
+    def db_for_read(self, model: Type[Any]) -> Optional[str]:
+        if should_use_replica():
+            _stats["replica_reads"] += 1
+            return REPLICA_CONNECTION
+        _stats["primary_reads"] += 1
+        return None
+
+    def db_for_write(self, model: Type[Any]) -> Optional[str]:
+        mark_write()
+        return None
+
+
+@contextmanager
+def read_routing_scope() -> Iterator[ReadRoutingState]:
+    """为一次请求建立读路由状态（由 ReadRoutingMiddleware 使用）"""
+    state = ReadRoutingState()
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+@contextmanager
+def use_replica() -> Iterator[None]:
+    """代码块内的读取走副本（已写入或处于事务中时仍走主库）"""
+    state = _routing_state.get()
+    if state is None:
+        token = _routing_state.set(ReadRoutingState(prefer_replica=True))
+        try:
+            yield
+        finally:
+            _routing_state.reset(token)
+        return
+
+    previous = state.prefer_replica
+    state.prefer_replica = True
+    try:
+        yield
+    finally:
+        state.prefer_replica = previous
+
+
+def replica_read(func: Callable) -> Callable:
+    """只读服务方法装饰器：方法内的读取走副本"""
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with use_replica():
+            return await func(*args, **kwargs)
+
+    return wrapper
+
+
+async def prefer_replica() -> None:
+    """
+    接口依赖：本次请求的读取走副本（用于报表、看板等只读接口）
+
+    用法：@router.get("/statistics", dependencies=[Depends(prefer_replica)])
+    """
+    state = _routing_state.get()
+    if state is None:
+        _routing_state.set(ReadRoutingState(prefer_replica=True))
+    else:
+        state.prefer_replica = True
+
+
+def get_routing_stats() -> Dict[str, Any]:
+    """获取读写路由统计（进程内）"""
+    return {
+        "replica_configured": _replica_configured,
+        "sticky_seconds": _sticky_seconds(),
+        "sticky_tenants": sum(1 for tenant_id in list(_tenant_writes) if _tenant_recently_wrote(tenant_id)),
+        **_stats,
+    }
@@ -10,6 +10,8 @@ import json
 import asyncpg
 from loguru import logger
 
+from core.utils.startup_profiler import startup_profiler
+
 
 class DynamicDatabaseConfigService:
     """
@@ -151,17 +153,19 @@ class DynamicDatabaseConfigService:
             # 尝试从数据库查询活跃应用
             logger.info("📋 尝试连接数据库查询活跃应用...")
             from infra.infrastructure.database.database import get_db_connection
-            conn = await get_db_connection()
+            with startup_profiler.track_db():
+                conn = await get_db_connection()
             logger.info("📋 数据库连接成功")
 
             try:
-                rows = await conn.fetch("""
-                    SELECT DISTINCT code
-                    FROM core_applications
-                    WHERE is_installed = TRUE
-                      AND is_active = TRUE
-                      AND deleted_at IS NULL
-                """)
+                with startup_profiler.track_db():
+                    rows = await conn.fetch("""
+                        SELECT DISTINCT code
+                        FROM core_applications
+                        WHERE is_installed = TRUE
+                          AND is_active = TRUE
+                          AND deleted_at IS NULL
+                    """)
 
                 active_app_codes = [row['code'] for row in rows]
                 logger.info(f"📋 从数据库发现 {len(active_app_codes)} 个活跃应用: {active_app_codes}")
@@ -344,16 +348,18 @@ class DynamicDatabaseConfigService:
         try:
             # 尝试从数据库查询活跃应用
             from infra.infrastructure.database.database import get_db_connection
-            conn = await get_db_connection()
+            with startup_profiler.track_db():
+                conn = await get_db_connection()
 
             try:
-                rows = await conn.fetch("""
-                    SELECT DISTINCT code
-                    FROM core_applications
-                    WHERE is_installed = TRUE
-                      AND is_active = TRUE
-                      AND deleted_at IS NULL
-                """)
+                with startup_profiler.track_db():
+                    rows = await conn.fetch("""
+                        SELECT DISTINCT code
+                        FROM core_applications
+                        WHERE is_installed = TRUE
+                          AND is_active = TRUE
+                          AND deleted_at IS NULL
+                    """)
 
                 active_app_codes = [row['code'] for row in rows]
                 logger.info(f"📋 从数据库发现 {len(active_app_codes)} 个活跃应用: {active_app_codes}")
@@ -531,8 +537,8 @@ class DynamicDatabaseConfigService:
         """
         检查Python模块是否存在。
 
-        使用 find_spec 代替 import_module，仅解析模块路径不执行模块体，显著加快应用级模型的发现。
-        结果缓存避免重复检查。
+        应用模块（apps.*）查询启动清单；其他模块使用 find_spec 代替 import_module，
+        仅解析模块路径不执行模块体。结果缓存避免重复检查。
 
         Args:
             module_path: 模块路径
@@ -543,6 +549,15 @@ class DynamicDatabaseConfigService:
         cache = DynamicDatabaseConfigService._module_exists_cache
         if module_path in cache:
             return cache[module_path]
+        if module_path.startswith("apps."):
+            # 应用模块以启动清单为准（文件扫描生成，不导入父包）
+            try:
+                from core.utils.startup_manifest import get_startup_manifest
+                result = get_startup_manifest().has_module(module_path)
+                cache[module_path] = result
+                return result
+            except Exception as e:
+                logger.debug(f"读取启动清单失败，回退到 find_spec: {e}")
         try:
             import importlib.util
             spec = importlib.util.find_spec(module_path)
@@ -0,0 +1,32 @@
+"""
+带连接池指标的 Tortoise asyncpg 引擎
+
+与 tortoise.backends.asyncpg 相同，只是把创建的 asyncpg 连接池包装为 InstrumentedPool，
+采集借出等待时间、使用中/空闲连接数、超时次数与占用者（见 pool_manager）。
+
+配置方式：连接配置中 "engine": "infra.infrastructure.database.instrumented_asyncpg"
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+from typing import Any
+
+from tortoise.backends.asyncpg.client import AsyncpgDBClient
+
+from infra.infrastructure.database.pool_manager import POOL_ACQUIRE_TIMEOUT, InstrumentedPool
+
+ENGINE = "infra.infrastructure.database.instrumented_asyncpg"
+
+
+class InstrumentedAsyncpgDBClient(AsyncpgDBClient):
+    """连接池带指标采集的 asyncpg 客户端"""
+
+    async def create_pool(self, **kwargs: Any) -> Any:
+        pool = await super().create_pool(**kwargs)
+        # 连接配置中的 min_size / max_size 经 extra 透传给 asyncpg，优先于 Tortoise 的 minsize / maxsize
+        max_size = int(kwargs.get("max_size") or self.pool_maxsize)
+        return InstrumentedPool(self.connection_name, pool, max_size, POOL_ACQUIRE_TIMEOUT)
+
+
+client_class = InstrumentedAsyncpgDBClient
@@ -0,0 +1,462 @@
+"""
+数据库连接池管理模块
+
+统一管理进程内的 asyncpg 连接池并采集连接池指标：
+- 池大小按部署配置：DB_POOL_MIN_SIZE / DB_POOL_MAX_SIZE 显式指定；未指定 DB_POOL_MAX_SIZE 而配置了
+  DB_CONNECTION_BUDGET（分配给本服务的数据库连接总数）时，按 worker 数（WEB_CONCURRENCY）平分预算后
+  扣除原生连接池占用，自动计算每个 worker 的 ORM 连接池上限
+- Tortoise ORM 连接池（default / replica）由 instrumented_asyncpg 引擎包装为 InstrumentedPool
+- 原生 SQL 连接（get_db_connection）从共享的 raw 连接池借出，close() 即归还，不再每次新建连接
+- 外部数据源（数据集 SQL 查询、集成配置）按连接参数复用小连接池，空闲超时后关闭，数量有上限
+- 指标：借出等待时间、使用中/空闲连接数、借出超时次数，以及占用连接最久的请求
+- 看门狗（pool_watchdog）定期记录占用连接超过阈值的请求与已占满的连接池
+
+占用者标识取当前请求（由 PerformanceMiddleware 通过 set_connection_holder 设置），不在请求内时取
+asyncio 任务名。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar, Token
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+import asyncpg
+from loguru import logger
+
+from infra.config.infra_config import infra_settings
+
+# ORM 连接池默认最大连接数（未配置 DB_POOL_MAX_SIZE / DB_CONNECTION_BUDGET 时）
+DEFAULT_POOL_MAX_SIZE = 20
+# 借出连接的超时时间（秒，0 表示不限）
+POOL_ACQUIRE_TIMEOUT = infra_settings.DB_POOL_ACQUIRE_TIMEOUT
+# 原生 SQL 连接池大小
+RAW_POOL_MIN_SIZE = infra_settings.DB_RAW_POOL_MIN_SIZE
+RAW_POOL_MAX_SIZE = infra_settings.DB_RAW_POOL_MAX_SIZE
+# 外部数据源连接池：单池大小、空闲关闭时间（秒）、最多保留的池数量
+EXTERNAL_POOL_MAX_SIZE = infra_settings.EXTERNAL_DB_POOL_MAX_SIZE
+EXTERNAL_POOL_IDLE_SECONDS = infra_settings.EXTERNAL_DB_POOL_IDLE_SECONDS
+EXTERNAL_POOL_LIMIT = infra_settings.EXTERNAL_DB_POOL_LIMIT
+# 看门狗：检查间隔（秒）、占用告警阈值（秒）、每次记录的占用者数量
+WATCHDOG_INTERVAL = infra_settings.DB_POOL_WATCHDOG_INTERVAL
+HOLD_WARN_SECONDS = infra_settings.DB_POOL_HOLD_WARN_SECONDS
+WATCHDOG_TOP_HOLDERS = 5
+# 保留最近的借出等待时间样本数（用于 p95）
+WAIT_SAMPLES = 1000
+
+_connection_holder: ContextVar[Optional[str]] = ContextVar("db_connection_holder", default=None)
+
+# 已注册的连接池（名称 -> InstrumentedPool）
+_pools: Dict[str, "InstrumentedPool"] = {}
+
+
+def set_connection_holder(label: str) -> Token:
+    """设置当前上下文的连接占用者标识（如 "GET /api/v1/..."）"""
+    return _connection_holder.set(label)
+
+
+def reset_connection_holder(token: Token) -> None:
+    _connection_holder.reset(token)
+
+
+def _current_holder() -> str:
+    label = _connection_holder.get()
+    if label:
+        return label
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    return f"task:{task.get_name()}" if task else "unknown"
+
+
+def resolve_pool_size() -> Tuple[int, int]:
+    """
+    计算 ORM 连接池大小
+
+    Returns:
+        Tuple[int, int]: (min_size, max_size)
+    """
+    max_size = infra_settings.DB_POOL_MAX_SIZE
+    if not max_size:
+        budget = infra_settings.DB_CONNECTION_BUDGET
+        if budget:
+            workers = max(int(os.getenv("WEB_CONCURRENCY") or 1), 1)
+            max_size = max(int(budget) // workers - RAW_POOL_MAX_SIZE, 2)
+        else:
+            max_size = DEFAULT_POOL_MAX_SIZE
+    max_size = int(max_size)
+    return min(infra_settings.DB_POOL_MIN_SIZE, max_size), max_size
+
+
+def pool_options() -> Dict[str, Any]:
+    """ORM 连接池参数（传给 asyncpg.create_pool）"""
+    min_size, max_size = resolve_pool_size()
+    return {
+        "min_size": min_size,
+        "max_size": max_size,
+        "max_queries": infra_settings.DB_POOL_MAX_QUERIES,
+        "max_inactive_connection_lifetime": infra_settings.DB_POOL_MAX_INACTIVE_LIFETIME,
+        "command_timeout": infra_settings.DB_POOL_COMMAND_TIMEOUT,
+    }
+
+
+class _AcquireContext:
+    """InstrumentedPool.acquire() 的返回值：既可 await，也可用于 async with（与 asyncpg 一致）"""
+
+    __slots__ = ("pool", "timeout", "connection")
+
+    def __init__(self, pool: "InstrumentedPool", timeout: Optional[float]):
+        self.pool = pool
+        self.timeout = timeout
+        self.connection = None
+
+    def __await__(self):
+        return self.pool._acquire(self.timeout).__await__()
+
+    async def __aenter__(self):
+        self.connection = await self.pool._acquire(self.timeout)
+        return self.connection
+
+    async def __aexit__(self, exc_type: Any, exc_val: Any, exc_tb: Any) -> None:
+        connection, self.connection = self.connection, None
+        await self.pool.release(connection)
+
+
+class InstrumentedPool:
+    """
+    带指标采集的 asyncpg 连接池包装
+
+    接口与 asyncpg.Pool 一致（acquire / release / close 等，其余属性透传），额外记录：
+    借出次数、等待时间、超时次数、使用中的连接及其占用者。
+    """
+
+    def __init__(self, name: str, pool: asyncpg.Pool, max_size: int, acquire_timeout: Optional[float] = None):
+        self.name = name
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout or None
+        self._pool = pool
+        self._in_use: Dict[int, Tuple[str, float]] = {}
+        self._waiting = 0
+        self._wait_samples: Deque[float] = deque(maxlen=WAIT_SAMPLES)
+        self.acquires = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_used = time.monotonic()
+        _pools[name] = self
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    def acquire(self, *, timeout: Optional[float] = None) -> _AcquireContext:
+        return _AcquireContext(self, timeout)
+
+    async def _acquire(self, timeout: Optional[float]) -> asyncpg.Connection:
+        started = time.perf_counter()
+        self._waiting += 1
+        try:
+            connection = await self._pool.acquire(timeout=timeout or self.acquire_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(
+                f"数据库连接池 {self.name} 借出连接超时（{timeout or self.acquire_timeout}s），"
+                f"使用中 {len(self._in_use)}/{self.max_size}，占用者: {self._holder_summary()}"
+            )
+            raise
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - started
+        self.acquires += 1
+        self.wait_total += waited
+        self.wait_max = max(self.wait_max, waited)
+        self._wait_samples.append(waited)
+        self._in_use[id(connection)] = (_current_holder(), time.monotonic())
+        self.last_used = time.monotonic()
+        return connection
+
+    async def release(self, connection: Any, *, timeout: Optional[float] = None) -> None:
+        if connection is None:
+            return
+        self._in_use.pop(id(connection), None)
+        self.last_used = time.monotonic()
+        await self._pool.release(connection, timeout=timeout)
+
+    async def close(self) -> None:
+        if _pools.get(self.name) is self:
+            _pools.pop(self.name, None)
+        await self._pool.close()
+
+    def terminate(self) -> None:
+        if _pools.get(self.name) is self:
+            _pools.pop(self.name, None)
+        self._pool.terminate()
+
+    def holders(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """使用中的连接占用者（按占用时长倒序）"""
+        now = time.monotonic()
+        items = sorted(self._in_use.values(), key=lambda item: item[1])
+        holders = [{"holder": holder, "held_seconds": round(now - since, 3)} for holder, since in items]
+        return holders[:limit] if limit else holders
+
+    def _holder_summary(self) -> str:
+        return ", ".join(f"{h['holder']}({h['held_seconds']:.1f}s)" for h in self.holders(WATCHDOG_TOP_HOLDERS)) or "-"
+
+    def stats(self) -> Dict[str, Any]:
+        """连接池指标"""
+        samples = sorted(self._wait_samples)
+        p95 = samples[min(int(len(samples) * 0.95), len(samples) - 1)] if samples else 0.0
+        size = self._pool.get_size()
+        idle = self._pool.get_idle_size()
+        return {
+            "name": self.name,
+            "min_size": self._pool.get_min_size(),
+            "max_size": self.max_size,
+            "size": size,
+            "idle": idle,
+            "in_use": len(self._in_use),
+            "waiting": self._waiting,
+            "acquires": self.acquires,
+            "timeouts": self.timeouts,
+            "wait_avg_ms": round(self.wait_total / self.acquires * 1000, 2) if self.acquires else 0.0,
+            "wait_p95_ms": round(p95 * 1000, 2),
+            "wait_max_ms": round(self.wait_max * 1000, 2),
+            "longest_holders": self.holders(WATCHDOG_TOP_HOLDERS),
+        }
+
+
+class PooledConnection:
+    """
+    从共享连接池借出的连接
+
+    用法与 asyncpg.Connection 相同（属性透传）；close() 将连接归还连接池而不是断开，
+    兼容原先 `conn = await get_db_connection() ... finally: await conn.close()` 的写法。
+    """
+
+    __slots__ = ("_pool", "_connection")
+
+    def __init__(self, pool: InstrumentedPool, connection: asyncpg.Connection):
+        self._pool = pool
+        self._connection = connection
+
+    def __getattr__(self, name: str) -> Any:
+        if self._connection is None:
+            raise asyncpg.InterfaceError("连接已归还连接池")
+        return getattr(self._connection, name)
+
+    def is_closed(self) -> bool:
+        return self._connection is None or self._connection.is_closed()
+
+    async def close(self, *, timeout: Optional[float] = None) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            await self._pool.release(connection)
+
+
+class SharedPool:
+    """
+    按需创建的共享连接池（首次借出时创建；连接池绑定事件循环，循环变化时重建）
+    """
+
+    def __init__(self, name: str, connect_kwargs: Dict[str, Any], min_size: int, max_size: int, **pool_kwargs: Any):
+        self.name = name
+        self.connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool_kwargs = pool_kwargs
+        self._pool: Optional[InstrumentedPool] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    @property
+    def last_used(self) -> float:
+        return self._pool.last_used if self._pool else 0.0
+
+    async def _get(self) -> InstrumentedPool:
+        loop = asyncio.get_running_loop()
+        if self._pool is not None and self._loop is loop:
+            return self._pool
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+            self._pool = None
+        async with self._lock:
+            if self._pool is None:
+                pool = await asyncpg.create_pool(
+                    min_size=self.min_size,
+                    max_size=self.max_size,
+                    **self.pool_kwargs,
+                    **self.connect_kwargs,
+                )
+                self._pool = InstrumentedPool(self.name, pool, self.max_size, POOL_ACQUIRE_TIMEOUT)
+            return self._pool
+
+    async def acquire(self) -> PooledConnection:
+        """借出连接（用完须 close() 归还）"""
+        pool = await self._get()
+        return PooledConnection(pool, await pool.acquire())
+
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[PooledConnection]:
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await conn.close()
+
+    async def close(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            try:
+                await asyncio.wait_for(pool.close(), 10)
+            except asyncio.TimeoutError:
+                pool.terminate()
+
+
+_raw_pool: Optional[SharedPool] = None
+_external_pools: "OrderedDict[str, SharedPool]" = OrderedDict()
+
+
+def get_raw_pool(connect_kwargs: Dict[str, Any]) -> SharedPool:
+    """获取原生 SQL 共享连接池（连接参数取第一次调用时的值）"""
+    global _raw_pool
+    if _raw_pool is None:
+        _raw_pool = SharedPool(
+            "raw",
+            connect_kwargs,
+            min_size=min(RAW_POOL_MIN_SIZE, RAW_POOL_MAX_SIZE),
+            max_size=RAW_POOL_MAX_SIZE,
+            max_inactive_connection_lifetime=300.0,
+        )
+    return _raw_pool
+
+
+def _external_key(config: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+    connect_kwargs = {
+        "host": config.get("host", "localhost"),
+        "port": int(config.get("port", 5432)),
+        "user": config.get("user") or config.get("username", ""),
+        "password": config.get("password", ""),
+        "database": config.get("database", ""),
+    }
+    password_hash = hashlib.sha1(str(connect_kwargs["password"]).encode()).hexdigest()[:8]
+    key = f"external:{connect_kwargs['user']}@{connect_kwargs['host']}:{connect_kwargs['port']}/{connect_kwargs['database']}#{password_hash}"
+    return key, connect_kwargs
+
+
+@asynccontextmanager
+async def external_connection(config: Dict[str, Any]) -> AsyncIterator[PooledConnection]:
+    """
+    借出外部 PostgreSQL 数据源连接（按 host/port/user/database/password 复用连接池）
+
+    Args:
+        config: 集成配置（host、port、user/username、password、database）
+    """
+    key, connect_kwargs = _external_key(config)
+    pool = _external_pools.get(key)
+    if pool is None:
+        pool = SharedPool(key, connect_kwargs, min_size=0, max_size=EXTERNAL_POOL_MAX_SIZE, max_inactive_connection_lifetime=60.0)
+        _external_pools[key] = pool
+        while len(_external_pools) > EXTERNAL_POOL_LIMIT:
+            _, evicted = _external_pools.popitem(last=False)
+            await evicted.close()
+    _external_pools.move_to_end(key)
+    async with pool.connection() as conn:
+        yield conn
+
+
+async def close_idle_external_pools(idle_seconds: float = EXTERNAL_POOL_IDLE_SECONDS) -> int:
+    """关闭空闲超时的外部数据源连接池，返回关闭数量"""
+    now = time.monotonic()
+    closed = 0
+    for key, pool in list(_external_pools.items()):
+        if pool._pool is not None and not pool._pool._in_use and now - pool.last_used > idle_seconds:
+            _external_pools.pop(key, None)
+            await pool.close()
+            closed += 1
+    return closed
+
+
+async def close_shared_pools() -> None:
+    """关闭原生 SQL 与外部数据源共享连接池（应用关闭时调用）"""
+    if _raw_pool is not None:
+        await _raw_pool.close()
+    while _external_pools:
+        _, pool = _external_pools.popitem()
+        await pool.close()
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """获取全部连接池指标"""
+    return [pool.stats() for pool in list(_pools.values())]
+
+
+class PoolWatchdog:
+    """
+    连接池看门狗
+
+    定期记录占用连接超过 HOLD_WARN_SECONDS 的请求（按占用时长倒序）与已占满的连接池，
+    并关闭空闲超时的外部数据源连接池。
+    """
+
+    def __init__(self, interval: float = WATCHDOG_INTERVAL, hold_warn_seconds: float = HOLD_WARN_SECONDS):
+        self.interval = interval
+        self.hold_warn_seconds = hold_warn_seconds
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """启动看门狗（应用启动时调用）"""
+        if self.running or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"数据库连接池看门狗已启动（间隔 {self.interval}s，占用告警阈值 {self.hold_warn_seconds}s）")
+
+    async def stop(self) -> None:
+        """停止看门狗（应用关闭时调用）"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def check(self) -> None:
+        """检查一次全部连接池"""
+        for pool in list(_pools.values()):
+            long_holders = [h for h in pool.holders() if h["held_seconds"] >= self.hold_warn_seconds]
+            if long_holders:
+                summary = ", ".join(
+                    f"{h['holder']}({h['held_seconds']:.1f}s)" for h in long_holders[:WATCHDOG_TOP_HOLDERS]
+                )
+                logger.warning(f"数据库连接池 {pool.name}: {len(long_holders)} 个连接占用超过 {self.hold_warn_seconds}s: {summary}")
+            if pool._in_use and len(pool._in_use) >= pool.max_size:
+                logger.warning(
+                    f"数据库连接池 {pool.name} 已占满（{len(pool._in_use)}/{pool.max_size}），"
+                    f"等待中 {pool._waiting}，超时累计 {pool.timeouts}"
+                )
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.check()
+                closed = await close_idle_external_pools()
+                if closed:
+                    logger.debug(f"已关闭 {closed} 个空闲外部数据源连接池")
+            except Exception as e:
+                logger.warning(f"数据库连接池看门狗检查失败: {e}")
+
+
+pool_watchdog = PoolWatchdog()
@@ -2,18 +2,53 @@
 业务配置服务模块
 
 提供业务配置相关的业务逻辑处理，包括运行模式切换、流程模块开关、流程参数配置等。
+业务配置按组织缓存为进程内版本化快照，配置写入时更新版本号使各 worker 的快照失效。
 
 Author: Luigi Lu
 Date: 2026-01-27
 """
 
-from typing import Dict, Any, Optional, List
+import copy
+import time
+import uuid
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime
 from fastapi import HTTPException, status
 from loguru import logger
 
+from infra.config.infra_config import infra_settings
 from infra.models.tenant import Tenant, TenantPlan
 from infra.exceptions.exceptions import ValidationError, NotFoundError, BusinessLogicError
+from infra.infrastructure.cache.cache_manager import cache_manager
+
+# 业务配置快照（进程内，按组织缓存）
+# 快照版本号保存在共享缓存中，配置变更时更新版本号，其他 worker 最迟在一个检查周期后重新加载
+BUSINESS_CONFIG_VERSION_NAMESPACE = "business_config_version"
+# 版本号检查间隔（秒），间隔内直接使用进程内快照，不访问数据库和缓存
+BUSINESS_CONFIG_VERSION_CHECK_INTERVAL = infra_settings.BUSINESS_CONFIG_VERSION_CHECK_INTERVAL
+# 快照最长有效期（秒），共享缓存不可用时依靠该时间兜底刷新
+BUSINESS_CONFIG_SNAPSHOT_MAX_AGE = infra_settings.BUSINESS_CONFIG_SNAPSHOT_MAX_AGE
+
+# tenant_id -> (版本号, 配置快照, 加载时间, 最近检查时间)
+_config_snapshots: Dict[int, Tuple[Optional[str], Dict[str, Any], float, float]] = {}
+
+
+async def invalidate_business_config(tenant_id: int) -> None:
+    """
+    使组织业务配置快照失效（配置写入后调用）
+
+    清除本进程快照并更新共享版本号，其他 worker 在下一次版本检查时重新加载。
+
+    Args:
+        tenant_id: 组织ID
+    """
+    _config_snapshots.pop(tenant_id, None)
+    await cache_manager.set(
+        BUSINESS_CONFIG_VERSION_NAMESPACE,
+        str(tenant_id),
+        uuid.uuid4().hex,
+        ttl=cache_manager.config.max_ttl,
+    )
 
 # 节点配置常量（供预设构建使用）
 _NODE_OFF = {"enabled": False, "auditRequired": False}
@@ -200,7 +235,7 @@ class BusinessConfigService:
         """
         检查业务节点是否启用
         """
-        config = await self.get_business_config(tenant_id)
+        config = await self._get_config_snapshot(tenant_id)
         nodes = config.get("nodes", {})
         node_config = nodes.get(node_key)
         
@@ -216,7 +251,7 @@ class BusinessConfigService:
         
         当为 true 时，需求计算可选择 BOM 版本；为 false 时，统一使用默认版本。
         """
-        config = await self.get_business_config(tenant_id)
+        config = await self._get_config_snapshot(tenant_id)
         bom_params = config.get("parameters", {}).get("bom", {})
         return bom_params.get("bom_multi_version_allowed", True)
 
@@ -226,7 +261,7 @@ class BusinessConfigService:
         
         当为 true 时，工单下达不检查缺料，只管制造过程；为 false 时，缺料则禁止下达。
         """
-        config = await self.get_business_config(tenant_id)
+        config = await self._get_config_snapshot(tenant_id)
         wo_params = config.get("parameters", {}).get("work_order", {})
         return wo_params.get("allow_production_without_material", False)
 
@@ -234,7 +269,7 @@ class BusinessConfigService:
         """
         检查业务节点是否需要审核
         """
-        config = await self.get_business_config(tenant_id)
+        config = await self._get_config_snapshot(tenant_id)
         nodes = config.get("nodes", {})
         node_config = nodes.get(node_key)
         # 销售订单：任一为「无需审核」则无需审核。1) parameters.sales.audit_enabled=False 表示关闭审核；2) 蓝图 nodes.sales_order.auditRequired=False 表示自动审核
@@ -267,7 +302,7 @@ class BusinessConfigService:
         plan_enabled = await self.check_node_enabled(tenant_id, "production_plan")
         if not plan_enabled:
             return True  # 计划关闭，必须直连
-        config = await self.get_business_config(tenant_id)
+        config = await self._get_config_snapshot(tenant_id)
         require_plan = config.get("parameters", {}).get("planning", {}).get("require_production_plan", False)
         return not require_plan
 
@@ -566,6 +601,48 @@ class BusinessConfigService:
         Args:
             tenant_id: 组织ID
             
+        Returns:
+            Dict[str, Any]: 业务配置（快照副本，调用方可自由修改）
+        """
+        return copy.deepcopy(await self._get_config_snapshot(tenant_id))
+
+    async def _get_config_snapshot(self, tenant_id: int) -> Dict[str, Any]:
+        """
+        获取业务配置快照（只读，服务内部热路径使用）
+
+        检查间隔内直接返回进程内快照；超过间隔时比较共享版本号，版本未变则继续使用，
+        版本变化或超过最长有效期时重新加载。
+
+        Args:
+            tenant_id: 组织ID
+
+        Returns:
+            Dict[str, Any]: 业务配置快照（不可修改）
+        """
+        now = time.monotonic()
+        cached = _config_snapshots.get(tenant_id)
+        if cached is not None:
+            version, config, loaded_at, checked_at = cached
+            if now - checked_at < BUSINESS_CONFIG_VERSION_CHECK_INTERVAL:
+                return config
+            if now - loaded_at < BUSINESS_CONFIG_SNAPSHOT_MAX_AGE:
+                current_version = await cache_manager.get(BUSINESS_CONFIG_VERSION_NAMESPACE, str(tenant_id))
+                if current_version == version:
+                    _config_snapshots[tenant_id] = (version, config, loaded_at, now)
+                    return config
+
+        version = await cache_manager.get(BUSINESS_CONFIG_VERSION_NAMESPACE, str(tenant_id))
+        config = await self._load_business_config(tenant_id)
+        _config_snapshots[tenant_id] = (version, config, now, now)
+        return config
+
+    async def _load_business_config(self, tenant_id: int) -> Dict[str, Any]:
+        """
+        从组织设置加载业务配置并补全默认值
+
+        Args:
+            tenant_id: 组织ID
+
         Returns:
             Dict[str, Any]: 业务配置
         """
@@ -629,7 +706,8 @@ class BusinessConfigService:
                         if key not in business_config["parameters"][cat]:
                             business_config["parameters"][cat][key] = val
         
-        return business_config
+        # 深拷贝，避免快照与类级默认配置共享可变对象
+        return copy.deepcopy(business_config)
     
     async def switch_running_mode(
         self,
@@ -676,6 +754,7 @@ class BusinessConfigService:
         # 保存配置
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         logger.info(f"组织 {tenant_id} 切换运行模式为: {mode}")
         
@@ -731,6 +810,7 @@ class BusinessConfigService:
 
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
 
         logger.info(f"组织 {tenant_id} 已应用业务复杂度预设: {level} {preset['name']}")
 
@@ -793,6 +873,7 @@ class BusinessConfigService:
         # 保存配置
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         logger.info(f"组织 {tenant_id} 更新模块 {module_code} 开关为: {enabled}")
         
@@ -843,6 +924,7 @@ class BusinessConfigService:
         # 保存配置
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         logger.info(f"组织 {tenant_id} 更新流程参数 {category}.{parameter_key} = {value}")
         
@@ -889,6 +971,7 @@ class BusinessConfigService:
         # 保存配置
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         logger.info(f"组织 {tenant_id} 批量更新流程参数")
         
@@ -933,6 +1016,7 @@ class BusinessConfigService:
             
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         logger.info(f"组织 {tenant_id} 更新节点配置")
         
@@ -1072,6 +1156,7 @@ class BusinessConfigService:
         settings["config_templates"] = templates
         
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         return {
             "success": True,
@@ -1113,6 +1198,7 @@ class BusinessConfigService:
         
         settings["business_config"] = business_config
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         return {
             "success": True,
@@ -1150,6 +1236,7 @@ class BusinessConfigService:
              
         settings["config_templates"] = new_templates
         await Tenant.filter(id=tenant_id).update(settings=settings)
+        await invalidate_business_config(tenant_id)
         
         return {
             "success": True,
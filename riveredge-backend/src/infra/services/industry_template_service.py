@@ -272,7 +272,7 @@ class IndustryTemplateService:
         }
         
         try:
-            async with in_transaction():
+            async with in_transaction("default"):
                 # 1. 应用编码规则（从模板config中读取code_rules）
                 if "code_rules" in config and isinstance(config["code_rules"], list):
                     from core.services.business.code_rule_service import CodeRuleService
@@ -269,6 +269,11 @@ class TenantService:
                 changes.append(f"{field} 变更：{old_value} → {value}")
         
         await tenant.save()
+
+        # 组织设置变更时使业务配置快照失效
+        if "settings" in update_data:
+            from infra.services.business_config_service import invalidate_business_config
+            await invalidate_business_config(tenant_id)
         
         # 记录活动日志：组织更新
         if changes:
@@ -0,0 +1,183 @@
+"""
+用户目录缓存模块
+
+按组织在进程内缓存用户显示信息（id -> 用户名、姓名、邮箱），首次访问时按需批量加载（一次 IN 查询），
+供单据的 *_name 冗余字段填充与列表渲染使用，避免逐行查询用户表。
+
+用户信息变更时调用 UserDirectory.invalidate：清除本进程缓存并更新共享版本号，
+其他 worker 在下一次版本检查时清空该组织的目录。
+
+Author: Luigi Lu
+Date: 2026-03-05
+"""
+
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+from infra.config.infra_config import infra_settings
+from infra.domain.tenant_context import get_current_tenant_id
+from infra.infrastructure.cache.cache_manager import cache_manager
+from infra.models.user import User
+
+USER_DIRECTORY_VERSION_NAMESPACE = "user_directory_version"
+# 版本号检查间隔（秒），间隔内直接使用进程内目录
+USER_DIRECTORY_VERSION_CHECK_INTERVAL = infra_settings.USER_DIRECTORY_VERSION_CHECK_INTERVAL
+# 单个组织最多缓存的用户数（超过后清空重建）
+USER_DIRECTORY_MAX_USERS_PER_TENANT = infra_settings.USER_DIRECTORY_MAX_USERS_PER_TENANT
+
+UNKNOWN_USER_NAME = "未知用户"
+
+
+@dataclass(frozen=True)
+class UserDirectoryEntry:
+    """
+    用户目录条目
+
+    Attributes:
+        id: 用户ID
+        username: 用户名
+        full_name: 姓名
+        email: 邮箱
+    """
+    id: int
+    username: str
+    full_name: Optional[str]
+    email: Optional[str]
+
+    @property
+    def display_name(self) -> str:
+        """显示名称（优先姓名，其次用户名）"""
+        return self.full_name or self.username
+
+
+@dataclass
+class _TenantDirectory:
+    version: Optional[str]
+    checked_at: float
+    entries: Dict[int, UserDirectoryEntry] = field(default_factory=dict)
+
+
+class UserDirectory:
+    """
+    用户目录（进程内，按组织懒加载）
+    """
+
+    _tenants: Dict[int, _TenantDirectory] = {}
+
+    @classmethod
+    async def get_entries(
+        cls,
+        user_ids: Iterable[Optional[int]],
+        tenant_id: Optional[int] = None,
+    ) -> Dict[int, UserDirectoryEntry]:
+        """
+        批量获取用户目录条目（缺失的用户一次查询补齐）
+
+        Args:
+            user_ids: 用户ID列表（可重复，None 会被忽略）
+            tenant_id: 组织ID（可选，默认从上下文获取；无组织上下文时不缓存）
+
+        Returns:
+            Dict[int, UserDirectoryEntry]: 用户ID -> 条目（不存在或不属于该组织的用户不在结果中）
+        """
+        ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id is not None]
+        if not ids:
+            return {}
+
+        if tenant_id is None:
+            tenant_id = get_current_tenant_id()
+        if tenant_id is None:
+            return await cls._load(ids, None)
+
+        directory = await cls._get_directory(tenant_id)
+        missing = [user_id for user_id in ids if user_id not in directory.entries]
+        if missing:
+            loaded = await cls._load(missing, tenant_id)
+            if len(directory.entries) + len(loaded) > USER_DIRECTORY_MAX_USERS_PER_TENANT:
+                directory.entries.clear()
+            directory.entries.update(loaded)
+        return {user_id: directory.entries[user_id] for user_id in ids if user_id in directory.entries}
+
+    @classmethod
+    async def resolve_names(
+        cls,
+        user_ids: Iterable[Optional[int]],
+        tenant_id: Optional[int] = None,
+        default: str = UNKNOWN_USER_NAME,
+    ) -> Dict[int, str]:
+        """
+        批量解析用户显示名称
+
+        Args:
+            user_ids: 用户ID列表（可重复，None 会被忽略）
+            tenant_id: 组织ID（可选，默认从上下文获取）
+            default: 用户不存在时的名称
+
+        Returns:
+            Dict[int, str]: 用户ID -> 显示名称
+        """
+        ids = [user_id for user_id in dict.fromkeys(user_ids) if user_id is not None]
+        entries = await cls.get_entries(ids, tenant_id)
+        return {user_id: entries[user_id].display_name if user_id in entries else default for user_id in ids}
+
+    @classmethod
+    async def invalidate(cls, tenant_id: Optional[int], user_id: Optional[int] = None) -> None:
+        """
+        使用户目录失效（用户信息变更后调用）
+
+        Args:
+            tenant_id: 组织ID
+            user_id: 用户ID（为 None 时清空该组织的目录）
+        """
+        if tenant_id is None:
+            return
+        directory = cls._tenants.get(tenant_id)
+        if directory is not None:
+            if user_id is None:
+                directory.entries.clear()
+            else:
+                directory.entries.pop(user_id, None)
+        version = uuid.uuid4().hex
+        await cache_manager.set(
+            USER_DIRECTORY_VERSION_NAMESPACE,
+            str(tenant_id),
+            version,
+            ttl=cache_manager.config.max_ttl,
+        )
+        if directory is not None:
+            directory.version = version
+
+    @classmethod
+    async def _get_directory(cls, tenant_id: int) -> _TenantDirectory:
+        """获取组织目录（超过检查间隔时比较共享版本号，版本变化则清空）"""
+        now = time.monotonic()
+        directory = cls._tenants.get(tenant_id)
+        if directory is not None and now - directory.checked_at < USER_DIRECTORY_VERSION_CHECK_INTERVAL:
+            return directory
+
+        version = await cache_manager.get(USER_DIRECTORY_VERSION_NAMESPACE, str(tenant_id))
+        if directory is None or directory.version != version:
+            directory = _TenantDirectory(version=version, checked_at=now)
+            cls._tenants[tenant_id] = directory
+        else:
+            directory.checked_at = now
+        return directory
+
+    @staticmethod
+    async def _load(user_ids: list, tenant_id: Optional[int]) -> Dict[int, UserDirectoryEntry]:
+        """一次查询加载用户"""
+        query = User.filter(id__in=user_ids)
+        if tenant_id is not None:
+            query = query.filter(tenant_id=tenant_id)
+        rows = await query.values("id", "username", "full_name", "email")
+        return {
+            row["id"]: UserDirectoryEntry(
+                id=row["id"],
+                username=row["username"],
+                full_name=row["full_name"],
+                email=row["email"],
+            )
+            for row in rows
+        }
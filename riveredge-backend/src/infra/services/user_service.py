@@ -17,6 +17,7 @@ from infra.domain.tenant_context import get_current_tenant_id, require_tenant_co
 from infra.domain.security.security import hash_password
 from core.services.authorization.user_permission_service import UserPermissionService
 from core.services.authorization.permission_version_service import PermissionVersionService
+from infra.services.user_directory import UserDirectory
 
 
 class UserService:
@@ -242,6 +243,7 @@ class UserService:
             setattr(user, key, value)
         
         await user.save()
+        await UserDirectory.invalidate(user.tenant_id, user.id)
         
         return user
     
@@ -20,97 +20,77 @@ from loguru import logger
 src_path = Path(__file__).parent.parent
 sys.path.insert(0, str(src_path))
 
-from infra.infrastructure.database.database import register_db
-from tortoise import Tortoise
-from core.services.application.application_registry_service import ApplicationRegistryService
-from core.services.application.application_route_manager import init_route_manager
-from core.services.interfaces.service_initializer import ServiceInitializer
-
-# 导入所有平台级 API 路由
-# 注意：SuperAdmin Auth已移除，使用Platform Admin Auth替代
-from infra.api.tenants.tenants import router as tenants_router
-from infra.api.tenants.public import router as tenants_public_router
-from infra.api.packages.packages_config import router as packages_config_router
-from infra.api.packages.packages import router as packages_router
-from infra.api.infra_superadmin.infra_superadmin import router as infra_superadmin_router
-from infra.api.infra_superadmin.auth import router as infra_superadmin_auth_router
-from infra.api.auth.auth import router as auth_router
-from infra.api.monitoring.statistics import router as monitoring_statistics_router
-from infra.api.saved_searches.saved_searches import router as saved_searches_router
-from infra.api.init.init_wizard import router as init_wizard_router
-from infra.api.templates.templates import router as industry_template_router
-from infra.api.platform_settings.platform_settings import router as platform_settings_router
-from infra.api.platform_settings.public import router as platform_settings_public_router
-from infra.api.business_config.business_config import router as business_config_router
-
-# 导入所有系统级 API 路由（core）
-import sys
-sys.path.insert(0, str(Path(__file__).parent))
-
-from core.api.users.users import router as users_router
-from core.api.roles.roles import router as roles_router
-from core.api.permissions.permissions import router as permissions_router
-from core.api.access.policies import router as access_policies_router
-from core.api.departments.departments import router as departments_router
-from core.api.positions.positions import router as positions_router
-# 设备管理已迁移到 apps/kuaizhizao
-# from core.api.equipment.equipment import router as equipment_router
-# from core.api.maintenance_plans.maintenance_plans import router as maintenance_plans_router
-# from core.api.equipment_faults.equipment_faults import router as equipment_faults_router
-# from core.api.molds.molds import router as molds_router
-from core.api.data_dictionaries.data_dictionaries import router as data_dictionaries_router
-from core.api.system_parameters.system_parameters import router as system_parameters_router
-from core.api.code_rules.code_rules import router as code_rules_router
-from core.api.code_rules.material_code_rules import router as material_code_rules_router
-from core.api.variant_attributes.variant_attributes import router as variant_attributes_router
-from core.api.custom_fields.custom_fields import router as custom_fields_router
-from core.api.site_settings.site_settings import router as site_settings_router
-from core.api.invitation_codes.invitation_codes import router as invitation_codes_router
-from core.api.languages.languages import router as languages_router
-from core.api.applications.applications import router as applications_router
-from core.api.menus.menus import router as menus_router
-from core.api.integration_configs.integration_configs import router as integration_configs_router
-from core.api.files.files import router as files_router
-from core.api.files.public import router as files_public_router
-from core.api.apis.apis import router as apis_router
-from core.api.data_sources.data_sources import router as data_sources_router
-from core.api.application_connections.application_connections import router as application_connections_router
-from core.api.connector_definitions.connector_definitions import router as connector_definitions_router
-from core.api.datasets.datasets import router as datasets_router
-from core.api.messages.message_configs import router as message_configs_router
-from core.api.messages.message_templates import router as message_templates_router
-from core.api.messages.messages import router as messages_router
-from core.api.scheduled_tasks.scheduled_tasks import router as scheduled_tasks_router
-from core.api.approval_processes import approval_processes_router, approval_instances_router
-from core.api.scripts.scripts import router as scripts_router
-from core.api.print_templates.print_templates import router as print_templates_router
-from core.api.print_devices.print_devices import router as print_devices_router
-from core.api.working_hours_configs.working_hours_configs import router as working_hours_configs_router
-from core.api.reports.report_templates import router as report_templates_router
-from core.api.qrcode import router as qrcode_router
-from core.api.websocket import websocket_router
-from core.api.user_profile.user_profile import router as user_profile_router
-from core.api.user_preferences.user_preferences import router as user_preferences_router
-from core.api.user_messages.user_messages import router as user_messages_router
-from core.api.user_tasks.user_tasks import router as user_tasks_router
-from core.api.data_backups.data_backups import router as data_backups_router
-from core.api.operation_logs.operation_logs import router as operation_logs_router
-from core.api.document_tracking import router as document_tracking_router
-from core.api.login_logs.login_logs import router as login_logs_router
-from core.api.online_users.online_users import router as online_users_router
-from core.api.help_documents.help_documents import router as help_documents_router
-from core.api.ai.suggestions import router as ai_suggestions_router
-from core.api.onboarding.onboarding import router as onboarding_router
-from core.api.data_quality.data_quality import router as data_quality_router
-from core.api.operation_guide.operation_guide import router as operation_guide_router
-from core.api.launch_progress.launch_progress import router as launch_progress_router
-from core.api.launch_checklist.launch_checklist import router as launch_checklist_router
-from core.api.usage_analysis.usage_analysis import router as usage_analysis_router
-from core.api.optimization_suggestion.optimization_suggestion import router as optimization_suggestion_router
-from core.api.performance.performance import router as performance_router
-
-# 插件管理器API
-from core.api.plugin_manager.plugin_manager import router as plugin_manager_router
+from core.utils.startup_profiler import startup_profiler
+
+with startup_profiler.phase("导入基础服务"), startup_profiler.track_import():
+    from infra.infrastructure.database.database import register_db
+    from tortoise import Tortoise
+    from core.services.application.application_registry_service import ApplicationRegistryService
+    from core.services.application.application_route_manager import init_route_manager
+    from core.services.interfaces.service_initializer import ServiceInitializer
+    from core.utils.lazy_router import LazyRouterRegistry
+
+with startup_profiler.phase("导入平台级与系统级路由"), startup_profiler.track_import():
+    # 导入所有平台级 API 路由
+    # 注意：SuperAdmin Auth已移除，使用Platform Admin Auth替代
+    from infra.api.tenants.tenants import router as tenants_router
+    from infra.api.tenants.public import router as tenants_public_router
+    from infra.api.packages.packages_config import router as packages_config_router
+    from infra.api.packages.packages import router as packages_router
+    from infra.api.infra_superadmin.infra_superadmin import router as infra_superadmin_router
+    from infra.api.infra_superadmin.auth import router as infra_superadmin_auth_router
+    from infra.api.auth.auth import router as auth_router
+    from infra.api.monitoring.statistics import router as monitoring_statistics_router
+    from infra.api.saved_searches.saved_searches import router as saved_searches_router
+    from infra.api.platform_settings.platform_settings import router as platform_settings_router
+    from infra.api.platform_settings.public import router as platform_settings_public_router
+    from infra.api.business_config.business_config import router as business_config_router
+
+    # 导入所有系统级 API 路由（core）
+    import sys
+    sys.path.insert(0, str(Path(__file__).parent))
+
+    from core.api.users.users import router as users_router
+    from core.api.roles.roles import router as roles_router
+    from core.api.permissions.permissions import router as permissions_router
+    from core.api.access.policies import router as access_policies_router
+    from core.api.departments.departments import router as departments_router
+    from core.api.positions.positions import router as positions_router
+    # 设备管理已迁移到 apps/kuaizhizao
+    # from core.api.equipment.equipment import router as equipment_router
+    # from core.api.maintenance_plans.maintenance_plans import router as maintenance_plans_router
+    # from core.api.equipment_faults.equipment_faults import router as equipment_faults_router
+    # from core.api.molds.molds import router as molds_router
+    from core.api.data_dictionaries.data_dictionaries import router as data_dictionaries_router
+    from core.api.system_parameters.system_parameters import router as system_parameters_router
+    from core.api.code_rules.code_rules import router as code_rules_router
+    from core.api.code_rules.material_code_rules import router as material_code_rules_router
+    from core.api.variant_attributes.variant_attributes import router as variant_attributes_router
+    from core.api.custom_fields.custom_fields import router as custom_fields_router
+    from core.api.site_settings.site_settings import router as site_settings_router
+    from core.api.invitation_codes.invitation_codes import router as invitation_codes_router
+    from core.api.languages.languages import router as languages_router
+    from core.api.applications.applications import router as applications_router
+    from core.api.menus.menus import router as menus_router
+    from core.api.integration_configs.integration_configs import router as integration_configs_router
+    from core.api.files.files import router as files_router
+    from core.api.files.public import router as files_public_router
+    from core.api.messages.message_configs import router as message_configs_router
+    from core.api.messages.message_templates import router as message_templates_router
+    from core.api.messages.messages import router as messages_router
+    from core.api.scheduled_tasks.scheduled_tasks import router as scheduled_tasks_router
+    from core.api.approval_processes import approval_processes_router, approval_instances_router
+    from core.api.working_hours_configs.working_hours_configs import router as working_hours_configs_router
+    from core.api.qrcode import router as qrcode_router
+    from core.api.websocket import websocket_router
+    from core.api.user_profile.user_profile import router as user_profile_router
+    from core.api.user_preferences.user_preferences import router as user_preferences_router
+    from core.api.user_messages.user_messages import router as user_messages_router
+    from core.api.user_tasks.user_tasks import router as user_tasks_router
+    from core.api.operation_logs.operation_logs import router as operation_logs_router
+    from core.api.document_tracking import router as document_tracking_router
+    from core.api.login_logs.login_logs import router as login_logs_router
+    from core.api.online_users.online_users import router as online_users_router
 
 # 应用路由现在通过 ApplicationRegistryService 动态注册
 # 无需手动导入应用路由模块
@@ -134,34 +114,45 @@ MODE = os.getenv("MODE", "saas")
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
     # 注册 Tortoise ORM 数据库连接
-    await register_db(app)
+    with startup_profiler.phase("注册数据库"):
+        await register_db(app)
     logger.info("✅ Tortoise ORM 已注册")
     
     # 初始化 Redis 连接
-    try:
-        from infra.infrastructure.cache.cache import cache
-        await cache.connect()
-        logger.info("✅ Redis 连接已初始化")
-    except Exception as e:
-        logger.error(f"❌ Redis 连接初始化失败: {e}")
-        # Redis 连接失败不影响应用启动，但会影响相关功能
-        logger.warning("⚠️  在线用户等功能将不可用")
+    with startup_profiler.phase("连接 Redis"):
+        try:
+            from infra.infrastructure.cache.cache import cache
+            await cache.connect()
+            logger.info("✅ Redis 连接已初始化")
+        except Exception as e:
+            logger.error(f"❌ Redis 连接初始化失败: {e}")
+            # Redis 连接失败不影响应用启动，但会影响相关功能
+            logger.warning("⚠️  在线用户等功能将不可用")
 
-    # 初始化服务接口层（系统级）
-    await ServiceInitializer.initialize_services()
-    logger.info("✅ 系统级服务接口层已初始化")
-    
-    # ⚠️ 第三阶段改进：初始化平台级服务接口层
-    from infra.services.interfaces.service_initializer import InfraServiceInitializer
-    await InfraServiceInitializer.initialize_services()
-    logger.info("✅ 平台级服务接口层已初始化")
+        # 启动 WebSocket 跨进程消息总线（Redis 不可用时仅本进程推送）
+        try:
+            from core.services.websocket.websocket_service import websocket_bus
+            await websocket_bus.start()
+        except Exception as e:
+            logger.warning(f"⚠️  WebSocket 消息总线启动失败: {e}")
+
+    with startup_profiler.phase("初始化服务接口层"):
+        # 初始化服务接口层（系统级）
+        await ServiceInitializer.initialize_services()
+        logger.info("✅ 系统级服务接口层已初始化")
+        
+        # ⚠️ 第三阶段改进：初始化平台级服务接口层
+        from infra.services.interfaces.service_initializer import InfraServiceInitializer
+        await InfraServiceInitializer.initialize_services()
+        logger.info("✅ 平台级服务接口层已初始化")
 
     # ⚠️ 第一阶段改进：初始化应用路由管理器
     init_route_manager(app)
     logger.info("✅ 应用路由管理器已初始化")
 
     # 数据库连接建立后，重新初始化应用注册服务（使用真实的数据库数据）
-    await ApplicationRegistryService.reload_apps()
+    with startup_profiler.phase("注册应用模型与路由"):
+        await ApplicationRegistryService.reload_apps()
     logger.info("✅ 应用注册服务已重新初始化")
     
     # 在lifespan中加载插件路由（确保路由管理器已初始化）
@@ -183,8 +174,49 @@ async def lifespan(app: FastAPI):
             if app_routes:
                 logger.debug(f"      路由示例: {app_routes[:3]}")
 
+    # 启动数据库连接池看门狗（记录长时间占用连接的请求与已占满的连接池）
+    from infra.infrastructure.database.pool_manager import pool_watchdog
+    pool_watchdog.start()
+
+    # 预热报表渲染进程池，并将上次进程退出时遗留的未完成渲染任务标记为失败
+    try:
+        from core.services.report_engines.render_pool import render_pool
+        from core.services.report_template.report_template_service import ReportTemplateService
+        if infra_settings.REPORT_RENDER_WARM_UP:
+            render_pool.warm_up()
+        await ReportTemplateService.fail_orphaned_render_jobs()
+    except Exception as e:
+        logger.warning(f"⚠️  报表渲染进程池初始化失败: {e}")
+
+    startup_profiler.mark_ready()
+    report = startup_profiler.report()
+    logger.info(
+        f"✅ 启动完成，耗时 {report['total_ms']:.0f}ms"
+        f"（导入 {report['import_ms']:.0f}ms，数据库 {report['db_ms']:.0f}ms）"
+    )
+
     yield
 
+    # 停止数据库连接池看门狗
+    try:
+        await pool_watchdog.stop()
+    except Exception as e:
+        logger.warning(f"停止数据库连接池看门狗时出错: {e}")
+
+    # 停止 WebSocket 消息总线（须在关闭 Redis 之前）
+    try:
+        from core.services.websocket.websocket_service import websocket_bus
+        await websocket_bus.stop()
+    except Exception as e:
+        logger.warning(f"停止 WebSocket 消息总线时出错: {e}")
+
+    # 关闭消息发送连接池（SMTP 会话、共享 HTTP 客户端）
+    try:
+        from core.services.messaging.message_transport import message_transport
+        await message_transport.close()
+    except Exception as e:
+        logger.warning(f"关闭消息发送连接池时出错: {e}")
+
     # 关闭 Redis 连接
     try:
         from infra.infrastructure.cache.cache import cache
@@ -192,6 +224,13 @@ async def lifespan(app: FastAPI):
         logger.info("✅ Redis 连接已关闭")
     except Exception as e:
         logger.warning(f"关闭 Redis 连接时出错: {e}")
+
+    # 关闭报表渲染进程池
+    try:
+        from core.services.report_engines.render_pool import render_pool
+        render_pool.shutdown()
+    except Exception as e:
+        logger.warning(f"关闭报表渲染进程池时出错: {e}")
     
     # ⚠️ 注意：close_db_connections 已经在 register_db 中注册为 shutdown 事件
     # 这里不需要再次关闭，避免重复关闭导致错误
@@ -216,6 +255,7 @@ app.add_middleware(
     allow_credentials=infra_settings.CORS_ALLOW_CREDENTIALS,
     allow_methods=infra_settings.CORS_ALLOW_METHODS,
     allow_headers=infra_settings.CORS_ALLOW_HEADERS,
+    expose_headers=["X-Next-Cursor"],  # 列表接口键集分页游标
 )
 
 # 注册统一异常处理中间件（应该在其他中间件之前注册）
@@ -230,6 +270,10 @@ app.add_middleware(PerformanceMiddleware)
 from core.middleware.operation_log_middleware import OperationLogMiddleware
 app.add_middleware(OperationLogMiddleware)
 
+# 注册读路由中间件（请求级写后读粘滞，未配置只读副本时直接放行）
+from core.middleware.read_routing_middleware import ReadRoutingMiddleware
+app.add_middleware(ReadRoutingMiddleware)
+
 # 动态加载插件路由
 # 使用新的插件管理器进行动态插件加载
 def load_plugin_routes():
@@ -296,8 +340,13 @@ if INNGEST_AVAILABLE:
             sop_node_complete_workflow_function,
             material_ai_suggestion_workflow,
             material_change_notification_workflow,
+            bom_import_job_workflow,
             data_backup_workflow,
             data_restore_workflow,
+            reporting_rollup_scheduler_function,
+            reporting_rollup_worker_function,
+            demand_computation_job_workflow,
+            standard_cost_rollup_workflow,
         )
         
         # 准备所有 Inngest 函数列表（过滤掉 None 值）
@@ -311,8 +360,13 @@ if INNGEST_AVAILABLE:
                 sop_node_complete_workflow_function,
                 material_ai_suggestion_workflow,
                 material_change_notification_workflow,
+                bom_import_job_workflow,
                 data_backup_workflow,
                 data_restore_workflow,
+                reporting_rollup_scheduler_function,
+                reporting_rollup_worker_function,
+                demand_computation_job_workflow,
+                standard_cost_rollup_workflow,
             ] if func is not None
         ]
         
@@ -345,6 +399,54 @@ async def health_check():
         "service": "riveredge-backend"
     }
 
+@app.get("/health/startup")
+async def health_check_startup():
+    """
+    启动耗时报告
+
+    返回进程启动各阶段耗时（含模块导入与数据库耗时）、启动清单来源与延迟路由加载情况，
+    用于分析 worker 冷启动与扩容耗时。
+    """
+    from core.utils.startup_manifest import get_startup_manifest
+
+    manifest = get_startup_manifest()
+    return {
+        **startup_profiler.report(),
+        "manifest": {
+            "source": manifest.source,
+            "fingerprint": manifest.data.get("fingerprint"),
+            "generated_at": manifest.data.get("generated_at"),
+        },
+        "lazy_routers_pending": lazy_routers.pending(),
+    }
+
+@app.get("/health/db-routing")
+async def health_check_db_routing():
+    """
+    数据库读写路由统计
+
+    返回是否启用只读副本、进程内走副本/主库的读取次数、写入次数与当前处于写后读粘滞窗口的组织数。
+    """
+    from infra.infrastructure.database.db_router import get_routing_stats
+
+    return get_routing_stats()
+
+@app.get("/health/db-pool")
+async def health_check_db_pool():
+    """
+    数据库连接池指标
+
+    返回各连接池（ORM default/replica、原生 SQL raw、外部数据源）的大小、使用中与空闲连接数、
+    等待中的请求数、借出等待时间（平均/p95/最大）、超时次数与占用连接最久的请求。
+    """
+    from infra.infrastructure.database.pool_manager import get_pool_stats, resolve_pool_size
+
+    min_size, max_size = resolve_pool_size()
+    return {
+        "orm_pool_size": {"min_size": min_size, "max_size": max_size},
+        "pools": get_pool_stats(),
+    }
+
 # 调试端点：仅开发环境可用，生产环境不注册
 def _is_debug_allowed() -> bool:
     env = os.getenv("ENVIRONMENT", "development")
@@ -595,8 +697,6 @@ app.include_router(tenants_router, prefix="/api/v1/infra")
 app.include_router(infra_superadmin_auth_router, prefix="/api/v1/infra")
 app.include_router(infra_superadmin_router, prefix="/api/v1/infra")
 app.include_router(saved_searches_router, prefix="/api/v1")
-app.include_router(init_wizard_router, prefix="/api/v1/infra")
-app.include_router(industry_template_router, prefix="/api/v1/infra")
 app.include_router(platform_settings_router, prefix="/api/v1/infra")
 app.include_router(business_config_router, prefix="/api/v1/infra")
 
@@ -625,46 +725,53 @@ app.include_router(applications_router, prefix="/api/v1/core")
 app.include_router(menus_router, prefix="/api/v1/core")
 app.include_router(integration_configs_router, prefix="/api/v1/core")
 app.include_router(files_router, prefix="/api/v1/core")
-app.include_router(apis_router, prefix="/api/v1/core")
-app.include_router(data_sources_router, prefix="/api/v1/core")
-app.include_router(application_connections_router, prefix="/api/v1/core")
-app.include_router(connector_definitions_router, prefix="/api/v1/core")
-app.include_router(datasets_router, prefix="/api/v1/core")
 app.include_router(message_configs_router, prefix="/api/v1/core")
 app.include_router(message_templates_router, prefix="/api/v1/core")
 app.include_router(messages_router, prefix="/api/v1/core")
 app.include_router(scheduled_tasks_router, prefix="/api/v1/core")
 app.include_router(approval_processes_router, prefix="/api/v1/core")
 app.include_router(approval_instances_router, prefix="/api/v1/core")
-app.include_router(scripts_router, prefix="/api/v1/core")
-app.include_router(print_templates_router, prefix="/api/v1/core")
-app.include_router(print_devices_router, prefix="/api/v1/core")
 app.include_router(working_hours_configs_router, prefix="/api/v1/core")
-app.include_router(report_templates_router, prefix="/api/v1/core")
 app.include_router(qrcode_router, prefix="/api/v1/core")
 app.include_router(websocket_router, prefix="/api/v1/core")
 app.include_router(user_profile_router, prefix="/api/v1/personal")
 app.include_router(user_preferences_router, prefix="/api/v1/personal")
 app.include_router(user_messages_router, prefix="/api/v1/personal")
 app.include_router(user_tasks_router, prefix="/api/v1/personal")
-app.include_router(data_backups_router, prefix="/api/v1/core")
 app.include_router(operation_logs_router, prefix="/api/v1/core")
 app.include_router(document_tracking_router, prefix="/api/v1/core")
 app.include_router(login_logs_router, prefix="/api/v1/core")
 app.include_router(online_users_router, prefix="/api/v1/core")
-app.include_router(help_documents_router, prefix="/api/v1/core")
-app.include_router(ai_suggestions_router, prefix="/api/v1/core")
-app.include_router(onboarding_router, prefix="/api/v1/core")
-app.include_router(data_quality_router, prefix="/api/v1/core")
-app.include_router(operation_guide_router, prefix="/api/v1/core")
-app.include_router(launch_progress_router, prefix="/api/v1/core")
-app.include_router(launch_checklist_router, prefix="/api/v1/core")
-app.include_router(usage_analysis_router, prefix="/api/v1/core")
-app.include_router(optimization_suggestion_router, prefix="/api/v1/core")
-app.include_router(performance_router, prefix="/api/v1/core")
-
-# 插件管理器路由 (Plugin Manager APIs)
-app.include_router(plugin_manager_router, prefix="/api/v1/core")
+
+# 不常用的路由延迟加载：启动时只登记路由前缀，首次访问时才导入路由模块（见 core.utils.lazy_router）
+lazy_routers = LazyRouterRegistry(app)
+for _module_path, _prefix in (
+    ("infra.api.init.init_wizard", "/api/v1/infra"),
+    ("infra.api.templates.templates", "/api/v1/infra"),
+    ("core.api.apis.apis", "/api/v1/core"),
+    ("core.api.data_sources.data_sources", "/api/v1/core"),
+    ("core.api.application_connections.application_connections", "/api/v1/core"),
+    ("core.api.connector_definitions.connector_definitions", "/api/v1/core"),
+    ("core.api.datasets.datasets", "/api/v1/core"),
+    ("core.api.scripts.scripts", "/api/v1/core"),
+    ("core.api.print_templates.print_templates", "/api/v1/core"),
+    ("core.api.print_devices.print_devices", "/api/v1/core"),
+    ("core.api.reports.report_templates", "/api/v1/core"),
+    ("core.api.data_backups.data_backups", "/api/v1/core"),
+    ("core.api.help_documents.help_documents", "/api/v1/core"),
+    ("core.api.ai.suggestions", "/api/v1/core"),
+    ("core.api.onboarding.onboarding", "/api/v1/core"),
+    ("core.api.data_quality.data_quality", "/api/v1/core"),
+    ("core.api.operation_guide.operation_guide", "/api/v1/core"),
+    ("core.api.launch_progress.launch_progress", "/api/v1/core"),
+    ("core.api.launch_checklist.launch_checklist", "/api/v1/core"),
+    ("core.api.usage_analysis.usage_analysis", "/api/v1/core"),
+    ("core.api.optimization_suggestion.optimization_suggestion", "/api/v1/core"),
+    ("core.api.performance.performance", "/api/v1/core"),
+    # 插件管理器路由 (Plugin Manager APIs)
+    ("core.api.plugin_manager.plugin_manager", "/api/v1/core"),
+):
+    lazy_routers.add(_module_path, prefix=_prefix)
 
 # 应用级功能路由现在通过 ApplicationRegistryService 动态注册
 # kuaireport 静态注册，确保报表/大屏 API 始终可用（动态注册可能因应用未安装而失败）
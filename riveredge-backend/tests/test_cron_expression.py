@@ -0,0 +1,190 @@
+"""
+Cron 表达式解析与定时任务触发时间计算 - 单元测试
+
+覆盖范围、步长、日/周“或”匹配、月末与闰年、夏令时切换等情况。
+
+Author: RiverEdge Team
+Date: 2026-03-05
+"""
+
+from datetime import datetime
+
+import pytest
+import pytz
+
+from core.services.scheduling import task_trigger
+from core.utils.cron import CronExpression
+
+
+def _next_times(expression: str, start: datetime, count: int):
+    """从 start 之后依次取 count 个触发时间"""
+    iterator = CronExpression(expression).iter_after(start)
+    return [next(iterator) for _ in range(count)]
+
+
+@pytest.mark.unit
+class TestCronFieldParsing:
+    """字段解析：范围、步长、列表、名称"""
+
+    def test_range(self):
+        """范围 a-b 包含两端"""
+        cron = CronExpression("0 9-11 * * *")
+        assert cron.hours == [9, 10, 11]
+        assert _next_times("0 9-11 * * *", datetime(2026, 3, 5, 10, 30), 3) == [
+            datetime(2026, 3, 5, 11, 0),
+            datetime(2026, 3, 6, 9, 0),
+            datetime(2026, 3, 6, 10, 0),
+        ]
+
+    def test_steps(self):
+        """步长 */n、a-b/n、a/n"""
+        assert CronExpression("*/15 * * * *").minutes == [0, 15, 30, 45]
+        assert CronExpression("10-30/10 * * * *").minutes == [10, 20, 30]
+        assert CronExpression("50/5 * * * *").minutes == [50, 55]
+        assert CronExpression("0 */6 * * *").hours == [0, 6, 12, 18]
+
+    def test_list_and_names(self):
+        """列表与月份、星期名称，星期 7 等同于 0（周日）"""
+        cron = CronExpression("0,30 8 * JAN,jul MON-FRI")
+        assert cron.minutes == [0, 30]
+        assert cron.months == [1, 7]
+        assert cron.weekdays == {0, 1, 2, 3, 4}
+        assert CronExpression("0 0 * * 7").weekdays == CronExpression("0 0 * * SUN").weekdays == {6}
+
+    def test_macros(self):
+        """预定义表达式"""
+        assert _next_times("@hourly", datetime(2026, 3, 5, 10, 30), 1) == [datetime(2026, 3, 5, 11, 0)]
+        assert _next_times("@monthly", datetime(2026, 3, 5, 10, 30), 1) == [datetime(2026, 4, 1, 0, 0)]
+
+    @pytest.mark.parametrize("expression", [
+        "* * * *",
+        "60 * * * *",
+        "* 24 * * *",
+        "* * 0 * *",
+        "* * * 13 *",
+        "*/0 * * * *",
+        "5-1 * * * *",
+        "1,,2 * * * *",
+        "* * * FOO *",
+    ])
+    def test_invalid(self, expression):
+        """无效表达式抛出 ValueError"""
+        with pytest.raises(ValueError):
+            CronExpression(expression)
+
+
+@pytest.mark.unit
+class TestCronDayMatching:
+    """日与周的匹配规则"""
+
+    def test_day_of_month_only(self):
+        """只限定日：周任意"""
+        assert _next_times("0 0 15 * *", datetime(2026, 3, 5), 2) == [
+            datetime(2026, 3, 15),
+            datetime(2026, 4, 15),
+        ]
+
+    def test_day_of_week_only(self):
+        """只限定周：日任意（2026-03-05 为周四）"""
+        assert _next_times("0 0 * * MON", datetime(2026, 3, 5), 2) == [
+            datetime(2026, 3, 9),
+            datetime(2026, 3, 16),
+        ]
+
+    def test_day_of_month_or_day_of_week(self):
+        """日与周同时限定时按“或”匹配（Vixie cron）"""
+        assert _next_times("0 0 13 * FRI", datetime(2026, 3, 5), 4) == [
+            datetime(2026, 3, 6),
+            datetime(2026, 3, 13),
+            datetime(2026, 3, 20),
+            datetime(2026, 3, 27),
+        ]
+
+    def test_question_mark_is_wildcard(self):
+        """? 等同于 *，不触发“或”匹配"""
+        assert _next_times("0 0 ? * MON", datetime(2026, 3, 5), 1) == [datetime(2026, 3, 9)]
+
+
+@pytest.mark.unit
+class TestCronMonthEnds:
+    """月末、闰年与跨年"""
+
+    def test_day_31_skips_short_months(self):
+        """31 日只在有 31 天的月份触发"""
+        assert _next_times("0 0 31 * *", datetime(2026, 1, 31, 12, 0), 3) == [
+            datetime(2026, 3, 31),
+            datetime(2026, 5, 31),
+            datetime(2026, 7, 31),
+        ]
+
+    def test_leap_day(self):
+        """2 月 29 日只在闰年触发"""
+        assert _next_times("0 0 29 2 *", datetime(2026, 3, 5), 2) == [
+            datetime(2028, 2, 29),
+            datetime(2032, 2, 29),
+        ]
+
+    def test_never_fires(self):
+        """永远不会触发的表达式返回 None"""
+        assert CronExpression("0 0 30 2 *").next_after(datetime(2026, 3, 5)) is None
+
+    def test_year_rollover(self):
+        """跨月、跨年"""
+        assert _next_times("59 23 31 12 *", datetime(2026, 12, 31, 23, 59), 1) == [datetime(2027, 12, 31, 23, 59)]
+        assert _next_times("0 0 1 * *", datetime(2026, 12, 31, 23, 59), 1) == [datetime(2027, 1, 1)]
+
+    def test_strictly_after(self):
+        """触发时间严格晚于给定时间，且忽略秒"""
+        assert CronExpression("30 10 * * *").next_after(datetime(2026, 3, 5, 10, 30, 0)) == datetime(2026, 3, 6, 10, 30)
+        assert CronExpression("* * * * *").next_after(datetime(2026, 3, 5, 10, 30, 45)) == datetime(2026, 3, 5, 10, 31)
+
+
+@pytest.mark.unit
+class TestCronDaylightSavingTime:
+    """启用时区时按本地墙上时间计算（America/New_York：2026-03-08 02:00 跳到 03:00，2026-11-01 02:00 回到 01:00）"""
+
+    @pytest.fixture(autouse=True)
+    def _new_york(self, monkeypatch):
+        monkeypatch.setenv("USE_TZ", "True")
+        monkeypatch.setenv("TIMEZONE", "America/New_York")
+
+    @staticmethod
+    def _local(*args, is_dst=False):
+        return pytz.timezone("America/New_York").localize(datetime(*args), is_dst=is_dst)
+
+    def test_wall_clock_across_spring_forward(self):
+        """每日 09:00 在切换前后都按本地时间触发"""
+        after = self._local(2026, 3, 7, 9, 0)
+        fire = task_trigger.following("cron", {"cron": "0 9 * * *"}, after)
+        assert fire == self._local(2026, 3, 8, 9, 0)
+        assert (fire - after).total_seconds() == 23 * 3600
+
+    def test_skipped_time_moves_after_transition(self):
+        """不存在的 02:30 顺延到切换后，不抛出异常"""
+        fire = task_trigger.following("cron", {"cron": "30 2 * * *"}, self._local(2026, 3, 7, 12, 0))
+        assert fire.astimezone(pytz.utc) == datetime(2026, 3, 8, 7, 30, tzinfo=pytz.utc)
+        assert fire.astimezone(pytz.timezone("America/New_York")).hour == 3
+
+    def test_repeated_time_fires_once(self):
+        """重复的 01:30 只触发一次，下一次为次日"""
+        after = self._local(2026, 10, 31, 12, 0)
+        first = task_trigger.following("cron", {"cron": "30 1 * * *"}, after)
+        second = task_trigger.following("cron", {"cron": "30 1 * * *"}, first)
+        assert first.astimezone(pytz.utc) == datetime(2026, 11, 1, 6, 30, tzinfo=pytz.utc)
+        assert second == self._local(2026, 11, 2, 1, 30)
+
+    def test_fires_strictly_increase_through_fall_back(self):
+        """回拨期间逐分钟触发时间严格递增"""
+        current = self._local(2026, 11, 1, 0, 50)
+        for _ in range(150):
+            following = task_trigger.following("cron", {"cron": "*/10 * * * *"}, current)
+            assert following > current
+            current = following
+
+    def test_due_fires_across_spring_forward(self):
+        """停机跨过切换时按补偿策略计算，不因不存在的时间失败"""
+        next_run_at = self._local(2026, 3, 8, 1, 0)
+        now = self._local(2026, 3, 8, 4, 5, is_dst=True)
+        fires, scheduled = task_trigger.due_fires("cron", {"cron": "0 * * * *"}, next_run_at, now, "run_all")
+        assert [fire.astimezone(pytz.utc).hour for fire in fires] == [6, 7, 8]
+        assert scheduled == self._local(2026, 3, 8, 5, 0, is_dst=True)
@@ -0,0 +1,195 @@
+"""
+数据库读写路由 - 单元测试
+
+以两个 SQLite 内存库分别充当主库（default）与副本（replica），各写入一条可区分来源的记录，
+验证读取路由、写后读一致（请求内与组织粘滞窗口）以及事务内读取走主库。
+
+Author: RiverEdge Team
+Date: 2026-03-05
+"""
+
+import pytest
+from tortoise import Tortoise, connections, fields
+from tortoise.exceptions import ParamsError
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
+
+from infra.config.infra_config import infra_settings
+from infra.domain.tenant_context import set_current_tenant_id
+from infra.infrastructure.database import db_router
+
+
+class RoutingProbe(Model):
+    """路由探测模型（name 记录所在的库）"""
+
+    id = fields.IntField(pk=True)
+    name = fields.CharField(max_length=20)
+
+    class Meta:
+        table = "test_routing_probe"
+
+
+CREATE_PROBE_SQL = 'CREATE TABLE "test_routing_probe" ("id" INTEGER PRIMARY KEY AUTOINCREMENT, "name" VARCHAR(20) NOT NULL)'
+
+
+async def _read_source() -> str:
+    """读取探测记录，返回提供该记录的库"""
+    probe = await RoutingProbe.filter(id=1).first()
+    return probe.name
+
+
+@pytest.fixture
+async def routed_db(monkeypatch):
+    monkeypatch.setattr(db_router, "_replica_configured", True)
+    monkeypatch.setattr(db_router, "_tenant_writes", {})
+    monkeypatch.setattr(db_router, "_stats", {"replica_reads": 0, "primary_reads": 0, "writes": 0})
+    await Tortoise.init(config={
+        "connections": {
+            db_router.PRIMARY_CONNECTION: "sqlite://:memory:",
+            db_router.REPLICA_CONNECTION: "sqlite://:memory:",
+        },
+        "routers": [db_router.ROUTER_PATH],
+        "apps": {"models": {"models": [__name__], "default_connection": db_router.PRIMARY_CONNECTION}},
+    })
+    for name in (db_router.PRIMARY_CONNECTION, db_router.REPLICA_CONNECTION):
+        conn = connections.get(name)
+        await conn.execute_script(CREATE_PROBE_SQL)
+        await conn.execute_query('INSERT INTO "test_routing_probe" ("name") VALUES (?)', [name])
+    set_current_tenant_id(1)
+    yield
+    set_current_tenant_id(None)
+    await connections.close_all(discard=True)
+    Tortoise.apps = {}
+    Tortoise._inited = False
+
+
+@pytest.mark.unit
+class TestBuildReplicaConnection:
+    """副本连接配置"""
+
+    PRIMARY = {
+        "engine": "tortoise.backends.asyncpg",
+        "credentials": {
+            "host": "db-primary", "port": 5432, "user": "app", "password": "secret",
+            "database": "riveredge", "max_size": 20, "server_settings": {"timezone": "UTC"},
+        },
+    }
+
+    def test_not_configured(self, monkeypatch):
+        """未配置副本主机或已关闭时不启用副本"""
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_HOST", None)
+        assert db_router.build_replica_connection(self.PRIMARY) is None
+        assert not db_router.replica_configured()
+
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_HOST", "db-replica")
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_ENABLED", False)
+        assert db_router.build_replica_connection(self.PRIMARY) is None
+        assert not db_router.replica_configured()
+
+    def test_inherits_primary_credentials(self, monkeypatch):
+        """未单独配置的项沿用主库配置"""
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_HOST", "db-replica")
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_ENABLED", True)
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_PORT", 5433)
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_POOL_MAX_SIZE", 8)
+        monkeypatch.setattr(db_router, "_replica_configured", False)
+
+        replica = db_router.build_replica_connection(self.PRIMARY)
+        credentials = replica["credentials"]
+        assert db_router.replica_configured()
+        assert (credentials["host"], credentials["port"], credentials["max_size"]) == ("db-replica", 5433, 8)
+        assert (credentials["user"], credentials["password"], credentials["database"]) == ("app", "secret", "riveredge")
+        assert credentials["server_settings"] == {"timezone": "UTC", "application_name": "riveredge_asyncpg_replica"}
+        assert self.PRIMARY["credentials"]["host"] == "db-primary"
+
+
+@pytest.mark.unit
+class TestReadRouting:
+    """读取路由"""
+
+    async def test_unmarked_reads_use_primary(self, routed_db):
+        """未标记的读取走主库"""
+        with db_router.read_routing_scope():
+            assert await _read_source() == "default"
+
+    async def test_marked_reads_use_replica(self, routed_db):
+        """接口依赖与装饰器标记的读取走副本"""
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            assert await _read_source() == "replica"
+
+        @db_router.replica_read
+        async def report() -> str:
+            return await _read_source()
+
+        assert await report() == "replica"
+        assert await _read_source() == "default"
+
+    async def test_replica_not_configured(self, routed_db, monkeypatch):
+        """未配置副本时标记的读取也走主库"""
+        monkeypatch.setattr(db_router, "_replica_configured", False)
+        with db_router.use_replica():
+            assert await _read_source() == "default"
+
+    async def test_transaction_reads_use_primary(self, routed_db):
+        """事务内读取走主库，事务结束后本请求的读取仍留在主库"""
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            async with in_transaction(db_router.PRIMARY_CONNECTION):
+                assert await _read_source() == "default"
+            assert await _read_source() == "default"
+
+    async def test_unnamed_transaction_rejected(self, routed_db):
+        """存在副本连接时事务必须显式指定连接名"""
+        with pytest.raises(ParamsError):
+            async with in_transaction():
+                pass
+
+
+@pytest.mark.unit
+class TestReadYourWrites:
+    """写后读一致"""
+
+    async def test_write_in_request_pins_primary(self, routed_db):
+        """请求内写入后，本请求后续读取走主库"""
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            assert await _read_source() == "replica"
+            await RoutingProbe.create(name="written")
+            assert await _read_source() == "default"
+
+    async def test_tenant_sticky_window(self, routed_db, monkeypatch):
+        """组织写入后粘滞窗口内，该组织的新请求读取走主库；其他组织不受影响"""
+        clock = [1000.0]
+        monkeypatch.setattr(db_router.time, "monotonic", lambda: clock[0])
+        monkeypatch.setattr(infra_settings, "DB_REPLICA_STICKY_SECONDS", 5)
+
+        with db_router.read_routing_scope():
+            await RoutingProbe.create(name="written")
+
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            assert await _read_source() == "default"
+
+        set_current_tenant_id(2)
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            assert await _read_source() == "replica"
+
+        set_current_tenant_id(1)
+        clock[0] += 5.1
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            assert await _read_source() == "replica"
+        assert db_router.get_routing_stats()["sticky_tenants"] == 0
+
+    async def test_explicit_mark_write(self, routed_db):
+        """显式 mark_write（如 using_db 写入后）同样触发粘滞"""
+        with db_router.read_routing_scope():
+            await db_router.prefer_replica()
+            db_router.mark_write()
+            assert await _read_source() == "default"
+
+        stats = db_router.get_routing_stats()
+        assert stats["writes"] == 1
+        assert stats["sticky_tenants"] == 1
@@ -0,0 +1,258 @@
+"""
+消息发送传输层 - 单元测试
+
+SMTP 客户端替换为内存假实现，HTTP 服务商使用 httpx.MockTransport，
+验证连接复用、断线重连、HTTP 发送结果与令牌桶限流。
+
+Author: RiverEdge Team
+Date: 2026-03-05
+"""
+
+import json
+import time
+
+import aiosmtplib
+import httpx
+import pytest
+
+from core.services.messaging import message_transport as transport_module
+from core.services.messaging.message_transport import MessageTransport, OutboundMessage
+
+SMTP_CONFIG = {
+    "smtp_host": "smtp.example.com",
+    "smtp_port": 465,
+    "smtp_username": "noreply@example.com",
+    "smtp_password": "secret",
+}
+
+
+class FakeSMTP:
+    """内存假 SMTP 客户端（记录连接、登录与发送的邮件）"""
+
+    instances = []
+
+    def __init__(self, hostname=None, port=None, use_tls=None, timeout=None):
+        self.hostname = hostname
+        self.port = port
+        self.is_connected = False
+        self.logged_in = False
+        self.sent = []
+        self.disconnect_next = False
+        FakeSMTP.instances.append(self)
+
+    async def connect(self):
+        self.is_connected = True
+
+    async def login(self, username, password):
+        self.logged_in = True
+
+    async def send_message(self, message):
+        if self.disconnect_next:
+            self.disconnect_next = False
+            self.is_connected = False
+            raise aiosmtplib.SMTPServerDisconnected("Connection lost")
+        self.sent.append(message["To"])
+
+    async def quit(self):
+        self.is_connected = False
+
+    def close(self):
+        self.is_connected = False
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances = []
+    monkeypatch.setattr(transport_module.aiosmtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def _email(recipient: str, config=None) -> OutboundMessage:
+    return OutboundMessage(
+        type="email",
+        recipient=recipient,
+        content="hello",
+        subject="test",
+        config=dict(config or SMTP_CONFIG),
+        config_key="email-config",
+    )
+
+
+def _sms(recipient: str, config=None) -> OutboundMessage:
+    return OutboundMessage(type="sms", recipient=recipient, content="code 1234", config=dict(config or {}), config_key="sms-config")
+
+
+@pytest.mark.unit
+class TestSMTPPool:
+    """SMTP 连接池"""
+
+    async def test_connection_reused(self, fake_smtp):
+        """顺序发送复用同一个已登录的连接"""
+        transport = MessageTransport()
+        items = [_email(f"user{index}@example.com") for index in range(3)]
+        for item in items:
+            await transport.send(item)
+
+        assert all(item.success for item in items)
+        assert len(fake_smtp.instances) == 1
+        assert fake_smtp.instances[0].logged_in
+        assert fake_smtp.instances[0].sent == [item.recipient for item in items]
+        await transport.close()
+        assert not fake_smtp.instances[0].is_connected
+
+    async def test_reconnect_after_server_disconnect(self, fake_smtp):
+        """复用的连接被服务器关闭时重连并重试一次"""
+        transport = MessageTransport()
+        await transport.send(_email("first@example.com"))
+        fake_smtp.instances[0].disconnect_next = True
+
+        item = _email("second@example.com")
+        await transport.send(item)
+
+        assert item.success
+        assert len(fake_smtp.instances) == 2
+        assert fake_smtp.instances[1].sent == ["second@example.com"]
+        await transport.close()
+
+    async def test_max_messages_per_connection(self, fake_smtp, monkeypatch):
+        """达到单连接邮件上限后关闭连接，下一封邮件新建连接"""
+        monkeypatch.setattr(transport_module, "SMTP_MAX_MESSAGES_PER_CONNECTION", 2)
+        transport = MessageTransport()
+        for index in range(3):
+            await transport.send(_email(f"user{index}@example.com"))
+
+        assert [len(client.sent) for client in fake_smtp.instances] == [2, 1]
+        assert not fake_smtp.instances[0].is_connected
+        await transport.close()
+
+    async def test_separate_pool_per_config(self, fake_smtp):
+        """不同 SMTP 配置使用不同的连接池"""
+        transport = MessageTransport()
+        await transport.send(_email("a@example.com"))
+        await transport.send(_email("b@example.com", {**SMTP_CONFIG, "smtp_host": "smtp.other.com"}))
+
+        assert [client.hostname for client in fake_smtp.instances] == ["smtp.example.com", "smtp.other.com"]
+        await transport.close()
+
+    async def test_incomplete_config(self, fake_smtp):
+        """配置不完整时不连接服务器，直接返回失败"""
+        transport = MessageTransport()
+        item = _email("a@example.com", {"smtp_host": "smtp.example.com"})
+        await transport.send(item)
+
+        assert not item.success
+        assert "配置不完整" in item.error
+        assert fake_smtp.instances == []
+
+
+@pytest.mark.unit
+class TestHTTPProvider:
+    """短信/推送 HTTP 服务商"""
+
+    @staticmethod
+    def _transport(handler) -> MessageTransport:
+        transport = MessageTransport()
+        transport._http_client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        return transport
+
+    async def test_send_success(self):
+        """按配置的 api_url、headers 与 extra_params 发送 JSON 请求"""
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json={"ok": True})
+
+        transport = self._transport(handler)
+        item = _sms("13800000000", {
+            "api_url": "https://sms.example.com/send",
+            "headers": {"X-Api-Key": "key"},
+            "extra_params": {"sign": "RiverEdge"},
+        })
+        await transport.send(item)
+
+        assert item.success
+        assert requests[0].url == "https://sms.example.com/send"
+        assert requests[0].headers["X-Api-Key"] == "key"
+        body = json.loads(requests[0].content)
+        assert body["sign"] == "RiverEdge"
+        assert body["recipient"] == "13800000000"
+        assert body["content"] == "code 1234"
+        await transport.close()
+
+    async def test_provider_error(self):
+        """服务商返回错误状态码时记录失败原因"""
+        transport = self._transport(lambda request: httpx.Response(503, text="busy"))
+        item = _sms("13800000000", {"api_url": "https://sms.example.com/send"})
+        await transport.send(item)
+
+        assert not item.success
+        assert "HTTP 503" in item.error
+        await transport.close()
+
+    async def test_simulated_without_api_url(self):
+        """未配置 api_url 时模拟发送，不发出请求"""
+        transport = self._transport(lambda request: pytest.fail("不应发出请求"))
+        item = _sms("13800000000")
+        await transport.send(item)
+
+        assert item.success
+        assert "模拟" in item.message
+
+
+@pytest.mark.unit
+class TestRateLimit:
+    """令牌桶限流"""
+
+    def test_unconfigured_is_unlimited(self):
+        """未配置限速时不限流"""
+        transport = MessageTransport()
+        assert transport._bucket(_sms("1")).rate == 0
+
+    def test_bucket_rebuilt_when_config_changes(self):
+        """限速配置不变时复用令牌桶，变更后按新配置重建"""
+        transport = MessageTransport()
+        bucket = transport._bucket(_sms("1", {"rate_limit_per_second": 5}))
+        assert transport._bucket(_sms("2", {"rate_limit_per_second": 5})) is bucket
+
+        changed = transport._bucket(_sms("3", {"rate_limit_per_second": 50, "rate_limit_burst": 10}))
+        assert changed is not bucket
+        assert changed.rate == 50
+        assert changed.capacity == 10
+
+        assert transport._bucket(_sms("4")).rate == 0
+
+    async def test_unconfigured_batch_not_throttled(self):
+        """未配置限速时整批立即发送"""
+        transport = MessageTransport()
+        items = [_sms(str(index)) for index in range(200)]
+        started = time.monotonic()
+        await transport.send_batch(items)
+
+        assert all(item.success for item in items)
+        assert time.monotonic() - started < 0.5
+
+    async def test_configured_rate_throttles(self):
+        """配置限速后超出突发量的消息按速率等待"""
+        transport = MessageTransport()
+        config = {"rate_limit_per_second": 20, "rate_limit_burst": 1}
+        items = [_sms(str(index), config) for index in range(4)]
+        started = time.monotonic()
+        await transport.send_batch(items)
+
+        assert all(item.success for item in items)
+        assert time.monotonic() - started >= 0.14
+
+    async def test_batch_groups_by_provider(self, fake_smtp):
+        """一批消息按服务商分组发送，不支持的类型返回失败"""
+        transport = MessageTransport()
+        items = [
+            _email("a@example.com"),
+            _sms("13800000000"),
+            OutboundMessage(type="fax", recipient="x", content="", config_key="fax"),
+        ]
+        await transport.send_batch(items)
+
+        assert [item.success for item in items] == [True, True, False]
+        assert "不支持的消息类型" in items[2].error
+        await transport.close()